@@ -1,3 +1,4 @@
+import logging
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.utils.html import format_html
@@ -6,6 +7,8 @@ from django.utils import timezone
 from .models import Usuario, Rol, PermisoPersonalizado, SesionUsuario, LogAcceso
 from .forms import UsuarioCreationForm, UsuarioChangeForm
 
+logger = logging.getLogger('commercebox')
+
 
 @admin.register(Usuario)
 class UsuarioAdmin(UserAdmin):
@@ -255,6 +258,6 @@ def create_default_groups():
     for role_code, role_name in roles.items():
         group, created = Group.objects.get_or_create(name=role_name)
         if created:
-            print(f"Grupo creado: {role_name}")
+            logger.debug(f"Grupo creado: {role_name}")
 
 # Esta función se puede llamar en las migraciones o en el setup inicial
\ No newline at end of file
@@ -1,5 +1,8 @@
+import logging
 from django.apps import AppConfig
 
+logger = logging.getLogger('commercebox')
+
 
 class AuthenticationConfig(AppConfig):
     """Configuración de la aplicación de autenticación"""
@@ -27,7 +30,7 @@ class AuthenticationConfig(AppConfig):
             for role_code, role_name in roles.items():
                 group, created = Group.objects.get_or_create(name=role_name)
                 if created:
-                    print(f"Grupo creado: {role_name}")
+                    logger.debug(f"Grupo creado: {role_name}")
                     
         except Exception as e:
             # Durante las migraciones iniciales puede que no existan las tablas
@@ -204,26 +204,6 @@ def limpiar_tokens_expirados(sender, **kwargs):
             pass  # Ignorar errores durante migraciones
 
 
-# Signal para limpiar sesiones inactivas
-from celery import shared_task
-
-@shared_task
-def limpiar_sesiones_inactivas():
-    """Tarea para limpiar sesiones inactivas (ejecutar periódicamente)"""
-    from datetime import timedelta
-    
-    # Marcar como inactivas las sesiones que no han tenido actividad en 24 horas
-    limite = timezone.now() - timedelta(hours=24)
-    SesionUsuario.objects.filter(
-        fecha_ultimo_acceso__lt=limite,
-        activa=True
-    ).update(activa=False)
-    
-    # Eliminar logs antiguos (opcional, mantener solo últimos 3 meses)
-    limite_logs = timezone.now() - timedelta(days=90)
-    LogAcceso.objects.filter(fecha_evento__lt=limite_logs).delete()
-
-
 # Signal para validaciones adicionales de seguridad
 @receiver(pre_save, sender=Usuario)
 def validaciones_seguridad(sender, instance, **kwargs):
@@ -0,0 +1,42 @@
+"""
+Tareas de Celery para Autenticación
+apps/authentication/tasks.py
+"""
+from celery import shared_task
+from datetime import timedelta
+from importlib import import_module
+import logging
+
+from django.conf import settings
+from django.utils import timezone
+
+from commercebox.celery import TareaDeduplicada
+
+logger = logging.getLogger('commercebox')
+
+
+@shared_task(
+    name='apps.authentication.tasks.limpiar_sesiones_expiradas',
+    base=TareaDeduplicada
+)
+def limpiar_sesiones_expiradas(horas_inactividad=24):
+    """
+    Cierra las sesiones de usuario sin actividad y borra las sesiones
+    expiradas de Django (tarea diaria)
+
+    Los logs de acceso ya no se borran aquí: su retención y archivo los
+    gestiona `mantener_ciclo_datos`.
+    """
+    from .models import SesionUsuario
+
+    limite = timezone.now() - timedelta(hours=horas_inactividad)
+    cerradas = SesionUsuario.objects.filter(
+        fecha_ultimo_acceso__lt=limite,
+        activa=True
+    ).update(activa=False)
+
+    # No-op para backends sin almacenamiento (firmadas en cookie)
+    import_module(settings.SESSION_ENGINE).SessionStore.clear_expired()
+
+    logger.info(f"Sesiones de usuario cerradas por inactividad: {cerradas}")
+    return {'sesiones_cerradas': cerradas}
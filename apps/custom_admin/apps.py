@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CustomAdminConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.custom_admin'
+
+    def ready(self):
+        # Invalidación del estado del panel
+        import apps.custom_admin.signals
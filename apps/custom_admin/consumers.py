@@ -0,0 +1,44 @@
+# apps/custom_admin/consumers.py
+
+"""
+Modo push del estado del panel (ESTADO_PANEL_PUSH)
+
+Cada pestaña abierta se une al grupo global y al de su usuario. Cuando
+estado_panel.invalidar() avisa un cambio, el consumidor recalcula el estado
+(normalmente desde la caché) y lo envía solo si la versión cambió.
+"""
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from .estado_panel import GRUPO_GLOBAL, GRUPO_USUARIO, obtener_estado
+
+
+class EstadoPanelConsumer(AsyncJsonWebsocketConsumer):
+    """WebSocket /ws/panel/estado/ (autenticación por sesión)"""
+
+    async def connect(self):
+        usuario = self.scope.get('user')
+        if usuario is None or not usuario.is_authenticated:
+            await self.close()
+            return
+
+        self.version = None
+        self.grupos = [GRUPO_GLOBAL, GRUPO_USUARIO.format(usuario.pk)]
+        for grupo in self.grupos:
+            await self.channel_layer.group_add(grupo, self.channel_name)
+        await self.accept()
+        await self.enviar_estado()
+
+    async def disconnect(self, code):
+        for grupo in getattr(self, 'grupos', []):
+            await self.channel_layer.group_discard(grupo, self.channel_name)
+
+    async def estado_cambio(self, evento):
+        await self.enviar_estado()
+
+    async def enviar_estado(self):
+        estado = await database_sync_to_async(obtener_estado)(self.scope['user'])
+        if estado['version'] != self.version:
+            self.version = estado['version']
+            await self.send_json({'success': True, 'push': True, **estado})
@@ -0,0 +1,162 @@
+# apps/custom_admin/estado_panel.py
+
+"""
+Estado del panel: contadores de insignias en una sola respuesta
+
+Reemplaza los sondeos separados de cada pestaña (alertas, notificaciones,
+caja, impresión, ventas del día) por `/panel/api/estado/`:
+
+- Los contadores globales y los de cada usuario se guardan en caché. Los
+  receivers de los modelos involucrados borran la copia al cambiar algo; el
+  TTL (ESTADO_PANEL_TTL) cubre las escrituras en bloque, que no disparan
+  señales.
+- Cada copia lleva un número de versión que solo sube cuando los contadores
+  cambian de verdad. La versión del usuario (`<global>.<usuario>`) es el
+  ETag: un sondeo sin cambios responde 304 sin cuerpo.
+- Con ESTADO_PANEL_PUSH las pestañas abiertas reciben el aviso por
+  WebSocket (consumers.py) y no necesitan sondear.
+"""
+
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+CLAVE_GLOBAL = 'panel:estado:global'
+CLAVE_USUARIO = 'panel:estado:usuario:{}'
+# Última versión conocida (sin expiración) para numerar la siguiente
+SUFIJO_ULTIMO = ':ultimo'
+
+GRUPO_GLOBAL = 'panel_estado'
+GRUPO_USUARIO = 'panel_estado_{}'
+
+
+# ============================================================================
+# CONTADORES
+# ============================================================================
+
+def contar_global():
+    """Contadores compartidos por todos los usuarios del panel"""
+    from apps.financial_management.models import Caja
+    from apps.hardware_integration.models import TrabajoImpresion
+    from apps.reports_analytics.utils import filtro_dia
+    from apps.sales_management.models import Venta
+    from apps.stock_alert_system.models import AlertaStock
+
+    alertas = AlertaStock.objects.filter(resuelta=False).aggregate(
+        total=Count('id'),
+        criticas=Count('id', filter=Q(prioridad__in=['CRITICA', 'ALTA']))
+    )
+    ventas = Venta.objects.filter(
+        **filtro_dia('fecha_venta', timezone.localdate()), estado='COMPLETADA'
+    ).aggregate(cantidad=Count('id'), total=Sum('total'))
+
+    return {
+        'alertas': alertas['total'],
+        'alertas_criticas': alertas['criticas'],
+        'cajas_abiertas': Caja.objects.filter(estado='ABIERTA').count(),
+        'trabajos_impresion_pendientes': TrabajoImpresion.objects.filter(
+            estado__in=['PENDIENTE', 'PROCESANDO']
+        ).count(),
+        'ventas_hoy': ventas['cantidad'],
+        'ventas_hoy_total': str(ventas['total'] or 0),
+    }
+
+
+def contar_usuario(usuario_id):
+    """Contadores propios de un usuario"""
+    from apps.financial_management.models import Caja
+    from apps.notifications.models import Notificacion
+
+    return {
+        'notificaciones_no_leidas': Notificacion.objects.filter(
+            usuario_id=usuario_id, estado__in=['PENDIENTE', 'ENVIADA']
+        ).count(),
+        'caja_abierta': Caja.objects.filter(
+            estado='ABIERTA', usuario_apertura_id=usuario_id
+        ).values_list('codigo', flat=True).first(),
+    }
+
+
+def _copia(clave, contar):
+    """
+    Contadores en caché con su versión
+
+    La versión se incrementa solo si el recálculo da un resultado distinto
+    al anterior, así un TTL vencido no invalida los ETag de los clientes.
+    """
+    copia = cache.get(clave)
+    if copia is not None:
+        return copia
+
+    contadores = contar()
+    ultimo = cache.get(clave + SUFIJO_ULTIMO)
+    if ultimo is not None and ultimo['contadores'] == contadores:
+        copia = ultimo
+    else:
+        copia = {
+            'version': (ultimo['version'] + 1) if ultimo else 1,
+            'contadores': contadores,
+        }
+        cache.set(clave + SUFIJO_ULTIMO, copia, timeout=None)
+    cache.set(clave, copia, timeout=getattr(settings, 'ESTADO_PANEL_TTL', 60))
+    return copia
+
+
+def obtener_estado(usuario):
+    """
+    Estado del panel para `usuario`
+
+    Returns:
+        dict: {'version': '<global>.<usuario>', 'contadores': {...}}
+    """
+    global_ = _copia(CLAVE_GLOBAL, contar_global)
+    propio = _copia(CLAVE_USUARIO.format(usuario.pk), lambda: contar_usuario(usuario.pk))
+    return {
+        'version': f"{global_['version']}.{propio['version']}",
+        'contadores': {**global_['contadores'], **propio['contadores']},
+    }
+
+
+# ============================================================================
+# INVALIDACIÓN
+# ============================================================================
+
+def invalidar(usuario_id=None):
+    """
+    Descarta la copia global (o la de un usuario) al confirmar la transacción
+
+    Nunca interrumpe la escritura que la originó: sin caché disponible el
+    estado se recalcula al vencer el TTL.
+    """
+    clave = CLAVE_GLOBAL if usuario_id is None else CLAVE_USUARIO.format(usuario_id)
+    grupo = GRUPO_GLOBAL if usuario_id is None else GRUPO_USUARIO.format(usuario_id)
+
+    def _descartar():
+        try:
+            cache.delete(clave)
+        except Exception as e:
+            logger.warning(f"No se pudo invalidar el estado del panel ({clave}): {e}")
+            return
+        if getattr(settings, 'ESTADO_PANEL_PUSH', False):
+            _avisar(grupo)
+
+    transaction.on_commit(_descartar)
+
+
+def _avisar(grupo):
+    """Avisa a las pestañas conectadas por WebSocket (modo push)"""
+    try:
+        from asgiref.sync import async_to_sync
+        from channels.layers import get_channel_layer
+
+        capa = get_channel_layer()
+        if capa is not None:
+            async_to_sync(capa.group_send)(grupo, {'type': 'estado.cambio'})
+    except Exception as e:
+        logger.warning(f"No se pudo avisar el cambio de estado a {grupo}: {e}")
@@ -0,0 +1,9 @@
+# apps/custom_admin/routing.py
+
+from django.urls import path
+
+from .consumers import EstadoPanelConsumer
+
+websocket_urlpatterns = [
+    path('ws/panel/estado/', EstadoPanelConsumer.as_asgi()),
+]
@@ -0,0 +1,45 @@
+# apps/custom_admin/signals.py
+
+"""
+Invalidación del estado del panel (ver estado_panel.py)
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.financial_management.models import Caja
+from apps.hardware_integration.models import TrabajoImpresion
+from apps.notifications.models import Notificacion
+from apps.sales_management.models import Venta
+from apps.stock_alert_system.models import AlertaStock
+
+from .estado_panel import invalidar
+
+
+@receiver(post_save, sender=AlertaStock)
+@receiver(post_delete, sender=AlertaStock)
+@receiver(post_save, sender=TrabajoImpresion)
+@receiver(post_delete, sender=TrabajoImpresion)
+def estado_global_cambiado(sender, instance, **kwargs):
+    invalidar()
+
+
+@receiver(post_save, sender=Venta)
+def venta_cambiada(sender, instance, **kwargs):
+    # Solo cuentan las ventas del día completadas (o anuladas después)
+    if instance.estado in ('COMPLETADA', 'ANULADA'):
+        invalidar()
+
+
+@receiver(post_save, sender=Caja)
+def caja_cambiada(sender, instance, **kwargs):
+    invalidar()
+    if instance.usuario_apertura_id:
+        invalidar(instance.usuario_apertura_id)
+
+
+@receiver(post_save, sender=Notificacion)
+@receiver(post_delete, sender=Notificacion)
+def notificacion_cambiada(sender, instance, **kwargs):
+    if instance.usuario_id:
+        invalidar(instance.usuario_id)
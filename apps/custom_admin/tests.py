@@ -1,3 +1,64 @@
-from django.test import TestCase
+import json
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+
+from apps.authentication.models import Usuario
+from apps.notifications.models import Notificacion, TipoNotificacion
+
+from .estado_panel import CLAVE_GLOBAL
+from .views import api_estado_panel
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class EstadoPanelTests(TestCase):
+    """
+    /panel/api/estado/ responde 304 mientras los contadores no cambian y
+    las señales invalidan solo lo que cambió
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create(
+            username='panel', email='panel@example.com', codigo_empleado='PAN-1',
+            nombres='Pa', apellidos='Nel', documento_identidad='1700000005'
+        )
+        cls.tipo = TipoNotificacion.objects.create(
+            codigo='PRUEBA', nombre='Prueba', categoria='SISTEMA',
+            plantilla_titulo='Prueba', plantilla_mensaje='Prueba'
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def _get(self, etag=None):
+        extra = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        request = RequestFactory().get('/panel/api/estado/', **extra)
+        request.user = self.usuario
+        return api_estado_panel(request)
+
+    def test_etag_y_304(self):
+        primera = self._get()
+        self.assertEqual(primera.status_code, 200)
+        self.assertEqual(json.loads(primera.content)['contadores']['notificaciones_no_leidas'], 0)
+
+        # Sin cambios: 304, aunque la copia en caché haya vencido
+        cache.delete(CLAVE_GLOBAL)
+        repetida = self._get(primera['ETag'])
+        self.assertEqual(repetida.status_code, 304)
+        self.assertEqual(repetida['ETag'], primera['ETag'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Notificacion.objects.create(
+                tipo_notificacion=self.tipo, usuario=self.usuario, titulo='Aviso', mensaje='Mensaje'
+            )
+
+        cambiada = self._get(primera['ETag'])
+        self.assertEqual(cambiada.status_code, 200)
+        self.assertNotEqual(cambiada['ETag'], primera['ETag'])
+        self.assertEqual(json.loads(cambiada.content)['contadores']['notificaciones_no_leidas'], 1)
+
+    def test_sondeo_sin_cambios_no_consulta_la_bd(self):
+        self._get()
+        with self.assertNumQueries(0):
+            self._get()
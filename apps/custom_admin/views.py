@@ -35,6 +35,9 @@ from apps.system_configuration.models import (
     get_parametro,
     set_parametro
 )
+from apps.reports_analytics.utils import (
+    KeysetPaginator, agrupar_por_periodo, filtro_dia, filtro_rango
+)
 
 logger = logging.getLogger(__name__)
 
@@ -132,7 +135,6 @@ def productos_view(request):
     from apps.inventory_management.models import Producto, Categoria, Marca, Quintal, UnidadMedida
     from apps.system_configuration.models import ConfiguracionSistema
     from django.db.models import Q, Prefetch
-    from django.core.paginator import Paginator
     
     productos = Producto.objects.select_related(
         'categoria',
@@ -147,7 +149,7 @@ def productos_view(request):
             ).order_by('-fecha_ingreso')
         ),
         'inventario_normal'
-    ).filter(activo=True).order_by('nombre')
+    ).filter(activo=True)
     
     # Filtros
     search = request.GET.get('search', '')
@@ -176,10 +178,9 @@ def productos_view(request):
     iva_activo = config.iva_activo if config else False
     porcentaje_iva = config.porcentaje_iva if config else 0
     
-    # Paginación
-    paginator = Paginator(productos, 20)
-    page_number = request.GET.get('page', 1)
-    page_obj = paginator.get_page(page_number)
+    # Paginación por cursor
+    paginator = KeysetPaginator(productos, 20, orden=('nombre', 'id'))
+    page_obj = paginator.pagina(request.GET.get('cursor'))
     
     context = {
         'productos': page_obj,
@@ -294,8 +295,7 @@ def producto_crear(request):
         except ValueError as e:
             messages.error(request, f'Error en los datos numéricos: {str(e)}')
         except Exception as e:
-            import traceback
-            print(f"❌ Error: {traceback.format_exc()}")
+            logger.exception("Error al crear producto")
             messages.error(request, f'Error al crear producto: {str(e)}')
     
     return redirect('custom_admin:productos')
@@ -351,7 +351,7 @@ def producto_editar(request, producto_id):
             else:
                 producto.iva = Decimal('0.00')
             
-            print(f"🔧 IVA actualizado - aplica_impuestos: {producto.aplica_impuestos}, iva: {producto.iva}")
+            logger.debug(f"🔧 IVA actualizado - aplica_impuestos: {producto.aplica_impuestos}, iva: {producto.iva}")
             
             # Imagen
             if 'imagen' in request.FILES:
@@ -393,7 +393,7 @@ def producto_editar(request, producto_id):
                         producto_normal = producto.inventario_normal
                         producto_normal.stock_actual = stock_actual
                         producto_normal.save()
-                        print(f"✅ Stock actualizado: {stock_actual}")
+                        logger.debug(f"✅ Stock actualizado: {stock_actual}")
                     except ProductoNormal.DoesNotExist:
                         ProductoNormal.objects.create(
                             producto=producto,
@@ -402,10 +402,10 @@ def producto_editar(request, producto_id):
                             stock_maximo=1000,
                             costo_unitario=Decimal('0.00')
                         )
-                        print(f"✅ ProductoNormal creado con stock: {stock_actual}")
+                        logger.debug(f"✅ ProductoNormal creado con stock: {stock_actual}")
                 
                 except ValueError as e:
-                    print(f"❌ Error al convertir stock: {e}")
+                    logger.error(f"❌ Error al convertir stock: {e}")
                     messages.warning(request, 'El stock debe ser un número entero')
             
             messages.success(request, f'✅ Producto "{producto.nombre}" actualizado exitosamente')
@@ -418,8 +418,7 @@ def producto_editar(request, producto_id):
         messages.error(request, f'Error en los datos numéricos: {str(e)}')
         return redirect('custom_admin:productos')
     except Exception as e:
-        import traceback
-        print(f"❌ ERROR: {traceback.format_exc()}")
+        logger.exception("Error al editar producto")
         messages.error(request, f'Error al editar producto: {str(e)}')
     
     return redirect('custom_admin:productos')
@@ -526,12 +525,7 @@ def producto_eliminar(request, producto_id):
         messages.error(request, '❌ Producto no encontrado.')
         return HttpResponseRedirect('/panel/inventario/productos/')
     except Exception as e:
-        import traceback
-        error_completo = traceback.format_exc()
-        print("=" * 80)
-        print("❌ ERROR AL ELIMINAR PRODUCTO:")
-        print(error_completo)
-        print("=" * 80)
+        logger.exception("Error al eliminar producto")
         messages.error(request, f'❌ Error al procesar producto: {str(e)}')
         return HttpResponseRedirect('/panel/inventario/productos/')
 @ensure_csrf_cookie
@@ -960,8 +954,7 @@ def proveedor_crear(request):
             messages.error(request, f'❌ Error en los datos: {str(e)}')
         except Exception as e:
             messages.error(request, f'❌ Error al crear el proveedor: {str(e)}')
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error al crear el proveedor")
     
     return redirect('custom_admin:proveedores')
 
@@ -1021,8 +1014,7 @@ def proveedor_editar(request, pk):
             messages.error(request, f'❌ Error en los datos: {str(e)}')
         except Exception as e:
             messages.error(request, f'❌ Error al actualizar el proveedor: {str(e)}')
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error al actualizar el proveedor")
     
     return redirect('custom_admin:proveedores')
 
@@ -1053,8 +1045,7 @@ def proveedor_eliminar(request, pk):
                 messages.success(request, f'✅ Proveedor "{nombre}" eliminado exitosamente.')
         except Exception as e:
             messages.error(request, f'❌ Error al eliminar el proveedor: {str(e)}')
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error al eliminar el proveedor")
     
     return redirect('custom_admin:proveedores')
 
@@ -1110,10 +1101,9 @@ def ventas_view(request):
     from apps.sales_management.models import Venta, Cliente
     from apps.authentication.models import Usuario
     from django.db.models import Q, Sum, Count
-    from django.core.paginator import Paginator
     from decimal import Decimal
     
-    ventas = Venta.objects.select_related('cliente', 'vendedor').all().order_by('-fecha_venta')
+    ventas = Venta.objects.select_related('cliente', 'vendedor').all()
     
     # Filtros
     fecha_inicio = request.GET.get('fecha_inicio', '')
@@ -1124,10 +1114,10 @@ def ventas_view(request):
     cliente_id = request.GET.get('cliente', '')
     
     if fecha_inicio:
-        ventas = ventas.filter(fecha_venta__date__gte=fecha_inicio)
+        ventas = ventas.filter(**filtro_rango('fecha_venta', fecha_inicio))
     
     if fecha_fin:
-        ventas = ventas.filter(fecha_venta__date__lte=fecha_fin)
+        ventas = ventas.filter(**filtro_rango('fecha_venta', fecha_hasta=fecha_fin))
     
     if estado:
         ventas = ventas.filter(estado=estado)
@@ -1150,24 +1140,22 @@ def ventas_view(request):
     total_ventas = stats['total'] or Decimal('0')
     count_ventas = stats['cantidad'] or 0
     
-    # Ventas de HOY
-    hoy = timezone.now().date()
-    ventas_hoy = Venta.objects.filter(
-        fecha_venta__date=hoy,
-        estado='COMPLETADA'
-    ).count()
-    
-    # Ventas del MES actual
-    inicio_mes = timezone.now().replace(day=1).date()
-    ventas_mes = Venta.objects.filter(
-        fecha_venta__date__gte=inicio_mes,
+    # Ventas de HOY y del MES actual (una consulta sobre el rango del mes)
+    hoy = timezone.localdate()
+    inicio_mes = hoy.replace(day=1)
+    recientes = Venta.objects.filter(
+        **filtro_rango('fecha_venta', inicio_mes),
         estado='COMPLETADA'
-    ).count()
+    ).aggregate(
+        mes=Count('id'),
+        hoy=Count('id', filter=Q(**filtro_dia('fecha_venta', hoy)))
+    )
+    ventas_hoy = recientes['hoy']
+    ventas_mes = recientes['mes']
     
-    # Paginación
-    paginator = Paginator(ventas, 20)
-    page_number = request.GET.get('page', 1)
-    page_obj = paginator.get_page(page_number)
+    # Paginación por cursor
+    paginator = KeysetPaginator(ventas, 20, orden=('-fecha_venta', '-id'))
+    page_obj = paginator.pagina(request.GET.get('cursor'))
     
     # Datos para formulario
     vendedores = Usuario.objects.filter(
@@ -2028,247 +2016,21 @@ def exportar_venta_pdf_individual(request, pk):
 @ensure_csrf_cookie
 @auth_required
 def exportar_ventas_excel_general(request):
-    """Exportar todas las ventas filtradas a Excel"""
-    from apps.sales_management.models import Venta
-    from django.http import HttpResponse
-    from openpyxl import Workbook
-    from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-    from datetime import datetime
-    from io import BytesIO
-    
-    # Obtener filtros de la URL
-    fecha_inicio = request.GET.get('fecha_inicio')
-    fecha_fin = request.GET.get('fecha_fin')
-    estado = request.GET.get('estado')
-    tipo_venta = request.GET.get('tipo_venta')
-    vendedor_id = request.GET.get('vendedor')
-    cliente_id = request.GET.get('cliente')
+    """Exportar todas las ventas filtradas a Excel (streaming / segundo plano)"""
+    from apps.reports_analytics.exporters import ExportService, ExportacionVentas
     
-    # Filtrar ventas
-    ventas = Venta.objects.select_related('cliente', 'vendedor').all().order_by('-fecha_venta')
-    
-    if fecha_inicio:
-        ventas = ventas.filter(fecha_venta__date__gte=fecha_inicio)
-    if fecha_fin:
-        ventas = ventas.filter(fecha_venta__date__lte=fecha_fin)
-    if estado:
-        ventas = ventas.filter(estado=estado)
-    if tipo_venta:
-        ventas = ventas.filter(tipo_venta=tipo_venta)
-    if vendedor_id:
-        ventas = ventas.filter(vendedor_id=vendedor_id)
-    if cliente_id:
-        ventas = ventas.filter(cliente_id=cliente_id)
-    
-    # Crear workbook
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Ventas"
-    
-    # Estilos
-    header_fill = PatternFill(start_color="3B82F6", end_color="3B82F6", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF", size=11)
-    title_font = Font(bold=True, size=14)
-    border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-    
-    # TÍTULO
-    ws.merge_cells('A1:J1')
-    ws['A1'] = f"REPORTE DE VENTAS - {datetime.now().strftime('%d/%m/%Y')}"
-    ws['A1'].font = title_font
-    ws['A1'].alignment = Alignment(horizontal='center', vertical='center')
-    
-    # HEADERS
-    headers = ['N° Venta', 'Fecha', 'Cliente', 'Vendedor', 'Tipo', 'Estado', 
-               'Subtotal', 'Descuento', 'Total', 'Pagado']
-    
-    for col, header in enumerate(headers, start=1):
-        cell = ws.cell(row=3, column=col)
-        cell.value = header
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal='center', vertical='center')
-        cell.border = border
-    
-    # DATOS
-    row = 4
-    for venta in ventas:
-        ws.cell(row=row, column=1, value=venta.numero_venta).border = border
-        ws.cell(row=row, column=2, value=venta.fecha_venta.strftime('%d/%m/%Y %H:%M')).border = border
-        ws.cell(row=row, column=3, value=f"{venta.cliente.nombres} {venta.cliente.apellidos}" if venta.cliente else "Público General").border = border
-        ws.cell(row=row, column=4, value=venta.vendedor.get_full_name()).border = border
-        ws.cell(row=row, column=5, value=venta.get_tipo_venta_display()).border = border
-        ws.cell(row=row, column=6, value=venta.get_estado_display()).border = border
-        
-        ws.cell(row=row, column=7, value=float(venta.subtotal)).border = border
-        ws.cell(row=row, column=7).number_format = '$#,##0.00'
-        
-        ws.cell(row=row, column=8, value=float(venta.descuento)).border = border
-        ws.cell(row=row, column=8).number_format = '$#,##0.00'
-        
-        ws.cell(row=row, column=9, value=float(venta.total)).border = border
-        ws.cell(row=row, column=9).number_format = '$#,##0.00'
-        
-        ws.cell(row=row, column=10, value=float(venta.monto_pagado)).border = border
-        ws.cell(row=row, column=10).number_format = '$#,##0.00'
-        
-        row += 1
-    
-    # TOTALES
-    row += 1
-    ws.cell(row=row, column=8, value="TOTALES:").font = Font(bold=True)
-    
-    total_ventas = sum(float(v.total) for v in ventas)
-    ws.cell(row=row, column=9, value=total_ventas).font = Font(bold=True)
-    ws.cell(row=row, column=9).number_format = '$#,##0.00'
-    
-    total_pagado = sum(float(v.monto_pagado) for v in ventas)
-    ws.cell(row=row, column=10, value=total_pagado).font = Font(bold=True)
-    ws.cell(row=row, column=10).number_format = '$#,##0.00'
-    
-    # Ajustar anchos
-    ws.column_dimensions['A'].width = 15
-    ws.column_dimensions['B'].width = 18
-    ws.column_dimensions['C'].width = 25
-    ws.column_dimensions['D'].width = 20
-    ws.column_dimensions['E'].width = 12
-    ws.column_dimensions['F'].width = 12
-    ws.column_dimensions['G'].width = 12
-    ws.column_dimensions['H'].width = 12
-    ws.column_dimensions['I'].width = 12
-    ws.column_dimensions['J'].width = 12
-    
-    # Preparar respuesta
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
-    
-    filename = f"ventas_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-    response = HttpResponse(
-        output.read(),
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    response['Content-Disposition'] = f'attachment; filename={filename}'
-    
-    return response
+    exportacion = ExportacionVentas.desde_request(request)
+    return ExportService.exportar(request, exportacion, 'EXCEL')
 
 
 @ensure_csrf_cookie
 @auth_required
 def exportar_ventas_pdf_general(request):
-    """Exportar todas las ventas filtradas a PDF"""
-    from apps.sales_management.models import Venta
-    from django.http import HttpResponse
-    from reportlab.lib.pagesizes import letter, landscape
-    from reportlab.lib import colors
-    from reportlab.lib.units import inch
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.enums import TA_CENTER
-    from io import BytesIO
-    from datetime import datetime
+    """Exportar todas las ventas filtradas a PDF (streaming / segundo plano)"""
+    from apps.reports_analytics.exporters import ExportService, ExportacionVentas
     
-    # Obtener filtros (mismo código que Excel)
-    fecha_inicio = request.GET.get('fecha_inicio')
-    fecha_fin = request.GET.get('fecha_fin')
-    estado = request.GET.get('estado')
-    tipo_venta = request.GET.get('tipo_venta')
-    vendedor_id = request.GET.get('vendedor')
-    cliente_id = request.GET.get('cliente')
-    
-    # Filtrar ventas
-    ventas = Venta.objects.select_related('cliente', 'vendedor').all().order_by('-fecha_venta')
-    
-    if fecha_inicio:
-        ventas = ventas.filter(fecha_venta__date__gte=fecha_inicio)
-    if fecha_fin:
-        ventas = ventas.filter(fecha_venta__date__lte=fecha_fin)
-    if estado:
-        ventas = ventas.filter(estado=estado)
-    if tipo_venta:
-        ventas = ventas.filter(tipo_venta=tipo_venta)
-    if vendedor_id:
-        ventas = ventas.filter(vendedor_id=vendedor_id)
-    if cliente_id:
-        ventas = ventas.filter(cliente_id=cliente_id)
-    
-    # Crear buffer
-    buffer = BytesIO()
-    
-    # Crear documento (landscape para más espacio)
-    doc = SimpleDocTemplate(buffer, pagesize=landscape(letter), topMargin=0.5*inch)
-    elements = []
-    styles = getSampleStyleSheet()
-    
-    # Título
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=16,
-        textColor=colors.HexColor('#0f172a'),
-        spaceAfter=20,
-        alignment=TA_CENTER
-    )
-    
-    title = Paragraph(f"REPORTE DE VENTAS - {datetime.now().strftime('%d/%m/%Y')}", title_style)
-    elements.append(title)
-    elements.append(Spacer(1, 10))
-    
-    # Tabla de ventas
-    data = [['N° Venta', 'Fecha', 'Cliente', 'Tipo', 'Total', 'Estado']]
-    
-    for venta in ventas:
-        data.append([
-            venta.numero_venta,
-            venta.fecha_venta.strftime('%d/%m/%Y'),
-            (f"{venta.cliente.nombres} {venta.cliente.apellidos}" if venta.cliente else "Público")[:20],
-            venta.get_tipo_venta_display(),
-            f"${venta.total:.2f}",
-            venta.get_estado_display(),
-        ])
-    
-    # Totales
-    total = sum(float(v.total) for v in ventas)
-    data.append(['', '', '', 'TOTAL:', f"${total:.2f}", ''])
-    
-    table = Table(data, colWidths=[1.2*inch, 1.1*inch, 1.8*inch, 1*inch, 1*inch, 1*inch])
-    table.setStyle(TableStyle([
-        # Header
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3B82F6')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('FONT', (0, 0), (-1, 0), 'Helvetica-Bold', 10),
-        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-        
-        # Body
-        ('FONT', (0, 1), (-1, -2), 'Helvetica', 8),
-        ('TEXTCOLOR', (0, 1), (-1, -1), colors.HexColor('#1e293b')),
-        ('ALIGN', (4, 1), (4, -1), 'RIGHT'),
-        
-        # Total row
-        ('FONT', (0, -1), (-1, -1), 'Helvetica-Bold', 10),
-        ('LINEABOVE', (0, -1), (-1, -1), 2, colors.HexColor('#3B82F6')),
-        
-        # Borders
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e2e8f0')),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -2), [colors.white, colors.HexColor('#f8fafc')]),
-    ]))
-    
-    elements.append(table)
-    
-    # Construir PDF
-    doc.build(elements)
-    
-    # Preparar respuesta
-    buffer.seek(0)
-    filename = f"ventas_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-    response = HttpResponse(buffer.read(), content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename={filename}'
-    
-    return response
+    exportacion = ExportacionVentas.desde_request(request)
+    return ExportService.exportar(request, exportacion, 'PDF')
 
 
 @ensure_csrf_cookie
@@ -2506,12 +2268,10 @@ def devolucion_crear(request):
     from decimal import Decimal
 
     if request.method == 'POST':
-        print("=" * 50)
-        print("DEVOLUCION_CREAR - POST recibido")
-        print(f"Usuario: {request.user}")
-        print(f"Is authenticated: {request.user.is_authenticated}")
-        print("Datos POST:", dict(request.POST))
-        print("=" * 50)
+        logger.debug("DEVOLUCION_CREAR - POST recibido")
+        logger.debug(f"Usuario: {request.user}")
+        logger.debug(f"Is authenticated: {request.user.is_authenticated}")
+        logger.debug(f"Datos POST: {dict(request.POST)}")
         
         try:
 #             # Verificar autenticación PRIMERO
@@ -2587,8 +2347,7 @@ def devolucion_crear(request):
 
         except Exception as e:
             messages.error(request, f'Error: {str(e)}')
-            import traceback
-            print(f"ERROR EN DEVOLUCION: {traceback.format_exc()}")
+            logger.exception("ERROR EN DEVOLUCION")
             return redirect('custom_admin:devoluciones')
     return redirect('custom_admin:devoluciones')
             
@@ -2752,8 +2511,7 @@ def devolucion_detalle(request, devolucion_id):
             content_type='application/json'
         )
     except Exception as e:
-        import traceback
-        print(f"❌ Error en devolucion_detalle: {traceback.format_exc()}")
+        logger.exception("❌ Error en devolucion_detalle")
         return HttpResponse(
             json.dumps({'success': False, 'error': str(e)}),
             content_type='application/json'
@@ -2813,8 +2571,7 @@ def aprobar_devolucion_api(request, id):
     except Devolucion.DoesNotExist:
         return JsonResponse({'success': False, 'error': 'Devolución no encontrada'})
     except Exception as e:
-        import traceback
-        print(f"❌ Error en aprobar_devolucion_api: {traceback.format_exc()}")
+        logger.exception("❌ Error en aprobar_devolucion_api")
         return JsonResponse({'success': False, 'error': str(e)})
 @ensure_csrf_cookie
 @auth_required
@@ -2862,8 +2619,8 @@ def pos_view(request):
 
 def api_buscar_productos(request):
     """API para buscar productos"""
-    from apps.inventory_management.models import Producto, ProductoNormal, Quintal
-    from django.db.models import Q, Sum
+    from apps.inventory_management.models import Producto
+    from django.db.models import Q
     from django.http import JsonResponse
     
     query = request.GET.get('q', '').strip()
@@ -2873,7 +2630,9 @@ def api_buscar_productos(request):
     if not query and not categoria_id and not cargar_todos:
         return JsonResponse({'productos': []})
     
-    productos = Producto.objects.select_related('categoria', 'unidad_medida_base', 'marca').filter(activo=True)
+    productos = Producto.objects.select_related(
+        'categoria', 'unidad_medida_base', 'marca', 'existencias'
+    ).filter(activo=True)
     
     if query:
         productos = productos.filter(
@@ -2892,24 +2651,12 @@ def api_buscar_productos(request):
     
     data = []
     for p in productos:
-        # Obtener stock según tipo de inventario
-        stock_actual = 0
-        
-        if p.tipo_inventario == 'NORMAL':
-            try:
-                inventario = p.inventario_normal
-                stock_actual = float(inventario.stock_actual) if inventario else 0
-            except ProductoNormal.DoesNotExist:
-                stock_actual = 0
-        elif p.tipo_inventario == 'QUINTAL':
-            stock_actual = float(
-                Quintal.objects.filter(
-                    producto=p,
-                    estado='DISPONIBLE'
-                ).aggregate(
-                    total=Sum('peso_actual')
-                )['total'] or 0
-            )
+        # Stock según tipo de inventario, de la proyección StockActual
+        existencias = p.obtener_existencias()
+        if p.tipo_inventario == 'QUINTAL':
+            stock_actual = float(existencias.peso_disponible)
+        else:
+            stock_actual = float(existencias.unidades_disponibles)
         
         # ✅ UNIFICAR PRECIO - siempre devolver 'precio' como campo principal
         if p.tipo_inventario == 'NORMAL':
@@ -2941,7 +2688,11 @@ def api_obtener_producto(request, producto_id):
     from apps.inventory_management.models import Producto
     from django.http import JsonResponse
     
-    producto = get_object_or_404(Producto.objects.select_related('categoria', 'unidad_medida_base'), pk=producto_id)
+    producto = get_object_or_404(
+        Producto.objects.select_related('categoria', 'unidad_medida_base', 'existencias'),
+        pk=producto_id
+    )
+    existencias = producto.obtener_existencias()
     
     data = {
         'id': str(producto.id),
@@ -2952,7 +2703,9 @@ def api_obtener_producto(request, producto_id):
         'tipo_inventario': producto.tipo_inventario,
         'precio_unitario': float(producto.precio_unitario) if producto.precio_unitario else 0,
         'precio_por_unidad_peso': float(producto.precio_por_unidad_peso) if producto.precio_por_unidad_peso else 0,
-        'stock_actual': float(producto.stock_actual) if hasattr(producto, 'stock_actual') else 0,
+        'stock_actual': float(
+            existencias.peso_disponible if producto.es_quintal() else existencias.unidades_disponibles
+        ),
         'unidad_medida': producto.unidad_medida_base.abreviatura if producto.unidad_medida_base else 'und',
         'permite_descuento': True,
         'descuento_maximo': float(producto.categoria.descuento_maximo_permitido) if producto.categoria else 10.0,
@@ -3186,44 +2939,40 @@ def api_procesar_venta(request):
             # ============================================================================
             # ✅ ESTABLECER ESTADO DE PAGO SEGÚN TIPO DE VENTA
             # ============================================================================
-            print("=" * 80)
-            print(f"🔍 ESTABLECIENDO ESTADO DE PAGO")
-            print(f"   Venta: {venta.numero_venta}")
-            print(f"   Tipo Venta: {tipo_venta}")
-            print(f"   Método Pago: {metodo_pago}")
-            print(f"   Monto Recibido: ${monto_recibido}")
-            print(f"   Total: ${total}")
-            print("=" * 80)
+            logger.debug("🔍 ESTABLECIENDO ESTADO DE PAGO")
+            logger.debug(f"Venta: {venta.numero_venta}")
+            logger.debug(f"Tipo Venta: {tipo_venta}")
+            logger.debug(f"Método Pago: {metodo_pago}")
+            logger.debug(f"Monto Recibido: ${monto_recibido}")
+            logger.debug(f"Total: ${total}")
             
             if tipo_venta == 'CONTADO':
                 # Ventas al contado siempre quedan como PAGADAS cuando se paga el total
                 if monto_recibido >= total:
                     venta.estado_pago = 'PAGADO'
-                    print(f"✅✅✅ Venta al CONTADO marcada como PAGADA ✅✅✅")
+                    logger.debug("✅✅✅ Venta al CONTADO marcada como PAGADA ✅✅✅")
                 else:
                     venta.estado_pago = 'PENDIENTE'
-                    print(f"⏳ Venta al CONTADO - Pago parcial, marcada como PENDIENTE")
+                    logger.debug("⏳ Venta al CONTADO - Pago parcial, marcada como PENDIENTE")
             
             elif tipo_venta == 'CREDITO':
                 # Ventas a crédito quedan pendientes hasta liquidar completamente
                 if monto_recibido >= total:
                     venta.estado_pago = 'PAGADO'
-                    print(f"✅ Venta a CRÉDITO liquidada completamente")
+                    logger.debug("✅ Venta a CRÉDITO liquidada completamente")
                 else:
                     venta.estado_pago = 'PENDIENTE'
                     saldo = total - monto_recibido
-                    print(f"⏳ Venta a CRÉDITO con saldo pendiente: ${saldo}")
+                    logger.debug(f"⏳ Venta a CRÉDITO con saldo pendiente: ${saldo}")
             
             else:
                 # Por defecto, verificar si está completamente pagado
                 venta.estado_pago = 'PAGADO' if monto_recibido >= total else 'PENDIENTE'
-                print(f"❓ Tipo de venta: {tipo_venta}, Estado: {venta.estado_pago}")
+                logger.debug(f"❓ Tipo de venta: {tipo_venta}, Estado: {venta.estado_pago}")
             
-            print(f"💾 Guardando venta con estado_pago={venta.estado_pago}")
+            logger.debug(f"💾 Guardando venta con estado_pago={venta.estado_pago}")
             venta.save()
-            print(f"✅ VENTA GUARDADA CON ÉXITO - Estado: {venta.estado_pago}")
-            print("=" * 80)
-            print()
+            logger.debug(f"✅ VENTA GUARDADA CON ÉXITO - Estado: {venta.estado_pago}")
             
             # ============================================================================
             # CREAR TRABAJO DE IMPRESIÓN
@@ -3857,7 +3606,7 @@ def api_procesar_entrada_masiva(request):
                         })
                         
                 except Exception as e:
-                    print(f"Error procesando entrada: {e}")
+                    logger.error(f"Error procesando entrada: {e}")
                     continue
         
         return JsonResponse({
@@ -3869,8 +3618,7 @@ def api_procesar_entrada_masiva(request):
         })
         
     except Exception as e:
-        import traceback
-        print(traceback.format_exc())
+        logger.exception("Error al procesar entrada de inventario")
         return JsonResponse({
             'success': False,
             'error': f'Error: {str(e)}'
@@ -4048,10 +3796,7 @@ def api_generar_pdf_codigos(request):
         return JsonResponse({'error': 'Producto no encontrado'}, status=404)
     except Exception as e:
         import traceback
-        print("=" * 80)
-        print("ERROR GENERANDO PDF:")
-        print(traceback.format_exc())
-        print("=" * 80)
+        logger.exception("Error generando PDF")
         return JsonResponse({
             'error': f'Error generando PDF: {str(e)}',
             'detalle': traceback.format_exc()
@@ -4163,9 +3908,7 @@ def api_procesar_entrada_unificada(request):
         
         productos_data = json.loads(productos_json)
         
-        print("=" * 80)
-        print(f"📦 PRODUCTOS RECIBIDOS: {len(productos_data)}")
-        print("=" * 80)
+        logger.debug(f"📦 PRODUCTOS RECIBIDOS: {len(productos_data)}")
         
         if not productos_data:
             return JsonResponse({
@@ -4193,15 +3936,14 @@ def api_procesar_entrada_unificada(request):
         
         with transaction.atomic():
             for idx, prod_data in enumerate(productos_data):
-                print(f"\n{'='*60}")
-                print(f"🔄 PROCESANDO PRODUCTO {idx + 1}/{len(productos_data)}")
-                print(f"📝 Datos: {prod_data}")
+                logger.debug(f"🔄 PROCESANDO PRODUCTO {idx + 1}/{len(productos_data)}")
+                logger.debug(f"📝 Datos: {prod_data}")
                 
                 try:
                     # Validar datos requeridos
                     if not prod_data.get('nombre'):
                         error_msg = f"Producto {idx + 1}: Falta el nombre"
-                        print(f"❌ {error_msg}")
+                        logger.error(f"❌ {error_msg}")
                         errores.append(error_msg)
                         continue
                     
@@ -4209,48 +3951,48 @@ def api_procesar_entrada_unificada(request):
                     marca_id = prod_data.get('marca_id')
                     if not marca_id:
                         error_msg = f"Producto {idx + 1}: Falta la marca"
-                        print(f"❌ {error_msg}")
+                        logger.error(f"❌ {error_msg}")
                         errores.append(error_msg)
                         continue
                     
                     try:
                         marca = Marca.objects.get(id=marca_id)
-                        print(f"✅ Marca encontrada: {marca.nombre}")
+                        logger.debug(f"✅ Marca encontrada: {marca.nombre}")
                     except Marca.DoesNotExist:
                         error_msg = f"Producto {idx + 1}: Marca no encontrada"
-                        print(f"❌ {error_msg}")
+                        logger.error(f"❌ {error_msg}")
                         errores.append(error_msg)
                         continue
                     
                     # Obtener categoría
                     if not prod_data.get('categoria_id'):
                         error_msg = f"Producto {idx + 1}: Falta la categoría"
-                        print(f"❌ {error_msg}")
+                        logger.error(f"❌ {error_msg}")
                         errores.append(error_msg)
                         continue
                     
                     try:
                         categoria = Categoria.objects.get(id=prod_data['categoria_id'])
-                        print(f"✅ Categoría encontrada: {categoria.nombre}")
+                        logger.debug(f"✅ Categoría encontrada: {categoria.nombre}")
                     except Categoria.DoesNotExist:
                         error_msg = f"Producto {idx + 1}: Categoría no encontrada"
-                        print(f"❌ {error_msg}")
+                        logger.error(f"❌ {error_msg}")
                         errores.append(error_msg)
                         continue
                     
                     # Obtener proveedor
                     if not prod_data.get('proveedor_id'):
                         error_msg = f"Producto {idx + 1}: Falta el proveedor"
-                        print(f"❌ {error_msg}")
+                        logger.error(f"❌ {error_msg}")
                         errores.append(error_msg)
                         continue
                     
                     try:
                         proveedor = Proveedor.objects.get(id=prod_data['proveedor_id'])
-                        print(f"✅ Proveedor encontrado: {proveedor.nombre_comercial}")
+                        logger.debug(f"✅ Proveedor encontrado: {proveedor.nombre_comercial}")
                     except Proveedor.DoesNotExist:
                         error_msg = f"Producto {idx + 1}: Proveedor no encontrado"
-                        print(f"❌ {error_msg}")
+                        logger.error(f"❌ {error_msg}")
                         errores.append(error_msg)
                         continue
                     
@@ -4263,22 +4005,22 @@ def api_procesar_entrada_unificada(request):
                     if aplica_impuestos:
                         config = ConfiguracionSistema.get_config()
                         iva_porcentaje = config.porcentaje_iva
-                        print(f"✅ IVA activado: {iva_porcentaje}%")
+                        logger.debug(f"✅ IVA activado: {iva_porcentaje}%")
                     else:
                         iva_porcentaje = Decimal('0.00')
-                        print(f"⚠️ IVA desactivado")
+                        logger.warning("⚠️ IVA desactivado")
                     
                     # ========================================
                     # 🌾 PROCESAR QUINTAL
                     # ========================================
                     if tipo_inventario == 'QUINTAL':
-                        print(f"🌾 PROCESANDO QUINTAL")
+                        logger.debug("🌾 PROCESANDO QUINTAL")
                         
                         # Obtener unidad de medida
                         unidad_codigo = prod_data.get('unidad_medida')
                         if not unidad_codigo:
                             error_msg = f"Producto {idx + 1}: Falta la unidad de medida"
-                            print(f"❌ {error_msg}")
+                            logger.error(f"❌ {error_msg}")
                             errores.append(error_msg)
                             continue
                         
@@ -4290,14 +4032,14 @@ def api_procesar_entrada_unificada(request):
                             
                             if not unidad_medida:
                                 error_msg = f"Producto {idx + 1}: Unidad de medida no encontrada: {unidad_codigo}"
-                                print(f"❌ {error_msg}")
+                                logger.error(f"❌ {error_msg}")
                                 errores.append(error_msg)
                                 continue
                             
-                            print(f"✅ Unidad de medida: {unidad_medida.nombre}")
+                            logger.debug(f"✅ Unidad de medida: {unidad_medida.nombre}")
                         except Exception as e:
                             error_msg = f"Producto {idx + 1}: Error buscando unidad: {str(e)}"
-                            print(f"❌ {error_msg}")
+                            logger.error(f"❌ {error_msg}")
                             errores.append(error_msg)
                             continue
                         
@@ -4323,7 +4065,7 @@ def api_procesar_entrada_unificada(request):
                             imagen_key = f'imagen_{idx}'
                             if imagen_key in request.FILES:
                                 imagen_file = request.FILES[imagen_key]
-                                print(f"📷 Imagen recibida: {imagen_file.name}")
+                                logger.debug(f"📷 Imagen recibida: {imagen_file.name}")
                         
                         if not producto_existente:
                             # ✅ CREAR PRODUCTO NUEVO
@@ -4348,12 +4090,12 @@ def api_procesar_entrada_unificada(request):
                                 producto_data['imagen'] = imagen_file
                             
                             producto = Producto.objects.create(**producto_data)
-                            print(f"✅ Producto QUINTAL creado: {producto.nombre}")
-                            print(f"   Aplica IVA: {producto.aplica_impuestos} ({iva_porcentaje}% del sistema)")
+                            logger.debug(f"✅ Producto QUINTAL creado: {producto.nombre}")
+                            logger.debug(f"Aplica IVA: {producto.aplica_impuestos} ({iva_porcentaje}% del sistema)")
                             productos_creados += 1
                         else:
                             producto = producto_existente
-                            print(f"✅ Producto QUINTAL existente: {producto.nombre}")
+                            logger.debug(f"✅ Producto QUINTAL existente: {producto.nombre}")
                             
                             # ✅ Actualizar precio y aplica_impuestos si cambió
                             actualizado = False
@@ -4364,7 +4106,7 @@ def api_procesar_entrada_unificada(request):
                             if producto.aplica_impuestos != aplica_impuestos:
                                 producto.aplica_impuestos = aplica_impuestos
                                 actualizado = True
-                                print(f"   Aplica IVA actualizado: {aplica_impuestos}")
+                                logger.debug(f"Aplica IVA actualizado: {aplica_impuestos}")
                             
                             if actualizado:
                                 producto.save()
@@ -4390,9 +4132,9 @@ def api_procesar_entrada_unificada(request):
                             estado='DISPONIBLE'
                         )
                         
-                        print(f"✅ QUINTAL CREADO: {quintal.codigo_quintal}")
-                        print(f"   Peso: {quintal.peso_inicial} {quintal.unidad_medida.abreviatura}")
-                        print(f"   Costo: ${quintal.costo_total}")
+                        logger.debug(f"✅ QUINTAL CREADO: {quintal.codigo_quintal}")
+                        logger.debug(f"Peso: {quintal.peso_inicial} {quintal.unidad_medida.abreviatura}")
+                        logger.debug(f"Costo: ${quintal.costo_total}")
                         quintales_creados += 1
                         
                         # ✅ GENERAR CÓDIGOS DE BARRAS
@@ -4414,7 +4156,7 @@ def api_procesar_entrada_unificada(request):
                     # 📦 PROCESAR PRODUCTO NORMAL
                     # ========================================
                     else:
-                        print(f"📦 PROCESANDO PRODUCTO NORMAL")
+                        logger.debug("📦 PROCESANDO PRODUCTO NORMAL")
                         
                         nombre_producto = prod_data['nombre'].strip()
                         producto_existente = Producto.objects.filter(
@@ -4450,7 +4192,7 @@ def api_procesar_entrada_unificada(request):
                             if producto.aplica_impuestos != aplica_impuestos:
                                 producto.aplica_impuestos = aplica_impuestos
                                 actualizado = True
-                                print(f"   Aplica IVA actualizado: {aplica_impuestos}")
+                                logger.debug(f"Aplica IVA actualizado: {aplica_impuestos}")
                             
                             if imagen_file:
                                 if producto.imagen:
@@ -4548,8 +4290,8 @@ def api_procesar_entrada_unificada(request):
                                 producto_data['imagen'] = imagen_file
                             
                             producto = Producto.objects.create(**producto_data)
-                            print(f"✅ Producto NORMAL creado: {producto.nombre}")
-                            print(f"   Aplica IVA: {producto.aplica_impuestos} ({iva_porcentaje}% del sistema)")
+                            logger.debug(f"✅ Producto NORMAL creado: {producto.nombre}")
+                            logger.debug(f"Aplica IVA: {producto.aplica_impuestos} ({iva_porcentaje}% del sistema)")
                             
                             producto_normal = ProductoNormal.objects.create(
                                 producto=producto,
@@ -4592,20 +4334,16 @@ def api_procesar_entrada_unificada(request):
                     
                 except Exception as e:
                     error_msg = f"Producto {idx + 1} ({prod_data.get('nombre', 'Sin nombre')}): {str(e)}"
-                    print(f"❌ ERROR: {error_msg}")
-                    import traceback
-                    traceback.print_exc()
+                    logger.exception("Error procesando producto: %s", error_msg)
                     errores.append(error_msg)
                     continue
         
-        print("\n" + "=" * 80)
-        print(f"✅ RESUMEN FINAL:")
-        print(f"   - Productos NUEVOS: {productos_creados}")
-        print(f"   - Productos REABASTECIDOS: {productos_reabastecidos}")
-        print(f"   - Quintales CREADOS: {quintales_creados}")
-        print(f"   - Códigos generados: {len(codigos_generados)}")
-        print(f"   - Errores: {len(errores)}")
-        print("=" * 80)
+        logger.debug("✅ RESUMEN FINAL:")
+        logger.debug(f"- Productos NUEVOS: {productos_creados}")
+        logger.debug(f"- Productos REABASTECIDOS: {productos_reabastecidos}")
+        logger.debug(f"- Quintales CREADOS: {quintales_creados}")
+        logger.debug(f"- Códigos generados: {len(codigos_generados)}")
+        logger.debug(f"- Errores: {len(errores)}")
         
         return JsonResponse({
             'success': True,
@@ -4618,18 +4356,13 @@ def api_procesar_entrada_unificada(request):
         })
         
     except json.JSONDecodeError as e:
-        print(f"❌ ERROR JSON: {str(e)}")
+        logger.error(f"❌ ERROR JSON: {str(e)}")
         return JsonResponse({
             'success': False,
             'error': f'Error al decodificar JSON: {str(e)}'
         }, status=400)
     except Exception as e:
-        import traceback
-        error_detalle = traceback.format_exc()
-        print("=" * 80)
-        print("❌ ERROR CRÍTICO:")
-        print(error_detalle)
-        print("=" * 80)
+        logger.exception("Error al procesar inventario")
         return JsonResponse({
             'success': False,
             'error': f'Error al procesar inventario: {str(e)}'
@@ -4645,15 +4378,14 @@ def movimientos_inventario_view(request):
     """Vista principal de movimientos de inventario con filtros"""
     from apps.inventory_management.models import MovimientoInventario, Producto
     from apps.authentication.models import Usuario
-    from django.db.models import Q, Sum, Count
-    from django.core.paginator import Paginator
-    from decimal import Decimal
+    from apps.reports_analytics.services import ResumenMovimientosService
+    from django.db.models import Q
     
     # Base queryset
     movimientos = MovimientoInventario.objects.select_related(
         'producto_normal__producto',
         'usuario'
-    ).all().order_by('-fecha_movimiento')
+    ).all()
     
     # ========================================
     # FILTROS
@@ -4666,10 +4398,10 @@ def movimientos_inventario_view(request):
     search = request.GET.get('search', '')
     
     if fecha_inicio:
-        movimientos = movimientos.filter(fecha_movimiento__date__gte=fecha_inicio)
+        movimientos = movimientos.filter(**filtro_rango('fecha_movimiento', fecha_inicio))
     
     if fecha_fin:
-        movimientos = movimientos.filter(fecha_movimiento__date__lte=fecha_fin)
+        movimientos = movimientos.filter(**filtro_rango('fecha_movimiento', fecha_hasta=fecha_fin))
     
     if tipo_movimiento:
         movimientos = movimientos.filter(tipo_movimiento=tipo_movimiento)
@@ -4689,40 +4421,33 @@ def movimientos_inventario_view(request):
     # ========================================
     # ESTADÍSTICAS
     # ========================================
-    total_movimientos = movimientos.count()
-    
-    entradas = movimientos.filter(
-        tipo_movimiento__in=['ENTRADA_COMPRA', 'ENTRADA_AJUSTE', 'ENTRADA_DEVOLUCION']
-    ).aggregate(
-        total=Sum('cantidad'),
-        count=Count('id')
-    )
-    
-    salidas = movimientos.filter(
-        tipo_movimiento__in=['SALIDA_VENTA', 'SALIDA_AJUSTE', 'SALIDA_MERMA', 'SALIDA_DEVOLUCION']
-    ).aggregate(
-        total=Sum('cantidad'),
-        count=Count('id')
-    )
-    
-    total_entradas = abs(entradas['total'] or 0)
-    count_entradas = entradas['count'] or 0
-    
-    total_salidas = abs(salidas['total'] or 0)
-    count_salidas = salidas['count'] or 0
+    # Del resumen diario (días cerrados) + en vivo los días recientes;
+    # usuario y texto libre no están en el resumen y se agregan en vivo
+    if usuario_id or search:
+        totales = ResumenMovimientosService.totales_en_vivo(movimientos)
+    else:
+        totales = ResumenMovimientosService.totales(
+            fecha_desde=fecha_inicio or None,
+            fecha_hasta=fecha_fin or None,
+            tipo_movimiento=tipo_movimiento or None,
+            producto_id=producto_id or None,
+        )
     
     # Movimientos del día
-    hoy = timezone.now().date()
+    hoy = timezone.localdate()
     movimientos_hoy = MovimientoInventario.objects.filter(
-        fecha_movimiento__date=hoy
+        **filtro_dia('fecha_movimiento', hoy)
     ).count()
     
     # ========================================
-    # PAGINACIÓN
+    # PAGINACIÓN (por cursor)
     # ========================================
-    paginator = Paginator(movimientos, 20)
-    page_number = request.GET.get('page', 1)
-    page_obj = paginator.get_page(page_number)
+    paginator = KeysetPaginator(
+        movimientos, 20,
+        orden=('-fecha_movimiento', '-id'),
+        conteo=totales['total_movimientos']
+    )
+    page_obj = paginator.pagina(request.GET.get('cursor'))
     
     # ========================================
     # DATOS PARA FORMULARIOS
@@ -4749,11 +4474,11 @@ def movimientos_inventario_view(request):
     context = {
         'page_obj': page_obj,
         'movimientos': page_obj,
-        'total_movimientos': total_movimientos,
-        'total_entradas': total_entradas,
-        'count_entradas': count_entradas,
-        'total_salidas': total_salidas,
-        'count_salidas': count_salidas,
+        'total_movimientos': totales['total_movimientos'],
+        'total_entradas': totales['total_entradas'],
+        'count_entradas': totales['count_entradas'],
+        'total_salidas': totales['total_salidas'],
+        'count_salidas': totales['count_salidas'],
         'movimientos_hoy': movimientos_hoy,
         'productos': productos,
         'usuarios': usuarios,
@@ -4951,237 +4676,21 @@ def exportar_movimiento_pdf(request, pk):
 @ensure_csrf_cookie
 @auth_required
 def exportar_movimientos_excel_general(request):
-    """Exportar todos los movimientos filtrados a Excel"""
-    from apps.inventory_management.models import MovimientoInventario
-    from django.http import HttpResponse
-    from django.db.models import Q
-    from openpyxl import Workbook
-    from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-    from datetime import datetime
-    from io import BytesIO
-    
-    # Obtener filtros
-    fecha_inicio = request.GET.get('fecha_inicio')
-    fecha_fin = request.GET.get('fecha_fin')
-    tipo_movimiento = request.GET.get('tipo_movimiento')
-    producto_id = request.GET.get('producto')
-    usuario_id = request.GET.get('usuario')
-    search = request.GET.get('search')
-    
-    # Filtrar movimientos
-    movimientos = MovimientoInventario.objects.select_related(
-        'producto_normal__producto',
-        'usuario'
-    ).all().order_by('-fecha_movimiento')
-    
-    if fecha_inicio:
-        movimientos = movimientos.filter(fecha_movimiento__date__gte=fecha_inicio)
-    if fecha_fin:
-        movimientos = movimientos.filter(fecha_movimiento__date__lte=fecha_fin)
-    if tipo_movimiento:
-        movimientos = movimientos.filter(tipo_movimiento=tipo_movimiento)
-    if producto_id:
-        movimientos = movimientos.filter(producto_normal__producto_id=producto_id)
-    if usuario_id:
-        movimientos = movimientos.filter(usuario_id=usuario_id)
-    if search:
-        movimientos = movimientos.filter(
-            Q(producto_normal__producto__nombre__icontains=search) |
-            Q(observaciones__icontains=search)
-        )
-    
-    # Crear workbook
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Movimientos"
-    
-    # Estilos
-    header_fill = PatternFill(start_color="3B82F6", end_color="3B82F6", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF", size=11)
-    title_font = Font(bold=True, size=14)
-    border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-    
-    # TÍTULO
-    ws.merge_cells('A1:J1')
-    ws['A1'] = f"REPORTE DE MOVIMIENTOS DE INVENTARIO - {datetime.now().strftime('%d/%m/%Y')}"
-    ws['A1'].font = title_font
-    ws['A1'].alignment = Alignment(horizontal='center', vertical='center')
-    
-    # HEADERS
-    headers = ['Fecha', 'Tipo', 'Producto', 'Cantidad', 'Stock Antes', 
-               'Stock Después', 'Costo Unit.', 'Costo Total', 'Usuario', 'Observaciones']
-    
-    for col, header in enumerate(headers, start=1):
-        cell = ws.cell(row=3, column=col)
-        cell.value = header
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal='center', vertical='center')
-        cell.border = border
+    """Exportar todos los movimientos filtrados a Excel (streaming / segundo plano)"""
+    from apps.reports_analytics.exporters import ExportService, ExportacionMovimientos
     
-    # DATOS
-    row = 4
-    for mov in movimientos:
-        ws.cell(row=row, column=1, value=mov.fecha_movimiento.strftime('%d/%m/%Y %H:%M')).border = border
-        ws.cell(row=row, column=2, value=mov.get_tipo_movimiento_display()).border = border
-        ws.cell(row=row, column=3, value=mov.producto_normal.producto.nombre).border = border
-        ws.cell(row=row, column=4, value=float(mov.cantidad)).border = border
-        ws.cell(row=row, column=4).alignment = Alignment(horizontal='center')
-        ws.cell(row=row, column=5, value=float(mov.stock_antes)).border = border
-        ws.cell(row=row, column=5).alignment = Alignment(horizontal='center')
-        ws.cell(row=row, column=6, value=float(mov.stock_despues)).border = border
-        ws.cell(row=row, column=6).alignment = Alignment(horizontal='center')
-        ws.cell(row=row, column=7, value=float(mov.costo_unitario)).border = border
-        ws.cell(row=row, column=7).number_format = '$#,##0.00'
-        ws.cell(row=row, column=8, value=float(mov.costo_total)).border = border
-        ws.cell(row=row, column=8).number_format = '$#,##0.00'
-        ws.cell(row=row, column=9, value=mov.usuario.get_full_name() if mov.usuario else 'Sistema').border = border
-        ws.cell(row=row, column=10, value=mov.observaciones or 'N/A').border = border
-        row += 1
-    
-    # Ajustar anchos
-    ws.column_dimensions['A'].width = 18
-    ws.column_dimensions['B'].width = 20
-    ws.column_dimensions['C'].width = 30
-    ws.column_dimensions['D'].width = 12
-    ws.column_dimensions['E'].width = 12
-    ws.column_dimensions['F'].width = 12
-    ws.column_dimensions['G'].width = 12
-    ws.column_dimensions['H'].width = 12
-    ws.column_dimensions['I'].width = 20
-    ws.column_dimensions['J'].width = 25
-    
-    # Preparar respuesta
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
-    
-    filename = f"movimientos_inventario_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-    response = HttpResponse(
-        output.read(),
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    response['Content-Disposition'] = f'attachment; filename={filename}'
-    
-    return response
+    exportacion = ExportacionMovimientos.desde_request(request)
+    return ExportService.exportar(request, exportacion, 'EXCEL')
 
 
 @ensure_csrf_cookie
 @auth_required
 def exportar_movimientos_pdf_general(request):
-    """Exportar todos los movimientos filtrados a PDF"""
-    from apps.inventory_management.models import MovimientoInventario
-    from django.http import HttpResponse
-    from django.db.models import Q
-    from reportlab.lib.pagesizes import letter, landscape
-    from reportlab.lib import colors
-    from reportlab.lib.units import inch
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.enums import TA_CENTER
-    from io import BytesIO
-    from datetime import datetime
+    """Exportar todos los movimientos filtrados a PDF (streaming / segundo plano)"""
+    from apps.reports_analytics.exporters import ExportService, ExportacionMovimientos
     
-    # Obtener filtros
-    fecha_inicio = request.GET.get('fecha_inicio')
-    fecha_fin = request.GET.get('fecha_fin')
-    tipo_movimiento = request.GET.get('tipo_movimiento')
-    producto_id = request.GET.get('producto')
-    usuario_id = request.GET.get('usuario')
-    search = request.GET.get('search')
-    
-    # Filtrar movimientos
-    movimientos = MovimientoInventario.objects.select_related(
-        'producto_normal__producto',
-        'usuario'
-    ).all().order_by('-fecha_movimiento')
-    
-    if fecha_inicio:
-        movimientos = movimientos.filter(fecha_movimiento__date__gte=fecha_inicio)
-    if fecha_fin:
-        movimientos = movimientos.filter(fecha_movimiento__date__lte=fecha_fin)
-    if tipo_movimiento:
-        movimientos = movimientos.filter(tipo_movimiento=tipo_movimiento)
-    if producto_id:
-        movimientos = movimientos.filter(producto_normal__producto_id=producto_id)
-    if usuario_id:
-        movimientos = movimientos.filter(usuario_id=usuario_id)
-    if search:
-        movimientos = movimientos.filter(
-            Q(producto_normal__producto__nombre__icontains=search) |
-            Q(observaciones__icontains=search)
-        )
-    
-    # Limitar a 200 registros para PDF
-    movimientos = movimientos[:200]
-    
-    # Crear buffer
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=landscape(letter), topMargin=0.5*inch)
-    elements = []
-    styles = getSampleStyleSheet()
-    
-    # Título
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=16,
-        textColor=colors.HexColor('#0f172a'),
-        spaceAfter=20,
-        alignment=TA_CENTER
-    )
-    
-    title = Paragraph(f"REPORTE DE MOVIMIENTOS DE INVENTARIO - {datetime.now().strftime('%d/%m/%Y')}", title_style)
-    elements.append(title)
-    elements.append(Spacer(1, 10))
-    
-    # Tabla de movimientos
-    data = [['Fecha', 'Tipo', 'Producto', 'Cant.', 'Stock Antes', 'Stock Después', 'Usuario']]
-    
-    for mov in movimientos:
-        data.append([
-            mov.fecha_movimiento.strftime('%d/%m/%Y'),
-            mov.get_tipo_movimiento_display()[:15],
-            mov.producto_normal.producto.nombre[:25],
-            str(mov.cantidad),
-            str(mov.stock_antes),
-            str(mov.stock_despues),
-            (mov.usuario.get_full_name() if mov.usuario else 'Sistema')[:20],
-        ])
-    
-    table = Table(data, colWidths=[1*inch, 1.3*inch, 2*inch, 0.7*inch, 1*inch, 1*inch, 1.5*inch])
-    table.setStyle(TableStyle([
-        # Header
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3B82F6')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('FONT', (0, 0), (-1, 0), 'Helvetica-Bold', 10),
-        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-        
-        # Body
-        ('FONT', (0, 1), (-1, -1), 'Helvetica', 8),
-        ('TEXTCOLOR', (0, 1), (-1, -1), colors.HexColor('#1e293b')),
-        ('ALIGN', (3, 1), (5, -1), 'CENTER'),
-        
-        # Borders
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e2e8f0')),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8fafc')]),
-    ]))
-    
-    elements.append(table)
-    doc.build(elements)
-    
-    # Preparar respuesta
-    buffer.seek(0)
-    filename = f"movimientos_inventario_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-    response = HttpResponse(buffer.read(), content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename={filename}'
-    
-    return response
+    exportacion = ExportacionMovimientos.desde_request(request)
+    return ExportService.exportar(request, exportacion, 'PDF')
 
 
 
@@ -5268,7 +4777,6 @@ def api_alertas_list(request):
     GET /panel/api/alertas/list/
     """
     from apps.stock_alert_system.models import AlertaStock
-    from django.core.paginator import Paginator
     
     try:
         # Filtros desde query params
@@ -5276,14 +4784,13 @@ def api_alertas_list(request):
         buscar = request.GET.get('buscar', '').strip()
         prioridad = request.GET.get('prioridad', '')
         tipo = request.GET.get('tipo', '')
-        page = int(request.GET.get('page', 1))
-        per_page = int(request.GET.get('per_page', 20))
+        per_page = min(int(request.GET.get('per_page', 20)), 100)
         
         # Query base
         alertas = AlertaStock.objects.select_related(
             'producto',
             'quintal',
-            'producto_normal',
+            'producto_normal__producto',
             'usuario_asignado'
         ).all()
         
@@ -5311,12 +4818,11 @@ def api_alertas_list(request):
         if tipo:
             alertas = alertas.filter(tipo_alerta=tipo)
         
-        # Ordenar por prioridad y fecha
-        alertas = alertas.order_by('-prioridad', '-fecha_creacion')
-        
-        # Paginación
-        paginator = Paginator(alertas, per_page)
-        page_obj = paginator.get_page(page)
+        # Paginación por cursor, ordenada por prioridad y fecha
+        paginator = KeysetPaginator(
+            alertas, per_page, orden=('-prioridad', '-fecha_creacion', '-id')
+        )
+        page_obj = paginator.pagina(request.GET.get('cursor'))
         
         # Serializar datos
         alertas_data = []
@@ -5343,12 +4849,15 @@ def api_alertas_list(request):
             'success': True,
             'alertas': alertas_data,
             'pagination': {
-                'page': page,
+                'page': page_obj.number,
                 'per_page': per_page,
                 'total': paginator.count,
+                'total_estimado': paginator.count_es_estimado,
                 'total_pages': paginator.num_pages,
                 'has_next': page_obj.has_next(),
                 'has_previous': page_obj.has_previous(),
+                'next_cursor': page_obj.next_cursor,
+                'previous_cursor': page_obj.previous_cursor,
             }
         })
         
@@ -5703,11 +5212,10 @@ def api_notificaciones_list(request):
         - categoria: 'STOCK', 'VENTAS', 'FINANCIERO', 'SISTEMA'
         - prioridad: 'BAJA', 'MEDIA', 'ALTA', 'CRITICA'
         - busqueda: texto a buscar
-        - page: número de página
-        - per_page: items por página (default 20)
+        - cursor: cursor de página devuelto en `pagination` (sin cursor, la primera)
+        - per_page: items por página (default 20, máximo 100)
     """
     from apps.notifications.models import Notificacion
-    from django.core.paginator import Paginator
     from django.db.models import Q
     
     try:
@@ -5716,8 +5224,7 @@ def api_notificaciones_list(request):
         categoria = request.GET.get('categoria', '')
         prioridad = request.GET.get('prioridad', '')
         busqueda = request.GET.get('busqueda', '').strip()
-        page = int(request.GET.get('page', 1))
-        per_page = int(request.GET.get('per_page', 20))
+        per_page = min(int(request.GET.get('per_page', 20)), 100)
         
         # Query base
         notificaciones = Notificacion.objects.filter(
@@ -5742,12 +5249,9 @@ def api_notificaciones_list(request):
                 Q(mensaje__icontains=busqueda)
             )
         
-        # Ordenar
-        notificaciones = notificaciones.order_by('-fecha_creacion')
-        
-        # Paginar
-        paginator = Paginator(notificaciones, per_page)
-        page_obj = paginator.get_page(page)
+        # Paginar por cursor (más recientes primero)
+        paginator = KeysetPaginator(notificaciones, per_page, orden=('-fecha_creacion', '-id'))
+        page_obj = paginator.pagina(request.GET.get('cursor'))
         
         # Serializar
         notificaciones_data = []
@@ -5781,8 +5285,11 @@ def api_notificaciones_list(request):
                 'page': page_obj.number,
                 'total_pages': paginator.num_pages,
                 'total_items': paginator.count,
+                'total_estimado': paginator.count_es_estimado,
                 'has_next': page_obj.has_next(),
                 'has_previous': page_obj.has_previous(),
+                'next_cursor': page_obj.next_cursor,
+                'previous_cursor': page_obj.previous_cursor,
             }
         })
         
@@ -6073,12 +5580,10 @@ def api_dashboard_stats(request):
         
         from apps.stock_alert_system.models import Alerta
         
-        hoy = timezone.now().date()
+        hoy = timezone.localdate()
         hace_7_dias = hoy - timedelta(days=6)
         
-        print(f"\n{'='*80}")
-        print(f"📊 DASHBOARD API - {timezone.now().strftime('%H:%M:%S')}")
-        print(f"{'='*80}")
+        logger.debug(f"📊 DASHBOARD API - {timezone.now().strftime('%H:%M:%S')}")
         
         # ============================================
         # VENTAS DE HOY
@@ -6087,7 +5592,7 @@ def api_dashboard_stats(request):
         ventas_hoy_count = 0
         try:
             ventas_result = Venta.objects.filter(
-                fecha_venta__date=hoy,
+                **filtro_dia('fecha_venta', hoy),
                 estado='COMPLETADA'
             ).aggregate(
                 total=Sum('total'),
@@ -6125,12 +5630,20 @@ def api_dashboard_stats(request):
         # ============================================
         ventas_semana = []
         try:
+            totales_por_dia = {
+                fila['periodo']: fila['total']
+                for fila in agrupar_por_periodo(
+                    Venta.objects.filter(
+                        **filtro_rango('fecha_venta', hace_7_dias, hoy),
+                        estado='COMPLETADA'
+                    ),
+                    'fecha_venta',
+                    total=Sum('total')
+                )
+            }
             for i in range(7):
                 fecha = hace_7_dias + timedelta(days=i)
-                total = Venta.objects.filter(
-                    fecha_venta__date=fecha,
-                    estado='COMPLETADA'
-                ).aggregate(total=Sum('total'))['total'] or 0
+                total = totales_por_dia.get(fecha) or 0
                 
                 ventas_semana.append({
                     'fecha': fecha.strftime('%d/%m'),
@@ -6149,11 +5662,11 @@ def api_dashboard_stats(request):
         # ============================================
         top_productos_list = []
         try:
-            print(f"\n🏆 TOP PRODUCTOS:")
+            logger.debug("🏆 TOP PRODUCTOS:")
             
             # Obtener top considerando AMBOS: cantidad_unidades Y peso_vendido
             top = DetalleVenta.objects.filter(
-                venta__fecha_venta__date__gte=hace_7_dias,
+                **filtro_rango('venta__fecha_venta', hace_7_dias),
                 venta__estado='COMPLETADA'
             ).values('producto__nombre').annotate(
                 total_unidades=Sum('cantidad_unidades'),
@@ -6183,7 +5696,7 @@ def api_dashboard_stats(request):
                     # No tiene ventas, saltar
                     continue
                 
-                print(f"   - {nombre[:30]}: {display}")
+                logger.debug(f"- {nombre[:30]}: {display}")
                 
                 top_productos_list.append({
                     'nombre': nombre[:20],
@@ -6194,10 +5707,10 @@ def api_dashboard_stats(request):
                 if len(top_productos_list) >= 5:
                     break
             
-            print(f"   Total en lista: {len(top_productos_list)}")
+            logger.debug(f"Total en lista: {len(top_productos_list)}")
             
         except Exception as e:
-            print(f"❌ Error: {e}")
+            logger.error(f"❌ Error: {e}")
         
         # ============================================
         # ÚLTIMAS 5 VENTAS
@@ -6225,7 +5738,7 @@ def api_dashboard_stats(request):
         # ============================================
         alertas_list = []
         try:
-            print(f"\n🚨 ALERTAS:")
+            logger.debug("🚨 ALERTAS:")
             
             # Intentar obtener alertas activas
             alertas = Alerta.objects.filter(
@@ -6240,9 +5753,9 @@ def api_dashboard_stats(request):
                         'titulo': titulo,
                         'mensaje': str(a.mensaje)[:150]
                     })
-                print(f"   Alertas activas: {len(alertas_list)}")
+                logger.debug(f"Alertas activas: {len(alertas_list)}")
             else:
-                print(f"   No hay alertas activas, generando alertas de stock...")
+                logger.debug("No hay alertas activas, generando alertas de stock...")
                 
                 # Generar alertas de productos con stock bajo
                 if InventarioNormal:
@@ -6259,7 +5772,7 @@ def api_dashboard_stats(request):
                                     'titulo': 'Stock Bajo',
                                     'mensaje': f'{inv.producto.nombre}: {inv.stock_actual} unidades (mínimo: {inv.stock_minimo})'
                                 })
-                            print(f"   Alertas generadas: {len(alertas_list)}")
+                            logger.debug(f"Alertas generadas: {len(alertas_list)}")
                         else:
                             # Si no hay productos con stock bajo, mostrar productos sin stock
                             sin_stock = InventarioNormal.objects.filter(
@@ -6274,7 +5787,7 @@ def api_dashboard_stats(request):
                                 })
                             
                             if len(alertas_list) > 0:
-                                print(f"   Productos agotados: {len(alertas_list)}")
+                                logger.debug(f"Productos agotados: {len(alertas_list)}")
                             else:
                                 # Todo está bien
                                 alertas_list.append({
@@ -6282,12 +5795,12 @@ def api_dashboard_stats(request):
                                     'titulo': 'Sistema OK',
                                     'mensaje': 'No hay alertas críticas en este momento'
                                 })
-                                print(f"   ✅ Sin alertas críticas")
+                                logger.debug("✅ Sin alertas críticas")
                     except Exception as e:
-                        print(f"   Error generando alertas: {e}")
+                        logger.error(f"Error generando alertas: {e}")
             
         except Exception as e:
-            print(f"❌ Error en alertas: {e}")
+            logger.error(f"❌ Error en alertas: {e}")
         
         # ============================================
         # RESPUESTA
@@ -6307,15 +5820,12 @@ def api_dashboard_stats(request):
             'timestamp': timezone.now().isoformat()
         }
         
-        print(f"\n📤 Enviando: {len(top_productos_list)} productos, {len(alertas_list)} alertas")
-        print(f"{'='*80}\n")
+        logger.debug(f"📤 Enviando: {len(top_productos_list)} productos, {len(alertas_list)} alertas")
         
         return JsonResponse(response_data)
         
     except Exception as e:
-        import traceback
-        print(f"\n💥 ERROR: {e}")
-        traceback.print_exc()
+        logger.exception("Error en datos del dashboard")
         
         return JsonResponse({
             'success': True,
@@ -6364,6 +5874,35 @@ def api_alertas_count(request):
             'count': 0
         })
 
+@auth_required
+@require_http_methods(["GET"])
+def api_estado_panel(request):
+    """
+    API: Contadores de insignias del panel en una sola respuesta
+    GET /panel/api/estado/
+
+    Responde 304 si el If-None-Match coincide con la versión actual
+    (ver estado_panel.py).
+    """
+    from django.http import HttpResponseNotModified
+    from django.conf import settings
+    from .estado_panel import obtener_estado
+    
+    estado = obtener_estado(request.user)
+    etag = f'"{estado["version"]}"'
+    
+    if request.META.get('HTTP_IF_NONE_MATCH') == etag:
+        response = HttpResponseNotModified()
+    else:
+        response = JsonResponse({
+            'success': True,
+            'push': getattr(settings, 'ESTADO_PANEL_PUSH', False),
+            **estado
+        })
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
 # API para quintales (agregar al final del archivo)
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
@@ -6399,9 +5938,7 @@ def api_quintales_por_producto(request, producto_id):
             'total': len(data)
         })
     except Exception as e:
-        import traceback
-        print(f"❌ Error en api_quintales_por_producto: {str(e)}")
-        print(traceback.format_exc())
+        logger.exception(f"❌ Error en api_quintales_por_producto: {str(e)}")
         return JsonResponse({
             'success': False, 
             'error': str(e)
@@ -6419,6 +5956,10 @@ def api_calcular_quintal(request):
         tipo = data.get('tipo')  # 'peso_a_dinero' o 'dinero_a_peso'
         valor = Decimal(str(data.get('valor', 0)))
         
+        if not quintal_id and data.get('producto_id'):
+            # Venta a granel: precio del producto y peso de todos sus quintales (FIFO)
+            return _calcular_granel(data.get('producto_id'), tipo, valor)
+        
         quintal = Quintal.objects.get(id=quintal_id)
         service = QuintalSalesService()
         
@@ -6446,6 +5987,36 @@ def api_calcular_quintal(request):
             })
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)})
+
+
+def _calcular_granel(producto_id, tipo, valor):
+    """Conversión peso / dinero contra el stock total del producto"""
+    from apps.inventory_management.services import FIFOAllocationService
+    
+    producto = Producto.objects.select_related('unidad_medida_base').get(id=producto_id)
+    precio = producto.precio_por_unidad_peso or Decimal('0')
+    disponible = FIFOAllocationService.quintales_disponibles(producto).aggregate(
+        total=Sum('peso_actual')
+    )['total'] or Decimal('0')
+    unidad = producto.unidad_medida_base.abreviatura if producto.unidad_medida_base else 'lb'
+    
+    if tipo == 'peso_a_dinero':
+        peso, dinero = valor, valor * precio
+    else:  # dinero_a_peso
+        peso, dinero = FIFOAllocationService.peso_por_monto(valor, precio), valor
+    
+    if peso > disponible:
+        return JsonResponse({
+            'success': False,
+            'error': f'Peso insuficiente. Máximo disponible: {disponible} {unidad}'
+        })
+    return JsonResponse({
+        'success': True,
+        'peso': float(peso),
+        'dinero': float(dinero),
+        'unidad': unidad,
+        'disponible': float(disponible)
+    })
 # ============================================================================
 # VISTAS DE FINANZAS - CAJAS
 # ============================================================================
@@ -6501,9 +6072,9 @@ def cajas_list(request):
     )['total'] or 0
     
     # Movimientos de hoy
-    hoy = timezone.now().date()
+    hoy = timezone.localdate()
     movimientos_hoy = MovimientoCaja.objects.filter(
-        fecha_movimiento__date=hoy
+        **filtro_dia('fecha_movimiento', hoy)
     ).count()
     
     # Paginación
@@ -6745,10 +6316,10 @@ def movimientos_caja(request, caja_id):
     fecha_hasta = request.GET.get('hasta')
     
     if fecha_desde:
-        movimientos = movimientos.filter(fecha_movimiento__date__gte=fecha_desde)
+        movimientos = movimientos.filter(**filtro_rango('fecha_movimiento', fecha_desde))
     
     if fecha_hasta:
-        movimientos = movimientos.filter(fecha_movimiento__date__lte=fecha_hasta)
+        movimientos = movimientos.filter(**filtro_rango('fecha_movimiento', fecha_hasta=fecha_hasta))
     
     # Ordenar por fecha descendente
     movimientos = movimientos.order_by('-fecha_movimiento')[:50]  # Últimos 50
@@ -6824,10 +6395,10 @@ def arqueos_list(request):
         arqueos = arqueos.filter(caja_id=caja_id)
     
     if fecha_desde:
-        arqueos = arqueos.filter(fecha_cierre__date__gte=fecha_desde)
+        arqueos = arqueos.filter(**filtro_rango('fecha_cierre', fecha_desde))
     
     if fecha_hasta:
-        arqueos = arqueos.filter(fecha_cierre__date__lte=fecha_hasta)
+        arqueos = arqueos.filter(**filtro_rango('fecha_cierre', fecha_hasta=fecha_hasta))
     
     # Ordenar por fecha de cierre descendente
     arqueos = arqueos.order_by('-fecha_cierre')
@@ -7347,8 +6918,8 @@ def editar_caja_chica(request, caja_chica_id):
         estado = request.POST.get('estado', 'ACTIVA')
         
         # DEBUG: Imprimir valores recibidos
-        print(f"DEBUG - Umbral recibido: {umbral_reposicion}")
-        print(f"DEBUG - POST data: {request.POST}")
+        logger.debug(f"DEBUG - Umbral recibido: {umbral_reposicion}")
+        logger.debug(f"DEBUG - POST data: {request.POST}")
         
         # Validaciones
         if not nombre:
@@ -7387,7 +6958,7 @@ def editar_caja_chica(request, caja_chica_id):
         
         # DEBUG: Verificar que se guardó
         caja_chica.refresh_from_db()
-        print(f"DEBUG - Umbral guardado: {caja_chica.umbral_reposicion}")
+        logger.debug(f"DEBUG - Umbral guardado: {caja_chica.umbral_reposicion}")
         
         messages.success(
             request,
@@ -7396,31 +6967,29 @@ def editar_caja_chica(request, caja_chica_id):
         
     except Exception as e:
         messages.error(request, f'❌ Error al editar caja chica: {str(e)}')
-        logger.error(f"Error en editar_caja_chica: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error en editar_caja_chica")
     
     return redirect('custom_admin:caja_chica_list')
 @require_http_methods(["GET"])
 def buscar_venta_api(request):
     numero = request.GET.get('numero', '').strip()
     
-    print(f"🔍 Buscando venta con número: '{numero}'")
+    logger.debug(f"🔍 Buscando venta con número: '{numero}'")
     
     if not numero:
         return JsonResponse({'success': False, 'error': 'Número de venta requerido'})
     
     try:
         venta = Venta.objects.get(numero_venta__iexact=numero)
-        print(f"✅ Venta encontrada: {venta.numero_venta}")
+        logger.debug(f"✅ Venta encontrada: {venta.numero_venta}")
         
         detalles = venta.detalles.all()
-        print(f"📦 Productos encontrados: {detalles.count()}")
+        logger.debug(f"📦 Productos encontrados: {detalles.count()}")
         
         productos = []
         for detalle in detalles:
             # Debug cada campo
-            print(f"Producto nombre: {type(detalle.producto.nombre)} - {detalle.producto.nombre}")
+            logger.debug(f"Producto nombre: {type(detalle.producto.nombre)} - {detalle.producto.nombre}")
             
             producto_data = {
                 'id': str(detalle.id),
@@ -7429,15 +6998,15 @@ def buscar_venta_api(request):
                 'precio': float(detalle.precio_unitario),
                 'subtotal': float(detalle.subtotal)
             }
-            print(f"Producto data: {producto_data}")
+            logger.debug(f"Producto data: {producto_data}")
             productos.append(producto_data)
         
         # Debug venta
-        print(f"Venta ID: {type(venta.id)} - {venta.id}")
-        print(f"Venta numero: {type(venta.numero_venta)} - {venta.numero_venta}")
-        print(f"Cliente: {type(venta.cliente)} - {venta.cliente}")
-        print(f"Fecha: {type(venta.fecha_venta)} - {venta.fecha_venta}")
-        print(f"Total: {type(venta.total)} - {venta.total}")
+        logger.debug(f"Venta ID: {type(venta.id)} - {venta.id}")
+        logger.debug(f"Venta numero: {type(venta.numero_venta)} - {venta.numero_venta}")
+        logger.debug(f"Cliente: {type(venta.cliente)} - {venta.cliente}")
+        logger.debug(f"Fecha: {type(venta.fecha_venta)} - {venta.fecha_venta}")
+        logger.debug(f"Total: {type(venta.total)} - {venta.total}")
         
         venta_data = {
             'success': True,
@@ -7451,15 +7020,14 @@ def buscar_venta_api(request):
             }
         }
         
-        print(f"✅ Venta data construida correctamente")
+        logger.debug("✅ Venta data construida correctamente")
         return JsonResponse(venta_data)
         
     except Venta.DoesNotExist:
-        print(f"❌ Venta no encontrada con número: '{numero}'")
+        logger.warning(f"Venta no encontrada con número: '{numero}'")
         return JsonResponse({'success': False, 'error': 'Venta no encontrada'})
     except Exception as e:
-        import traceback
-        print(f"❌ Error completo: {traceback.format_exc()}")
+        logger.exception("❌ Error completo")
         return JsonResponse({'success': False, 'error': f'Error: {str(e)}'})
 
 @require_http_methods(["POST"])
@@ -7469,14 +7037,14 @@ def procesar_devolucion_api(request):
     
     data = json.loads(request.body)
     
-    print(f"📥 Datos recibidos: {data}")
+    logger.debug(f"📥 Datos recibidos: {data}")
     
     try:
         venta = Venta.objects.get(id=data['venta_id'])
-        print(f"✅ Venta encontrada: {venta.numero_venta}")
+        logger.debug(f"✅ Venta encontrada: {venta.numero_venta}")
         
         detalle = DetalleVenta.objects.get(id=data['detalle_venta_id'])
-        print(f"✅ Detalle encontrado: {detalle.producto.nombre}")
+        logger.debug(f"✅ Detalle encontrado: {detalle.producto.nombre}")
         
         # Calcular monto de devolución
         cantidad_devuelta = Decimal(str(data['cantidad_devuelta']))
@@ -7512,7 +7080,7 @@ def procesar_devolucion_api(request):
             estado='PENDIENTE'
         )
         
-        print(f"✅ Devolución creada: {devolucion.numero_devolucion}")
+        logger.debug(f"✅ Devolución creada: {devolucion.numero_devolucion}")
         
         return JsonResponse({
             'success': True,
@@ -7521,8 +7089,7 @@ def procesar_devolucion_api(request):
         })
         
     except Exception as e:
-        import traceback
-        print(f"❌ Error completo: {traceback.format_exc()}")
+        logger.exception("❌ Error completo")
         return JsonResponse({'success': False, 'error': str(e)})
 @require_http_methods(["POST"])
 def aprobar_devolucion_api(request, id):
@@ -7585,8 +7152,7 @@ def devolucion_detalle_api(request, devolucion_id):
     except Devolucion.DoesNotExist:
         return JsonResponse({'success': False, 'error': 'Devolución no encontrada'})
     except Exception as e:
-        import traceback
-        print(f"❌ Error en devolucion_detalle_api: {traceback.format_exc()}")
+        logger.exception("❌ Error en devolucion_detalle_api")
         return JsonResponse({'success': False, 'error': str(e)})
 
 
@@ -7605,10 +7171,10 @@ def aprobar_devolucion_api(request, id):
     
     try:
         data = json.loads(request.body)
-        print(f"📥 Data recibida: {data}")
+        logger.debug(f"📥 Data recibida: {data}")
         
         devolucion = Devolucion.objects.get(id=id)
-        print(f"✅ Devolución encontrada: {devolucion.numero_devolucion}")
+        logger.debug(f"✅ Devolución encontrada: {devolucion.numero_devolucion}")
         
         if devolucion.estado != 'PENDIENTE':
             return HttpResponse(
@@ -7620,7 +7186,7 @@ def aprobar_devolucion_api(request, id):
             )
         
         decision = data.get('decision')
-        print(f"📋 Decisión: {decision}")
+        logger.debug(f"📋 Decisión: {decision}")
         
         if decision == 'APROBADA':
             with transaction.atomic():
@@ -7628,19 +7194,19 @@ def aprobar_devolucion_api(request, id):
                 devolucion.usuario_aprueba = request.user
                 devolucion.fecha_procesado = timezone.now()
                 devolucion.save()
-                print(f"✅ Estado actualizado a APROBADA")
+                logger.debug("✅ Estado actualizado a APROBADA")
                 
                 # ✅ REINTEGRAR AL INVENTARIO
                 producto = devolucion.detalle_venta.producto
                 cantidad_devuelta = devolucion.cantidad_devuelta
                 
-                print(f"🔍 Producto: {producto.nombre}")
-                print(f"🔍 Tipo inventario: {producto.tipo_inventario}")
-                print(f"🔍 Cantidad devuelta: {cantidad_devuelta}")
-                print(f"🔍 Es quintal?: {producto.es_quintal()}")
+                logger.debug(f"🔍 Producto: {producto.nombre}")
+                logger.debug(f"🔍 Tipo inventario: {producto.tipo_inventario}")
+                logger.debug(f"🔍 Cantidad devuelta: {cantidad_devuelta}")
+                logger.debug(f"🔍 Es quintal?: {producto.es_quintal()}")
                 
                 if producto.es_quintal():
-                    print("📦 Procesando producto QUINTAL...")
+                    logger.debug("📦 Procesando producto QUINTAL...")
                     try:
                         # Crear nuevo quintal con el producto devuelto
                         nuevo_quintal = Quintal.objects.create(
@@ -7658,17 +7224,16 @@ def aprobar_devolucion_api(request, id):
                             observaciones=f'Devolución {devolucion.numero_devolucion} - Venta {devolucion.venta_original.numero_venta}'
                         )
                         
-                        print(f"✅ Quintal creado: ID={nuevo_quintal.codigo_unico}, Peso={nuevo_quintal.peso_actual}")
+                        logger.debug(f"✅ Quintal creado: ID={nuevo_quintal.codigo_unico}, Peso={nuevo_quintal.peso_actual}")
                         
                         # El signal post_save de Quintal creará automáticamente el MovimientoQuintal
                         
                     except Exception as e:
-                        import traceback
-                        print(f"❌ Error al crear quintal: {traceback.format_exc()}")
+                        logger.exception("❌ Error al crear quintal")
                         raise  # Re-lanzar para que el transaction.atomic haga rollback
                         
                 else:
-                    print("📦 Procesando producto NORMAL...")
+                    logger.debug("📦 Procesando producto NORMAL...")
                     try:
                         # Obtener o crear el inventario normal del producto
                         inventario, created = ProductoNormal.objects.get_or_create(
@@ -7681,7 +7246,7 @@ def aprobar_devolucion_api(request, id):
                         )
                         
                         if created:
-                            print(f"📝 Inventario creado para {producto.nombre}")
+                            logger.debug(f"📝 Inventario creado para {producto.nombre}")
                         
                         # Guardar stock anterior
                         stock_antes = inventario.stock_actual
@@ -7690,7 +7255,7 @@ def aprobar_devolucion_api(request, id):
                         inventario.stock_actual += int(cantidad_devuelta)
                         inventario.save()
                         
-                        print(f"✅ Stock de {producto.nombre} actualizado: {stock_antes} → {inventario.stock_actual}")
+                        logger.debug(f"✅ Stock de {producto.nombre} actualizado: {stock_antes} → {inventario.stock_actual}")
                         
                         # Registrar movimiento de inventario
                         MovimientoInventario.objects.create(
@@ -7705,11 +7270,10 @@ def aprobar_devolucion_api(request, id):
                             observaciones=f'Devolución {devolucion.numero_devolucion}'
                         )
                         
-                        print(f"✅ Movimiento de inventario registrado")
+                        logger.debug("✅ Movimiento de inventario registrado")
                         
                     except Exception as e:
-                        import traceback
-                        print(f"❌ Error al actualizar inventario normal: {traceback.format_exc()}")
+                        logger.exception("❌ Error al actualizar inventario normal")
                         raise  # Re-lanzar para que el transaction.atomic haga rollback
             
             return HttpResponse(
@@ -7753,8 +7317,7 @@ def aprobar_devolucion_api(request, id):
             content_type='application/json'
         )
     except Exception as e:
-        import traceback
-        print(f"❌ Error en aprobar_devolucion_api: {traceback.format_exc()}")
+        logger.exception("❌ Error en aprobar_devolucion_api")
         return HttpResponse(
             json.dumps({'success': False, 'error': str(e)}),
             content_type='application/json'
@@ -7843,8 +7406,7 @@ def api_crear_unidad_medida(request):
         })
         
     except Exception as e:
-        import traceback
-        print(f"❌ Error en api_crear_unidad_medida: {traceback.format_exc()}")
+        logger.exception("❌ Error en api_crear_unidad_medida")
         return JsonResponse({
             'success': False,
             'error': str(e)
@@ -7907,8 +7469,7 @@ def categoria_crear_api(request):
         })
         
     except Exception as e:
-        import traceback
-        print(f"❌ Error en categoria_crear_api: {traceback.format_exc()}")
+        logger.exception("❌ Error en categoria_crear_api")
         return JsonResponse({
             'success': False,
             'error': str(e)
@@ -7997,8 +7558,7 @@ def marca_crear_formdata(request):
             'error': f'Error de integridad: {error_msg}'
         }, status=400)
     except Exception as e:
-        import traceback
-        print(f"❌ Error en marca_crear_formdata: {traceback.format_exc()}")
+        logger.exception("❌ Error en marca_crear_formdata")
         return JsonResponse({
             'success': False,
             'error': f'Error al crear la marca: {str(e)}'
@@ -8043,8 +7603,7 @@ def marca_crear_api(request):
         })
         
     except Exception as e:
-        import traceback
-        print(f"❌ Error en marca_crear_api: {traceback.format_exc()}")
+        logger.exception("❌ Error en marca_crear_api")
         return JsonResponse({
             'success': False,
             'error': str(e)
@@ -8099,8 +7658,7 @@ def proveedor_crear_api(request):
         })
         
     except Exception as e:
-        import traceback
-        print(f"❌ Error en proveedor_crear_api: {traceback.format_exc()}")
+        logger.exception("❌ Error en proveedor_crear_api")
         return JsonResponse({
             'success': False,
             'error': str(e)
@@ -8205,7 +7763,7 @@ def proveedor_crear_api(request):
     except Exception as e:
         import traceback
         error_trace = traceback.format_exc()
-        print(f"❌ Error en proveedor_crear_api: {error_trace}")
+        logger.error(f"❌ Error en proveedor_crear_api: {error_trace}")
         
         # Mostrar el error completo para debugging
         return JsonResponse({
@@ -8749,10 +8307,10 @@ def logs_configuracion_view(request):
         logs = logs.filter(usuario_id=usuario_id)
     
     if fecha_desde:
-        logs = logs.filter(fecha_cambio__date__gte=fecha_desde)
+        logs = logs.filter(**filtro_rango('fecha_cambio', fecha_desde))
     
     if fecha_hasta:
-        logs = logs.filter(fecha_cambio__date__lte=fecha_hasta)
+        logs = logs.filter(**filtro_rango('fecha_cambio', fecha_hasta=fecha_hasta))
     
     # Obtener valores únicos para filtros
     from apps.authentication.models import Usuario
@@ -8866,119 +8424,40 @@ def health_check_view(request):
 def api_ejecutar_health_check(request):
     """
     API para ejecutar un health check manual del sistema
+
+    Usa las mismas sondas que el muestreo periódico; al ser una ejecución
+    explícita, el resultado siempre se persiste.
     """
     try:
-        import psutil
-        from django.db import connection
-        from django.core.cache import cache
-        import time
-        
-        errores = []
-        advertencias = []
-        detalles = {}
-        
-        # Check Base de Datos
-        try:
-            start_time = time.time()
-            with connection.cursor() as cursor:
-                cursor.execute("SELECT 1")
-            tiempo_respuesta_db = int((time.time() - start_time) * 1000)
-            base_datos_ok = True
-            detalles['base_datos'] = 'Conectado correctamente'
-        except Exception as e:
-            tiempo_respuesta_db = None
-            base_datos_ok = False
-            errores.append(f"Error en base de datos: {str(e)}")
-        
-        # Check Redis/Cache
-        try:
-            cache.set('health_check_test', 'ok', 10)
-            test_value = cache.get('health_check_test')
-            redis_ok = test_value == 'ok'
-            detalles['redis'] = 'Funcionando correctamente' if redis_ok else 'No responde'
-        except Exception as e:
-            redis_ok = False
-            advertencias.append(f"Redis no disponible: {str(e)}")
-        
-        # Check Disco
-        try:
-            disk = psutil.disk_usage('/')
-            espacio_libre_gb = disk.free / (1024**3)
-            disco_ok = espacio_libre_gb > 5  # Al menos 5GB libres
-            detalles['disco'] = f"{espacio_libre_gb:.2f} GB libres de {disk.total / (1024**3):.2f} GB"
-            
-            if not disco_ok:
-                advertencias.append(f"Poco espacio en disco: {espacio_libre_gb:.2f} GB")
-        except Exception as e:
-            espacio_libre_gb = None
-            disco_ok = False
-            advertencias.append(f"No se pudo verificar espacio en disco: {str(e)}")
+        from apps.system_configuration.services import HealthMonitorService
         
-        # Check Memoria
-        try:
-            memory = psutil.virtual_memory()
-            uso_memoria = memory.percent
-            memoria_ok = uso_memoria < 90
-            detalles['memoria'] = f"Uso: {uso_memoria:.2f}%"
-            
-            if not memoria_ok:
-                advertencias.append(f"Uso alto de memoria: {uso_memoria:.2f}%")
-        except Exception as e:
-            uso_memoria = None
-            memoria_ok = False
-            advertencias.append(f"No se pudo verificar memoria: {str(e)}")
+        muestra, health_check = HealthMonitorService.ejecutar(forzar=True)
         
-        # Check Celery (opcional)
-        try:
-            from celery.app.control import Inspect
-            from apps.commercebox.celery import app
-            
-            inspect = Inspect(app=app)
-            active_workers = inspect.active()
-            celery_ok = active_workers is not None and len(active_workers) > 0
-            detalles['celery'] = f"{len(active_workers) if active_workers else 0} workers activos"
-        except Exception as e:
-            celery_ok = False
-            detalles['celery'] = 'No configurado o no disponible'
-        
-        # Determinar estado general
-        if errores:
-            estado_general = 'CRITICO'
-        elif advertencias:
-            estado_general = 'ADVERTENCIA'
-        else:
-            estado_general = 'SALUDABLE'
-        
-        # Crear registro de health check
-        health_check = HealthCheck.objects.create(
-            estado_general=estado_general,
-            base_datos_ok=base_datos_ok,
-            redis_ok=redis_ok,
-            celery_ok=celery_ok,
-            disco_ok=disco_ok,
-            memoria_ok=memoria_ok,
-            espacio_disco_libre_gb=espacio_libre_gb,
-            uso_memoria_porcentaje=uso_memoria,
-            tiempo_respuesta_db_ms=tiempo_respuesta_db,
-            detalles=detalles,
-            errores=errores,
-            advertencias=advertencias
-        )
+        detalles = {
+            'base_datos': (
+                f"Conectado ({muestra['tiempo_respuesta_db_ms']} ms)"
+                if muestra['base_datos_ok'] else 'No disponible'
+            ),
+            'redis': 'Funcionando correctamente' if muestra['redis_ok'] else 'No responde',
+            'disco': f"{muestra['espacio_disco_libre_gb']:.2f} GB libres",
+            'memoria': f"Uso: {muestra['uso_memoria_porcentaje']:.2f}%",
+            'celery': f"{muestra['celery_workers']} workers activos",
+        }
         
         return JsonResponse({
             'success': True,
             'health_check': {
                 'id': str(health_check.id),
-                'estado_general': estado_general,
+                'estado_general': health_check.estado_general,
                 'estado_general_display': health_check.get_estado_general_display(),
-                'base_datos_ok': base_datos_ok,
-                'redis_ok': redis_ok,
-                'celery_ok': celery_ok,
-                'disco_ok': disco_ok,
-                'memoria_ok': memoria_ok,
+                'base_datos_ok': health_check.base_datos_ok,
+                'redis_ok': health_check.redis_ok,
+                'celery_ok': health_check.celery_ok,
+                'disco_ok': health_check.disco_ok,
+                'memoria_ok': health_check.memoria_ok,
                 'detalles': detalles,
-                'errores': errores,
-                'advertencias': advertencias,
+                'errores': health_check.errores,
+                'advertencias': health_check.advertencias,
                 'fecha_check': health_check.fecha_check.strftime('%Y-%m-%d %H:%M:%S'),
             }
         })
@@ -37,6 +37,7 @@ class CajaAdmin(admin.ModelAdmin):
     ]
     list_filter = ['estado', 'tipo', 'activa']
     search_fields = ['codigo', 'nombre']
+    list_select_related = ['usuario_apertura']
     readonly_fields = [
         'fecha_apertura', 'fecha_cierre', 
         'usuario_apertura', 'usuario_cierre',
@@ -87,6 +88,7 @@ class MovimientoCajaAdmin(admin.ModelAdmin):
     ]
     list_filter = ['tipo_movimiento', 'caja', 'fecha_movimiento']
     search_fields = ['caja__nombre', 'observaciones']
+    list_select_related = ['caja', 'usuario']
     readonly_fields = [
         'fecha_movimiento', 'saldo_anterior', 'saldo_nuevo'
     ]
@@ -128,6 +130,7 @@ class ArqueoCajaAdmin(admin.ModelAdmin):
     ]
     list_filter = ['estado', 'caja', 'fecha_cierre']
     search_fields = ['numero_arqueo', 'caja__nombre']
+    list_select_related = ['caja']
     readonly_fields = [
         'numero_arqueo', 'diferencia', 'estado',
         'fecha_creacion'
@@ -206,6 +209,7 @@ class CajaChicaAdmin(admin.ModelAdmin):
     ]
     list_filter = ['estado', 'responsable']
     search_fields = ['codigo', 'nombre']
+    list_select_related = ['responsable']
     readonly_fields = [
         'fecha_creacion', 'fecha_actualizacion',
         'fecha_ultima_reposicion'
@@ -271,6 +275,7 @@ class MovimientoCajaChicaAdmin(admin.ModelAdmin):
         'caja_chica', 'fecha_movimiento'
     ]
     search_fields = ['caja_chica__nombre', 'descripcion', 'numero_comprobante']
+    list_select_related = ['caja_chica', 'usuario']
     readonly_fields = ['fecha_movimiento', 'saldo_anterior', 'saldo_nuevo']
     date_hierarchy = 'fecha_movimiento'
     
@@ -364,6 +369,8 @@ class CuentaPorCobrarAdmin(admin.ModelAdmin):
         'descripcion'
     )
     
+    list_select_related = ('cliente', 'venta')
+    
     readonly_fields = (
         'numero_cuenta',
         'monto_pagado',
@@ -554,6 +561,8 @@ class PagoCuentaPorCobrarAdmin(admin.ModelAdmin):
         'observaciones'
     )
     
+    list_select_related = ('cuenta__cliente', 'usuario')
+    
     readonly_fields = (
         'numero_pago',
         'fecha_pago'
@@ -679,6 +688,8 @@ class CuentaPorPagarAdmin(admin.ModelAdmin):
         'descripcion'
     )
     
+    list_select_related = ('proveedor',)
+    
     readonly_fields = (
         'numero_cuenta',
         'monto_pagado',
@@ -876,6 +887,8 @@ class PagoCuentaPorPagarAdmin(admin.ModelAdmin):
         'observaciones'
     )
     
+    list_select_related = ('cuenta__proveedor', 'usuario')
+    
     readonly_fields = (
         'numero_pago',
         'fecha_pago'
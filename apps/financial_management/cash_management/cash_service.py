@@ -11,6 +11,8 @@ from django.utils import timezone
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 
+from apps.system_configuration.instrumentacion import instrumentado
+
 from ..models import Caja, MovimientoCaja, ArqueoCaja
 
 
@@ -18,6 +20,7 @@ class CashService:
     """Servicio centralizado para operaciones de caja"""
     
     @staticmethod
+    @instrumentado()
     @transaction.atomic
     def abrir_caja(
         caja: Caja,
@@ -83,6 +86,7 @@ class CashService:
         return movimiento
     
     @staticmethod
+    @instrumentado()
     @transaction.atomic
     def cerrar_caja(
         caja: Caja,
@@ -198,6 +202,7 @@ class CashService:
         return arqueo, diferencia
     
     @staticmethod
+    @instrumentado()
     @transaction.atomic
     def registrar_movimiento(
         caja: Caja,
@@ -263,6 +268,7 @@ class CashService:
         return movimiento
     
     @staticmethod
+    @instrumentado()
     def obtener_resumen_caja(caja: Caja) -> Dict:
         """
         Obtiene un resumen completo del estado de la caja
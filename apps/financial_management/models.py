@@ -8,6 +8,8 @@ from decimal import Decimal
 import uuid
 from datetime import timedelta
 
+from commercebox.db_router import lectura_reportes
+
 
 # ============================================================================
 # CAJA PRINCIPAL
@@ -1598,6 +1600,7 @@ class ReporteCuentasPorCobrar:
     """Clase para generar reportes de cuentas por cobrar"""
     
     @staticmethod
+    @lectura_reportes()
     def resumen_general():
         """
         Resumen general de todas las cuentas por cobrar
@@ -1654,6 +1657,7 @@ class ReporteCuentasPorCobrar:
         }
     
     @staticmethod
+    @lectura_reportes()
     def antiguedad_saldos():
         """
         Calcula la antigüedad de los saldos por cobrar
@@ -1744,6 +1748,7 @@ class ReporteCuentasPorPagar:
     """Clase para generar reportes de cuentas por pagar"""
     
     @staticmethod
+    @lectura_reportes()
     def resumen_general():
         """
         Resumen general de todas las cuentas por pagar
@@ -1800,6 +1805,7 @@ class ReporteCuentasPorPagar:
         }
     
     @staticmethod
+    @lectura_reportes()
     def antiguedad_saldos():
         """
         Calcula la antigüedad de los saldos por pagar
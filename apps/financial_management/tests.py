@@ -1,3 +1,49 @@
+from datetime import timedelta
+from decimal import Decimal
+
 from django.test import TestCase
+from django.utils import timezone
+
+from apps.inventory_management.tests import ConsultasChangelistMixin
+from apps.sales_management.models import Cliente, Venta
+
+from .models import Caja, CuentaPorCobrar, MovimientoCaja, PagoCuentaPorCobrar
+
+
+class ChangelistFinanzasTests(ConsultasChangelistMixin, TestCase):
+
+    changelists = [Caja, MovimientoCaja, CuentaPorCobrar, PagoCuentaPorCobrar]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.administrador = cls.crear_administrador()
+        cls.lote = 0
 
-# Create your tests here.
+    def crear_filas(self, n):
+        for _ in range(n):
+            ChangelistFinanzasTests.lote += 1
+            i = self.lote
+            caja = Caja.objects.create(
+                nombre=f'Caja {i}', codigo=f'CJ-{i}', usuario_apertura=self.administrador
+            )
+            MovimientoCaja.objects.create(
+                caja=caja, tipo_movimiento='INGRESO', monto=Decimal('10'),
+                saldo_anterior=Decimal('0'), saldo_nuevo=Decimal('10'), usuario=self.administrador
+            )
+            cliente = Cliente.objects.create(
+                tipo_documento='CEDULA', numero_documento=f'09{i:08d}',
+                nombres='Cliente', apellidos=str(i)
+            )
+            venta = Venta.objects.create(
+                numero_venta=f'VNT-F{i}', vendedor=self.administrador, cliente=cliente,
+                total=Decimal('50')
+            )
+            cuenta = CuentaPorCobrar.objects.create(
+                cliente=cliente, venta=venta, monto_total=Decimal('50'),
+                fecha_vencimiento=timezone.localdate() + timedelta(days=30),
+                usuario_registro=self.administrador
+            )
+            PagoCuentaPorCobrar.objects.create(
+                cuenta=cuenta, monto=Decimal('10'), metodo_pago='EFECTIVO',
+                usuario=self.administrador
+            )
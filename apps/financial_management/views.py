@@ -33,6 +33,7 @@ from .mixins import (
     SupervisorAccessMixin, CajaChicaAccessMixin, FormMessagesMixin, CreditoAccessMixin
 )
 from apps.inventory_management.models import Proveedor
+from apps.reports_analytics.utils import filtro_dia, filtro_rango
 
 # ============================================================================
 # DASHBOARD FINANCIERO
@@ -44,7 +45,7 @@ class FinancialDashboardView(FinancialAccessMixin, TemplateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        hoy = timezone.now().date()
+        hoy = timezone.localdate()
         hoy_inicio = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
         
         cajas_abiertas = Caja.objects.filter(estado='ABIERTA', activa=True).select_related('cajero_actual')
@@ -56,14 +57,14 @@ class FinancialDashboardView(FinancialAccessMixin, TemplateView):
         context['ventas_hoy'] = ventas_hoy['total'] or Decimal('0')
         context['cantidad_ventas_hoy'] = ventas_hoy['cantidad'] or 0
         
-        detalles_hoy = DetalleVenta.objects.filter(venta__fecha_venta__date=hoy, venta__estado='COMPLETADA').aggregate(ventas=Coalesce(Sum('total'), Decimal('0')), costos=Coalesce(Sum('costo_total'), Decimal('0')))
+        detalles_hoy = DetalleVenta.objects.filter(**filtro_dia('venta__fecha_venta', hoy), venta__estado='COMPLETADA').aggregate(ventas=Coalesce(Sum('total'), Decimal('0')), costos=Coalesce(Sum('costo_total'), Decimal('0')))
         utilidad_hoy = detalles_hoy['ventas'] - detalles_hoy['costos']
         margen_hoy = (utilidad_hoy / detalles_hoy['ventas'] * 100) if detalles_hoy['ventas'] > 0 else Decimal('0')
         context['utilidad_dia'] = utilidad_hoy.quantize(Decimal('0.01'))
         context['margen_dia'] = margen_hoy.quantize(Decimal('0.01'))
         
         inicio_semana = hoy - timedelta(days=hoy.weekday())
-        detalles_semana = DetalleVenta.objects.filter(venta__fecha_venta__date__gte=inicio_semana, venta__fecha_venta__date__lte=hoy, venta__estado='COMPLETADA').aggregate(ventas=Coalesce(Sum('total'), Decimal('0')), costos=Coalesce(Sum('costo_total'), Decimal('0')))
+        detalles_semana = DetalleVenta.objects.filter(**filtro_rango('venta__fecha_venta', inicio_semana, hoy), venta__estado='COMPLETADA').aggregate(ventas=Coalesce(Sum('total'), Decimal('0')), costos=Coalesce(Sum('costo_total'), Decimal('0')))
         utilidad_semana = detalles_semana['ventas'] - detalles_semana['costos']
         margen_semana = (utilidad_semana / detalles_semana['ventas'] * 100) if detalles_semana['ventas'] > 0 else Decimal('0')
         context['ventas_semana'] = detalles_semana['ventas'].quantize(Decimal('0.01'))
@@ -72,7 +73,7 @@ class FinancialDashboardView(FinancialAccessMixin, TemplateView):
         context['margen_semana'] = margen_semana.quantize(Decimal('0.01'))
         
         inicio_mes = hoy.replace(day=1)
-        detalles_mes = DetalleVenta.objects.filter(venta__fecha_venta__date__gte=inicio_mes, venta__fecha_venta__date__lte=hoy, venta__estado='COMPLETADA').aggregate(ventas=Coalesce(Sum('total'), Decimal('0')), costos=Coalesce(Sum('costo_total'), Decimal('0')))
+        detalles_mes = DetalleVenta.objects.filter(**filtro_rango('venta__fecha_venta', inicio_mes, hoy), venta__estado='COMPLETADA').aggregate(ventas=Coalesce(Sum('total'), Decimal('0')), costos=Coalesce(Sum('costo_total'), Decimal('0')))
         utilidad_mes = detalles_mes['ventas'] - detalles_mes['costos']
         margen_mes = (utilidad_mes / detalles_mes['ventas'] * 100) if detalles_mes['ventas'] > 0 else Decimal('0')
         context['ventas_mes'] = detalles_mes['ventas'].quantize(Decimal('0.01'))
@@ -81,7 +82,7 @@ class FinancialDashboardView(FinancialAccessMixin, TemplateView):
         context['margen_mes'] = margen_mes.quantize(Decimal('0.01'))
         
         hace_7_dias = hoy - timedelta(days=6)
-        ventas_diarias = DetalleVenta.objects.filter(venta__fecha_venta__date__gte=hace_7_dias, venta__fecha_venta__date__lte=hoy, venta__estado='COMPLETADA').annotate(dia=TruncDate('venta__fecha_venta')).values('dia').annotate(ventas=Coalesce(Sum('total'), Decimal('0')), costos=Coalesce(Sum('costo_total'), Decimal('0'))).order_by('dia')
+        ventas_diarias = DetalleVenta.objects.filter(**filtro_rango('venta__fecha_venta', hace_7_dias, hoy), venta__estado='COMPLETADA').annotate(dia=TruncDate('venta__fecha_venta')).values('dia').annotate(ventas=Coalesce(Sum('total'), Decimal('0')), costos=Coalesce(Sum('costo_total'), Decimal('0'))).order_by('dia')
         
         tendencia_labels = []
         tendencia_data = []
@@ -98,7 +99,7 @@ class FinancialDashboardView(FinancialAccessMixin, TemplateView):
         cajas_chicas = CajaChica.objects.filter(estado='ACTIVA').select_related('responsable')
         context['cajas_chicas'] = cajas_chicas
         context['cajas_chicas_criticas'] = cajas_chicas.filter(monto_actual__lte=F('umbral_reposicion')).count()
-        context['gastos_caja_chica_hoy'] = MovimientoCajaChica.objects.filter(tipo_movimiento='GASTO', fecha_movimiento__date=hoy).aggregate(total=Sum('monto'))['total'] or Decimal('0')
+        context['gastos_caja_chica_hoy'] = MovimientoCajaChica.objects.filter(tipo_movimiento='GASTO', **filtro_dia('fecha_movimiento', hoy)).aggregate(total=Sum('monto'))['total'] or Decimal('0')
         
         context['ultimos_movimientos'] = MovimientoCaja.objects.filter(fecha_movimiento__gte=hoy_inicio).select_related('caja', 'usuario', 'venta').order_by('-fecha_movimiento')[:10]
         
@@ -737,7 +738,7 @@ class ReporteFinancieroView(SupervisorAccessMixin, TemplateView):
             fecha_desde = datetime.strptime(fecha_desde, '%Y-%m-%d').date()
         
         if not fecha_hasta:
-            fecha_hasta = timezone.now().date()
+            fecha_hasta = timezone.localdate()
         else:
             fecha_hasta = datetime.strptime(fecha_hasta, '%Y-%m-%d').date()
         
@@ -746,8 +747,7 @@ class ReporteFinancieroView(SupervisorAccessMixin, TemplateView):
         
         # Movimientos de caja en el período
         movimientos = MovimientoCaja.objects.filter(
-            fecha_movimiento__date__gte=fecha_desde,
-            fecha_movimiento__date__lte=fecha_hasta
+            **filtro_rango('fecha_movimiento', fecha_desde, fecha_hasta)
         )
         
         # Ventas del período
@@ -770,8 +770,7 @@ class ReporteFinancieroView(SupervisorAccessMixin, TemplateView):
         # Gastos de caja chica del período
         gastos_caja_chica = MovimientoCajaChica.objects.filter(
             tipo_movimiento='GASTO',
-            fecha_movimiento__date__gte=fecha_desde,
-            fecha_movimiento__date__lte=fecha_hasta
+            **filtro_rango('fecha_movimiento', fecha_desde, fecha_hasta)
         )
         
         context['gastos_caja_chica'] = gastos_caja_chica.aggregate(
@@ -787,8 +786,7 @@ class ReporteFinancieroView(SupervisorAccessMixin, TemplateView):
         
         # Arqueos del período
         context['arqueos'] = ArqueoCaja.objects.filter(
-            fecha_cierre__date__gte=fecha_desde,
-            fecha_cierre__date__lte=fecha_hasta
+            **filtro_rango('fecha_cierre', fecha_desde, fecha_hasta)
         ).select_related('caja', 'usuario_cierre')
         
         # Resumen de arqueos
@@ -1146,26 +1144,10 @@ class ReporteAntiguedadSaldosCobrarView(CreditoAccessMixin, TemplateView):
         resumen = ReporteCuentasPorCobrar.resumen_general()
         context['resumen'] = resumen
         
-        # ✅ DEBUG: Imprimir para verificar
-        print("=" * 50)
-        print("RESUMEN GENERAL CUENTAS POR COBRAR:")
-        print(f"Total por cobrar: {resumen.get('total_por_cobrar', 0)}")
-        print(f"Total vencido: {resumen.get('total_vencido', 0)}")
-        print(f"Total por vencer: {resumen.get('total_por_vencer', 0)}")
-        print(f"Cuentas pendientes: {resumen.get('cuentas_pendientes', 0)}")
-        print(f"Cuentas cobradas: {resumen.get('cuentas_cobradas', 0)}")
-        print("=" * 50)
-        
         # ✅ Antigüedad de saldos
         antiguedad = ReporteCuentasPorCobrar.antiguedad_saldos()
         context['antiguedad'] = antiguedad
         
-        # ✅ DEBUG: Imprimir antigüedad
-        print("ANTIGÜEDAD DE SALDOS:")
-        for rango in antiguedad:
-            print(f"  {rango}")
-        print("=" * 50)
-        
         # ✅ Clientes con cuentas vencidas
         clientes_vencidos = CuentaPorCobrar.objects.filter(
             estado='VENCIDA'
@@ -1181,12 +1163,6 @@ class ReporteAntiguedadSaldosCobrarView(CreditoAccessMixin, TemplateView):
         
         context['clientes_vencidos'] = clientes_vencidos
         
-        # ✅ DEBUG: Imprimir clientes vencidos
-        print("CLIENTES VENCIDOS:")
-        for cliente in clientes_vencidos:
-            print(f"  {cliente}")
-        print("=" * 50)
-        
         # ✅ Top 10 cuentas vencidas
         top_vencidas = CuentaPorCobrar.objects.filter(
             estado='VENCIDA'
@@ -1194,12 +1170,6 @@ class ReporteAntiguedadSaldosCobrarView(CreditoAccessMixin, TemplateView):
         
         context['top_vencidas'] = top_vencidas
         
-        # ✅ DEBUG: Imprimir top vencidas
-        print("TOP CUENTAS VENCIDAS:")
-        for cuenta in top_vencidas:
-            print(f"  {cuenta.numero_cuenta}: ${cuenta.saldo_pendiente}")
-        print("=" * 50)
-        
         return context
 
 
@@ -1457,26 +1427,10 @@ class ReporteAntiguedadSaldosPagarView(CreditoAccessMixin, TemplateView):
         resumen = ReporteCuentasPorPagar.resumen_general()
         context['resumen'] = resumen
         
-        # ✅ DEBUG: Imprimir para verificar
-        print("=" * 50)
-        print("RESUMEN GENERAL:")
-        print(f"Total por pagar: {resumen.get('total_por_pagar', 0)}")
-        print(f"Total vencido: {resumen.get('total_vencido', 0)}")
-        print(f"Total por vencer: {resumen.get('total_por_vencer', 0)}")
-        print(f"Cuentas pendientes: {resumen.get('cuentas_pendientes', 0)}")
-        print(f"Cuentas pagadas: {resumen.get('cuentas_pagadas', 0)}")
-        print("=" * 50)
-        
         # ✅ Antigüedad de saldos
         antiguedad = ReporteCuentasPorPagar.antiguedad_saldos()
         context['antiguedad'] = antiguedad
         
-        # ✅ DEBUG: Imprimir antigüedad
-        print("ANTIGÜEDAD DE SALDOS:")
-        for rango in antiguedad:
-            print(f"  {rango}")
-        print("=" * 50)
-        
         # ✅ Proveedores con deudas vencidas
         proveedores_vencidos = CuentaPorPagar.objects.filter(
             estado='VENCIDA'
@@ -1491,12 +1445,6 @@ class ReporteAntiguedadSaldosPagarView(CreditoAccessMixin, TemplateView):
         
         context['proveedores_vencidos'] = proveedores_vencidos
         
-        # ✅ DEBUG: Imprimir proveedores vencidos
-        print("PROVEEDORES VENCIDOS:")
-        for prov in proveedores_vencidos:
-            print(f"  {prov}")
-        print("=" * 50)
-        
         # ✅ Top 10 cuentas vencidas
         top_vencidas = CuentaPorPagar.objects.filter(
             estado='VENCIDA'
@@ -1504,12 +1452,6 @@ class ReporteAntiguedadSaldosPagarView(CreditoAccessMixin, TemplateView):
         
         context['top_vencidas'] = top_vencidas
         
-        # ✅ DEBUG: Imprimir top vencidas
-        print("TOP CUENTAS VENCIDAS:")
-        for cuenta in top_vencidas:
-            print(f"  {cuenta.numero_cuenta}: ${cuenta.saldo_pendiente}")
-        print("=" * 50)
-        
         return context
 
 
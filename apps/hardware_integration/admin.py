@@ -604,6 +604,7 @@ class GavetaDineroAdmin(admin.ModelAdmin):
         'nombre', 'ubicacion', 'tipo_conexion', 'impresora', 'estado', 'activa'
     ]
     list_filter = ['tipo_conexion', 'estado', 'activa', 'requiere_autorizacion']
+    list_select_related = ['impresora']
     search_fields = ['nombre', 'codigo', 'ubicacion']
     readonly_fields = [
         'id', 'codigo', 'contador_aperturas', 'fecha_ultima_apertura',
@@ -669,6 +670,7 @@ class GavetaDineroAdmin(admin.ModelAdmin):
 @admin.register(PlantillaImpresion)
 class PlantillaImpresionAdmin(admin.ModelAdmin):
     list_display = ['nombre', 'tipo_documento', 'formato', 'activa', 'es_predeterminada', 'impresora']
+    list_select_related = ['impresora']
     list_filter = ['tipo_documento', 'formato', 'activa', 'es_predeterminada']
     search_fields = ['nombre', 'codigo']
     readonly_fields = ['id', 'fecha_creacion', 'fecha_actualizacion']
@@ -739,6 +741,7 @@ class ConfiguracionCodigoBarrasAdmin(admin.ModelAdmin):
 @admin.register(RegistroImpresion)
 class RegistroImpresionAdmin(admin.ModelAdmin):
     list_display = ['tipo_documento', 'estado_badge', 'impresora', 'venta', 'usuario', 'fecha_impresion_short']
+    list_select_related = ['impresora', 'venta', 'usuario']
     list_filter = ['tipo_documento', 'estado', 'impresora', 'fecha_impresion']
     search_fields = ['numero_documento', 'contenido_resumen']
     readonly_fields = [f.name for f in RegistroImpresion._meta.fields]
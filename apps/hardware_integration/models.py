@@ -324,9 +324,9 @@ class Impresora(models.Model):
         return self.tipo_conexion
     
     def incrementar_contador(self):
-        """Incrementa el contador de impresiones"""
-        self.contador_impresiones += 1
-        self.save(update_fields=['contador_impresiones'])
+        """Incrementa el contador de impresiones (se escribe en bloque)"""
+        from .planificador import PlanificadorDispositivos
+        PlanificadorDispositivos.incrementar(self, 'contador_impresiones')
 
 
 # ============================================================================
@@ -1059,6 +1059,12 @@ class TrabajoImpresion(models.Model):
             self.tiempo_procesamiento = tiempo_ms
         self.save(update_fields=['estado', 'fecha_completado', 'tiempo_procesamiento'])
         
+        # Contador de la impresora y, si estaba con error, volver a ACTIVA
+        if self.impresora_id:
+            from .planificador import PlanificadorDispositivos
+            self.impresora.incrementar_contador()
+            PlanificadorDispositivos.programar_estado(self.impresora, 'ACTIVA', si_estado='ERROR')
+        
         # Crear registro en el log
         RegistroImpresion.objects.create(
             impresora=self.impresora,
@@ -1094,6 +1100,10 @@ class TrabajoImpresion(models.Model):
         
         # Si ya no se reintentará, crear registro de error
         if self.estado == 'ERROR':
+            if self.impresora_id:
+                from .planificador import PlanificadorDispositivos
+                PlanificadorDispositivos.programar_estado(self.impresora, 'ERROR', si_estado='ACTIVA')
+            
             RegistroImpresion.objects.create(
                 impresora=self.impresora,
                 tipo_documento=self.tipo,
@@ -0,0 +1,233 @@
+# apps/hardware_integration/planificador.py
+
+"""
+Planificador de estados de dispositivos (gavetas, impresoras, escáneres).
+
+Antes cada apertura de gaveta lanzaba un hilo que dormía 5 segundos y
+guardaba `CERRADA`: un hilo y una conexión a la base de datos fuera del
+control de Django por petición. Ahora la petición solo anota la transición
+en caché y programa (deduplicada) la tarea `aplicar_estados_dispositivos`
+con countdown; la tarea aplica en bloque todas las transiciones vencidas
+y los contadores acumulados:
+
+    PlanificadorDispositivos.programar_estado(gaveta, 'CERRADA', en_segundos=5, si_estado='ABIERTA')
+    PlanificadorDispositivos.incrementar(impresora, 'contador_impresiones')
+
+Por dispositivo se guarda una sola transición pendiente (la última gana).
+Beat ejecuta la tarea cada minuto por si un countdown se perdió. Si la
+caché no responde, la petición escribe el cambio directamente en la base
+de datos (la transición sin esperar, el contador con un UPDATE F()).
+"""
+
+import logging
+import time
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from .models import EscanerCodigoBarras, GavetaDinero, Impresora
+
+logger = logging.getLogger('commercebox')
+
+
+# Modelos que maneja el planificador y los contadores que acumula
+DISPOSITIVOS = {
+    'gaveta': (GavetaDinero, ('contador_aperturas',)),
+    'impresora': (Impresora, ('contador_impresiones',)),
+    'escaner': (EscanerCodigoBarras, ('contador_lecturas',)),  # sin estado, solo contador
+}
+
+CACHE_BLOQUEO = 'hw:planificador:bloqueo'
+# Las claves viven más que cualquier transición razonable; se borran al aplicarse
+CACHE_TTL = 24 * 60 * 60
+
+
+def _tipo(dispositivo):
+    for tipo, (modelo, _) in DISPOSITIVOS.items():
+        if isinstance(dispositivo, modelo):
+            return tipo
+    raise ValueError(f'Dispositivo no soportado: {type(dispositivo).__name__}')
+
+
+def _clave_estado(tipo, pk):
+    return f'hw:estado:{tipo}:{pk}'
+
+
+def _clave_contador(tipo, pk, campo):
+    return f'hw:contador:{tipo}:{pk}:{campo}'
+
+
+class PlanificadorDispositivos:
+    """
+    Transiciones de estado diferidas y contadores de uso en bloque
+    """
+
+    # ------------------------------------------------------------------
+    # Camino de la petición (sin hilos ni esperas)
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def programar_estado(cls, dispositivo, estado, en_segundos=0, si_estado=None):
+        """
+        Anota que `dispositivo` debe pasar a `estado` dentro de `en_segundos`
+
+        Args:
+            si_estado: Solo aplicar si el estado en BD sigue siendo este
+                (p. ej. no cerrar una gaveta marcada DESCONECTADA)
+        """
+        tipo = _tipo(dispositivo)
+        if not hasattr(dispositivo, 'estado'):
+            raise ValueError(f'{tipo} no tiene estado')
+        vence = time.time() + en_segundos
+        try:
+            cache.set(
+                _clave_estado(tipo, dispositivo.pk),
+                {'estado': estado, 'si_estado': si_estado, 'vence': vence},
+                timeout=CACHE_TTL
+            )
+        except Exception as e:
+            # Sin caché no hay transición diferida: se aplica ya
+            logger.warning(f"No se pudo programar el estado de {tipo} {dispositivo.pk}: {str(e)}")
+            filas = type(dispositivo).objects.filter(pk=dispositivo.pk)
+            if si_estado:
+                filas = filas.filter(estado=si_estado)
+            filas.update(estado=estado)
+            return
+        cls._programar_aplicacion(en_segundos)
+
+    @classmethod
+    def incrementar(cls, dispositivo, campo, cantidad=1):
+        """Suma `cantidad` al contador `campo`; se escribe en el próximo lote"""
+        tipo = _tipo(dispositivo)
+        if campo not in DISPOSITIVOS[tipo][1]:
+            raise ValueError(f'{campo} no es un contador de {tipo}')
+
+        clave = _clave_contador(tipo, dispositivo.pk, campo)
+        try:
+            cache.add(clave, 0, timeout=CACHE_TTL)
+            try:
+                cache.incr(clave, cantidad)
+            except ValueError:
+                # La clave caducó entre add e incr
+                cache.set(clave, cantidad, timeout=CACHE_TTL)
+        except Exception as e:
+            # Sin caché el contador se escribe en esta misma petición
+            logger.warning(f"No se pudo acumular {campo} de {tipo} {dispositivo.pk}: {str(e)}")
+            type(dispositivo).objects.filter(pk=dispositivo.pk).update(**{campo: F(campo) + cantidad})
+            return
+        cls._programar_aplicacion(0)
+
+    @staticmethod
+    def _programar_aplicacion(en_segundos):
+        """
+        Encola la tarea que aplica los cambios; las invocaciones idénticas
+        pendientes se colapsan en una (TareaDeduplicada)
+        """
+        from .tasks import aplicar_estados_dispositivos
+
+        try:
+            aplicar_estados_dispositivos.apply_async(countdown=max(0, int(en_segundos)) or None)
+        except Exception as e:
+            # El barrido periódico de beat aplicará el cambio
+            logger.warning(f"No se pudo programar la actualización de dispositivos: {str(e)}")
+
+    # ------------------------------------------------------------------
+    # Aplicación en bloque (worker)
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def aplicar(cls, ahora=None):
+        """
+        Aplica las transiciones vencidas y los contadores acumulados
+
+        Una lectura de ids por tipo de dispositivo (tablas pequeñas), un
+        get_many a la caché y un UPDATE por grupo (estado destino, estado
+        esperado) o por contador.
+
+        Returns:
+            dict: {'estados': n, 'contadores': n, 'proxima_en': segundos o None}
+        """
+        if not cache.add(CACHE_BLOQUEO, 1, timeout=60):
+            logger.debug("Planificador de dispositivos ocupado, se omite la pasada")
+            return {'estados': 0, 'contadores': 0, 'proxima_en': 1}
+
+        try:
+            return cls._aplicar(ahora if ahora is not None else time.time())
+        finally:
+            cache.delete(CACHE_BLOQUEO)
+
+    @classmethod
+    def _aplicar(cls, ahora):
+        estados_aplicados = contadores_aplicados = 0
+        proxima = None
+
+        for tipo, (modelo, contadores) in DISPOSITIVOS.items():
+            ids = list(modelo.objects.order_by().values_list('pk', flat=True))
+            if not ids:
+                continue
+
+            claves_estado = {_clave_estado(tipo, pk): pk for pk in ids}
+            claves_contador = {
+                _clave_contador(tipo, pk, campo): (pk, campo)
+                for pk in ids for campo in contadores
+            }
+            pendientes = cache.get_many(list(claves_estado) + list(claves_contador))
+            if not pendientes:
+                continue
+
+            # Transiciones vencidas agrupadas por (estado, estado esperado)
+            grupos = defaultdict(list)
+            aplicadas = []
+            for clave, pk in claves_estado.items():
+                transicion = pendientes.get(clave)
+                if not transicion:
+                    continue
+                if transicion['vence'] > ahora:
+                    espera = transicion['vence'] - ahora
+                    proxima = espera if proxima is None else min(proxima, espera)
+                    continue
+                grupos[(transicion['estado'], transicion['si_estado'])].append(pk)
+                aplicadas.append((clave, transicion))
+
+            # Contadores agrupados por (campo, incremento)
+            incrementos = defaultdict(list)
+            leidos = []
+            for clave, (pk, campo) in claves_contador.items():
+                valor = pendientes.get(clave)
+                if valor:
+                    incrementos[(campo, valor)].append(pk)
+                    leidos.append((clave, valor))
+
+            with transaction.atomic():
+                for (estado, si_estado), pks in grupos.items():
+                    filas = modelo.objects.filter(pk__in=pks)
+                    if si_estado:
+                        filas = filas.filter(estado=si_estado)
+                    estados_aplicados += filas.update(estado=estado)
+                for (campo, valor), pks in incrementos.items():
+                    modelo.objects.filter(pk__in=pks).update(**{campo: F(campo) + valor})
+                    contadores_aplicados += len(pks)
+
+            # Solo se borra la transición si no la reemplazó otra mientras tanto
+            for clave, transicion in aplicadas:
+                if cache.get(clave) == transicion:
+                    cache.delete(clave)
+            # Restar lo aplicado conserva los incrementos concurrentes
+            for clave, valor in leidos:
+                try:
+                    cache.decr(clave, valor)
+                except ValueError:
+                    pass
+
+        if estados_aplicados or contadores_aplicados:
+            logger.debug(
+                f"Dispositivos: {estados_aplicados} estados y "
+                f"{contadores_aplicados} contadores aplicados"
+            )
+        return {
+            'estados': estados_aplicados,
+            'contadores': contadores_aplicados,
+            'proxima_en': proxima,
+        }
@@ -1,13 +1,12 @@
 # apps/hardware_integration/printers/cash_drawer_service.py
 
 import logging
-import time
-import threading
 from typing import Optional
 from django.utils import timezone
 from django.conf import settings
 
 from ..models import GavetaDinero, RegistroImpresion
+from ..planificador import PlanificadorDispositivos
 from .printer_service import PrinterService
 
 logger = logging.getLogger(__name__)
@@ -30,6 +29,9 @@ class CashDrawerService:
         1: b'\x1B\x70\x01\x19\xFA',  # pin 5
     }
     
+    # Tiempo típico de apertura física antes de considerarla cerrada
+    SEGUNDOS_APERTURA = 5
+    
     @classmethod
     def abrir_gaveta(
         cls,
@@ -167,20 +169,9 @@ class CashDrawerService:
     @classmethod
     def _programar_cierre_gaveta(cls, gaveta: GavetaDinero):
         """
-        Programa la actualización del estado a 'CERRADA' después de unos segundos
-        Usa threading para no bloquear la respuesta HTTP
+        Programa el paso a 'CERRADA' tras SEGUNDOS_APERTURA
+        Lo aplica en bloque el planificador de dispositivos (sin hilos ni esperas)
         """
-        def actualizar_estado():
-            time.sleep(5)  # Esperar 5 segundos (tiempo típico de apertura física)
-            try:
-                gaveta.refresh_from_db()
-                if gaveta.estado == 'ABIERTA':
-                    gaveta.estado = 'CERRADA'
-                    gaveta.save(update_fields=['estado'])
-                    logger.debug(f"Estado de gaveta {gaveta.nombre} actualizado a CERRADA")
-            except Exception as e:
-                logger.exception(f"Error al actualizar estado de gaveta a CERRADA: {str(e)}")
-        
-        # Ejecutar en hilo separado
-        thread = threading.Thread(target=actualizar_estado, daemon=True)
-        thread.start()
\ No newline at end of file
+        PlanificadorDispositivos.programar_estado(
+            gaveta, 'CERRADA', en_segundos=cls.SEGUNDOS_APERTURA, si_estado='ABIERTA'
+        )
@@ -4,6 +4,7 @@ import logging
 from escpos import printer as escpos_printer
 from escpos.exceptions import Error as EscposError
 from ..models import RegistroImpresion
+from apps.inventory_management.utils.unit_registry import RegistroUnidades
 from django.conf import settings
 import io
 
@@ -76,7 +77,7 @@ class TicketPrinter:
                 
                 if detalle.producto.es_quintal():
                     cant = f"{detalle.peso_vendido:.2f}".rjust(4)
-                    uni = detalle.unidad_medida.abreviatura if detalle.unidad_medida else "kg"
+                    uni = RegistroUnidades.abreviatura(detalle.unidad_medida_id, "kg")
                     cant_str = f"{cant} {uni}"
                 else:
                     cant_str = f"{int(detalle.cantidad_unidades):>4} un"
@@ -0,0 +1,33 @@
+"""
+Tareas de Celery para Integración de Hardware
+apps/hardware_integration/tasks.py
+"""
+from celery import shared_task
+import logging
+
+from commercebox.celery import TareaDeduplicada
+
+logger = logging.getLogger('commercebox')
+
+
+@shared_task(
+    name='apps.hardware_integration.tasks.aplicar_estados_dispositivos',
+    base=TareaDeduplicada,
+    bind=True,
+    ignore_result=True
+)
+def aplicar_estados_dispositivos(self):
+    """
+    Aplica en bloque las transiciones de estado y contadores pendientes de
+    gavetas, impresoras y escáneres
+
+    La programan las peticiones con countdown y beat cada minuto. Si quedan
+    transiciones por vencer se vuelve a programar para la más próxima.
+    """
+    from .planificador import PlanificadorDispositivos
+
+    resultado = PlanificadorDispositivos.aplicar()
+    proxima = resultado['proxima_en']
+    if proxima is not None and not self.request.is_eager:
+        self.apply_async(countdown=max(1, int(proxima + 0.999)))
+    return resultado
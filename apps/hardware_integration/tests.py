@@ -1,3 +1,135 @@
-from django.test import TestCase
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from apps.inventory_management.tests import ConsultasChangelistMixin
+
+from .models import GavetaDinero, Impresora, RegistroImpresion, TrabajoImpresion
+from .planificador import PlanificadorDispositivos
+from .printers.cash_drawer_service import CashDrawerService
+
+
+class ChangelistHardwareTests(ConsultasChangelistMixin, TestCase):
+
+    changelists = [Impresora, GavetaDinero, RegistroImpresion]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.administrador = cls.crear_administrador()
+        cls.lote = 0
+
+    def crear_filas(self, n):
+        for _ in range(n):
+            ChangelistHardwareTests.lote += 1
+            i = self.lote
+            impresora = Impresora.objects.create(
+                codigo=f'IMP-{i}', nombre=f'Ticketera {i}', marca='Epson', modelo='TM-T20',
+                tipo_impresora='TERMICA_TICKET', tipo_conexion='USB'
+            )
+            GavetaDinero.objects.create(
+                codigo=f'GAV-{i}', nombre=f'Gaveta {i}', ubicacion='Caja', impresora=impresora
+            )
+            RegistroImpresion.objects.create(
+                tipo_documento='TICKET', estado='EXITOSO', impresora=impresora,
+                usuario=self.administrador
+            )
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class PlanificadorDispositivosTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.impresora = Impresora.objects.create(
+            codigo='IMP-P', nombre='Ticketera', marca='Epson', modelo='TM-T20',
+            tipo_impresora='TERMICA_TICKET', tipo_conexion='USB'
+        )
+        self.abierta = GavetaDinero.objects.create(
+            codigo='GAV-A', nombre='Caja 1', ubicacion='Caja', estado='ABIERTA'
+        )
+        self.desconectada = GavetaDinero.objects.create(
+            codigo='GAV-D', nombre='Caja 2', ubicacion='Caja', estado='DESCONECTADA'
+        )
+        publicar = mock.patch(
+            'apps.hardware_integration.tasks.aplicar_estados_dispositivos.apply_async'
+        )
+        self.publicar = publicar.start()
+        self.addCleanup(publicar.stop)
+
+    def test_cierre_de_gaveta_sin_hilos_y_en_bloque(self):
+        hilos = threading.active_count()
+        ahora = time.time()
+        CashDrawerService._programar_cierre_gaveta(self.abierta)
+        PlanificadorDispositivos.programar_estado(
+            self.desconectada, 'CERRADA', en_segundos=5, si_estado='ABIERTA'
+        )
+
+        self.assertEqual(threading.active_count(), hilos)
+        self.assertEqual(self.publicar.call_args.kwargs['countdown'], 5)
+
+        # Aún no vence: nada cambia y se informa la espera
+        resultado = PlanificadorDispositivos.aplicar(ahora=ahora + 1)
+        self.assertEqual(resultado['estados'], 0)
+        self.assertAlmostEqual(resultado['proxima_en'], 4, delta=1)
+        self.abierta.refresh_from_db()
+        self.assertEqual(self.abierta.estado, 'ABIERTA')
+
+        resultado = PlanificadorDispositivos.aplicar(ahora=ahora + 6)
+        self.assertEqual(resultado['estados'], 1)
+        self.assertIsNone(resultado['proxima_en'])
+        self.abierta.refresh_from_db()
+        self.desconectada.refresh_from_db()
+        self.assertEqual(self.abierta.estado, 'CERRADA')
+        self.assertEqual(self.desconectada.estado, 'DESCONECTADA')
+
+        # Aplicada una vez, no se repite
+        self.assertEqual(PlanificadorDispositivos.aplicar(ahora=ahora + 7)['estados'], 0)
+
+    def test_contadores_se_acumulan_y_escriben_en_un_update(self):
+        for _ in range(3):
+            self.impresora.incrementar_contador()
+        PlanificadorDispositivos.incrementar(self.abierta, 'contador_aperturas', 2)
+
+        with CaptureQueriesContext(connection) as consultas:
+            resultado = PlanificadorDispositivos.aplicar()
+
+        # Un UPDATE por tipo de dispositivo con pendientes
+        updates = [c['sql'] for c in consultas.captured_queries if c['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 2)
+
+        self.assertEqual(resultado['contadores'], 2)
+        self.impresora.refresh_from_db()
+        self.abierta.refresh_from_db()
+        self.assertEqual(self.impresora.contador_impresiones, 3)
+        self.assertEqual(self.abierta.contador_aperturas, 2)
+
+        self.impresora.incrementar_contador()
+        PlanificadorDispositivos.aplicar()
+        self.impresora.refresh_from_db()
+        self.assertEqual(self.impresora.contador_impresiones, 4)
+
+    def test_sin_cache_se_escribe_directo(self):
+        trabajo = TrabajoImpresion.objects.create(
+            tipo='TICKET', impresora=self.impresora, datos_impresion='Ticket'
+        )
+        Impresora.objects.filter(pk=self.impresora.pk).update(estado='ERROR')
+        caida = mock.patch(
+            'apps.hardware_integration.planificador.cache',
+            **{f'{metodo}.side_effect': ConnectionError('Redis caído') for metodo in ('set', 'add', 'incr')}
+        )
+
+        with caida:
+            trabajo.marcar_completado(tiempo_ms=120)
+            CashDrawerService._programar_cierre_gaveta(self.abierta)
+
+        self.assertTrue(RegistroImpresion.objects.filter(impresora=self.impresora).exists())
+        self.impresora.refresh_from_db()
+        self.abierta.refresh_from_db()
+        self.assertEqual((self.impresora.estado, self.impresora.contador_impresiones), ('ACTIVA', 1))
+        self.assertEqual(self.abierta.estado, 'CERRADA')
+        self.publicar.assert_not_called()
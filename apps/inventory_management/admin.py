@@ -3,16 +3,40 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
-from django.db.models import Sum, F, Q, Count
+from django.db.models import (
+    Sum, Q, Count, DecimalField, OuterRef, Subquery, Value
+)
+from django.db.models.functions import Coalesce
 from decimal import Decimal
 
 from .models import (
     Categoria, Proveedor, Marca, UnidadMedida, Producto,
     Quintal, MovimientoQuintal, ProductoNormal,
-    MovimientoInventario, Compra, DetalleCompra, ConversionUnidad
+    MovimientoInventario, Compra, DetalleCompra, ConversionUnidad, StockActual
 )
 
 
+# ============================================================================
+# UTILIDADES DE CHANGELIST
+# ============================================================================
+# Los valores calculados de las listas se anotan en get_queryset para que
+# cada página cueste un número fijo de consultas, sin importar cuántas filas
+# muestre
+
+def _agregado(queryset, campo, expresion):
+    """
+    Subconsulta correlacionada con un agregado agrupado por `campo`
+    (evita multiplicar filas al combinar varias relaciones inversas)
+    """
+    return Coalesce(
+        Subquery(
+            queryset.order_by().values(campo).annotate(valor=expresion).values('valor')[:1]
+        ),
+        Value(Decimal('0')),
+        output_field=DecimalField(max_digits=14, decimal_places=2)
+    )
+
+
 # ============================================================================
 # INLINES (Modelos relacionados)
 # ============================================================================
@@ -96,13 +120,18 @@ class CategoriaAdmin(admin.ModelAdmin):
     
     readonly_fields = ['fecha_creacion', 'fecha_actualizacion']
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            _cantidad_productos=Count('productos', filter=Q(productos__activo=True))
+        )
+    
     def cantidad_productos(self, obj):
-        count = obj.productos.filter(activo=True).count()
         return format_html(
             '<span style="font-weight: bold;">{} productos</span>',
-            count
+            obj._cantidad_productos
         )
     cantidad_productos.short_description = 'Productos'
+    cantidad_productos.admin_order_field = '_cantidad_productos'
     
     actions = ['activar_categorias', 'desactivar_categorias']
     
@@ -160,29 +189,46 @@ class MarcaAdmin(admin.ModelAdmin):
         )
     destacada_display.short_description = 'Destacada'
     
+    def get_queryset(self, request):
+        """
+        Mismos criterios que Marca.total_productos, productos_con_stock y
+        valor_inventario_marca, resueltos como subconsultas de la lista
+        """
+        con_stock = Producto.objects.filter(marca=OuterRef('pk'), activo=True).filter(
+            Q(existencias__peso_disponible__gt=0) |
+            Q(existencias__unidades_disponibles__gt=0)
+        )
+        stock_marca = StockActual.objects.filter(producto__marca=OuterRef('pk'))
+        
+        return super().get_queryset(request).annotate(
+            _cantidad_productos=Count('productos', filter=Q(productos__activo=True)),
+            _productos_stock=_agregado(con_stock, 'marca', Count('pk')),
+            _valor_inventario=_agregado(stock_marca, 'producto__marca', Sum('valor_costo')),
+        )
+    
     def cantidad_productos(self, obj):
-        count = obj.total_productos()
         return format_html(
             '<span style="font-weight: bold; color: #0066cc;">{}</span>',
-            count
+            obj._cantidad_productos
         )
     cantidad_productos.short_description = 'Total Productos'
+    cantidad_productos.admin_order_field = '_cantidad_productos'
     
     def productos_stock(self, obj):
-        con_stock = obj.productos_con_stock().count()
         return format_html(
             '<span style="color: green; font-weight: bold;">🟢 {}</span>',
-            con_stock
+            int(obj._productos_stock)
         )
     productos_stock.short_description = 'Con Stock'
+    productos_stock.admin_order_field = '_productos_stock'
     
     def valor_inventario(self, obj):
-        valor = obj.valor_inventario_marca()
         return format_html(
-            '<span style="font-weight: bold; color: #009900;">${:,.2f}</span>',
-            float(valor)
+            '<span style="font-weight: bold; color: #009900;">${}</span>',
+            f'{float(obj._valor_inventario):,.2f}'
         )
     valor_inventario.short_description = 'Valor Inventario'
+    valor_inventario.admin_order_field = '_valor_inventario'
     
     actions = ['marcar_destacada', 'desmarcar_destacada', 'activar_marcas', 'desactivar_marcas']
     
@@ -243,9 +289,15 @@ class ProveedorAdmin(admin.ModelAdmin):
     
     readonly_fields = ['fecha_registro', 'fecha_actualizacion']
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            _compras_recibidas=Count('compras', filter=Q(compras__estado='RECIBIDA')),
+            _compras_pendientes=Count('compras', filter=Q(compras__estado='PENDIENTE')),
+        )
+    
     def total_compras(self, obj):
-        total = obj.compras.filter(estado='RECIBIDA').count()
-        pendientes = obj.compras.filter(estado='PENDIENTE').count()
+        total = obj._compras_recibidas
+        pendientes = obj._compras_pendientes
         
         html = f'<span style="font-weight: bold; color: green;">{total} recibidas</span>'
         if pendientes > 0:
@@ -253,6 +305,7 @@ class ProveedorAdmin(admin.ModelAdmin):
         
         return format_html(html)
     total_compras.short_description = 'Compras'
+    total_compras.admin_order_field = '_compras_recibidas'
     
     actions = ['activar_proveedores', 'desactivar_proveedores']
     
@@ -358,6 +411,18 @@ class ProductoAdmin(admin.ModelAdmin):
     
     readonly_fields = ['fecha_creacion', 'fecha_actualizacion']
     
+    def get_queryset(self, request):
+        disponibles = Q(quintales__estado='DISPONIBLE', quintales__peso_actual__gt=0)
+        return super().get_queryset(request).select_related(
+            'marca', 'categoria', 'unidad_medida_base', 'inventario_normal'
+        ).annotate(
+            _quintales_disponibles=Count('quintales', filter=disponibles),
+            _peso_disponible=Coalesce(
+                Sum('quintales__peso_actual', filter=disponibles), Value(Decimal('0')),
+                output_field=DecimalField(max_digits=14, decimal_places=3)
+            ),
+        )
+    
     def nombre_display(self, obj):
         if obj.marca:
             return format_html(
@@ -371,8 +436,8 @@ class ProductoAdmin(admin.ModelAdmin):
     def stock_display(self, obj):
         if obj.es_quintal():
             # Para quintales
-            quintales = obj.quintales.disponibles().count()
-            peso_total = obj.quintales.peso_total_disponible(obj)
+            quintales = obj._quintales_disponibles
+            peso_total = obj._peso_disponible
             
             if quintales == 0:
                 return format_html(
@@ -460,6 +525,7 @@ class QuintalAdmin(admin.ModelAdmin):
     ordering = ['-fecha_ingreso']
     date_hierarchy = 'fecha_ingreso'
     autocomplete_fields = ['producto', 'proveedor', 'unidad_medida']
+    list_select_related = ['producto__marca', 'proveedor', 'unidad_medida']
     
     fieldsets = (
         ('Producto', {
@@ -612,6 +678,7 @@ class MovimientoQuintalAdmin(admin.ModelAdmin):
     ordering = ['-fecha_movimiento']
     date_hierarchy = 'fecha_movimiento'
     autocomplete_fields = ['quintal', 'unidad_medida']
+    list_select_related = ['quintal__producto', 'unidad_medida', 'usuario']
     
     readonly_fields = [
         'quintal', 'tipo_movimiento', 'peso_movimiento',
@@ -670,6 +737,7 @@ class ProductoNormalAdmin(admin.ModelAdmin):
     ]
     ordering = ['producto__nombre']
     autocomplete_fields = ['producto']
+    list_select_related = ['producto__marca']
     
     fieldsets = (
         ('Producto', {
@@ -818,6 +886,7 @@ class MovimientoInventarioAdmin(admin.ModelAdmin):
     ordering = ['-fecha_movimiento']
     date_hierarchy = 'fecha_movimiento'
     autocomplete_fields = ['producto_normal']
+    list_select_related = ['producto_normal__producto', 'usuario']
     
     readonly_fields = [
         'producto_normal', 'tipo_movimiento', 'cantidad',
@@ -861,6 +930,7 @@ class CompraAdmin(admin.ModelAdmin):
     ordering = ['-fecha_compra']
     date_hierarchy = 'fecha_compra'
     autocomplete_fields = ['proveedor']
+    list_select_related = ['proveedor', 'usuario_registro']
     
     fieldsets = (
         ('Información de Compra', {
@@ -927,6 +997,7 @@ class ConversionUnidadAdmin(admin.ModelAdmin):
     list_filter = ['unidad_origen', 'unidad_destino']
     search_fields = ['descripcion']
     autocomplete_fields = ['unidad_origen', 'unidad_destino']
+    list_select_related = ['unidad_origen', 'unidad_destino']
     
     fieldsets = (
         ('Unidades', {
@@ -967,6 +1038,7 @@ class DetalleCompraAdmin(admin.ModelAdmin):
     ]
     ordering = ['-compra__fecha_compra']
     autocomplete_fields = ['compra', 'producto', 'unidad_medida']
+    list_select_related = ['compra__proveedor', 'producto__marca', 'unidad_medida']
     
     readonly_fields = ['subtotal']
     
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from apps.inventory_management.models import StockActual
+
+
+CAMPOS = ('peso_disponible', 'peso_inicial', 'unidades_disponibles', 'lotes', 'valor_costo')
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye la proyección StockActual desde quintales e inventario normal'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=500,
+            help='Productos por upsert (por defecto 500)'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Reconstruyendo stock actual...')
+
+        with transaction.atomic():
+            antes = {
+                fila['producto_id']: fila
+                for fila in StockActual.objects.values('producto_id', *CAMPOS)
+            }
+            resultado = StockActual.objects.reconstruir(lote=options['lote'])
+            despues = StockActual.objects.values('producto_id', *CAMPOS)
+
+            desalineados = [
+                fila['producto_id'] for fila in despues
+                if antes.get(fila['producto_id']) != fila
+            ]
+
+        for producto_id in desalineados[:20]:
+            self.stdout.write(self.style.WARNING(f'  ⚠ Corregido: {producto_id}'))
+        if len(desalineados) > 20:
+            self.stdout.write(f'  ... y {len(desalineados) - 20} más')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ {resultado["productos"]} productos, {len(desalineados)} corregidos, '
+            f'{resultado["eliminadas"]} filas huérfanas eliminadas'
+        ))
@@ -0,0 +1,111 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:00
+
+from decimal import Decimal
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def poblar_stock_actual(apps, schema_editor):
+    """Calcula la proyección de los productos que ya existen"""
+    from django.db.models import Count, F, Sum
+
+    Producto = apps.get_model("inventory_management", "Producto")
+    Quintal = apps.get_model("inventory_management", "Quintal")
+    ProductoNormal = apps.get_model("inventory_management", "ProductoNormal")
+    StockActual = apps.get_model("inventory_management", "StockActual")
+
+    quintales = {
+        fila["producto_id"]: fila
+        for fila in Quintal.objects.filter(estado="DISPONIBLE", peso_actual__gt=0)
+        .values("producto_id")
+        .annotate(
+            peso=Sum("peso_actual"),
+            peso_inicial=Sum("peso_inicial"),
+            lotes=Count("id"),
+            valor=Sum(F("peso_actual") * F("costo_por_unidad")),
+        )
+        .order_by()
+    }
+    normales = {
+        fila["producto_id"]: fila
+        for fila in ProductoNormal.objects.values("producto_id", "stock_actual", "costo_unitario")
+    }
+
+    stocks = []
+    for producto_id in Producto.objects.values_list("id", flat=True).iterator():
+        q = quintales.get(producto_id, {})
+        n = normales.get(producto_id, {})
+        unidades = n.get("stock_actual") or 0
+        valor = Decimal(q.get("valor") or 0) + unidades * (n.get("costo_unitario") or Decimal("0"))
+        stocks.append(StockActual(
+            producto_id=producto_id,
+            peso_disponible=q.get("peso") or Decimal("0"),
+            peso_inicial=q.get("peso_inicial") or Decimal("0"),
+            lotes=q.get("lotes") or 0,
+            unidades_disponibles=unidades,
+            valor_costo=valor.quantize(Decimal("0.01")),
+        ))
+    StockActual.objects.bulk_create(stocks, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("inventory_management", "0006_alter_quintal_codigo_quintal"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StockActual",
+            fields=[
+                (
+                    "producto",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="existencias",
+                        serialize=False,
+                        to="inventory_management.producto",
+                    ),
+                ),
+                (
+                    "peso_disponible",
+                    models.DecimalField(
+                        decimal_places=3, default=Decimal("0.000"), max_digits=12
+                    ),
+                ),
+                (
+                    "peso_inicial",
+                    models.DecimalField(
+                        decimal_places=3,
+                        default=Decimal("0.000"),
+                        help_text="Peso inicial de los quintales disponibles",
+                        max_digits=12,
+                    ),
+                ),
+                (
+                    "lotes",
+                    models.IntegerField(
+                        default=0, help_text="Quintales disponibles con peso"
+                    ),
+                ),
+                ("unidades_disponibles", models.IntegerField(default=0)),
+                (
+                    "valor_costo",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=14
+                    ),
+                ),
+                (
+                    "fecha_actualizacion",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+            ],
+            options={
+                "verbose_name": "Stock Actual",
+                "verbose_name_plural": "Stock Actual",
+                "db_table": "inv_stock_actual",
+            },
+        ),
+        migrations.RunPython(poblar_stock_actual, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,148 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:04
+
+from decimal import Decimal
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+
+
+def abrir_libro(apps, schema_editor):
+    """Un asiento de apertura por producto con el stock y valor actuales"""
+    StockActual = apps.get_model("inventory_management", "StockActual")
+    AsientoCosto = apps.get_model("inventory_management", "AsientoCosto")
+
+    asientos = []
+    for stock in StockActual.objects.select_related("producto").iterator():
+        if stock.producto.tipo_inventario == "QUINTAL":
+            cantidad = stock.peso_disponible
+        else:
+            cantidad = Decimal(stock.unidades_disponibles)
+        if not cantidad and not stock.valor_costo:
+            continue
+        costo = (stock.valor_costo / cantidad).quantize(Decimal("0.0001")) if cantidad else Decimal("0")
+        asientos.append(AsientoCosto(
+            producto_id=stock.producto_id,
+            secuencia=1,
+            tipo="APERTURA",
+            cantidad=cantidad,
+            costo_unitario=costo,
+            valor=stock.valor_costo,
+            saldo_cantidad=cantidad,
+            saldo_valor=stock.valor_costo,
+            costo_ventas_acumulado=Decimal("0.00"),
+        ))
+    AsientoCosto.objects.bulk_create(asientos, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("sales_management", "0007_venta_sincronizada"),
+        ("inventory_management", "0007_stock_actual"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AsientoCosto",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "secuencia",
+                    models.PositiveIntegerField(
+                        help_text="Orden del asiento dentro del producto"
+                    ),
+                ),
+                ("fecha", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "tipo",
+                    models.CharField(
+                        choices=[
+                            ("APERTURA", "Saldo de apertura"),
+                            ("ENTRADA", "Entrada"),
+                            ("SALIDA", "Salida"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("cantidad", models.DecimalField(decimal_places=3, max_digits=12)),
+                (
+                    "costo_unitario",
+                    models.DecimalField(decimal_places=4, max_digits=12),
+                ),
+                ("valor", models.DecimalField(decimal_places=2, max_digits=14)),
+                (
+                    "costo_venta",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=Decimal("0.00"),
+                        help_text="Efecto en el costo de ventas (salida por venta +, reversión -)",
+                        max_digits=14,
+                    ),
+                ),
+                (
+                    "saldo_cantidad",
+                    models.DecimalField(decimal_places=3, max_digits=14),
+                ),
+                ("saldo_valor", models.DecimalField(decimal_places=2, max_digits=16)),
+                (
+                    "costo_ventas_acumulado",
+                    models.DecimalField(decimal_places=2, max_digits=16),
+                ),
+                (
+                    "producto",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="asientos_costo",
+                        to="inventory_management.producto",
+                    ),
+                ),
+                (
+                    "quintal",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="asientos_costo",
+                        to="inventory_management.quintal",
+                    ),
+                ),
+                (
+                    "venta",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="asientos_costo",
+                        to="sales_management.venta",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Asiento de Costo",
+                "verbose_name_plural": "Libro de Costos",
+                "db_table": "inv_asiento_costo",
+                "indexes": [
+                    models.Index(
+                        fields=["producto", "fecha", "secuencia"],
+                        name="inv_asiento_product_3c2267_idx",
+                    ),
+                    models.Index(fields=["fecha"], name="inv_asiento_fecha_735508_idx"),
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="asientocosto",
+            constraint=models.UniqueConstraint(
+                fields=("producto", "secuencia"), name="asiento_costo_secuencia_unica"
+            ),
+        ),
+        migrations.RunPython(abrir_libro, migrations.RunPython.noop),
+    ]
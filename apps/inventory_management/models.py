@@ -1,13 +1,18 @@
 # apps/inventory_management/models.py
 
-from django.db import models
+import logging
+from django.db import models, transaction
 from django.core.validators import MinValueValidator, RegexValidator
 from django.core.exceptions import ValidationError
 from django.utils import timezone
-from django.db.models import Manager, Sum, Q, F, Count
+from django.db.models import Manager, Sum, Q, F, Count, Value
 from decimal import Decimal
 import uuid
 
+from .utils.unit_registry import RegistroUnidades
+
+logger = logging.getLogger('commercebox')
+
 
 # ============================================================================
 # MODELOS BASE COMPARTIDOS (Para ambos tipos de inventario)
@@ -184,28 +189,18 @@ class Marca(models.Model):
         return self.productos.filter(
             activo=True
         ).filter(
-            Q(tipo_inventario='QUINTAL', quintales__estado='DISPONIBLE', quintales__peso_actual__gt=0) |
-            Q(tipo_inventario='NORMAL', inventario_normal__stock_actual__gt=0)
-        ).distinct()
+            Q(existencias__peso_disponible__gt=0) |
+            Q(existencias__unidades_disponibles__gt=0)
+        )
     
     def valor_inventario_marca(self):
         """Calcula el valor total del inventario de esta marca"""
-        # Valor de quintales de esta marca
-        valor_quintales = Quintal.objects.filter(
-            producto__marca=self,
-            estado='DISPONIBLE'
-        ).aggregate(
-            total=Sum(F('peso_actual') * F('costo_por_unidad'))
-        )['total'] or Decimal('0')
-        
-        # Valor de productos normales de esta marca
-        valor_normales = ProductoNormal.objects.filter(
+        # Quintales y productos normales, ya valorados en StockActual
+        return StockActual.objects.filter(
             producto__marca=self
         ).aggregate(
-            total=Sum(F('stock_actual') * F('costo_unitario'))
+            total=Sum('valor_costo')
         )['total'] or Decimal('0')
-        
-        return valor_quintales + valor_normales
 
 
 class UnidadMedida(models.Model):
@@ -248,9 +243,10 @@ class UnidadMedida(models.Model):
             libra = UnidadMedida.objects.get(abreviatura='lb')
             kg = UnidadMedida.objects.get(abreviatura='kg')
             libra.convertir_a(10, kg)  # Convierte 10 lb a kg
+        
+        El factor sale de la matriz de RegistroUnidades.
         """
-        cantidad_en_kg = cantidad * self.factor_conversion_kg
-        return cantidad_en_kg / unidad_destino.factor_conversion_kg
+        return RegistroUnidades.convertir(cantidad, self, unidad_destino)
 
 
 # ============================================================================
@@ -445,7 +441,7 @@ class Producto(models.Model):
             if config and config.iva_activo:
                 return config.porcentaje_iva
         except Exception as e:
-            print(f"⚠️ Error al obtener IVA desde configuración: {e}")
+            logger.error(f"⚠️ Error al obtener IVA desde configuración: {e}")
         
         return Decimal('0')
     
@@ -805,7 +801,15 @@ class Quintal(models.Model):
         ]
     
     def __str__(self):
-        return f"{self.codigo_quintal} - {self.producto.nombre} ({self.peso_actual}/{self.peso_inicial} {self.unidad_medida.abreviatura})"
+        return f"{self.codigo_quintal} - {self.producto.nombre} ({self.peso_actual}/{self.peso_inicial} {RegistroUnidades.abreviatura(self.unidad_medida_id)})"
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        # Fecha leída de la BD: el calendario de vencimientos solo se
+        # actualiza al guardar si cambió
+        instancia._fecha_vencimiento_cargada = instancia.__dict__.get('fecha_vencimiento')
+        return instancia
     
     def porcentaje_restante(self):
         """Calcula el porcentaje de peso restante"""
@@ -918,7 +922,7 @@ class MovimientoQuintal(models.Model):
     
     def __str__(self):
         signo = "+" if self.peso_movimiento >= 0 else ""
-        return f"{self.get_tipo_movimiento_display()} - {signo}{self.peso_movimiento} {self.unidad_medida.abreviatura}"
+        return f"{self.get_tipo_movimiento_display()} - {signo}{self.peso_movimiento} {RegistroUnidades.abreviatura(self.unidad_medida_id)}"
 
 
 # ============================================================================
@@ -1004,6 +1008,14 @@ class ProductoNormal(models.Model):
     def __str__(self):
         return f"{self.producto.nombre} - Stock: {self.stock_actual} unidades"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        # Fecha leída de la BD: el calendario de vencimientos solo se
+        # actualiza al guardar si cambió
+        instancia._fecha_vencimiento_cargada = instancia.__dict__.get('fecha_vencimiento')
+        return instancia
+    
     def valor_inventario(self):
         """Calcula el valor total del inventario (stock × costo)"""
         return self.stock_actual * self.costo_unitario
@@ -1371,11 +1383,287 @@ class ConversionUnidad(models.Model):
         return f"1 {self.unidad_origen.abreviatura} = {self.factor_conversion} {self.unidad_destino.abreviatura}"
 
 
+# ============================================================================
+# PROYECCIÓN DE STOCK POR PRODUCTO
+# ============================================================================
+
+class StockActualManager(Manager):
+    """Mantenimiento de la proyección StockActual"""
+    
+    def refrescar(self, productos):
+        """
+        Recalcula la fila de StockActual de cada producto desde sus
+        quintales y su inventario normal
+        
+        Tres consultas sea cual sea el número de productos: el bloqueo de
+        las filas de la proyección, una lectura agregada y un upsert. Se
+        llama dentro de la misma transacción que modificó el stock.
+        
+        El bloqueo (SELECT ... FOR UPDATE, en orden de clave primaria)
+        serializa a las transacciones que refrescan el mismo producto: el
+        asignador FIFO salta los quintales bloqueados, así que sin él dos
+        ventas concurrentes agregarían cada una sin ver la otra y la
+        última en escribir dejaría cifras viejas. Las filas que faltan se
+        crean antes para poder bloquearlas.
+        
+        Args:
+            productos: Iterable de Producto o ids de Producto
+        
+        Returns:
+            int: Filas actualizadas
+        """
+        producto_ids = {getattr(p, 'pk', p) for p in productos}
+        if not producto_ids:
+            return 0
+        
+        with transaction.atomic():
+            self._bloquear(producto_ids)
+            return self._recalcular(producto_ids)
+    
+    def _bloquear(self, producto_ids):
+        """Bloquea las filas de la proyección, creando las que falten"""
+        bloqueadas = set(
+            self.select_for_update().filter(producto_id__in=producto_ids)
+            .order_by('pk').values_list('pk', flat=True)
+        )
+        faltantes = producto_ids - bloqueadas
+        if not faltantes:
+            return
+        self.bulk_create(
+            [self.model(producto_id=pk) for pk in
+             Producto.objects.filter(pk__in=faltantes).values_list('pk', flat=True)],
+            ignore_conflicts=True
+        )
+        list(
+            self.select_for_update().filter(producto_id__in=faltantes)
+            .order_by('pk').values_list('pk', flat=True)
+        )
+    
+    def _recalcular(self, producto_ids):
+        """Agrega quintales e inventario normal y hace el upsert"""
+        from django.db.models import DecimalField, IntegerField, OuterRef, Subquery
+        from django.db.models.functions import Coalesce
+        
+        disponibles = Quintal.objects.disponibles().filter(
+            producto=OuterRef('pk')
+        ).order_by().values('producto')
+        
+        def agregado(expresion, output_field):
+            return Coalesce(
+                Subquery(disponibles.annotate(v=expresion).values('v'), output_field=output_field),
+                Value(0),
+                output_field=output_field
+            )
+        
+        peso = DecimalField(max_digits=12, decimal_places=3)
+        valor = DecimalField(max_digits=14, decimal_places=2)
+        filas = Producto.objects.filter(pk__in=producto_ids).annotate(
+            q_peso=agregado(Sum('peso_actual'), peso),
+            q_peso_inicial=agregado(Sum('peso_inicial'), peso),
+            q_lotes=agregado(Count('pk'), IntegerField()),
+            q_valor=agregado(Sum(F('peso_actual') * F('costo_por_unidad')), valor),
+        ).values(
+            'pk', 'q_peso', 'q_peso_inicial', 'q_lotes', 'q_valor',
+            'inventario_normal__stock_actual', 'inventario_normal__costo_unitario',
+        )
+        
+        ahora = timezone.now()
+        stocks = []
+        for fila in filas:
+            unidades = fila['inventario_normal__stock_actual'] or 0
+            costo_unitario = fila['inventario_normal__costo_unitario'] or Decimal('0')
+            stocks.append(self.model(
+                producto_id=fila['pk'],
+                peso_disponible=Decimal(fila['q_peso']),
+                peso_inicial=Decimal(fila['q_peso_inicial']),
+                unidades_disponibles=unidades,
+                lotes=fila['q_lotes'],
+                valor_costo=(
+                    Decimal(fila['q_valor']) + unidades * costo_unitario
+                ).quantize(Decimal('0.01')),
+                fecha_actualizacion=ahora,
+            ))
+        
+        self.bulk_create(
+            stocks,
+            update_conflicts=True,
+            unique_fields=['producto'],
+            update_fields=[
+                'peso_disponible', 'peso_inicial', 'unidades_disponibles',
+                'lotes', 'valor_costo', 'fecha_actualizacion',
+            ]
+        )
+        return len(stocks)
+    
+    def reconstruir(self, lote=500):
+        """
+        Reconstruye la proyección completa desde las filas de origen
+        
+        Args:
+            lote: Productos por upsert
+        
+        Returns:
+            dict: {'productos': int, 'eliminadas': int}
+        """
+        producto_ids = list(Producto.objects.order_by('pk').values_list('pk', flat=True))
+        total = 0
+        for i in range(0, len(producto_ids), lote):
+            total += self.refrescar(producto_ids[i:i + lote])
+        # Productos borrados ya arrastran su fila (CASCADE); por si acaso
+        eliminadas, _ = self.exclude(producto_id__in=producto_ids).delete()
+        return {'productos': total, 'eliminadas': eliminadas}
+
+
+class StockActual(models.Model):
+    """
+    Stock vigente de un producto, desnormalizado
+
+    Proyección de Quintal (DISPONIBLE con peso > 0) y ProductoNormal que se
+    actualiza en la misma transacción que los modifica: signals de abajo
+    para save()/delete() y llamadas explícitas a refrescar() en los
+    update() en bloque (FIFO, reversión de stock, POS). Las lecturas de
+    stock son una búsqueda por clave primaria.
+
+    Si se desalinea (SQL manual, restauración), reconstruir_stock_actual la
+    rehace desde las filas de origen.
+    """
+    
+    producto = models.OneToOneField(
+        'Producto',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='existencias'
+    )
+    
+    # QUINTAL: peso en la unidad base del producto
+    peso_disponible = models.DecimalField(max_digits=12, decimal_places=3, default=Decimal('0.000'))
+    peso_inicial = models.DecimalField(
+        max_digits=12,
+        decimal_places=3,
+        default=Decimal('0.000'),
+        help_text="Peso inicial de los quintales disponibles"
+    )
+    lotes = models.IntegerField(default=0, help_text="Quintales disponibles con peso")
+    
+    # NORMAL: unidades
+    unidades_disponibles = models.IntegerField(default=0)
+    
+    # Valoración al costo (peso × costo_por_unidad + unidades × costo_unitario)
+    valor_costo = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    
+    fecha_actualizacion = models.DateTimeField(default=timezone.now)
+    
+    objects = StockActualManager()
+    
+    class Meta:
+        verbose_name = 'Stock Actual'
+        verbose_name_plural = 'Stock Actual'
+        db_table = 'inv_stock_actual'
+    
+    def __str__(self):
+        return f"{self.producto_id} - {self.peso_disponible} / {self.unidades_disponibles}"
+    
+    @property
+    def tiene_stock(self):
+        return self.peso_disponible > 0 or self.unidades_disponibles > 0
+
+
+# ============================================================================
+# LIBRO DE COSTOS (Valoración incremental)
+# ============================================================================
+
+class AsientoCosto(models.Model):
+    """
+    Asiento del libro de costos de un producto
+
+    Cada MovimientoQuintal / MovimientoInventario deja un asiento con su capa
+    de costo y los saldos del producto después de aplicarlo:
+
+    - QUINTAL (FIFO): cada quintal es una capa; entra y sale a su
+      costo_por_unidad.
+    - NORMAL (promedio ponderado): las entradas usan el costo del
+      movimiento y las salidas el promedio vigente del libro.
+
+    Los asientos de una venta (salidas y sus reversiones) mueven también el
+    costo de ventas acumulado. El valor del inventario o el costo de ventas
+    a una fecha es la lectura del último asiento del producto hasta esa
+    fecha (índice producto, fecha, secuencia). ValoracionService registra
+    los asientos; nunca se modifican.
+    """
+    
+    TIPO_CHOICES = [
+        ('APERTURA', 'Saldo de apertura'),
+        ('ENTRADA', 'Entrada'),
+        ('SALIDA', 'Salida'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    
+    producto = models.ForeignKey(
+        'Producto',
+        on_delete=models.PROTECT,
+        related_name='asientos_costo'
+    )
+    secuencia = models.PositiveIntegerField(help_text="Orden del asiento dentro del producto")
+    fecha = models.DateTimeField(default=timezone.now)
+    tipo = models.CharField(max_length=10, choices=TIPO_CHOICES)
+    
+    # Capa de costo (solo quintales) y origen
+    quintal = models.ForeignKey(
+        'Quintal',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='asientos_costo'
+    )
+    venta = models.ForeignKey(
+        'sales_management.Venta',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='asientos_costo'
+    )
+    
+    # Asiento (+ entrada, - salida)
+    cantidad = models.DecimalField(max_digits=12, decimal_places=3)
+    costo_unitario = models.DecimalField(max_digits=12, decimal_places=4)
+    valor = models.DecimalField(max_digits=14, decimal_places=2)
+    costo_venta = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        help_text="Efecto en el costo de ventas (salida por venta +, reversión -)"
+    )
+    
+    # Saldos del producto después del asiento
+    saldo_cantidad = models.DecimalField(max_digits=14, decimal_places=3)
+    saldo_valor = models.DecimalField(max_digits=16, decimal_places=2)
+    costo_ventas_acumulado = models.DecimalField(max_digits=16, decimal_places=2)
+    
+    class Meta:
+        verbose_name = 'Asiento de Costo'
+        verbose_name_plural = 'Libro de Costos'
+        db_table = 'inv_asiento_costo'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['producto', 'secuencia'],
+                name='asiento_costo_secuencia_unica'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['producto', 'fecha', 'secuencia']),
+            models.Index(fields=['fecha']),
+        ]
+    
+    def __str__(self):
+        return f"{self.producto_id} #{self.secuencia} {self.tipo} {self.cantidad} → {self.saldo_valor}"
+
+
 # ============================================================================
 # SEÑALES (Signals) - Automatización de procesos
 # ============================================================================
 
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 
 @receiver(pre_save, sender=Quintal)
@@ -1439,10 +1727,68 @@ def producto_normal_post_save(sender, instance, created, **kwargs):
             )
 
 
+@receiver(post_save, sender=Quintal)
+@receiver(post_delete, sender=Quintal)
+@receiver(post_save, sender=ProductoNormal)
+@receiver(post_delete, sender=ProductoNormal)
+def stock_refrescar_proyeccion(sender, instance, **kwargs):
+    """
+    Al guardar o borrar un quintal o un inventario normal:
+    - Refrescar StockActual del producto en la misma transacción
+    """
+    StockActual.objects.refrescar([instance.producto_id])
+
+
+@receiver(post_save, sender=MovimientoQuintal)
+@receiver(post_save, sender=MovimientoInventario)
+def movimiento_registrar_costo(sender, instance, created, **kwargs):
+    """
+    Al crear un movimiento de inventario:
+    - Registrar su asiento en el libro de costos
+    
+    Los movimientos creados con bulk_create se registran explícitamente.
+    """
+    if not created:
+        return
+    from .services.valoracion_service import ValoracionService
+    if sender is MovimientoQuintal:
+        ValoracionService.registrar(movimientos_quintal=[instance])
+    else:
+        ValoracionService.registrar(movimientos_inventario=[instance])
+
+
+@receiver(post_save, sender=UnidadMedida)
+@receiver(post_delete, sender=UnidadMedida)
+@receiver(post_save, sender=ConversionUnidad)
+@receiver(post_delete, sender=ConversionUnidad)
+def unidades_invalidar_registro(sender, instance, **kwargs):
+    """
+    Al cambiar una unidad o una conversión:
+    - Descartar la matriz de RegistroUnidades
+    """
+    RegistroUnidades.invalidar()
+
+
 # ============================================================================
 # MÉTODOS DE CLASE ÚTILES
 # ============================================================================
 
+# Agregar método a Producto para leer su proyección de stock
+def obtener_existencias(self):
+    """
+    Fila de StockActual del producto (búsqueda por clave primaria)
+    
+    Un producto sin fila todavía no tiene stock: se devuelve una vacía sin
+    guardar.
+    """
+    try:
+        return self.existencias
+    except StockActual.DoesNotExist:
+        return StockActual(producto=self)
+
+Producto.obtener_existencias = obtener_existencias
+
+
 # Agregar método a Producto para obtener stock total
 def get_stock_total(self):
     """
@@ -1450,15 +1796,12 @@ def get_stock_total(self):
     - QUINTAL: Peso total disponible en todos los quintales
     - NORMAL: Stock actual en unidades
     """
+    existencias = self.obtener_existencias()
     if self.es_quintal():
-        peso_total = Quintal.objects.peso_total_disponible(self)
-        unidad = self.unidad_medida_base.abreviatura if self.unidad_medida_base else 'kg'
-        return f"{peso_total} {unidad}"
+        unidad = RegistroUnidades.abreviatura(self.unidad_medida_base_id, 'kg')
+        return f"{existencias.peso_disponible} {unidad}"
     else:
-        try:
-            return f"{self.inventario_normal.stock_actual} unidades"
-        except ProductoNormal.DoesNotExist:
-            return "0 unidades"
+        return f"{existencias.unidades_disponibles} unidades"
 
 Producto.get_stock_total = get_stock_total
 
@@ -1474,18 +1817,15 @@ def tiene_stock_disponible(self, cantidad_solicitada=None):
     Returns:
         bool: True si hay stock disponible
     """
+    existencias = self.obtener_existencias()
     if self.es_quintal():
         if cantidad_solicitada:
-            peso_disponible = Quintal.objects.peso_total_disponible(self)
-            return peso_disponible >= Decimal(str(cantidad_solicitada))
-        return Quintal.objects.disponibles().filter(producto=self).exists()
+            return existencias.peso_disponible >= Decimal(str(cantidad_solicitada))
+        return existencias.lotes > 0
     else:
-        try:
-            if cantidad_solicitada:
-                return self.inventario_normal.stock_actual >= cantidad_solicitada
-            return self.inventario_normal.stock_actual > 0
-        except ProductoNormal.DoesNotExist:
-            return False
+        if cantidad_solicitada:
+            return existencias.unidades_disponibles >= cantidad_solicitada
+        return existencias.unidades_disponibles > 0
 
 Producto.tiene_stock_disponible = tiene_stock_disponible
 
@@ -1501,14 +1841,18 @@ class EstadisticasInventario:
     def resumen_general():
         """Genera un resumen general del inventario"""
         total_productos = Producto.objects.filter(activo=True).count()
-        total_quintales = Quintal.objects.disponibles().count()
-        total_productos_normales = ProductoNormal.objects.con_stock().count()
-        
-        valor_quintales = Quintal.objects.disponibles().aggregate(
-            total=Sum(F('peso_actual') * F('costo_por_unidad'))
-        )['total'] or Decimal('0')
         
-        valor_normales = ProductoNormal.objects.valor_total_inventario()
+        # Una sola pasada sobre la proyección de stock
+        totales = StockActual.objects.aggregate(
+            quintales=Sum('lotes'),
+            normales_con_stock=Count('pk', filter=Q(unidades_disponibles__gt=0)),
+            valor_quintales=Sum('valor_costo', filter=Q(producto__tipo_inventario='QUINTAL')),
+            valor_normales=Sum('valor_costo', filter=Q(producto__tipo_inventario='NORMAL')),
+        )
+        total_quintales = totales['quintales'] or 0
+        total_productos_normales = totales['normales_con_stock']
+        valor_quintales = totales['valor_quintales'] or Decimal('0')
+        valor_normales = totales['valor_normales'] or Decimal('0')
         
         return {
             'total_productos': total_productos,
@@ -1543,13 +1887,9 @@ class EstadisticasInventario:
             productos_con_stock=Count(
                 'productos',
                 filter=Q(productos__activo=True) & (
-                    Q(productos__tipo_inventario='QUINTAL', 
-                      productos__quintales__estado='DISPONIBLE',
-                      productos__quintales__peso_actual__gt=0) |
-                    Q(productos__tipo_inventario='NORMAL',
-                      productos__inventario_normal__stock_actual__gt=0)
-                ),
-                distinct=True
+                    Q(productos__existencias__peso_disponible__gt=0) |
+                    Q(productos__existencias__unidades_disponibles__gt=0)
+                )
             )
         ).order_by('-total_productos')
     
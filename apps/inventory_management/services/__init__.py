@@ -2,6 +2,9 @@ from .inventory_service import InventoryService
 from .stock_service import StockService
 from .traceability_service import TraceabilityService
 from .barcode_service import BarcodeService
+from .stock_reversal_service import StockReversalService
+from .fifo_allocation_service import FIFOAllocationService
+from .valoracion_service import ValoracionService
 
 __all__ = [
     'InventoryService',
@@ -9,4 +12,7 @@ __all__ = [
     'TraceabilityService',
     'BarcodeService',
     'BarcodePDFService',
+    'StockReversalService',
+    'FIFOAllocationService',
+    'ValoracionService',
 ]
\ No newline at end of file
@@ -37,7 +37,7 @@ class BarcodeService:
         # 1. Buscar si es código de quintal individual (empieza con Q)
         if codigo.startswith('Q') and len(codigo) == 8:
             try:
-                quintal = Quintal.objects.get(codigo_unico=codigo)
+                quintal = Quintal.objects.select_related('producto').get(codigo_quintal=codigo)
                 return {
                     'encontrado': True,
                     'tipo': 'QUINTAL_INDIVIDUAL',
@@ -55,11 +55,7 @@ class BarcodeService:
             
             if producto.es_quintal():
                 # Es producto a granel, necesita peso
-                quintales_disponibles = Quintal.objects.filter(
-                    producto=producto,
-                    estado='DISPONIBLE',
-                    peso_actual__gt=0
-                ).order_by('fecha_recepcion')
+                quintales_disponibles = Quintal.objects.fifo(producto)
                 
                 return {
                     'encontrado': True,
@@ -0,0 +1,152 @@
+"""
+Asignación FIFO de peso entre quintales (ventas a granel)
+
+Una venta por peso o por monto de un producto QUINTAL no queda atada a un
+saco concreto: se reparte entre los sacos disponibles más antiguos.
+
+1. Bloquea los quintales DISPONIBLE del producto en orden FIFO
+   (fecha_ingreso, id) con SELECT ... FOR UPDATE SKIP LOCKED, en lotes de
+   FIFO_LOTE_QUINTALES. Un saco que otra caja tiene bloqueado se salta y
+   se toma el siguiente en lugar de esperar
+2. Solo si los sacos libres no alcanzan se espera por los bloqueados (en
+   orden de id), para no rechazar una venta que sí tiene stock
+3. Reparte el peso con FIFOCalculator.calcular_distribucion
+4. Descuenta todos los sacos tocados con un único UPDATE
+
+El número de consultas no depende de cuántos sacos cubran la venta.
+"""
+
+from decimal import ROUND_DOWN, Decimal
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Value, When
+from django.utils import timezone
+
+from ..models import Quintal, StockActual
+from ..utils.fifo_calculator import FIFOCalculator
+
+
+PRECISION_PESO = Decimal('0.001')
+
+
+class FIFOAllocationService:
+    """
+    Motor de asignación FIFO para ventas a granel
+    """
+
+    @staticmethod
+    def peso_por_monto(monto, precio_por_unidad):
+        """
+        Peso que corresponde a un monto de dinero
+
+        Se redondea hacia abajo al gramo (3 decimales): nunca se entrega más
+        peso del que se cobra.
+        """
+        precio_por_unidad = Decimal(str(precio_por_unidad or 0))
+        if precio_por_unidad <= 0:
+            raise ValidationError('El producto no tiene precio por unidad de peso')
+        return (Decimal(str(monto)) / precio_por_unidad).quantize(PRECISION_PESO, rounding=ROUND_DOWN)
+
+    @staticmethod
+    def quintales_disponibles(producto):
+        """Sacos del producto que pueden venderse, en orden FIFO"""
+        return Quintal.objects.filter(
+            producto=producto,
+            estado='DISPONIBLE',
+            peso_actual__gt=0
+        ).order_by('fecha_ingreso', 'id')
+
+    @classmethod
+    def bloquear_quintales(cls, producto, peso):
+        """
+        Bloquea sacos suficientes para cubrir `peso`
+
+        Debe llamarse dentro de una transacción.
+
+        Returns:
+            list[Quintal]: Sacos bloqueados en orden FIFO (puede no alcanzar)
+        """
+        lote = getattr(settings, 'FIFO_LOTE_QUINTALES', 10)
+        disponibles = cls.quintales_disponibles(producto).only(
+            'id', 'codigo_quintal', 'producto_id', 'peso_actual', 'unidad_medida_id',
+            'costo_por_unidad', 'fecha_ingreso'
+        )
+
+        bloqueados = []
+        cubierto = Decimal('0')
+        # Primero solo los sacos libres; después se espera por el resto
+        for saltar_bloqueados in (True, False):
+            while cubierto < peso:
+                consulta = disponibles.exclude(id__in=[q.id for q in bloqueados])
+                if saltar_bloqueados:
+                    consulta = consulta.select_for_update(skip_locked=True)
+                else:
+                    # Orden determinista entre cajas que esperan
+                    consulta = consulta.select_for_update().order_by('id')
+                nuevos = list(consulta[:lote])
+                if not nuevos:
+                    break
+                bloqueados.extend(nuevos)
+                cubierto += sum(q.peso_actual for q in nuevos)
+
+        bloqueados.sort(key=lambda q: (q.fecha_ingreso, q.id))
+        return bloqueados
+
+    @classmethod
+    @transaction.atomic
+    def asignar(cls, producto, peso):
+        """
+        Reserva `peso` del producto repartido en FIFO y descuenta los sacos
+
+        Args:
+            producto: Producto tipo QUINTAL
+            peso: Decimal - peso total a vender
+
+        Returns:
+            list[dict]: Distribución de FIFOCalculator.calcular_distribucion
+                ({'quintal', 'peso_tomar', 'peso_antes', 'peso_despues'})
+
+        Raises:
+            ValidationError: Si no hay peso suficiente
+        """
+        peso = Decimal(str(peso))
+        if peso <= 0:
+            raise ValidationError('El peso a vender debe ser mayor a cero')
+
+        quintales = cls.bloquear_quintales(producto, peso)
+        distribucion = FIFOCalculator.calcular_distribucion(quintales, peso)
+        if distribucion is None:
+            disponible = FIFOCalculator.verificar_disponibilidad_total(quintales)
+            raise ValidationError(
+                f'Peso insuficiente para {producto.nombre}. '
+                f'Disponible: {disponible}, Solicitado: {peso}'
+            )
+
+        agotados = [d['quintal'].id for d in distribucion if d['peso_despues'] <= 0]
+        cambios = {
+            'peso_actual': F('peso_actual') - Case(
+                *[When(id=d['quintal'].id, then=Value(d['peso_tomar'])) for d in distribucion],
+                output_field=DecimalField(max_digits=10, decimal_places=3)
+            ),
+            # update() no toca auto_now; el feed de sincronización lo usa
+            'fecha_actualizacion': timezone.now(),
+        }
+        if agotados:
+            cambios['estado'] = Case(
+                When(id__in=agotados, then=Value('AGOTADO')),
+                default=F('estado')
+            )
+        Quintal.objects.filter(id__in=[d['quintal'].id for d in distribucion]).update(**cambios)
+
+        for d in distribucion:
+            d['quintal'].peso_actual = d['peso_despues']
+            if d['quintal'].id in agotados:
+                d['quintal'].estado = 'AGOTADO'
+
+        StockActual.objects.refrescar([producto.id])
+        from apps.stock_alert_system.status_calculator import programar_recalculo
+        programar_recalculo({producto.id})
+
+        return distribucion
@@ -0,0 +1,226 @@
+"""
+Reversión de stock en bloque (anulaciones y devoluciones)
+
+En lugar de recorrer las líneas de una venta haciendo `+=` y `save()` por
+cada quintal / inventario (lo que dispara los receivers de alertas,
+notificaciones y reportes en cada guardado), la reversión:
+
+1. Carga las líneas con una sola consulta
+2. Bloquea las filas afectadas en orden determinista (quintales y luego
+   inventarios, ambos por id) para evitar deadlocks entre anulaciones
+   concurrentes
+3. Aplica un único UPDATE con incrementos F() agrupados por quintal /
+   producto
+4. Crea los movimientos compensatorios con bulk_create
+5. Programa un solo recálculo de estados de stock al confirmar la
+   transacción
+
+El número de consultas no depende de la cantidad de líneas.
+"""
+
+from collections import OrderedDict, namedtuple
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, IntegerField, Value, When
+from django.utils import timezone
+
+from ..models import MovimientoInventario, MovimientoQuintal, ProductoNormal, Quintal, StockActual
+from .valoracion_service import ValoracionService
+
+
+LineaReversion = namedtuple(
+    'LineaReversion',
+    ['producto_id', 'quintal_id', 'peso', 'unidades', 'costo_unitario']
+)
+
+
+class StockReversalService:
+    """
+    Motor de reversión de stock para anulaciones y devoluciones
+    """
+
+    @staticmethod
+    def lineas_de_venta(venta):
+        """
+        Líneas reversibles de una venta (una consulta)
+
+        Returns:
+            list[LineaReversion]
+        """
+        from apps.sales_management.models import DetalleVenta
+
+        detalles = DetalleVenta.objects.filter(venta=venta).values_list(
+            'producto_id', 'producto__tipo_inventario', 'quintal_id',
+            'peso_vendido', 'cantidad_unidades', 'costo_unitario'
+        ).order_by('id')
+
+        lineas = []
+        for producto_id, tipo, quintal_id, peso, unidades, costo in detalles:
+            if tipo == 'QUINTAL' and quintal_id and peso:
+                lineas.append(LineaReversion(producto_id, quintal_id, peso, 0, costo))
+            elif tipo == 'NORMAL' and unidades:
+                lineas.append(LineaReversion(producto_id, None, Decimal('0'), unidades, costo))
+        return lineas
+
+    @classmethod
+    @transaction.atomic
+    def revertir_venta(cls, venta, usuario, observaciones, registrar_movimientos=True):
+        """
+        Devuelve al inventario todo lo vendido en `venta`
+
+        Returns:
+            dict: Resumen de la reversión
+        """
+        return cls.revertir(
+            cls.lineas_de_venta(venta),
+            usuario=usuario,
+            observaciones=observaciones,
+            venta=venta,
+            registrar_movimientos=registrar_movimientos
+        )
+
+    @classmethod
+    @transaction.atomic
+    def revertir(cls, lineas, usuario, observaciones, venta=None,
+                 tipo_quintal='AJUSTE_ENTRADA', tipo_inventario='ENTRADA_AJUSTE',
+                 registrar_movimientos=True, marcar_entrada=False):
+        """
+        Reintegra peso / unidades de las líneas indicadas
+
+        Args:
+            lineas: Iterable de LineaReversion
+            usuario: Usuario responsable de los movimientos
+            observaciones: Texto de los movimientos compensatorios
+            venta: Venta asociada a los movimientos (opcional)
+            tipo_quintal: tipo_movimiento de MovimientoQuintal
+            tipo_inventario: tipo_movimiento de MovimientoInventario
+            registrar_movimientos: Crear movimientos compensatorios
+            marcar_entrada: Actualizar fecha_ultima_entrada del inventario
+
+        Returns:
+            dict: {'quintales': n, 'inventarios': n, 'movimientos': n}
+        """
+        lineas = list(lineas)
+
+        peso_por_quintal = OrderedDict()
+        unidades_por_producto = OrderedDict()
+        for linea in lineas:
+            if linea.quintal_id:
+                peso_por_quintal[linea.quintal_id] = (
+                    peso_por_quintal.get(linea.quintal_id, Decimal('0')) + linea.peso
+                )
+            elif linea.unidades:
+                unidades_por_producto[linea.producto_id] = (
+                    unidades_por_producto.get(linea.producto_id, 0) + linea.unidades
+                )
+
+        # Bloqueos en orden determinista: quintales y luego inventarios, por id
+        quintales = {
+            q.id: q for q in Quintal.objects.select_for_update().filter(
+                id__in=peso_por_quintal
+            ).only('id', 'peso_actual', 'unidad_medida_id', 'producto_id').order_by('id')
+        }
+        inventarios = {
+            inv.producto_id: inv for inv in ProductoNormal.objects.select_for_update().filter(
+                producto_id__in=unidades_por_producto
+            ).only('id', 'producto_id', 'stock_actual').order_by('id')
+        }
+
+        if quintales:
+            Quintal.objects.filter(id__in=quintales).update(
+                peso_actual=F('peso_actual') + Case(
+                    *[When(id=qid, then=Value(peso)) for qid, peso in peso_por_quintal.items()
+                      if qid in quintales],
+                    output_field=DecimalField(max_digits=10, decimal_places=3)
+                ),
+                estado=Case(
+                    When(estado='AGOTADO', then=Value('DISPONIBLE')),
+                    default=F('estado')
+                ),
+                fecha_actualizacion=timezone.now()
+            )
+
+        if inventarios:
+            cambios = {
+                'stock_actual': F('stock_actual') + Case(
+                    *[When(producto_id=pid, then=Value(unidades))
+                      for pid, unidades in unidades_por_producto.items() if pid in inventarios],
+                    output_field=IntegerField()
+                ),
+                'fecha_actualizacion': timezone.now(),
+            }
+            if marcar_entrada:
+                cambios['fecha_ultima_entrada'] = timezone.now()
+            ProductoNormal.objects.filter(
+                id__in=[inv.id for inv in inventarios.values()]
+            ).update(**cambios)
+
+        movimientos = 0
+        if registrar_movimientos:
+            movimientos = cls._crear_movimientos(
+                lineas, quintales, inventarios, usuario, observaciones, venta,
+                tipo_quintal, tipo_inventario
+            )
+
+        afectados = {q.producto_id for q in quintales.values()} | set(inventarios)
+        StockActual.objects.refrescar(afectados)
+        from apps.stock_alert_system.status_calculator import programar_recalculo
+        programar_recalculo(afectados)
+
+        return {
+            'quintales': len(quintales),
+            'inventarios': len(inventarios),
+            'movimientos': movimientos,
+        }
+
+    @staticmethod
+    def _crear_movimientos(lineas, quintales, inventarios, usuario, observaciones, venta,
+                           tipo_quintal, tipo_inventario):
+        """
+        Un movimiento por línea, con saldos antes/después encadenados a
+        partir de los valores bloqueados
+        """
+        saldo_quintal = {qid: q.peso_actual for qid, q in quintales.items()}
+        saldo_inventario = {pid: inv.stock_actual for pid, inv in inventarios.items()}
+
+        movs_quintal = []
+        movs_inventario = []
+        for linea in lineas:
+            if linea.quintal_id in quintales:
+                quintal = quintales[linea.quintal_id]
+                antes = saldo_quintal[quintal.id]
+                saldo_quintal[quintal.id] = antes + linea.peso
+                movs_quintal.append(MovimientoQuintal(
+                    quintal_id=quintal.id,
+                    tipo_movimiento=tipo_quintal,
+                    peso_movimiento=linea.peso,
+                    peso_antes=antes,
+                    peso_despues=saldo_quintal[quintal.id],
+                    unidad_medida_id=quintal.unidad_medida_id,
+                    venta=venta,
+                    usuario=usuario,
+                    observaciones=observaciones
+                ))
+            elif not linea.quintal_id and linea.producto_id in inventarios:
+                inventario = inventarios[linea.producto_id]
+                antes = saldo_inventario[linea.producto_id]
+                saldo_inventario[linea.producto_id] = antes + linea.unidades
+                movs_inventario.append(MovimientoInventario(
+                    producto_normal_id=inventario.id,
+                    tipo_movimiento=tipo_inventario,
+                    cantidad=linea.unidades,
+                    stock_antes=antes,
+                    stock_despues=saldo_inventario[linea.producto_id],
+                    costo_unitario=linea.costo_unitario,
+                    costo_total=linea.costo_unitario * linea.unidades,
+                    venta=venta,
+                    usuario=usuario,
+                    observaciones=observaciones
+                ))
+
+        MovimientoQuintal.objects.bulk_create(movs_quintal)
+        MovimientoInventario.objects.bulk_create(movs_inventario)
+        # bulk_create no dispara post_save: asientos del libro de costos
+        ValoracionService.registrar(movs_quintal, movs_inventario)
+        return len(movs_quintal) + len(movs_inventario)
@@ -2,7 +2,8 @@ from decimal import Decimal
 from django.db.models import Sum, F, Q
 from django.utils import timezone
 from datetime import timedelta
-from ..models import Quintal, ProductoNormal, Producto
+from ..models import Quintal, ProductoNormal, Producto, StockActual
+from .fifo_allocation_service import FIFOAllocationService
 
 
 class StockService:
@@ -29,24 +30,19 @@ class StockService:
     @staticmethod
     def _stock_quintal(producto):
         """Stock de producto tipo QUINTAL"""
-        quintales = Quintal.objects.filter(
-            producto=producto,
-            estado='DISPONIBLE',
-            peso_actual__gt=0
-        )
-        
-        peso_total = quintales.aggregate(total=Sum('peso_actual'))['total'] or Decimal('0')
+        existencias = producto.obtener_existencias()
+        peso_total = existencias.peso_disponible
         
-        # Quintales críticos (menos del 10%)
-        criticos = quintales.filter(
-            peso_actual__lte=F('peso_inicial') * 0.1
-        ).count()
+        # Quintales críticos (menos del 10%): dato por saco, fuera de la proyección
+        criticos = Quintal.objects.criticos(porcentaje=10).filter(
+            producto=producto
+        ).count() if existencias.lotes else 0
         
         return {
             'tipo': 'QUINTAL',
             'peso_total_disponible': peso_total,
             'unidad': producto.unidad_medida_base.abreviatura,
-            'quintales_disponibles': quintales.count(),
+            'quintales_disponibles': existencias.lotes,
             'quintales_criticos': criticos,
             'tiene_stock': peso_total > 0
         }
@@ -129,24 +125,34 @@ class StockService:
         ).select_related('producto', 'proveedor').order_by('fecha_vencimiento')
     
     @staticmethod
-    def calcular_valor_inventario():
+    def calcular_valor_inventario(corte=None):
         """
         Calcula el valor total del inventario
         
+        Args:
+            corte: datetime con zona horaria para valorar a una fecha pasada
+                (libro de costos); None = valor vigente
+        
         Returns:
             dict con valores desglosados
         """
-        # Valor quintales
-        valor_quintales = Quintal.objects.filter(
-            estado='DISPONIBLE'
-        ).aggregate(
-            total=Sum(F('peso_actual') * F('costo_por_unidad'))
-        )['total'] or Decimal('0')
-        
-        # Valor productos normales
-        valor_normales = ProductoNormal.objects.aggregate(
-            total=Sum(F('stock_actual') * F('costo_unitario'))
-        )['total'] or Decimal('0')
+        if corte is not None:
+            from .valoracion_service import ValoracionService
+            valor_quintales = ValoracionService.valor(corte, producto__tipo_inventario='QUINTAL')
+            valor_normales = ValoracionService.valor(corte, producto__tipo_inventario='NORMAL')
+            return {
+                'valor_quintales': valor_quintales,
+                'valor_productos_normales': valor_normales,
+                'valor_total': valor_quintales + valor_normales
+            }
+        
+        # Valores ya calculados en StockActual
+        totales = StockActual.objects.aggregate(
+            quintales=Sum('valor_costo', filter=Q(producto__tipo_inventario='QUINTAL')),
+            normales=Sum('valor_costo', filter=Q(producto__tipo_inventario='NORMAL')),
+        )
+        valor_quintales = totales['quintales'] or Decimal('0')
+        valor_normales = totales['normales'] or Decimal('0')
         
         return {
             'valor_quintales': valor_quintales,
@@ -163,14 +169,14 @@ class StockService:
             producto: Instancia de Producto
             peso_necesario: Decimal - peso total necesario
         
+        Solo consulta (sin bloqueos): para vender usar
+        FIFOAllocationService.asignar
+        
         Returns:
             list: Lista de tuplas (quintal, peso_a_tomar)
         """
-        quintales_disponibles = Quintal.objects.filter(
-            producto=producto,
-            estado='DISPONIBLE',
-            peso_actual__gt=0
-        ).order_by('fecha_recepcion')  # FIFO: Más antiguo primero
+        # FIFO: Más antiguo primero
+        quintales_disponibles = FIFOAllocationService.quintales_disponibles(producto)
         
         resultado = []
         peso_restante = peso_necesario
@@ -1,5 +1,9 @@
-from django.db.models import Q
-from ..models import Quintal, MovimientoQuintal, ProductoNormal, MovimientoInventario
+from decimal import Decimal
+
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Abs, Coalesce
+from ..models import Quintal, MovimientoQuintal, ProductoNormal, MovimientoInventario, Proveedor
+from ..utils.unit_registry import RegistroUnidades
 
 
 class TraceabilityService:
@@ -26,36 +30,40 @@ class TraceabilityService:
         
         # Ventas asociadas
         ventas = movimientos.filter(
-            tipo_movimiento='VENTA',
+            tipo_movimiento='SALIDA',
             venta__isnull=False
         ).select_related('venta', 'venta__cliente')
         
-        # Estadísticas
-        total_vendido = sum(
-            abs(m.peso_movimiento) for m in movimientos 
-            if m.tipo_movimiento == 'VENTA'
+        # Estadísticas (agregadas en la base de datos)
+        stats = movimientos.aggregate(
+            total_movimientos=Count('id'),
+            total_vendido=Coalesce(
+                Sum(Abs('peso_movimiento'), filter=Q(tipo_movimiento='SALIDA')),
+                Decimal('0')
+            ),
+            total_ventas=Count('id', filter=Q(tipo_movimiento='SALIDA', venta__isnull=False))
         )
+        compra = quintal.compra
         
         return {
             'quintal': quintal,
             'origen': {
                 'proveedor': quintal.proveedor.nombre_comercial,
-                'lote': quintal.lote_proveedor,
-                'factura': quintal.numero_factura_compra,
-                'fecha_recepcion': quintal.fecha_recepcion,
-                'origen_geografico': quintal.origen,
+                'compra': compra.numero_compra if compra else None,
+                'factura': compra.numero_factura if compra else None,
+                'fecha_ingreso': quintal.fecha_ingreso,
             },
             'estado_actual': {
                 'peso_inicial': quintal.peso_inicial,
                 'peso_actual': quintal.peso_actual,
-                'peso_vendido': total_vendido,
+                'peso_vendido': stats['total_vendido'],
                 'porcentaje_restante': quintal.porcentaje_restante(),
                 'estado': quintal.get_estado_display(),
             },
             'movimientos': list(movimientos),
-            'total_movimientos': movimientos.count(),
+            'total_movimientos': stats['total_movimientos'],
             'ventas': list(ventas),
-            'total_ventas': ventas.count(),
+            'total_ventas': stats['total_ventas'],
         }
     
     @staticmethod
@@ -79,23 +87,31 @@ class TraceabilityService:
         """Trazabilidad para producto tipo QUINTAL"""
         quintales = Quintal.objects.filter(
             producto=producto
-        ).select_related('proveedor').order_by('-fecha_recepcion')
+        ).select_related('proveedor').order_by('-fecha_ingreso')
         
         movimientos = MovimientoQuintal.objects.filter(
             quintal__producto=producto
         ).select_related('quintal', 'usuario').order_by('-fecha_movimiento')
         
+        conteo = quintales.aggregate(
+            total=Count('id'),
+            disponibles=Count('id', filter=Q(estado='DISPONIBLE')),
+            agotados=Count('id', filter=Q(estado='AGOTADO'))
+        )
+        
         return {
             'producto': producto,
             'tipo': 'QUINTAL',
             'quintales': {
-                'total': quintales.count(),
-                'disponibles': quintales.filter(estado='DISPONIBLE').count(),
-                'agotados': quintales.filter(estado='AGOTADO').count(),
+                'total': conteo['total'],
+                'disponibles': conteo['disponibles'],
+                'agotados': conteo['agotados'],
                 'listado': list(quintales[:20])
             },
             'movimientos_recientes': list(movimientos[:50]),
-            'proveedores': list(set(q.proveedor for q in quintales))
+            'proveedores': list(
+                Proveedor.objects.filter(quintales__producto=producto).distinct()
+            )
         }
     
     @staticmethod
@@ -109,8 +125,10 @@ class TraceabilityService:
             ).select_related('usuario', 'venta', 'compra').order_by('-fecha_movimiento')
             
             # Entradas y salidas
-            entradas = movimientos.filter(cantidad__gt=0)
-            salidas = movimientos.filter(cantidad__lt=0)
+            totales = movimientos.aggregate(
+                entradas=Coalesce(Sum('cantidad', filter=Q(cantidad__gt=0)), 0),
+                salidas=Coalesce(Sum('cantidad', filter=Q(cantidad__lt=0)), 0)
+            )
             
             return {
                 'producto': producto,
@@ -118,8 +136,8 @@ class TraceabilityService:
                 'inventario': inventario,
                 'movimientos_recientes': list(movimientos[:50]),
                 'estadisticas': {
-                    'total_entradas': sum(m.cantidad for m in entradas),
-                    'total_salidas': abs(sum(m.cantidad for m in salidas)),
+                    'total_entradas': totales['entradas'],
+                    'total_salidas': abs(totales['salidas']),
                     'stock_actual': inventario.stock_actual,
                     'valor_actual': inventario.valor_inventario(),
                 }
@@ -146,30 +164,32 @@ class TraceabilityService:
         
         detalles = DetalleVenta.objects.filter(
             venta=venta
-        ).select_related('producto')
+        ).select_related(
+            'producto', 'quintal__proveedor', 'quintal__compra'
+        )
         
         trazabilidad_items = []
         
         for detalle in detalles:
-            if detalle.es_quintal and detalle.quintal_origen:
+            if detalle.quintal_id:
                 # Trazabilidad de quintal
-                quintal = detalle.quintal_origen
+                quintal = detalle.quintal
                 trazabilidad_items.append({
                     'producto': detalle.producto.nombre,
                     'tipo': 'QUINTAL',
-                    'quintal_codigo': quintal.codigo_unico,
+                    'quintal_codigo': quintal.codigo_quintal,
                     'proveedor': quintal.proveedor.nombre_comercial,
-                    'lote': quintal.lote_proveedor,
-                    'fecha_recepcion': quintal.fecha_recepcion,
-                    'cantidad_vendida': detalle.cantidad,
-                    'unidad': detalle.unidad_venta.abreviatura if detalle.unidad_venta else ''
+                    'compra': quintal.compra.numero_compra if quintal.compra else None,
+                    'fecha_ingreso': quintal.fecha_ingreso,
+                    'cantidad_vendida': detalle.peso_vendido,
+                    'unidad': RegistroUnidades.abreviatura(detalle.unidad_medida_id, '')
                 })
             else:
                 # Trazabilidad de producto normal
                 trazabilidad_items.append({
                     'producto': detalle.producto.nombre,
                     'tipo': 'NORMAL',
-                    'cantidad_vendida': detalle.cantidad,
+                    'cantidad_vendida': detalle.cantidad_unidades,
                 })
         
         return {
@@ -0,0 +1,284 @@
+"""
+Valoración incremental del inventario (libro de costos)
+
+Cada movimiento de inventario deja un AsientoCosto con su capa de costo y
+los saldos del producto después de aplicarlo (cantidad, valor y costo de
+ventas acumulado). Registrar un lote de movimientos cuesta un número fijo
+de consultas:
+
+1. Resuelve producto y capa de los movimientos (quintal → costo_por_unidad)
+2. Bloquea los productos afectados en orden de id y lee su último saldo
+3. Encadena los saldos en memoria y los inserta con bulk_create
+
+Con los saldos encadenados, el valor del inventario o el costo de ventas a
+cualquier fecha (cierre de mes) es una lectura del último asiento de cada
+producto antes del corte, sin recorrer quintales ni inventarios. Los
+cortes son datetimes con zona horaria y excluyentes, como el extremo `fin`
+de reports_analytics.utils.rango_fechas.
+"""
+
+from collections import defaultdict, namedtuple
+from decimal import Decimal
+
+from django.db.models import Exists, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from ..models import AsientoCosto, MovimientoQuintal, Producto, ProductoNormal, Quintal
+
+Saldo = namedtuple('Saldo', ['cantidad', 'valor', 'costo_ventas'])
+SALDO_CERO = Saldo(Decimal('0'), Decimal('0.00'), Decimal('0.00'))
+
+CENTAVOS = Decimal('0.01')
+PRECISION_COSTO = Decimal('0.0001')
+
+
+class ValoracionService:
+    """
+    Libro de costos: registro de asientos y consultas de valoración
+    """
+
+    # ========================================================================
+    # REGISTRO
+    # ========================================================================
+
+    @classmethod
+    def registrar(cls, movimientos_quintal=(), movimientos_inventario=()):
+        """
+        Registra los asientos de los movimientos, en el orden recibido
+
+        Los movimientos del lote sobre la misma capa, venta y sentido (ej.
+        varias líneas de una venta que salen del mismo saco) se acumulan en
+        un solo asiento. Debe llamarse dentro de la transacción que creó los
+        movimientos.
+
+        Args:
+            movimientos_quintal: Iterable de MovimientoQuintal guardados
+            movimientos_inventario: Iterable de MovimientoInventario guardados
+
+        Returns:
+            list[AsientoCosto]: Asientos creados
+        """
+        movimientos_quintal = list(movimientos_quintal)
+        movimientos_inventario = list(movimientos_inventario)
+        if not movimientos_quintal and not movimientos_inventario:
+            return []
+
+        # Producto y capa de costo de cada movimiento: (producto, quintal, costo o None)
+        capas = cls._capas_quintal(movimientos_quintal)
+        inventarios = dict(
+            ProductoNormal.objects.filter(
+                id__in={m.producto_normal_id for m in movimientos_inventario}
+            ).values_list('id', 'producto_id')
+        ) if movimientos_inventario else {}
+
+        # {(producto, quintal, costo, venta, entrada): cantidad}, en orden de llegada
+        lineas = {}
+
+        def acumular(producto_id, quintal_id, cantidad, costo, venta_id):
+            clave = (producto_id, quintal_id, costo, venta_id, cantidad >= 0)
+            lineas[clave] = lineas.get(clave, Decimal('0')) + cantidad
+
+        for m in movimientos_quintal:
+            producto_id, costo = capas[m.quintal_id]
+            acumular(producto_id, m.quintal_id, m.peso_movimiento, costo, m.venta_id)
+        for m in movimientos_inventario:
+            acumular(
+                inventarios[m.producto_normal_id], None, Decimal(m.cantidad),
+                None if m.cantidad < 0 else m.costo_unitario, m.venta_id
+            )
+
+        saldos = cls._bloquear_saldos({clave[0] for clave in lineas})
+
+        ahora = timezone.now()
+        asientos = []
+        for (producto_id, quintal_id, costo, venta_id, _), cantidad in lineas.items():
+            secuencia, saldo = saldos[producto_id]
+            if costo is None:
+                # Salida de inventario normal: promedio ponderado vigente
+                costo = (
+                    saldo.valor / saldo.cantidad if saldo.cantidad > 0 else Decimal('0')
+                ).quantize(PRECISION_COSTO)
+
+            if quintal_id is None and cantidad < 0 and saldo.cantidad + cantidad <= 0:
+                # Sale todo el saldo: se lleva también el redondeo acumulado
+                valor = -saldo.valor
+            else:
+                valor = (cantidad * costo).quantize(CENTAVOS)
+            costo_venta = -valor if venta_id else Decimal('0.00')
+
+            saldo = Saldo(
+                saldo.cantidad + cantidad,
+                saldo.valor + valor,
+                saldo.costo_ventas + costo_venta,
+            )
+            secuencia += 1
+            saldos[producto_id] = (secuencia, saldo)
+            asientos.append(AsientoCosto(
+                producto_id=producto_id,
+                secuencia=secuencia,
+                fecha=ahora,
+                tipo='ENTRADA' if cantidad >= 0 else 'SALIDA',
+                quintal_id=quintal_id,
+                venta_id=venta_id,
+                cantidad=cantidad,
+                costo_unitario=costo,
+                valor=valor,
+                costo_venta=costo_venta,
+                saldo_cantidad=saldo.cantidad,
+                saldo_valor=saldo.valor,
+                costo_ventas_acumulado=saldo.costo_ventas,
+            ))
+
+        return AsientoCosto.objects.bulk_create(asientos)
+
+    @staticmethod
+    def _capas_quintal(movimientos):
+        """{quintal_id: (producto_id, costo_por_unidad)}; sin consulta si el quintal ya está cargado"""
+        capas = {}
+        for m in movimientos:
+            if MovimientoQuintal.quintal.is_cached(m):
+                capas[m.quintal_id] = (m.quintal.producto_id, m.quintal.costo_por_unidad)
+        faltantes = {m.quintal_id for m in movimientos} - set(capas)
+        if faltantes:
+            capas.update(
+                (qid, (producto_id, costo))
+                for qid, producto_id, costo in Quintal.objects.filter(
+                    id__in=faltantes
+                ).values_list('id', 'producto_id', 'costo_por_unidad')
+            )
+        return capas
+
+    @staticmethod
+    def _bloquear_saldos(producto_ids):
+        """
+        Bloquea los productos en orden de id y devuelve
+        {producto_id: (última secuencia, Saldo)} en una consulta
+        """
+        ultimo = AsientoCosto.objects.filter(producto=OuterRef('pk')).order_by('-secuencia')
+
+        def campo(nombre):
+            return Subquery(ultimo.values(nombre)[:1])
+
+        filas = Producto.objects.select_for_update().filter(
+            pk__in=producto_ids
+        ).order_by('pk').annotate(
+            _secuencia=campo('secuencia'),
+            _cantidad=campo('saldo_cantidad'),
+            _valor=campo('saldo_valor'),
+            _costo_ventas=campo('costo_ventas_acumulado'),
+        ).values_list('pk', '_secuencia', '_cantidad', '_valor', '_costo_ventas')
+
+        saldos = {}
+        for pk, secuencia, cantidad, valor, costo_ventas in filas:
+            if secuencia is None:
+                saldos[pk] = (0, SALDO_CERO)
+            else:
+                saldos[pk] = (secuencia, Saldo(Decimal(cantidad), Decimal(valor), Decimal(costo_ventas)))
+        return saldos
+
+    # ========================================================================
+    # CONSULTAS
+    # ========================================================================
+
+    @staticmethod
+    def _ultimos(corte=None, productos=None):
+        """Último asiento de cada producto antes de `corte` (una búsqueda por índice y producto)"""
+        ultimo = AsientoCosto.objects.filter(producto=OuterRef('pk'))
+        if corte is not None:
+            ultimo = ultimo.filter(fecha__lt=corte)
+        ultimo = ultimo.order_by('-fecha', '-secuencia').values('pk')[:1]
+
+        productos_qs = Producto.objects.all()
+        if productos is not None:
+            productos_qs = productos_qs.filter(pk__in=productos)
+        return AsientoCosto.objects.filter(
+            pk__in=productos_qs.annotate(_ultimo=Subquery(ultimo)).values('_ultimo')
+        )
+
+    @staticmethod
+    def saldo_producto(producto, corte=None):
+        """
+        Saldo (cantidad, valor, costo de ventas acumulado) de un producto
+        antes de `corte`; por defecto el vigente
+        """
+        asientos = AsientoCosto.objects.filter(producto=producto)
+        if corte is not None:
+            asientos = asientos.filter(fecha__lt=corte)
+        fila = asientos.order_by('-fecha', '-secuencia').values_list(
+            'saldo_cantidad', 'saldo_valor', 'costo_ventas_acumulado'
+        ).first()
+        return Saldo(*fila) if fila else SALDO_CERO
+
+    @classmethod
+    def saldos(cls, corte=None, productos=None):
+        """
+        Saldos de todos los productos antes de `corte`, en una consulta
+
+        Args:
+            corte: datetime con zona horaria (ej. inicio_del_dia del día
+                siguiente al cierre de mes); None = vigente
+            productos: QuerySet o ids de Producto para acotar (opcional)
+
+        Returns:
+            dict: {producto_id: Saldo}
+        """
+        return {
+            pk: Saldo(cantidad, valor, costo_ventas)
+            for pk, cantidad, valor, costo_ventas in cls._ultimos(corte, productos).values_list(
+                'producto_id', 'saldo_cantidad', 'saldo_valor', 'costo_ventas_acumulado'
+            )
+        }
+
+    @classmethod
+    def valor(cls, corte=None, **filtros):
+        """
+        Valor total del inventario al costo antes de `corte`
+
+        Args:
+            corte: datetime con zona horaria; None = vigente
+            **filtros: Filtros sobre el asiento (ej. producto__tipo_inventario='QUINTAL')
+
+        Returns:
+            Decimal
+        """
+        return cls._ultimos(corte).filter(**filtros).aggregate(
+            total=Coalesce(Sum('saldo_valor'), Decimal('0'))
+        )['total']
+
+    @staticmethod
+    def costo_ventas_por(ventas, campo):
+        """
+        Costo real de las salidas de `ventas`, agrupado por `campo`
+
+        Las ventas anteriores al libro (sin asientos) usan el costo_total
+        guardado en sus detalles.
+
+        Args:
+            ventas: QuerySet de Venta
+            campo: Ruta desde el asiento / detalle (ej. 'producto__tipo_inventario')
+
+        Returns:
+            dict: {valor de campo: Decimal}
+        """
+        from apps.sales_management.models import DetalleVenta
+
+        costos = defaultdict(lambda: Decimal('0'))
+        for clave, total in AsientoCosto.objects.filter(
+            venta__in=ventas, tipo='SALIDA'
+        ).values_list(campo).annotate(total=Sum('costo_venta')).order_by():
+            costos[clave] += total
+
+        for clave, total in DetalleVenta.objects.filter(venta__in=ventas).filter(
+            ~Exists(AsientoCosto.objects.filter(venta=OuterRef('venta')))
+        ).values_list(campo).annotate(total=Sum('costo_total')).order_by():
+            costos[clave] += total or Decimal('0')
+        return dict(costos)
+
+    @classmethod
+    def costo_promedio(cls, producto, corte=None):
+        """Costo promedio ponderado del saldo de un producto (inventario NORMAL)"""
+        saldo = cls.saldo_producto(producto, corte)
+        if saldo.cantidad <= 0:
+            return Decimal('0.00')
+        return (saldo.valor / saldo.cantidad).quantize(PRECISION_COSTO)
@@ -1,14 +1,16 @@
 # apps/inventory_management/signals.py
 
+import logging
 from django.db.models.signals import post_save, pre_save, post_delete
 from django.dispatch import receiver
-from django.utils import timezone
 from decimal import Decimal
 from .models import (
     Quintal, MovimientoQuintal, ProductoNormal,
     MovimientoInventario, Producto, DetalleCompra
 )
 
+logger = logging.getLogger('commercebox')
+
 
 # ============================================================================
 # SEÑALES PARA QUINTALES
@@ -184,7 +186,7 @@ def verificar_alerta_quintal(sender, instance, created, **kwargs):
         if porcentaje <= 10 and porcentaje > 0:
             # Aquí se podría crear una notificación
             # Por ahora solo un log
-            print(f"⚠️ ALERTA: Quintal {quintal.codigo_unico} está en {porcentaje:.1f}% restante")
+            logger.warning(f"⚠️ ALERTA: Quintal {quintal.codigo_unico} está en {porcentaje:.1f}% restante")
 
 
 @receiver(post_save, sender=MovimientoInventario)
@@ -199,21 +201,4 @@ def verificar_alerta_stock_normal(sender, instance, created, **kwargs):
         
         # Si el stock está en nivel crítico
         if producto_normal.necesita_reorden():
-            print(f"⚠️ ALERTA: {producto_normal.producto.nombre} necesita reorden. Stock: {producto_normal.stock_actual}")
-
-
-# ============================================================================
-# SEÑAL PARA ACTUALIZAR FECHA DE VENCIMIENTO
-# ============================================================================
-
-@receiver(pre_save, sender=Quintal)
-def verificar_vencimiento_quintal(sender, instance, **kwargs):
-    """
-    Antes de guardar quintal:
-    - Verificar si está vencido y cambiar estado
-    """
-    if instance.fecha_vencimiento:
-        if instance.fecha_vencimiento < timezone.now().date():
-            if instance.estado != 'DAÑADO':
-                instance.estado = 'DAÑADO'
-                print(f"⚠️ Quintal {instance.codigo_unico} marcado como DAÑADO por vencimiento")
\ No newline at end of file
+            logger.warning(f"⚠️ ALERTA: {producto_normal.producto.nombre} necesita reorden. Stock: {producto_normal.stock_actual}")
@@ -1,3 +1,318 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
 
-# Create your tests here.
+from django.contrib import admin
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.authentication.models import Usuario
+
+from .models import (
+    AsientoCosto, Categoria, Compra, ConversionUnidad, DetalleCompra, Marca, MovimientoInventario,
+    MovimientoQuintal, Producto, ProductoNormal, Proveedor, Quintal, StockActual,
+    UnidadMedida
+)
+from .services import FIFOAllocationService, StockReversalService, ValoracionService
+from .services.stock_reversal_service import LineaReversion
+from .utils import RegistroUnidades, UnitConverter
+
+
+class ConsultasChangelistMixin:
+    """
+    Arnés para changelists del admin: la página debe costar las mismas
+    consultas con pocas filas que con muchas
+
+    Las clases que lo usan implementan `crear_filas(n)` y
+    `changelists` (modelos a recorrer).
+    """
+
+    changelists = []
+
+    @classmethod
+    def crear_administrador(cls):
+        return Usuario.objects.create_superuser(
+            username='admin', email='admin@example.com', password='admin',
+            codigo_empleado='ADM-1', nombres='Admin', apellidos='Sistema',
+            documento_identidad='1700000099'
+        )
+
+    def consultas_changelist(self, modelo):
+        """Consultas al renderizar la primera página del changelist de `modelo`"""
+        url = reverse(f'admin:{modelo._meta.app_label}_{modelo._meta.model_name}_changelist')
+        request = RequestFactory().get(url)
+        request.user = self.administrador
+
+        with CaptureQueriesContext(connection) as contexto:
+            response = admin.site._registry[modelo].changelist_view(request)
+            response.render()
+        self.assertEqual(response.status_code, 200, modelo.__name__)
+        return len(contexto)
+
+    def test_consultas_constantes_por_pagina(self):
+        self.crear_filas(2)
+        # Primera pasada: calienta cachés (permisos, content types)
+        for modelo in self.changelists:
+            self.consultas_changelist(modelo)
+        pocas = {modelo: self.consultas_changelist(modelo) for modelo in self.changelists}
+        self.crear_filas(10)
+        muchas = {modelo: self.consultas_changelist(modelo) for modelo in self.changelists}
+
+        for modelo in self.changelists:
+            with self.subTest(changelist=modelo.__name__):
+                self.assertEqual(pocas[modelo], muchas[modelo])
+
+
+class ChangelistInventarioTests(ConsultasChangelistMixin, TestCase):
+
+    changelists = [
+        Categoria, Marca, Proveedor, Producto, Quintal, MovimientoQuintal,
+        ProductoNormal, MovimientoInventario, Compra, DetalleCompra,
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.administrador = cls.crear_administrador()
+        cls.unidad = UnidadMedida.objects.create(
+            nombre='Libra', abreviatura='lb', factor_conversion_kg=Decimal('0.4536')
+        )
+        cls.lote = 0
+
+    def crear_filas(self, n):
+        for _ in range(n):
+            ChangelistInventarioTests.lote += 1
+            i = self.lote
+            categoria = Categoria.objects.create(nombre=f'Categoría {i}')
+            marca = Marca.objects.create(nombre=f'Marca {i}')
+            proveedor = Proveedor.objects.create(nombre_comercial=f'Proveedor {i}', ruc_nit=f'179{i:010d}')
+            compra = Compra.objects.create(
+                numero_compra=f'CMP-{i}', proveedor=proveedor, usuario_registro=self.administrador
+            )
+
+            normal = Producto.objects.create(
+                codigo_barras=f'N-{i}', nombre=f'Normal {i}', categoria=categoria,
+                marca=marca, precio_venta=Decimal('2.50'), usuario_registro=self.administrador
+            )
+            inventario = ProductoNormal.objects.create(
+                producto=normal, costo_unitario=Decimal('1.50'), stock_actual=8, stock_minimo=2
+            )
+            MovimientoInventario.objects.create(
+                producto_normal=inventario, tipo_movimiento='ENTRADA_COMPRA', cantidad=8,
+                stock_antes=0, stock_despues=8, costo_unitario=Decimal('1.50'),
+                costo_total=Decimal('12'), compra=compra, usuario=self.administrador
+            )
+
+            granel = Producto.objects.create(
+                codigo_barras=f'Q-{i}', nombre=f'Granel {i}', categoria=categoria, marca=marca,
+                tipo_inventario='QUINTAL', unidad_medida_base=self.unidad,
+                precio_por_unidad_peso=Decimal('0.60'), usuario_registro=self.administrador
+            )
+            quintal = Quintal.objects.create(
+                codigo_quintal=f'QTL-{i}', producto=granel, proveedor=proveedor, compra=compra,
+                unidad_medida=self.unidad,
+                peso_inicial=Decimal('100'), peso_actual=Decimal('80'), costo_total=Decimal('40'),
+                usuario_registro=self.administrador
+            )
+            MovimientoQuintal.objects.create(
+                quintal=quintal, tipo_movimiento='ENTRADA', peso_movimiento=Decimal('100'),
+                peso_antes=Decimal('0'), peso_despues=Decimal('100'), unidad_medida=self.unidad,
+                usuario=self.administrador
+            )
+            DetalleCompra.objects.create(
+                compra=compra, producto=granel, peso_comprado=Decimal('100'),
+                unidad_medida=self.unidad, costo_unitario=Decimal('0.40')
+            )
+
+    def test_valores_anotados_de_marca(self):
+        self.crear_filas(1)
+
+        marca = admin.site._registry[Marca].get_queryset(RequestFactory().get('/')).get()
+
+        self.assertEqual(marca._cantidad_productos, marca.total_productos())
+        self.assertEqual(marca._productos_stock, marca.productos_con_stock().count())
+        self.assertEqual(marca._valor_inventario, marca.valor_inventario_marca())
+
+
+class RegistroUnidadesTests(TestCase):
+    """
+    La matriz de conversión se carga una vez, respeta las conversiones
+    explícitas y se descarta al guardar una unidad
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.kg = UnidadMedida.objects.create(
+            nombre='Kilogramo', abreviatura='kg', factor_conversion_kg=Decimal('1')
+        )
+        cls.lb = UnidadMedida.objects.create(
+            nombre='Libra', abreviatura='lb', factor_conversion_kg=Decimal('0.453592')
+        )
+        cls.qq = UnidadMedida.objects.create(
+            nombre='Quintal', abreviatura='qq', factor_conversion_kg=Decimal('45.3592')
+        )
+
+    def setUp(self):
+        RegistroUnidades.recargar()
+
+    def test_conversiones_sin_consultas(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(UnitConverter.convertir(Decimal('10'), self.lb, self.kg), Decimal('4.53592'))
+            self.assertEqual(self.qq.convertir_a(Decimal('1'), self.lb), Decimal('100'))
+            self.assertEqual(
+                RegistroUnidades.convertir_lote([1, '2.5'], self.kg, self.lb, precision=Decimal('0.001')),
+                [Decimal('2.205'), Decimal('5.512')]
+            )
+            self.assertEqual(RegistroUnidades.abreviatura(self.qq.pk), 'qq')
+
+    def test_conversion_explicita_e_invalidacion(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ConversionUnidad.objects.create(
+                unidad_origen=self.qq, unidad_destino=self.lb, factor_conversion=Decimal('101')
+            )
+        self.assertEqual(RegistroUnidades.factor(self.qq, self.lb), Decimal('101'))
+        self.assertEqual(
+            RegistroUnidades.factor(self.lb, self.qq), (Decimal('1') / 101).quantize(Decimal('1E-12'))
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lb.abreviatura = 'lbs'
+            self.lb.save()
+        self.assertEqual(RegistroUnidades.abreviatura(self.lb), 'lbs')
+
+
+class StockActualTests(TestCase):
+    """
+    La proyección de stock sigue a los quintales y al inventario normal en
+    la misma transacción y se puede reconstruir desde ellos
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.administrador = ConsultasChangelistMixin.crear_administrador()
+        unidad = UnidadMedida.objects.create(
+            nombre='Kilogramo', abreviatura='kg', factor_conversion_kg=Decimal('1')
+        )
+        categoria = Categoria.objects.create(nombre='Granos')
+        cls.proveedor = Proveedor.objects.create(nombre_comercial='Molino', ruc_nit='1790000000001')
+        cls.granel = Producto.objects.create(
+            codigo_barras='ARROZ', nombre='Arroz', categoria=categoria, tipo_inventario='QUINTAL',
+            unidad_medida_base=unidad, precio_por_unidad_peso=Decimal('1.20'),
+            usuario_registro=cls.administrador
+        )
+        for i, peso in enumerate((Decimal('40'), Decimal('60'))):
+            Quintal.objects.create(
+                codigo_quintal=f'QTL-ARROZ-{i}', producto=cls.granel, proveedor=cls.proveedor,
+                unidad_medida=unidad, peso_inicial=peso, peso_actual=peso,
+                costo_total=peso / 2, usuario_registro=cls.administrador
+            )
+        cls.normal = Producto.objects.create(
+            codigo_barras='AGUA', nombre='Agua', categoria=categoria, precio_venta=Decimal('0.50'),
+            usuario_registro=cls.administrador
+        )
+        ProductoNormal.objects.create(producto=cls.normal, costo_unitario=Decimal('0.30'), stock_actual=10)
+
+    def test_proyeccion_sigue_ventas_y_reversiones(self):
+        existencias = StockActual.objects.get(pk=self.granel.pk)
+        self.assertEqual(
+            (existencias.peso_disponible, existencias.lotes, existencias.valor_costo),
+            (Decimal('100'), 2, Decimal('50.00'))
+        )
+        self.assertEqual(StockActual.objects.get(pk=self.normal.pk).valor_costo, Decimal('3.00'))
+
+        distribucion = FIFOAllocationService.asignar(self.granel, Decimal('45'))
+        existencias.refresh_from_db()
+        self.assertEqual((existencias.peso_disponible, existencias.lotes), (Decimal('55'), 1))
+
+        StockReversalService.revertir(
+            [LineaReversion(self.granel.pk, d['quintal'].pk, d['peso_tomar'], 0, Decimal('0.5'))
+             for d in distribucion],
+            self.administrador, 'Devolución', registrar_movimientos=False
+        )
+        existencias.refresh_from_db()
+        self.assertEqual((existencias.peso_disponible, existencias.lotes), (Decimal('100'), 2))
+
+        producto = Producto.objects.get(pk=self.granel.pk)
+        with self.assertNumQueries(1):
+            self.assertTrue(producto.tiene_stock_disponible(Decimal('100')))
+
+    def test_reconstruir_corrige_desalineados(self):
+        # Cambios fuera de los caminos que mantienen la proyección
+        Quintal.objects.filter(producto=self.granel).update(peso_actual=Decimal('5'))
+        StockActual.objects.filter(pk=self.normal.pk).delete()
+
+        call_command('reconstruir_stock_actual', stdout=StringIO())
+
+        self.assertEqual(StockActual.objects.get(pk=self.granel.pk).peso_disponible, Decimal('10'))
+        self.assertEqual(StockActual.objects.get(pk=self.normal.pk).unidades_disponibles, 10)
+
+    def test_refrescar_bloquea_antes_de_agregar(self):
+        StockActual.objects.filter(pk=self.normal.pk).delete()
+
+        with CaptureQueriesContext(connection) as consultas:
+            StockActual.objects.refrescar([self.granel, self.normal])
+
+        sentencias = [c['sql'] for c in consultas.captured_queries]
+        bloqueos = [
+            i for i, sql in enumerate(sentencias)
+            if sql.startswith('SELECT') and 'inv_stock_actual' in sql and 'inv_quintal' not in sql
+        ]
+        agregado = next(i for i, sql in enumerate(sentencias) if 'inv_quintal' in sql)
+        self.assertTrue(bloqueos)
+        self.assertLess(max(bloqueos), agregado)
+        if connection.features.has_select_for_update:
+            self.assertTrue(all('FOR UPDATE' in sentencias[i] for i in bloqueos))
+        # La fila que faltaba se creó para bloquearla y quedó recalculada
+        self.assertEqual(StockActual.objects.get(pk=self.normal.pk).unidades_disponibles, 10)
+
+
+class LibroCostosTests(TestCase):
+    """
+    El libro de costos valora las salidas de inventario normal al promedio
+    ponderado y permite leer el valor a una fecha pasada
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.administrador = ConsultasChangelistMixin.crear_administrador()
+        cls.producto = Producto.objects.create(
+            codigo_barras='ACEITE', nombre='Aceite', categoria=Categoria.objects.create(nombre='Aceites'),
+            precio_venta=Decimal('3.00'), usuario_registro=cls.administrador
+        )
+        cls.inventario = ProductoNormal.objects.create(producto=cls.producto, costo_unitario=Decimal('1.00'))
+
+    def mover(self, cantidad, costo):
+        antes = self.inventario.stock_actual
+        self.inventario.stock_actual += cantidad
+        MovimientoInventario.objects.create(
+            producto_normal=self.inventario,
+            tipo_movimiento='ENTRADA_COMPRA' if cantidad > 0 else 'SALIDA_MERMA',
+            cantidad=cantidad, stock_antes=antes, stock_despues=self.inventario.stock_actual,
+            costo_unitario=costo, costo_total=abs(cantidad) * costo, usuario=self.administrador
+        )
+
+    def test_promedio_ponderado_y_valor_a_fecha(self):
+        self.mover(10, Decimal('1.00'))
+        self.mover(10, Decimal('2.00'))
+        # Los dos primeros asientos quedan en el mes anterior
+        AsientoCosto.objects.filter(producto=self.producto).update(
+            fecha=timezone.now() - timedelta(days=40)
+        )
+        self.mover(-5, Decimal('1.00'))
+
+        self.assertEqual(ValoracionService.costo_promedio(self.producto), Decimal('1.5000'))
+        self.assertEqual(
+            ValoracionService.saldo_producto(self.producto),
+            (Decimal('15'), Decimal('22.50'), Decimal('0.00'))
+        )
+
+        corte = timezone.now() - timedelta(days=30)
+        with self.assertNumQueries(1):
+            self.assertEqual(ValoracionService.valor(corte), Decimal('30.00'))
+        self.assertEqual(ValoracionService.valor(), Decimal('22.50'))
+
+        self.mover(-15, Decimal('1.00'))
+        self.assertEqual(ValoracionService.saldo_producto(self.producto).valor, Decimal('0'))
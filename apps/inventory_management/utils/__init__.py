@@ -2,10 +2,12 @@ from .barcode_generator import BarcodeGenerator
 from .unit_converter import UnitConverter
 from .validators import InventoryValidators
 from .fifo_calculator import FIFOCalculator
+from .unit_registry import RegistroUnidades
 
 __all__ = [
     'BarcodeGenerator',
     'UnitConverter',
     'InventoryValidators',
     'FIFOCalculator',
+    'RegistroUnidades',
 ]
\ No newline at end of file
@@ -1,9 +1,14 @@
 from decimal import Decimal
 
+from .unit_registry import RegistroUnidades
+
 
 class UnitConverter:
     """
     Conversor de unidades de medida
+    
+    Usa la matriz precalculada de RegistroUnidades: no consulta la base de
+    datos ni divide en cada llamada.
     """
     
     @staticmethod
@@ -22,13 +27,7 @@ class UnitConverter:
         if unidad_origen == unidad_destino:
             return cantidad
         
-        # Convertir a kilogramos (base)
-        cantidad_kg = cantidad * unidad_origen.factor_conversion_kg
-        
-        # Convertir de kilogramos a unidad destino
-        cantidad_destino = cantidad_kg / unidad_destino.factor_conversion_kg
-        
-        return cantidad_destino
+        return RegistroUnidades.convertir(cantidad, unidad_origen, unidad_destino)
     
     @staticmethod
     def obtener_factor_conversion(unidad_origen, unidad_destino):
@@ -45,4 +44,4 @@ class UnitConverter:
         if unidad_origen == unidad_destino:
             return Decimal('1.0')
         
-        return unidad_origen.factor_conversion_kg / unidad_destino.factor_conversion_kg
\ No newline at end of file
+        return RegistroUnidades.factor(unidad_origen, unidad_destino)
\ No newline at end of file
@@ -0,0 +1,205 @@
+"""
+Registro de unidades de medida
+
+Carga una sola vez todas las UnidadMedida y ConversionUnidad en una matriz
+N×N de factores inmutable, con los Decimal ya cuantizados. Convertir o
+mostrar la abreviatura de una unidad no consulta la base de datos.
+
+- Cada proceso guarda su propia matriz. Al guardar o borrar una unidad o
+  una conversión (receivers al final de models.py) se descarta la local y
+  se cambia la versión compartida en caché. Los demás procesos la comparan como mucho cada
+  UNIDADES_VERIFICAR_SEGUNDOS y recargan si cambió.
+- Una ConversionUnidad explícita tiene prioridad sobre el factor derivado
+  de factor_conversion_kg, y también define el sentido inverso si este no
+  tiene su propia fila.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from collections import namedtuple
+from decimal import Decimal
+from types import MappingProxyType
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger('commercebox')
+
+# Cuantización de los factores de la matriz
+PRECISION_FACTOR = Decimal('0.000000000001')
+CLAVE_VERSION = 'inventario:unidades:version'
+
+Unidad = namedtuple('Unidad', ['id', 'nombre', 'abreviatura', 'factor_kg'])
+Matriz = namedtuple('Matriz', ['version', 'unidades', 'factores', 'verificada'])
+
+
+class RegistroUnidades:
+    """
+    Matriz de conversión entre unidades, compartida por el proceso
+    """
+
+    _matriz = None
+    _lock = threading.Lock()
+
+    # =========================================================================
+    # CARGA E INVALIDACIÓN
+    # =========================================================================
+
+    @classmethod
+    def matriz(cls):
+        """Matriz vigente; la recarga si otro proceso cambió las unidades"""
+        matriz = cls._matriz
+        ahora = time.monotonic()
+        intervalo = getattr(settings, 'UNIDADES_VERIFICAR_SEGUNDOS', 30)
+        if matriz is not None and ahora - matriz.verificada < intervalo:
+            return matriz
+
+        version = cls._version_compartida()
+        if matriz is not None and matriz.version == version:
+            cls._matriz = matriz._replace(verificada=ahora)
+            return cls._matriz
+
+        with cls._lock:
+            if cls._matriz is None or cls._matriz.version != version:
+                cls._matriz = cls._cargar(version)
+            return cls._matriz
+
+    @classmethod
+    def _version_compartida(cls):
+        try:
+            version = cache.get(CLAVE_VERSION)
+            if version is None:
+                cache.add(CLAVE_VERSION, uuid.uuid4().hex, timeout=None)
+                version = cache.get(CLAVE_VERSION)
+            return version
+        except Exception as e:
+            # Sin caché cada proceso confía en su propia copia
+            logger.warning(f"No se pudo leer la versión de unidades: {e}")
+            return cls._matriz.version if cls._matriz is not None else None
+
+    @staticmethod
+    def _cargar(version):
+        """Dos consultas: unidades y conversiones explícitas"""
+        from ..models import ConversionUnidad, UnidadMedida
+
+        unidades = {
+            u.id: Unidad(u.id, u.nombre, u.abreviatura, u.factor_conversion_kg)
+            for u in UnidadMedida.objects.only('id', 'nombre', 'abreviatura', 'factor_conversion_kg')
+        }
+
+        factores = {}
+        for origen in unidades.values():
+            for destino in unidades.values():
+                if origen.id == destino.id:
+                    factores[origen.id, destino.id] = Decimal('1')
+                elif destino.factor_kg:
+                    factores[origen.id, destino.id] = (
+                        origen.factor_kg / destino.factor_kg
+                    ).quantize(PRECISION_FACTOR)
+
+        explicitas = {
+            (c['unidad_origen_id'], c['unidad_destino_id']): c['factor_conversion']
+            for c in ConversionUnidad.objects.values(
+                'unidad_origen_id', 'unidad_destino_id', 'factor_conversion'
+            )
+        }
+        for (origen, destino), factor in explicitas.items():
+            factores[origen, destino] = factor.quantize(PRECISION_FACTOR)
+            if (destino, origen) not in explicitas and factor:
+                factores[destino, origen] = (Decimal('1') / factor).quantize(PRECISION_FACTOR)
+
+        return Matriz(
+            version=version,
+            unidades=MappingProxyType(unidades),
+            factores=MappingProxyType(factores),
+            verificada=time.monotonic(),
+        )
+
+    @classmethod
+    def recargar(cls):
+        """Recarga la matriz del proceso (unidad desconocida, p. ej. recién creada)"""
+        with cls._lock:
+            cls._matriz = cls._cargar(cls._version_compartida())
+            return cls._matriz
+
+    @classmethod
+    def invalidar(cls):
+        """
+        Descarta la matriz del proceso y, al confirmar la transacción, la de
+        todos los procesos
+        """
+        cls._matriz = None
+
+        def _descartar():
+            cls._matriz = None
+            try:
+                cache.set(CLAVE_VERSION, uuid.uuid4().hex, timeout=None)
+            except Exception as e:
+                logger.warning(f"No se pudo invalidar el registro de unidades: {e}")
+
+        transaction.on_commit(_descartar)
+
+    # =========================================================================
+    # CONSULTAS
+    # =========================================================================
+
+    @staticmethod
+    def _id(unidad):
+        return getattr(unidad, 'pk', unidad)
+
+    @classmethod
+    def unidad(cls, unidad):
+        """Unidad (id, nombre, abreviatura, factor_kg) por instancia o id"""
+        unidad_id = cls._id(unidad)
+        encontrada = cls.matriz().unidades.get(unidad_id)
+        if encontrada is None:
+            encontrada = cls.recargar().unidades.get(unidad_id)
+        return encontrada
+
+    @classmethod
+    def abreviatura(cls, unidad, default=''):
+        """Abreviatura sin consultar la base de datos"""
+        encontrada = cls.unidad(unidad) if unidad is not None else None
+        return encontrada.abreviatura if encontrada else default
+
+    @classmethod
+    def factor(cls, origen, destino):
+        """
+        Factor para convertir de `origen` a `destino`
+
+        Raises:
+            KeyError: Si alguna de las unidades no existe
+        """
+        origen, destino = cls._id(origen), cls._id(destino)
+        if origen == destino:
+            return Decimal('1')
+        factor = cls.matriz().factores.get((origen, destino))
+        if factor is None:
+            factor = cls.recargar().factores[origen, destino]
+        return factor
+
+    @classmethod
+    def convertir(cls, cantidad, origen, destino):
+        """Convierte una cantidad de `origen` a `destino`"""
+        return Decimal(str(cantidad)) * cls.factor(origen, destino)
+
+    @classmethod
+    def convertir_lote(cls, cantidades, origen, destino, precision=None):
+        """
+        Convierte varias cantidades con un solo acceso a la matriz
+
+        Args:
+            cantidades: iterable de cantidades
+            precision: Decimal para cuantizar el resultado (ej. Decimal('0.001'))
+
+        Returns:
+            list[Decimal]
+        """
+        factor = cls.factor(origen, destino)
+        convertidas = [Decimal(str(c)) * factor for c in cantidades]
+        if precision is not None:
+            convertidas = [c.quantize(precision) for c in convertidas]
+        return convertidas
@@ -1,5 +1,6 @@
 # apps/inventory_management/views.py
 
+import logging
 from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse_lazy, reverse
 from django.views.generic import (
@@ -32,6 +33,8 @@ from .mixins import (
 )
 from .decorators import inventario_access_required, ajax_inventario_access_required
 
+logger = logging.getLogger('commercebox')
+
 
 # ============================================================================
 # DASHBOARD DE INVENTARIO
@@ -1713,7 +1716,7 @@ class QuintalesDisponiblesTodosAPIView(View):
             })
             
         except Exception as e:
-            print(f"❌ Error en QuintalesDisponiblesTodosAPIView: {str(e)}")
+            logger.error(f"❌ Error en QuintalesDisponiblesTodosAPIView: {str(e)}")
             import traceback
             traceback.print_exc()
             
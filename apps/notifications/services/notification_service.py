@@ -11,6 +11,9 @@ from django.urls import reverse
 from decimal import Decimal
 import logging
 
+from apps.inventory_management.utils.unit_registry import RegistroUnidades
+from apps.system_configuration.instrumentacion import instrumentado
+
 logger = logging.getLogger(__name__)
 
 
@@ -24,6 +27,7 @@ class NotificationService:
     # =========================================================================
     
     @staticmethod
+    @instrumentado()
     def crear_notificacion(
         tipo_codigo,
         usuario,
@@ -198,7 +202,133 @@ class NotificationService:
         # TODO: Integrar con proveedor de SMS
         # Ejemplo: Twilio, AWS SNS, etc
         pass
-    
+
+    @staticmethod
+    @instrumentado()
+    def procesar_pendientes(limite=200, antiguedad_minutos=2):
+        """
+        Reintenta el envío de notificaciones que quedaron sin enviar
+
+        Toma las PENDIENTE con más de `antiguedad_minutos` (el envío síncrono
+        se interrumpió) y las ERROR que aún admiten reintentos, las más
+        antiguas primero.
+
+        Returns:
+            dict: {'procesadas', 'enviadas', 'errores'}
+        """
+        from datetime import timedelta
+        from django.db.models import Q
+        from apps.notifications.models import (
+            Notificacion, PreferenciasNotificacion, ConfiguracionNotificacion
+        )
+
+        config = ConfiguracionNotificacion.get_config()
+        if not config.notificaciones_activas:
+            return {'procesadas': 0, 'enviadas': 0, 'errores': 0}
+
+        limite_fecha = timezone.now() - timedelta(minutes=antiguedad_minutos)
+        pendientes = Notificacion.objects.filter(
+            Q(estado='PENDIENTE', fecha_creacion__lt=limite_fecha) |
+            Q(estado='ERROR', intentos_envio__lt=3)
+        ).select_related(
+            'usuario', 'tipo_notificacion'
+        ).order_by('fecha_creacion')[:limite]
+
+        enviadas = errores = procesadas = 0
+        for notificacion in pendientes:
+            procesadas += 1
+            try:
+                try:
+                    preferencias = notificacion.usuario.preferencias_notificaciones
+                except PreferenciasNotificacion.DoesNotExist:
+                    preferencias = PreferenciasNotificacion.objects.create(
+                        usuario=notificacion.usuario
+                    )
+                NotificationService._enviar_notificacion(notificacion, preferencias, config)
+                enviadas += 1
+            except Exception as e:
+                logger.error(f"Error al reenviar notificación {notificacion.id}: {str(e)}")
+                notificacion.estado = 'ERROR'
+                notificacion.intentos_envio += 1
+                notificacion.error_mensaje = str(e)
+                notificacion.save(update_fields=['estado', 'intentos_envio', 'error_mensaje'])
+                errores += 1
+
+        return {'procesadas': procesadas, 'enviadas': enviadas, 'errores': errores}
+
+    @staticmethod
+    @instrumentado()
+    def crear_notificaciones_en_bloque(tipo_codigo, avisos):
+        """
+        Notifica varios avisos a ADMIN y SUPERVISOR con un solo INSERT
+
+        Aplica las mismas reglas que crear_notificacion (sistema activo, tipo
+        activo, preferencias de cada usuario). Las notificaciones quedan
+        PENDIENTE y se ven en el panel de inmediato; el envío por email o
+        push lo hace procesar_pendientes.
+
+        Args:
+            tipo_codigo: Código del tipo de notificación
+            avisos: list[dict] con titulo, mensaje, prioridad,
+                objeto_relacionado y datos_adicionales
+
+        Returns:
+            int: Notificaciones creadas
+        """
+        from apps.authentication.models import Usuario
+        from apps.custom_admin.estado_panel import invalidar
+        from apps.notifications.models import (
+            Notificacion, TipoNotificacion,
+            PreferenciasNotificacion, ConfiguracionNotificacion
+        )
+
+        if not avisos or not ConfiguracionNotificacion.get_config().notificaciones_activas:
+            return 0
+
+        try:
+            tipo_notif = TipoNotificacion.objects.get(codigo=tipo_codigo, activo=True)
+        except TipoNotificacion.DoesNotExist:
+            logger.warning(f"Tipo de notificación '{tipo_codigo}' no existe")
+            return 0
+
+        usuarios = list(Usuario.objects.filter(
+            rol__codigo__in=['ADMIN', 'SUPERVISOR'],
+            estado='ACTIVO'
+        ))
+        preferencias = {
+            p.usuario_id: p for p in PreferenciasNotificacion.objects.filter(usuario__in=usuarios)
+        }
+        faltantes = [
+            PreferenciasNotificacion(usuario=u) for u in usuarios if u.pk not in preferencias
+        ]
+        for p in PreferenciasNotificacion.objects.bulk_create(faltantes):
+            preferencias[p.usuario_id] = p
+
+        notificaciones = []
+        for aviso in avisos:
+            objeto = aviso.get('objeto_relacionado')
+            for usuario in usuarios:
+                if not preferencias[usuario.pk].puede_recibir_notificacion(tipo_notif, aviso['prioridad']):
+                    continue
+                notificaciones.append(Notificacion(
+                    tipo_notificacion=tipo_notif,
+                    usuario=usuario,
+                    titulo=aviso['titulo'],
+                    mensaje=aviso['mensaje'],
+                    prioridad=aviso['prioridad'],
+                    requiere_accion=True,
+                    datos_adicionales=aviso.get('datos_adicionales') or {},
+                    content_type=ContentType.objects.get_for_model(objeto) if objeto else None,
+                    object_id=objeto.pk if objeto else None,
+                    estado='PENDIENTE'
+                ))
+
+        Notificacion.objects.bulk_create(notificaciones, batch_size=500)
+        # bulk_create no dispara post_save
+        for usuario_id in {n.usuario_id for n in notificaciones}:
+            invalidar(usuario_id)
+        return len(notificaciones)
+
     # =========================================================================
     # NOTIFICACIONES DE STOCK - QUINTALES
     # =========================================================================
@@ -218,7 +348,7 @@ class NotificationService:
         mensaje = (
             f"El quintal {quintal.codigo_quintal} está en estado CRÍTICO.\n\n"
             f"📦 Producto: {quintal.producto.nombre}\n"
-            f"⚖️ Peso restante: {quintal.peso_actual} {quintal.unidad_medida.abreviatura}\n"
+            f"⚖️ Peso restante: {quintal.peso_actual} {RegistroUnidades.abreviatura(quintal.unidad_medida_id)}\n"
             f"📊 Porcentaje: {porcentaje_restante:.1f}%\n"
             f"🏪 Proveedor: {quintal.proveedor.nombre_comercial}\n\n"
             f"⚠️ Se recomienda evaluar reorden inmediato."
@@ -260,7 +390,7 @@ class NotificationService:
             f"📦 Producto: {quintal.producto.nombre}\n"
             f"🏪 Proveedor: {quintal.proveedor.nombre_comercial}\n"
             f"📅 Fecha recepción: {quintal.fecha_recepcion.strftime('%d/%m/%Y')}\n"
-            f"⚖️ Peso inicial: {quintal.peso_inicial} {quintal.unidad_medida.abreviatura}\n\n"
+            f"⚖️ Peso inicial: {quintal.peso_inicial} {RegistroUnidades.abreviatura(quintal.unidad_medida_id)}\n\n"
             f"✅ Quintal completamente vendido."
         )
         
@@ -294,7 +424,7 @@ class NotificationService:
             f"📦 Producto: {quintal.producto.nombre}\n"
             f"📅 Fecha vencimiento: {quintal.fecha_vencimiento.strftime('%d/%m/%Y')}\n"
             f"⏰ Días restantes: {dias_restantes} día(s)\n"
-            f"⚖️ Peso disponible: {quintal.peso_actual} {quintal.unidad_medida.abreviatura}\n\n"
+            f"⚖️ Peso disponible: {quintal.peso_actual} {RegistroUnidades.abreviatura(quintal.unidad_medida_id)}\n\n"
             f"⚠️ Considere promociones o descuentos para vender antes del vencimiento."
         )
         
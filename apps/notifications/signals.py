@@ -1,4 +1,3 @@
-from datetime import date
 # apps/notifications/signals.py
 
 """
@@ -13,7 +12,7 @@ from decimal import Decimal
 
 # Importar modelos de otros módulos
 from apps.inventory_management.models import (
-    Quintal, MovimientoQuintal, ProductoNormal, 
+    MovimientoQuintal, ProductoNormal, 
     MovimientoInventario
 )
 from apps.sales_management.models import (
@@ -62,36 +61,6 @@ def notificar_movimiento_quintal(sender, instance, created, **kwargs):
         )
 
 
-@receiver(post_save, sender=Quintal)
-def notificar_quintal_proximo_vencer(sender, instance, created, **kwargs):
-    """
-    Al crear o actualizar un quintal:
-    - Verificar si está próximo a vencer
-    """
-    if not instance.fecha_vencimiento:
-        return
-    
-    from datetime import timedelta
-    from django.utils import timezone
-    
-    # Convertir fecha_vencimiento a date si es string
-    fecha_venc = instance.fecha_vencimiento
-    if isinstance(fecha_venc, str):
-        from datetime import datetime
-        fecha_venc = datetime.strptime(fecha_venc, '%Y-%m-%d').date()
-    elif not isinstance(fecha_venc, date):
-        return  # Si no es ni string ni date, salir
-    
-    dias_para_vencer = (fecha_venc - timezone.now().date()).days
-    
-    # Notificar si vence en 7 días o menos
-    if 0 <= dias_para_vencer <= 7 and instance.estado == 'DISPONIBLE':
-        NotificationService.crear_notificacion_vencimiento_proximo(
-            quintal=instance,
-            dias_restantes=dias_para_vencer
-        )
-
-
 # ============================================================================
 # SEÑALES DE INVENTARIO - PRODUCTOS NORMALES
 # ============================================================================
@@ -0,0 +1,30 @@
+"""
+Tareas de Celery para Notificaciones
+apps/notifications/tasks.py
+"""
+from celery import shared_task
+import logging
+
+from commercebox.celery import TareaDeduplicada
+
+logger = logging.getLogger('commercebox')
+
+
+@shared_task(
+    name='apps.notifications.tasks.procesar_notificaciones_pendientes',
+    base=TareaDeduplicada,
+    ignore_result=True
+)
+def procesar_notificaciones_pendientes(limite=200):
+    """
+    Reintenta las notificaciones pendientes o con error (cada 5 minutos)
+    """
+    from apps.notifications.services.notification_service import NotificationService
+
+    resultado = NotificationService.procesar_pendientes(limite=limite)
+    if resultado['procesadas']:
+        logger.info(
+            f"Notificaciones reintentadas: {resultado['procesadas']} "
+            f"({resultado['enviadas']} enviadas, {resultado['errores']} con error)"
+        )
+    return resultado
@@ -1,3 +1,44 @@
+from datetime import timedelta
+
 from django.test import TestCase
+from django.utils import timezone
+
+from apps.authentication.models import Usuario
+
+from .models import Notificacion, TipoNotificacion
+from .services.notification_service import NotificationService
+
+
+class ProcesarPendientesTests(TestCase):
+
+    def setUp(self):
+        self.usuario = Usuario.objects.create(
+            username='notif', email='notif@example.com', codigo_empleado='NOTIF',
+            nombres='Notif', apellidos='Pendientes', documento_identidad='0000000001'
+        )
+        self.tipo = TipoNotificacion.objects.create(
+            codigo='PRUEBA', nombre='Prueba', categoria='SISTEMA',
+            plantilla_titulo='Prueba', plantilla_mensaje='Prueba'
+        )
+
+    def _notificacion(self, estado, minutos, intentos=0):
+        return Notificacion.objects.create(
+            tipo_notificacion=self.tipo, usuario=self.usuario,
+            titulo='Aviso', mensaje='Mensaje', estado=estado, intentos_envio=intentos,
+            fecha_creacion=timezone.now() - timedelta(minutes=minutos)
+        )
+
+    def test_reintenta_pendientes_antiguas_y_errores_con_intentos(self):
+        atascada = self._notificacion('PENDIENTE', 10)
+        reciente = self._notificacion('PENDIENTE', 0)
+        con_error = self._notificacion('ERROR', 30, intentos=1)
+        agotada = self._notificacion('ERROR', 30, intentos=3)
+
+        resultado = NotificationService.procesar_pendientes()
 
-# Create your tests here.
+        self.assertEqual(resultado, {'procesadas': 2, 'enviadas': 2, 'errores': 0})
+        estados = dict(Notificacion.objects.values_list('id', 'estado'))
+        self.assertEqual(estados[atascada.id], 'ENVIADA')
+        self.assertEqual(estados[con_error.id], 'ENVIADA')
+        self.assertEqual(estados[reciente.id], 'PENDIENTE')
+        self.assertEqual(estados[agotada.id], 'ERROR')
@@ -0,0 +1,19 @@
+# apps/reports_analytics/exporters/__init__.py
+
+from .base import Columna, ExportacionBase
+from .ventas import ExportacionVentas
+from .movimientos import ExportacionMovimientos
+from .writers import escribir_exportacion, respuesta_exportacion
+from .export_service import ExportService, EXPORTACIONES, FORMATOS
+
+__all__ = [
+    'Columna',
+    'ExportacionBase',
+    'ExportacionVentas',
+    'ExportacionMovimientos',
+    'ExportService',
+    'EXPORTACIONES',
+    'FORMATOS',
+    'escribir_exportacion',
+    'respuesta_exportacion',
+]
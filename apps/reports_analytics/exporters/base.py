@@ -0,0 +1,211 @@
+# apps/reports_analytics/exporters/base.py
+
+"""
+Base del motor de exportación en streaming
+Cada exportación define sus columnas y su queryset; las filas se leen con
+values() + iterator() para que la memoria se mantenga constante sin importar
+cuántos registros tenga el período exportado.
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from commercebox.db_router import alias_reportes
+
+
+class Columna:
+    """
+    Definición de una columna exportable
+
+    Args:
+        titulo: Encabezado de la columna
+        campo: Campo de la proyección values() que alimenta la columna
+        tipo: 'texto', 'moneda', 'entero', 'decimal' o 'fecha'
+        ancho: Ancho de la columna en Excel (caracteres)
+        valor: Función opcional fila -> valor (para columnas calculadas)
+        campos: Campos extra de values() que necesita la función `valor`
+        max_pdf: Caracteres máximos al imprimir en PDF
+    """
+
+    def __init__(self, titulo, campo=None, tipo='texto', ancho=15,
+                 valor=None, campos=(), max_pdf=None):
+        self.titulo = titulo
+        self.campo = campo
+        self.tipo = tipo
+        self.ancho = ancho
+        self.valor = valor
+        self.campos = tuple(campos) + ((campo,) if campo else ())
+        self.max_pdf = max_pdf
+
+    def obtener(self, fila):
+        """Obtiene el valor crudo de la columna para una fila de values()"""
+        if self.valor is not None:
+            return self.valor(fila)
+        return fila.get(self.campo)
+
+    def como_texto(self, valor, formato_fecha='%d/%m/%Y %H:%M'):
+        """Representación en texto (CSV / PDF)"""
+        if valor is None:
+            return ''
+        if self.tipo == 'moneda':
+            return f"${Decimal(valor):,.2f}"
+        if isinstance(valor, datetime):
+            if timezone.is_aware(valor):
+                valor = timezone.localtime(valor)
+            return valor.strftime(formato_fecha)
+        if isinstance(valor, date):
+            return valor.strftime('%d/%m/%Y')
+        return str(valor)
+
+    def como_celda(self, valor):
+        """Valor nativo para una celda de Excel"""
+        if valor is None:
+            return None
+        if self.tipo in ('moneda', 'decimal'):
+            return float(valor)
+        if isinstance(valor, datetime):
+            if timezone.is_aware(valor):
+                valor = timezone.localtime(valor)
+            return valor.strftime('%d/%m/%Y %H:%M')
+        return valor
+
+
+class ExportacionBase:
+    """
+    Exportación tabular genérica
+
+    Las subclases definen:
+        nombre: Clave de registro (ej: 'ventas')
+        titulo: Título impreso en Excel/PDF
+        hoja: Nombre de la hoja de Excel
+        tipo_reporte: Tipo de ReporteGuardado para las exportaciones en segundo plano
+        filtros: Parámetros GET aceptados
+        columnas: Lista de `Columna`
+        columnas_pdf: Títulos de las columnas que se imprimen en PDF (None = todas)
+        orden: Ordenamiento del queryset
+        get_queryset(): Queryset filtrado (sin values())
+        totales(): Agregados calculados en la base de datos {campo: valor}
+
+    Las lecturas pasan por consulta(), que las dirige a la réplica de
+    reportes; la descarga en streaming se consume después de que la vista
+    respondió, por eso se fija el alias en el queryset y no con
+    lectura_reportes().
+    """
+    nombre = None
+    titulo = ''
+    hoja = 'Datos'
+    tipo_reporte = None
+    filtros = ()
+    columnas = []
+    columnas_pdf = None
+    orden = ()
+
+    def __init__(self, parametros=None):
+        self.parametros = {
+            clave: valor
+            for clave, valor in (parametros or {}).items()
+            if clave in self.filtros and valor not in (None, '')
+        }
+
+    @classmethod
+    def desde_request(cls, request):
+        """Construye la exportación con los filtros de la petición"""
+        return cls({clave: request.GET.get(clave) for clave in cls.filtros})
+
+    # ------------------------------------------------------------------
+    # Datos
+    # ------------------------------------------------------------------
+
+    def get_queryset(self):
+        raise NotImplementedError
+
+    def totales(self):
+        return {}
+
+    @property
+    def chunk_size(self):
+        return getattr(settings, 'EXPORTACION_CHUNK_SIZE', 2000)
+
+    @property
+    def limite_pdf(self):
+        """Máximo de filas impresas en PDF (el PDF no es formato de datos masivos)"""
+        return getattr(settings, 'EXPORTACION_PDF_MAX_FILAS', 5000)
+
+    def campos(self):
+        """Proyección values() mínima que necesitan las columnas"""
+        campos = []
+        for columna in self.columnas:
+            for campo in columna.campos:
+                if campo not in campos:
+                    campos.append(campo)
+        return campos
+
+    def alias_lectura(self):
+        """Alias del que se leen las filas (réplica si está al día para el período)"""
+        if not hasattr(self, '_alias_lectura'):
+            self._alias_lectura = alias_reportes(self._parsear_fecha(self.parametros.get('fecha_fin')))
+        return self._alias_lectura
+
+    def consulta(self):
+        """Queryset de get_queryset() leído del alias de reportes"""
+        return self.get_queryset().using(self.alias_lectura())
+
+    def contar(self):
+        return self.consulta().count()
+
+    def iterar_filas(self, limite=None):
+        """
+        Genera filas como listas de valores crudos, en el orden de `columnas`
+        Usa un cursor por bloques: nunca materializa el queryset completo.
+        El cursor vive dentro de una transacción, lo que lo hace compatible
+        con PgBouncer en modo transacción.
+        """
+        queryset = self.consulta().order_by(*self.orden).values(*self.campos())
+        if limite:
+            queryset = queryset[:limite]
+
+        with transaction.atomic(using=queryset.db):
+            for fila in queryset.iterator(chunk_size=self.chunk_size):
+                yield [columna.obtener(fila) for columna in self.columnas]
+
+    # ------------------------------------------------------------------
+    # Metadatos
+    # ------------------------------------------------------------------
+
+    def indices_pdf(self):
+        """Índices de las columnas que se imprimen en PDF"""
+        if not self.columnas_pdf:
+            return list(range(len(self.columnas)))
+        return [
+            indice for indice, columna in enumerate(self.columnas)
+            if columna.titulo in self.columnas_pdf
+        ]
+
+    def rango_fechas(self):
+        """Rango (desde, hasta) para registrar la exportación en ReporteGuardado"""
+        hoy = timezone.localdate()
+        desde = self._parsear_fecha(self.parametros.get('fecha_inicio')) or hoy
+        hasta = self._parsear_fecha(self.parametros.get('fecha_fin')) or hoy
+        return desde, hasta
+
+    def nombre_archivo(self, extension):
+        marca = timezone.localtime().strftime('%Y%m%d_%H%M%S')
+        return f"{self.nombre}_{marca}.{extension}"
+
+    def titulo_completo(self):
+        return f"{self.titulo} - {timezone.localdate().strftime('%d/%m/%Y')}"
+
+    @staticmethod
+    def _parsear_fecha(valor):
+        if not valor:
+            return None
+        if isinstance(valor, date):
+            return valor
+        try:
+            return datetime.strptime(valor, '%Y-%m-%d').date()
+        except (TypeError, ValueError):
+            return None
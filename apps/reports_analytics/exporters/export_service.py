@@ -0,0 +1,113 @@
+# apps/reports_analytics/exporters/export_service.py
+
+"""
+Servicio de exportación: decide entre descarga inmediata (streaming) y
+generación en segundo plano (Celery) según el volumen de filas.
+"""
+
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.http import JsonResponse
+from django.urls import reverse
+
+from .movimientos import ExportacionMovimientos
+from .ventas import ExportacionVentas
+from .writers import EXTENSIONES, respuesta_exportacion
+
+logger = logging.getLogger('commercebox')
+
+
+EXPORTACIONES = {
+    ExportacionVentas.nombre: ExportacionVentas,
+    ExportacionMovimientos.nombre: ExportacionMovimientos,
+    # Alias usados por las URLs de reports_analytics
+    'movimientos': ExportacionMovimientos,
+}
+
+FORMATOS = tuple(EXTENSIONES.keys())
+
+
+class ExportService:
+    """Punto de entrada único para exportar tablas grandes"""
+
+    @staticmethod
+    def obtener_exportacion(nombre, parametros=None):
+        """
+        Instancia la exportación registrada con `nombre`
+
+        Raises:
+            KeyError: Si no existe una exportación con ese nombre
+        """
+        return EXPORTACIONES[nombre](parametros)
+
+    @staticmethod
+    def umbral_asincrono():
+        return getattr(settings, 'EXPORTACION_UMBRAL_ASINCRONO', 20000)
+
+    @classmethod
+    def exportar(cls, request, exportacion, formato):
+        """
+        Responde la exportación solicitada
+
+        - Hasta `EXPORTACION_UMBRAL_ASINCRONO` filas: descarga inmediata en streaming
+        - Por encima: se encola una tarea Celery que guarda el archivo en
+          ReporteGuardado.archivo y se responde 202 con el id del reporte, la
+          URL de progreso (api_estado_ejecucion) y la de descarga
+        """
+        formato = formato.upper()
+        total = exportacion.contar()
+        if formato == 'PDF':
+            total = min(total, exportacion.limite_pdf)
+
+        if total > cls.umbral_asincrono():
+            reporte = cls.encolar_exportacion(exportacion, formato, request.user, total)
+            return JsonResponse({
+                'success': True,
+                'asincrono': True,
+                'reporte_id': str(reporte.id),
+                'total_filas': total,
+                'mensaje': (
+                    f'La exportación tiene {total} registros y se está generando en segundo plano. '
+                    'Estará disponible en Reportes Guardados.'
+                ),
+                'url_estado': reverse(
+                    'reports_analytics:api_estado_ejecucion', kwargs={'reporte_id': reporte.id}
+                ),
+                'url_descarga': reverse(
+                    'reports_analytics:descargar_reporte', kwargs={'reporte_id': reporte.id}
+                ),
+            }, status=202)
+
+        return respuesta_exportacion(exportacion, formato)
+
+    @staticmethod
+    def encolar_exportacion(exportacion, formato, usuario, total_filas=None):
+        """Registra un ReporteGuardado pendiente y encola su generación"""
+        from apps.reports_analytics.models import ReporteGuardado
+        from apps.reports_analytics.tasks import generar_exportacion
+
+        fecha_desde, fecha_hasta = exportacion.rango_fechas()
+        reporte = ReporteGuardado.objects.create(
+            nombre=exportacion.titulo.title(),
+            tipo_reporte=exportacion.tipo_reporte,
+            fecha_desde=fecha_desde,
+            fecha_hasta=fecha_hasta,
+            filtros={
+                'exportacion': exportacion.nombre,
+                'parametros': exportacion.parametros,
+            },
+            datos={'total_filas': total_filas},
+            formato=formato,
+            estado='PENDIENTE',
+            progreso=0,
+            usuario=usuario,
+        )
+
+        transaction.on_commit(lambda: generar_exportacion.delay(str(reporte.id)))
+        logger.info(
+            f"Exportación {exportacion.nombre} ({formato}, {total_filas} filas) "
+            f"encolada como reporte {reporte.id}"
+        )
+        return reporte
@@ -0,0 +1,77 @@
+# apps/reports_analytics/exporters/movimientos.py
+
+"""
+Exportación general de movimientos de inventario (productos normales)
+"""
+
+from django.db.models import Q
+
+from apps.inventory_management.models import MovimientoInventario
+
+from ..utils import filtro_rango
+from .base import Columna, ExportacionBase
+
+
+TIPOS_MOVIMIENTO = dict(MovimientoInventario.TIPO_MOVIMIENTO_CHOICES)
+
+
+def _nombre_usuario(fila):
+    if not fila['usuario_id']:
+        return 'Sistema'
+    return f"{fila['usuario__nombres']} {fila['usuario__apellidos']}".strip()
+
+
+class ExportacionMovimientos(ExportacionBase):
+    """Movimientos de inventario filtrados por fecha, tipo, producto, usuario y texto"""
+    nombre = 'movimientos_inventario'
+    titulo = 'REPORTE DE MOVIMIENTOS DE INVENTARIO'
+    hoja = 'Movimientos'
+    tipo_reporte = 'EXPORTACION_MOVIMIENTOS'
+    filtros = ('fecha_inicio', 'fecha_fin', 'tipo_movimiento', 'producto', 'usuario', 'search')
+    orden = ('-fecha_movimiento',)
+
+    columnas = [
+        Columna('Fecha', 'fecha_movimiento', tipo='fecha', ancho=18),
+        Columna(
+            'Tipo',
+            valor=lambda fila: TIPOS_MOVIMIENTO.get(fila['tipo_movimiento'], fila['tipo_movimiento']),
+            campos=('tipo_movimiento',), ancho=20, max_pdf=15
+        ),
+        Columna('Producto', 'producto_normal__producto__nombre', ancho=30, max_pdf=25),
+        Columna('Cantidad', 'cantidad', tipo='entero', ancho=12),
+        Columna('Stock Antes', 'stock_antes', tipo='entero', ancho=12),
+        Columna('Stock Después', 'stock_despues', tipo='entero', ancho=12),
+        Columna('Costo Unit.', 'costo_unitario', tipo='moneda', ancho=12),
+        Columna('Costo Total', 'costo_total', tipo='moneda', ancho=12),
+        Columna(
+            'Usuario', valor=_nombre_usuario, ancho=20, max_pdf=20,
+            campos=('usuario_id', 'usuario__nombres', 'usuario__apellidos')
+        ),
+        Columna(
+            'Observaciones', valor=lambda fila: fila['observaciones'] or 'N/A',
+            campos=('observaciones',), ancho=25
+        ),
+    ]
+    columnas_pdf = ('Fecha', 'Tipo', 'Producto', 'Cantidad', 'Stock Antes', 'Stock Después', 'Usuario')
+
+    def get_queryset(self):
+        movimientos = MovimientoInventario.objects.all()
+        p = self.parametros
+
+        if p.get('fecha_inicio'):
+            movimientos = movimientos.filter(**filtro_rango('fecha_movimiento', p['fecha_inicio']))
+        if p.get('fecha_fin'):
+            movimientos = movimientos.filter(**filtro_rango('fecha_movimiento', fecha_hasta=p['fecha_fin']))
+        if p.get('tipo_movimiento'):
+            movimientos = movimientos.filter(tipo_movimiento=p['tipo_movimiento'])
+        if p.get('producto'):
+            movimientos = movimientos.filter(producto_normal__producto_id=p['producto'])
+        if p.get('usuario'):
+            movimientos = movimientos.filter(usuario_id=p['usuario'])
+        if p.get('search'):
+            movimientos = movimientos.filter(
+                Q(producto_normal__producto__nombre__icontains=p['search']) |
+                Q(observaciones__icontains=p['search'])
+            )
+
+        return movimientos
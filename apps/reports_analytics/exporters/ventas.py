@@ -0,0 +1,90 @@
+# apps/reports_analytics/exporters/ventas.py
+
+"""
+Exportación general de ventas (panel de ventas)
+"""
+
+from decimal import Decimal
+
+from django.db.models import Sum
+from django.db.models.functions import Coalesce
+
+from apps.sales_management.models import Venta
+
+from ..utils import filtro_rango
+from .base import Columna, ExportacionBase
+
+
+ESTADOS_VENTA = dict(Venta.ESTADO_CHOICES)
+TIPOS_VENTA = dict(Venta.TIPO_VENTA_CHOICES)
+
+
+def _nombre_cliente(fila):
+    if not fila['cliente_id']:
+        return 'Público General'
+    return f"{fila['cliente__nombres']} {fila['cliente__apellidos']}"
+
+
+def _nombre_vendedor(fila):
+    return f"{fila['vendedor__nombres']} {fila['vendedor__apellidos']}".strip()
+
+
+class ExportacionVentas(ExportacionBase):
+    """Ventas filtradas por fecha, estado, tipo, vendedor y cliente"""
+    nombre = 'ventas'
+    titulo = 'REPORTE DE VENTAS'
+    hoja = 'Ventas'
+    tipo_reporte = 'EXPORTACION_VENTAS'
+    filtros = ('fecha_inicio', 'fecha_fin', 'estado', 'tipo_venta', 'vendedor', 'cliente')
+    orden = ('-fecha_venta',)
+
+    columnas = [
+        Columna('N° Venta', 'numero_venta', ancho=15),
+        Columna('Fecha', 'fecha_venta', tipo='fecha', ancho=18),
+        Columna(
+            'Cliente', valor=_nombre_cliente, ancho=25, max_pdf=20,
+            campos=('cliente_id', 'cliente__nombres', 'cliente__apellidos')
+        ),
+        Columna(
+            'Vendedor', valor=_nombre_vendedor, ancho=20, max_pdf=20,
+            campos=('vendedor__nombres', 'vendedor__apellidos')
+        ),
+        Columna(
+            'Tipo', valor=lambda fila: TIPOS_VENTA.get(fila['tipo_venta'], fila['tipo_venta']),
+            campos=('tipo_venta',), ancho=12
+        ),
+        Columna(
+            'Estado', valor=lambda fila: ESTADOS_VENTA.get(fila['estado'], fila['estado']),
+            campos=('estado',), ancho=12
+        ),
+        Columna('Subtotal', 'subtotal', tipo='moneda', ancho=12),
+        Columna('Descuento', 'descuento', tipo='moneda', ancho=12),
+        Columna('Total', 'total', tipo='moneda', ancho=12),
+        Columna('Pagado', 'monto_pagado', tipo='moneda', ancho=12),
+    ]
+    columnas_pdf = ('N° Venta', 'Fecha', 'Cliente', 'Tipo', 'Total', 'Estado')
+
+    def get_queryset(self):
+        ventas = Venta.objects.all()
+        p = self.parametros
+
+        if p.get('fecha_inicio'):
+            ventas = ventas.filter(**filtro_rango('fecha_venta', p['fecha_inicio']))
+        if p.get('fecha_fin'):
+            ventas = ventas.filter(**filtro_rango('fecha_venta', fecha_hasta=p['fecha_fin']))
+        if p.get('estado'):
+            ventas = ventas.filter(estado=p['estado'])
+        if p.get('tipo_venta'):
+            ventas = ventas.filter(tipo_venta=p['tipo_venta'])
+        if p.get('vendedor'):
+            ventas = ventas.filter(vendedor_id=p['vendedor'])
+        if p.get('cliente'):
+            ventas = ventas.filter(cliente_id=p['cliente'])
+
+        return ventas
+
+    def totales(self):
+        return self.consulta().aggregate(
+            total=Coalesce(Sum('total'), Decimal('0')),
+            monto_pagado=Coalesce(Sum('monto_pagado'), Decimal('0')),
+        )
@@ -0,0 +1,301 @@
+# apps/reports_analytics/exporters/writers.py
+
+"""
+Escritores de exportaciones: CSV, Excel (openpyxl write_only) y PDF (canvas)
+Todos consumen `ExportacionBase.iterar_filas()` fila por fila.
+"""
+
+import csv
+import tempfile
+
+from django.http import FileResponse, StreamingHttpResponse
+
+
+CONTENT_TYPES = {
+    'CSV': 'text/csv; charset=utf-8',
+    'EXCEL': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'PDF': 'application/pdf',
+}
+
+EXTENSIONES = {
+    'CSV': 'csv',
+    'EXCEL': 'xlsx',
+    'PDF': 'pdf',
+}
+
+COLOR_ENCABEZADO = '3B82F6'
+
+
+class _Eco:
+    """Pseudo-buffer para csv.writer: devuelve la línea en lugar de guardarla"""
+
+    def write(self, valor):
+        return valor
+
+
+# ============================================================================
+# CSV
+# ============================================================================
+
+def generar_csv(exportacion):
+    """
+    Generador de líneas CSV (str) para StreamingHttpResponse
+    Incluye BOM para que Excel detecte UTF-8.
+    """
+    writer = csv.writer(_Eco())
+    columnas = exportacion.columnas
+
+    yield '﻿'
+    yield writer.writerow([columna.titulo for columna in columnas])
+
+    for fila in exportacion.iterar_filas():
+        yield writer.writerow([
+            columna.como_texto(valor) if columna.tipo == 'fecha' else _csv_valor(valor)
+            for columna, valor in zip(columnas, fila)
+        ])
+
+    totales = exportacion.totales()
+    if totales:
+        yield writer.writerow(_fila_totales(columnas, totales, _csv_valor))
+
+
+def escribir_csv(exportacion, destino):
+    """Escribe el CSV completo en un archivo binario abierto"""
+    for linea in generar_csv(exportacion):
+        destino.write(linea.encode('utf-8'))
+
+
+def _csv_valor(valor):
+    return '' if valor is None else valor
+
+
+# ============================================================================
+# EXCEL (write_only)
+# ============================================================================
+
+def escribir_excel(exportacion, destino):
+    """
+    Escribe un .xlsx en modo write_only: cada fila se serializa al disco
+    apenas se agrega, sin mantener el libro completo en memoria.
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Font, PatternFill
+    from openpyxl.utils import get_column_letter
+
+    columnas = exportacion.columnas
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title=exportacion.hoja)
+
+    for indice, columna in enumerate(columnas, start=1):
+        ws.column_dimensions[get_column_letter(indice)].width = columna.ancho
+
+    # Título
+    titulo = WriteOnlyCell(ws, value=exportacion.titulo_completo())
+    titulo.font = Font(bold=True, size=14)
+    ws.append([titulo])
+    ws.append([])
+
+    # Encabezados
+    fill = PatternFill(start_color=COLOR_ENCABEZADO, end_color=COLOR_ENCABEZADO, fill_type='solid')
+    font = Font(bold=True, color='FFFFFF', size=11)
+    centrado = Alignment(horizontal='center', vertical='center')
+    encabezados = []
+    for columna in columnas:
+        celda = WriteOnlyCell(ws, value=columna.titulo)
+        celda.fill = fill
+        celda.font = font
+        celda.alignment = centrado
+        encabezados.append(celda)
+    ws.append(encabezados)
+
+    # Datos
+    monedas = {i for i, columna in enumerate(columnas) if columna.tipo == 'moneda'}
+    for fila in exportacion.iterar_filas():
+        valores = []
+        for indice, (columna, valor) in enumerate(zip(columnas, fila)):
+            valor = columna.como_celda(valor)
+            if indice in monedas:
+                celda = WriteOnlyCell(ws, value=valor)
+                celda.number_format = '$#,##0.00'
+                valores.append(celda)
+            else:
+                valores.append(valor)
+        ws.append(valores)
+
+    # Totales
+    totales = exportacion.totales()
+    if totales:
+        ws.append([])
+        negrita = Font(bold=True)
+
+        def _celda_total(valor):
+            celda = WriteOnlyCell(ws, value=float(valor) if valor != 'TOTALES:' else valor)
+            celda.font = negrita
+            if valor != 'TOTALES:':
+                celda.number_format = '$#,##0.00'
+            return celda
+
+        ws.append([
+            _celda_total(valor) if valor not in (None, '') else None
+            for valor in _fila_totales(columnas, totales, lambda v: v)
+        ])
+
+    wb.save(destino)
+
+
+# ============================================================================
+# PDF (canvas, página por página)
+# ============================================================================
+
+def escribir_pdf(exportacion, destino):
+    """
+    Escribe un PDF horizontal dibujando fila por fila sobre el canvas
+    (sin construir una tabla platypus con todas las filas en memoria).
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import landscape, letter
+    from reportlab.lib.units import inch
+    from reportlab.pdfgen import canvas
+
+    indices = exportacion.indices_pdf()
+    columnas = [exportacion.columnas[i] for i in indices]
+
+    ancho_pagina, alto_pagina = landscape(letter)
+    margen = 0.5 * inch
+    alto_fila = 14
+    ancho_util = ancho_pagina - 2 * margen
+    total_ancho = sum(columna.ancho for columna in columnas) or 1
+    anchos = [ancho_util * columna.ancho / total_ancho for columna in columnas]
+
+    pdf = canvas.Canvas(destino, pagesize=landscape(letter))
+    pdf.setTitle(exportacion.titulo_completo())
+
+    color_encabezado = colors.HexColor(f'#{COLOR_ENCABEZADO}')
+    color_texto = colors.HexColor('#1e293b')
+    color_alterno = colors.HexColor('#f8fafc')
+    color_borde = colors.HexColor('#e2e8f0')
+
+    def dibujar_fila(y, valores, fondo=None, fuente='Helvetica', tamano=8, color=color_texto):
+        if fondo is not None:
+            pdf.setFillColor(fondo)
+            pdf.rect(margen, y - 3, ancho_util, alto_fila, stroke=0, fill=1)
+        pdf.setStrokeColor(color_borde)
+        pdf.line(margen, y - 3, margen + ancho_util, y - 3)
+        pdf.setFillColor(color)
+        pdf.setFont(fuente, tamano)
+        x = margen
+        for columna, ancho, valor in zip(columnas, anchos, valores):
+            if columna.max_pdf:
+                valor = valor[:columna.max_pdf]
+            pdf.drawString(x + 2, y, valor)
+            x += ancho
+
+    def nueva_pagina(primera=False):
+        if not primera:
+            pdf.showPage()
+        y = alto_pagina - margen
+        if primera:
+            pdf.setFont('Helvetica-Bold', 16)
+            pdf.setFillColor(colors.HexColor('#0f172a'))
+            pdf.drawCentredString(ancho_pagina / 2, y - 10, exportacion.titulo_completo())
+            y -= 40
+        dibujar_fila(
+            y, [columna.titulo for columna in columnas],
+            fondo=color_encabezado, fuente='Helvetica-Bold', tamano=9, color=colors.whitesmoke
+        )
+        return y - alto_fila
+
+    y = nueva_pagina(primera=True)
+    par = False
+    for fila in exportacion.iterar_filas(limite=exportacion.limite_pdf):
+        if y < margen:
+            y = nueva_pagina()
+        valores = [columnas[i].como_texto(fila[indice]) for i, indice in enumerate(indices)]
+        dibujar_fila(y, valores, fondo=color_alterno if par else None)
+        par = not par
+        y -= alto_fila
+
+    totales = exportacion.totales()
+    if totales:
+        if y < margen:
+            y = nueva_pagina()
+        fila_totales = _fila_totales(exportacion.columnas, totales, lambda v: v)
+        valores = []
+        for indice in indices:
+            valor = fila_totales[indice]
+            if valor in (None, '') or valor == 'TOTALES:':
+                valores.append(valor or '')
+            else:
+                valores.append(f"${valor:,.2f}")
+        # Asegura que la etiqueta aparezca aunque su columna no se imprima en PDF
+        if 'TOTALES:' not in valores:
+            primera_total = next((i for i, v in enumerate(valores) if v), None)
+            if primera_total:
+                valores[primera_total - 1] = 'TOTAL:'
+        pdf.setStrokeColor(color_encabezado)
+        pdf.setLineWidth(2)
+        pdf.line(margen, y + alto_fila - 3, margen + ancho_util, y + alto_fila - 3)
+        pdf.setLineWidth(1)
+        dibujar_fila(y, valores, fuente='Helvetica-Bold', tamano=10)
+
+    pdf.save()
+
+
+# ============================================================================
+# RESPUESTAS HTTP
+# ============================================================================
+
+ESCRITORES = {
+    'CSV': escribir_csv,
+    'EXCEL': escribir_excel,
+    'PDF': escribir_pdf,
+}
+
+
+def escribir_exportacion(exportacion, formato, destino):
+    """Escribe la exportación en `destino` (archivo binario abierto)"""
+    ESCRITORES[formato](exportacion, destino)
+
+
+def respuesta_exportacion(exportacion, formato):
+    """
+    Respuesta HTTP de descarga
+    - CSV: StreamingHttpResponse, las filas viajan a medida que se leen
+    - Excel/PDF: se escriben a un archivo temporal en disco y se envían por
+      bloques con FileResponse
+    """
+    nombre = exportacion.nombre_archivo(EXTENSIONES[formato])
+
+    if formato == 'CSV':
+        response = StreamingHttpResponse(generar_csv(exportacion), content_type=CONTENT_TYPES['CSV'])
+        response['Content-Disposition'] = f'attachment; filename="{nombre}"'
+        return response
+
+    temporal = tempfile.TemporaryFile()
+    escribir_exportacion(exportacion, formato, temporal)
+    temporal.seek(0)
+    return FileResponse(
+        temporal,
+        as_attachment=True,
+        filename=nombre,
+        content_type=CONTENT_TYPES[formato]
+    )
+
+
+def _fila_totales(columnas, totales, convertir):
+    """
+    Fila de totales alineada con las columnas: cada total va bajo su campo y
+    la etiqueta 'TOTALES:' en la columna anterior al primer total.
+    """
+    fila = [''] * len(columnas)
+    primera = None
+    for indice, columna in enumerate(columnas):
+        if columna.campo in totales:
+            fila[indice] = convertir(totales[columna.campo] or 0)
+            if primera is None:
+                primera = indice
+    if primera:
+        fila[primera - 1] = 'TOTALES:'
+    return fila
@@ -5,20 +5,28 @@ Generador de datos para Dashboard en tiempo real
 Métricas principales del negocio
 """
 
+import logging
 from decimal import Decimal
 from django.db.models import Sum, Count, Avg, F, Q, DecimalField
-from django.db.models.functions import Coalesce, TruncDate
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from datetime import timedelta, datetime
 
 from apps.inventory_management.models import (
-    Producto, Quintal, ProductoNormal, Categoria
+    Producto, Quintal, ProductoNormal, Categoria, StockActual
 )
 from apps.sales_management.models import Venta, DetalleVenta, Cliente
 from apps.financial_management.models import Caja, MovimientoCaja, CajaChica
 from apps.stock_alert_system.models import AlertaStock
 
+from commercebox.db_router import en_replica_reportes
 
+from ..utils import agrupar_por_periodo, filtro_rango, inicio_del_dia
+
+logger = logging.getLogger('commercebox')
+
+
+@en_replica_reportes('fecha')
 class DashboardDataGenerator:
     """
     Genera datos para el dashboard principal
@@ -29,9 +37,10 @@ class DashboardDataGenerator:
         Args:
             fecha: Fecha para generar el dashboard (por defecto hoy)
         """
-        self.fecha = fecha or timezone.now().date()
-        self.inicio_dia = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        self.inicio_mes = timezone.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        self.fecha = fecha or timezone.localdate()
+        # Inicio del día y del mes en hora local del negocio (no UTC)
+        self.inicio_dia = inicio_del_dia(self.fecha)
+        self.inicio_mes = inicio_del_dia(self.fecha.replace(day=1))
     
     def generar_dashboard_completo(self):
         """
@@ -176,10 +185,13 @@ class DashboardDataGenerator:
         """
         Métricas de inventario
         """
-        quintales_stats = Quintal.objects.filter(estado='DISPONIBLE').aggregate(
-            total=Count('id'),
-            peso_total=Coalesce(Sum('peso_actual'), Decimal('0')),
-            valor_total=Coalesce(Sum(F('peso_actual') * F('costo_por_unidad')), Decimal('0'))
+        # Totales y valoración de la proyección StockActual
+        quintales_stats = StockActual.objects.filter(
+            producto__tipo_inventario='QUINTAL'
+        ).aggregate(
+            total=Coalesce(Sum('lotes'), 0),
+            peso_total=Coalesce(Sum('peso_disponible'), Decimal('0')),
+            valor_total=Coalesce(Sum('valor_costo'), Decimal('0'))
         )
         
         quintales_criticos = Quintal.objects.filter(
@@ -190,7 +202,7 @@ class DashboardDataGenerator:
         productos_stats = ProductoNormal.objects.aggregate(
             total=Count('id'),
             con_stock=Count('id', filter=Q(stock_actual__gt=0)),
-            valor_total=Coalesce(Sum(F('stock_actual') * F('costo_unitario')), Decimal('0'))
+            valor_total=Coalesce(Sum('producto__existencias__valor_costo'), Decimal('0'))
         )
         
         productos_criticos = ProductoNormal.objects.filter(
@@ -412,19 +424,22 @@ class DashboardDataGenerator:
         """
         Tendencia de ventas de los últimos 7 días
         """
-        hace_7_dias = self.inicio_dia - timedelta(days=7)
-        
-        ventas_diarias = Venta.objects.filter(
-            fecha_venta__gte=hace_7_dias,
-            estado='COMPLETADA'
-        ).annotate(
-            dia=TruncDate('fecha_venta')
-        ).values('dia').annotate(
+        hace_7_dias = self.fecha - timedelta(days=7)
+        
+        ventas_diarias = agrupar_por_periodo(
+            Venta.objects.filter(
+                **filtro_rango('fecha_venta', hace_7_dias),
+                estado='COMPLETADA'
+            ),
+            'fecha_venta',
             total=Sum('total'),
             cantidad=Count('id')
-        ).order_by('dia')
+        )
         
-        return list(ventas_diarias)
+        return [
+            {'dia': fila['periodo'], 'total': fila['total'], 'cantidad': fila['cantidad']}
+            for fila in ventas_diarias
+        ]
     
     def get_comparativas(self):
         """
@@ -460,50 +475,38 @@ class DashboardDataGenerator:
         Calcula la utilidad REAL de los últimos 7 días
         """
         try:
-            hoy = timezone.now().date()
+            hoy = timezone.localdate()
             hace_7_dias = hoy - timedelta(days=6)
             
+            ventas_por_dia = {
+                fila['periodo']: fila['total']
+                for fila in agrupar_por_periodo(
+                    Venta.objects.filter(
+                        **filtro_rango('fecha_venta', hace_7_dias, hoy),
+                        estado='COMPLETADA'
+                    ),
+                    'fecha_venta',
+                    total=Sum('total')
+                )
+            }
+            costos_por_dia = {
+                fila['periodo']: fila['total']
+                for fila in agrupar_por_periodo(
+                    DetalleVenta.objects.filter(
+                        **filtro_rango('venta__fecha_venta', hace_7_dias, hoy),
+                        venta__estado='COMPLETADA'
+                    ),
+                    'venta__fecha_venta',
+                    total=Sum('costo_total')
+                )
+            }
+            
             utilidad_por_dia = []
             
             for i in range(7):
                 dia = hace_7_dias + timedelta(days=i)
-                
-                ventas_dia = Venta.objects.filter(
-                    fecha_venta__date=dia,
-                    estado='COMPLETADA'
-                )
-                
-                total_ventas = ventas_dia.aggregate(
-                    total=Coalesce(Sum('total'), Decimal('0'))
-                )['total']
-                
-                detalles_dia = DetalleVenta.objects.filter(
-                    venta__fecha_venta__date=dia,
-                    venta__estado='COMPLETADA'
-                ).select_related('producto')
-                
-                costo_total = Decimal('0')
-                
-                if detalles_dia.exists():
-                    detalle_ejemplo = detalles_dia.first()
-                    tiene_costo_total = hasattr(detalle_ejemplo, 'costo_total')
-                    
-                    if tiene_costo_total:
-                        costo_total = detalles_dia.aggregate(
-                            total=Coalesce(Sum('costo_total'), Decimal('0'))
-                        )['total']
-                    else:
-                        for detalle in detalles_dia:
-                            costo_unitario = Decimal('0')
-                            
-                            if hasattr(detalle.producto, 'costo_unitario') and detalle.producto.costo_unitario:
-                                costo_unitario = detalle.producto.costo_unitario
-                            elif hasattr(detalle.producto, 'precio_compra') and detalle.producto.precio_compra:
-                                costo_unitario = detalle.producto.precio_compra
-                            elif hasattr(detalle.producto, 'productonormal') and hasattr(detalle.producto.productonormal, 'costo_unitario'):
-                                costo_unitario = detalle.producto.productonormal.costo_unitario
-                            
-                            costo_total += costo_unitario * detalle.cantidad
+                total_ventas = ventas_por_dia.get(dia) or Decimal('0')
+                costo_total = costos_por_dia.get(dia) or Decimal('0')
                 
                 utilidad_total = total_ventas - costo_total
                 margen_porcentaje = float((utilidad_total / total_ventas) * 100) if total_ventas > 0 else 0
@@ -519,11 +522,11 @@ class DashboardDataGenerator:
             return utilidad_por_dia
             
         except Exception as e:
-            print(f"ERROR en get_utilidad_diaria_semanal: {e}")
+            logger.error(f"ERROR en get_utilidad_diaria_semanal: {e}")
             import traceback
             traceback.print_exc()
             
-            hoy = timezone.now().date()
+            hoy = timezone.localdate()
             return [
                 {
                     'dia': (hoy - timedelta(days=i)).strftime('%Y-%m-%d'),
@@ -542,29 +545,38 @@ class DashboardDataGenerator:
             try:
                 from apps.inventory_management.models import Compra
                 
-                hoy = timezone.now().date()
+                hoy = timezone.localdate()
                 hace_7_dias = hoy - timedelta(days=6)
                 
+                # ✅ VENTAS por día (una consulta agrupada)
+                ventas_por_dia = {
+                    fila['periodo']: fila['total']
+                    for fila in agrupar_por_periodo(
+                        Venta.objects.filter(
+                            **filtro_rango('fecha_venta', hace_7_dias, hoy),
+                            estado='COMPLETADA'
+                        ),
+                        'fecha_venta',
+                        total=Sum('total')
+                    )
+                }
+                
+                # ✅ COMPRAS por día - fecha_compra es DateField, se agrupa directo
+                compras_por_dia = {
+                    fila['fecha_compra']: fila['total']
+                    for fila in Compra.objects.filter(
+                        fecha_compra__gte=hace_7_dias,
+                        fecha_compra__lte=hoy,
+                        estado__in=['RECIBIDA', 'PARCIAL']  # ✅ Solo compras recibidas
+                    ).values('fecha_compra').annotate(total=Sum('total')).order_by()
+                }
+                
                 balance_por_dia = []
                 
                 for i in range(7):
                     dia = hace_7_dias + timedelta(days=i)
-                    
-                    # ✅ VENTAS del día
-                    total_ventas = Venta.objects.filter(
-                        fecha_venta__date=dia,
-                        estado='COMPLETADA'
-                    ).aggregate(
-                        total=Coalesce(Sum('total'), Decimal('0'))
-                    )['total']
-                    
-                    # ✅ COMPRAS del día - MÉTODO CORRECTO
-                    total_compras = Compra.objects.filter(
-                        fecha_compra=dia,  # ✅ Coincide con tu modelo
-                        estado__in=['RECIBIDA', 'PARCIAL']  # ✅ Solo compras recibidas
-                    ).aggregate(
-                        total=Coalesce(Sum('total'), Decimal('0'))
-                    )['total']
+                    total_ventas = ventas_por_dia.get(dia) or Decimal('0')
+                    total_compras = compras_por_dia.get(dia) or Decimal('0')
                     
                     # Calcular balance
                     balance = total_ventas - total_compras
@@ -592,12 +604,12 @@ class DashboardDataGenerator:
                 return balance_por_dia
                 
             except Exception as e:
-                print(f"❌ ERROR en get_balance_compras_ventas_semanal: {e}")
+                logger.error(f"❌ ERROR en get_balance_compras_ventas_semanal: {e}")
                 import traceback
                 traceback.print_exc()
                 
                 # Fallback: retornar datos vacíos
-                hoy = timezone.now().date()
+                hoy = timezone.localdate()
                 return [
                     {
                         'dia': (hoy - timedelta(days=i)).strftime('%Y-%m-%d'),
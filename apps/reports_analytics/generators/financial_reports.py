@@ -17,7 +17,12 @@ from apps.financial_management.models import (
 from apps.sales_management.models import Venta, DetalleVenta
 from apps.financial_management.accounting.cost_calculator import CostCalculator
 
+from commercebox.db_router import en_replica_reportes
 
+from ..utils import agrupar_por_periodo, filtro_rango
+
+
+@en_replica_reportes()
 class FinancialReportGenerator:
     """
     Genera reportes financieros y de caja
@@ -46,10 +51,7 @@ class FinancialReportGenerator:
             dict: Movimientos de caja detallados
         """
         # Filtro base
-        filtros = {
-            'fecha_movimiento__date__gte': self.fecha_desde,
-            'fecha_movimiento__date__lte': self.fecha_hasta
-        }
+        filtros = filtro_rango('fecha_movimiento', self.fecha_desde, self.fecha_hasta)
         
         if caja_id:
             filtros['caja__id'] = caja_id
@@ -109,8 +111,7 @@ class FinancialReportGenerator:
         Análisis de arqueos de caja
         """
         arqueos = ArqueoCaja.objects.filter(
-            fecha_cierre__date__gte=self.fecha_desde,
-            fecha_cierre__date__lte=self.fecha_hasta
+            **filtro_rango('fecha_cierre', self.fecha_desde, self.fecha_hasta)
         ).select_related('caja', 'usuario_apertura', 'usuario_cierre').order_by('-fecha_cierre')
         
         arqueos_data = []
@@ -168,8 +169,7 @@ class FinancialReportGenerator:
         Análisis de caja chica
         """
         movimientos = MovimientoCajaChica.objects.filter(
-            fecha_movimiento__date__gte=self.fecha_desde,
-            fecha_movimiento__date__lte=self.fecha_hasta
+            **filtro_rango('fecha_movimiento', self.fecha_desde, self.fecha_hasta)
         ).select_related('caja_chica', 'usuario').order_by('-fecha_movimiento')
         
         # Gastos por categoría
@@ -226,16 +226,22 @@ class FinancialReportGenerator:
         """
         Análisis de rentabilidad del período
         """
+        ventas = Venta.objects.filter(
+            **filtro_rango('fecha_venta', self.fecha_desde, self.fecha_hasta),
+            estado='COMPLETADA'
+        )
+        
+        # Costo real de lo vendido, del libro de costos (capas FIFO y
+        # promedio ponderado)
+        from apps.inventory_management.services.valoracion_service import ValoracionService
+        costos_por_tipo = ValoracionService.costo_ventas_por(ventas, 'producto__tipo_inventario')
+        
         # Ventas y costos
-        detalles = DetalleVenta.objects.filter(
-            venta__fecha_venta__date__gte=self.fecha_desde,
-            venta__fecha_venta__date__lte=self.fecha_hasta,
-            venta__estado='COMPLETADA'
-        ).aggregate(
+        detalles = DetalleVenta.objects.filter(venta__in=ventas).aggregate(
             ventas_totales=Coalesce(Sum('total'), Decimal('0')),
-            costos_totales=Coalesce(Sum('costo_total'), Decimal('0')),
             descuentos_totales=Coalesce(Sum('descuento_monto'), Decimal('0'))
         )
+        detalles['costos_totales'] = sum(costos_por_tipo.values(), Decimal('0'))
         
         # Utilidad bruta
         utilidad_bruta = detalles['ventas_totales'] - detalles['costos_totales']
@@ -246,8 +252,7 @@ class FinancialReportGenerator:
         
         # Gastos de caja chica (gastos operativos)
         gastos_operativos = MovimientoCajaChica.objects.filter(
-            fecha_movimiento__date__gte=self.fecha_desde,
-            fecha_movimiento__date__lte=self.fecha_hasta,
+            **filtro_rango('fecha_movimiento', self.fecha_desde, self.fecha_hasta),
             tipo_movimiento='GASTO'
         ).aggregate(total=Coalesce(Sum('monto'), Decimal('0')))['total']
         
@@ -268,23 +273,17 @@ class FinancialReportGenerator:
         )
         
         # Rentabilidad por tipo de producto
-        por_tipo = DetalleVenta.objects.filter(
-            venta__fecha_venta__date__gte=self.fecha_desde,
-            venta__fecha_venta__date__lte=self.fecha_hasta,
-            venta__estado='COMPLETADA'
-        ).values('producto__tipo_inventario').annotate(
-            ventas=Sum('total'),
-            costos=Sum('costo_total')
-        ).annotate(
-            utilidad=ExpressionWrapper(
-                F('ventas') - F('costos'),
-                output_field=DecimalField(max_digits=12, decimal_places=2)
-            ),
-            margen=ExpressionWrapper(
-                ((F('ventas') - F('costos')) / F('ventas') * 100),
-                output_field=DecimalField(max_digits=5, decimal_places=2)
+        por_tipo = []
+        for fila in DetalleVenta.objects.filter(venta__in=ventas).values(
+            'producto__tipo_inventario'
+        ).annotate(ventas=Sum('total')).order_by('producto__tipo_inventario'):
+            fila['costos'] = costos_por_tipo.get(fila['producto__tipo_inventario'], Decimal('0'))
+            fila['utilidad'] = fila['ventas'] - fila['costos']
+            fila['margen'] = (
+                (fila['utilidad'] / fila['ventas'] * 100).quantize(Decimal('0.01'))
+                if fila['ventas'] else Decimal('0')
             )
-        )
+            por_tipo.append(fila)
         
         return {
             'periodo': {
@@ -311,7 +310,7 @@ class FinancialReportGenerator:
                 'valor_inventario': valor_inventario,
                 'roi_porcentaje': roi.quantize(Decimal('0.01'))
             },
-            'por_tipo_producto': list(por_tipo)
+            'por_tipo_producto': por_tipo
         }
     
     def reporte_flujo_efectivo(self):
@@ -325,44 +324,57 @@ class FinancialReportGenerator:
         from apps.sales_management.models import Pago
         
         entradas_efectivo = Pago.objects.filter(
-            venta__fecha_venta__date__gte=self.fecha_desde,
-            venta__fecha_venta__date__lte=self.fecha_hasta,
+            **filtro_rango('venta__fecha_venta', self.fecha_desde, self.fecha_hasta),
             venta__estado='COMPLETADA',
             forma_pago='EFECTIVO'
         ).aggregate(total=Coalesce(Sum('monto'), Decimal('0')))['total']
         
         entradas_tarjeta = Pago.objects.filter(
-            venta__fecha_venta__date__gte=self.fecha_desde,
-            venta__fecha_venta__date__lte=self.fecha_hasta,
+            **filtro_rango('venta__fecha_venta', self.fecha_desde, self.fecha_hasta),
             venta__estado='COMPLETADA',
             forma_pago__in=['TARJETA_DEBITO', 'TARJETA_CREDITO']
         ).aggregate(total=Coalesce(Sum('monto'), Decimal('0')))['total']
         
         # Salidas (gastos de caja chica)
         salidas = MovimientoCajaChica.objects.filter(
-            fecha_movimiento__date__gte=self.fecha_desde,
-            fecha_movimiento__date__lte=self.fecha_hasta,
+            **filtro_rango('fecha_movimiento', self.fecha_desde, self.fecha_hasta),
             tipo_movimiento='GASTO'
         ).aggregate(total=Coalesce(Sum('monto'), Decimal('0')))['total']
         
         # Flujo neto
         flujo_neto = entradas_efectivo - salidas
         
-        # Flujo por día
+        # Flujo por día (una consulta agrupada por tipo de flujo)
+        entradas_por_dia = {
+            fila['periodo']: fila['total']
+            for fila in agrupar_por_periodo(
+                Pago.objects.filter(
+                    **filtro_rango('venta__fecha_venta', self.fecha_desde, self.fecha_hasta),
+                    venta__estado='COMPLETADA',
+                    forma_pago='EFECTIVO'
+                ),
+                'venta__fecha_venta',
+                total=Sum('monto')
+            )
+        }
+        salidas_por_dia = {
+            fila['periodo']: fila['total']
+            for fila in agrupar_por_periodo(
+                MovimientoCajaChica.objects.filter(
+                    **filtro_rango('fecha_movimiento', self.fecha_desde, self.fecha_hasta),
+                    tipo_movimiento='GASTO'
+                ),
+                'fecha_movimiento',
+                total=Sum('monto')
+            )
+        }
+        
         flujo_diario = []
         fecha_actual = self.fecha_desde
         
         while fecha_actual <= self.fecha_hasta:
-            entradas_dia = Pago.objects.filter(
-                venta__fecha_venta__date=fecha_actual,
-                venta__estado='COMPLETADA',
-                forma_pago='EFECTIVO'
-            ).aggregate(total=Coalesce(Sum('monto'), Decimal('0')))['total']
-            
-            salidas_dia = MovimientoCajaChica.objects.filter(
-                fecha_movimiento__date=fecha_actual,
-                tipo_movimiento='GASTO'
-            ).aggregate(total=Coalesce(Sum('monto'), Decimal('0')))['total']
+            entradas_dia = entradas_por_dia.get(fecha_actual) or Decimal('0')
+            salidas_dia = salidas_por_dia.get(fecha_actual) or Decimal('0')
             
             flujo_diario.append({
                 'fecha': fecha_actual.isoformat() if hasattr(fecha_actual, 'isoformat') else str(fecha_actual),
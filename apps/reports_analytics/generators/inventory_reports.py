@@ -6,7 +6,9 @@ Análisis detallado de quintales y productos normales
 """
 
 from decimal import Decimal
-from django.db.models import Sum, Count, Avg, F, Q, DecimalField, ExpressionWrapper
+from django.db.models import (
+    Sum, Count, Avg, F, Q, DecimalField, ExpressionWrapper, OuterRef, Subquery
+)
 from django.db.models.functions import Coalesce
 from django.utils import timezone
 from datetime import timedelta
@@ -15,8 +17,14 @@ from apps.inventory_management.models import (
     Producto, Quintal, ProductoNormal, Categoria, Proveedor,
     MovimientoQuintal, MovimientoInventario
 )
+from apps.inventory_management.utils.unit_registry import RegistroUnidades
+
+from commercebox.db_router import en_replica_reportes
+
+from ..utils import filtro_rango, rango_fechas
 
 
+@en_replica_reportes()
 class InventoryReportGenerator:
     """
     Genera reportes detallados de inventario
@@ -42,7 +50,7 @@ class InventoryReportGenerator:
         quintales = Quintal.objects.filter(
             estado='DISPONIBLE',
             peso_actual__gt=0
-        ).select_related('producto', 'producto__categoria', 'proveedor', 'unidad_medida').annotate(
+        ).select_related('producto', 'producto__categoria', 'proveedor').annotate(
             valor_actual=ExpressionWrapper(
                 F('peso_actual') * F('costo_por_unidad'),
                 output_field=DecimalField(max_digits=10, decimal_places=2)
@@ -60,7 +68,7 @@ class InventoryReportGenerator:
                 'peso_actual': float(quintal.peso_actual),
                 'peso_vendido': float(quintal.peso_vendido()),
                 'porcentaje_restante': quintal.porcentaje_restante(),
-                'unidad': quintal.unidad_medida.abreviatura,
+                'unidad': RegistroUnidades.abreviatura(quintal.unidad_medida_id),
                 'costo_por_unidad': float(quintal.costo_por_unidad),
                 'valor_actual': float(quintal.valor_actual),
                 'fecha_recepcion': quintal.fecha_ingreso.date() if hasattr(quintal, 'fecha_ingreso') else None,
@@ -116,6 +124,52 @@ class InventoryReportGenerator:
             }
         }
     
+    def reporte_valorizacion_cierre(self):
+        """
+        Inventario valorizado al cierre de fecha_hasta y costo de ventas del
+        período, leídos del libro de costos (sin recorrer quintales)
+        
+        Returns:
+            dict: Saldos por producto al cierre
+        """
+        from apps.inventory_management.services.valoracion_service import ValoracionService
+        
+        inicio, fin = rango_fechas(self.fecha_desde or self.fecha_hasta, self.fecha_hasta)
+        cierre = ValoracionService.saldos(fin)
+        apertura = ValoracionService.saldos(inicio, productos=list(cierre)) if self.fecha_desde else {}
+        
+        productos = Producto.objects.filter(pk__in=list(cierre)).values_list(
+            'pk', 'codigo_barras', 'nombre', 'tipo_inventario', 'unidad_medida_base_id'
+        ).order_by('nombre')
+        
+        items = []
+        for pk, codigo, nombre, tipo, unidad_id in productos:
+            saldo = cierre[pk]
+            anterior = apertura.get(pk)
+            items.append({
+                'codigo': codigo,
+                'nombre': nombre,
+                'tipo_inventario': tipo,
+                'cantidad': float(saldo.cantidad),
+                'unidad': RegistroUnidades.abreviatura(unidad_id, 'kg') if tipo == 'QUINTAL' else 'und',
+                'valor': float(saldo.valor),
+                'costo_ventas_periodo': float(
+                    saldo.costo_ventas - (anterior.costo_ventas if anterior else 0)
+                ),
+            })
+        
+        return {
+            'periodo': {
+                'desde': self.fecha_desde,
+                'hasta': self.fecha_hasta
+            },
+            'items': items,
+            'totales': {
+                'valor_total': sum(i['valor'] for i in items),
+                'costo_ventas_periodo': sum(i['costo_ventas_periodo'] for i in items)
+            }
+        }
+    
     def reporte_por_categoria(self):
         """
         Análisis de inventario agrupado por categoría
@@ -180,7 +234,7 @@ class InventoryReportGenerator:
             estado='DISPONIBLE',
             peso_actual__lte=F('peso_inicial') * 0.1,
             peso_actual__gt=0
-        ).select_related('producto', 'proveedor', 'unidad_medida').annotate(
+        ).select_related('producto', 'proveedor').annotate(
             porcentaje=ExpressionWrapper(
                 (F('peso_actual') / F('peso_inicial')) * 100,
                 output_field=DecimalField(max_digits=5, decimal_places=2)
@@ -194,7 +248,7 @@ class InventoryReportGenerator:
             'peso_actual': float(q.peso_actual),
             'peso_inicial': float(q.peso_inicial),
             'porcentaje_restante': float(q.porcentaje),
-            'unidad': q.unidad_medida.abreviatura
+            'unidad': RegistroUnidades.abreviatura(q.unidad_medida_id)
         } for q in quintales_criticos]
         
         # Productos normales en stock crítico
@@ -233,7 +287,7 @@ class InventoryReportGenerator:
             fecha_vencimiento__isnull=False,
             fecha_vencimiento__lte=hoy + timedelta(days=7),
             fecha_vencimiento__gte=hoy
-        ).select_related('producto', 'unidad_medida').order_by('fecha_vencimiento')
+        ).select_related('producto').order_by('fecha_vencimiento')
         
         vencer_data = [{
             'codigo': q.codigo_quintal,  # ✅ CORRECTO
@@ -241,7 +295,7 @@ class InventoryReportGenerator:
             'fecha_vencimiento': q.fecha_vencimiento,
             'dias_restantes': (q.fecha_vencimiento - hoy).days,
             'peso_actual': float(q.peso_actual),
-            'unidad': q.unidad_medida.abreviatura
+            'unidad': RegistroUnidades.abreviatura(q.unidad_medida_id)
         } for q in proximos_vencer]
         
         return {
@@ -279,9 +333,8 @@ class InventoryReportGenerator:
         
         # Movimientos de quintales
         movimientos_quintales = MovimientoQuintal.objects.filter(
-            fecha_movimiento__date__gte=self.fecha_desde,
-            fecha_movimiento__date__lte=self.fecha_hasta
-        ).select_related('quintal', 'quintal__producto', 'usuario', 'unidad_medida')
+            **filtro_rango('fecha_movimiento', self.fecha_desde, self.fecha_hasta)
+        ).select_related('quintal', 'quintal__producto', 'usuario')
         
         quintales_movs = []
         for mov in movimientos_quintales:
@@ -293,15 +346,14 @@ class InventoryReportGenerator:
                 'peso_movimiento': float(mov.peso_movimiento),
                 'peso_antes': float(mov.peso_antes),
                 'peso_despues': float(mov.peso_despues),
-                'unidad': mov.unidad_medida.abreviatura,
+                'unidad': RegistroUnidades.abreviatura(mov.unidad_medida_id),
                 'usuario': mov.usuario.get_full_name(),
                 'observaciones': mov.observaciones
             })
         
         # Movimientos de productos normales
         movimientos_productos = MovimientoInventario.objects.filter(
-            fecha_movimiento__date__gte=self.fecha_desde,
-            fecha_movimiento__date__lte=self.fecha_hasta
+            **filtro_rango('fecha_movimiento', self.fecha_desde, self.fecha_hasta)
         ).select_related('producto_normal', 'producto_normal__producto', 'usuario')
         
         productos_movs = []
@@ -325,10 +377,15 @@ class InventoryReportGenerator:
             total_peso=Sum('peso_movimiento')
         )
         
-        resumen_productos = movimientos_productos.values('tipo_movimiento').annotate(
-            cantidad=Count('id'),
-            total_cantidad=Sum('cantidad')
-        )
+        # El alias `cantidad` chocaría con el campo MovimientoInventario.cantidad
+        resumen_productos = [
+            {'tipo_movimiento': fila['tipo_movimiento'], 'cantidad': fila['movimientos'],
+             'total_cantidad': fila['total_cantidad']}
+            for fila in movimientos_productos.values('tipo_movimiento').annotate(
+                movimientos=Count('id'),
+                total_cantidad=Sum('cantidad')
+            ).order_by()
+        ]
         
         return {
             'periodo': {
@@ -343,7 +400,7 @@ class InventoryReportGenerator:
             'movimientos_productos': {
                 'items': productos_movs,
                 'total': len(productos_movs),
-                'resumen': list(resumen_productos)
+                'resumen': resumen_productos
             }
         }
     
@@ -357,9 +414,11 @@ class InventoryReportGenerator:
         # Productos normales con ventas
         from apps.sales_management.models import DetalleVenta
         
+        # Stock del producto normal en la misma consulta (sin Producto.get() por fila)
+        inventario = ProductoNormal.objects.filter(producto=OuterRef('producto_id'))
+        
         productos_vendidos = DetalleVenta.objects.filter(
-            venta__fecha_venta__date__gte=self.fecha_desde,
-            venta__fecha_venta__date__lte=self.fecha_hasta,
+            **filtro_rango('venta__fecha_venta', self.fecha_desde, self.fecha_hasta),
             venta__estado='COMPLETADA',
             producto__tipo_inventario='NORMAL'
         ).values(
@@ -368,45 +427,40 @@ class InventoryReportGenerator:
             'producto__categoria__nombre'
         ).annotate(
             cantidad_vendida=Sum('cantidad_unidades'),
-            ventas_totales=Sum('total')
-        )
+            ventas_totales=Sum('total'),
+            stock_actual=Subquery(inventario.values('stock_actual')[:1]),
+            stock_minimo=Subquery(inventario.values('stock_minimo')[:1])
+        ).order_by()
         
+        dias_periodo = (self.fecha_hasta - self.fecha_desde).days or 1
         rotacion = []
         
         for item in productos_vendidos:
-            try:
-                producto = Producto.objects.get(id=item['producto__id'])
-                inventario = producto.inventario_normal
-                
-                # Cálculo de rotación
-                dias_periodo = (self.fecha_hasta - self.fecha_desde).days
-                if dias_periodo == 0:
-                    dias_periodo = 1
-                    
-                promedio_inventario = (inventario.stock_actual + inventario.stock_minimo) / 2
-                
-                if promedio_inventario > 0 and dias_periodo > 0:
-                    rotacion_periodo = item['cantidad_vendida'] / promedio_inventario
-                    rotacion_anual = (rotacion_periodo * 365) / dias_periodo
-                else:
-                    rotacion_anual = 0
-                
-                rotacion.append({
-                    'producto': item['producto__nombre'],
-                    'categoria': item['producto__categoria__nombre'],
-                    'cantidad_vendida': item['cantidad_vendida'],
-                    'ventas_totales': float(item['ventas_totales']),
-                    'stock_actual': inventario.stock_actual,
-                    'rotacion_anual': round(float(rotacion_anual), 2),
-                    'clasificacion': (
-                        'Alta rotación' if rotacion_anual >= 12 else
-                        'Rotación media' if rotacion_anual >= 6 else
-                        'Baja rotación'
-                    )
-                })
-            except Exception as e:
-                print(f"Error procesando producto {item['producto__id']}: {e}")
+            # Productos sin registro de inventario normal no tienen rotación calculable
+            if item['stock_actual'] is None:
                 continue
+            
+            promedio_inventario = (item['stock_actual'] + item['stock_minimo']) / 2
+            
+            if promedio_inventario > 0:
+                rotacion_periodo = item['cantidad_vendida'] / promedio_inventario
+                rotacion_anual = (rotacion_periodo * 365) / dias_periodo
+            else:
+                rotacion_anual = 0
+            
+            rotacion.append({
+                'producto': item['producto__nombre'],
+                'categoria': item['producto__categoria__nombre'],
+                'cantidad_vendida': item['cantidad_vendida'],
+                'ventas_totales': float(item['ventas_totales']),
+                'stock_actual': item['stock_actual'],
+                'rotacion_anual': round(float(rotacion_anual), 2),
+                'clasificacion': (
+                    'Alta rotación' if rotacion_anual >= 12 else
+                    'Rotación media' if rotacion_anual >= 6 else
+                    'Baja rotación'
+                )
+            })
         
         # Ordenar por rotación
         rotacion.sort(key=lambda x: x['rotacion_anual'], reverse=True)
@@ -425,42 +479,46 @@ class InventoryReportGenerator:
         Análisis de inventario por proveedor
         ✅ CORRECCIÓN COMPLETA: Quintales tienen relación directa con Proveedor
         """
-        # Obtener proveedores que tienen quintales
+        # Una sola consulta: agregados de quintales disponibles por proveedor
+        disponibles = Q(quintales__estado='DISPONIBLE')
         proveedores = Proveedor.objects.filter(
-            activo=True,
-            quintales__estado='DISPONIBLE'
-        ).distinct()
+            activo=True
+        ).annotate(
+            cantidad_quintales=Count('quintales', filter=disponibles),
+            peso_total=Coalesce(
+                Sum('quintales__peso_actual', filter=disponibles), Decimal('0')
+            ),
+            valor_total=Coalesce(
+                Sum(
+                    F('quintales__peso_actual') * F('quintales__costo_por_unidad'),
+                    filter=disponibles,
+                    output_field=DecimalField()
+                ),
+                Decimal('0')
+            ),
+            # Productos en el catálogo con quintales de este proveedor
+            productos_catalogo=Count(
+                'quintales__producto',
+                filter=Q(
+                    quintales__producto__tipo_inventario='QUINTAL',
+                    quintales__producto__activo=True
+                ),
+                distinct=True
+            )
+        ).filter(cantidad_quintales__gt=0)
         
         reporte = []
         
         for prov in proveedores:
-            # Quintales del proveedor (relación directa)
-            quintales = Quintal.objects.filter(
-                proveedor=prov,
-                estado='DISPONIBLE'
-            ).aggregate(
-                cantidad=Count('id'),
-                peso_total=Coalesce(Sum('peso_actual'), Decimal('0')),
-                valor_total=Coalesce(Sum(F('peso_actual') * F('costo_por_unidad')), Decimal('0'))
-            )
-            
-            # Productos en el catálogo (sin relación directa de proveedor)
-            # Contamos productos únicos que tienen quintales de este proveedor
-            productos_catalogo = Producto.objects.filter(
-                tipo_inventario='QUINTAL',
-                quintales__proveedor=prov,
-                activo=True
-            ).distinct().count()
-            
             reporte.append({
                 'proveedor': prov.nombre_comercial,
                 'ruc': prov.ruc_nit,
                 'quintales': {
-                    'cantidad': quintales['cantidad'],
-                    'peso_total': float(quintales['peso_total']),
-                    'valor': float(quintales['valor_total'])
+                    'cantidad': prov.cantidad_quintales,
+                    'peso_total': float(prov.peso_total),
+                    'valor': float(prov.valor_total)
                 },
-                'productos_catalogo': productos_catalogo,
+                'productos_catalogo': prov.productos_catalogo,
                 'contacto': {
                     'telefono': prov.telefono,
                     'email': prov.email
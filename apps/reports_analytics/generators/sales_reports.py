@@ -5,7 +5,7 @@ Análisis completo de ventas, rentabilidad, clientes y vendedores
 
 from decimal import Decimal
 from django.db.models import Sum, Count, Avg, F, Q, DecimalField, ExpressionWrapper, Max, Min
-from django.db.models.functions import Coalesce, TruncDate, TruncMonth, TruncWeek, ExtractHour, ExtractWeekDay
+from django.db.models.functions import Coalesce, TruncMonth, TruncWeek, ExtractHour, ExtractWeekDay
 from django.utils import timezone
 from datetime import timedelta, datetime
 
@@ -14,7 +14,12 @@ from apps.sales_management.models import (
 )
 from apps.inventory_management.models import Producto, Categoria, Marca
 
+from commercebox.db_router import en_replica_reportes
 
+from ..utils import agrupar_por_periodo, filtro_rango
+
+
+@en_replica_reportes()
 class SalesReportGenerator:
     """
     Genera reportes de ventas y análisis comercial
@@ -47,8 +52,7 @@ class SalesReportGenerator:
         """
         # Ventas del período
         ventas = Venta.objects.filter(
-            fecha_venta__date__gte=self.fecha_desde,
-            fecha_venta__date__lte=self.fecha_hasta,
+            **filtro_rango('fecha_venta', self.fecha_desde, self.fecha_hasta),
             estado='COMPLETADA'
         )
         
@@ -65,8 +69,7 @@ class SalesReportGenerator:
         
         # Calcular utilidad
         detalles = DetalleVenta.objects.filter(
-            venta__fecha_venta__date__gte=self.fecha_desde,
-            venta__fecha_venta__date__lte=self.fecha_hasta,
+            **filtro_rango('venta__fecha_venta', self.fecha_desde, self.fecha_hasta),
             venta__estado='COMPLETADA'
         ).aggregate(
             ventas_totales=Coalesce(Sum('total'), Decimal('0')),
@@ -82,8 +85,7 @@ class SalesReportGenerator:
         
         # Ventas por tipo de producto
         ventas_quintales = DetalleVenta.objects.filter(
-            venta__fecha_venta__date__gte=self.fecha_desde,
-            venta__fecha_venta__date__lte=self.fecha_hasta,
+            **filtro_rango('venta__fecha_venta', self.fecha_desde, self.fecha_hasta),
             venta__estado='COMPLETADA',
             producto__tipo_inventario='QUINTAL'
         ).aggregate(
@@ -93,8 +95,7 @@ class SalesReportGenerator:
         )
         
         ventas_normales = DetalleVenta.objects.filter(
-            venta__fecha_venta__date__gte=self.fecha_desde,
-            venta__fecha_venta__date__lte=self.fecha_hasta,
+            **filtro_rango('venta__fecha_venta', self.fecha_desde, self.fecha_hasta),
             venta__estado='COMPLETADA',
             producto__tipo_inventario='NORMAL'
         ).aggregate(
@@ -112,8 +113,7 @@ class SalesReportGenerator:
         
         # Formas de pago detalladas
         pagos = Pago.objects.filter(
-            venta__fecha_venta__date__gte=self.fecha_desde,
-            venta__fecha_venta__date__lte=self.fecha_hasta,
+            **filtro_rango('venta__fecha_venta', self.fecha_desde, self.fecha_hasta),
             venta__estado='COMPLETADA'
         ).values('forma_pago').annotate(
             total=Sum('monto'),
@@ -130,8 +130,7 @@ class SalesReportGenerator:
         
         # Análisis por marcas (TOP 10)
         ventas_por_marca = DetalleVenta.objects.filter(
-            venta__fecha_venta__date__gte=self.fecha_desde,
-            venta__fecha_venta__date__lte=self.fecha_hasta,
+            **filtro_rango('venta__fecha_venta', self.fecha_desde, self.fecha_hasta),
             venta__estado='COMPLETADA',
             producto__marca__isnull=False
         ).values(
@@ -189,32 +188,39 @@ class SalesReportGenerator:
         Ventas desglosadas por día
         ✅ MEJORADO: Incluye análisis de tendencias y promedios móviles
         """
-        ventas_diarias = Venta.objects.filter(
-            fecha_venta__date__gte=self.fecha_desde,
-            fecha_venta__date__lte=self.fecha_hasta,
-            estado='COMPLETADA'
-        ).annotate(
-            dia=TruncDate('fecha_venta')
-        ).values('dia').annotate(
+        ventas_diarias = agrupar_por_periodo(
+            Venta.objects.filter(
+                **filtro_rango('fecha_venta', self.fecha_desde, self.fecha_hasta),
+                estado='COMPLETADA'
+            ),
+            'fecha_venta',
             total_ventas=Sum('total'),
             cantidad_ventas=Count('id'),
             ticket_promedio=Avg('total'),
             total_iva=Sum('impuestos')
-        ).order_by('dia')
+        )
+        
+        # Costos por día en una sola consulta agrupada
+        costos_por_dia = {
+            fila['periodo']: fila['costos']
+            for fila in agrupar_por_periodo(
+                DetalleVenta.objects.filter(
+                    **filtro_rango('venta__fecha_venta', self.fecha_desde, self.fecha_hasta),
+                    venta__estado='COMPLETADA'
+                ),
+                'venta__fecha_venta',
+                costos=Coalesce(Sum('costo_total'), Decimal('0'))
+            )
+        }
         
         # Calcular utilidad por día
         resultado = []
         suma_movil_3_dias = []
         
         for idx, dia_data in enumerate(ventas_diarias):
-            detalles_dia = DetalleVenta.objects.filter(
-                venta__fecha_venta__date=dia_data['dia'],
-                venta__estado='COMPLETADA'
-            ).aggregate(
-                costos=Coalesce(Sum('costo_total'), Decimal('0'))
-            )
+            costos_dia = costos_por_dia.get(dia_data['periodo'], Decimal('0'))
             
-            utilidad = dia_data['total_ventas'] - detalles_dia['costos']
+            utilidad = dia_data['total_ventas'] - costos_dia
             margen = (
                 (utilidad / dia_data['total_ventas'] * 100)
                 if dia_data['total_ventas'] > 0 else Decimal('0')
@@ -227,7 +233,7 @@ class SalesReportGenerator:
             promedio_movil = sum(suma_movil_3_dias) / len(suma_movil_3_dias)
             
             resultado.append({
-                'fecha': dia_data['dia'],
+                'fecha': dia_data['periodo'],
                 'total_ventas': dia_data['total_ventas'],
                 'cantidad_ventas': dia_data['cantidad_ventas'],
                 'ticket_promedio': dia_data['ticket_promedio'].quantize(Decimal('0.01')),
@@ -263,8 +269,7 @@ class SalesReportGenerator:
         ✅ MEJORADO: Incluye análisis por marca y categoría
         """
         productos = DetalleVenta.objects.filter(
-            venta__fecha_venta__date__gte=self.fecha_desde,
-            venta__fecha_venta__date__lte=self.fecha_hasta,
+            **filtro_rango('venta__fecha_venta', self.fecha_desde, self.fecha_hasta),
             venta__estado='COMPLETADA'
         ).values(
             'producto__id',
@@ -308,8 +313,7 @@ class SalesReportGenerator:
         ✅ MEJORADO: Incluye participación de mercado y tendencias
         """
         categorias = DetalleVenta.objects.filter(
-            venta__fecha_venta__date__gte=self.fecha_desde,
-            venta__fecha_venta__date__lte=self.fecha_hasta,
+            **filtro_rango('venta__fecha_venta', self.fecha_desde, self.fecha_hasta),
             venta__estado='COMPLETADA'
         ).values(
             'producto__categoria__id',
@@ -371,8 +375,7 @@ class SalesReportGenerator:
         ✅ CORREGIDO: Usa 'nombres' y 'apellidos' en lugar de first_name/last_name
         """
         vendedores = Venta.objects.filter(
-            fecha_venta__date__gte=self.fecha_desde,
-            fecha_venta__date__lte=self.fecha_hasta,
+            **filtro_rango('fecha_venta', self.fecha_desde, self.fecha_hasta),
             estado='COMPLETADA'
         ).values(
             'vendedor__id',
@@ -390,8 +393,7 @@ class SalesReportGenerator:
         for idx, vend in enumerate(vendedores, 1):
             detalles = DetalleVenta.objects.filter(
                 venta__vendedor__id=vend['vendedor__id'],
-                venta__fecha_venta__date__gte=self.fecha_desde,
-                venta__fecha_venta__date__lte=self.fecha_hasta,
+                **filtro_rango('venta__fecha_venta', self.fecha_desde, self.fecha_hasta),
                 venta__estado='COMPLETADA'
             ).aggregate(
                 costos=Coalesce(Sum('costo_total'), Decimal('0'))
@@ -432,8 +434,7 @@ class SalesReportGenerator:
         ✅ MEJORADO: Incluye análisis de frecuencia y valor del cliente
         """
         clientes = Venta.objects.filter(
-            fecha_venta__date__gte=self.fecha_desde,
-            fecha_venta__date__lte=self.fecha_hasta,
+            **filtro_rango('fecha_venta', self.fecha_desde, self.fecha_hasta),
             estado='COMPLETADA',
             cliente__isnull=False
         ).values(
@@ -489,8 +490,7 @@ class SalesReportGenerator:
         ✅ MEJORADO: Incluye causas raíz y productos problemáticos
         """
         devoluciones = Devolucion.objects.filter(
-            fecha_devolucion__date__gte=self.fecha_desde,
-            fecha_devolucion__date__lte=self.fecha_hasta
+            **filtro_rango('fecha_devolucion', self.fecha_desde, self.fecha_hasta)
         ).select_related('venta_original', 'detalle_venta__producto')
         
         # Agrupar por motivo
@@ -515,8 +515,7 @@ class SalesReportGenerator:
         
         # Calcular porcentaje respecto a ventas
         ventas_totales = Venta.objects.filter(
-            fecha_venta__date__gte=self.fecha_desde,
-            fecha_venta__date__lte=self.fecha_hasta,
+            **filtro_rango('fecha_venta', self.fecha_desde, self.fecha_hasta),
             estado='COMPLETADA'
         ).aggregate(total=Coalesce(Sum('total'), Decimal('0')))
         
@@ -562,8 +561,7 @@ class SalesReportGenerator:
         
         # Ventas período actual
         actual = Venta.objects.filter(
-            fecha_venta__date__gte=self.fecha_desde,
-            fecha_venta__date__lte=self.fecha_hasta,
+            **filtro_rango('fecha_venta', self.fecha_desde, self.fecha_hasta),
             estado='COMPLETADA'
         ).aggregate(
             total=Coalesce(Sum('total'), Decimal('0')),
@@ -579,8 +577,7 @@ class SalesReportGenerator:
         
         # Ventas período anterior
         anterior = Venta.objects.filter(
-            fecha_venta__date__gte=fecha_desde_anterior,
-            fecha_venta__date__lte=fecha_hasta_anterior,
+            **filtro_rango('fecha_venta', fecha_desde_anterior, fecha_hasta_anterior),
             estado='COMPLETADA'
         ).aggregate(
             total=Coalesce(Sum('total'), Decimal('0')),
@@ -651,8 +648,7 @@ class SalesReportGenerator:
         """
         # Ventas por hora
         ventas_por_hora = Venta.objects.filter(
-            fecha_venta__date__gte=self.fecha_desde,
-            fecha_venta__date__lte=self.fecha_hasta,
+            **filtro_rango('fecha_venta', self.fecha_desde, self.fecha_hasta),
             estado='COMPLETADA'
         ).annotate(
             hora=ExtractHour('fecha_venta')
@@ -677,8 +673,7 @@ class SalesReportGenerator:
         
         # Ventas por día de la semana
         ventas_por_dia_semana = Venta.objects.filter(
-            fecha_venta__date__gte=self.fecha_desde,
-            fecha_venta__date__lte=self.fecha_hasta,
+            **filtro_rango('fecha_venta', self.fecha_desde, self.fecha_hasta),
             estado='COMPLETADA'
         ).annotate(
             dia_semana=ExtractWeekDay('fecha_venta')
@@ -727,8 +722,7 @@ class SalesReportGenerator:
         """
         # Productos con mejor margen
         mejor_margen = DetalleVenta.objects.filter(
-            venta__fecha_venta__date__gte=self.fecha_desde,
-            venta__fecha_venta__date__lte=self.fecha_hasta,
+            **filtro_rango('venta__fecha_venta', self.fecha_desde, self.fecha_hasta),
             venta__estado='COMPLETADA'
         ).values(
             'producto__nombre'
@@ -744,8 +738,7 @@ class SalesReportGenerator:
         
         # Productos con peor margen (pero positivo)
         peor_margen = DetalleVenta.objects.filter(
-            venta__fecha_venta__date__gte=self.fecha_desde,
-            venta__fecha_venta__date__lte=self.fecha_hasta,
+            **filtro_rango('venta__fecha_venta', self.fecha_desde, self.fecha_hasta),
             venta__estado='COMPLETADA'
         ).values(
             'producto__nombre'
@@ -6,17 +6,25 @@ Seguimiento completo de quintales desde origen hasta venta
 """
 
 from decimal import Decimal
-from django.db.models import Sum, Count, Avg, F, Q, DecimalField, ExpressionWrapper
-from django.db.models.functions import Coalesce
+from django.db.models import (
+    Sum, Count, Avg, F, Q, DecimalField, ExpressionWrapper, OuterRef, Subquery, Window
+)
+from django.db.models.functions import Coalesce, RowNumber
 from django.utils import timezone
 from datetime import timedelta
 
 from apps.inventory_management.models import (
     Quintal, MovimientoQuintal, Proveedor
 )
+from apps.inventory_management.utils.unit_registry import RegistroUnidades
 from apps.sales_management.models import DetalleVenta
 
+from commercebox.db_router import en_replica_reportes
+
+from ..utils import filtro_rango
+
 
+@en_replica_reportes()
 class TraceabilityReportGenerator:
     """
     Genera reportes de trazabilidad de quintales
@@ -80,7 +88,7 @@ class TraceabilityReportGenerator:
             'peso_actual': quintal.peso_actual,
             'peso_vendido': quintal.peso_vendido(),
             'porcentaje_restante': quintal.porcentaje_restante(),
-            'unidad': quintal.unidad_medida.abreviatura,
+            'unidad': RegistroUnidades.abreviatura(quintal.unidad_medida_id),
             'costo_total': quintal.costo_total,
             'costo_por_unidad': quintal.costo_por_unidad,
             'valor_restante': quintal.peso_actual * quintal.costo_por_unidad
@@ -243,8 +251,7 @@ class TraceabilityReportGenerator:
         # Quintales del proveedor
         quintales = Quintal.objects.filter(
             proveedor=proveedor,
-            fecha_recepcion__date__gte=self.fecha_desde,
-            fecha_recepcion__date__lte=self.fecha_hasta
+            **filtro_rango('fecha_ingreso', self.fecha_desde, self.fecha_hasta)
         ).select_related('producto')
         
         # Estadísticas generales
@@ -271,8 +278,7 @@ class TraceabilityReportGenerator:
         # Rendimiento de ventas
         ventas = DetalleVenta.objects.filter(
             quintal__proveedor=proveedor,
-            venta__fecha_venta__date__gte=self.fecha_desde,
-            venta__fecha_venta__date__lte=self.fecha_hasta,
+            **filtro_rango('venta__fecha_venta', self.fecha_desde, self.fecha_hasta),
             venta__estado='COMPLETADA'
         ).aggregate(
             total_vendido=Coalesce(Sum('total'), Decimal('0')),
@@ -286,27 +292,28 @@ class TraceabilityReportGenerator:
             if ventas['total_vendido'] > 0 else Decimal('0')
         )
         
-        # Tiempo promedio de rotación
-        quintales_agotados = quintales.filter(estado='AGOTADO')
-        if quintales_agotados.exists():
-            dias_rotacion = []
-            for q in quintales_agotados:
-                # Buscar última venta del quintal
-                ultima_venta = DetalleVenta.objects.filter(
-                    quintal=q,
-                    venta__estado='COMPLETADA'
-                ).order_by('-venta__fecha_venta').first()
-                
-                if ultima_venta:
-                    dias = (ultima_venta.venta.fecha_venta.date() - q.fecha_recepcion.date()).days
-                    dias_rotacion.append(dias)
-            
-            promedio_rotacion = (
-                sum(dias_rotacion) / len(dias_rotacion) 
-                if dias_rotacion else 0
-            )
-        else:
-            promedio_rotacion = 0
+        # Tiempo promedio de rotación: última venta de cada quintal agotado
+        ultima_venta = DetalleVenta.objects.filter(
+            quintal=OuterRef('pk'),
+            venta__estado='COMPLETADA'
+        ).order_by('-venta__fecha_venta').values('venta__fecha_venta')[:1]
+        
+        ciclos = quintales.filter(
+            estado='AGOTADO'
+        ).annotate(
+            ultima_venta=Subquery(ultima_venta)
+        ).filter(
+            ultima_venta__isnull=False
+        ).values_list('fecha_ingreso', 'ultima_venta')
+        
+        dias_rotacion = [
+            (timezone.localdate(vendido) - timezone.localdate(ingreso)).days
+            for ingreso, vendido in ciclos
+        ]
+        promedio_rotacion = (
+            sum(dias_rotacion) / len(dias_rotacion)
+            if dias_rotacion else 0
+        )
         
         return {
             'periodo': {
@@ -350,80 +357,99 @@ class TraceabilityReportGenerator:
         from apps.inventory_management.models import Producto
         
         try:
-            producto = Producto.objects.get(id=producto_id, tipo_inventario='QUINTAL')
+            producto = Producto.objects.select_related('categoria').get(
+                id=producto_id, tipo_inventario='QUINTAL'
+            )
         except Producto.DoesNotExist:
             return {'error': 'Producto no encontrado o no es tipo quintal'}
         
-        # Quintales disponibles ordenados por FIFO
+        orden_fifo = [F('fecha_ingreso').asc(), F('id').asc()]
+        
+        # Quintales disponibles ordenados por FIFO; la posición y el peso
+        # acumulado se calculan con funciones de ventana en la misma consulta
         quintales_disponibles = Quintal.objects.filter(
             producto=producto,
             estado='DISPONIBLE',
             peso_actual__gt=0
-        ).select_related('proveedor').order_by('fecha_recepcion')
+        ).select_related('proveedor').annotate(
+            orden_fifo=Window(RowNumber(), order_by=orden_fifo),
+            peso_acumulado=Window(Sum('peso_actual'), order_by=orden_fifo)
+        ).order_by(*orden_fifo)
         
+        hoy = timezone.localdate()
         quintales_data = []
+        peso_total = Decimal('0')
         for quintal in quintales_disponibles:
-            dias_inventario = (timezone.now().date() - quintal.fecha_recepcion.date()).days
-            
             quintales_data.append({
-                'codigo': quintal.codigo_unico,
+                'codigo': quintal.codigo_quintal,
                 'proveedor': quintal.proveedor.nombre_comercial,
-                'fecha_recepcion': quintal.fecha_recepcion,
-                'dias_en_inventario': dias_inventario,
+                'fecha_ingreso': quintal.fecha_ingreso,
+                'dias_en_inventario': (hoy - timezone.localdate(quintal.fecha_ingreso)).days,
                 'peso_inicial': quintal.peso_inicial,
                 'peso_actual': quintal.peso_actual,
+                'peso_acumulado': quintal.peso_acumulado,
                 'porcentaje_restante': quintal.porcentaje_restante(),
                 'fecha_vencimiento': quintal.fecha_vencimiento,
-                'orden_fifo': list(quintales_disponibles).index(quintal) + 1
+                'orden_fifo': quintal.orden_fifo
             })
+            peso_total = quintal.peso_acumulado
+        
+        # Cumplimiento FIFO: para cada venta, el quintal más antiguo que
+        # todavía tenía saldo al momento de vender (según el último
+        # movimiento registrado hasta esa fecha)
+        saldo_al_vender = MovimientoQuintal.objects.filter(
+            quintal=OuterRef('pk'),
+            fecha_movimiento__lte=OuterRef(OuterRef('venta__fecha_venta'))
+        ).order_by('-fecha_movimiento').values('peso_despues')[:1]
+        
+        anterior_con_saldo = Quintal.objects.filter(
+            producto=producto,
+            fecha_ingreso__lt=OuterRef('quintal__fecha_ingreso'),
+            fecha_ingreso__lte=OuterRef('venta__fecha_venta')
+        ).annotate(
+            saldo=Subquery(saldo_al_vender)
+        ).filter(
+            saldo__gt=0
+        ).order_by('fecha_ingreso')
         
         # Análisis de ventas recientes
         ventas_recientes = DetalleVenta.objects.filter(
             producto=producto,
-            venta__fecha_venta__date__gte=self.fecha_desde,
+            **filtro_rango('venta__fecha_venta', self.fecha_desde),
             venta__estado='COMPLETADA'
-        ).select_related('quintal').order_by('-venta__fecha_venta')[:20]
+        ).select_related('venta', 'quintal').annotate(
+            quintal_fifo=Subquery(anterior_con_saldo.values('codigo_quintal')[:1]),
+            quintal_fifo_ingreso=Subquery(anterior_con_saldo.values('fecha_ingreso')[:1])
+        ).order_by('-venta__fecha_venta')[:20]
         
         ventas_data = []
-        for venta in ventas_recientes:
+        violaciones_fifo = []
+        for detalle in ventas_recientes:
             ventas_data.append({
-                'fecha': venta.venta.fecha_venta,
-                'numero_venta': venta.venta.numero_venta,
-                'quintal_usado': venta.quintal.codigo_unico if venta.quintal else 'N/A',
-                'peso_vendido': venta.peso_vendido,
-                'precio_unitario': venta.precio_por_unidad_peso
+                'fecha': detalle.venta.fecha_venta,
+                'numero_venta': detalle.venta.numero_venta,
+                'quintal_usado': detalle.quintal.codigo_quintal if detalle.quintal else 'N/A',
+                'peso_vendido': detalle.peso_vendido,
+                'precio_unitario': detalle.precio_por_unidad_peso
             })
-        
-        # Verificar cumplimiento FIFO
-        # (verificar si se están usando los quintales más antiguos primero)
-        violaciones_fifo = []
-        
-        for venta in ventas_recientes:
-            if venta.quintal:
-                # Buscar si había quintales más antiguos disponibles en ese momento
-                quintales_anteriores = Quintal.objects.filter(
-                    producto=producto,
-                    fecha_recepcion__lt=venta.quintal.fecha_recepcion,
-                    fecha_recepcion__lte=venta.venta.fecha_venta
-                ).exclude(id=venta.quintal.id)
-                
-                # Verificar si tenían peso disponible
-                for q_ant in quintales_anteriores:
-                    # Buscar movimientos del quintal anterior hasta la fecha de la venta
-                    mov_anterior = MovimientoQuintal.objects.filter(
-                        quintal=q_ant,
-                        fecha_movimiento__lte=venta.venta.fecha_venta
-                    ).order_by('-fecha_movimiento').first()
-                    
-                    if mov_anterior and mov_anterior.peso_despues > 0:
-                        violaciones_fifo.append({
-                            'fecha_venta': venta.venta.fecha_venta,
-                            'numero_venta': venta.venta.numero_venta,
-                            'quintal_usado': venta.quintal.codigo_unico,
-                            'quintal_que_debia_usarse': q_ant.codigo_unico,
-                            'diferencia_dias': (venta.quintal.fecha_recepcion - q_ant.fecha_recepcion).days
-                        })
-                        break
+            
+            if detalle.quintal and detalle.quintal_fifo:
+                violaciones_fifo.append({
+                    'fecha_venta': detalle.venta.fecha_venta,
+                    'numero_venta': detalle.venta.numero_venta,
+                    'quintal_usado': detalle.quintal.codigo_quintal,
+                    'quintal_que_debia_usarse': detalle.quintal_fifo,
+                    'diferencia_dias': (
+                        detalle.quintal.fecha_ingreso - detalle.quintal_fifo_ingreso
+                    ).days
+                })
+        
+        if ventas_data:
+            porcentaje_cumplimiento = (
+                Decimal(len(ventas_data) - len(violaciones_fifo)) / len(ventas_data) * 100
+            )
+        else:
+            porcentaje_cumplimiento = Decimal('100')
         
         return {
             'producto': {
@@ -437,16 +463,13 @@ class TraceabilityReportGenerator:
             'quintales_disponibles': {
                 'items': quintales_data,
                 'total': len(quintales_data),
-                'peso_total': sum(q['peso_actual'] for q in quintales_data)
+                'peso_total': peso_total
             },
             'ventas_recientes': ventas_data,
             'cumplimiento_fifo': {
                 'violaciones': violaciones_fifo,
                 'total_violaciones': len(violaciones_fifo),
-                'porcentaje_cumplimiento': (
-                    ((len(ventas_data) - len(violaciones_fifo)) / len(ventas_data) * 100)
-                    if len(ventas_data) > 0 else Decimal('100')
-                ).quantize(Decimal('0.01'))
+                'porcentaje_cumplimiento': porcentaje_cumplimiento.quantize(Decimal('0.01'))
             }
         }
     
@@ -454,11 +477,14 @@ class TraceabilityReportGenerator:
         """
         Análisis del ciclo de vida completo de quintales
         """
-        # Quintales del período
+        # Quintales del período con su número de ventas
         quintales = Quintal.objects.filter(
-            fecha_recepcion__date__gte=self.fecha_desde,
-            fecha_recepcion__date__lte=self.fecha_hasta
-        ).select_related('producto', 'proveedor')
+            **filtro_rango('fecha_ingreso', self.fecha_desde, self.fecha_hasta)
+        ).select_related('producto', 'proveedor').annotate(
+            ventas_realizadas=Count(
+                'detalleventa', filter=Q(detalleventa__venta__estado='COMPLETADA')
+            )
+        )
         
         # Clasificar por ciclo de vida
         analisis = {
@@ -468,28 +494,22 @@ class TraceabilityReportGenerator:
             'agotados': []
         }
         
+        hoy = timezone.localdate()
         for quintal in quintales:
             data = {
-                'codigo': quintal.codigo_unico,
+                'codigo': quintal.codigo_quintal,
                 'producto': quintal.producto.nombre,
                 'proveedor': quintal.proveedor.nombre_comercial,
-                'fecha_recepcion': quintal.fecha_recepcion,
+                'fecha_ingreso': quintal.fecha_ingreso,
                 'peso_inicial': quintal.peso_inicial,
                 'peso_actual': quintal.peso_actual,
-                'dias_inventario': (timezone.now().date() - quintal.fecha_recepcion.date()).days
+                'dias_inventario': (hoy - timezone.localdate(quintal.fecha_ingreso)).days,
+                'ventas_realizadas': quintal.ventas_realizadas
             }
             
-            # Contar ventas
-            num_ventas = DetalleVenta.objects.filter(
-                quintal=quintal,
-                venta__estado='COMPLETADA'
-            ).count()
-            
-            data['ventas_realizadas'] = num_ventas
-            
             if quintal.estado == 'AGOTADO':
                 analisis['agotados'].append(data)
-            elif num_ventas == 0:
+            elif quintal.ventas_realizadas == 0:
                 analisis['nuevos_sin_vender'].append(data)
             elif quintal.porcentaje_restante() <= 10:
                 analisis['proximos_agotar'].append(data)
@@ -497,7 +517,7 @@ class TraceabilityReportGenerator:
                 analisis['en_venta_activa'].append(data)
         
         # Estadísticas
-        total = quintales.count()
+        total = sum(len(items) for items in analisis.values())
         
         return {
             'periodo': {
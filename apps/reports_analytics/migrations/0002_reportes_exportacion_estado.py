@@ -0,0 +1,80 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reports_analytics", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="reporteguardado",
+            name="estado",
+            field=models.CharField(
+                choices=[
+                    ("PENDIENTE", "Pendiente"),
+                    ("PROCESANDO", "Procesando"),
+                    ("COMPLETADO", "Completado"),
+                    ("ERROR", "Error"),
+                ],
+                default="COMPLETADO",
+                help_text="Estado de generación (los reportes grandes se generan en segundo plano)",
+                max_length=20,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="configuracionreporte",
+            name="tipo_reporte",
+            field=models.CharField(
+                choices=[
+                    ("VENTAS_DIARIAS", "Ventas Diarias"),
+                    ("VENTAS_MENSUALES", "Ventas Mensuales"),
+                    ("INVENTARIO_VALORIZADO", "Inventario Valorizado"),
+                    ("RENTABILIDAD_PRODUCTOS", "Rentabilidad por Producto"),
+                    ("MOVIMIENTOS_CAJA", "Movimientos de Caja"),
+                    ("TRAZABILIDAD_QUINTALES", "Trazabilidad de Quintales"),
+                    ("PRODUCTOS_CRITICOS", "Productos Críticos"),
+                    ("COMPARATIVO_PERIODOS", "Comparativo entre Períodos"),
+                    ("ARQUEOS_CAJA", "Arqueos de Caja"),
+                    ("ANALISIS_CLIENTES", "Análisis de Clientes"),
+                    ("VENTAS_POR_VENDEDOR", "Ventas por Vendedor"),
+                    ("DASHBOARD_EJECUTIVO", "Dashboard Ejecutivo"),
+                    ("EXPORTACION_VENTAS", "Exportación de Ventas"),
+                    (
+                        "EXPORTACION_MOVIMIENTOS",
+                        "Exportación de Movimientos de Inventario",
+                    ),
+                ],
+                max_length=50,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="reporteguardado",
+            name="tipo_reporte",
+            field=models.CharField(
+                choices=[
+                    ("VENTAS_DIARIAS", "Ventas Diarias"),
+                    ("VENTAS_MENSUALES", "Ventas Mensuales"),
+                    ("INVENTARIO_VALORIZADO", "Inventario Valorizado"),
+                    ("RENTABILIDAD_PRODUCTOS", "Rentabilidad por Producto"),
+                    ("MOVIMIENTOS_CAJA", "Movimientos de Caja"),
+                    ("TRAZABILIDAD_QUINTALES", "Trazabilidad de Quintales"),
+                    ("PRODUCTOS_CRITICOS", "Productos Críticos"),
+                    ("COMPARATIVO_PERIODOS", "Comparativo entre Períodos"),
+                    ("ARQUEOS_CAJA", "Arqueos de Caja"),
+                    ("ANALISIS_CLIENTES", "Análisis de Clientes"),
+                    ("VENTAS_POR_VENDEDOR", "Ventas por Vendedor"),
+                    ("DASHBOARD_EJECUTIVO", "Dashboard Ejecutivo"),
+                    ("EXPORTACION_VENTAS", "Exportación de Ventas"),
+                    (
+                        "EXPORTACION_MOVIMIENTOS",
+                        "Exportación de Movimientos de Inventario",
+                    ),
+                ],
+                db_index=True,
+                max_length=50,
+            ),
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reports_analytics", "0002_reportes_exportacion_estado"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="reporteguardado",
+            name="clave_cache",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                help_text="Hash de (reporte, fechas, filtros, versión de datos) para reutilizar resultados",
+                max_length=64,
+            ),
+        ),
+        migrations.AddField(
+            model_name="reporteguardado",
+            name="progreso",
+            field=models.PositiveSmallIntegerField(
+                default=100,
+                help_text="Porcentaje de avance de la generación en segundo plano",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="configuracionreporte",
+            name="tipo_reporte",
+            field=models.CharField(
+                choices=[
+                    ("VENTAS_DIARIAS", "Ventas Diarias"),
+                    ("VENTAS_MENSUALES", "Ventas Mensuales"),
+                    ("INVENTARIO_VALORIZADO", "Inventario Valorizado"),
+                    ("RENTABILIDAD_PRODUCTOS", "Rentabilidad por Producto"),
+                    ("MOVIMIENTOS_CAJA", "Movimientos de Caja"),
+                    ("TRAZABILIDAD_QUINTALES", "Trazabilidad de Quintales"),
+                    ("PRODUCTOS_CRITICOS", "Productos Críticos"),
+                    ("COMPARATIVO_PERIODOS", "Comparativo entre Períodos"),
+                    ("ARQUEOS_CAJA", "Arqueos de Caja"),
+                    ("ANALISIS_CLIENTES", "Análisis de Clientes"),
+                    ("VENTAS_POR_VENDEDOR", "Ventas por Vendedor"),
+                    ("DASHBOARD_EJECUTIVO", "Dashboard Ejecutivo"),
+                    ("EXPORTACION_VENTAS", "Exportación de Ventas"),
+                    (
+                        "EXPORTACION_MOVIMIENTOS",
+                        "Exportación de Movimientos de Inventario",
+                    ),
+                    ("REPORTE_ANALITICO", "Reporte Analítico"),
+                ],
+                max_length=50,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="reporteguardado",
+            name="tipo_reporte",
+            field=models.CharField(
+                choices=[
+                    ("VENTAS_DIARIAS", "Ventas Diarias"),
+                    ("VENTAS_MENSUALES", "Ventas Mensuales"),
+                    ("INVENTARIO_VALORIZADO", "Inventario Valorizado"),
+                    ("RENTABILIDAD_PRODUCTOS", "Rentabilidad por Producto"),
+                    ("MOVIMIENTOS_CAJA", "Movimientos de Caja"),
+                    ("TRAZABILIDAD_QUINTALES", "Trazabilidad de Quintales"),
+                    ("PRODUCTOS_CRITICOS", "Productos Críticos"),
+                    ("COMPARATIVO_PERIODOS", "Comparativo entre Períodos"),
+                    ("ARQUEOS_CAJA", "Arqueos de Caja"),
+                    ("ANALISIS_CLIENTES", "Análisis de Clientes"),
+                    ("VENTAS_POR_VENDEDOR", "Ventas por Vendedor"),
+                    ("DASHBOARD_EJECUTIVO", "Dashboard Ejecutivo"),
+                    ("EXPORTACION_VENTAS", "Exportación de Ventas"),
+                    (
+                        "EXPORTACION_MOVIMIENTOS",
+                        "Exportación de Movimientos de Inventario",
+                    ),
+                    ("REPORTE_ANALITICO", "Reporte Analítico"),
+                ],
+                db_index=True,
+                max_length=50,
+            ),
+        ),
+    ]
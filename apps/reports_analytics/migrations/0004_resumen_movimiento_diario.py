@@ -0,0 +1,65 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("inventory_management", "0006_alter_quintal_codigo_quintal"),
+        ("reports_analytics", "0003_reportes_ejecucion_cache"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ResumenMovimientoDiario",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("fecha", models.DateField(db_index=True)),
+                ("tipo_movimiento", models.CharField(max_length=20)),
+                ("movimientos", models.PositiveIntegerField(default=0)),
+                (
+                    "cantidad",
+                    models.BigIntegerField(
+                        default=0,
+                        help_text="Suma de cantidades (positivas entradas, negativas salidas)",
+                    ),
+                ),
+                (
+                    "producto",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="resumenes_movimiento",
+                        to="inventory_management.producto",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Resumen Diario de Movimientos",
+                "verbose_name_plural": "Resúmenes Diarios de Movimientos",
+                "db_table": "rpt_resumen_movimiento_diario",
+                "ordering": ["-fecha"],
+                "indexes": [
+                    models.Index(
+                        fields=["tipo_movimiento", "fecha"],
+                        name="rpt_resumen_tipo_mo_78ea2a_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="resumenmovimientodiario",
+            constraint=models.UniqueConstraint(
+                fields=("fecha", "producto", "tipo_movimiento"),
+                name="rpt_resumen_mov_unico",
+            ),
+        ),
+    ]
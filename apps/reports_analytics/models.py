@@ -4,6 +4,7 @@ from django.db import models
 from django.core.validators import MinValueValidator
 from django.utils import timezone
 from decimal import Decimal
+import os
 import uuid
 
 
@@ -28,6 +29,9 @@ class ReporteGuardado(models.Model):
         ('ANALISIS_CLIENTES', 'Análisis de Clientes'),
         ('VENTAS_POR_VENDEDOR', 'Ventas por Vendedor'),
         ('DASHBOARD_EJECUTIVO', 'Dashboard Ejecutivo'),
+        ('EXPORTACION_VENTAS', 'Exportación de Ventas'),
+        ('EXPORTACION_MOVIMIENTOS', 'Exportación de Movimientos de Inventario'),
+        ('REPORTE_ANALITICO', 'Reporte Analítico'),
     ]
     
     FORMATO_CHOICES = [
@@ -37,6 +41,13 @@ class ReporteGuardado(models.Model):
         ('JSON', 'JSON'),
     ]
     
+    ESTADO_CHOICES = [
+        ('PENDIENTE', 'Pendiente'),
+        ('PROCESANDO', 'Procesando'),
+        ('COMPLETADO', 'Completado'),
+        ('ERROR', 'Error'),
+    ]
+    
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     
     # Identificación
@@ -44,6 +55,22 @@ class ReporteGuardado(models.Model):
         max_length=200,
         help_text="Nombre descriptivo del reporte"
     )
+    estado = models.CharField(
+        max_length=20,
+        choices=ESTADO_CHOICES,
+        default='COMPLETADO',
+        help_text="Estado de generación (los reportes grandes se generan en segundo plano)"
+    )
+    progreso = models.PositiveSmallIntegerField(
+        default=100,
+        help_text="Porcentaje de avance de la generación en segundo plano"
+    )
+    clave_cache = models.CharField(
+        max_length=64,
+        blank=True,
+        db_index=True,
+        help_text="Hash de (reporte, fechas, filtros, versión de datos) para reutilizar resultados"
+    )
     tipo_reporte = models.CharField(
         max_length=50,
         choices=TIPO_REPORTE_CHOICES,
@@ -109,6 +136,13 @@ class ReporteGuardado(models.Model):
     
     def __str__(self):
         return f"{self.nombre} - {self.fecha_generacion.strftime('%d/%m/%Y')}"
+    
+    @property
+    def nombre_archivo(self):
+        """Nombre del archivo adjunto (sin la ruta de almacenamiento)"""
+        if not self.archivo:
+            return ''
+        return os.path.basename(self.archivo.name)
 
 
 # ============================================================================
@@ -241,6 +275,51 @@ class SnapshotDashboard(models.Model):
         return f"Snapshot - {self.fecha_snapshot.strftime('%d/%m/%Y %H:%M')}"
 
 
+# ============================================================================
+# RESUMEN DIARIO DE MOVIMIENTOS (Rollup)
+# ============================================================================
+
+class ResumenMovimientoDiario(models.Model):
+    """
+    Movimientos de inventario agregados por día, producto y tipo
+
+    Lo llena la tarea nocturna `actualizar_resumen_movimientos` para los
+    días cerrados; los totales del listado de movimientos suman estas
+    filas y solo calculan en vivo los días posteriores al último resumido.
+    """
+    fecha = models.DateField(db_index=True)
+    producto = models.ForeignKey(
+        'inventory_management.Producto',
+        on_delete=models.CASCADE,
+        related_name='resumenes_movimiento'
+    )
+    tipo_movimiento = models.CharField(max_length=20)
+
+    movimientos = models.PositiveIntegerField(default=0)
+    cantidad = models.BigIntegerField(
+        default=0,
+        help_text="Suma de cantidades (positivas entradas, negativas salidas)"
+    )
+
+    class Meta:
+        verbose_name = 'Resumen Diario de Movimientos'
+        verbose_name_plural = 'Resúmenes Diarios de Movimientos'
+        ordering = ['-fecha']
+        db_table = 'rpt_resumen_movimiento_diario'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['fecha', 'producto', 'tipo_movimiento'],
+                name='rpt_resumen_mov_unico'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['tipo_movimiento', 'fecha']),
+        ]
+
+    def __str__(self):
+        return f"{self.fecha} - {self.tipo_movimiento}: {self.movimientos}"
+
+
 # ============================================================================
 # SIGNALS
 # ============================================================================
@@ -0,0 +1,8 @@
+from .report_execution_service import ReportExecutionService, REPORTES
+from .resumen_movimientos import ResumenMovimientosService
+
+__all__ = [
+    'ReportExecutionService',
+    'REPORTES',
+    'ResumenMovimientosService',
+]
@@ -0,0 +1,525 @@
+# apps/reports_analytics/services/report_execution_service.py
+
+"""
+Ejecución de reportes analíticos con caché de resultados.
+
+Cada ejecución se identifica por una clave calculada a partir de
+(reporte, rango de fechas, filtros, versión de datos):
+
+- Si el resultado ya existe (caché o ReporteGuardado completado) se sirve
+  directamente sin volver a consultar la base de datos.
+- Si no existe, se calcula en línea o se encola una tarea Celery que guarda
+  el JSON y el archivo renderizado en ReporteGuardado, informando el progreso.
+  resolver() decide: los reportes marcados como pesados y los rangos de más
+  de REPORTES_DIAS_ASINCRONO días van a segundo plano cuando quien llama
+  puede consultar el progreso (api_estado_ejecucion).
+
+La versión de datos es un contador en caché que se incrementa cada vez que
+cambian ventas, inventario o caja (ver signals.py). Los períodos cerrados
+(fecha_hasta anterior a hoy) casi nunca cambian, pero pueden hacerlo: una
+venta anulada, una devolución o una venta sincronizada desde un POS fuera
+de línea con su fecha original. Por eso su clave no incluye la versión
+global sino una versión por mes, que solo se incrementa cuando cambia un
+registro con fecha de ese mes, y el resultado expira a las
+REPORTES_CACHE_TIMEOUT_CERRADO como red de seguridad para cambios hechos
+sin señales.
+"""
+
+import hashlib
+import json
+import logging
+from collections import namedtuple
+from datetime import datetime, timedelta
+from uuid import UUID
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from ..generators import (
+    DashboardDataGenerator,
+    FinancialReportGenerator,
+    InventoryReportGenerator,
+    SalesReportGenerator,
+    TraceabilityReportGenerator,
+)
+
+logger = logging.getLogger('commercebox')
+
+
+CLAVE_VERSION_DATOS = 'reportes:version_datos'
+# Cambios sin fecha conocida (cargas masivas): invalida todos los períodos cerrados
+CLAVE_VERSION_HISTORICO = 'reportes:version_historico'
+PREFIJO_VERSION_MES = 'reportes:version_mes:'
+PREFIJO_RESULTADO = 'reportes:resultado:'
+
+# Resultado de resolver(): datos calculados o la ejecución en segundo plano
+Resolucion = namedtuple('Resolucion', ['datos', 'desde_cache', 'ejecucion'])
+
+
+def _uuid(valor):
+    """Tipo de filtro para ids: valida el UUID y lo guarda como texto (JSON)"""
+    return str(UUID(str(valor)))
+
+
+class DefinicionReporte:
+    """
+    Describe cómo ejecutar un reporte registrado
+
+    Args:
+        generador: Clase generadora (SalesReportGenerator, ...)
+        metodo: Nombre del método del generador que produce los datos
+        titulo: Nombre legible del reporte
+        usa_fechas: Si el generador recibe el rango de fechas
+        periodo_cerrable: Si el resultado de un período pasado es inmutable
+            (False cuando el reporte mezcla datos actuales, ej: stock)
+        filtros: Parámetros GET adicionales que se pasan al método; cada uno
+            es un nombre o una tupla (nombre, tipo) para convertir el valor
+        kwargs: Argumentos fijos para el método (los filtros los reemplazan)
+        dias_defecto: Días del período cuando no se indican fechas
+            (None = ReportExecutionService.DIAS_PERIODO_DEFAULT)
+        pesado: Si se ejecuta en segundo plano aunque el rango sea corto
+    """
+
+    def __init__(self, generador, metodo, titulo, usa_fechas=True,
+                 periodo_cerrable=True, filtros=(), kwargs=None,
+                 dias_defecto=None, pesado=False):
+        self.generador = generador
+        self.metodo = metodo
+        self.titulo = titulo
+        self.usa_fechas = usa_fechas
+        self.periodo_cerrable = usa_fechas and periodo_cerrable
+        self.filtros = tuple(
+            filtro if isinstance(filtro, tuple) else (filtro, str)
+            for filtro in filtros
+        )
+        self.kwargs = kwargs or {}
+        self.dias_defecto = dias_defecto
+        self.pesado = pesado
+
+
+REPORTES = {
+    # Ventas
+    'ventas_periodo': DefinicionReporte(
+        SalesReportGenerator, 'reporte_ventas_periodo', 'Ventas por Período'),
+    'ventas_diarias': DefinicionReporte(
+        SalesReportGenerator, 'reporte_ventas_diarias', 'Ventas Diarias'),
+    'productos_top': DefinicionReporte(
+        SalesReportGenerator, 'reporte_productos_mas_vendidos', 'Productos Más Vendidos',
+        filtros=(('limite', int),), kwargs={'limite': 20}),
+    'ventas_categorias': DefinicionReporte(
+        SalesReportGenerator, 'reporte_ventas_por_categoria', 'Ventas por Categoría'),
+    'ventas_vendedores': DefinicionReporte(
+        SalesReportGenerator, 'reporte_ventas_por_vendedor', 'Ventas por Vendedor'),
+    'clientes_top': DefinicionReporte(
+        SalesReportGenerator, 'reporte_clientes_top', 'Clientes Top',
+        filtros=(('limite', int),), kwargs={'limite': 20}),
+    'ventas_horarios': DefinicionReporte(
+        SalesReportGenerator, 'reporte_horarios_ventas', 'Ventas por Horario'),
+    'devoluciones': DefinicionReporte(
+        SalesReportGenerator, 'reporte_devoluciones', 'Devoluciones'),
+    'comparativo': DefinicionReporte(
+        SalesReportGenerator, 'reporte_comparativo_periodos', 'Comparativo entre Períodos'),
+    'margenes': DefinicionReporte(
+        SalesReportGenerator, 'reporte_analisis_margenes', 'Análisis de Márgenes'),
+
+    # Inventario
+    'inventario_valorizado': DefinicionReporte(
+        InventoryReportGenerator, 'reporte_inventario_valorizado', 'Inventario Valorizado',
+        usa_fechas=False),
+    'valorizacion_cierre': DefinicionReporte(
+        InventoryReportGenerator, 'reporte_valorizacion_cierre', 'Valorización al Cierre'),
+    'inventario_categorias': DefinicionReporte(
+        InventoryReportGenerator, 'reporte_por_categoria', 'Inventario por Categoría',
+        usa_fechas=False),
+    'productos_criticos': DefinicionReporte(
+        InventoryReportGenerator, 'reporte_productos_criticos', 'Productos Críticos',
+        usa_fechas=False),
+    'movimientos_inventario': DefinicionReporte(
+        InventoryReportGenerator, 'reporte_movimientos_inventario', 'Movimientos de Inventario'),
+    'rotacion_inventario': DefinicionReporte(
+        InventoryReportGenerator, 'reporte_rotacion_inventario', 'Rotación de Inventario',
+        periodo_cerrable=False),
+    'inventario_proveedores': DefinicionReporte(
+        InventoryReportGenerator, 'reporte_por_proveedor', 'Inventario por Proveedor',
+        usa_fechas=False),
+
+    # Financiero
+    'movimientos_caja': DefinicionReporte(
+        FinancialReportGenerator, 'reporte_movimientos_caja', 'Movimientos de Caja',
+        filtros=(('caja_id', _uuid),)),
+    'arqueos_caja': DefinicionReporte(
+        FinancialReportGenerator, 'reporte_arqueos_caja', 'Arqueos de Caja'),
+    'caja_chica': DefinicionReporte(
+        FinancialReportGenerator, 'reporte_caja_chica', 'Caja Chica'),
+    'rentabilidad': DefinicionReporte(
+        FinancialReportGenerator, 'reporte_rentabilidad_periodo', 'Rentabilidad del Período'),
+    'flujo_efectivo': DefinicionReporte(
+        FinancialReportGenerator, 'reporte_flujo_efectivo', 'Flujo de Efectivo'),
+    'creditos_pendientes': DefinicionReporte(
+        FinancialReportGenerator, 'reporte_creditos_pendientes', 'Créditos Pendientes',
+        usa_fechas=False),
+    'estado_financiero': DefinicionReporte(
+        FinancialReportGenerator, 'reporte_estado_financiero', 'Estado Financiero',
+        usa_fechas=False),
+
+    # Trazabilidad (el generador toma 90 días por defecto)
+    'trazabilidad_quintal': DefinicionReporte(
+        TraceabilityReportGenerator, 'reporte_trazabilidad_quintal', 'Trazabilidad de Quintal',
+        usa_fechas=False, filtros=(('quintal_id', _uuid),)),
+    'trazabilidad_lote': DefinicionReporte(
+        TraceabilityReportGenerator, 'reporte_trazabilidad_por_lote', 'Trazabilidad por Lote',
+        usa_fechas=False, filtros=('lote_proveedor',)),
+    'trazabilidad_proveedor': DefinicionReporte(
+        TraceabilityReportGenerator, 'reporte_trazabilidad_por_proveedor', 'Trazabilidad por Proveedor',
+        periodo_cerrable=False, filtros=(('proveedor_id', _uuid),), dias_defecto=90),
+    'flujo_fifo': DefinicionReporte(
+        TraceabilityReportGenerator, 'reporte_flujo_fifo', 'Flujo FIFO',
+        periodo_cerrable=False, filtros=(('producto_id', _uuid),), dias_defecto=90),
+    'ciclo_vida_quintales': DefinicionReporte(
+        TraceabilityReportGenerator, 'reporte_ciclo_vida_quintales', 'Ciclo de Vida de Quintales',
+        periodo_cerrable=False, dias_defecto=90, pesado=True),
+
+    # Dashboard (métricas del día, se comparte entre la página y su API)
+    'dashboard': DefinicionReporte(
+        DashboardDataGenerator, 'generar_dashboard_completo', 'Dashboard',
+        usa_fechas=False),
+}
+
+
+class ReportExecutionService:
+    """Punto de entrada único para ejecutar reportes analíticos"""
+
+    DIAS_PERIODO_DEFAULT = 30
+
+    # ========================================================================
+    # PARÁMETROS Y CLAVE
+    # ========================================================================
+
+    @staticmethod
+    def obtener_definicion(nombre):
+        """
+        Raises:
+            KeyError: Si no existe un reporte registrado con ese nombre
+        """
+        return REPORTES[nombre]
+
+    @classmethod
+    def parametros_desde_request(cls, nombre, query):
+        """
+        Normaliza los parámetros GET de un reporte
+
+        Returns:
+            dict: {'fecha_desde': 'YYYY-MM-DD' | None, 'fecha_hasta': ..., 'filtros': {...}}
+
+        Raises:
+            ValueError: Si las fechas no tienen formato YYYY-MM-DD o un
+                filtro no se puede convertir a su tipo
+        """
+        definicion = cls.obtener_definicion(nombre)
+        parametros = {'fecha_desde': None, 'fecha_hasta': None, 'filtros': {}}
+
+        if definicion.usa_fechas:
+            fecha_desde = query.get('fecha_desde')
+            fecha_hasta = query.get('fecha_hasta')
+
+            if fecha_desde and fecha_hasta:
+                fecha_desde = datetime.strptime(fecha_desde, '%Y-%m-%d').date()
+                fecha_hasta = datetime.strptime(fecha_hasta, '%Y-%m-%d').date()
+            else:
+                fecha_hasta = timezone.localdate()
+                fecha_desde = fecha_hasta - timedelta(
+                    days=definicion.dias_defecto or cls.DIAS_PERIODO_DEFAULT
+                )
+
+            parametros['fecha_desde'] = fecha_desde.isoformat()
+            parametros['fecha_hasta'] = fecha_hasta.isoformat()
+
+        for filtro, tipo in definicion.filtros:
+            valor = query.get(filtro)
+            if valor not in (None, ''):
+                parametros['filtros'][filtro] = tipo(valor)
+
+        return parametros
+
+    @staticmethod
+    def es_periodo_cerrado(definicion, parametros):
+        """Un período es cerrado si terminó antes de hoy y el reporte no usa datos actuales"""
+        if not definicion.periodo_cerrable or not parametros.get('fecha_hasta'):
+            return False
+        return parametros['fecha_hasta'] < timezone.localdate().isoformat()
+
+    @classmethod
+    def calcular_clave(cls, nombre, parametros):
+        """
+        Hash de (reporte, fechas, filtros, versión de datos)
+
+        En períodos cerrados la versión es la de los meses que cubre el
+        rango (ver versiones_periodo), así un cambio de hoy no los invalida
+        pero uno con fecha dentro del período sí.
+
+        Returns:
+            tuple: (clave, cerrado)
+        """
+        definicion = cls.obtener_definicion(nombre)
+        cerrado = cls.es_periodo_cerrado(definicion, parametros)
+
+        if cerrado:
+            version = cls.versiones_periodo(parametros['fecha_desde'], parametros['fecha_hasta'])
+        else:
+            version = cls.version_datos()
+
+        contenido = {
+            'reporte': nombre,
+            'fecha_desde': parametros.get('fecha_desde'),
+            'fecha_hasta': parametros.get('fecha_hasta'),
+            'filtros': parametros.get('filtros') or {},
+            'version': version,
+        }
+        serializado = json.dumps(contenido, sort_keys=True, default=str)
+        return hashlib.sha256(serializado.encode('utf-8')).hexdigest(), cerrado
+
+    # ========================================================================
+    # VERSIÓN DE DATOS
+    # ========================================================================
+
+    @staticmethod
+    def version_datos():
+        """Versión actual de los datos transaccionales (0 si la caché no responde)"""
+        try:
+            return cache.get_or_set(CLAVE_VERSION_DATOS, 1, timeout=None)
+        except Exception as e:
+            logger.warning(f"No se pudo leer la versión de datos de reportes: {str(e)}")
+            return 0
+
+    @staticmethod
+    def _meses(fecha_desde, fecha_hasta):
+        """Primer día de cada mes entre dos fechas (date o 'YYYY-MM-DD')"""
+        if isinstance(fecha_desde, str):
+            fecha_desde = datetime.strptime(fecha_desde, '%Y-%m-%d').date()
+        if isinstance(fecha_hasta, str):
+            fecha_hasta = datetime.strptime(fecha_hasta, '%Y-%m-%d').date()
+
+        mes = fecha_desde.replace(day=1)
+        while mes <= fecha_hasta:
+            yield mes
+            mes = (mes + timedelta(days=32)).replace(day=1)
+
+    @classmethod
+    def versiones_periodo(cls, fecha_desde, fecha_hasta):
+        """
+        Versión de un período cerrado: la versión histórica más la de cada
+        mes del rango que haya cambiado (los meses sin cambios no se listan)
+
+        Returns:
+            dict: {'historico': int, 'meses': {'YYYY-MM': int}}
+        """
+        claves = {
+            f'{PREFIJO_VERSION_MES}{mes:%Y-%m}': f'{mes:%Y-%m}'
+            for mes in cls._meses(fecha_desde, fecha_hasta)
+        }
+        try:
+            versiones = cache.get_many([CLAVE_VERSION_HISTORICO, *claves])
+        except Exception as e:
+            logger.warning(f"No se pudieron leer las versiones de meses de reportes: {str(e)}")
+            versiones = {}
+
+        return {
+            'historico': versiones.get(CLAVE_VERSION_HISTORICO, 0),
+            'meses': {
+                mes: versiones[clave]
+                for clave, mes in claves.items()
+                if clave in versiones
+            },
+        }
+
+    @staticmethod
+    def _incrementar(clave):
+        try:
+            cache.incr(clave)
+        except ValueError:
+            cache.set(clave, 1, timeout=None)
+
+    @classmethod
+    def invalidar(cls, fechas=None):
+        """
+        Incrementa las versiones de datos al cambiar ventas, inventario o caja
+
+        - Siempre la versión global: los períodos abiertos se recalculan
+        - Por cada fecha anterior a hoy, la versión de su mes: solo se
+          recalculan los períodos cerrados que incluyen ese mes
+        - fechas=None (cambio sin fecha conocida, ej: carga masiva): la
+          versión histórica, que invalida todos los períodos cerrados
+
+        Args:
+            fechas: Fechas locales (date) de los registros modificados
+        """
+        hoy = timezone.localdate()
+        try:
+            cls._incrementar(CLAVE_VERSION_DATOS)
+            if fechas is None:
+                cls._incrementar(CLAVE_VERSION_HISTORICO)
+                return
+            for mes in sorted({fecha.replace(day=1) for fecha in fechas if fecha < hoy}):
+                cls._incrementar(f'{PREFIJO_VERSION_MES}{mes:%Y-%m}')
+        except Exception as e:
+            logger.warning(f"No se pudo invalidar la caché de reportes: {str(e)}")
+
+    # ========================================================================
+    # EJECUCIÓN
+    # ========================================================================
+
+    @classmethod
+    def ejecutar(cls, nombre, parametros):
+        """Ejecuta el generador y devuelve datos serializables a JSON"""
+        from ..signals import convertir_a_json_serializable
+
+        definicion = cls.obtener_definicion(nombre)
+
+        if definicion.usa_fechas:
+            generador = definicion.generador(
+                datetime.strptime(parametros['fecha_desde'], '%Y-%m-%d').date(),
+                datetime.strptime(parametros['fecha_hasta'], '%Y-%m-%d').date(),
+            )
+        else:
+            generador = definicion.generador()
+
+        kwargs = {**definicion.kwargs, **(parametros.get('filtros') or {})}
+        datos = getattr(generador, definicion.metodo)(**kwargs)
+        return convertir_a_json_serializable(datos)
+
+    @staticmethod
+    def timeout_resultado(cerrado):
+        if cerrado:
+            return getattr(settings, 'REPORTES_CACHE_TIMEOUT_CERRADO', 86400)
+        return getattr(settings, 'REPORTES_CACHE_TIMEOUT', 300)
+
+    @classmethod
+    def obtener_resultado(cls, clave):
+        """Busca un resultado ya calculado: primero en caché, luego en ReporteGuardado"""
+        from ..models import ReporteGuardado
+
+        try:
+            datos = cache.get(PREFIJO_RESULTADO + clave)
+        except Exception:
+            datos = None
+        if datos is not None:
+            return datos
+
+        reporte = ReporteGuardado.objects.filter(
+            clave_cache=clave,
+            estado='COMPLETADO'
+        ).only('datos').order_by('-fecha_generacion').first()
+        return reporte.datos if reporte else None
+
+    @classmethod
+    def guardar_resultado(cls, clave, datos, cerrado):
+        try:
+            cache.set(PREFIJO_RESULTADO + clave, datos, timeout=cls.timeout_resultado(cerrado))
+        except Exception as e:
+            logger.warning(f"No se pudo guardar el reporte {clave[:12]} en caché: {str(e)}")
+
+    @classmethod
+    def obtener(cls, nombre, parametros):
+        """
+        Resultado del reporte calculándolo en línea solo si no está en caché
+
+        Returns:
+            tuple: (datos, desde_cache)
+        """
+        clave, cerrado = cls.calcular_clave(nombre, parametros)
+        datos = cls.obtener_resultado(clave)
+        if datos is not None:
+            return datos, True
+
+        datos = cls.ejecutar(nombre, parametros)
+        cls.guardar_resultado(clave, datos, cerrado)
+        return datos, False
+
+    @classmethod
+    def debe_encolarse(cls, nombre, parametros):
+        """Reportes pesados o con rangos largos se calculan en segundo plano"""
+        definicion = cls.obtener_definicion(nombre)
+        if definicion.pesado:
+            return True
+        if not definicion.usa_fechas:
+            return False
+
+        dias = (
+            datetime.strptime(parametros['fecha_hasta'], '%Y-%m-%d')
+            - datetime.strptime(parametros['fecha_desde'], '%Y-%m-%d')
+        ).days
+        return dias > getattr(settings, 'REPORTES_DIAS_ASINCRONO', 92)
+
+    @classmethod
+    def resolver(cls, nombre, parametros, usuario=None, permitir_asincrono=False):
+        """
+        Resultado desde caché, calculado en línea o encolado
+
+        Con permitir_asincrono (quien llama puede consultar el progreso) un
+        resultado no calculado que debe_encolarse() va a Celery.
+
+        Returns:
+            Resolucion: (datos, desde_cache, ejecucion); `ejecucion` es el
+            ReporteGuardado en curso y `datos` None mientras no termine
+        """
+        if permitir_asincrono and usuario is not None and cls.debe_encolarse(nombre, parametros):
+            clave, _ = cls.calcular_clave(nombre, parametros)
+            datos = cls.obtener_resultado(clave)
+            if datos is not None:
+                return Resolucion(datos, True, None)
+
+            reporte = cls.encolar(nombre, parametros, usuario)
+            if reporte.estado == 'COMPLETADO':
+                return Resolucion(reporte.datos, True, None)
+            return Resolucion(None, False, reporte)
+
+        datos, desde_cache = cls.obtener(nombre, parametros)
+        return Resolucion(datos, desde_cache, None)
+
+    @classmethod
+    def encolar(cls, nombre, parametros, usuario):
+        """
+        Registra un ReporteGuardado pendiente y encola su ejecución
+
+        Si el usuario ya tiene una ejecución en curso (o completada) para la
+        misma clave se reutiliza en lugar de lanzar otra tarea (el progreso
+        solo lo consulta su dueño).
+        """
+        from ..models import ReporteGuardado
+        from ..tasks import ejecutar_reporte
+
+        definicion = cls.obtener_definicion(nombre)
+        clave, cerrado = cls.calcular_clave(nombre, parametros)
+
+        existente = ReporteGuardado.objects.filter(
+            clave_cache=clave,
+            usuario=usuario,
+            estado__in=['PENDIENTE', 'PROCESANDO', 'COMPLETADO']
+        ).order_by('-fecha_generacion').first()
+        if existente:
+            return existente
+
+        hoy = timezone.localdate()
+        reporte = ReporteGuardado.objects.create(
+            nombre=definicion.titulo,
+            tipo_reporte='REPORTE_ANALITICO',
+            fecha_desde=parametros.get('fecha_desde') or hoy,
+            fecha_hasta=parametros.get('fecha_hasta') or hoy,
+            filtros={
+                'reporte': nombre,
+                'parametros': parametros,
+                'cerrado': cerrado,
+            },
+            datos={},
+            formato='JSON',
+            estado='PENDIENTE',
+            progreso=0,
+            clave_cache=clave,
+            usuario=usuario,
+        )
+
+        transaction.on_commit(lambda: ejecutar_reporte.delay(str(reporte.id)))
+        logger.info(f"Reporte {nombre} encolado como {reporte.id}")
+        return reporte
@@ -0,0 +1,204 @@
+# apps/reports_analytics/services/resumen_movimientos.py
+
+"""
+Resumen diario de movimientos de inventario (rollup).
+
+El listado de movimientos muestra totales de entradas y salidas sobre el
+conjunto filtrado. Agregarlos en cada carga recorre todas las filas del
+filtro; con millones de movimientos eso domina el tiempo de la página.
+
+La tarea nocturna agrupa los días cerrados en ResumenMovimientoDiario
+(día × producto × tipo). Los totales de un rango se obtienen sumando esas
+filas y agregando en vivo solo los días posteriores al último resumido,
+que caen en un rango corto del índice de `fecha_movimiento`.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
+from django.utils import timezone
+
+from ..utils import filtro_rango, truncar
+from ..utils.periodos import _como_fecha
+
+logger = logging.getLogger('commercebox')
+
+
+TIPOS_ENTRADA = ['ENTRADA_COMPRA', 'ENTRADA_AJUSTE', 'ENTRADA_DEVOLUCION']
+TIPOS_SALIDA = ['SALIDA_VENTA', 'SALIDA_AJUSTE', 'SALIDA_MERMA', 'SALIDA_DEVOLUCION']
+
+
+def _totales(queryset, conteo, campo_conteo):
+    """
+    Totales de entradas / salidas en una sola consulta
+
+    Args:
+        queryset: Movimientos o filas de resumen ya filtrados
+        conteo: Agregado que cuenta movimientos (Count en vivo, Sum en el resumen)
+        campo_conteo: Campo sobre el que se aplica `conteo`
+    """
+    entradas = Q(tipo_movimiento__in=TIPOS_ENTRADA)
+    salidas = Q(tipo_movimiento__in=TIPOS_SALIDA)
+    datos = queryset.order_by().aggregate(
+        total_movimientos=conteo(campo_conteo),
+        count_entradas=conteo(campo_conteo, filter=entradas),
+        total_entradas=Sum('cantidad', filter=entradas),
+        count_salidas=conteo(campo_conteo, filter=salidas),
+        total_salidas=Sum('cantidad', filter=salidas),
+    )
+    return {clave: abs(valor or 0) for clave, valor in datos.items()}
+
+
+class ResumenMovimientosService:
+    """
+    Mantiene y consulta el resumen diario de movimientos de inventario
+    """
+
+    # Días cerrados que se recalculan en cada pasada (ajustes tardíos)
+    DIAS_RECALCULO = 3
+
+    @staticmethod
+    def _movimientos():
+        from apps.inventory_management.models import MovimientoInventario
+        return MovimientoInventario.objects.all()
+
+    @staticmethod
+    def _resumenes():
+        from apps.reports_analytics.models import ResumenMovimientoDiario
+        return ResumenMovimientoDiario.objects.all()
+
+    # ------------------------------------------------------------------
+    # Actualización
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def recalcular(cls, fecha_desde=None, fecha_hasta=None):
+        """
+        Reescribe el resumen de los días [fecha_desde, fecha_hasta]
+
+        Por defecto cubre desde el día siguiente al último resumido (o los
+        últimos DIAS_RECALCULO días, si es antes) hasta ayer; con el resumen
+        vacío, todo el histórico. Una consulta agrupada por día, producto y
+        tipo; luego borrado e inserción en bloque.
+
+        Returns:
+            dict: {'fecha_desde', 'fecha_hasta', 'filas'}
+        """
+        from apps.reports_analytics.models import ResumenMovimientoDiario
+
+        ayer = timezone.localdate() - timedelta(days=1)
+        fecha_hasta = min(_como_fecha(fecha_hasta), ayer) if fecha_hasta else ayer
+        ultimo_resumido = cls._resumenes().aggregate(ultimo=Max('fecha'))['ultimo']
+        if fecha_desde:
+            fecha_desde = _como_fecha(fecha_desde)
+        elif ultimo_resumido:
+            fecha_desde = min(
+                ultimo_resumido + timedelta(days=1),
+                fecha_hasta - timedelta(days=cls.DIAS_RECALCULO - 1)
+            )
+        else:
+            primero = cls._movimientos().order_by('fecha_movimiento').first()
+            fecha_desde = (
+                timezone.localtime(primero.fecha_movimiento).date() if primero else fecha_hasta
+            )
+
+        if fecha_desde > fecha_hasta:
+            return {'fecha_desde': fecha_desde, 'fecha_hasta': fecha_hasta, 'filas': 0}
+
+        grupos = cls._movimientos().filter(
+            **filtro_rango('fecha_movimiento', fecha_desde, fecha_hasta)
+        ).annotate(
+            dia=truncar('fecha_movimiento', 'dia')
+        ).values(
+            'dia', 'producto_normal__producto_id', 'tipo_movimiento'
+        ).annotate(
+            n=Count('id'),
+            total=Sum('cantidad'),
+        ).order_by()
+
+        filas = [
+            ResumenMovimientoDiario(
+                fecha=grupo['dia'],
+                producto_id=grupo['producto_normal__producto_id'],
+                tipo_movimiento=grupo['tipo_movimiento'],
+                movimientos=grupo['n'],
+                cantidad=grupo['total'] or 0,
+            )
+            for grupo in grupos
+        ]
+
+        with transaction.atomic():
+            cls._resumenes().filter(fecha__gte=fecha_desde, fecha__lte=fecha_hasta).delete()
+            ResumenMovimientoDiario.objects.bulk_create(filas, batch_size=1000)
+
+        logger.info(
+            f"Resumen de movimientos {fecha_desde} → {fecha_hasta}: {len(filas)} filas"
+        )
+        return {'fecha_desde': fecha_desde, 'fecha_hasta': fecha_hasta, 'filas': len(filas)}
+
+    # ------------------------------------------------------------------
+    # Consulta
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def totales_en_vivo(movimientos):
+        """
+        Totales agregados directamente sobre un queryset de movimientos
+
+        Para filtros que el resumen no distingue (usuario, texto libre).
+        """
+        return _totales(movimientos, Count, 'id')
+
+    @classmethod
+    def totales(cls, fecha_desde=None, fecha_hasta=None, tipo_movimiento=None, producto_id=None):
+        """
+        Totales de movimientos del rango combinando resumen y datos en vivo
+
+        Cuesta tres consultas sin importar el tamaño del histórico: el último
+        día resumido, la suma de resúmenes hasta ese día y el agregado en
+        vivo de los días siguientes.
+
+        Returns:
+            dict: total_movimientos, count_entradas, total_entradas,
+                  count_salidas, total_salidas
+        """
+        fecha_desde = _como_fecha(fecha_desde) if fecha_desde else None
+        fecha_hasta = _como_fecha(fecha_hasta) if fecha_hasta else None
+
+        resumenes = cls._resumenes()
+        movimientos = cls._movimientos()
+        if tipo_movimiento:
+            resumenes = resumenes.filter(tipo_movimiento=tipo_movimiento)
+            movimientos = movimientos.filter(tipo_movimiento=tipo_movimiento)
+        if producto_id:
+            resumenes = resumenes.filter(producto_id=producto_id)
+            movimientos = movimientos.filter(producto_normal__producto_id=producto_id)
+
+        ultimo_resumido = cls._resumenes().aggregate(ultimo=Max('fecha'))['ultimo']
+
+        if ultimo_resumido is None or (fecha_desde and fecha_desde > ultimo_resumido):
+            return _totales(
+                movimientos.filter(**filtro_rango('fecha_movimiento', fecha_desde, fecha_hasta)),
+                Count, 'id'
+            )
+
+        hasta_resumen = min(fecha_hasta, ultimo_resumido) if fecha_hasta else ultimo_resumido
+        if fecha_desde:
+            resumenes = resumenes.filter(fecha__gte=fecha_desde)
+        totales = _totales(
+            resumenes.filter(fecha__lte=hasta_resumen),
+            Sum, 'movimientos'
+        )
+
+        if fecha_hasta and fecha_hasta <= ultimo_resumido:
+            return totales
+
+        en_vivo = _totales(
+            movimientos.filter(**filtro_rango(
+                'fecha_movimiento', ultimo_resumido + timedelta(days=1), fecha_hasta
+            )),
+            Count, 'id'
+        )
+        return {clave: totales[clave] + en_vivo[clave] for clave in totales}
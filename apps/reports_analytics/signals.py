@@ -10,15 +10,21 @@ from decimal import Decimal
 from uuid import UUID
 from datetime import datetime, date
 from django.db.models.signals import post_save, post_delete
+from django.core.exceptions import ObjectDoesNotExist
 from django.dispatch import receiver
 from django.utils import timezone
 from django.db import transaction
 from datetime import timedelta
 
 from apps.authentication.models import Usuario
-from apps.sales_management.models import Venta
-from apps.inventory_management.models import Quintal, ProductoNormal
+from apps.sales_management.models import Venta, Pago, Devolucion
+from apps.inventory_management.models import (
+    Quintal, ProductoNormal, MovimientoQuintal, MovimientoInventario
+)
+from apps.financial_management.models import MovimientoCaja, ArqueoCaja, MovimientoCajaChica
 from .models import ConfiguracionReporte, SnapshotDashboard
+from .services import ReportExecutionService
+from .utils import filtro_dia
 
 # Configurar logger
 logger = logging.getLogger(__name__)
@@ -131,9 +137,9 @@ def actualizar_snapshot_en_venta(sender, instance, created, **kwargs):
         if 8 <= hora_actual <= 20:
             try:
                 # Verificar si ya existe snapshot de hoy
-                hoy = timezone.now().date()
+                hoy = timezone.localdate()
                 ultimo_snapshot = SnapshotDashboard.objects.filter(
-                    fecha_snapshot__date=hoy,
+                    **filtro_dia('fecha_snapshot', hoy),
                     tipo='DIARIO'
                 ).order_by('-fecha_snapshot').first()
                 
@@ -148,6 +154,65 @@ def actualizar_snapshot_en_venta(sender, instance, created, **kwargs):
                 logger.error(f"❌ Error en actualizar_snapshot_en_venta: {str(e)}")
 
 
+# ============================================================================
+# INVALIDACIÓN DE LA CACHÉ DE REPORTES
+# ============================================================================
+
+# Modelos cuyos cambios alteran el resultado de los reportes analíticos y
+# las fechas (campo o ruta por relaciones) que ubican el cambio en el tiempo:
+# una venta anulada hoy cambia los reportes del mes en que se vendió
+MODELOS_INVALIDAN_REPORTES = {
+    Venta: ('fecha_venta',),
+    Pago: ('fecha_pago', 'venta.fecha_venta'),
+    Devolucion: ('fecha_devolucion', 'venta_original.fecha_venta'),
+    Quintal: ('fecha_ingreso',),
+    ProductoNormal: (),
+    MovimientoQuintal: ('fecha_movimiento',),
+    MovimientoInventario: ('fecha_movimiento',),
+    MovimientoCaja: ('fecha_movimiento',),
+    ArqueoCaja: ('fecha_apertura', 'fecha_cierre'),
+    MovimientoCajaChica: ('fecha_movimiento',),
+}
+
+
+def fechas_afectadas(instance):
+    """Fechas locales del registro según MODELOS_INVALIDAN_REPORTES"""
+    fechas = set()
+    for ruta in MODELOS_INVALIDAN_REPORTES.get(type(instance), ()):
+        valor = instance
+        try:
+            for atributo in ruta.split('.'):
+                valor = getattr(valor, atributo)
+        except ObjectDoesNotExist:
+            continue
+        if isinstance(valor, datetime):
+            fechas.add(timezone.localtime(valor).date() if timezone.is_aware(valor) else valor.date())
+        elif isinstance(valor, date):
+            fechas.add(valor)
+    return fechas
+
+
+def invalidar_cache_reportes(sender, instance, **kwargs):
+    """
+    Incrementa las versiones de datos de reportes al confirmar la transacción:
+    la global (períodos abiertos) y la de los meses pasados a los que
+    pertenece el registro (períodos cerrados que lo incluyen)
+    """
+    fechas = fechas_afectadas(instance)
+    transaction.on_commit(lambda: ReportExecutionService.invalidar(fechas))
+
+
+for _modelo in MODELOS_INVALIDAN_REPORTES:
+    post_save.connect(
+        invalidar_cache_reportes, sender=_modelo,
+        dispatch_uid=f'reportes_cache_save_{_modelo.__name__}'
+    )
+    post_delete.connect(
+        invalidar_cache_reportes, sender=_modelo,
+        dispatch_uid=f'reportes_cache_delete_{_modelo.__name__}'
+    )
+
+
 # ============================================================================
 # SEÑALES DE ALERTAS AUTOMÁTICAS
 # ============================================================================
@@ -240,51 +305,6 @@ def verificar_stock_critico(sender, instance, created, **kwargs):
         logger.error(f"❌ Error en verificar_stock_critico: {str(e)}", exc_info=True)
 
 
-# ============================================================================
-# LIMPIEZA AUTOMÁTICA DE SNAPSHOTS ANTIGUOS
-# ============================================================================
-
-@receiver(post_save, sender=SnapshotDashboard)
-def limpiar_snapshots_antiguos(sender, instance, created, **kwargs):
-    """
-    Limpia snapshots antiguos para no ocupar mucho espacio en BD
-    Mantiene:
-    - Todos los snapshots de los últimos 7 días
-    - 1 snapshot diario de los últimos 90 días
-    - 1 snapshot mensual para histórico
-    """
-    if created:
-        try:
-            fecha_limite_detalle = timezone.now() - timedelta(days=7)
-            fecha_limite_diario = timezone.now() - timedelta(days=90)
-            
-            # Eliminar snapshots de minuto/hora antiguos (más de 7 días)
-            snapshots_eliminados_detalle = SnapshotDashboard.objects.filter(
-                tipo__in=['MINUTO', 'HORARIO'],
-                fecha_snapshot__lt=fecha_limite_detalle
-            ).delete()
-            
-            if snapshots_eliminados_detalle[0] > 0:
-                logger.info(f"🗑️ Snapshots detallados eliminados: {snapshots_eliminados_detalle[0]}")
-            
-            # Eliminar snapshots diarios antiguos (más de 90 días)
-            # Pero mantener el primero de cada mes
-            snapshots_diarios_antiguos = SnapshotDashboard.objects.filter(
-                tipo='DIARIO',
-                fecha_snapshot__lt=fecha_limite_diario
-            ).exclude(
-                fecha_snapshot__day=1  # Mantener primer día de cada mes
-            )
-            
-            snapshots_eliminados_diarios = snapshots_diarios_antiguos.delete()
-            
-            if snapshots_eliminados_diarios[0] > 0:
-                logger.info(f"🗑️ Snapshots diarios eliminados: {snapshots_eliminados_diarios[0]}")
-                
-        except Exception as e:
-            logger.error(f"❌ Error en limpiar_snapshots_antiguos: {str(e)}")
-
-
 # ============================================================================
 # FUNCIONES AUXILIARES
 # ============================================================================
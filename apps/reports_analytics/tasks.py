@@ -0,0 +1,230 @@
+"""
+Tareas de Celery para Reportes y Análisis
+apps/reports_analytics/tasks.py
+"""
+from celery import shared_task
+from django.core.files import File
+from django.utils import timezone
+import logging
+import tempfile
+
+from commercebox.celery import TareaDeduplicada
+from commercebox.db_router import lectura_reportes
+
+logger = logging.getLogger('commercebox')
+
+
+@shared_task(
+    name='apps.reports_analytics.tasks.generar_exportacion',
+    base=TareaDeduplicada,
+    bind=True,
+    max_retries=2,
+    default_retry_delay=60
+)
+def generar_exportacion(self, reporte_id):
+    """
+    Genera en segundo plano una exportación grande (CSV / Excel / PDF).
+
+    El archivo se escribe por bloques a un temporal en disco y luego se
+    guarda en ReporteGuardado.archivo, por lo que la memoria del worker se
+    mantiene constante aunque se exporte un año de ventas.
+
+    Args:
+        reporte_id: UUID (str) del ReporteGuardado creado por ExportService
+
+    Returns:
+        dict: Resumen de la exportación
+    """
+    from apps.reports_analytics.models import ReporteGuardado
+    from apps.reports_analytics.exporters import ExportService, escribir_exportacion
+    from apps.reports_analytics.exporters.writers import EXTENSIONES
+
+    try:
+        reporte = ReporteGuardado.objects.get(id=reporte_id)
+    except ReporteGuardado.DoesNotExist:
+        logger.warning(f"Exportación {reporte_id} no encontrada, se omite")
+        return {'reporte_id': reporte_id, 'estado': 'NO_ENCONTRADO'}
+
+    reporte.estado = 'PROCESANDO'
+    reporte.save(update_fields=['estado'])
+
+    try:
+        exportacion = ExportService.obtener_exportacion(
+            reporte.filtros['exportacion'],
+            reporte.filtros.get('parametros', {})
+        )
+        inicio = timezone.now()
+
+        with tempfile.TemporaryFile() as temporal:
+            escribir_exportacion(exportacion, reporte.formato, temporal)
+            temporal.seek(0)
+            nombre = exportacion.nombre_archivo(EXTENSIONES[reporte.formato])
+            reporte.archivo.save(nombre, File(temporal), save=False)
+
+        reporte.datos = {
+            **reporte.datos,
+            'duracion_segundos': (timezone.now() - inicio).total_seconds(),
+        }
+        reporte.estado = 'COMPLETADO'
+        reporte.progreso = 100
+        reporte.fecha_generacion = timezone.now()
+        reporte.save(update_fields=['archivo', 'datos', 'estado', 'progreso', 'fecha_generacion'])
+
+        logger.info(f"✅ Exportación {reporte.id} generada: {reporte.archivo.name}")
+        return {'reporte_id': str(reporte.id), 'estado': reporte.estado, 'archivo': reporte.archivo.name}
+
+    except Exception as e:
+        logger.error(f"Error generando exportación {reporte_id}: {str(e)}")
+        if self.request.retries >= self.max_retries:
+            reporte.estado = 'ERROR'
+            reporte.resumen = str(e)
+            reporte.save(update_fields=['estado', 'resumen'])
+            raise
+        raise self.retry(exc=e)
+
+
+@shared_task(
+    name='apps.reports_analytics.tasks.ejecutar_reporte',
+    base=TareaDeduplicada,
+    bind=True,
+    max_retries=2,
+    default_retry_delay=60
+)
+def ejecutar_reporte(self, reporte_id):
+    """
+    Ejecuta en segundo plano un reporte analítico registrado en
+    services.REPORTES y guarda el resultado en ReporteGuardado.
+
+    El avance se informa en ReporteGuardado.progreso para que el cliente
+    pueda consultarlo (api/ejecuciones/<id>/). El JSON queda en `datos`,
+    se adjunta como archivo y se publica en la caché con la misma clave
+    que usan las vistas síncronas.
+
+    Args:
+        reporte_id: UUID (str) del ReporteGuardado creado por ReportExecutionService
+
+    Returns:
+        dict: Resumen de la ejecución
+    """
+    from django.core.files.base import ContentFile
+    from django.core.serializers.json import DjangoJSONEncoder
+    from apps.reports_analytics.models import ReporteGuardado
+    from apps.reports_analytics.services import ReportExecutionService
+    import json
+
+    try:
+        reporte = ReporteGuardado.objects.get(id=reporte_id)
+    except ReporteGuardado.DoesNotExist:
+        logger.warning(f"Ejecución de reporte {reporte_id} no encontrada, se omite")
+        return {'reporte_id': reporte_id, 'estado': 'NO_ENCONTRADO'}
+
+    def avanzar(progreso, **campos):
+        for campo, valor in campos.items():
+            setattr(reporte, campo, valor)
+        reporte.progreso = progreso
+        reporte.save(update_fields=['progreso', *campos.keys()])
+
+    avanzar(10, estado='PROCESANDO')
+
+    try:
+        nombre = reporte.filtros['reporte']
+        parametros = reporte.filtros.get('parametros', {})
+        inicio = timezone.now()
+
+        # Solo el cálculo lee de la réplica; el ReporteGuardado recién
+        # creado se lee y escribe en el primario
+        with lectura_reportes(reporte.fecha_hasta):
+            datos = ReportExecutionService.ejecutar(nombre, parametros)
+        avanzar(70)
+
+        contenido = json.dumps(datos, cls=DjangoJSONEncoder, ensure_ascii=False, indent=2)
+        reporte.archivo.save(
+            f"{nombre}_{reporte.fecha_desde:%Y%m%d}_{reporte.fecha_hasta:%Y%m%d}.json",
+            ContentFile(contenido.encode('utf-8')),
+            save=False
+        )
+        avanzar(90, archivo=reporte.archivo, datos=datos)
+
+        ReportExecutionService.guardar_resultado(
+            reporte.clave_cache, datos, reporte.filtros.get('cerrado', False)
+        )
+        avanzar(
+            100,
+            estado='COMPLETADO',
+            fecha_generacion=timezone.now(),
+            resumen=f"Generado en {(timezone.now() - inicio).total_seconds():.1f} s"
+        )
+
+        logger.info(f"✅ Reporte {nombre} ({reporte.id}) generado")
+        return {'reporte_id': str(reporte.id), 'estado': reporte.estado}
+
+    except Exception as e:
+        logger.error(f"Error ejecutando reporte {reporte_id}: {str(e)}")
+        if self.request.retries >= self.max_retries:
+            avanzar(reporte.progreso, estado='ERROR', resumen=str(e))
+            raise
+        raise self.retry(exc=e)
+
+
+@shared_task(
+    name='apps.reports_analytics.tasks.actualizar_resumen_movimientos',
+    base=TareaDeduplicada
+)
+def actualizar_resumen_movimientos(fecha_desde=None, fecha_hasta=None):
+    """
+    Actualiza el resumen diario de movimientos de inventario (días cerrados)
+
+    Programada cada noche; sin argumentos completa los días pendientes y
+    recalcula los últimos días para recoger ajustes con fecha atrasada.
+
+    Returns:
+        dict: Rango recalculado y filas escritas
+    """
+    from apps.reports_analytics.services import ResumenMovimientosService
+
+    resultado = ResumenMovimientosService.recalcular(fecha_desde, fecha_hasta)
+    return {
+        'fecha_desde': str(resultado['fecha_desde']),
+        'fecha_hasta': str(resultado['fecha_hasta']),
+        'filas': resultado['filas'],
+    }
+
+
+@shared_task(
+    name='apps.reports_analytics.tasks.limpiar_snapshots_antiguos',
+    base=TareaDeduplicada
+)
+def limpiar_snapshots_antiguos():
+    """
+    Limpia snapshots antiguos del dashboard (tarea diaria)
+
+    Mantiene:
+    - Todos los snapshots de los últimos 7 días
+    - 1 snapshot diario de los últimos 90 días
+    - 1 snapshot mensual (día 1) para histórico
+
+    Returns:
+        dict: {'detallados': n, 'diarios': n} snapshots eliminados
+    """
+    from datetime import timedelta
+    from apps.reports_analytics.models import SnapshotDashboard
+
+    ahora = timezone.now()
+
+    # Horarios / automáticos de más de 7 días
+    detallados, _ = SnapshotDashboard.objects.filter(
+        tipo__in=['AUTOMATICO', 'MINUTO', 'HORARIO'],
+        fecha_snapshot__lt=ahora - timedelta(days=7)
+    ).delete()
+
+    # Diarios de más de 90 días, salvo el primero de cada mes
+    diarios, _ = SnapshotDashboard.objects.filter(
+        tipo__in=['CIERRE_DIA', 'DIARIO'],
+        fecha_snapshot__lt=ahora - timedelta(days=90)
+    ).exclude(
+        fecha_snapshot__day=1
+    ).delete()
+
+    if detallados or diarios:
+        logger.info(f"Snapshots eliminados: {detallados} detallados, {diarios} diarios")
+    return {'detallados': detallados, 'diarios': diarios}
@@ -1,3 +1,882 @@
-from django.test import TestCase
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+import uuid
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from itertools import islice
+from unittest import mock
+from zoneinfo import ZoneInfo
 
-# Create your tests here.
+from django.db import connection, connections, transaction
+from django.db.models import Count
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.authentication.models import Usuario
+from apps.inventory_management.models import (
+    Categoria, MovimientoInventario, MovimientoQuintal, Producto,
+    ProductoNormal, Proveedor, Quintal, UnidadMedida
+)
+from apps.inventory_management.services import TraceabilityService
+from apps.sales_management.models import DetalleVenta, Venta
+from commercebox.db_router import alias_reportes, lectura_reportes
+
+from .exporters import ExportacionVentas, ExportService
+from .exporters.writers import generar_csv, respuesta_exportacion
+from .generators.inventory_reports import InventoryReportGenerator
+from .generators.traceability_reports import TraceabilityReportGenerator
+from .models import ReporteGuardado, ResumenMovimientoDiario, SnapshotDashboard
+from .services import ReportExecutionService, ResumenMovimientosService
+from .tasks import ejecutar_reporte, generar_exportacion, limpiar_snapshots_antiguos
+from .utils import KeysetPaginator, Periodo, agrupar_por_periodo, filtro_dia, filtro_rango
+from .views import (
+    DashboardAPIView, DashboardView, EstadoEjecucionReporteView, TrazabilidadLoteView,
+    VentasDiariasAPIView, VentasDiariasView
+)
+
+
+BOGOTA = ZoneInfo('America/Bogota')
+
+
+class FiltroRangoTests(TestCase):
+    """Los rangos se calculan en días locales y son semiabiertos [inicio, fin)"""
+
+    def test_rango_cubre_dias_locales(self):
+        filtro = filtro_rango('fecha_venta', date(2024, 1, 1), date(2024, 1, 31))
+
+        self.assertEqual(
+            filtro['fecha_venta__gte'], datetime(2024, 1, 1, tzinfo=BOGOTA)
+        )
+        self.assertEqual(
+            filtro['fecha_venta__lt'], datetime(2024, 2, 1, tzinfo=BOGOTA)
+        )
+
+    def test_extremos_opcionales_y_texto(self):
+        self.assertEqual(
+            filtro_rango('fecha_venta', '2024-03-10'),
+            {'fecha_venta__gte': datetime(2024, 3, 10, tzinfo=BOGOTA)}
+        )
+        self.assertEqual(
+            filtro_rango('fecha_venta', fecha_hasta='2024-03-10'),
+            {'fecha_venta__lt': datetime(2024, 3, 11, tzinfo=BOGOTA)}
+        )
+
+    def test_periodo_anterior(self):
+        periodo = Periodo(date(2024, 3, 1), date(2024, 3, 31))
+        anterior = periodo.anterior()
+
+        self.assertEqual(periodo.dias, 31)
+        self.assertEqual(anterior.fecha_hasta, date(2024, 2, 29))
+        self.assertEqual(anterior.dias, 31)
+
+    def test_dia_local_incluye_noche_y_agrupa_en_una_consulta(self):
+        hoy = timezone.localdate()
+        ayer = hoy - timedelta(days=1)
+        # 23:30 de ayer en hora local ya es "hoy" en UTC
+        SnapshotDashboard.objects.create(
+            fecha_snapshot=timezone.make_aware(datetime.combine(ayer, datetime.min.time()).replace(hour=23, minute=30))
+        )
+        SnapshotDashboard.objects.create(
+            fecha_snapshot=timezone.make_aware(datetime.combine(hoy, datetime.min.time()).replace(hour=1))
+        )
+
+        self.assertEqual(SnapshotDashboard.objects.filter(**filtro_dia('fecha_snapshot', ayer)).count(), 1)
+        self.assertEqual(SnapshotDashboard.objects.filter(**filtro_dia('fecha_snapshot', hoy)).count(), 1)
+
+        with self.assertNumQueries(1):
+            por_dia = {
+                fila['periodo']: fila['cantidad']
+                for fila in agrupar_por_periodo(
+                    SnapshotDashboard.objects.filter(**filtro_rango('fecha_snapshot', ayer, hoy)),
+                    'fecha_snapshot',
+                    cantidad=Count('id')
+                )
+            }
+        self.assertEqual(por_dia, {ayer: 1, hoy: 1})
+
+
+class PlanConsultaFechasTests(TestCase):
+    """
+    Regresión: los filtros por fecha deben usar el índice de fecha_venta.
+    Un `fecha_venta__date` envuelve la columna en una conversión y obliga
+    a recorrer la tabla completa.
+    """
+
+    def _plan(self, queryset):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
+
+    def _assert_usa_indice_fecha(self, plan):
+        if connection.vendor == 'postgresql':
+            self.assertIn('Index Cond', plan)
+            self.assertIn('fecha_venta', plan.split('Index Cond', 1)[1])
+        elif connection.vendor == 'sqlite':
+            self.assertIn('USING', plan)
+            self.assertIn('INDEX', plan)
+            self.assertIn('fecha_venta>', plan)
+        else:
+            self.skipTest(f'Plan de consulta no verificado para {connection.vendor}')
+
+    def test_rango_de_fechas_usa_indice(self):
+        hoy = timezone.localdate()
+        plan = self._plan(
+            Venta.objects.filter(**filtro_rango('fecha_venta', hoy - timedelta(days=30), hoy))
+        )
+        self._assert_usa_indice_fecha(plan)
+
+    def test_rango_sobre_relacion_usa_indice(self):
+        periodo = Periodo(timezone.localdate() - timedelta(days=7), timezone.localdate())
+        plan = self._plan(
+            DetalleVenta.objects.filter(**periodo.filtro('venta__fecha_venta'))
+        )
+        self._assert_usa_indice_fecha(plan)
+
+    def test_lookup_date_no_usa_indice(self):
+        """Documenta el comportamiento que se reemplazó"""
+        if connection.vendor != 'sqlite':
+            self.skipTest('Solo se verifica en SQLite')
+        plan = Venta.objects.filter(fecha_venta__date__gte=timezone.localdate()).explain()
+        self.assertIn('SCAN', plan)
+
+
+# ============================================================================
+# CONSULTAS DE REPORTES DE INVENTARIO Y TRAZABILIDAD
+# ============================================================================
+
+BENCH_PRODUCTOS = int(os.environ.get('COMMERCEBOX_BENCH_PRODUCTOS', 0))
+BENCH_MOVIMIENTOS = int(os.environ.get('COMMERCEBOX_BENCH_MOVIMIENTOS', 0))
+
+
+def _en_lotes(modelo, objetos, tamano=5000):
+    """bulk_create por lotes sin materializar todo el generador en memoria"""
+    objetos = iter(objetos)
+    while True:
+        lote = list(islice(objetos, tamano))
+        if not lote:
+            break
+        modelo.objects.bulk_create(lote, batch_size=tamano)
+
+
+class DatosInventarioMixin:
+    """
+    Carga masiva de productos, quintales, ventas y movimientos con
+    bulk_create (sin señales) para medir los reportes
+    """
+
+    @classmethod
+    def _crear_base(cls):
+        cls.usuario = Usuario.objects.create(
+            username='bench', email='bench@example.com', codigo_empleado='BENCH',
+            nombres='Bench', apellidos='Reportes', documento_identidad='0000000000'
+        )
+        cls.categoria = Categoria.objects.create(nombre='Granos')
+        cls.unidad = UnidadMedida.objects.create(
+            nombre='Kilogramo', abreviatura='kg', factor_conversion_kg=Decimal('1')
+        )
+        cls.proveedor = Proveedor.objects.create(nombre_comercial='Proveedor', ruc_nit='1790000000001')
+        cls.producto_quintal = Producto.objects.create(
+            codigo_barras='Q-BENCH', nombre='Arroz', categoria=cls.categoria,
+            tipo_inventario='QUINTAL', unidad_medida_base=cls.unidad,
+            precio_por_unidad_peso=Decimal('1.20'),
+            usuario_registro=cls.usuario
+        )
+
+    @classmethod
+    def _poblar(cls, productos, movimientos):
+        """
+        Crea `productos` productos normales con inventario, un quintal por
+        cada 100 productos y `movimientos` líneas de venta (la mitad de
+        quintal) con su movimiento de inventario correspondiente
+        """
+        sufijo = uuid.uuid4().hex[:6]
+        ahora = timezone.now()
+
+        normales = [
+            Producto(
+                codigo_barras=f'N-{sufijo}-{i}', nombre=f'Producto {i}',
+                categoria=cls.categoria, usuario_registro=cls.usuario
+            )
+            for i in range(productos)
+        ]
+        _en_lotes(Producto, normales)
+        inventarios = [
+            ProductoNormal(
+                producto=producto, costo_unitario=Decimal('1.00'),
+                stock_actual=i % 50, stock_minimo=5
+            )
+            for i, producto in enumerate(normales)
+        ]
+        _en_lotes(ProductoNormal, inventarios)
+
+        quintales = [
+            Quintal(
+                codigo_quintal=f'Q-{sufijo}-{i}', producto=cls.producto_quintal,
+                proveedor=cls.proveedor, unidad_medida=cls.unidad,
+                peso_inicial=Decimal('100'), peso_actual=Decimal(50 + i % 50),
+                costo_total=Decimal('80'), costo_por_unidad=Decimal('0.8'),
+                usuario_registro=cls.usuario, fecha_ingreso=ahora - timedelta(days=30, hours=i)
+            )
+            for i in range(max(productos // 100, 3))
+        ]
+        _en_lotes(Quintal, quintales)
+
+        ventas = [
+            Venta(
+                numero_venta=f'V-{sufijo}-{i}', vendedor=cls.usuario, estado='COMPLETADA',
+                fecha_venta=ahora - timedelta(minutes=i)
+            )
+            for i in range(max(movimientos // 10, 1))
+        ]
+        _en_lotes(Venta, ventas)
+
+        def detalles():
+            for i in range(movimientos):
+                venta = ventas[i % len(ventas)]
+                if i % 2:
+                    yield DetalleVenta(
+                        venta=venta, producto=cls.producto_quintal,
+                        quintal=quintales[i % len(quintales)], peso_vendido=Decimal('1'),
+                        subtotal=Decimal('1'), total=Decimal('1'),
+                        costo_unitario=Decimal('0.8'), costo_total=Decimal('0.8')
+                    )
+                else:
+                    yield DetalleVenta(
+                        venta=venta, producto=normales[(i // 2) % len(normales)], cantidad_unidades=1,
+                        subtotal=Decimal('1'), total=Decimal('1'),
+                        costo_unitario=Decimal('1'), costo_total=Decimal('1')
+                    )
+        _en_lotes(DetalleVenta, detalles())
+
+        def movimientos_quintal():
+            for i in range(1, movimientos, 2):
+                quintal = quintales[i % len(quintales)]
+                yield MovimientoQuintal(
+                    quintal=quintal, tipo_movimiento='SALIDA', peso_movimiento=Decimal('-1'),
+                    peso_antes=quintal.peso_actual + 1, peso_despues=quintal.peso_actual,
+                    unidad_medida=cls.unidad, usuario=cls.usuario,
+                    fecha_movimiento=ahora - timedelta(minutes=i)
+                )
+        _en_lotes(MovimientoQuintal, movimientos_quintal())
+
+        def movimientos_inventario():
+            for i in range(0, movimientos, 2):
+                yield MovimientoInventario(
+                    producto_normal=inventarios[i % len(inventarios)], tipo_movimiento='SALIDA_VENTA',
+                    cantidad=-1, stock_antes=1, stock_despues=0,
+                    costo_unitario=Decimal('1'), costo_total=Decimal('1'), usuario=cls.usuario
+                )
+        _en_lotes(MovimientoInventario, movimientos_inventario())
+
+    def _reportes(self):
+        """Reportes medidos: nombre -> callable"""
+        inventario = InventoryReportGenerator()
+        trazabilidad = TraceabilityReportGenerator()
+        return {
+            'rotacion_inventario': inventario.reporte_rotacion_inventario,
+            'inventario_proveedores': inventario.reporte_por_proveedor,
+            'flujo_fifo': lambda: trazabilidad.reporte_flujo_fifo(self.producto_quintal.id),
+            'ciclo_vida': trazabilidad.reporte_ciclo_vida_quintales,
+            'trazabilidad_proveedor': lambda: trazabilidad.reporte_trazabilidad_por_proveedor(
+                self.proveedor.id
+            ),
+            'trazabilidad_producto_quintal': lambda: TraceabilityService.obtener_trazabilidad_producto(
+                self.producto_quintal
+            ),
+        }
+
+    def _medir(self):
+        """Ejecuta cada reporte y devuelve {nombre: (consultas, segundos)}"""
+        mediciones = {}
+        for nombre, reporte in self._reportes().items():
+            with CaptureQueriesContext(connection) as contexto:
+                inicio = time.perf_counter()
+                reporte()
+                mediciones[nombre] = (len(contexto), time.perf_counter() - inicio)
+        return mediciones
+
+
+class ConsultasReportesInventarioTests(DatosInventarioMixin, TestCase):
+    """
+    Regresión N+1: el número de consultas de cada reporte no depende de
+    cuántos productos, quintales o ventas haya
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls._crear_base()
+        cls._poblar(productos=10, movimientos=40)
+
+    def test_consultas_constantes_al_crecer_los_datos(self):
+        antes = self._medir()
+        self._poblar(productos=40, movimientos=200)
+        despues = self._medir()
+
+        for nombre, (consultas, _) in antes.items():
+            with self.subTest(reporte=nombre):
+                self.assertEqual(despues[nombre][0], consultas)
+
+    def test_rotacion_usa_stock_del_inventario(self):
+        rotacion = InventoryReportGenerator().reporte_rotacion_inventario()
+
+        self.assertEqual(len(rotacion['productos']), 10)
+        stocks = {
+            p.producto.nombre: p.stock_actual
+            for p in ProductoNormal.objects.select_related('producto')
+        }
+        for fila in rotacion['productos']:
+            self.assertEqual(fila['stock_actual'], stocks[fila['producto']])
+
+    def test_flujo_fifo_orden_y_peso_acumulado(self):
+        reporte = TraceabilityReportGenerator().reporte_flujo_fifo(self.producto_quintal.id)
+        items = reporte['quintales_disponibles']['items']
+
+        self.assertEqual([q['orden_fifo'] for q in items], list(range(1, len(items) + 1)))
+        self.assertEqual(
+            [q['fecha_ingreso'] for q in items], sorted(q['fecha_ingreso'] for q in items)
+        )
+        self.assertEqual(items[-1]['peso_acumulado'], sum(q['peso_actual'] for q in items))
+        self.assertEqual(reporte['quintales_disponibles']['peso_total'], items[-1]['peso_acumulado'])
+
+
+@unittest.skipUnless(
+    BENCH_PRODUCTOS and BENCH_MOVIMIENTOS,
+    'Benchmark a escala: definir COMMERCEBOX_BENCH_PRODUCTOS=10000 y '
+    'COMMERCEBOX_BENCH_MOVIMIENTOS=1000000'
+)
+class BenchmarkReportesInventarioTests(DatosInventarioMixin, TestCase):
+    """
+    Consultas y tiempo por reporte a escala de producción:
+
+        COMMERCEBOX_BENCH_PRODUCTOS=10000 COMMERCEBOX_BENCH_MOVIMIENTOS=1000000 \\
+            python manage.py test apps.reports_analytics.tests.BenchmarkReportesInventarioTests
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls._crear_base()
+        cls._poblar(productos=BENCH_PRODUCTOS, movimientos=BENCH_MOVIMIENTOS)
+
+    def test_benchmark(self):
+        for nombre, (consultas, segundos) in self._medir().items():
+            with self.subTest(reporte=nombre):
+                self.assertLess(
+                    consultas, 20,
+                    f'{nombre}: {consultas} consultas en {segundos:.3f} s con '
+                    f'{BENCH_PRODUCTOS} productos / {BENCH_MOVIMIENTOS} movimientos'
+                )
+
+
+class PaginacionKeysetTests(DatosInventarioMixin, TestCase):
+    """
+    La paginación por cursor recorre el conjunto completo en ambos sentidos
+    y cada página cuesta una consulta, sea la primera o la última
+    """
+
+    ORDEN = ('-fecha_movimiento', '-id')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls._crear_base()
+        cls._poblar(productos=5, movimientos=90)
+
+    def _paginador(self):
+        return KeysetPaginator(MovimientoInventario.objects.all(), 10, orden=self.ORDEN)
+
+    def test_recorre_adelante_y_atras(self):
+        esperado = list(
+            MovimientoInventario.objects.order_by(*self.ORDEN).values_list('id', flat=True)
+        )
+        paginador = self._paginador()
+
+        paginas = [paginador.pagina()]
+        while paginas[-1].has_next():
+            paginas.append(paginador.pagina(paginas[-1].next_cursor))
+        self.assertEqual([m.id for pagina in paginas for m in pagina], esperado)
+        self.assertEqual([p.number for p in paginas], list(range(1, paginador.num_pages + 1)))
+        self.assertFalse(paginas[0].has_previous())
+
+        regreso = [paginas[-1]]
+        while regreso[-1].has_previous():
+            regreso.append(paginador.pagina(regreso[-1].previous_cursor))
+        self.assertEqual(
+            [[m.id for m in p] for p in reversed(regreso)],
+            [[m.id for m in p] for p in paginas]
+        )
+        self.assertEqual(regreso[-1].number, 1)
+
+    def test_una_consulta_por_pagina_en_cualquier_profundidad(self):
+        paginador = self._paginador()
+        pagina = paginador.pagina()
+        cursores = []
+        while pagina.has_next():
+            cursores.append(pagina.next_cursor)
+            pagina = paginador.pagina(pagina.next_cursor)
+
+        for cursor in (cursores[0], cursores[-1]):
+            with self.assertNumQueries(1):
+                len(paginador.pagina(cursor))
+
+    def test_cursor_invalido_devuelve_la_primera_pagina(self):
+        pagina = self._paginador().pagina('no-es-un-cursor')
+
+        self.assertEqual(pagina.number, 1)
+        self.assertEqual(len(pagina), 10)
+
+    def test_conteo_exacto_bajo_el_umbral(self):
+        paginador = self._paginador()
+
+        self.assertEqual(paginador.count, MovimientoInventario.objects.count())
+        self.assertFalse(paginador.count_es_estimado)
+
+
+class ResumenMovimientosTests(DatosInventarioMixin, TestCase):
+    """
+    Los totales del listado de movimientos combinan el resumen diario con
+    los días recientes en vivo y coinciden con agregar todo el histórico
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls._crear_base()
+        cls._poblar(productos=3, movimientos=6)
+        cls.inventarios = list(ProductoNormal.objects.select_related('producto'))
+        ahora = timezone.now()
+        tipos = [('ENTRADA_COMPRA', 5), ('SALIDA_VENTA', -2), ('SALIDA_MERMA', -1)]
+        MovimientoInventario.objects.bulk_create([
+            MovimientoInventario(
+                producto_normal=cls.inventarios[i % 3], tipo_movimiento=tipos[i % 3][0],
+                cantidad=tipos[i % 3][1], stock_antes=10, stock_despues=10 + tipos[i % 3][1],
+                costo_unitario=Decimal('1'), costo_total=Decimal('1'), usuario=cls.usuario,
+                fecha_movimiento=ahora - timedelta(days=i % 6, hours=i)
+            )
+            for i in range(60)
+        ])
+
+    def _en_vivo(self, fecha_desde=None, fecha_hasta=None, tipo_movimiento=None, producto_id=None):
+        movimientos = MovimientoInventario.objects.filter(
+            **filtro_rango('fecha_movimiento', fecha_desde, fecha_hasta)
+        )
+        if tipo_movimiento:
+            movimientos = movimientos.filter(tipo_movimiento=tipo_movimiento)
+        if producto_id:
+            movimientos = movimientos.filter(producto_normal__producto_id=producto_id)
+        return ResumenMovimientosService.totales_en_vivo(movimientos)
+
+    def test_totales_coinciden_con_agregado_en_vivo(self):
+        resultado = ResumenMovimientosService.recalcular()
+        self.assertGreater(resultado['filas'], 0)
+        self.assertEqual(resultado['fecha_hasta'], timezone.localdate() - timedelta(days=1))
+
+        hoy = timezone.localdate()
+        casos = [
+            {},
+            {'fecha_desde': hoy - timedelta(days=3)},
+            {'fecha_desde': hoy - timedelta(days=4), 'fecha_hasta': hoy - timedelta(days=2)},
+            {'fecha_desde': hoy},
+            {'tipo_movimiento': 'SALIDA_VENTA'},
+            {'producto_id': self.inventarios[0].producto_id, 'fecha_hasta': hoy},
+        ]
+        for filtros in casos:
+            with self.subTest(**{k: str(v) for k, v in filtros.items()}):
+                with CaptureQueriesContext(connection) as contexto:
+                    totales = ResumenMovimientosService.totales(**filtros)
+                # Último día resumido + resumen + días recientes en vivo
+                self.assertLessEqual(len(contexto), 3)
+                self.assertEqual(totales, self._en_vivo(**filtros))
+
+    def test_recalculo_incremental_no_duplica(self):
+        ResumenMovimientosService.recalcular()
+        filas = ResumenMovimientoDiario.objects.count()
+
+        ResumenMovimientosService.recalcular()
+
+        self.assertEqual(ResumenMovimientoDiario.objects.count(), filas)
+        self.assertEqual(ResumenMovimientosService.totales(), self._en_vivo())
+
+
+class LimpiezaSnapshotsTests(TestCase):
+    """La limpieza de snapshots es una tarea programada, no una señal"""
+
+    def _snapshot(self, tipo, dias):
+        return SnapshotDashboard.objects.create(
+            tipo=tipo, fecha_snapshot=timezone.now() - timedelta(days=dias)
+        )
+
+    def test_tarea_elimina_segun_antiguedad(self):
+        horario_viejo = self._snapshot('AUTOMATICO', 10)
+        horario_reciente = self._snapshot('AUTOMATICO', 2)
+        diario_viejo = self._snapshot('CIERRE_DIA', 120)
+        manual = self._snapshot('MANUAL', 400)
+
+        # Crear snapshots ya no dispara la limpieza
+        self.assertTrue(SnapshotDashboard.objects.filter(pk=horario_viejo.pk).exists())
+
+        resultado = limpiar_snapshots_antiguos()
+
+        restantes = set(SnapshotDashboard.objects.values_list('pk', flat=True))
+        self.assertNotIn(horario_viejo.pk, restantes)
+        self.assertIn(horario_reciente.pk, restantes)
+        self.assertIn(manual.pk, restantes)
+        eliminado_diario = diario_viejo.pk not in restantes
+        self.assertEqual(eliminado_diario, timezone.localtime(diario_viejo.fecha_snapshot).day != 1)
+        self.assertEqual(resultado, {'detallados': 1, 'diarios': int(eliminado_diario)})
+
+
+class ReplicaReportesTests(TransactionTestCase):
+    """
+    Enrutamiento a la réplica `reporting` (en pruebas, espejo de default).
+    TransactionTestCase: la réplica no ve datos de una transacción abierta.
+    """
+    databases = {'default', 'reporting'}
+
+    def _consultas(self, funcion):
+        """Ejecuta `funcion` y devuelve (consultas primario, consultas réplica)"""
+        with CaptureQueriesContext(connections['default']) as primario, \
+                CaptureQueriesContext(connections['reporting']) as replica:
+            funcion()
+        return len(primario), len(replica)
+
+    def test_generador_lee_de_la_replica(self):
+        Categoria.objects.create(nombre='Granos')
+
+        primario, replica = self._consultas(InventoryReportGenerator().reporte_por_categoria)
+
+        self.assertEqual(primario, 0)
+        self.assertGreater(replica, 0)
+
+    def test_lecturas_normales_y_escrituras_van_al_primario(self):
+        self.assertEqual(Categoria.objects.all().db, 'default')
+
+        with lectura_reportes() as alias:
+            self.assertEqual(alias, 'reporting')
+            self.assertEqual(Categoria.objects.all().db, 'reporting')
+            primario, replica = self._consultas(lambda: Categoria.objects.create(nombre='Aceites'))
+
+        self.assertEqual(replica, 0)
+        self.assertGreater(primario, 0)
+
+    def test_exportacion_fija_el_alias_en_el_queryset(self):
+        exportacion = ExportacionVentas({})
+
+        self.assertEqual(exportacion.consulta().db, 'reporting')
+        self.assertEqual(self._consultas(exportacion.contar), (0, 1))
+
+    def test_transaccion_abierta_lee_del_primario(self):
+        with transaction.atomic():
+            Categoria.objects.create(nombre='Granos')
+            with lectura_reportes() as alias:
+                self.assertEqual(alias, 'default')
+
+    def test_retraso_de_la_replica(self):
+        hoy = timezone.localdate()
+
+        with mock.patch('commercebox.db_router.retraso_replica', return_value=60):
+            # Hoy solo tolera REPORTES_REPLICA_RETRASO_MAXIMO
+            self.assertEqual(alias_reportes(), 'default')
+            self.assertEqual(alias_reportes(hoy), 'default')
+            # Días cerrados: la réplica ya los tiene completos
+            self.assertEqual(alias_reportes(hoy - timedelta(days=2)), 'reporting')
+            with lectura_reportes(hoy) as alias:
+                self.assertEqual(alias, 'default')
+
+        with mock.patch('commercebox.db_router.retraso_replica', return_value=None):
+            self.assertEqual(alias_reportes(hoy - timedelta(days=2)), 'default')
+
+    def test_contexto_anidado_conserva_la_decision_exterior(self):
+        hoy = timezone.localdate()
+
+        with mock.patch('commercebox.db_router.retraso_replica', return_value=60):
+            with lectura_reportes(hoy - timedelta(days=30)) as exterior:
+                with lectura_reportes(hoy) as interior:
+                    self.assertEqual((exterior, interior), ('reporting', 'reporting'))
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ExportacionesTests(DatosInventarioMixin, TestCase):
+    """
+    Motor de exportación: CSV en streaming, Excel write_only, límite del PDF
+    y paso a segundo plano por encima de EXPORTACION_UMBRAL_ASINCRONO
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls._crear_base()
+        cls._poblar(productos=10, movimientos=40)
+        cls.total_ventas = Venta.objects.count()
+
+    def setUp(self):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio)
+        media = override_settings(MEDIA_ROOT=directorio)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def test_csv_en_streaming(self):
+        exportacion = ExportacionVentas({})
+
+        # El generador no consulta nada hasta que se consume
+        with self.assertNumQueries(0):
+            lineas = generar_csv(exportacion)
+            response = respuesta_exportacion(exportacion, 'CSV')
+        self.assertTrue(response.streaming)
+
+        lineas = list(lineas)
+        self.assertEqual(lineas[0], '\ufeff')
+        self.assertTrue(lineas[1].startswith('N° Venta,Fecha,Cliente'))
+        self.assertEqual(len(lineas), 2 + self.total_ventas + 1)
+        self.assertIn('TOTALES:', lineas[-1])
+
+    def test_excel_write_only(self):
+        from openpyxl import Workbook, load_workbook
+
+        destino = io.BytesIO()
+        with mock.patch('openpyxl.Workbook', wraps=Workbook) as libro:
+            respuesta = respuesta_exportacion(ExportacionVentas({}), 'EXCEL')
+            for bloque in respuesta.streaming_content:
+                destino.write(bloque)
+        libro.assert_called_once_with(write_only=True)
+
+        hoja = load_workbook(destino)['Ventas']
+        self.assertEqual(hoja.cell(row=3, column=1).value, 'N° Venta')
+        # Título, fila vacía, encabezados, datos, fila vacía y totales
+        self.assertEqual(hoja.max_row, 3 + self.total_ventas + 2)
+        self.assertEqual(hoja.cell(row=4, column=9).number_format, '$#,##0.00')
+        self.assertEqual(hoja.cell(row=hoja.max_row, column=8).value, 'TOTALES:')
+
+    @override_settings(EXPORTACION_PDF_MAX_FILAS=2)
+    def test_pdf_respeta_el_limite_de_filas(self):
+        exportacion = ExportacionVentas({})
+        original = ExportacionVentas.iterar_filas
+
+        with mock.patch.object(
+            ExportacionVentas, 'iterar_filas', autospec=True, side_effect=original
+        ) as iterar:
+            respuesta = respuesta_exportacion(exportacion, 'PDF')
+            contenido = b''.join(respuesta.streaming_content)
+
+        self.assertTrue(contenido.startswith(b'%PDF'))
+        self.assertEqual(iterar.call_args.kwargs, {'limite': 2})
+        self.assertEqual(len(list(original(exportacion, limite=2))), 2)
+
+    @override_settings(EXPORTACION_UMBRAL_ASINCRONO=2, EXPORTACION_PDF_MAX_FILAS=2)
+    def test_volumen_grande_se_encola(self):
+        request = RequestFactory().get('/panel/ventas/export-all/excel/')
+        request.user = self.usuario
+
+        # El PDF se recorta a EXPORTACION_PDF_MAX_FILAS y sigue siendo inmediato
+        self.assertEqual(ExportService.exportar(request, ExportacionVentas({}), 'PDF').status_code, 200)
+
+        with mock.patch('apps.reports_analytics.tasks.generar_exportacion.delay') as delay, \
+                self.captureOnCommitCallbacks(execute=True):
+            response = ExportService.exportar(request, ExportacionVentas({}), 'EXCEL')
+
+        self.assertEqual(response.status_code, 202)
+        datos = json.loads(response.content)
+        reporte = ReporteGuardado.objects.get(id=datos['reporte_id'])
+        self.assertEqual((reporte.estado, reporte.formato), ('PENDIENTE', 'EXCEL'))
+        self.assertEqual(reporte.datos['total_filas'], self.total_ventas)
+        self.assertEqual(datos['url_estado'], reverse(
+            'reports_analytics:api_estado_ejecucion', kwargs={'reporte_id': reporte.id}
+        ))
+        delay.assert_called_once_with(str(reporte.id))
+
+        generar_exportacion(str(reporte.id))
+
+        reporte.refresh_from_db()
+        self.assertEqual(reporte.estado, 'COMPLETADO')
+        self.assertTrue(reporte.archivo.name.endswith('.xlsx'))
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class CacheReportesTests(TestCase):
+    """
+    Claves de caché de ReportExecutionService: versión global para períodos
+    abiertos y versión por mes para los cerrados
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create(
+            username='cache', email='cache@example.com', codigo_empleado='CACHE',
+            nombres='Cache', apellidos='Reportes', documento_identidad='0000000001'
+        )
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.hoy = timezone.localdate()
+
+    def _parametros(self, desde, hasta):
+        return {'fecha_desde': desde.isoformat(), 'fecha_hasta': hasta.isoformat(), 'filtros': {}}
+
+    def _vender(self, fecha):
+        with self.captureOnCommitCallbacks(execute=True):
+            Venta.objects.create(
+                numero_venta=f'V-CACHE-{uuid.uuid4().hex[:6]}', vendedor=self.usuario,
+                estado='COMPLETADA', fecha_venta=timezone.make_aware(datetime.combine(fecha, datetime.min.time()))
+            )
+
+    def test_acierto_y_fallo(self):
+        parametros = self._parametros(self.hoy - timedelta(days=7), self.hoy)
+
+        with mock.patch.object(ReportExecutionService, 'ejecutar', return_value={'total': 1}) as ejecutar:
+            self.assertEqual(ReportExecutionService.obtener('ventas_periodo', parametros), ({'total': 1}, False))
+            self.assertEqual(ReportExecutionService.obtener('ventas_periodo', parametros), ({'total': 1}, True))
+            ReportExecutionService.obtener('ventas_periodo', {**parametros, 'filtros': {'x': 1}})
+
+        self.assertEqual(ejecutar.call_count, 2)
+
+    def test_periodo_abierto_se_invalida_al_confirmar(self):
+        parametros = self._parametros(self.hoy - timedelta(days=7), self.hoy)
+        clave, cerrado = ReportExecutionService.calcular_clave('ventas_periodo', parametros)
+        self.assertFalse(cerrado)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            Venta.objects.create(numero_venta='V-CACHE-1', vendedor=self.usuario, estado='COMPLETADA')
+            # Sin confirmar, otras conexiones no ven el cambio: la clave se mantiene
+            self.assertEqual(ReportExecutionService.calcular_clave('ventas_periodo', parametros)[0], clave)
+        for callback in callbacks:
+            callback()
+
+        self.assertNotEqual(ReportExecutionService.calcular_clave('ventas_periodo', parametros)[0], clave)
+
+    def test_periodo_cerrado_solo_cambia_con_su_mes(self):
+        parametros = self._parametros(self.hoy - timedelta(days=60), self.hoy - timedelta(days=40))
+        clave, cerrado = ReportExecutionService.calcular_clave('ventas_periodo', parametros)
+        self.assertTrue(cerrado)
+
+        # Ventas de hoy o de meses fuera del rango no lo afectan
+        self._vender(self.hoy)
+        self._vender(self.hoy - timedelta(days=100))
+        self.assertEqual(ReportExecutionService.calcular_clave('ventas_periodo', parametros)[0], clave)
+
+        # Una venta con fecha dentro del período (ej: sincronizada desde un POS fuera de línea) sí
+        self._vender(self.hoy - timedelta(days=50))
+        nueva = ReportExecutionService.calcular_clave('ventas_periodo', parametros)[0]
+        self.assertNotEqual(nueva, clave)
+
+        # Sin fechas conocidas (carga masiva) se invalidan todos los cerrados
+        ReportExecutionService.invalidar()
+        self.assertNotEqual(ReportExecutionService.calcular_clave('ventas_periodo', parametros)[0], nueva)
+
+    @override_settings(REPORTES_CACHE_TIMEOUT=60, REPORTES_CACHE_TIMEOUT_CERRADO=3600)
+    def test_periodo_cerrado_expira(self):
+        with mock.patch('apps.reports_analytics.services.report_execution_service.cache') as cache:
+            ReportExecutionService.guardar_resultado('abc', {}, True)
+            ReportExecutionService.guardar_resultado('def', {}, False)
+
+        self.assertEqual([c.kwargs['timeout'] for c in cache.set.call_args_list], [3600, 60])
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    REPORTES_DIAS_ASINCRONO=60
+)
+class EjecucionReportesTests(TestCase):
+    """
+    Páginas, APIs y dashboard pasan por ReportExecutionService; los rangos
+    largos se encolan y la tarea deja el resultado en caché
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create(
+            username='ejecucion', email='ejecucion@example.com', codigo_empleado='EJEC',
+            nombres='Ejecución', apellidos='Reportes', documento_identidad='0000000002'
+        )
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio)
+        media = override_settings(MEDIA_ROOT=directorio)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.hoy = timezone.localdate()
+        self.factory = RequestFactory()
+
+    def _request(self, **query):
+        request = self.factory.get('/', query)
+        request.user = self.usuario
+        return request
+
+    def _contexto(self, vista, request, **kwargs):
+        view = vista()
+        view.setup(request, **kwargs)
+        return view.get_context_data(**kwargs)
+
+    def _rango(self, dias):
+        return {
+            'fecha_desde': (self.hoy - timedelta(days=dias)).isoformat(),
+            'fecha_hasta': self.hoy.isoformat(),
+        }
+
+    def test_rango_largo_se_encola_y_la_tarea_llena_la_cache(self):
+        with mock.patch('apps.reports_analytics.tasks.ejecutar_reporte.delay') as delay, \
+                self.captureOnCommitCallbacks(execute=True):
+            response = VentasDiariasAPIView.as_view()(self._request(**self._rango(90), **{'async': '1'}))
+
+        self.assertEqual(response.status_code, 202)
+        datos = json.loads(response.content)
+        delay.assert_called_once_with(datos['reporte_id'])
+
+        ejecutar_reporte(datos['reporte_id'])
+
+        estado = json.loads(EstadoEjecucionReporteView.as_view()(
+            self._request(), reporte_id=datos['reporte_id']
+        ).content)
+        self.assertEqual(estado['estado'], 'COMPLETADO')
+        self.assertIn('ventas_diarias', estado['datos'])
+
+        # La misma consulta ya no se encola: se sirve desde la caché
+        with mock.patch.object(ReportExecutionService, 'ejecutar') as ejecutar:
+            response = VentasDiariasAPIView.as_view()(self._request(**self._rango(90), **{'async': '1'}))
+        self.assertEqual((response.status_code, response['X-Report-Cache']), (200, 'HIT'))
+        ejecutar.assert_not_called()
+
+    def test_api_sin_async_y_rango_corto_responden_en_linea(self):
+        with mock.patch.object(ReportExecutionService, 'encolar') as encolar:
+            largo = VentasDiariasAPIView.as_view()(self._request(**self._rango(90)))
+            corto = VentasDiariasAPIView.as_view()(self._request(**self._rango(7), **{'async': '1'}))
+
+        self.assertEqual((largo.status_code, corto.status_code), (200, 200))
+        encolar.assert_not_called()
+
+    def test_pagina_html_comparte_cache_y_muestra_la_ejecucion(self):
+        with mock.patch.object(ReportExecutionService, 'ejecutar', return_value={'dias': []}) as ejecutar:
+            contexto = self._contexto(VentasDiariasView, self._request(**self._rango(7)))
+            VentasDiariasAPIView.as_view()(self._request(**self._rango(7)))
+        self.assertEqual((contexto['reporte'], contexto['tiene_datos']), ({'dias': []}, True))
+        self.assertEqual(ejecutar.call_count, 1)
+
+        # Formulario inválido: no se ejecuta nada
+        self.assertFalse(self._contexto(VentasDiariasView, self._request(fecha_desde='x'))['tiene_datos'])
+
+        with mock.patch('apps.reports_analytics.tasks.ejecutar_reporte.delay'):
+            contexto = self._contexto(VentasDiariasView, self._request(**self._rango(90)))
+        self.assertNotIn('reporte', contexto)
+        self.assertEqual(contexto['ejecucion']['estado'], 'PENDIENTE')
+        self.assertTrue(contexto['ejecucion']['url_estado'].endswith(f"{contexto['ejecucion']['reporte_id']}/"))
+
+    def test_trazabilidad_y_dashboard_registrados(self):
+        with mock.patch.object(ReportExecutionService, 'ejecutar', return_value={}) as ejecutar:
+            self._contexto(TrazabilidadLoteView, self._request(), lote='L-001')
+        nombre, parametros = ejecutar.call_args.args
+        self.assertEqual((nombre, parametros['filtros']), ('trazabilidad_lote', {'lote_proveedor': 'L-001'}))
+
+        with mock.patch.object(ReportExecutionService, 'ejecutar', return_value={'alertas': []}) as ejecutar:
+            self._contexto(DashboardView, self._request())
+            response = DashboardAPIView.as_view()(self._request())
+        self.assertEqual(json.loads(response.content)['data'], {'alertas': []})
+        ejecutar.assert_called_once()
@@ -71,6 +71,7 @@ urlpatterns = [
     path('guardados/', views.ReportesGuardadosView.as_view(), name='reportes_guardados'),
     path('guardados/<uuid:reporte_id>/', views.ReporteDetalleView.as_view(), name='reporte_detalle'),
     path('guardados/<uuid:reporte_id>/descargar/', views.DescargarReporteView.as_view(), name='descargar_reporte'),
+    path('api/ejecuciones/<uuid:reporte_id>/', views.EstadoEjecucionReporteView.as_view(), name='api_estado_ejecucion'),
     
     # ============================================================================
     # CONFIGURACIÓN
@@ -103,6 +104,7 @@ urlpatterns = [
     # API ENDPOINTS - DASHBOARD DE INVENTARIO COMPLETO
     # ============================================================================
     path('api/inventario/valorizado/', views.InventarioValorizadoAPIView.as_view(), name='api_inventario_valorizado'),
+    path('api/inventario/valorizacion-cierre/', views.ValorizacionCierreAPIView.as_view(), name='api_valorizacion_cierre'),
     path('api/inventario/categorias/', views.InventarioCategoriasAPIView.as_view(), name='api_inventario_categorias'),
     path('api/inventario/criticos/', views.ProductosCriticosAPIView.as_view(), name='api_productos_criticos'),
     path('api/inventario/movimientos/', views.MovimientosInventarioAPIView.as_view(), name='api_movimientos_inventario'),
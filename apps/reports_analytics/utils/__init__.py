@@ -0,0 +1,27 @@
+from .paginacion import (
+    KeysetPaginator,
+    PaginaKeyset,
+    conteo_estimado,
+)
+from .periodos import (
+    Periodo,
+    agrupar_por_periodo,
+    filtro_dia,
+    filtro_rango,
+    inicio_del_dia,
+    rango_fechas,
+    truncar,
+)
+
+__all__ = [
+    'KeysetPaginator',
+    'PaginaKeyset',
+    'conteo_estimado',
+    'Periodo',
+    'agrupar_por_periodo',
+    'filtro_dia',
+    'filtro_rango',
+    'inicio_del_dia',
+    'rango_fechas',
+    'truncar',
+]
@@ -0,0 +1,266 @@
+# apps/reports_analytics/utils/paginacion.py
+
+"""
+Paginación por cursor (keyset) y conteos aproximados.
+
+`Paginator` de Django pagina con OFFSET y hace un COUNT(*) exacto en cada
+carga: la página 5000 obliga a la base de datos a recorrer y descartar
+100.000 filas, y el conteo recorre todo el conjunto filtrado. La paginación
+keyset filtra por la última fila vista sobre un orden único e indexado:
+
+    paginador = KeysetPaginator(movimientos, 20, orden=('-fecha_movimiento', '-id'))
+    pagina = paginador.pagina(request.GET.get('cursor'))
+    # WHERE (fecha_movimiento, id) < (:fecha, :id) ORDER BY ... LIMIT 21
+
+Cada página cuesta lo mismo sin importar su profundidad. Los cursores son
+opacos (firmados) y el total mostrado se estima con el planificador de
+PostgreSQL cuando supera `PAGINACION_UMBRAL_CONTEO`.
+
+Los campos de `orden` no pueden ser nulos y el último debe ser único
+(normalmente `id`).
+"""
+
+import json
+import math
+from datetime import date, datetime
+from decimal import Decimal
+from uuid import UUID
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+SALT_CURSOR = 'commercebox.paginacion'
+
+ADELANTE = 'n'
+ATRAS = 'p'
+
+
+def conteo_estimado(queryset, umbral=None):
+    """
+    Cantidad de filas del queryset, estimada si es grande
+
+    En PostgreSQL se lee la estimación del planificador (EXPLAIN, sin
+    ejecutar la consulta); si supera `umbral` se devuelve tal cual y, si
+    no, se hace el COUNT(*) exacto, que para conjuntos pequeños es barato.
+    En otros motores siempre es exacto.
+
+    Returns:
+        tuple: (conteo, es_estimado)
+    """
+    if umbral is None:
+        umbral = getattr(settings, 'PAGINACION_UMBRAL_CONTEO', 10000)
+
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        sql, params = queryset.order_by().query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        estimado = int(plan[0]['Plan']['Plan Rows'])
+        if estimado > umbral:
+            return estimado, True
+
+    return queryset.count(), False
+
+
+class PaginaKeyset:
+    """
+    Página de resultados con la interfaz de `django.core.paginator.Page`
+    que usan las plantillas, más los cursores de la página anterior y
+    siguiente
+    """
+
+    def __init__(self, object_list, number, paginator, hay_anterior, hay_siguiente):
+        self.object_list = object_list
+        self.number = number
+        self.paginator = paginator
+        self._hay_anterior = hay_anterior
+        self._hay_siguiente = hay_siguiente
+
+    def __repr__(self):
+        return f'<Página {self.number} (keyset)>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, indice):
+        return self.object_list[indice]
+
+    def has_next(self):
+        return self._hay_siguiente
+
+    def has_previous(self):
+        return self._hay_anterior
+
+    def has_other_pages(self):
+        return self._hay_anterior or self._hay_siguiente
+
+    def start_index(self):
+        if not self.object_list:
+            return 0
+        return (self.number - 1) * self.paginator.per_page + 1
+
+    def end_index(self):
+        return (self.number - 1) * self.paginator.per_page + len(self.object_list)
+
+    @cached_property
+    def next_cursor(self):
+        if not self._hay_siguiente:
+            return None
+        return self.paginator.cursor(self.object_list[-1], ADELANTE, self.number + 1)
+
+    @cached_property
+    def previous_cursor(self):
+        if not self._hay_anterior:
+            return None
+        return self.paginator.cursor(self.object_list[0], ATRAS, self.number - 1)
+
+
+class KeysetPaginator:
+    """
+    Paginador por cursor sobre un orden único
+
+    Args:
+        queryset: Consulta ya filtrada
+        per_page: Filas por página
+        orden: Campos de ordenamiento ('-fecha', '-id'); el último debe ser único
+        umbral_conteo: Desde cuántas filas se estima el total
+        conteo: Total ya conocido (p. ej. de un resumen); evita contar
+    """
+
+    def __init__(self, queryset, per_page, orden, umbral_conteo=None, conteo=None):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.orden = tuple(orden)
+        self.umbral_conteo = umbral_conteo
+        self.conteo = conteo
+        self._campos = [
+            (campo.lstrip('-'), campo.startswith('-')) for campo in self.orden
+        ]
+
+    # ------------------------------------------------------------------
+    # Conteo
+    # ------------------------------------------------------------------
+
+    @cached_property
+    def _conteo(self):
+        if self.conteo is not None:
+            return self.conteo, False
+        return conteo_estimado(self.queryset, self.umbral_conteo)
+
+    @property
+    def count(self):
+        return self._conteo[0]
+
+    @property
+    def count_es_estimado(self):
+        return self._conteo[1]
+
+    @property
+    def num_pages(self):
+        return max(1, math.ceil(self.count / self.per_page))
+
+    # ------------------------------------------------------------------
+    # Cursores
+    # ------------------------------------------------------------------
+
+    def _campo_modelo(self, nombre):
+        modelo = self.queryset.model
+        for parte in nombre.split('__')[:-1]:
+            modelo = modelo._meta.get_field(parte).related_model
+        return modelo._meta.get_field(nombre.split('__')[-1])
+
+    def _valores(self, objeto):
+        valores = []
+        for nombre, _ in self._campos:
+            valor = objeto
+            for parte in nombre.split('__'):
+                valor = getattr(valor, parte)
+            if isinstance(valor, (date, datetime)):
+                valor = valor.isoformat()
+            elif isinstance(valor, (Decimal, UUID)):
+                valor = str(valor)
+            valores.append(valor)
+        return valores
+
+    def cursor(self, objeto, direccion, numero):
+        """Cursor opaco que apunta justo después (o antes) de `objeto`"""
+        return signing.dumps(
+            {'v': self._valores(objeto), 'd': direccion, 'n': numero},
+            salt=SALT_CURSOR, compress=True
+        )
+
+    def _decodificar(self, cursor):
+        """(valores, dirección, número) o None si el cursor no es válido"""
+        try:
+            datos = signing.loads(cursor, salt=SALT_CURSOR)
+            if len(datos['v']) != len(self._campos):
+                return None
+            valores = [
+                self._campo_modelo(nombre).to_python(valor)
+                for (nombre, _), valor in zip(self._campos, datos['v'])
+            ]
+            return valores, datos['d'], max(1, int(datos['n']))
+        except (signing.BadSignature, KeyError, TypeError, ValueError, ValidationError):
+            return None
+
+    # ------------------------------------------------------------------
+    # Páginas
+    # ------------------------------------------------------------------
+
+    def _filtro_posterior(self, valores, hacia_atras):
+        """
+        Comparación lexicográfica: (a, b, c) después de (x, y, z) según el
+        sentido de cada campo
+        """
+        condicion = Q()
+        iguales = {}
+        for (nombre, descendente), valor in zip(self._campos, valores):
+            posterior = descendente != hacia_atras
+            condicion |= Q(**iguales, **{f'{nombre}__{"lt" if posterior else "gt"}': valor})
+            iguales[nombre] = valor
+        return condicion
+
+    def pagina(self, cursor=None):
+        """
+        Página apuntada por `cursor` (la primera si no hay cursor o no es válido)
+
+        Returns:
+            PaginaKeyset
+        """
+        decodificado = self._decodificar(cursor) if cursor else None
+
+        if decodificado is None:
+            filas = list(self.queryset.order_by(*self.orden)[:self.per_page + 1])
+            return PaginaKeyset(
+                filas[:self.per_page], 1, self, False, len(filas) > self.per_page
+            )
+
+        valores, direccion, numero = decodificado
+        hacia_atras = direccion == ATRAS
+        orden = self.orden
+        if hacia_atras:
+            orden = tuple(c[1:] if c.startswith('-') else f'-{c}' for c in self.orden)
+
+        filas = list(
+            self.queryset.filter(self._filtro_posterior(valores, hacia_atras))
+            .order_by(*orden)[:self.per_page + 1]
+        )
+        hay_mas = len(filas) > self.per_page
+        filas = filas[:self.per_page]
+
+        if hacia_atras:
+            filas.reverse()
+            return PaginaKeyset(filas, numero, self, hay_mas, True)
+        return PaginaKeyset(filas, numero, self, True, hay_mas)
+
@@ -0,0 +1,147 @@
+# apps/reports_analytics/utils/periodos.py
+
+"""
+Rangos de fechas compatibles con índices.
+
+Filtrar con `fecha_venta__date=dia` o `fecha_venta__date__gte=desde`
+envuelve la columna en una conversión (CAST / AT TIME ZONE) y la base de
+datos ya no puede usar el índice de `fecha_venta`. Estas utilidades
+convierten fechas locales del negocio en rangos semiabiertos
+[inicio, fin) de datetimes con zona horaria, que se comparan directamente
+contra la columna indexada:
+
+    Venta.objects.filter(**filtro_rango('fecha_venta', desde, hasta))
+    # WHERE fecha_venta >= '2024-01-01 00:00-05' AND fecha_venta < '2024-02-01 00:00-05'
+
+También permiten agrupar por día / semana / mes con Trunc* en una sola
+consulta agrupada.
+"""
+
+from datetime import date, datetime, time, timedelta
+
+from django.db.models.functions import TruncDate, TruncMonth, TruncWeek
+from django.utils import timezone
+
+
+GRANULARIDADES = {
+    'dia': TruncDate,
+    'semana': TruncWeek,
+    'mes': TruncMonth,
+}
+
+
+def _como_fecha(valor):
+    """Acepta date, datetime o 'YYYY-MM-DD' y devuelve la fecha local"""
+    if isinstance(valor, datetime):
+        if timezone.is_aware(valor):
+            return timezone.localtime(valor).date()
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    return date.fromisoformat(str(valor)[:10])
+
+
+def inicio_del_dia(fecha):
+    """Datetime con zona horaria de las 00:00 locales de `fecha`"""
+    return timezone.make_aware(datetime.combine(_como_fecha(fecha), time.min))
+
+
+def rango_fechas(fecha_desde, fecha_hasta=None):
+    """
+    Rango semiabierto [inicio, fin) que cubre los días locales indicados
+
+    Args:
+        fecha_desde: Primer día incluido
+        fecha_hasta: Último día incluido (por defecto el mismo fecha_desde)
+
+    Returns:
+        tuple: (inicio, fin) datetimes con zona horaria
+    """
+    fecha_hasta = _como_fecha(fecha_hasta if fecha_hasta is not None else fecha_desde)
+    return inicio_del_dia(fecha_desde), inicio_del_dia(fecha_hasta + timedelta(days=1))
+
+
+def filtro_rango(campo, fecha_desde=None, fecha_hasta=None):
+    """
+    kwargs de filtro equivalentes a `campo__date__gte` / `campo__date__lte`
+    pero sobre la columna sin transformar
+
+    Cualquiera de los extremos puede omitirse.
+
+    Returns:
+        dict: {'campo__gte': inicio, 'campo__lt': fin}
+    """
+    filtro = {}
+    if fecha_desde is not None:
+        filtro[f'{campo}__gte'] = inicio_del_dia(fecha_desde)
+    if fecha_hasta is not None:
+        filtro[f'{campo}__lt'] = inicio_del_dia(_como_fecha(fecha_hasta) + timedelta(days=1))
+    return filtro
+
+
+def filtro_dia(campo, fecha):
+    """kwargs de filtro equivalentes a `campo__date=fecha`"""
+    return filtro_rango(campo, fecha, fecha)
+
+
+def truncar(campo, granularidad='dia'):
+    """
+    Expresión Trunc* en la zona horaria local para agrupar por período
+
+    Raises:
+        ValueError: Si la granularidad no es 'dia', 'semana' o 'mes'
+    """
+    try:
+        funcion = GRANULARIDADES[granularidad]
+    except KeyError:
+        raise ValueError(f"Granularidad no soportada: {granularidad}")
+    return funcion(campo, tzinfo=timezone.get_current_timezone())
+
+
+def agrupar_por_periodo(queryset, campo, granularidad='dia', **agregados):
+    """
+    Agrupa un queryset por día / semana / mes en una sola consulta
+
+    Args:
+        queryset: Queryset ya filtrado (idealmente con filtro_rango)
+        campo: Campo datetime a truncar (admite lookups: 'venta__fecha_venta')
+        granularidad: 'dia', 'semana' o 'mes'
+        **agregados: Agregaciones a calcular por período
+
+    Returns:
+        QuerySet de dicts {'periodo': date | datetime, **agregados} ordenado por período
+    """
+    return queryset.annotate(
+        periodo=truncar(campo, granularidad)
+    ).values('periodo').annotate(**agregados).order_by('periodo')
+
+
+class Periodo:
+    """
+    Período de reporte expresado en días locales (ambos inclusive)
+
+    Uso:
+        periodo = Periodo(fecha_desde, fecha_hasta)
+        Venta.objects.filter(**periodo.filtro('fecha_venta'))
+    """
+
+    def __init__(self, fecha_desde, fecha_hasta):
+        self.fecha_desde = _como_fecha(fecha_desde)
+        self.fecha_hasta = _como_fecha(fecha_hasta)
+        self.inicio, self.fin = rango_fechas(self.fecha_desde, self.fecha_hasta)
+
+    def __repr__(self):
+        return f"<Periodo {self.fecha_desde} → {self.fecha_hasta}>"
+
+    @property
+    def dias(self):
+        return (self.fecha_hasta - self.fecha_desde).days + 1
+
+    def filtro(self, campo):
+        """kwargs {'campo__gte': inicio, 'campo__lt': fin}"""
+        return {f'{campo}__gte': self.inicio, f'{campo}__lt': self.fin}
+
+    def anterior(self):
+        """Período inmediatamente anterior de igual duración"""
+        fecha_hasta = self.fecha_desde - timedelta(days=1)
+        return Periodo(fecha_hasta - timedelta(days=self.dias - 1), fecha_hasta)
@@ -4,23 +4,19 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.views import View
 from django.views.generic import TemplateView, ListView, DetailView
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, FileResponse
 from django.utils import timezone
 from django.contrib import messages
-from datetime import timedelta, datetime
+from django.urls import reverse
+from datetime import timedelta
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from decimal import Decimal
 import json
-from .generators import (
-    DashboardDataGenerator,
-    InventoryReportGenerator,
-    SalesReportGenerator,
-    FinancialReportGenerator,
-    TraceabilityReportGenerator
-)
+import logging
+from .generators import DashboardDataGenerator
 from .forms import (
     FiltroFechasForm,
     FiltroVentasForm,
@@ -31,6 +27,10 @@ from .forms import (
     ExportarReporteForm
 )
 from .models import ReporteGuardado, ConfiguracionReporte
+from .exporters import ExportService, EXPORTACIONES
+from .services import ReportExecutionService
+
+logger = logging.getLogger('commercebox')
 
 
 # ============================================================================
@@ -44,10 +44,132 @@ class ReportesAccessMixin(LoginRequiredMixin):
     """
     pass
 
+
+def _datos_ejecucion(reporte):
+    """Respuesta de un reporte encolado: id, estado y URL para consultar el progreso"""
+    return {
+        'asincrono': True,
+        'reporte_id': str(reporte.id),
+        'nombre': reporte.nombre,
+        'estado': reporte.estado,
+        'progreso': reporte.progreso,
+        'url_estado': reverse(
+            'reports_analytics:api_estado_ejecucion', kwargs={'reporte_id': reporte.id}
+        ),
+    }
+
+
+class ReporteAPIMixin:
+    """
+    API JSON de un reporte registrado en services.REPORTES
+
+    El resultado se sirve desde caché cuando ya fue calculado para los
+    mismos parámetros. Con `?async=1` (el cliente sabe consultar el
+    progreso) un reporte pesado o de rango largo no calculado se encola en
+    Celery y se responde 202 con la URL de api_estado_ejecucion.
+    """
+    reporte = None
+    
+    def get(self, request):
+        try:
+            parametros = ReportExecutionService.parametros_desde_request(self.reporte, request.GET)
+            resultado = ReportExecutionService.resolver(
+                self.reporte, parametros, request.user,
+                permitir_asincrono=request.GET.get('async') in ('1', 'true')
+            )
+            
+            if resultado.ejecucion is not None:
+                return JsonResponse(_datos_ejecucion(resultado.ejecucion), status=202)
+            
+            response = JsonResponse(resultado.datos, safe=False)
+            response['X-Report-Cache'] = 'HIT' if resultado.desde_cache else 'MISS'
+            return response
+            
+        except ValueError as e:
+            return JsonResponse({'error': f'Parámetros inválidos: {e}'}, status=400)
+        except Exception as e:
+            logger.error(f"Error en reporte {self.reporte}: {str(e)}", exc_info=True)
+            return JsonResponse({'error': str(e)}, status=500)
+
+
+class ReporteHTMLMixin:
+    """
+    Página HTML de un reporte registrado en services.REPORTES
+
+    Usa ReportExecutionService igual que la API: caché compartida y, para
+    reportes pesados o rangos largos, ejecución en Celery. Mientras se
+    calcula, el contexto trae `ejecucion` (con `url_estado`) en lugar de
+    `reporte`.
+
+    form_class: Formulario de filtros. Con `requiere_filtros` el reporte
+        solo se genera si el formulario es válido; sin él, un formulario
+        inválido usa el período por defecto del reporte.
+    """
+    reporte = None
+    form_class = None
+    requiere_filtros = True
+    
+    def get_consulta(self, form):
+        """Parámetros del reporte: GET, argumentos de la URL y fechas validadas"""
+        consulta = {**self.request.GET.dict(), **self.kwargs}
+        if form is not None:
+            consulta.pop('fecha_desde', None)
+            consulta.pop('fecha_hasta', None)
+            if form.is_valid():
+                for campo in ('fecha_desde', 'fecha_hasta'):
+                    if form.cleaned_data.get(campo):
+                        consulta[campo] = form.cleaned_data[campo].isoformat()
+        return consulta
+    
+    def procesar_reporte(self, reporte, form):
+        """Ajustes sobre el resultado antes de mostrarlo (ej: filtros en memoria)"""
+        return reporte
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        
+        form = self.form_class(self.request.GET or None) if self.form_class else None
+        if form is not None:
+            context['form'] = form
+            if self.requiere_filtros and not form.is_valid():
+                context['tiene_datos'] = False
+                return context
+        
+        try:
+            parametros = ReportExecutionService.parametros_desde_request(
+                self.reporte, self.get_consulta(form)
+            )
+        except ValueError as e:
+            context['error'] = f'Parámetros inválidos: {e}'
+            context['tiene_datos'] = False
+            return context
+        
+        resultado = ReportExecutionService.resolver(
+            self.reporte, parametros, self.request.user, permitir_asincrono=True
+        )
+        if resultado.ejecucion is not None:
+            context['ejecucion'] = _datos_ejecucion(resultado.ejecucion)
+            context['tiene_datos'] = False
+        else:
+            context['reporte'] = self.procesar_reporte(resultado.datos, form)
+            context['tiene_datos'] = True
+        
+        return context
+
+
+
 # ============================================================================
 # DASHBOARD
 # ============================================================================
 
+def _datos_dashboard():
+    """Dashboard completo desde la caché de reportes (compartida entre la página y su API)"""
+    datos, _ = ReportExecutionService.obtener(
+        'dashboard', ReportExecutionService.parametros_desde_request('dashboard', {})
+    )
+    return datos
+
+
 class DashboardView(ReportesAccessMixin, TemplateView):
     """
     Dashboard principal con métricas en tiempo real
@@ -57,11 +179,7 @@ class DashboardView(ReportesAccessMixin, TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        # Generar dashboard
-        generator = DashboardDataGenerator()
-        dashboard_data = generator.generar_dashboard_completo()
-        
-        context['dashboard'] = dashboard_data
+        context['dashboard'] = _datos_dashboard()
         context['fecha_actualizacion'] = timezone.now()
         
         return context
@@ -72,12 +190,9 @@ class DashboardActualizarView(ReportesAccessMixin, View):
     Actualización AJAX del dashboard
     """
     def get(self, request):
-        generator = DashboardDataGenerator()
-        dashboard_data = generator.generar_dashboard_completo()
-        
         return JsonResponse({
             'success': True,
-            'data': dashboard_data,
+            'data': _datos_dashboard(),
             'timestamp': timezone.now().isoformat()
         })
 
@@ -93,214 +208,76 @@ class ReporteVentasView(ReportesAccessMixin, TemplateView):
     template_name = 'custom_admin/reportes/ventas_index.html'
 
 
-class VentasPeriodoView(ReportesAccessMixin, TemplateView):
+class VentasPeriodoView(ReportesAccessMixin, ReporteHTMLMixin, TemplateView):
     """
     Reporte general de ventas por período
     """
     template_name = 'reports/ventas/periodo.html'
-    
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        
-        # Formulario de filtros
-        form = FiltroVentasForm(self.request.GET or None)
-        context['form'] = form
-        
-        if form.is_valid():
-            fecha_desde = form.cleaned_data['fecha_desde']
-            fecha_hasta = form.cleaned_data['fecha_hasta']
-            
-            # Generar reporte
-            generator = SalesReportGenerator(fecha_desde, fecha_hasta)
-            
-            # Aplicar filtros adicionales si los hay
-            reporte = generator.reporte_ventas_periodo()
-            
-            context['reporte'] = reporte
-            context['tiene_datos'] = True
-        else:
-            context['tiene_datos'] = False
-        
-        return context
+    reporte = 'ventas_periodo'
+    form_class = FiltroVentasForm
 
 
-class VentasDiariasView(ReportesAccessMixin, TemplateView):
+class VentasDiariasView(ReportesAccessMixin, ReporteHTMLMixin, TemplateView):
     """
     Ventas desglosadas por día
     """
     template_name = 'reports/ventas/diarias.html'
-    
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        
-        form = FiltroFechasForm(self.request.GET or None)
-        context['form'] = form
-        
-        if form.is_valid():
-            generator = SalesReportGenerator(
-                form.cleaned_data['fecha_desde'],
-                form.cleaned_data['fecha_hasta']
-            )
-            context['reporte'] = generator.reporte_ventas_diarias()
-            context['tiene_datos'] = True
-        else:
-            context['tiene_datos'] = False
-        
-        return context
+    reporte = 'ventas_diarias'
+    form_class = FiltroFechasForm
 
 
-class ProductosMasVendidosView(ReportesAccessMixin, TemplateView):
+class ProductosMasVendidosView(ReportesAccessMixin, ReporteHTMLMixin, TemplateView):
     """
-    Top productos más vendidos
+    Top productos más vendidos (`?limite=`, 20 por defecto)
     """
     template_name = 'reports/ventas/productos_top.html'
-    
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        
-        form = FiltroFechasForm(self.request.GET or None)
-        limite = int(self.request.GET.get('limite', 20))
-        
-        context['form'] = form
-        
-        if form.is_valid():
-            generator = SalesReportGenerator(
-                form.cleaned_data['fecha_desde'],
-                form.cleaned_data['fecha_hasta']
-            )
-            context['reporte'] = generator.reporte_productos_mas_vendidos(limite=limite)
-            context['tiene_datos'] = True
-        else:
-            context['tiene_datos'] = False
-        
-        return context
+    reporte = 'productos_top'
+    form_class = FiltroFechasForm
 
 
-class VentasCategoriasView(ReportesAccessMixin, TemplateView):
+class VentasCategoriasView(ReportesAccessMixin, ReporteHTMLMixin, TemplateView):
     """
     Análisis de ventas por categoría
     """
     template_name = 'reports/ventas/categorias.html'
-    
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        
-        form = FiltroFechasForm(self.request.GET or None)
-        context['form'] = form
-        
-        if form.is_valid():
-            generator = SalesReportGenerator(
-                form.cleaned_data['fecha_desde'],
-                form.cleaned_data['fecha_hasta']
-            )
-            context['reporte'] = generator.reporte_ventas_por_categoria()
-            context['tiene_datos'] = True
-        else:
-            context['tiene_datos'] = False
-        
-        return context
+    reporte = 'ventas_categorias'
+    form_class = FiltroFechasForm
 
 
-class VentasVendedoresView(ReportesAccessMixin, TemplateView):
+class VentasVendedoresView(ReportesAccessMixin, ReporteHTMLMixin, TemplateView):
     """
     Análisis de ventas por vendedor
     """
     template_name = 'reports/ventas/vendedores.html'
-    
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        
-        form = FiltroFechasForm(self.request.GET or None)
-        context['form'] = form
-        
-        if form.is_valid():
-            generator = SalesReportGenerator(
-                form.cleaned_data['fecha_desde'],
-                form.cleaned_data['fecha_hasta']
-            )
-            context['reporte'] = generator.reporte_ventas_por_vendedor()
-            context['tiene_datos'] = True
-        else:
-            context['tiene_datos'] = False
-        
-        return context
+    reporte = 'ventas_vendedores'
+    form_class = FiltroFechasForm
 
 
-class ClientesTopView(ReportesAccessMixin, TemplateView):
+class ClientesTopView(ReportesAccessMixin, ReporteHTMLMixin, TemplateView):
     """
-    Top clientes por volumen de compras
+    Top clientes por volumen de compras (`?limite=`, 20 por defecto)
     """
     template_name = 'reports/ventas/clientes_top.html'
-    
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        
-        form = FiltroFechasForm(self.request.GET or None)
-        limite = int(self.request.GET.get('limite', 20))
-        
-        context['form'] = form
-        
-        if form.is_valid():
-            generator = SalesReportGenerator(
-                form.cleaned_data['fecha_desde'],
-                form.cleaned_data['fecha_hasta']
-            )
-            context['reporte'] = generator.reporte_clientes_top(limite=limite)
-            context['tiene_datos'] = True
-        else:
-            context['tiene_datos'] = False
-        
-        return context
+    reporte = 'clientes_top'
+    form_class = FiltroFechasForm
 
 
-class DevolucionesView(ReportesAccessMixin, TemplateView):
+class DevolucionesView(ReportesAccessMixin, ReporteHTMLMixin, TemplateView):
     """
     Análisis de devoluciones
     """
     template_name = 'reports/ventas/devoluciones.html'
-    
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        
-        form = FiltroFechasForm(self.request.GET or None)
-        context['form'] = form
-        
-        if form.is_valid():
-            generator = SalesReportGenerator(
-                form.cleaned_data['fecha_desde'],
-                form.cleaned_data['fecha_hasta']
-            )
-            context['reporte'] = generator.reporte_devoluciones()
-            context['tiene_datos'] = True
-        else:
-            context['tiene_datos'] = False
-        
-        return context
+    reporte = 'devoluciones'
+    form_class = FiltroFechasForm
 
 
-class ComparativoView(ReportesAccessMixin, TemplateView):
+class ComparativoView(ReportesAccessMixin, ReporteHTMLMixin, TemplateView):
     """
     Comparación entre períodos
     """
     template_name = 'reports/ventas/comparativo.html'
-    
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        
-        form = FiltroFechasForm(self.request.GET or None)
-        context['form'] = form
-        
-        if form.is_valid():
-            generator = SalesReportGenerator(
-                form.cleaned_data['fecha_desde'],
-                form.cleaned_data['fecha_hasta']
-            )
-            context['reporte'] = generator.reporte_comparativo_periodos()
-            context['tiene_datos'] = True
-        else:
-            context['tiene_datos'] = False
-        
-        return context
+    reporte = 'comparativo'
+    form_class = FiltroFechasForm
 
 
 # ============================================================================
@@ -314,153 +291,95 @@ class ReporteInventarioView(ReportesAccessMixin, TemplateView):
     template_name = 'custom_admin/reportes/inventario_index.html'
 
 
-class InventarioValorizadoView(ReportesAccessMixin, TemplateView):
+class InventarioValorizadoView(ReportesAccessMixin, ReporteHTMLMixin, TemplateView):
     """
     Inventario valorizado completo
     """
     template_name = 'reports/inventario/valorizado.html'
+    reporte = 'inventario_valorizado'
+    form_class = FiltroInventarioForm
+    requiere_filtros = False
     
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        
-        form = FiltroInventarioForm(self.request.GET or None)
-        context['form'] = form
-        
-        # Generar reporte
-        generator = InventoryReportGenerator()
-        reporte = generator.reporte_inventario_valorizado()
+    def procesar_reporte(self, reporte, form):
+        # El reporte en caché es el completo; los filtros del formulario se aplican aquí
+        if not form.is_valid():
+            return reporte
+        
+        tipo = form.cleaned_data.get('tipo_producto')
+        categoria = form.cleaned_data.get('categoria')
+        proveedor = form.cleaned_data.get('proveedor')
+        
+        # Filtrar quintales
+        if tipo == 'QUINTAL' or tipo == 'TODOS':
+            quintales = reporte['quintales']['items']
+            
+            if categoria:
+                quintales = [q for q in quintales if q['categoria'] == categoria.nombre]
+            if proveedor:
+                quintales = [q for q in quintales if q['proveedor'] == proveedor.nombre_comercial]
+            
+            reporte['quintales']['items'] = quintales
+            reporte['quintales']['cantidad'] = len(quintales)
+        else:
+            reporte['quintales']['items'] = []
+            reporte['quintales']['cantidad'] = 0
         
-        # Aplicar filtros del formulario si es válido
-        if form.is_valid():
-            tipo = form.cleaned_data.get('tipo_producto')
-            categoria = form.cleaned_data.get('categoria')
-            proveedor = form.cleaned_data.get('proveedor')
+        # Filtrar productos normales
+        if tipo == 'NORMAL' or tipo == 'TODOS':
+            productos = reporte['productos_normales']['items']
             
-            # Filtrar quintales
-            if tipo == 'QUINTAL' or tipo == 'TODOS':
-                quintales = reporte['quintales']['items']
-                
-                if categoria:
-                    quintales = [q for q in quintales if q['categoria'] == categoria.nombre]
-                if proveedor:
-                    quintales = [q for q in quintales if q['proveedor'] == proveedor.nombre_comercial]
-                
-                reporte['quintales']['items'] = quintales
-                reporte['quintales']['cantidad'] = len(quintales)
-            else:
-                reporte['quintales']['items'] = []
-                reporte['quintales']['cantidad'] = 0
+            if categoria:
+                productos = [p for p in productos if p['categoria'] == categoria.nombre]
             
-            # Filtrar productos normales
-            if tipo == 'NORMAL' or tipo == 'TODOS':
-                productos = reporte['productos_normales']['items']
-                
-                if categoria:
-                    productos = [p for p in productos if p['categoria'] == categoria.nombre]
-                
-                reporte['productos_normales']['items'] = productos
-                reporte['productos_normales']['cantidad'] = len(productos)
-            else:
-                reporte['productos_normales']['items'] = []
-                reporte['productos_normales']['cantidad'] = 0
+            reporte['productos_normales']['items'] = productos
+            reporte['productos_normales']['cantidad'] = len(productos)
+        else:
+            reporte['productos_normales']['items'] = []
+            reporte['productos_normales']['cantidad'] = 0
         
-        context['reporte'] = reporte
-        return context
+        return reporte
 
 
-class InventarioCategoriasView(ReportesAccessMixin, TemplateView):
+class InventarioCategoriasView(ReportesAccessMixin, ReporteHTMLMixin, TemplateView):
     """
     Inventario agrupado por categoría
     """
     template_name = 'reports/inventario/categorias.html'
-    
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        
-        generator = InventoryReportGenerator()
-        context['reporte'] = generator.reporte_por_categoria()
-        
-        return context
+    reporte = 'inventario_categorias'
 
 
-class ProductosCriticosView(ReportesAccessMixin, TemplateView):
+class ProductosCriticosView(ReportesAccessMixin, ReporteHTMLMixin, TemplateView):
     """
     Productos que requieren atención inmediata
     """
     template_name = 'reports/inventario/criticos.html'
-    
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        
-        generator = InventoryReportGenerator()
-        context['reporte'] = generator.reporte_productos_criticos()
-        
-        return context
+    reporte = 'productos_criticos'
 
 
-class MovimientosInventarioView(ReportesAccessMixin, TemplateView):
+class MovimientosInventarioView(ReportesAccessMixin, ReporteHTMLMixin, TemplateView):
     """
     Historial de movimientos de inventario
     """
     template_name = 'reports/inventario/movimientos.html'
-    
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        
-        form = FiltroFechasForm(self.request.GET or None)
-        context['form'] = form
-        
-        if form.is_valid():
-            generator = InventoryReportGenerator(
-                form.cleaned_data['fecha_desde'],
-                form.cleaned_data['fecha_hasta']
-            )
-            context['reporte'] = generator.reporte_movimientos_inventario()
-            context['tiene_datos'] = True
-        else:
-            context['tiene_datos'] = False
-        
-        return context
+    reporte = 'movimientos_inventario'
+    form_class = FiltroFechasForm
 
 
-class RotacionInventarioView(ReportesAccessMixin, TemplateView):
+class RotacionInventarioView(ReportesAccessMixin, ReporteHTMLMixin, TemplateView):
     """
     Análisis de rotación de inventario
     """
     template_name = 'reports/inventario/rotacion.html'
-    
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        
-        form = FiltroFechasForm(self.request.GET or None)
-        context['form'] = form
-        
-        if form.is_valid():
-            generator = InventoryReportGenerator(
-                form.cleaned_data['fecha_desde'],
-                form.cleaned_data['fecha_hasta']
-            )
-            context['reporte'] = generator.reporte_rotacion_inventario()
-            context['tiene_datos'] = True
-        else:
-            context['tiene_datos'] = False
-        
-        return context
+    reporte = 'rotacion_inventario'
+    form_class = FiltroFechasForm
 
 
-class InventarioProveedoresView(ReportesAccessMixin, TemplateView):
+class InventarioProveedoresView(ReportesAccessMixin, ReporteHTMLMixin, TemplateView):
     """
     Inventario agrupado por proveedor
     """
     template_name = 'reports/inventario/proveedores.html'
-    
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        
-        generator = InventoryReportGenerator()
-        context['reporte'] = generator.reporte_por_proveedor()
-        
-        return context
+    reporte = 'inventario_proveedores'
 
 
 # ============================================================================
@@ -474,162 +393,72 @@ class ReporteFinancieroView(ReportesAccessMixin, TemplateView):
     template_name = 'custom_admin/reportes/financiero_index.html'
 
 
-class MovimientosCajaView(ReportesAccessMixin, TemplateView):
+class MovimientosCajaView(ReportesAccessMixin, ReporteHTMLMixin, TemplateView):
     """
     Movimientos de caja del período
     """
     template_name = 'reports/financiero/movimientos_caja.html'
+    reporte = 'movimientos_caja'
+    form_class = FiltroFinancieroForm
     
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        
-        form = FiltroFinancieroForm(self.request.GET or None)
-        context['form'] = form
-        
-        if form.is_valid():
-            caja_id = form.cleaned_data.get('caja')
-            caja_id = caja_id.id if caja_id else None
-            
-            generator = FinancialReportGenerator(
-                form.cleaned_data['fecha_desde'],
-                form.cleaned_data['fecha_hasta']
-            )
-            context['reporte'] = generator.reporte_movimientos_caja(caja_id=caja_id)
-            context['tiene_datos'] = True
-        else:
-            context['tiene_datos'] = False
-        
-        return context
+    def get_consulta(self, form):
+        consulta = super().get_consulta(form)
+        caja = form.cleaned_data.get('caja')
+        if caja:
+            consulta['caja_id'] = caja.id
+        return consulta
 
 
-class ArqueosCajaView(ReportesAccessMixin, TemplateView):
+class ArqueosCajaView(ReportesAccessMixin, ReporteHTMLMixin, TemplateView):
     """
     Análisis de arqueos de caja
     """
     template_name = 'reports/financiero/arqueos.html'
-    
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        
-        form = FiltroFechasForm(self.request.GET or None)
-        context['form'] = form
-        
-        if form.is_valid():
-            generator = FinancialReportGenerator(
-                form.cleaned_data['fecha_desde'],
-                form.cleaned_data['fecha_hasta']
-            )
-            context['reporte'] = generator.reporte_arqueos_caja()
-            context['tiene_datos'] = True
-        else:
-            context['tiene_datos'] = False
-        
-        return context
+    reporte = 'arqueos_caja'
+    form_class = FiltroFechasForm
 
 
-class CajaChicaView(ReportesAccessMixin, TemplateView):
+class CajaChicaView(ReportesAccessMixin, ReporteHTMLMixin, TemplateView):
     """
     Análisis de caja chica
     """
     template_name = 'reports/financiero/caja_chica.html'
-    
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        
-        form = FiltroFechasForm(self.request.GET or None)
-        context['form'] = form
-        
-        if form.is_valid():
-            generator = FinancialReportGenerator(
-                form.cleaned_data['fecha_desde'],
-                form.cleaned_data['fecha_hasta']
-            )
-            context['reporte'] = generator.reporte_caja_chica()
-            context['tiene_datos'] = True
-        else:
-            context['tiene_datos'] = False
-        
-        return context
+    reporte = 'caja_chica'
+    form_class = FiltroFechasForm
 
 
-class RentabilidadView(ReportesAccessMixin, TemplateView):
+class RentabilidadView(ReportesAccessMixin, ReporteHTMLMixin, TemplateView):
     """
     Análisis de rentabilidad
     """
     template_name = 'reports/financiero/rentabilidad.html'
-    
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        
-        form = FiltroFechasForm(self.request.GET or None)
-        context['form'] = form
-        
-        if form.is_valid():
-            generator = FinancialReportGenerator(
-                form.cleaned_data['fecha_desde'],
-                form.cleaned_data['fecha_hasta']
-            )
-            context['reporte'] = generator.reporte_rentabilidad_periodo()
-            context['tiene_datos'] = True
-        else:
-            context['tiene_datos'] = False
-        
-        return context
+    reporte = 'rentabilidad'
+    form_class = FiltroFechasForm
 
 
-class FlujoEfectivoView(ReportesAccessMixin, TemplateView):
+class FlujoEfectivoView(ReportesAccessMixin, ReporteHTMLMixin, TemplateView):
     """
     Análisis de flujo de efectivo
     """
     template_name = 'reports/financiero/flujo_efectivo.html'
-    
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        
-        form = FiltroFechasForm(self.request.GET or None)
-        context['form'] = form
-        
-        if form.is_valid():
-            generator = FinancialReportGenerator(
-                form.cleaned_data['fecha_desde'],
-                form.cleaned_data['fecha_hasta']
-            )
-            context['reporte'] = generator.reporte_flujo_efectivo()
-            context['tiene_datos'] = True
-        else:
-            context['tiene_datos'] = False
-        
-        return context
+    reporte = 'flujo_efectivo'
+    form_class = FiltroFechasForm
 
 
-class CreditosPendientesView(ReportesAccessMixin, TemplateView):
+class CreditosPendientesView(ReportesAccessMixin, ReporteHTMLMixin, TemplateView):
     """
     Créditos pendientes de cobro
     """
     template_name = 'reports/financiero/creditos_pendientes.html'
-    
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        
-        generator = FinancialReportGenerator()
-        context['reporte'] = generator.reporte_creditos_pendientes()
-        
-        return context
+    reporte = 'creditos_pendientes'
 
 
-class EstadoFinancieroView(ReportesAccessMixin, TemplateView):
+class EstadoFinancieroView(ReportesAccessMixin, ReporteHTMLMixin, TemplateView):
     """
     Estado financiero resumido
     """
     template_name = 'reports/financiero/estado_financiero.html'
-    
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        
-        generator = FinancialReportGenerator()
-        context['reporte'] = generator.reporte_estado_financiero()
-        
-        return context
+    reporte = 'estado_financiero'
 
 
 # ============================================================================
@@ -648,119 +477,54 @@ class TrazabilidadView(ReportesAccessMixin, TemplateView):
         return context
 
 
-class TrazabilidadQuintalView(ReportesAccessMixin, TemplateView):
+class TrazabilidadQuintalView(ReportesAccessMixin, ReporteHTMLMixin, TemplateView):
     """
     Trazabilidad completa de un quintal específico
     """
     template_name = 'reports/trazabilidad/quintal.html'
-    
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        
-        quintal_id = kwargs.get('quintal_id')
-        generator = TraceabilityReportGenerator()
-        context['reporte'] = generator.reporte_trazabilidad_quintal(quintal_id)
-        
-        return context
+    reporte = 'trazabilidad_quintal'
 
 
-class TrazabilidadLoteView(ReportesAccessMixin, TemplateView):
+class TrazabilidadLoteView(ReportesAccessMixin, ReporteHTMLMixin, TemplateView):
     """
     Trazabilidad de un lote completo
     """
     template_name = 'reports/trazabilidad/lote.html'
+    reporte = 'trazabilidad_lote'
     
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        
-        lote = kwargs.get('lote')
-        generator = TraceabilityReportGenerator()
-        context['reporte'] = generator.reporte_trazabilidad_por_lote(lote)
-        
-        return context
+    def get_consulta(self, form):
+        consulta = super().get_consulta(form)
+        consulta['lote_proveedor'] = consulta.pop('lote', None)
+        return consulta
 
 
-class TrazabilidadProveedorView(ReportesAccessMixin, TemplateView):
+class TrazabilidadProveedorView(ReportesAccessMixin, ReporteHTMLMixin, TemplateView):
     """
-    Trazabilidad de quintales de un proveedor
+    Trazabilidad de quintales de un proveedor (últimos 90 días sin filtro)
     """
     template_name = 'reports/trazabilidad/proveedor.html'
-    
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        
-        form = FiltroFechasForm(self.request.GET or None)
-        context['form'] = form
-        
-        proveedor_id = kwargs.get('proveedor_id')
-        
-        if form.is_valid():
-            generator = TraceabilityReportGenerator(
-                form.cleaned_data['fecha_desde'],
-                form.cleaned_data['fecha_hasta']
-            )
-            context['reporte'] = generator.reporte_trazabilidad_por_proveedor(proveedor_id)
-            context['tiene_datos'] = True
-        else:
-            generator = TraceabilityReportGenerator()
-            context['reporte'] = generator.reporte_trazabilidad_por_proveedor(proveedor_id)
-            context['tiene_datos'] = True
-        
-        return context
+    reporte = 'trazabilidad_proveedor'
+    form_class = FiltroFechasForm
+    requiere_filtros = False
 
 
-class FlujoFIFOView(ReportesAccessMixin, TemplateView):
+class FlujoFIFOView(ReportesAccessMixin, ReporteHTMLMixin, TemplateView):
     """
-    Análisis del flujo FIFO de un producto
+    Análisis del flujo FIFO de un producto (últimos 90 días sin filtro)
     """
     template_name = 'reports/trazabilidad/fifo.html'
-    
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        
-        form = FiltroFechasForm(self.request.GET or None)
-        context['form'] = form
-        
-        producto_id = kwargs.get('producto_id')
-        
-        if form.is_valid():
-            generator = TraceabilityReportGenerator(
-                form.cleaned_data['fecha_desde'],
-                form.cleaned_data['fecha_hasta']
-            )
-            context['reporte'] = generator.reporte_flujo_fifo(producto_id)
-            context['tiene_datos'] = True
-        else:
-            generator = TraceabilityReportGenerator()
-            context['reporte'] = generator.reporte_flujo_fifo(producto_id)
-            context['tiene_datos'] = True
-        
-        return context
+    reporte = 'flujo_fifo'
+    form_class = FiltroFechasForm
+    requiere_filtros = False
 
 
-class CicloVidaQuintalesView(ReportesAccessMixin, TemplateView):
+class CicloVidaQuintalesView(ReportesAccessMixin, ReporteHTMLMixin, TemplateView):
     """
     Análisis del ciclo de vida de quintales
     """
     template_name = 'reports/trazabilidad/ciclo_vida.html'
-    
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        
-        form = FiltroFechasForm(self.request.GET or None)
-        context['form'] = form
-        
-        if form.is_valid():
-            generator = TraceabilityReportGenerator(
-                form.cleaned_data['fecha_desde'],
-                form.cleaned_data['fecha_hasta']
-            )
-            context['reporte'] = generator.reporte_ciclo_vida_quintales()
-            context['tiene_datos'] = True
-        else:
-            context['tiene_datos'] = False
-        
-        return context
+    reporte = 'ciclo_vida_quintales'
+    form_class = FiltroFechasForm
 
 
 # ============================================================================
@@ -799,21 +563,7 @@ class DashboardAPIView(ReportesAccessMixin, View):
     """
     def get(self, request):
         try:
-            generator = DashboardDataGenerator()
-            dashboard_data = generator.generar_dashboard_completo()
-            
-            # Convertir Decimal a float para JSON
-            def decimal_to_float(obj):
-                if isinstance(obj, Decimal):
-                    return float(obj)
-                elif isinstance(obj, dict):
-                    return {k: decimal_to_float(v) for k, v in obj.items()}
-                elif isinstance(obj, list):
-                    return [decimal_to_float(item) for item in obj]
-                return obj
-            
-            # Convertir todos los Decimales a float
-            dashboard_data = decimal_to_float(dashboard_data)
+            dashboard_data = _datos_dashboard()
             
             return JsonResponse({
                 'success': True,
@@ -823,7 +573,7 @@ class DashboardAPIView(ReportesAccessMixin, View):
             
         except Exception as e:
             import traceback
-            print(f"❌ Error en Dashboard API: {e}")
+            logger.error(f"❌ Error en Dashboard API: {e}")
             traceback.print_exc()
             
             return JsonResponse({
@@ -865,8 +615,10 @@ class VentasGraficoAPIView(ReportesAccessMixin, View):
         fecha_hasta = timezone.now().date()
         fecha_desde = fecha_hasta - timedelta(days=dias)
         
-        generator = SalesReportGenerator(fecha_desde, fecha_hasta)
-        reporte = generator.reporte_ventas_diarias()
+        reporte, _ = ReportExecutionService.obtener('ventas_diarias', {
+            'fecha_desde': fecha_desde.isoformat(),
+            'fecha_hasta': fecha_hasta.isoformat(),
+        })
         
         labels = [str(v['fecha']) for v in reporte['ventas_diarias']]
         ventas = [float(v['total_ventas']) for v in reporte['ventas_diarias']]
@@ -922,69 +674,96 @@ class DescargarReporteView(ReportesAccessMixin, View):
             usuario=request.user
         )
         
+        if reporte.estado in ('PENDIENTE', 'PROCESANDO'):
+            messages.info(request, 'El reporte aún se está generando, intente en unos minutos')
+            return redirect('reports_analytics:reportes_guardados')
+        
         if not reporte.archivo:
             messages.error(request, 'El reporte no tiene archivo adjunto')
             return redirect('reports_analytics:reportes_guardados')
         
-        response = HttpResponse(
-            reporte.archivo.read(),
+        return FileResponse(
+            reporte.archivo.open('rb'),
+            as_attachment=True,
+            filename=reporte.nombre_archivo,
             content_type='application/octet-stream'
         )
-        response['Content-Disposition'] = f'attachment; filename="{reporte.nombre_archivo}"'
+
+
+class EstadoEjecucionReporteView(ReportesAccessMixin, View):
+    """
+    Progreso de un reporte ejecutado en segundo plano (polling)
+    Incluye los datos cuando la ejecución terminó
+    """
+    def get(self, request, reporte_id):
+        reporte = get_object_or_404(
+            ReporteGuardado,
+            id=reporte_id,
+            usuario=request.user
+        )
+        
+        respuesta = {
+            'reporte_id': str(reporte.id),
+            'nombre': reporte.nombre,
+            'estado': reporte.estado,
+            'progreso': reporte.progreso,
+        }
         
-        return response
+        if reporte.estado == 'COMPLETADO':
+            respuesta['datos'] = reporte.datos
+            if reporte.archivo:
+                respuesta['url_descarga'] = reverse(
+                    'reports_analytics:descargar_reporte', kwargs={'reporte_id': reporte.id}
+                )
+        elif reporte.estado == 'ERROR':
+            respuesta['error'] = reporte.resumen
+        
+        return JsonResponse(respuesta)
 
 
 # ============================================================================
 # EXPORTACIÓN DE REPORTES
 # ============================================================================
 
-class ExportarPDFView(ReportesAccessMixin, View):
+class ExportarReporteMixin:
     """
-    Exportar reporte a PDF
+    Exportación de tablas grandes con el motor de streaming
+    `tipo_reporte` es el nombre registrado en exporters.EXPORTACIONES
+    (ej: 'ventas', 'movimientos')
     """
+    formato = None
+    
     def get(self, request, tipo_reporte):
-        messages.info(request, 'La exportación a PDF estará disponible próximamente')
-        return redirect('reports_analytics:dashboard')
+        if tipo_reporte not in EXPORTACIONES:
+            messages.info(request, f'La exportación de "{tipo_reporte}" estará disponible próximamente')
+            return redirect('reports_analytics:dashboard')
+        
+        exportacion = EXPORTACIONES[tipo_reporte].desde_request(request)
+        return ExportService.exportar(request, exportacion, self.formato)
     
     def post(self, request, tipo_reporte):
-        messages.info(request, 'La exportación a PDF estará disponible próximamente')
-        return redirect('reports_analytics:dashboard')
+        return self.get(request, tipo_reporte)
+
+
+class ExportarPDFView(ReportesAccessMixin, ExportarReporteMixin, View):
+    """
+    Exportar reporte a PDF
+    """
+    formato = 'PDF'
 
 
-class ExportarExcelView(ReportesAccessMixin, View):
+class ExportarExcelView(ReportesAccessMixin, ExportarReporteMixin, View):
     """
     Exportar reporte a Excel
     """
-    def get(self, request, tipo_reporte):
-        messages.info(request, 'La exportación a Excel estará disponible próximamente')
-        return redirect('reports_analytics:dashboard')
-    
-    def post(self, request, tipo_reporte):
-        messages.info(request, 'La exportación a Excel estará disponible próximamente')
-        return redirect('reports_analytics:dashboard')
+    formato = 'EXCEL'
 
 
-class ExportarCSVView(ReportesAccessMixin, View):
+class ExportarCSVView(ReportesAccessMixin, ExportarReporteMixin, View):
     """
-    Exportar reporte a CSV
+    Exportar reporte a CSV (StreamingHttpResponse)
     """
-    def get(self, request, tipo_reporte):
-        import csv
-        from io import StringIO
-        
-        output = StringIO()
-        writer = csv.writer(output)
-        writer.writerow(['Columna1', 'Columna2', 'Columna3'])
-        writer.writerow(['Dato1', 'Dato2', 'Dato3'])
-        
-        response = HttpResponse(output.getvalue(), content_type='text/csv')
-        response['Content-Disposition'] = f'attachment; filename="reporte_{tipo_reporte}.csv"'
-        
-        return response
-    
-    def post(self, request, tipo_reporte):
-        return self.get(request, tipo_reporte)
+    formato = 'CSV'
 
 
 # ============================================================================
@@ -1085,7 +864,7 @@ class DashboardSimpleAPIView(APIView):
             })
             
         except Exception as e:
-            print(f"❌ Error en Dashboard API: {e}")
+            logger.error(f"❌ Error en Dashboard API: {e}")
             import traceback
             traceback.print_exc()
             
@@ -1122,7 +901,7 @@ class DashboardSimpleAPIView(APIView):
                 for venta in ultimas
             ]
         except Exception as e:
-            print(f"Error obteniendo últimas ventas: {e}")
+            logger.error(f"Error obteniendo últimas ventas: {e}")
             return []
 
 
@@ -1130,352 +909,54 @@ class DashboardSimpleAPIView(APIView):
 # 🆕 API ENDPOINTS PARA DASHBOARD DE VENTAS COMPLETO
 # ============================================================================
 
-class VentasPeriodoAPIView(ReportesAccessMixin, View):
+class VentasPeriodoAPIView(ReportesAccessMixin, ReporteAPIMixin, View):
     """API: Ventas por período"""
-    def get(self, request):
-        try:
-            fecha_desde = request.GET.get('fecha_desde')
-            fecha_hasta = request.GET.get('fecha_hasta')
-            
-            if fecha_desde and fecha_hasta:
-                fecha_desde = datetime.strptime(fecha_desde, '%Y-%m-%d').date()
-                fecha_hasta = datetime.strptime(fecha_hasta, '%Y-%m-%d').date()
-            else:
-                fecha_hasta = timezone.now().date()
-                fecha_desde = fecha_hasta - timedelta(days=30)
-            
-            generator = SalesReportGenerator(fecha_desde, fecha_hasta)
-            data = generator.reporte_ventas_periodo()
-            data = self._convert_decimals(data)
-            
-            return JsonResponse(data)
-            
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            import traceback
-            traceback.print_exc()
-            return JsonResponse({'error': str(e)}, status=500)
-    
-    def _convert_decimals(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        elif isinstance(obj, dict):
-            return {k: self._convert_decimals(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [self._convert_decimals(item) for item in obj]
-        elif hasattr(obj, 'isoformat'):
-            return obj.isoformat()
-        return obj
-
-
-class VentasDiariasAPIView(ReportesAccessMixin, View):
+    reporte = 'ventas_periodo'
+
+
+class VentasDiariasAPIView(ReportesAccessMixin, ReporteAPIMixin, View):
     """API: Ventas diarias"""
-    def get(self, request):
-        try:
-            fecha_desde = request.GET.get('fecha_desde')
-            fecha_hasta = request.GET.get('fecha_hasta')
-            
-            if fecha_desde and fecha_hasta:
-                fecha_desde = datetime.strptime(fecha_desde, '%Y-%m-%d').date()
-                fecha_hasta = datetime.strptime(fecha_hasta, '%Y-%m-%d').date()
-            else:
-                fecha_hasta = timezone.now().date()
-                fecha_desde = fecha_hasta - timedelta(days=30)
-            
-            generator = SalesReportGenerator(fecha_desde, fecha_hasta)
-            data = generator.reporte_ventas_diarias()
-            data = self._convert_decimals(data)
-            
-            return JsonResponse(data)
-            
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            return JsonResponse({'error': str(e)}, status=500)
-    
-    def _convert_decimals(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        elif isinstance(obj, dict):
-            return {k: self._convert_decimals(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [self._convert_decimals(item) for item in obj]
-        elif hasattr(obj, 'isoformat'):
-            return obj.isoformat()
-        return obj
-
-
-class ProductosTopAPIView(ReportesAccessMixin, View):
+    reporte = 'ventas_diarias'
+
+
+class ProductosTopAPIView(ReportesAccessMixin, ReporteAPIMixin, View):
     """API: Top productos"""
-    def get(self, request):
-        try:
-            fecha_desde = request.GET.get('fecha_desde')
-            fecha_hasta = request.GET.get('fecha_hasta')
-            
-            if fecha_desde and fecha_hasta:
-                fecha_desde = datetime.strptime(fecha_desde, '%Y-%m-%d').date()
-                fecha_hasta = datetime.strptime(fecha_hasta, '%Y-%m-%d').date()
-            else:
-                fecha_hasta = timezone.now().date()
-                fecha_desde = fecha_hasta - timedelta(days=30)
-            
-            generator = SalesReportGenerator(fecha_desde, fecha_hasta)
-            data = generator.reporte_productos_mas_vendidos(limite=20)
-            data = self._convert_decimals(data)
-            
-            return JsonResponse(data)
-            
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            return JsonResponse({'error': str(e)}, status=500)
-    
-    def _convert_decimals(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        elif isinstance(obj, dict):
-            return {k: self._convert_decimals(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [self._convert_decimals(item) for item in obj]
-        return obj
+    reporte = 'productos_top'
 
 
-class CategoriasAPIView(ReportesAccessMixin, View):
+class CategoriasAPIView(ReportesAccessMixin, ReporteAPIMixin, View):
     """API: Categorías"""
-    def get(self, request):
-        try:
-            fecha_desde = request.GET.get('fecha_desde')
-            fecha_hasta = request.GET.get('fecha_hasta')
-            
-            if fecha_desde and fecha_hasta:
-                fecha_desde = datetime.strptime(fecha_desde, '%Y-%m-%d').date()
-                fecha_hasta = datetime.strptime(fecha_hasta, '%Y-%m-%d').date()
-            else:
-                fecha_hasta = timezone.now().date()
-                fecha_desde = fecha_hasta - timedelta(days=30)
-            
-            generator = SalesReportGenerator(fecha_desde, fecha_hasta)
-            data = generator.reporte_ventas_por_categoria()
-            data = self._convert_decimals(data)
-            
-            return JsonResponse(data)
-            
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            return JsonResponse({'error': str(e)}, status=500)
-    
-    def _convert_decimals(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        elif isinstance(obj, dict):
-            return {k: self._convert_decimals(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [self._convert_decimals(item) for item in obj]
-        return obj
+    reporte = 'ventas_categorias'
 
 
-class VendedoresAPIView(ReportesAccessMixin, View):
+class VendedoresAPIView(ReportesAccessMixin, ReporteAPIMixin, View):
     """API: Vendedores"""
-    def get(self, request):
-        try:
-            fecha_desde = request.GET.get('fecha_desde')
-            fecha_hasta = request.GET.get('fecha_hasta')
-            
-            if fecha_desde and fecha_hasta:
-                fecha_desde = datetime.strptime(fecha_desde, '%Y-%m-%d').date()
-                fecha_hasta = datetime.strptime(fecha_hasta, '%Y-%m-%d').date()
-            else:
-                fecha_hasta = timezone.now().date()
-                fecha_desde = fecha_hasta - timedelta(days=30)
-            
-            generator = SalesReportGenerator(fecha_desde, fecha_hasta)
-            data = generator.reporte_ventas_por_vendedor()
-            data = self._convert_decimals(data)
-            
-            return JsonResponse(data)
-            
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            return JsonResponse({'error': str(e)}, status=500)
-    
-    def _convert_decimals(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        elif isinstance(obj, dict):
-            return {k: self._convert_decimals(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [self._convert_decimals(item) for item in obj]
-        return obj
+    reporte = 'ventas_vendedores'
 
 
-class ClientesTopAPIView(ReportesAccessMixin, View):
+class ClientesTopAPIView(ReportesAccessMixin, ReporteAPIMixin, View):
     """API: Top clientes"""
-    def get(self, request):
-        try:
-            fecha_desde = request.GET.get('fecha_desde')
-            fecha_hasta = request.GET.get('fecha_hasta')
-            
-            if fecha_desde and fecha_hasta:
-                fecha_desde = datetime.strptime(fecha_desde, '%Y-%m-%d').date()
-                fecha_hasta = datetime.strptime(fecha_hasta, '%Y-%m-%d').date()
-            else:
-                fecha_hasta = timezone.now().date()
-                fecha_desde = fecha_hasta - timedelta(days=30)
-            
-            generator = SalesReportGenerator(fecha_desde, fecha_hasta)
-            data = generator.reporte_clientes_top(limite=20)
-            data = self._convert_decimals(data)
-            
-            return JsonResponse(data)
-            
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            return JsonResponse({'error': str(e)}, status=500)
-    
-    def _convert_decimals(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        elif isinstance(obj, dict):
-            return {k: self._convert_decimals(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [self._convert_decimals(item) for item in obj]
-        return obj
+    reporte = 'clientes_top'
 
 
-class HorariosAPIView(ReportesAccessMixin, View):
+class HorariosAPIView(ReportesAccessMixin, ReporteAPIMixin, View):
     """API: Horarios"""
-    def get(self, request):
-        try:
-            fecha_desde = request.GET.get('fecha_desde')
-            fecha_hasta = request.GET.get('fecha_hasta')
-            
-            if fecha_desde and fecha_hasta:
-                fecha_desde = datetime.strptime(fecha_desde, '%Y-%m-%d').date()
-                fecha_hasta = datetime.strptime(fecha_hasta, '%Y-%m-%d').date()
-            else:
-                fecha_hasta = timezone.now().date()
-                fecha_desde = fecha_hasta - timedelta(days=30)
-            
-            generator = SalesReportGenerator(fecha_desde, fecha_hasta)
-            data = generator.reporte_horarios_ventas()
-            data = self._convert_decimals(data)
-            
-            return JsonResponse(data)
-            
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            return JsonResponse({'error': str(e)}, status=500)
-    
-    def _convert_decimals(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        elif isinstance(obj, dict):
-            return {k: self._convert_decimals(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [self._convert_decimals(item) for item in obj]
-        return obj
+    reporte = 'ventas_horarios'
 
 
-class DevolucionesAPIView(ReportesAccessMixin, View):
+class DevolucionesAPIView(ReportesAccessMixin, ReporteAPIMixin, View):
     """API: Devoluciones"""
-    def get(self, request):
-        try:
-            fecha_desde = request.GET.get('fecha_desde')
-            fecha_hasta = request.GET.get('fecha_hasta')
-            
-            if fecha_desde and fecha_hasta:
-                fecha_desde = datetime.strptime(fecha_desde, '%Y-%m-%d').date()
-                fecha_hasta = datetime.strptime(fecha_hasta, '%Y-%m-%d').date()
-            else:
-                fecha_hasta = timezone.now().date()
-                fecha_desde = fecha_hasta - timedelta(days=30)
-            
-            generator = SalesReportGenerator(fecha_desde, fecha_hasta)
-            data = generator.reporte_devoluciones()
-            data = self._convert_decimals(data)
-            
-            return JsonResponse(data)
-            
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            return JsonResponse({'error': str(e)}, status=500)
-    
-    def _convert_decimals(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        elif isinstance(obj, dict):
-            return {k: self._convert_decimals(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [self._convert_decimals(item) for item in obj]
-        return obj
+    reporte = 'devoluciones'
 
 
-class ComparativoAPIView(ReportesAccessMixin, View):
+class ComparativoAPIView(ReportesAccessMixin, ReporteAPIMixin, View):
     """API: Comparativo"""
-    def get(self, request):
-        try:
-            fecha_desde = request.GET.get('fecha_desde')
-            fecha_hasta = request.GET.get('fecha_hasta')
-            
-            if fecha_desde and fecha_hasta:
-                fecha_desde = datetime.strptime(fecha_desde, '%Y-%m-%d').date()
-                fecha_hasta = datetime.strptime(fecha_hasta, '%Y-%m-%d').date()
-            else:
-                fecha_hasta = timezone.now().date()
-                fecha_desde = fecha_hasta - timedelta(days=30)
-            
-            generator = SalesReportGenerator(fecha_desde, fecha_hasta)
-            data = generator.reporte_comparativo_periodos()
-            data = self._convert_decimals(data)
-            
-            return JsonResponse(data)
-            
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            return JsonResponse({'error': str(e)}, status=500)
-    
-    def _convert_decimals(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        elif isinstance(obj, dict):
-            return {k: self._convert_decimals(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [self._convert_decimals(item) for item in obj]
-        elif hasattr(obj, 'isoformat'):
-            return obj.isoformat()
-        return obj
-
-
-class MargenesAPIView(ReportesAccessMixin, View):
+    reporte = 'comparativo'
+
+
+class MargenesAPIView(ReportesAccessMixin, ReporteAPIMixin, View):
     """API: Márgenes"""
-    def get(self, request):
-        try:
-            fecha_desde = request.GET.get('fecha_desde')
-            fecha_hasta = request.GET.get('fecha_hasta')
-            
-            if fecha_desde and fecha_hasta:
-                fecha_desde = datetime.strptime(fecha_desde, '%Y-%m-%d').date()
-                fecha_hasta = datetime.strptime(fecha_hasta, '%Y-%m-%d').date()
-            else:
-                fecha_hasta = timezone.now().date()
-                fecha_desde = fecha_hasta - timedelta(days=30)
-            
-            generator = SalesReportGenerator(fecha_desde, fecha_hasta)
-            data = generator.reporte_analisis_margenes()
-            data = self._convert_decimals(data)
-            
-            return JsonResponse(data)
-            
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            return JsonResponse({'error': str(e)}, status=500)
-    
-    def _convert_decimals(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        elif isinstance(obj, dict):
-            return {k: self._convert_decimals(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [self._convert_decimals(item) for item in obj]
-        return obj
+    reporte = 'margenes'
 
 
 class DashboardVentasCompletView(ReportesAccessMixin, TemplateView):
@@ -1485,182 +966,39 @@ class DashboardVentasCompletView(ReportesAccessMixin, TemplateView):
 # 🆕 API ENDPOINTS - DASHBOARD DE INVENTARIO COMPLETO
 # ============================================================================
 
-class InventarioValorizadoAPIView(ReportesAccessMixin, View):
+class InventarioValorizadoAPIView(ReportesAccessMixin, ReporteAPIMixin, View):
     """API: Inventario valorizado"""
-    def get(self, request):
-        try:
-            generator = InventoryReportGenerator()
-            data = generator.reporte_inventario_valorizado()
-            data = self._convert_decimals(data)
-            
-            return JsonResponse(data)
-            
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            import traceback
-            traceback.print_exc()
-            return JsonResponse({'error': str(e)}, status=500)
-    
-    def _convert_decimals(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        elif isinstance(obj, dict):
-            return {k: self._convert_decimals(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [self._convert_decimals(item) for item in obj]
-        elif hasattr(obj, 'isoformat'):
-            return obj.isoformat()
-        return obj
-
-
-class InventarioCategoriasAPIView(ReportesAccessMixin, View):
+    reporte = 'inventario_valorizado'
+
+
+class ValorizacionCierreAPIView(ReportesAccessMixin, ReporteAPIMixin, View):
+    """API: Inventario valorizado al cierre y costo de ventas (libro de costos)"""
+    reporte = 'valorizacion_cierre'
+
+
+class InventarioCategoriasAPIView(ReportesAccessMixin, ReporteAPIMixin, View):
     """API: Inventario por categorías"""
-    def get(self, request):
-        try:
-            generator = InventoryReportGenerator()
-            data = generator.reporte_por_categoria()
-            data = self._convert_decimals(data)
-            
-            return JsonResponse(data)
-            
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            return JsonResponse({'error': str(e)}, status=500)
-    
-    def _convert_decimals(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        elif isinstance(obj, dict):
-            return {k: self._convert_decimals(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [self._convert_decimals(item) for item in obj]
-        elif hasattr(obj, 'isoformat'):
-            return obj.isoformat()
-        return obj
-
-
-class ProductosCriticosAPIView(ReportesAccessMixin, View):
+    reporte = 'inventario_categorias'
+
+
+class ProductosCriticosAPIView(ReportesAccessMixin, ReporteAPIMixin, View):
     """API: Productos críticos"""
-    def get(self, request):
-        try:
-            generator = InventoryReportGenerator()
-            data = generator.reporte_productos_criticos()
-            data = self._convert_decimals(data)
-            
-            return JsonResponse(data)
-            
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            return JsonResponse({'error': str(e)}, status=500)
-    
-    def _convert_decimals(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        elif isinstance(obj, dict):
-            return {k: self._convert_decimals(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [self._convert_decimals(item) for item in obj]
-        elif hasattr(obj, 'isoformat'):
-            return obj.isoformat()
-        return obj
-
-
-class MovimientosInventarioAPIView(ReportesAccessMixin, View):
+    reporte = 'productos_criticos'
+
+
+class MovimientosInventarioAPIView(ReportesAccessMixin, ReporteAPIMixin, View):
     """API: Movimientos de inventario"""
-    def get(self, request):
-        try:
-            fecha_desde = request.GET.get('fecha_desde')
-            fecha_hasta = request.GET.get('fecha_hasta')
-            
-            if fecha_desde and fecha_hasta:
-                fecha_desde = datetime.strptime(fecha_desde, '%Y-%m-%d').date()
-                fecha_hasta = datetime.strptime(fecha_hasta, '%Y-%m-%d').date()
-            else:
-                fecha_hasta = timezone.now().date()
-                fecha_desde = fecha_hasta - timedelta(days=30)
-            
-            generator = InventoryReportGenerator(fecha_desde, fecha_hasta)
-            data = generator.reporte_movimientos_inventario()
-            data = self._convert_decimals(data)
-            
-            return JsonResponse(data)
-            
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            return JsonResponse({'error': str(e)}, status=500)
-    
-    def _convert_decimals(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        elif isinstance(obj, dict):
-            return {k: self._convert_decimals(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [self._convert_decimals(item) for item in obj]
-        elif hasattr(obj, 'isoformat'):
-            return obj.isoformat()
-        return obj
-
-
-class RotacionInventarioAPIView(ReportesAccessMixin, View):
+    reporte = 'movimientos_inventario'
+
+
+class RotacionInventarioAPIView(ReportesAccessMixin, ReporteAPIMixin, View):
     """API: Rotación de inventario"""
-    def get(self, request):
-        try:
-            fecha_desde = request.GET.get('fecha_desde')
-            fecha_hasta = request.GET.get('fecha_hasta')
-            
-            if fecha_desde and fecha_hasta:
-                fecha_desde = datetime.strptime(fecha_desde, '%Y-%m-%d').date()
-                fecha_hasta = datetime.strptime(fecha_hasta, '%Y-%m-%d').date()
-            else:
-                fecha_hasta = timezone.now().date()
-                fecha_desde = fecha_hasta - timedelta(days=30)
-            
-            generator = InventoryReportGenerator(fecha_desde, fecha_hasta)
-            data = generator.reporte_rotacion_inventario()
-            data = self._convert_decimals(data)
-            
-            return JsonResponse(data)
-            
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            return JsonResponse({'error': str(e)}, status=500)
-    
-    def _convert_decimals(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        elif isinstance(obj, dict):
-            return {k: self._convert_decimals(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [self._convert_decimals(item) for item in obj]
-        elif hasattr(obj, 'isoformat'):
-            return obj.isoformat()
-        return obj
-
-
-class InventarioProveedoresAPIView(ReportesAccessMixin, View):
+    reporte = 'rotacion_inventario'
+
+
+class InventarioProveedoresAPIView(ReportesAccessMixin, ReporteAPIMixin, View):
     """API: Inventario por proveedores"""
-    def get(self, request):
-        try:
-            generator = InventoryReportGenerator()
-            data = generator.reporte_por_proveedor()
-            data = self._convert_decimals(data)
-            
-            return JsonResponse(data)
-            
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            return JsonResponse({'error': str(e)}, status=500)
-    
-    def _convert_decimals(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        elif isinstance(obj, dict):
-            return {k: self._convert_decimals(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [self._convert_decimals(item) for item in obj]
-        elif hasattr(obj, 'isoformat'):
-            return obj.isoformat()
-        return obj
+    reporte = 'inventario_proveedores'
 
 
 class DashboardInventarioCompletView(ReportesAccessMixin, TemplateView):
@@ -1670,235 +1008,39 @@ class DashboardInventarioCompletView(ReportesAccessMixin, TemplateView):
 # 🆕 API ENDPOINTS - DASHBOARD FINANCIERO COMPLETO
 # ============================================================================
 
-class MovimientosCajaAPIView(ReportesAccessMixin, View):
+class MovimientosCajaAPIView(ReportesAccessMixin, ReporteAPIMixin, View):
     """API: Movimientos de caja"""
-    def get(self, request):
-        try:
-            fecha_desde = request.GET.get('fecha_desde')
-            fecha_hasta = request.GET.get('fecha_hasta')
-            caja_id = request.GET.get('caja_id')
-            
-            if fecha_desde and fecha_hasta:
-                fecha_desde = datetime.strptime(fecha_desde, '%Y-%m-%d').date()
-                fecha_hasta = datetime.strptime(fecha_hasta, '%Y-%m-%d').date()
-            else:
-                fecha_hasta = timezone.now().date()
-                fecha_desde = fecha_hasta - timedelta(days=30)
-            
-            generator = FinancialReportGenerator(fecha_desde, fecha_hasta)
-            data = generator.reporte_movimientos_caja(caja_id=caja_id)
-            data = self._convert_decimals(data)
-            
-            return JsonResponse(data)
-            
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            return JsonResponse({'error': str(e)}, status=500)
-    
-    def _convert_decimals(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        elif isinstance(obj, dict):
-            return {k: self._convert_decimals(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [self._convert_decimals(item) for item in obj]
-        elif hasattr(obj, 'isoformat'):
-            return obj.isoformat()
-        return obj
-
-
-class ArqueosCajaAPIView(ReportesAccessMixin, View):
+    reporte = 'movimientos_caja'
+
+
+class ArqueosCajaAPIView(ReportesAccessMixin, ReporteAPIMixin, View):
     """API: Arqueos de caja"""
-    def get(self, request):
-        try:
-            fecha_desde = request.GET.get('fecha_desde')
-            fecha_hasta = request.GET.get('fecha_hasta')
-            
-            if fecha_desde and fecha_hasta:
-                fecha_desde = datetime.strptime(fecha_desde, '%Y-%m-%d').date()
-                fecha_hasta = datetime.strptime(fecha_hasta, '%Y-%m-%d').date()
-            else:
-                fecha_hasta = timezone.now().date()
-                fecha_desde = fecha_hasta - timedelta(days=30)
-            
-            generator = FinancialReportGenerator(fecha_desde, fecha_hasta)
-            data = generator.reporte_arqueos_caja()
-            data = self._convert_decimals(data)
-            
-            return JsonResponse(data)
-            
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            return JsonResponse({'error': str(e)}, status=500)
-    
-    def _convert_decimals(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        elif isinstance(obj, dict):
-            return {k: self._convert_decimals(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [self._convert_decimals(item) for item in obj]
-        elif hasattr(obj, 'isoformat'):
-            return obj.isoformat()
-        return obj
-
-
-class CajaChicaAPIView(ReportesAccessMixin, View):
+    reporte = 'arqueos_caja'
+
+
+class CajaChicaAPIView(ReportesAccessMixin, ReporteAPIMixin, View):
     """API: Caja chica"""
-    def get(self, request):
-        try:
-            fecha_desde = request.GET.get('fecha_desde')
-            fecha_hasta = request.GET.get('fecha_hasta')
-            
-            if fecha_desde and fecha_hasta:
-                fecha_desde = datetime.strptime(fecha_desde, '%Y-%m-%d').date()
-                fecha_hasta = datetime.strptime(fecha_hasta, '%Y-%m-%d').date()
-            else:
-                fecha_hasta = timezone.now().date()
-                fecha_desde = fecha_hasta - timedelta(days=30)
-            
-            generator = FinancialReportGenerator(fecha_desde, fecha_hasta)
-            data = generator.reporte_caja_chica()
-            data = self._convert_decimals(data)
-            
-            return JsonResponse(data)
-            
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            return JsonResponse({'error': str(e)}, status=500)
-    
-    def _convert_decimals(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        elif isinstance(obj, dict):
-            return {k: self._convert_decimals(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [self._convert_decimals(item) for item in obj]
-        elif hasattr(obj, 'isoformat'):
-            return obj.isoformat()
-        return obj
-
-
-class RentabilidadAPIView(ReportesAccessMixin, View):
+    reporte = 'caja_chica'
+
+
+class RentabilidadAPIView(ReportesAccessMixin, ReporteAPIMixin, View):
     """API: Rentabilidad"""
-    def get(self, request):
-        try:
-            fecha_desde = request.GET.get('fecha_desde')
-            fecha_hasta = request.GET.get('fecha_hasta')
-            
-            if fecha_desde and fecha_hasta:
-                fecha_desde = datetime.strptime(fecha_desde, '%Y-%m-%d').date()
-                fecha_hasta = datetime.strptime(fecha_hasta, '%Y-%m-%d').date()
-            else:
-                fecha_hasta = timezone.now().date()
-                fecha_desde = fecha_hasta - timedelta(days=30)
-            
-            generator = FinancialReportGenerator(fecha_desde, fecha_hasta)
-            data = generator.reporte_rentabilidad_periodo()
-            data = self._convert_decimals(data)
-            
-            return JsonResponse(data)
-            
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            return JsonResponse({'error': str(e)}, status=500)
-    
-    def _convert_decimals(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        elif isinstance(obj, dict):
-            return {k: self._convert_decimals(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [self._convert_decimals(item) for item in obj]
-        return obj
+    reporte = 'rentabilidad'
 
 
-class FlujoEfectivoAPIView(ReportesAccessMixin, View):
+class FlujoEfectivoAPIView(ReportesAccessMixin, ReporteAPIMixin, View):
     """API: Flujo de efectivo"""
-    def get(self, request):
-        try:
-            fecha_desde = request.GET.get('fecha_desde')
-            fecha_hasta = request.GET.get('fecha_hasta')
-            
-            if fecha_desde and fecha_hasta:
-                fecha_desde = datetime.strptime(fecha_desde, '%Y-%m-%d').date()
-                fecha_hasta = datetime.strptime(fecha_hasta, '%Y-%m-%d').date()
-            else:
-                fecha_hasta = timezone.now().date()
-                fecha_desde = fecha_hasta - timedelta(days=30)
-            
-            generator = FinancialReportGenerator(fecha_desde, fecha_hasta)
-            data = generator.reporte_flujo_efectivo()
-            data = self._convert_decimals(data)
-            
-            return JsonResponse(data)
-            
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            return JsonResponse({'error': str(e)}, status=500)
-    
-    def _convert_decimals(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        elif isinstance(obj, dict):
-            return {k: self._convert_decimals(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [self._convert_decimals(item) for item in obj]
-        elif hasattr(obj, 'isoformat'):
-            return obj.isoformat()
-        return obj
-
-
-class CreditosPendientesAPIView(ReportesAccessMixin, View):
+    reporte = 'flujo_efectivo'
+
+
+class CreditosPendientesAPIView(ReportesAccessMixin, ReporteAPIMixin, View):
     """API: Créditos pendientes"""
-    def get(self, request):
-        try:
-            generator = FinancialReportGenerator()
-            data = generator.reporte_creditos_pendientes()
-            data = self._convert_decimals(data)
-            
-            return JsonResponse(data)
-            
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            return JsonResponse({'error': str(e)}, status=500)
-    
-    def _convert_decimals(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        elif isinstance(obj, dict):
-            return {k: self._convert_decimals(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [self._convert_decimals(item) for item in obj]
-        elif hasattr(obj, 'isoformat'):
-            return obj.isoformat()
-        return obj
-
-
-class EstadoFinancieroAPIView(ReportesAccessMixin, View):
+    reporte = 'creditos_pendientes'
+
+
+class EstadoFinancieroAPIView(ReportesAccessMixin, ReporteAPIMixin, View):
     """API: Estado financiero"""
-    def get(self, request):
-        try:
-            generator = FinancialReportGenerator()
-            data = generator.reporte_estado_financiero()
-            data = self._convert_decimals(data)
-            
-            return JsonResponse(data)
-            
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            return JsonResponse({'error': str(e)}, status=500)
-    
-    def _convert_decimals(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        elif isinstance(obj, dict):
-            return {k: self._convert_decimals(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [self._convert_decimals(item) for item in obj]
-        elif hasattr(obj, 'isoformat'):
-            return obj.isoformat()
-        return obj
+    reporte = 'estado_financiero'
 
 
 class DashboardFinancieroCompletView(ReportesAccessMixin, TemplateView):
@@ -92,12 +92,12 @@ class ClienteAdmin(admin.ModelAdmin):
             'fields': ('activo',)
         }),
         ('Auditoría', {
-            'fields': ('fecha_registro', 'fecha_ultima_compra', 'total_compras'),
+            'fields': ('fecha_registro', 'fecha_ultima_compra', 'total_compras', 'numero_compras'),
             'classes': ('collapse',)
         }),
     )
     
-    readonly_fields = ['fecha_registro', 'fecha_ultima_compra', 'total_compras']
+    readonly_fields = ['fecha_registro', 'fecha_ultima_compra', 'total_compras', 'numero_compras']
     
     def nombre_completo_display(self, obj):
         """Muestra el nombre completo del cliente"""
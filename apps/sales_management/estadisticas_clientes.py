@@ -0,0 +1,130 @@
+"""
+Motor de estadísticas de clientes
+
+Las ventas mantienen `total_compras`, `numero_compras`, `fecha_ultima_compra`
+y `credito_disponible` con incrementos F() (ver POSService.finalizar_venta
+y anular_venta). Este motor recalcula los mismos valores desde cero para
+todos los clientes con una consulta agrupada y solo escribe las filas que
+se desviaron:
+
+- PostgreSQL: un único `UPDATE ... FROM (subconsulta)`
+- Otros motores: lotes por clave primaria aplicados con bulk_update
+
+Agregados RFM: recencia = fecha_ultima_compra, frecuencia = numero_compras,
+monto = total_compras.
+"""
+
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import (
+    Count, DecimalField, F, Max, OuterRef, Q, Subquery, Sum, Value
+)
+from django.db.models.functions import Coalesce
+
+from .models import Cliente
+
+
+CAMPOS = ['total_compras', 'numero_compras', 'fecha_ultima_compra', 'credito_disponible']
+
+ESTADOS_DEUDA = ['PENDIENTE', 'PARCIAL', 'VENCIDA']
+
+
+class EstadisticasClientesService:
+    """
+    Recalcula las estadísticas de clientes en bloque (corrección de desvíos)
+    """
+
+    TAMANO_LOTE = 1000
+
+    @staticmethod
+    def consulta_agregados():
+        """
+        Clientes anotados con los valores esperados (`calc_<campo>`)
+
+        Una sola consulta agrupada: las ventas completadas se agregan con
+        JOIN y la deuda abierta de cuentas por cobrar con una subconsulta
+        correlacionada, para no multiplicar filas.
+        """
+        from apps.financial_management.models import CuentaPorCobrar
+
+        completadas = Q(ventas__estado='COMPLETADA')
+        deuda = CuentaPorCobrar.objects.filter(
+            cliente=OuterRef('pk'),
+            estado__in=ESTADOS_DEUDA
+        ).values('cliente').annotate(total=Sum('saldo_pendiente')).values('total')[:1]
+
+        return Cliente.objects.annotate(
+            calc_total_compras=Coalesce(
+                Sum('ventas__total', filter=completadas), Value(Decimal('0')),
+                output_field=DecimalField(max_digits=12, decimal_places=2)
+            ),
+            calc_numero_compras=Count('ventas', filter=completadas),
+            calc_fecha_ultima_compra=Max('ventas__fecha_venta', filter=completadas),
+            calc_credito_disponible=F('limite_credito') - Coalesce(
+                Subquery(deuda), Value(Decimal('0')),
+                output_field=DecimalField(max_digits=10, decimal_places=2)
+            ),
+        ).order_by()
+
+    @classmethod
+    def recalcular(cls):
+        """
+        Recalcula y corrige las estadísticas de todos los clientes
+
+        Returns:
+            dict: {'clientes_actualizados': n}
+        """
+        if connection.vendor == 'postgresql':
+            return {'clientes_actualizados': cls._recalcular_postgres()}
+        return {'clientes_actualizados': cls._recalcular_por_lotes()}
+
+    @classmethod
+    def _recalcular_postgres(cls):
+        """UPDATE ... FROM (subconsulta agrupada) solo para filas distintas"""
+        columnas = ['id'] + [f'calc_{campo}' for campo in CAMPOS]
+        sql, params = cls.consulta_agregados().values_list(*columnas).query.sql_with_params()
+
+        asignaciones = ', '.join(f'{campo} = s.{campo}' for campo in CAMPOS)
+        actuales = ', '.join(f'c.{campo}' for campo in CAMPOS)
+        esperados = ', '.join(f's.{campo}' for campo in CAMPOS)
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {Cliente._meta.db_table} AS c SET {asignaciones} '
+                f'FROM ({sql}) AS s (id, {", ".join(CAMPOS)}) '
+                f'WHERE c.id = s.id AND ({actuales}) IS DISTINCT FROM ({esperados})',
+                params
+            )
+            return cursor.rowcount
+
+    @classmethod
+    def _recalcular_por_lotes(cls):
+        """Lotes por clave primaria: una consulta agrupada + un bulk_update por lote"""
+        consulta = cls.consulta_agregados().only('id', *CAMPOS).order_by('pk')
+        actualizados = 0
+        ultimo = None
+
+        while True:
+            lote = consulta.filter(pk__gt=ultimo) if ultimo is not None else consulta
+            clientes = list(lote[:cls.TAMANO_LOTE])
+            if not clientes:
+                break
+            ultimo = clientes[-1].pk
+
+            cambiados = []
+            for cliente in clientes:
+                distinto = False
+                for campo in CAMPOS:
+                    esperado = getattr(cliente, f'calc_{campo}')
+                    if getattr(cliente, campo) != esperado:
+                        setattr(cliente, campo, esperado)
+                        distinto = True
+                if distinto:
+                    cambiados.append(cliente)
+
+            if cambiados:
+                Cliente.objects.bulk_update(cambiados, CAMPOS)
+                actualizados += len(cambiados)
+
+        return actualizados
@@ -4,6 +4,8 @@ from django.template.loader import render_to_string
 from django.conf import settings
 from datetime import datetime
 
+from apps.inventory_management.utils.unit_registry import RegistroUnidades
+
 
 class TicketGenerator:
     """
@@ -81,7 +83,7 @@ class TicketGenerator:
             nombre = detalle.producto.nombre[:23]
             
             if detalle.producto.es_quintal():
-                cant = f"{detalle.peso_vendido} {detalle.unidad_medida.abreviatura}"
+                cant = f"{detalle.peso_vendido} {RegistroUnidades.abreviatura(detalle.unidad_medida_id)}"
             else:
                 cant = f"{detalle.cantidad_unidades} un"
             
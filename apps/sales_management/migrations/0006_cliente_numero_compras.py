@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        (
+            "sales_management",
+            "0005_detalleventa_aplica_iva_detalleventa_monto_iva_and_more",
+        ),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="cliente",
+            name="numero_compras",
+            field=models.PositiveIntegerField(
+                default=0, help_text="Ventas completadas del cliente (frecuencia RFM)"
+            ),
+        ),
+    ]
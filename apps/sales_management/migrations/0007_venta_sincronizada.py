@@ -0,0 +1,75 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:33
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("sales_management", "0006_cliente_numero_compras"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="VentaSincronizada",
+            fields=[
+                (
+                    "clave_idempotencia",
+                    models.UUIDField(
+                        help_text="Identificador generado por el terminal para la venta",
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "terminal",
+                    models.CharField(blank=True, db_index=True, max_length=50),
+                ),
+                (
+                    "estado",
+                    models.CharField(
+                        choices=[("ACEPTADA", "Aceptada"), ("RECHAZADA", "Rechazada")],
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "resultado",
+                    models.JSONField(
+                        default=dict, help_text="Respuesta devuelta al terminal"
+                    ),
+                ),
+                (
+                    "fecha_registro",
+                    models.DateTimeField(
+                        help_text="Momento de la venta en el terminal"
+                    ),
+                ),
+                ("fecha_sincronizacion", models.DateTimeField(auto_now_add=True)),
+                (
+                    "usuario",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "venta",
+                    models.OneToOneField(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="sincronizacion",
+                        to="sales_management.venta",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Venta Sincronizada",
+                "verbose_name_plural": "Ventas Sincronizadas",
+                "db_table": "sales_venta_sincronizada",
+                "ordering": ["-fecha_sincronizacion"],
+            },
+        ),
+    ]
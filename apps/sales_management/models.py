@@ -8,6 +8,8 @@ from django.db.models import Sum, F, Q
 from decimal import Decimal
 import uuid
 
+from apps.inventory_management.utils.unit_registry import RegistroUnidades
+
 
 # ============================================================================
 # CLIENTE
@@ -91,6 +93,10 @@ class Cliente(models.Model):
         default=0,
         help_text="Total acumulado de compras"
     )
+    numero_compras = models.PositiveIntegerField(
+        default=0,
+        help_text="Ventas completadas del cliente (frecuencia RFM)"
+    )
     
     class Meta:
         verbose_name = 'Cliente'
@@ -469,7 +475,7 @@ class DetalleVenta(models.Model):
         try:
             if self.producto and self.producto.es_quintal():
                 if self.peso_vendido and self.unidad_medida:
-                    return f"{self.peso_vendido} {self.unidad_medida.abreviatura} de {self.producto.nombre}"
+                    return f"{self.peso_vendido} {RegistroUnidades.abreviatura(self.unidad_medida_id)} de {self.producto.nombre}"
                 else:
                     return f"Quintal de {self.producto.nombre if self.producto else 'producto'}"
             elif self.cantidad_unidades:
@@ -710,13 +716,62 @@ class Devolucion(models.Model):
         return f"{self.numero_devolucion} - ${self.monto_devolucion}"
 
 
+# ============================================================================
+# SINCRONIZACIÓN DE TERMINALES FUERA DE LÍNEA
+# ============================================================================
+
+class VentaSincronizada(models.Model):
+    """
+    Resultado de una venta enviada por un terminal POS fuera de línea
+
+    La clave la genera el terminal: un reenvío del mismo lote devuelve el
+    resultado guardado en lugar de registrar la venta otra vez.
+    """
+    
+    ESTADO_CHOICES = [
+        ('ACEPTADA', 'Aceptada'),
+        ('RECHAZADA', 'Rechazada'),
+    ]
+    
+    clave_idempotencia = models.UUIDField(
+        primary_key=True,
+        help_text="Identificador generado por el terminal para la venta"
+    )
+    terminal = models.CharField(max_length=50, blank=True, db_index=True)
+    venta = models.OneToOneField(
+        Venta,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='sincronizacion'
+    )
+    estado = models.CharField(max_length=10, choices=ESTADO_CHOICES)
+    resultado = models.JSONField(default=dict, help_text="Respuesta devuelta al terminal")
+    
+    # Auditoría
+    fecha_registro = models.DateTimeField(help_text="Momento de la venta en el terminal")
+    fecha_sincronizacion = models.DateTimeField(auto_now_add=True)
+    usuario = models.ForeignKey(
+        'authentication.Usuario',
+        on_delete=models.PROTECT
+    )
+    
+    class Meta:
+        verbose_name = 'Venta Sincronizada'
+        verbose_name_plural = 'Ventas Sincronizadas'
+        ordering = ['-fecha_sincronizacion']
+        db_table = 'sales_venta_sincronizada'
+    
+    def __str__(self):
+        return f"{self.terminal} {self.clave_idempotencia} - {self.estado}"
+
+
 # ============================================================================
 # SIGNALS
 # ============================================================================
 
 from django.db.models.signals import post_save, pre_save, post_delete
 from django.dispatch import receiver
-from django.db import transaction
 
 def detalle_venta_pre_save(sender, instance, **kwargs):
     """Calcular totales antes de guardar"""
@@ -742,24 +797,11 @@ def venta_anulada_revertir_stock(sender, instance, **kwargs):
     Si una venta se anula, revertir el stock
     """
     if instance.estado == 'ANULADA':
-        with transaction.atomic():
-            for detalle in instance.detalles.all():
-                producto = detalle.producto
-                
-                if producto.tipo_inventario == 'QUINTAL' and detalle.quintal:
-                    # Revertir peso al quintal
-                    quintal = detalle.quintal
-                    quintal.peso_actual += detalle.peso_vendido
-                    if quintal.estado == 'AGOTADO':
-                        quintal.estado = 'DISPONIBLE'
-                    quintal.save()
-                    
-                elif producto.tipo_inventario == 'NORMAL' and detalle.cantidad_unidades:
-                    # Revertir unidades al inventario
-                    try:
-                        inventario = producto.inventario_normal
-                        if inventario:
-                            inventario.stock_actual += detalle.cantidad_unidades
-                            inventario.save()
-                    except Exception as e:
-                        print(f"Error al revertir inventario: {e}")
\ No newline at end of file
+        from apps.inventory_management.services import StockReversalService
+        
+        StockReversalService.revertir_venta(
+            instance,
+            usuario=instance.vendedor,
+            observaciones=f"Anulación de venta {instance.numero_venta}",
+            registrar_movimientos=False
+        )
\ No newline at end of file
@@ -1,12 +1,18 @@
 # apps/sales_management/pos/pos_service.py
 
 from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Coalesce, Greatest
 from django.core.exceptions import ValidationError
 from decimal import Decimal
 from django.utils import timezone
 from datetime import timedelta
 import logging
 
+from apps.inventory_management.utils.unit_registry import RegistroUnidades
+from apps.system_configuration.instrumentacion import instrumentado
+from apps.system_configuration.metrics import DURACION_CHECKOUT
+
 logger = logging.getLogger(__name__)
 
 
@@ -14,6 +20,7 @@ class POSService:
     """Servicio para operaciones del punto de venta"""
     
     @staticmethod
+    @instrumentado()
     @transaction.atomic
     def crear_venta(vendedor, cliente=None, tipo_venta='CONTADO', descuento=Decimal('0'), 
                    observaciones='', caja=None):
@@ -55,6 +62,7 @@ class POSService:
         return venta
     
     @staticmethod
+    @instrumentado()
     @transaction.atomic
     def agregar_item_normal(venta, producto, cantidad_unidades, precio_unitario, 
                            descuento_porcentaje=Decimal('0')):
@@ -128,6 +136,7 @@ class POSService:
         return detalle
     
     @staticmethod
+    @instrumentado()
     @transaction.atomic
     def agregar_item_quintal(venta, producto, quintal, peso_vendido, precio_por_unidad, 
                             descuento_porcentaje=Decimal('0')):
@@ -161,7 +170,7 @@ class POSService:
         if quintal.peso_actual < peso_vendido:
             raise ValidationError(
                 f'Peso insuficiente en quintal {quintal.codigo_quintal}. '
-                f'Disponible: {quintal.peso_actual} {quintal.unidad_medida.abreviatura}'
+                f'Disponible: {quintal.peso_actual} {RegistroUnidades.abreviatura(quintal.unidad_medida_id)}'
             )
         
         # Calcular montos
@@ -202,12 +211,218 @@ class POSService:
         
         logger.info(
             f"⚖️ Item agregado a {venta.numero_venta}: "
-            f"{producto.nombre} - {peso_vendido} {quintal.unidad_medida.abreviatura}"
+            f"{producto.nombre} - {peso_vendido} {RegistroUnidades.abreviatura(quintal.unidad_medida_id)}"
         )
         
         return detalle
     
     @staticmethod
+    @instrumentado()
+    @transaction.atomic
+    def agregar_item_granel(venta, producto, peso_vendido=None, monto=None,
+                            precio_por_unidad=None, descuento_porcentaje=Decimal('0')):
+        """
+        Agrega una venta a granel repartida en FIFO entre varios quintales
+        
+        A diferencia de agregar_item_quintal no se elige el saco: se toman
+        los más antiguos disponibles (ver FIFOAllocationService) y se crea
+        un DetalleVenta por saco.
+        
+        Args:
+            venta: Venta a la que se agrega el item
+            producto: Producto a agregar (tipo QUINTAL)
+            peso_vendido: Peso que se vende (o bien `monto`)
+            monto: Dinero que se vende; el peso se calcula con el precio
+            precio_por_unidad: Precio por unidad de peso (por defecto el del producto)
+            descuento_porcentaje: Descuento en porcentaje para este item
+        
+        Returns:
+            list[DetalleVenta]: Un detalle por quintal, en orden FIFO
+        """
+        from ..models import DetalleVenta
+        from apps.inventory_management.services import FIFOAllocationService
+        
+        # Validaciones
+        if venta.estado != 'PENDIENTE':
+            raise ValidationError('Solo se pueden agregar items a ventas pendientes')
+        
+        if not producto.es_quintal():
+            raise ValidationError('El producto no es tipo QUINTAL')
+        
+        if (peso_vendido is None) == (monto is None):
+            raise ValidationError('Indique el peso o el monto a vender')
+        
+        precio = Decimal(str(
+            precio_por_unidad if precio_por_unidad is not None else producto.precio_por_unidad_peso or 0
+        ))
+        if monto is not None:
+            peso_vendido = FIFOAllocationService.peso_por_monto(monto, precio)
+        peso_vendido = Decimal(str(peso_vendido))
+        
+        distribucion = FIFOAllocationService.asignar(producto, peso_vendido)
+        
+        # Por monto, el redondeo de cada línea se absorbe en la última para
+        # que la suma sea exactamente lo cobrado
+        bases = [(d['peso_tomar'] * precio).quantize(Decimal('0.01')) for d in distribucion]
+        if monto is not None:
+            bases[-1] = Decimal(str(monto)) - sum(bases[:-1])
+        
+        porcentaje_iva = Decimal('0')
+        if producto.aplica_impuestos:
+            from apps.system_configuration.models import ConfiguracionSistema
+            porcentaje_iva = ConfiguracionSistema.get_config().porcentaje_iva
+        
+        descuento_porcentaje = Decimal(str(descuento_porcentaje))
+        orden = venta.detalles.count()
+        detalles = []
+        for i, (d, subtotal_base) in enumerate(zip(distribucion, bases), start=1):
+            quintal = d['quintal']
+            descuento_monto = subtotal_base * (descuento_porcentaje / 100)
+            subtotal = subtotal_base - descuento_monto
+            monto_iva = subtotal * (porcentaje_iva / 100)
+            costo_unitario = quintal.costo_por_unidad or Decimal('0')
+            detalles.append(DetalleVenta(
+                venta=venta,
+                producto=producto,
+                quintal=quintal,
+                peso_vendido=d['peso_tomar'],
+                unidad_medida_id=quintal.unidad_medida_id,
+                precio_por_unidad_peso=precio,
+                precio_unitario=precio,
+                descuento_porcentaje=descuento_porcentaje,
+                descuento_monto=descuento_monto,
+                aplica_iva=producto.aplica_impuestos,
+                monto_iva=monto_iva,
+                subtotal=subtotal,
+                total=subtotal + monto_iva,
+                costo_unitario=costo_unitario,
+                costo_total=d['peso_tomar'] * costo_unitario,
+                orden=orden + i
+            ))
+        
+        # bulk_create: el peso ya se descontó en FIFOAllocationService, los
+        # receivers de DetalleVenta no deben volver a descontarlo
+        DetalleVenta.objects.bulk_create(detalles)
+        
+        # Recalcular totales de la venta
+        venta.calcular_totales()
+        
+        logger.info(
+            f"⚖️ Item a granel agregado a {venta.numero_venta}: {producto.nombre} - "
+            f"{peso_vendido} en {len(detalles)} quintal(es)"
+        )
+
+        return detalles
+
+    @staticmethod
+    @instrumentado()
+    @transaction.atomic
+    def agregar_items_normales(venta, lineas):
+        """
+        Agrega varios productos normales a la venta en bloque
+
+        Bloquea los inventarios en orden de id, valida todo el stock antes
+        de escribir, crea los detalles con bulk_create y descuenta el stock
+        con un único UPDATE (los receivers de DetalleVenta no se disparan).
+
+        Args:
+            venta: Venta a la que se agregan los items
+            lineas: Iterable de dicts {'producto', 'cantidad', 'precio',
+                'descuento_porcentaje' (opcional)}
+
+        Returns:
+            list[DetalleVenta]: Detalles creados
+        """
+        from ..models import DetalleVenta
+        from apps.inventory_management.models import ProductoNormal, StockActual
+
+        lineas = list(lineas)
+        if venta.estado != 'PENDIENTE':
+            raise ValidationError('Solo se pueden agregar items a ventas pendientes')
+        if not lineas:
+            return []
+
+        unidades = {}
+        for linea in lineas:
+            producto = linea['producto']
+            if not producto.es_normal():
+                raise ValidationError(f'El producto {producto.nombre} no es tipo NORMAL')
+            if int(linea['cantidad']) <= 0:
+                raise ValidationError(f'Cantidad inválida para {producto.nombre}')
+            unidades[producto.id] = unidades.get(producto.id, 0) + int(linea['cantidad'])
+
+        inventarios = {
+            inv.producto_id: inv for inv in ProductoNormal.objects.select_for_update().filter(
+                producto_id__in=unidades
+            ).only('id', 'producto_id', 'stock_actual', 'costo_unitario').order_by('id')
+        }
+        for producto_id, cantidad in unidades.items():
+            producto = next(l['producto'] for l in lineas if l['producto'].id == producto_id)
+            inventario = inventarios.get(producto_id)
+            if inventario is None:
+                raise ValidationError(f'{producto.nombre}: producto sin inventario configurado')
+            if inventario.stock_actual < cantidad:
+                raise ValidationError(
+                    f'Stock insuficiente para {producto.nombre}. '
+                    f'Disponible: {inventario.stock_actual} unidades, Solicitado: {cantidad} unidades'
+                )
+
+        porcentaje_iva = Decimal('0')
+        if any(l['producto'].aplica_impuestos for l in lineas):
+            from apps.system_configuration.models import ConfiguracionSistema
+            porcentaje_iva = ConfiguracionSistema.get_config().porcentaje_iva
+
+        orden = venta.detalles.count()
+        detalles = []
+        for i, linea in enumerate(lineas, start=1):
+            producto = linea['producto']
+            cantidad = int(linea['cantidad'])
+            precio = Decimal(str(linea['precio']))
+            descuento_porcentaje = Decimal(str(linea.get('descuento_porcentaje') or 0))
+            subtotal_base = cantidad * precio
+            descuento_monto = subtotal_base * (descuento_porcentaje / 100)
+            subtotal = subtotal_base - descuento_monto
+            monto_iva = subtotal * (porcentaje_iva / 100) if producto.aplica_impuestos else Decimal('0')
+            costo_unitario = inventarios[producto.id].costo_unitario or Decimal('0')
+            detalles.append(DetalleVenta(
+                venta=venta,
+                producto=producto,
+                cantidad_unidades=cantidad,
+                precio_unitario=precio,
+                descuento_porcentaje=descuento_porcentaje,
+                descuento_monto=descuento_monto,
+                aplica_iva=producto.aplica_impuestos,
+                monto_iva=monto_iva,
+                subtotal=subtotal,
+                total=subtotal + monto_iva,
+                costo_unitario=costo_unitario,
+                costo_total=cantidad * costo_unitario,
+                orden=orden + i
+            ))
+        DetalleVenta.objects.bulk_create(detalles)
+
+        ProductoNormal.objects.filter(
+            id__in=[inv.id for inv in inventarios.values()]
+        ).update(
+            stock_actual=F('stock_actual') - Case(
+                *[When(producto_id=pid, then=Value(cantidad)) for pid, cantidad in unidades.items()],
+                output_field=IntegerField()
+            ),
+            fecha_actualizacion=timezone.now()
+        )
+
+        StockActual.objects.refrescar(unidades)
+        from apps.stock_alert_system.status_calculator import programar_recalculo
+        programar_recalculo(unidades)
+
+        venta.calcular_totales()
+
+        logger.info(f"📦 {len(detalles)} items agregados a {venta.numero_venta}")
+
+        return detalles
+
+    @staticmethod
+    @instrumentado()
     @transaction.atomic
     def eliminar_item(detalle):
         """
@@ -248,6 +463,7 @@ class POSService:
         logger.info(f"🗑️ Item eliminado de {venta.numero_venta}")
     
     @staticmethod
+    @instrumentado()
     @transaction.atomic
     def procesar_pago(venta, forma_pago, monto, usuario, referencia='', caja=None):
         """
@@ -255,13 +471,6 @@ class POSService:
         """
         from ..models import Pago
         
-        print("=" * 80)
-        print(f"🔥 PROCESAR_PAGO LLAMADO")
-        print(f"   Venta: {venta.numero_venta}")
-        print(f"   Forma Pago: {forma_pago}")
-        print(f"   Monto: {monto}")
-        print("=" * 80)
-        
         # Validaciones
         if venta.estado == 'ANULADA':
             raise ValidationError('No se pueden registrar pagos en ventas anuladas')
@@ -276,80 +485,74 @@ class POSService:
                 f'El monto del pago (${monto}) excede el saldo pendiente (${saldo})'
             )
         
-        print("✅ Validaciones pasadas, creando objeto Pago...")
-        
-        # Crear pago
+        # Crear pago (la caja se registra en la venta; Pago no la tiene)
         pago = Pago.objects.create(
             venta=venta,
             forma_pago=forma_pago,
             monto=monto,
             usuario=usuario,
-            referencia=referencia,
-            caja=caja,
+            numero_referencia=referencia,
             fecha_pago=timezone.now()
         )
+        if caja is not None and venta.caja_id is None:
+            venta.caja = caja
         
-        print(f"✅ Pago creado con ID: {pago.id}")
-        print(f"   Ahora debería ejecutarse el signal pago_post_save...")
-        
-        # Actualizar monto pagado de la venta
-        venta.monto_pagado += monto
+        # monto_pagado ya lo recalculó el receiver pago_post_save a partir
+        # de los pagos de la venta (sumarlo aquí lo contaba dos veces)
         
         # Calcular cambio si es efectivo y excede el total
         if forma_pago == 'EFECTIVO' and venta.monto_pagado > venta.total:
             venta.cambio = venta.monto_pagado - venta.total
         
         # ✅ DETERMINAR ESTADO DE PAGO SEGÚN TIPO DE VENTA
-        print(f"🔍 Evaluando estado_pago en pos_service...")
-        print(f"   tipo_venta: {venta.tipo_venta}")
-        print(f"   monto_pagado: {venta.monto_pagado}")
-        print(f"   total: {venta.total}")
-        
         if venta.tipo_venta == 'CONTADO':
             # Ventas al contado siempre quedan como PAGADAS
             if venta.monto_pagado >= venta.total:
                 venta.estado_pago = 'PAGADO'
-                print(f"✅ POS Service: Venta al CONTADO marcada como PAGADA")
             else:
                 venta.estado_pago = 'PENDIENTE'
-                print(f"⏳ POS Service: Venta al CONTADO - Pago parcial")
         
         elif venta.tipo_venta == 'CREDITO':
             # Ventas a crédito quedan pendientes hasta liquidar la deuda
             if venta.monto_pagado >= venta.total:
                 venta.estado_pago = 'PAGADO'
-                print(f"✅ POS Service: Venta a CRÉDITO liquidada")
             else:
                 venta.estado_pago = 'PENDIENTE'
-                print(f"⏳ POS Service: Venta a CRÉDITO pendiente")
         
         else:
             # Por defecto, verificar si está completamente pagado
             venta.estado_pago = 'PAGADO' if venta.monto_pagado >= venta.total else 'PENDIENTE'
         
-        print(f"💾 Guardando venta con estado_pago: {venta.estado_pago}")
         venta.save()
-        
-        print(f"✅ PROCESAR_PAGO COMPLETADO")
-        print("=" * 80)
-        print()
+        logger.debug(
+            "Pago %s de %s en venta %s: estado_pago=%s",
+            forma_pago, monto, venta.numero_venta, venta.estado_pago
+        )
         
         return pago
     
     @staticmethod
+    @instrumentado()
+    @DURACION_CHECKOUT.time()
     @transaction.atomic
-    def finalizar_venta(venta):
+    def finalizar_venta(venta, imprimir=True, fecha_venta=None):
         """
         Finaliza una venta y actualiza el estado
         🖨️ AHORA TAMBIÉN IMPRIME AUTOMÁTICAMENTE EL TICKET
         
         Args:
             venta: Venta a finalizar
+            imprimir: Encolar el ticket (False para ventas ya impresas
+                fuera de línea)
+            fecha_venta: Fecha real de la venta (por defecto ahora)
             
         Returns:
             Venta: Venta finalizada
         """
-        from apps.inventory_management.models import MovimientoQuintal, MovimientoInventario
+        from apps.inventory_management.models import (
+            MovimientoInventario, MovimientoQuintal, ProductoNormal, Quintal
+        )
+        from apps.inventory_management.services import ValoracionService
         
         # Validaciones
         if venta.estado == 'COMPLETADA':
@@ -375,76 +578,120 @@ class POSService:
                     f'disponible del cliente (${venta.cliente.credito_disponible})'
                 )
         
-        # Registrar movimientos de inventario
-        for detalle in venta.detalles.all():
-            producto = detalle.producto
+        detalles = list(venta.detalles.select_related('producto'))
+        movs_quintal, movs_inventario = [], []
+        
+        # Movimientos de quintal en bloque: los saldos antes/después se
+        # encadenan por saco a partir del peso actual (ya descontado)
+        lineas_quintal = [
+            d for d in detalles if d.producto.es_quintal() and d.quintal_id and d.peso_vendido
+        ]
+        if lineas_quintal:
+            quintales = {
+                q.id: q for q in Quintal.objects.filter(
+                    id__in={d.quintal_id for d in lineas_quintal}
+                ).only('id', 'peso_actual', 'unidad_medida_id')
+            }
+            saldo = {qid: q.peso_actual for qid, q in quintales.items()}
+            for d in lineas_quintal:
+                saldo[d.quintal_id] += d.peso_vendido
             
-            if producto.es_quintal() and detalle.quintal:
-                # Registrar movimiento de quintal
-                quintal = detalle.quintal
-                quintal.fecha_ultima_salida = timezone.now()
-                quintal.save()
-                
-                MovimientoQuintal.objects.create(
-                    quintal=quintal,
+            movimientos = []
+            for d in lineas_quintal:
+                antes = saldo[d.quintal_id]
+                saldo[d.quintal_id] = antes - d.peso_vendido
+                movimientos.append(MovimientoQuintal(
+                    quintal_id=d.quintal_id,
+                    tipo_movimiento='SALIDA',
+                    peso_movimiento=-d.peso_vendido,
+                    peso_antes=antes,
+                    peso_despues=saldo[d.quintal_id],
+                    unidad_medida_id=quintales[d.quintal_id].unidad_medida_id,
+                    venta=venta,
+                    usuario=venta.vendedor,
+                    observaciones=f"Venta {venta.numero_venta}"
+                ))
+            movs_quintal = MovimientoQuintal.objects.bulk_create(movimientos)
+        
+        # Movimientos de inventario normal, también en bloque
+        lineas_normales = [
+            d for d in detalles if d.producto.es_normal() and d.cantidad_unidades
+        ]
+        if lineas_normales:
+            inventarios = {
+                inv.producto_id: inv for inv in ProductoNormal.objects.filter(
+                    producto_id__in={d.producto_id for d in lineas_normales}
+                ).only('id', 'producto_id', 'stock_actual')
+            }
+            stock = {pid: inv.stock_actual for pid, inv in inventarios.items()}
+            for d in lineas_normales:
+                if d.producto_id in stock:
+                    stock[d.producto_id] += d.cantidad_unidades
+            
+            movimientos = []
+            for d in lineas_normales:
+                if d.producto_id not in inventarios:
+                    logger.error(f"Producto sin inventario al finalizar {venta.numero_venta}: {d.producto_id}")
+                    continue
+                antes = stock[d.producto_id]
+                stock[d.producto_id] = antes - d.cantidad_unidades
+                movimientos.append(MovimientoInventario(
+                    producto_normal_id=inventarios[d.producto_id].id,
                     tipo_movimiento='SALIDA_VENTA',
-                    peso_movimiento=-detalle.peso_vendido,
-                    peso_antes=quintal.peso_actual + detalle.peso_vendido,
-                    peso_despues=quintal.peso_actual,
-                    unidad_medida=quintal.unidad_medida,
-                    costo_por_unidad=detalle.costo_unitario,
-                    costo_total=detalle.costo_total,
+                    cantidad=-d.cantidad_unidades,
+                    stock_antes=antes,
+                    stock_despues=stock[d.producto_id],
+                    costo_unitario=d.costo_unitario,
+                    costo_total=d.costo_total,
                     venta=venta,
                     usuario=venta.vendedor,
                     observaciones=f"Venta {venta.numero_venta}"
-                )
-                
-            elif producto.es_normal() and detalle.cantidad_unidades:
-                # Registrar movimiento de inventario
-                try:
-                    inventario = producto.inventario_normal
-                    inventario.fecha_ultima_salida = timezone.now()
-                    inventario.save()
-                    
-                    MovimientoInventario.objects.create(
-                        producto_normal=inventario,
-                        tipo_movimiento='SALIDA_VENTA',
-                        cantidad=-detalle.cantidad_unidades,
-                        stock_antes=inventario.stock_actual + detalle.cantidad_unidades,
-                        stock_despues=inventario.stock_actual,
-                        costo_unitario=detalle.costo_unitario,
-                        costo_total=detalle.costo_total,
-                        venta=venta,
-                        usuario=venta.vendedor,
-                        observaciones=f"Venta {venta.numero_venta}"
-                    )
-                except Exception as e:
-                    logger.error(f"Error al registrar movimiento de inventario: {e}")
+                ))
+            movs_inventario = MovimientoInventario.objects.bulk_create(movimientos)
+            ProductoNormal.objects.filter(
+                id__in=[inv.id for inv in inventarios.values()]
+            ).update(fecha_ultima_salida=timezone.now())
+        
+        # bulk_create no dispara post_save: asientos del libro de costos
+        ValoracionService.registrar(movs_quintal, movs_inventario)
+        
+        from apps.stock_alert_system.status_calculator import programar_recalculo
+        programar_recalculo({d.producto_id for d in lineas_quintal + lineas_normales})
         
         # Actualizar estado
         venta.estado = 'COMPLETADA'
-        venta.fecha_venta = timezone.now()
+        venta.fecha_venta = fecha_venta or timezone.now()
         venta.save()
         
         # Actualizar estadísticas del cliente si existe
-        if venta.cliente:
-            cliente = venta.cliente
-            cliente.fecha_ultima_compra = timezone.now()
-            cliente.total_compras += venta.total
+        # (incrementos F(): la tarea semanal solo corrige desvíos)
+        if venta.cliente_id:
+            from ..models import Cliente
+            
+            # Una venta sincronizada con fecha atrasada no retrocede la fecha
+            fecha = Value(venta.fecha_venta)
+            cambios = {
+                'fecha_ultima_compra': Greatest(Coalesce(F('fecha_ultima_compra'), fecha), fecha),
+                'total_compras': F('total_compras') + venta.total,
+                'numero_compras': F('numero_compras') + 1,
+            }
             
             # Si es venta a crédito, descontar del crédito disponible
             if venta.tipo_venta == 'CREDITO':
-                cliente.credito_disponible -= venta.total
+                cambios['credito_disponible'] = F('credito_disponible') - venta.total
             
-            cliente.save()
+            Cliente.objects.filter(pk=venta.cliente_id).update(**cambios)
             
-            logger.info(f"👤 Cliente actualizado: {cliente.nombre}")
+            logger.info(f"👤 Cliente actualizado: {venta.cliente_id}")
         
         logger.info(f"✅ Venta finalizada: {venta.numero_venta} - Total: ${venta.total}")
         
         # NOTA: El registro en caja se hace automáticamente vía signal
         # No es necesario registrarlo aquí para evitar duplicados
         
+        if not imprimir:
+            return venta
+        
         # 🖨️ IMPRIMIR TICKET AUTOMÁTICAMENTE
         try:
             from apps.hardware_integration.models import Impresora
@@ -486,6 +733,7 @@ class POSService:
         return venta
     
     @staticmethod
+    @instrumentado()
     @transaction.atomic
     def anular_venta(venta, motivo='', usuario=None):
         """
@@ -503,7 +751,8 @@ class POSService:
         Returns:
             Venta: Venta anulada
         """
-        from apps.inventory_management.models import MovimientoQuintal, MovimientoInventario
+        from apps.inventory_management.services import StockReversalService
+        from apps.sales_management.models import Cliente
         
         # Validaciones
         if venta.estado == 'ANULADA':
@@ -513,67 +762,24 @@ class POSService:
         # if venta.fecha_venta and venta.fecha_venta.date() != timezone.now().date():
         #     raise ValidationError('Solo se pueden anular ventas del mismo día')
         
-        # Revertir stock/peso de cada detalle
-        for detalle in venta.detalles.all():
-            producto = detalle.producto
-            
-            if producto.es_quintal() and detalle.quintal:
-                # Revertir peso al quintal
-                quintal = detalle.quintal
-                peso_antes = quintal.peso_actual
-                quintal.peso_actual += detalle.peso_vendido
-                
-                if quintal.estado == 'AGOTADO' and quintal.peso_actual > 0:
-                    quintal.estado = 'DISPONIBLE'
-                
-                quintal.save()
-                
-                # Registrar movimiento de anulación
-                if venta.estado == 'COMPLETADA':
-                    MovimientoQuintal.objects.create(
-                        quintal=quintal,
-                        tipo_movimiento='AJUSTE_POSITIVO',
-                        peso_movimiento=detalle.peso_vendido,
-                        peso_antes=peso_antes,
-                        peso_despues=quintal.peso_actual,
-                        unidad_medida=quintal.unidad_medida,
-                        usuario=usuario or venta.vendedor,
-                        observaciones=f"Anulación de venta {venta.numero_venta}. Motivo: {motivo}"
-                    )
-                
-            elif producto.es_normal() and detalle.cantidad_unidades:
-                # Revertir unidades al inventario
-                try:
-                    inventario = producto.inventario_normal
-                    stock_antes = inventario.stock_actual
-                    inventario.stock_actual += detalle.cantidad_unidades
-                    inventario.save()
-                    
-                    # Registrar movimiento de anulación
-                    if venta.estado == 'COMPLETADA':
-                        MovimientoInventario.objects.create(
-                            producto_normal=inventario,
-                            tipo_movimiento='ENTRADA_AJUSTE',
-                            cantidad=detalle.cantidad_unidades,
-                            stock_antes=stock_antes,
-                            stock_despues=inventario.stock_actual,
-                            costo_unitario=detalle.costo_unitario,
-                            costo_total=detalle.costo_total,
-                            usuario=usuario or venta.vendedor,
-                            observaciones=f"Anulación de venta {venta.numero_venta}. Motivo: {motivo}"
-                        )
-                except Exception as e:
-                    logger.error(f"Error al revertir inventario: {e}")
+        # Revertir stock/peso de todas las líneas en bloque
+        # (solo se registran movimientos si la venta llegó a completarse)
+        StockReversalService.revertir_venta(
+            venta,
+            usuario=usuario or venta.vendedor,
+            observaciones=f"Anulación de venta {venta.numero_venta}. Motivo: {motivo}",
+            registrar_movimientos=venta.estado == 'COMPLETADA'
+        )
         
         # Revertir estadísticas del cliente
-        if venta.cliente and venta.estado == 'COMPLETADA':
-            cliente = venta.cliente
-            cliente.total_compras -= venta.total
-            
+        if venta.cliente_id and venta.estado == 'COMPLETADA':
+            cambios = {
+                'total_compras': F('total_compras') - venta.total,
+                'numero_compras': Greatest(F('numero_compras') - 1, 0),
+            }
             if venta.tipo_venta == 'CREDITO':
-                cliente.credito_disponible += venta.total
-            
-            cliente.save()
+                cambios['credito_disponible'] = F('credito_disponible') + venta.total
+            Cliente.objects.filter(pk=venta.cliente_id).update(**cambios)
         
         # Actualizar estado de la venta
         venta.estado = 'ANULADA'
@@ -586,6 +792,7 @@ class POSService:
         return venta
     
     @staticmethod
+    @instrumentado()
     @transaction.atomic
     def procesar_devolucion(devolucion, usuario):
         """
@@ -602,7 +809,8 @@ class POSService:
         Returns:
             Devolucion: Devolución procesada
         """
-        from apps.inventory_management.models import MovimientoQuintal, MovimientoInventario
+        from apps.inventory_management.services import StockReversalService
+        from apps.inventory_management.services.stock_reversal_service import LineaReversion
         
         if devolucion.estado != 'APROBADA':
             raise ValidationError("Solo se pueden procesar devoluciones aprobadas")
@@ -610,53 +818,35 @@ class POSService:
         detalle = devolucion.detalle_venta
         producto = detalle.producto
         
-        if producto.es_quintal() and detalle.quintal:
+        if producto.es_quintal() and detalle.quintal_id:
             # Devolver peso al quintal original
-            quintal = detalle.quintal
-            peso_antes = quintal.peso_actual
-            quintal.peso_actual += devolucion.cantidad_devuelta
-            
-            if quintal.estado == 'AGOTADO' and quintal.peso_actual > 0:
-                quintal.estado = 'DISPONIBLE'
-            
-            quintal.save()
-            
-            # Registrar movimiento
-            MovimientoQuintal.objects.create(
-                quintal=quintal,
-                tipo_movimiento='DEVOLUCION',
-                peso_movimiento=devolucion.cantidad_devuelta,
-                peso_antes=peso_antes,
-                peso_despues=quintal.peso_actual,
-                unidad_medida=quintal.unidad_medida,
-                usuario=usuario,
-                observaciones=f"Devolución {devolucion.numero_devolucion}"
+            linea = LineaReversion(
+                producto.id, detalle.quintal_id, devolucion.cantidad_devuelta, 0,
+                detalle.costo_unitario
             )
-            
         elif producto.es_normal():
             # Devolver unidades al inventario
-            try:
-                inventario = producto.inventario_normal
-                stock_antes = inventario.stock_actual
-                inventario.stock_actual += int(devolucion.cantidad_devuelta)
-                inventario.fecha_ultima_entrada = timezone.now()
-                inventario.save()
-                
-                # Registrar movimiento
-                MovimientoInventario.objects.create(
-                    producto_normal=inventario,
-                    tipo_movimiento='ENTRADA_DEVOLUCION',
-                    cantidad=int(devolucion.cantidad_devuelta),
-                    stock_antes=stock_antes,
-                    stock_despues=inventario.stock_actual,
-                    costo_unitario=detalle.costo_unitario,
-                    costo_total=detalle.costo_unitario * int(devolucion.cantidad_devuelta),
-                    usuario=usuario,
-                    observaciones=f"Devolución {devolucion.numero_devolucion}"
+            linea = LineaReversion(
+                producto.id, None, Decimal('0'), int(devolucion.cantidad_devuelta),
+                detalle.costo_unitario
+            )
+        else:
+            linea = None
+        
+        if linea:
+            resultado = StockReversalService.revertir(
+                [linea],
+                usuario=usuario,
+                observaciones=f"Devolución {devolucion.numero_devolucion}",
+                venta=detalle.venta,
+                tipo_quintal='ENTRADA_DEVOLUCION',
+                tipo_inventario='ENTRADA_DEVOLUCION',
+                marcar_entrada=True
+            )
+            if producto.es_normal() and not resultado['inventarios']:
+                raise ValidationError(
+                    f"Error al procesar devolución: {producto.nombre} no tiene inventario registrado"
                 )
-            except Exception as e:
-                logger.error(f"Error al procesar devolución: {e}")
-                raise ValidationError(f"Error al procesar devolución: {str(e)}")
         
         logger.info(f"🔄 Devolución procesada: {devolucion.numero_devolucion}")
         
@@ -43,7 +43,7 @@ def detalle_venta_post_save(sender, instance, created, **kwargs):
         if producto.tipo_inventario == 'QUINTAL' and instance.quintal:
             # Descontar peso del quintal
             quintal = instance.quintal
-            print(f"🔍 Quintal ANTES: {quintal.peso_actual}")
+            peso_antes = quintal.peso_actual
             
             quintal.peso_actual -= instance.peso_vendido
             if quintal.peso_actual <= 0:
@@ -51,9 +51,9 @@ def detalle_venta_post_save(sender, instance, created, **kwargs):
                 quintal.estado = 'AGOTADO'
             
             quintal.save()
-            print(
-                f"✅ Quintal {quintal.codigo_quintal} actualizado: "
-                f"{quintal.peso_actual} {quintal.unidad_medida.abreviatura}"
+            logger.debug(
+                "Quintal %s actualizado: %s → %s",
+                quintal.codigo_quintal, peso_antes, quintal.peso_actual
             )
             
         elif producto.tipo_inventario == 'NORMAL' and instance.cantidad_unidades:
@@ -61,17 +61,17 @@ def detalle_venta_post_save(sender, instance, created, **kwargs):
             try:
                 inventario = producto.inventario_normal
                 if inventario:
-                    print(
-                        f"🔍 Stock ANTES: {inventario.stock_actual}, "
-                        f"Descontar: {instance.cantidad_unidades}"
-                    )
+                    stock_antes = inventario.stock_actual
                     
                     inventario.stock_actual -= instance.cantidad_unidades
                     if inventario.stock_actual < 0:
                         inventario.stock_actual = 0
                     
                     inventario.save()
-                    print(f"✅ Stock de {producto.nombre} actualizado: {inventario.stock_actual}")
+                    logger.debug(
+                        "Stock de %s actualizado: %s → %s",
+                        producto.nombre, stock_antes, inventario.stock_actual
+                    )
                     
             except Exception as e:
                 logger.error(f"❌ Error al actualizar inventario: {e}", exc_info=True)
@@ -87,61 +87,40 @@ def pago_post_save(sender, instance, created, **kwargs):
     - Actualizar monto pagado en la venta
     - Actualizar estado_pago según tipo de venta
     """
-    print("=" * 80)
-    print("🔥 SIGNAL pago_post_save EJECUTADO")
-    print("=" * 80)
-    
     venta = instance.venta
     
-    print(f"📊 Venta: {venta.numero_venta}")
-    print(f"📊 Tipo Venta: {venta.tipo_venta}")
-    print(f"📊 Total: {venta.total}")
-    
     # Calcular total pagado
     venta.monto_pagado = venta.pagos.aggregate(
         total=Sum('monto')
     )['total'] or Decimal('0')
     
-    print(f"📊 Monto Pagado: {venta.monto_pagado}")
-    
     # Calcular cambio si aplica
     if venta.monto_pagado > venta.total:
         venta.cambio = venta.monto_pagado - venta.total
         venta.monto_pagado = venta.total
-        print(f"💵 Cambio calculado: {venta.cambio}")
     
     # ✅ DETERMINAR ESTADO DE PAGO SEGÚN TIPO DE VENTA
-    print("🔍 EVALUANDO ESTADO DE PAGO...")
-    
     if venta.tipo_venta == 'CONTADO':
-        print("✅ ES VENTA AL CONTADO")
         # Ventas al contado quedan como PAGADAS cuando se paga el total
         if venta.monto_pagado >= venta.total:
             venta.estado_pago = 'PAGADO'
-            print("✅✅✅ MARCANDO COMO PAGADO ✅✅✅")
         else:
             venta.estado_pago = 'PENDIENTE'
-            print("⏳ MARCANDO COMO PENDIENTE (pago parcial)")
     
     elif venta.tipo_venta == 'CREDITO':
-        print("💳 ES VENTA A CRÉDITO")
         # Ventas a crédito quedan pendientes hasta liquidar completamente
         if venta.monto_pagado >= venta.total:
             venta.estado_pago = 'PAGADO'
-            print("✅ MARCANDO COMO PAGADO (liquidada completamente)")
         else:
             venta.estado_pago = 'PENDIENTE'
-            saldo_pendiente = venta.total - venta.monto_pagado
-            print(f"⏳ MARCANDO COMO PENDIENTE - Saldo: ${saldo_pendiente:.2f}")
     
     else:
-        print(f"⚠️ TIPO DE VENTA DESCONOCIDO: {venta.tipo_venta}")
+        logger.warning("Venta %s con tipo de venta desconocido: %s", venta.numero_venta, venta.tipo_venta)
         # Por defecto, verificar si está completamente pagado
         venta.estado_pago = 'PAGADO' if venta.monto_pagado >= venta.total else 'PENDIENTE'
-        print(f"❓ Estado asignado: {venta.estado_pago}")
     
-    print(f"💾 GUARDANDO venta con estado_pago={venta.estado_pago}")
     venta.save()
-    print("✅ VENTA GUARDADA")
-    print("=" * 80)
-    print()
\ No newline at end of file
+    logger.debug(
+        "Pago registrado en venta %s: pagado %s de %s, estado_pago=%s",
+        venta.numero_venta, venta.monto_pagado, venta.total, venta.estado_pago
+    )
\ No newline at end of file
@@ -0,0 +1,317 @@
+"""
+Sincronización de terminales POS fuera de línea
+
+Cuando el enlace de la tienda está lento o caído, el terminal sigue
+vendiendo con una copia local del catálogo y envía después las ventas en
+lote:
+
+- `catalogo(desde)`: feed versionado de productos, precios y stock. La
+  primera vez (sin `desde`) devuelve todo; después solo lo que cambió desde
+  la `version` recibida. Se relee un margen de SINCRONIZACION_MARGEN_SEGUNDOS
+  para no perder transacciones que confirmaron tarde; el terminal aplica
+  los productos como upsert, así que repetir alguno no tiene efecto.
+- `sincronizar(ventas)`: registra muchas ventas en una sola petición. Cada
+  venta trae una clave de idempotencia generada por el terminal; reenviar
+  un lote devuelve los resultados guardados (VentaSincronizada) en lugar
+  de duplicar ventas.
+
+Conflictos de stock: las ventas del lote se procesan en orden de
+(fecha en el terminal, clave), cada una en su propio savepoint y por el
+mismo camino en bloque del POS (agregar_items_normales, agregar_item_granel
+con FIFO, finalizar_venta). Una venta para la que ya no alcanza el stock se
+rechaza completa, con el motivo, y el rechazo también queda guardado bajo
+su clave: el mismo lote produce siempre el mismo resultado. Los errores
+inesperados no se guardan y el terminal puede reintentar.
+"""
+
+import logging
+import uuid
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.inventory_management.models import Producto
+
+from .models import Cliente, Pago, VentaSincronizada
+from .pos.pos_service import POSService
+
+logger = logging.getLogger(__name__)
+
+
+class SincronizacionService:
+    """
+    Feed de catálogo y registro idempotente de ventas fuera de línea
+    """
+
+    # ========================================================================
+    # CATÁLOGO
+    # ========================================================================
+
+    @staticmethod
+    def parsear_version(version):
+        """Instante de una `version` del feed (None si no viene)"""
+        if not version:
+            return None
+        instante = parse_datetime(version)
+        if instante is None:
+            raise ValidationError(f'Versión de catálogo inválida: {version}')
+        return instante if timezone.is_aware(instante) else timezone.make_aware(instante)
+
+    @classmethod
+    def catalogo(cls, desde=None):
+        """
+        Productos, precios y stock cambiados desde la versión `desde`
+
+        Args:
+            desde: `version` de una respuesta anterior (None = catálogo completo)
+
+        Returns:
+            dict: {'version', 'completo', 'configuracion', 'productos'}
+        """
+        from apps.system_configuration.models import ConfiguracionSistema
+
+        # La versión se toma antes de leer: lo que cambie durante la
+        # consulta vuelve a salir en la siguiente
+        version = timezone.now()
+        desde = cls.parsear_version(desde)
+
+        # Todo cambio de stock refresca StockActual en su misma transacción
+        productos = Producto.objects.select_related(
+            'unidad_medida_base', 'existencias'
+        ).order_by('id')
+        if desde is not None:
+            corte = desde - timedelta(seconds=getattr(settings, 'SINCRONIZACION_MARGEN_SEGUNDOS', 5))
+            productos = productos.filter(
+                Q(fecha_actualizacion__gt=corte)
+                | Q(existencias__fecha_actualizacion__gt=corte)
+            )
+        else:
+            productos = productos.filter(activo=True)
+
+        config = ConfiguracionSistema.get_config()
+        return {
+            'version': version.isoformat(),
+            'completo': desde is None,
+            'configuracion': {
+                'iva_activo': config.iva_activo,
+                'porcentaje_iva': str(config.porcentaje_iva),
+            },
+            'productos': [
+                {
+                    'id': str(p.id),
+                    'codigo_barras': p.codigo_barras,
+                    'nombre': p.nombre,
+                    'tipo_inventario': p.tipo_inventario,
+                    'precio_venta': str(p.precio_venta) if p.precio_venta is not None else None,
+                    'precio_por_unidad_peso': (
+                        str(p.precio_por_unidad_peso) if p.precio_por_unidad_peso is not None else None
+                    ),
+                    'aplica_impuestos': p.aplica_impuestos,
+                    'unidad_medida': p.unidad_medida_base.abreviatura if p.unidad_medida_base else None,
+                    'activo': p.activo,
+                    'stock': str(
+                        p.obtener_existencias().peso_disponible if p.es_quintal()
+                        else p.obtener_existencias().unidades_disponibles
+                    ),
+                }
+                for p in productos
+            ],
+        }
+
+    # ========================================================================
+    # VENTAS
+    # ========================================================================
+
+    @classmethod
+    def sincronizar(cls, ventas, usuario, terminal=''):
+        """
+        Registra un lote de ventas hechas fuera de línea
+
+        Args:
+            ventas: Lista de dicts {'clave', 'fecha', 'tipo_venta',
+                'cliente_id', 'observaciones', 'items': [{'producto_id',
+                'cantidad' | 'peso' | 'monto', 'precio',
+                'descuento_porcentaje'}], 'pagos': [{'forma_pago', 'monto',
+                'referencia'}]}
+            usuario: Usuario que sincroniza (vendedor de las ventas)
+            terminal: Identificador del terminal
+
+        Returns:
+            list[dict]: Un resultado por venta, en el orden recibido
+        """
+        maximo = getattr(settings, 'SINCRONIZACION_LOTE_MAXIMO', 200)
+        if not isinstance(ventas, list):
+            raise ValidationError('`ventas` debe ser una lista')
+        if len(ventas) > maximo:
+            raise ValidationError(f'Máximo {maximo} ventas por lote')
+
+        resultados = [None] * len(ventas)
+        pendientes = []
+        for posicion, datos in enumerate(ventas):
+            try:
+                clave = uuid.UUID(str(datos.get('clave')))
+                fecha = cls.parsear_version(datos.get('fecha')) or timezone.now()
+            except (AttributeError, ValueError, ValidationError):
+                resultados[posicion] = {
+                    'clave': datos.get('clave') if isinstance(datos, dict) else None,
+                    'estado': 'RECHAZADA',
+                    'errores': ['Venta sin clave de idempotencia o fecha válida'],
+                }
+                continue
+            pendientes.append((fecha, str(clave), posicion, clave, datos))
+
+        existentes = VentaSincronizada.objects.in_bulk([p[3] for p in pendientes])
+        productos = {
+            str(pk): producto for pk, producto in Producto.objects.select_related(
+                'unidad_medida_base'
+            ).in_bulk({
+                str(item.get('producto_id'))
+                for *_, datos in pendientes for item in datos.get('items') or []
+                if cls._es_uuid(item.get('producto_id'))
+            }).items()
+        }
+
+        # Orden determinista: primero lo que se vendió antes en el terminal
+        for fecha, _, posicion, clave, datos in sorted(pendientes, key=lambda p: p[:2]):
+            if clave in existentes:
+                resultados[posicion] = dict(existentes[clave].resultado, duplicada=True)
+                continue
+            resultados[posicion] = cls._registrar(clave, fecha, datos, productos, usuario, terminal)
+
+        return resultados
+
+    @classmethod
+    def _registrar(cls, clave, fecha, datos, productos, usuario, terminal):
+        """Aplica una venta en su propio savepoint y guarda el resultado"""
+        try:
+            with transaction.atomic():
+                venta = cls._aplicar(datos, fecha, productos, usuario, terminal)
+                resultado = {
+                    'clave': str(clave),
+                    'estado': 'ACEPTADA',
+                    'venta_id': str(venta.id),
+                    'numero_venta': venta.numero_venta,
+                    'total': str(venta.total),
+                }
+                VentaSincronizada.objects.create(
+                    clave_idempotencia=clave, terminal=terminal, venta=venta,
+                    estado='ACEPTADA', resultado=resultado, fecha_registro=fecha, usuario=usuario
+                )
+            return resultado
+        except IntegrityError:
+            return cls._resultado_guardado(clave)
+        except ValidationError as e:
+            resultado = {'clave': str(clave), 'estado': 'RECHAZADA', 'errores': e.messages}
+            try:
+                with transaction.atomic():
+                    VentaSincronizada.objects.create(
+                        clave_idempotencia=clave, terminal=terminal, estado='RECHAZADA',
+                        resultado=resultado, fecha_registro=fecha, usuario=usuario
+                    )
+            except IntegrityError:
+                return cls._resultado_guardado(clave)
+            logger.warning(f"Venta fuera de línea {clave} rechazada: {'; '.join(e.messages)}")
+            return resultado
+        except Exception as e:
+            logger.exception(f"Error sincronizando venta {clave} del terminal {terminal}")
+            return {'clave': str(clave), 'estado': 'ERROR', 'errores': [str(e)]}
+
+    @staticmethod
+    def _resultado_guardado(clave):
+        # Otra petición registró la misma clave en paralelo
+        registro = VentaSincronizada.objects.get(pk=clave)
+        return dict(registro.resultado, duplicada=True)
+
+    @staticmethod
+    def _es_uuid(valor):
+        try:
+            uuid.UUID(str(valor))
+            return True
+        except ValueError:
+            return False
+
+    @staticmethod
+    def _decimal(valor, campo):
+        try:
+            return Decimal(str(valor))
+        except (InvalidOperation, ValueError):
+            raise ValidationError(f'Valor inválido en {campo}: {valor}')
+
+    @classmethod
+    def _aplicar(cls, datos, fecha, productos, usuario, terminal):
+        """Registra la venta por el camino en bloque del POS"""
+        items = datos.get('items') or []
+        if not items:
+            raise ValidationError('La venta no tiene items')
+
+        cliente = None
+        if datos.get('cliente_id'):
+            cliente = Cliente.objects.filter(pk=datos['cliente_id']).first()
+            if cliente is None:
+                raise ValidationError('Cliente no encontrado')
+
+        venta = POSService.crear_venta(
+            vendedor=usuario,
+            cliente=cliente,
+            tipo_venta=datos.get('tipo_venta', 'CONTADO'),
+            observaciones=datos.get('observaciones') or f'Venta fuera de línea {terminal}'.strip()
+        )
+
+        normales = []
+        for item in items:
+            producto = productos.get(str(item.get('producto_id')))
+            if producto is None:
+                raise ValidationError(f"Producto no encontrado: {item.get('producto_id')}")
+            descuento = cls._decimal(item.get('descuento_porcentaje') or 0, 'descuento_porcentaje')
+
+            # Se respeta el precio con el que vendió el terminal
+            if producto.es_quintal():
+                POSService.agregar_item_granel(
+                    venta, producto,
+                    peso_vendido=cls._decimal(item['peso'], 'peso') if item.get('peso') is not None else None,
+                    monto=cls._decimal(item['monto'], 'monto') if item.get('monto') is not None else None,
+                    precio_por_unidad=cls._decimal(
+                        item.get('precio', producto.precio_por_unidad_peso), 'precio'
+                    ),
+                    descuento_porcentaje=descuento
+                )
+            else:
+                normales.append({
+                    'producto': producto,
+                    'cantidad': item.get('cantidad') or 0,
+                    'precio': cls._decimal(item.get('precio', producto.precio_venta), 'precio'),
+                    'descuento_porcentaje': descuento,
+                })
+        POSService.agregar_items_normales(venta, normales)
+
+        # Cada pago se aplica hasta el saldo; el excedente es el cambio. Los
+        # pagos se crean en bloque (sin los receivers de Pago, que marcarían
+        # la venta COMPLETADA antes de finalizar_venta)
+        pagos = []
+        cambio = Decimal('0')
+        for pago in datos.get('pagos') or []:
+            monto = cls._decimal(pago.get('monto'), 'pagos.monto')
+            if monto <= 0:
+                raise ValidationError('El monto del pago debe ser mayor a cero')
+            aplicado = min(monto, venta.total - venta.monto_pagado)
+            if aplicado > 0:
+                pagos.append(Pago(
+                    venta=venta,
+                    forma_pago=pago.get('forma_pago', 'EFECTIVO'),
+                    monto=aplicado,
+                    numero_referencia=pago.get('referencia', ''),
+                    fecha_pago=fecha,
+                    usuario=usuario
+                ))
+                venta.monto_pagado += aplicado
+            cambio += monto - aplicado
+        Pago.objects.bulk_create(pagos)
+        venta.cambio = cambio
+
+        return POSService.finalizar_venta(venta, imprimir=False, fecha_venta=fecha)
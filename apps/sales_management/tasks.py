@@ -1,31 +1,49 @@
 # apps/sales_management/tasks.py
 
 from celery import shared_task
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from datetime import timedelta
 from decimal import Decimal
+import logging
 
-from .models import Venta, Cliente
+from apps.reports_analytics.utils import filtro_dia
+from commercebox.celery import TareaDeduplicada
+from commercebox.db_router import lectura_reportes
 
+from .estadisticas_clientes import EstadisticasClientesService
+from .models import Venta
 
-@shared_task
+logger = logging.getLogger('commercebox')
+
+
+@shared_task(
+    name='apps.sales_management.tasks.generar_reporte_diario',
+    base=TareaDeduplicada
+)
+@lectura_reportes()
 def generar_reporte_diario():
     """
     Genera reporte diario de ventas automáticamente
     Se ejecuta todos los días a las 23:59
     """
-    hoy = timezone.now().date()
+    hoy = timezone.localdate()
     
-    ventas = Venta.objects.filter(
-        fecha_venta__date=hoy,
+    # Rango [00:00, 00:00 del día siguiente) para aprovechar el índice de fecha_venta
+    resumen = Venta.objects.filter(
+        **filtro_dia('fecha_venta', hoy),
         estado='COMPLETADA'
+    ).aggregate(
+        total_ventas=Count('id'),
+        monto_total=Coalesce(Sum('total'), Decimal('0'))
     )
     
-    total_ventas = ventas.count()
-    monto_total = sum(v.total for v in ventas) if ventas else Decimal('0')
+    total_ventas = resumen['total_ventas']
+    monto_total = resumen['monto_total']
     
     # Aquí puedes enviar el reporte por email o guardarlo
-    print(f"Reporte del día {hoy}: {total_ventas} ventas - Total: ${monto_total}")
+    logger.debug(f"Reporte del día {hoy}: {total_ventas} ventas - Total: ${monto_total}")
     
     return {
         'fecha': str(hoy),
@@ -34,47 +52,53 @@ def generar_reporte_diario():
     }
 
 
-@shared_task
+@shared_task(
+    name='apps.sales_management.tasks.verificar_creditos_vencidos',
+    base=TareaDeduplicada
+)
 def verificar_creditos_vencidos():
     """
     Verifica créditos vencidos y envía notificaciones
     Se ejecuta diariamente
     """
-    hoy = timezone.now().date()
+    hoy = timezone.localdate()
     
-    ventas_vencidas = Venta.objects.filter(
-        tipo_venta='CREDITO',
-        estado='COMPLETADA',
-        fecha_vencimiento__lt=hoy,
-        monto_pagado__lt=F('total')
+    # Una consulta agrupada por cliente en lugar de recorrer venta por venta
+    por_cliente = list(
+        Venta.objects.filter(
+            tipo_venta='CREDITO',
+            estado='COMPLETADA',
+            fecha_vencimiento__lt=hoy,
+            monto_pagado__lt=F('total')
+        ).values('cliente_id', 'cliente__nombres', 'cliente__apellidos').annotate(
+            ventas=Count('id'),
+            saldo=Sum(F('total') - F('monto_pagado'))
+        ).order_by('-saldo')
     )
     
-    for venta in ventas_vencidas:
+    for fila in por_cliente:
         # Aquí enviar notificación al cliente
-        print(f"Crédito vencido: {venta.numero_venta} - Cliente: {venta.cliente}")
+        logger.warning(
+            f"Créditos vencidos: {fila['cliente__nombres']} {fila['cliente__apellidos']} - "
+            f"{fila['ventas']} ventas - Saldo: ${fila['saldo']}"
+        )
     
     return {
-        'creditos_vencidos': ventas_vencidas.count()
+        'creditos_vencidos': sum(fila['ventas'] for fila in por_cliente),
+        'clientes': len(por_cliente)
     }
 
 
-@shared_task
+@shared_task(
+    name='apps.sales_management.tasks.actualizar_estadisticas_clientes',
+    base=TareaDeduplicada
+)
 def actualizar_estadisticas_clientes():
     """
-    Actualiza estadísticas de clientes
-    Se ejecuta semanalmente
+    Corrige desvíos en las estadísticas de clientes
+    Se ejecuta semanalmente; las ventas las mantienen al día con
+    incrementos F(), aquí solo se recalculan en bloque
     """
-    clientes = Cliente.objects.filter(activo=True)
-    
-    for cliente in clientes:
-        total_compras = Venta.objects.filter(
-            cliente=cliente,
-            estado='COMPLETADA'
-        ).aggregate(total=Sum('total'))['total'] or Decimal('0')
-        
-        cliente.total_compras = total_compras
-        cliente.save()
-    
-    return {
-        'clientes_actualizados': clientes.count()
-    }
\ No newline at end of file
+    resultado = EstadisticasClientesService.recalcular()
+    logger.info(f"Estadísticas de clientes corregidas: {resultado['clientes_actualizados']}")
+    return resultado
@@ -1,3 +1,392 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.core.exceptions import ValidationError
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.authentication.models import Usuario
+from apps.inventory_management.models import (
+    Categoria, MovimientoInventario, MovimientoQuintal, Producto,
+    ProductoNormal, Proveedor, Quintal, UnidadMedida
+)
+from apps.inventory_management.services import ValoracionService
+from apps.stock_alert_system.status_calculator import _recalcular_pendientes
+
+from .estadisticas_clientes import EstadisticasClientesService
+from .models import Cliente, DetalleVenta, Venta, VentaSincronizada
+from .pos.pos_service import POSService
+from .sincronizacion import SincronizacionService
+from .tasks import verificar_creditos_vencidos
+
+
+class AnulacionVentaTests(TestCase):
+    """
+    La anulación revierte el stock en bloque: el número de consultas no
+    depende de la cantidad de líneas de la venta
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create(
+            username='cajero', email='cajero@example.com', codigo_empleado='CAJ-1',
+            nombres='Caja', apellidos='Uno', documento_identidad='1700000001'
+        )
+        cls.categoria = Categoria.objects.create(nombre='Abarrotes')
+        cls.unidad = UnidadMedida.objects.create(
+            nombre='Libra', abreviatura='lb', factor_conversion_kg=Decimal('0.4536')
+        )
+        cls.proveedor = Proveedor.objects.create(nombre_comercial='Molino', ruc_nit='1790000000001')
+
+    def _venta(self, lineas):
+        """Venta COMPLETADA con `lineas` líneas (mitad quintal, mitad normal)"""
+        normales = Producto.objects.bulk_create([
+            Producto(
+                codigo_barras=f'N-{lineas}-{i}', nombre=f'Normal {i}',
+                categoria=self.categoria, usuario_registro=self.usuario
+            )
+            for i in range(lineas // 2)
+        ])
+        ProductoNormal.objects.bulk_create([
+            ProductoNormal(producto=p, costo_unitario=Decimal('1.00'), stock_actual=5)
+            for p in normales
+        ])
+        arroz = Producto.objects.create(
+            codigo_barras=f'Q-{lineas}', nombre='Arroz', categoria=self.categoria,
+            tipo_inventario='QUINTAL', unidad_medida_base=self.unidad,
+            precio_por_unidad_peso=Decimal('0.60'), usuario_registro=self.usuario
+        )
+        quintales = Quintal.objects.bulk_create([
+            Quintal(
+                codigo_quintal=f'Q-{lineas}-{i}', producto=arroz, proveedor=self.proveedor,
+                unidad_medida=self.unidad, peso_inicial=Decimal('100'), peso_actual=Decimal('0'),
+                estado='AGOTADO', costo_total=Decimal('40'), costo_por_unidad=Decimal('0.4'),
+                usuario_registro=self.usuario
+            )
+            for i in range(3)
+        ])
+        venta = Venta.objects.create(
+            numero_venta=f'VNT-{lineas}', vendedor=self.usuario, estado='COMPLETADA'
+        )
+        detalles = []
+        for i in range(lineas):
+            if i % 2:
+                detalles.append(DetalleVenta(
+                    venta=venta, producto=arroz, quintal=quintales[i % 3],
+                    peso_vendido=Decimal('2'), subtotal=Decimal('1.2'), total=Decimal('1.2'),
+                    costo_unitario=Decimal('0.4'), costo_total=Decimal('0.8')
+                ))
+            else:
+                detalles.append(DetalleVenta(
+                    venta=venta, producto=normales[i // 2], cantidad_unidades=1,
+                    subtotal=Decimal('2'), total=Decimal('2'),
+                    costo_unitario=Decimal('1'), costo_total=Decimal('1')
+                ))
+        DetalleVenta.objects.bulk_create(detalles)
+        return venta, quintales, normales
+
+    def _consultas_anulacion(self, lineas):
+        venta, _, _ = self._venta(lineas)
+        with CaptureQueriesContext(connection) as contexto:
+            POSService.anular_venta(venta, motivo='Prueba', usuario=self.usuario)
+        return len(contexto)
+
+    def test_consultas_constantes(self):
+        self.assertEqual(self._consultas_anulacion(10), self._consultas_anulacion(100))
+
+    def test_revierte_stock_y_registra_movimientos(self):
+        venta, quintales, normales = self._venta(12)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            POSService.anular_venta(venta, motivo='Cliente desistió', usuario=self.usuario)
+
+        # Un solo recálculo de estados de stock para toda la anulación
+        self.assertEqual(
+            sum(1 for callback in callbacks if callback is _recalcular_pendientes), 1
+        )
+
+        venta.refresh_from_db()
+        self.assertEqual(venta.estado, 'ANULADA')
+        # 6 líneas de quintal repartidas en 3 quintales: 2 líneas x 2 lb c/u
+        for quintal in quintales:
+            quintal.refresh_from_db()
+            self.assertEqual(quintal.peso_actual, Decimal('4'))
+            self.assertEqual(quintal.estado, 'DISPONIBLE')
+        for producto in normales:
+            self.assertEqual(ProductoNormal.objects.get(producto=producto).stock_actual, 6)
+
+        movimientos = MovimientoQuintal.objects.filter(
+            quintal=quintales[0], venta=venta
+        ).order_by('peso_despues')
+        self.assertEqual(
+            [(m.peso_antes, m.peso_despues) for m in movimientos],
+            [(Decimal('0'), Decimal('2')), (Decimal('2'), Decimal('4'))]
+        )
+        self.assertEqual(
+            MovimientoInventario.objects.filter(venta=venta, tipo_movimiento='ENTRADA_AJUSTE').count(), 6
+        )
+
+
+class VentaGranelFIFOTests(TestCase):
+    """
+    Una venta a granel se reparte entre los quintales más antiguos con un
+    detalle por saco y un solo UPDATE de los sacos tocados
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create(
+            username='granel', email='granel@example.com', codigo_empleado='GRA-1',
+            nombres='Gra', apellidos='Nel', documento_identidad='1700000003'
+        )
+        cls.categoria = Categoria.objects.create(nombre='Granos')
+        cls.unidad = UnidadMedida.objects.create(
+            nombre='Libra', abreviatura='lb', factor_conversion_kg=Decimal('0.4536')
+        )
+        cls.proveedor = Proveedor.objects.create(nombre_comercial='Molino', ruc_nit='1790000000002')
+
+    def setUp(self):
+        self.arroz = Producto.objects.create(
+            codigo_barras='ARROZ', nombre='Arroz', categoria=self.categoria,
+            tipo_inventario='QUINTAL', unidad_medida_base=self.unidad, aplica_impuestos=False,
+            precio_por_unidad_peso=Decimal('0.60'), usuario_registro=self.usuario
+        )
+        ahora = timezone.now()
+        # Ingresados de más nuevo a más antiguo: el orden FIFO es el inverso
+        self.quintales = [
+            Quintal.objects.create(
+                codigo_quintal=f'ARZ-{i}', producto=self.arroz, proveedor=self.proveedor,
+                unidad_medida=self.unidad, peso_inicial=peso, peso_actual=peso,
+                costo_total=peso * Decimal('0.4'), costo_por_unidad=Decimal('0.4'),
+                fecha_ingreso=ahora - timedelta(days=i), usuario_registro=self.usuario
+            )
+            for i, peso in ((1, Decimal('50')), (2, Decimal('20')), (3, Decimal('30')))
+        ]
+        self.venta = POSService.crear_venta(vendedor=self.usuario)
+
+    def _pesos(self):
+        return [
+            (q.codigo_quintal, q.peso_actual, q.estado)
+            for q in Quintal.objects.filter(producto=self.arroz).order_by('fecha_ingreso')
+        ]
+
+    def test_reparte_en_fifo_y_registra_salidas_al_finalizar(self):
+        detalles = POSService.agregar_item_granel(
+            self.venta, self.arroz, peso_vendido=Decimal('60')
+        )
+
+        self.assertEqual(
+            [(d.quintal.codigo_quintal, d.peso_vendido, d.total) for d in detalles],
+            [('ARZ-3', Decimal('30'), Decimal('18.00')),
+             ('ARZ-2', Decimal('20'), Decimal('12.00')),
+             ('ARZ-1', Decimal('10'), Decimal('6.00'))]
+        )
+        self.assertEqual(self._pesos(), [
+            ('ARZ-3', Decimal('0'), 'AGOTADO'),
+            ('ARZ-2', Decimal('0'), 'AGOTADO'),
+            ('ARZ-1', Decimal('40'), 'DISPONIBLE'),
+        ])
+        self.venta.refresh_from_db()
+        self.assertEqual(self.venta.total, Decimal('36.00'))
+
+        self.venta.monto_pagado = Decimal('36.00')
+        POSService.finalizar_venta(self.venta)
+        self.assertEqual(
+            sorted(MovimientoQuintal.objects.filter(venta=self.venta).values_list(
+                'quintal__codigo_quintal', 'tipo_movimiento', 'peso_antes', 'peso_despues'
+            )),
+            [('ARZ-1', 'SALIDA', Decimal('50'), Decimal('40')),
+             ('ARZ-2', 'SALIDA', Decimal('20'), Decimal('0')),
+             ('ARZ-3', 'SALIDA', Decimal('30'), Decimal('0'))]
+        )
+        # Libro de costos: cada saco sale a su capa de costo
+        self.assertEqual(
+            ValoracionService.saldo_producto(self.arroz),
+            (Decimal('40'), Decimal('16.00'), Decimal('24.00'))
+        )
+
+    def test_por_monto_cobra_exactamente_el_monto(self):
+        detalles = POSService.agregar_item_granel(self.venta, self.arroz, monto=Decimal('20'))
+
+        # 20 / 0.60 = 33.333 lb: 30 del saco más antiguo y 3.333 del siguiente
+        self.assertEqual([d.peso_vendido for d in detalles], [Decimal('30'), Decimal('3.333')])
+        self.assertEqual(sum(d.subtotal for d in detalles), Decimal('20'))
+
+    def test_consultas_no_dependen_de_los_sacos(self):
+        # La primera línea crea la ConfiguracionSistema
+        POSService.agregar_item_granel(self.venta, self.arroz, peso_vendido=Decimal('1'))
+
+        with CaptureQueriesContext(connection) as un_saco:
+            POSService.agregar_item_granel(self.venta, self.arroz, peso_vendido=Decimal('5'))
+        with CaptureQueriesContext(connection) as tres_sacos:
+            POSService.agregar_item_granel(self.venta, self.arroz, peso_vendido=Decimal('60'))
+
+        self.assertEqual(len(un_saco), len(tres_sacos))
+
+    def test_peso_insuficiente_no_modifica_nada(self):
+        with self.assertRaises(ValidationError):
+            POSService.agregar_item_granel(self.venta, self.arroz, peso_vendido=Decimal('101'))
+
+        self.assertFalse(DetalleVenta.objects.filter(venta=self.venta).exists())
+        self.assertEqual(
+            [peso for _, peso, _ in self._pesos()], [Decimal('30'), Decimal('20'), Decimal('50')]
+        )
+
+
+class SincronizacionFueraDeLineaTests(TestCase):
+    """
+    Las ventas de un terminal fuera de línea se registran una sola vez y los
+    conflictos de stock se resuelven por fecha de venta en el terminal
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create(
+            username='terminal', email='terminal@example.com', codigo_empleado='TER-1',
+            nombres='Ter', apellidos='Minal', documento_identidad='1700000004'
+        )
+        cls.categoria = Categoria.objects.create(nombre='Bebidas')
+
+    def setUp(self):
+        self.agua = Producto.objects.create(
+            codigo_barras='AGUA', nombre='Agua', categoria=self.categoria,
+            precio_venta=Decimal('0.50'), aplica_impuestos=False, usuario_registro=self.usuario
+        )
+        ProductoNormal.objects.create(producto=self.agua, costo_unitario=Decimal('0.30'), stock_actual=3)
+
+    def _venta(self, clave, minutos, cantidad):
+        return {
+            'clave': clave,
+            'fecha': (timezone.now() - timedelta(minutes=minutos)).isoformat(),
+            'items': [{'producto_id': str(self.agua.id), 'cantidad': cantidad, 'precio': '0.50'}],
+            'pagos': [{'forma_pago': 'EFECTIVO', 'monto': '5.00'}],
+        }
+
+    def test_reenvio_no_duplica_ventas(self):
+        lote = [self._venta('6f1c0e5e-3c1b-4e8e-9d0a-000000000001', 5, 2)]
+
+        primero, = SincronizacionService.sincronizar(lote, self.usuario, terminal='caja-2')
+        segundo, = SincronizacionService.sincronizar(lote, self.usuario, terminal='caja-2')
+
+        self.assertEqual(primero['estado'], 'ACEPTADA')
+        self.assertEqual(segundo, dict(primero, duplicada=True))
+        venta = Venta.objects.get()
+        self.assertEqual((venta.estado, venta.total, venta.cambio), ('COMPLETADA', Decimal('1.00'), Decimal('4.00')))
+        self.assertEqual(ProductoNormal.objects.get(producto=self.agua).stock_actual, 1)
+
+    def test_conflicto_de_stock_gana_la_venta_mas_antigua(self):
+        # Llegan en desorden; la de hace 10 minutos se aplica primero
+        resultados = SincronizacionService.sincronizar([
+            self._venta('6f1c0e5e-3c1b-4e8e-9d0a-000000000002', 1, 2),
+            self._venta('6f1c0e5e-3c1b-4e8e-9d0a-000000000003', 10, 2),
+        ], self.usuario)
+
+        self.assertEqual([r['estado'] for r in resultados], ['RECHAZADA', 'ACEPTADA'])
+        self.assertEqual(ProductoNormal.objects.get(producto=self.agua).stock_actual, 1)
+        self.assertEqual(Venta.objects.count(), 1)
+        self.assertEqual(
+            VentaSincronizada.objects.get(estado='RECHAZADA').resultado, resultados[0]
+        )
+
+    def test_venta_atrasada_no_retrocede_ultima_compra(self):
+        cliente = Cliente.objects.create(
+            tipo_documento='CEDULA', numero_documento='1700000009', nombres='Cliente', apellidos='Fiel',
+            fecha_ultima_compra=timezone.now()
+        )
+        ultima = cliente.fecha_ultima_compra
+        venta = dict(self._venta('6f1c0e5e-3c1b-4e8e-9d0a-000000000005', 90, 1), cliente_id=str(cliente.pk))
+
+        resultado, = SincronizacionService.sincronizar([venta], self.usuario)
+
+        self.assertEqual(resultado['estado'], 'ACEPTADA')
+        cliente.refresh_from_db()
+        self.assertEqual((cliente.fecha_ultima_compra, cliente.numero_compras), (ultima, 1))
+
+    def test_catalogo_incremental(self):
+        completo = SincronizacionService.catalogo()
+        self.assertTrue(completo['completo'])
+        self.assertEqual(completo['productos'][0]['stock'], '3')
+
+        # Fuera del margen de relectura, sin cambios no hay nada que enviar
+        version = (timezone.now() + timedelta(minutes=1)).isoformat()
+        self.assertEqual(SincronizacionService.catalogo(desde=version)['productos'], [])
+
+        with mock.patch('django.utils.timezone.now', return_value=timezone.now() + timedelta(minutes=2)):
+            SincronizacionService.sincronizar([
+                self._venta('6f1c0e5e-3c1b-4e8e-9d0a-000000000004', 0, 1)
+            ], self.usuario)
+        cambios = SincronizacionService.catalogo(desde=version)['productos']
+        self.assertEqual([(p['codigo_barras'], p['stock']) for p in cambios], [('AGUA', '2')])
+
+
+class EstadisticasClientesTests(TestCase):
+    """
+    La tarea semanal corrige desvíos con una consulta agrupada por lote
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create(
+            username='vendedor', email='vendedor@example.com', codigo_empleado='VEN-1',
+            nombres='Ven', apellidos='Dedor', documento_identidad='1700000002'
+        )
+
+    def _cliente(self, documento, **extra):
+        return Cliente.objects.create(
+            tipo_documento='CEDULA', numero_documento=documento,
+            nombres='Cliente', apellidos=documento, **extra
+        )
+
+    def _venta(self, cliente, numero, total, estado='COMPLETADA', fecha=None):
+        return Venta.objects.create(
+            numero_venta=numero, vendedor=self.usuario, cliente=cliente,
+            total=Decimal(total), estado=estado, fecha_venta=fecha or timezone.now()
+        )
+
+    def test_recalcula_y_solo_escribe_desvios(self):
+        ahora = timezone.now()
+        con_desvio = self._cliente('0101', limite_credito=Decimal('500'))
+        al_dia = self._cliente('0102')
+        self._venta(con_desvio, 'V-1', '10.00', fecha=ahora - timedelta(days=3))
+        self._venta(con_desvio, 'V-2', '25.50', fecha=ahora)
+        self._venta(con_desvio, 'V-3', '99.00', estado='ANULADA')
+        Cliente.objects.filter(pk=con_desvio.pk).update(total_compras=Decimal('1'))
+
+        self.assertEqual(EstadisticasClientesService.recalcular(), {'clientes_actualizados': 1})
+
+        con_desvio.refresh_from_db()
+        self.assertEqual(con_desvio.total_compras, Decimal('35.50'))
+        self.assertEqual(con_desvio.numero_compras, 2)
+        self.assertEqual(con_desvio.fecha_ultima_compra, ahora)
+        self.assertEqual(con_desvio.credito_disponible, Decimal('500'))
+        al_dia.refresh_from_db()
+        self.assertEqual(al_dia.numero_compras, 0)
+
+        # Segunda pasada: nada que corregir
+        self.assertEqual(EstadisticasClientesService.recalcular(), {'clientes_actualizados': 0})
+
+    def test_consultas_por_lote(self):
+        for i in range(5):
+            self._venta(self._cliente(f'02{i:02d}'), f'V-L{i}', '5.00')
+
+        with mock.patch.object(EstadisticasClientesService, 'TAMANO_LOTE', 2):
+            # 3 lotes (consulta agrupada + bulk_update) y la consulta vacía final
+            with self.assertNumQueries(3 * 2 + 1):
+                EstadisticasClientesService.recalcular()
+
+    def test_creditos_vencidos_agrupados_por_cliente(self):
+        cliente = self._cliente('0301')
+        for i in range(3):
+            venta = self._venta(cliente, f'V-C{i}', '20.00')
+            Venta.objects.filter(pk=venta.pk).update(
+                tipo_venta='CREDITO', monto_pagado=Decimal('5.00'),
+                fecha_vencimiento=timezone.localdate() - timedelta(days=1)
+            )
+
+        with self.assertNumQueries(1):
+            resultado = verificar_creditos_vencidos()
 
-# Create your tests here.
+        self.assertEqual(resultado, {'creditos_vencidos': 3, 'clientes': 1})
@@ -74,4 +74,16 @@ urlpatterns = [
         views.ReimprimirTicketView.as_view(),
         name='reimprimir_ticket'
     ),
+
+    # Sincronización de terminales fuera de línea
+    path(
+        'api/sincronizacion/catalogo/',
+        views.CatalogoSincronizacionAPIView.as_view(),
+        name='sincronizacion_catalogo'
+    ),
+    path(
+        'api/sincronizacion/ventas/',
+        views.SincronizarVentasAPIView.as_view(),
+        name='sincronizacion_ventas'
+    ),
 ]
\ No newline at end of file
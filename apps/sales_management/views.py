@@ -25,6 +25,7 @@ from .forms import (
 )
 from apps.inventory_management.models import Producto, Quintal, ProductoNormal
 from apps.inventory_management.services.barcode_service import BarcodeService
+from apps.reports_analytics.utils import filtro_dia, filtro_rango
 
 # Importar mixins de inventory_management
 from apps.inventory_management.mixins import (
@@ -86,9 +87,9 @@ class SalesDashboardView(VentasAccessMixin, TemplateView):
         context = super().get_context_data(**kwargs)
         
         # Ventas del día
-        hoy = timezone.now().date()
+        hoy = timezone.localdate()
         ventas_hoy = Venta.objects.filter(
-            fecha_venta__date=hoy,
+            **filtro_dia('fecha_venta', hoy),
             estado='COMPLETADA'
         )
         
@@ -526,7 +527,17 @@ class ProcesarVentaPOSView(VentasAccessMixin, View):
                 producto = Producto.objects.get(pk=item['id'])
                 
                 try:
-                    if item['tipo'] == 'QUINTAL':
+                    if item['tipo'] == 'QUINTAL' and not item.get('quintal_id'):
+                        # Venta a granel: el peso se reparte en FIFO entre quintales
+                        POSService.agregar_item_granel(
+                            venta=venta,
+                            producto=producto,
+                            peso_vendido=item.get('peso_vendido'),
+                            monto=item.get('monto'),
+                            precio_por_unidad=Decimal(str(item['precio_unitario'])),
+                            descuento_porcentaje=Decimal(str(item.get('descuento_porcentaje', 0)))
+                        )
+                    elif item['tipo'] == 'QUINTAL':
                         quintal = Quintal.objects.get(pk=item['quintal_id'])
                         POSService.agregar_item_quintal(
                             venta=venta,
@@ -615,9 +626,9 @@ class VentaListView(VentasAccessMixin, ListView):
         form = VentasFiltroForm(self.request.GET)
         if form.is_valid():
             if form.cleaned_data.get('fecha_inicio'):
-                queryset = queryset.filter(fecha_venta__date__gte=form.cleaned_data['fecha_inicio'])
+                queryset = queryset.filter(**filtro_rango('fecha_venta', form.cleaned_data['fecha_inicio']))
             if form.cleaned_data.get('fecha_fin'):
-                queryset = queryset.filter(fecha_venta__date__lte=form.cleaned_data['fecha_fin'])
+                queryset = queryset.filter(**filtro_rango('fecha_venta', fecha_hasta=form.cleaned_data['fecha_fin']))
             if form.cleaned_data.get('estado'):
                 queryset = queryset.filter(estado=form.cleaned_data['estado'])
             if form.cleaned_data.get('tipo_venta'):
@@ -902,7 +913,7 @@ class ReporteVentasView(VentasAccessMixin, TemplateView):
             agrupar_por = form.cleaned_data.get('agrupar_por')
             
             # Calcular fechas según tipo de reporte
-            hoy = timezone.now().date()
+            hoy = timezone.localdate()
             
             if tipo_reporte == 'diario':
                 fecha_inicio = hoy
@@ -919,8 +930,7 @@ class ReporteVentasView(VentasAccessMixin, TemplateView):
             
             # Filtrar ventas
             ventas = Venta.objects.filter(
-                fecha_venta__date__gte=fecha_inicio,
-                fecha_venta__date__lte=fecha_fin,
+                **filtro_rango('fecha_venta', fecha_inicio, fecha_fin),
                 estado='COMPLETADA'
             )
             
@@ -991,13 +1001,13 @@ class ReporteDiarioView(VentasAccessMixin, TemplateView):
         if fecha_str:
             fecha = datetime.strptime(fecha_str, '%Y-%m-%d').date()
         else:
-            fecha = timezone.now().date()
+            fecha = timezone.localdate()
         
         context['fecha'] = fecha
         
         # Ventas del día
         ventas = Venta.objects.filter(
-            fecha_venta__date=fecha,
+            **filtro_dia('fecha_venta', fecha),
             estado='COMPLETADA'
         )
         
@@ -1080,7 +1090,7 @@ class VentaEstadisticasAPIView(VentasAccessMixin, View):
     def get(self, request):
         periodo = request.GET.get('periodo', 'mes')  # dia, semana, mes, año
         
-        hoy = timezone.now().date()
+        hoy = timezone.localdate()
         
         if periodo == 'dia':
             fecha_inicio = hoy
@@ -1092,8 +1102,7 @@ class VentaEstadisticasAPIView(VentasAccessMixin, View):
             fecha_inicio = hoy.replace(month=1, day=1)
         
         ventas = Venta.objects.filter(
-            fecha_venta__date__gte=fecha_inicio,
-            fecha_venta__date__lte=hoy,
+            **filtro_rango('fecha_venta', fecha_inicio, hoy),
             estado='COMPLETADA'
         )
         
@@ -1336,7 +1345,17 @@ class ProcesarVentaAPIView(LoginRequiredMixin, View):
                     try:
                         producto = Producto.objects.get(pk=item['producto_id'])
                         
-                        if item.get('es_quintal'):
+                        if item.get('es_quintal') and not item.get('quintal_id'):
+                            # Venta a granel: el peso se reparte en FIFO entre quintales
+                            POSService.agregar_item_granel(
+                                venta=venta,
+                                producto=producto,
+                                peso_vendido=item.get('peso_vendido'),
+                                monto=item.get('monto'),
+                                precio_por_unidad=Decimal(str(item['precio'])),
+                                descuento_porcentaje=Decimal(str(item.get('descuento_porcentaje', 0)))
+                            )
+                        elif item.get('es_quintal'):
                             # Item de quintal
                             quintal = Quintal.objects.get(pk=item['quintal_id'])
                             POSService.agregar_item_quintal(
@@ -1820,3 +1839,67 @@ class ProcesarDevolucionProductoView(VentasAPIAccessMixin, View):
                 'error': f'Error del servidor: {str(e)}'
             }, status=500)
 
+
+
+# ============================================================================
+# SINCRONIZACIÓN DE TERMINALES FUERA DE LÍNEA
+# ============================================================================
+
+class CatalogoSincronizacionAPIView(VentasAPIAccessMixin, View):
+    """
+    Feed de catálogo para terminales POS fuera de línea
+
+    GET /api/ventas/api/sincronizacion/catalogo/?desde=<version>
+
+    Sin `desde` devuelve el catálogo completo; con la `version` de la
+    respuesta anterior, solo los productos cambiados.
+    """
+
+    def get(self, request):
+        from .sincronizacion import SincronizacionService
+
+        try:
+            catalogo = SincronizacionService.catalogo(desde=request.GET.get('desde'))
+        except ValidationError as e:
+            return JsonResponse({'success': False, 'error': '; '.join(e.messages)}, status=400)
+
+        return JsonResponse({'success': True, **catalogo})
+
+
+class SincronizarVentasAPIView(VentasAPIAccessMixin, View):
+    """
+    Registra en lote las ventas hechas fuera de línea
+
+    POST /api/ventas/api/sincronizacion/ventas/
+
+    Body:
+    {
+        "terminal": "caja-2",
+        "ventas": [{"clave": "<uuid>", "fecha": "<iso>", "items": [...], "pagos": [...]}]
+    }
+
+    Reenviar el mismo lote es seguro: las claves ya registradas devuelven el
+    resultado guardado con "duplicada": true.
+    """
+
+    def post(self, request):
+        from .sincronizacion import SincronizacionService
+
+        try:
+            datos = json.loads(request.body)
+            resultados = SincronizacionService.sincronizar(
+                datos.get('ventas'),
+                usuario=request.user,
+                terminal=str(datos.get('terminal') or '')[:50]
+            )
+        except (json.JSONDecodeError, AttributeError):
+            return JsonResponse({'success': False, 'error': 'JSON inválido'}, status=400)
+        except ValidationError as e:
+            return JsonResponse({'success': False, 'error': '; '.join(e.messages)}, status=400)
+
+        return JsonResponse({
+            'success': True,
+            'aceptadas': sum(1 for r in resultados if r['estado'] == 'ACEPTADA'),
+            'rechazadas': sum(1 for r in resultados if r['estado'] == 'RECHAZADA'),
+            'resultados': resultados,
+        })
@@ -127,7 +127,6 @@ class EstadoStockAdmin(admin.ModelAdmin):
     
     search_fields = (
         'producto__nombre',
-        'producto__codigo',
         'producto__codigo_barras',
     )
     
@@ -231,7 +230,7 @@ class EstadoStockAdmin(admin.ModelAdmin):
             '<small style="color: #666;">{}</small>',
             url,
             obj.producto.nombre,
-            obj.producto.codigo
+            obj.producto.codigo_barras
         )
     
     @admin.display(description='Stock/Peso')
@@ -240,9 +239,9 @@ class EstadoStockAdmin(admin.ModelAdmin):
         if obj.tipo_inventario == 'QUINTAL':
             return format_html(
                 '<strong>{}</strong> quintales<br>'
-                '<small>{:.2f} kg disponibles</small>',
+                '<small>{} kg disponibles</small>',
                 obj.total_quintales,
-                obj.peso_total_disponible
+                f'{obj.peso_total_disponible:.2f}'
             )
         else:
             min_display = f' / Min: {obj.stock_minimo}' if obj.stock_minimo else ''
@@ -278,11 +277,11 @@ class EstadoStockAdmin(admin.ModelAdmin):
             '<div style="width: 100px; background-color: #e9ecef; border-radius: 3px; height: 20px; position: relative;">'
             '<div style="width: {}%; background-color: {}; height: 100%; border-radius: 3px;"></div>'
             '<span style="position: absolute; top: 0; left: 0; right: 0; text-align: center; '
-            'line-height: 20px; font-size: 11px; font-weight: bold; color: #000;">{:.1f}%</span>'
+            'line-height: 20px; font-size: 11px; font-weight: bold; color: #000;">{}%</span>'
             '</div>',
             min(porcentaje, 100),
             color,
-            porcentaje
+            f'{porcentaje:.1f}'
         )
     
     @admin.display(description='⚠️', boolean=True)
@@ -295,9 +294,9 @@ class EstadoStockAdmin(admin.ModelAdmin):
         """Valor del inventario"""
         return format_html(
             '<span style="font-weight: bold; color: #28a745;">'
-            'L. {:.2f}'
+            'L. {}'
             '</span>',
-            obj.valor_inventario
+            f'{obj.valor_inventario:.2f}'
         )
     
     @admin.display(description='Última Act.', ordering='fecha_ultimo_calculo')
@@ -375,21 +374,21 @@ class EstadoStockAdmin(admin.ModelAdmin):
         # Barras de diferentes colores
         return format_html(
             '<div style="background-color: #f8f9fa; padding: 15px; border-radius: 5px;">'
-            '<div style="margin-bottom: 5px;"><strong>Peso Disponible:</strong> {:.2f} kg</div>'
-            '<div style="margin-bottom: 5px;"><strong>Peso Inicial:</strong> {:.2f} kg</div>'
-            '<div style="margin-bottom: 10px;"><strong>Porcentaje:</strong> {:.2f}%</div>'
+            '<div style="margin-bottom: 5px;"><strong>Peso Disponible:</strong> {} kg</div>'
+            '<div style="margin-bottom: 5px;"><strong>Peso Inicial:</strong> {} kg</div>'
+            '<div style="margin-bottom: 10px;"><strong>Porcentaje:</strong> {}%</div>'
             '<div style="background-color: #e9ecef; height: 30px; border-radius: 5px; position: relative; overflow: hidden;">'
             '<div style="background: linear-gradient(90deg, #28a745, #ffc107, #dc3545); '
             'width: {}%; height: 100%;"></div>'
             '<span style="position: absolute; top: 50%; left: 50%; transform: translate(-50%, -50%); '
-            'font-weight: bold; color: #000;">{:.1f}%</span>'
+            'font-weight: bold; color: #000;">{}%</span>'
             '</div>'
             '</div>',
-            obj.peso_total_disponible,
-            obj.peso_total_inicial,
-            porcentaje,
+            f'{obj.peso_total_disponible:.2f}',
+            f'{obj.peso_total_inicial:.2f}',
+            f'{porcentaje:.2f}',
             min(porcentaje, 100),
-            porcentaje
+            f'{porcentaje:.1f}'
         )
     
     @admin.display(description='Información Completa')
@@ -530,12 +529,12 @@ class HistorialEstadoInline(admin.TabularInline):
         simbolo = '+' if diff > 0 else ''
         
         return format_html(
-            '{:.2f} → {:.2f} <span style="color: {};">({}{:.2f})</span>',
-            obj.stock_anterior,
-            obj.stock_nuevo,
+            '{} → {} <span style="color: {};">({}{})</span>',
+            f'{obj.stock_anterior:.2f}',
+            f'{obj.stock_nuevo:.2f}',
             color,
             simbolo,
-            diff
+            f'{diff:.2f}'
         )
 
 
@@ -587,7 +586,7 @@ class AlertaStockAdmin(admin.ModelAdmin):
         'titulo',
         'mensaje',
         'producto__nombre',
-        'quintal__codigo_unico',
+        'quintal__codigo_quintal',
     )
     
     readonly_fields = (
@@ -843,7 +842,7 @@ class AlertaStockAdmin(admin.ModelAdmin):
         return qs.select_related(
             'producto',
             'quintal',
-            'producto_normal',
+            'producto_normal__producto',
             'usuario_asignado',
             'usuario_resolutor'
         )
@@ -919,6 +918,11 @@ class HistorialAlertaAdmin(admin.ModelAdmin):
         """Descripción truncada"""
         max_len = 60
         return obj.descripcion[:max_len] + '...' if len(obj.descripcion) > max_len else obj.descripcion
+    
+    def get_queryset(self, request):
+        """Optimiza las consultas"""
+        qs = super().get_queryset(request)
+        return qs.select_related('alerta', 'usuario')
 
 
 # ============================================================================
@@ -1017,14 +1021,14 @@ class HistorialEstadoAdmin(admin.ModelAdmin):
         simbolo = '+' if diff > 0 else ''
         
         return format_html(
-            '<span style="font-weight: bold;">{:.2f}</span> → '
-            '<span style="font-weight: bold;">{:.2f}</span> '
-            '<span style="color: {}; font-weight: bold;">({}{:.2f})</span>',
-            obj.stock_anterior,
-            obj.stock_nuevo,
+            '<span style="font-weight: bold;">{}</span> → '
+            '<span style="font-weight: bold;">{}</span> '
+            '<span style="color: {}; font-weight: bold;">({}{})</span>',
+            f'{obj.stock_anterior:.2f}',
+            f'{obj.stock_nuevo:.2f}',
             color,
             simbolo,
-            diff
+            f'{diff:.2f}'
         )
     
     @admin.display(description='Motivo')
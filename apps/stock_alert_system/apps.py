@@ -1,7 +1,10 @@
 # apps/stock_alert_system/apps.py
 
+import logging
 from django.apps import AppConfig
 
+logger = logging.getLogger('commercebox')
+
 
 class StockAlertSystemConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
@@ -17,4 +20,4 @@ class StockAlertSystemConfig(AppConfig):
         import apps.stock_alert_system.signals
         
         # Mensaje de inicio
-        print("🚨 Sistema de Alertas de Stock cargado correctamente")
\ No newline at end of file
+        logger.debug("🚨 Sistema de Alertas de Stock cargado correctamente")
\ No newline at end of file
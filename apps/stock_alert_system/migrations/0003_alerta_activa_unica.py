@@ -0,0 +1,60 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:45
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.utils import timezone
+
+
+def resolver_duplicadas(apps, schema_editor):
+    """
+    Deja una sola alerta activa por referencia y tipo (la más reciente);
+    el código anterior podía crear duplicadas
+    """
+    AlertaStock = apps.get_model("stock_alert_system", "AlertaStock")
+    activas = AlertaStock.objects.filter(resuelta=False)
+
+    for referencia in ("producto", "quintal"):
+        grupos = (
+            activas.filter(**{f"{referencia}__isnull": False})
+            .values(referencia, "tipo_alerta")
+            .annotate(cantidad=Count("id"))
+            .filter(cantidad__gt=1)
+        )
+        for grupo in grupos:
+            duplicadas = activas.filter(
+                **{referencia: grupo[referencia], "tipo_alerta": grupo["tipo_alerta"]}
+            ).order_by("-fecha_creacion")
+            AlertaStock.objects.filter(
+                id__in=list(duplicadas.values_list("id", flat=True)[1:])
+            ).update(
+                estado="RESUELTA",
+                resuelta=True,
+                fecha_resolucion=timezone.now(),
+                notas="Alerta duplicada",
+            )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("stock_alert_system", "0002_estadostock_historialestado_and_more"),
+    ]
+
+    operations = [
+        migrations.RunPython(resolver_duplicadas, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="alertastock",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("resuelta", False)),
+                fields=("producto", "tipo_alerta"),
+                name="alerta_activa_unica_producto",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="alertastock",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("resuelta", False)),
+                fields=("quintal", "tipo_alerta"),
+                name="alerta_activa_unica_quintal",
+            ),
+        ),
+    ]
@@ -0,0 +1,95 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+def poblar_calendario(apps, schema_editor):
+    """Indexa los lotes con fecha de vencimiento que ya existen"""
+    Quintal = apps.get_model("inventory_management", "Quintal")
+    ProductoNormal = apps.get_model("inventory_management", "ProductoNormal")
+    VencimientoLote = apps.get_model("stock_alert_system", "VencimientoLote")
+
+    lotes = [
+        VencimientoLote(quintal_id=pk, fecha_vencimiento=fecha)
+        for pk, fecha in Quintal.objects.filter(
+            fecha_vencimiento__isnull=False
+        ).exclude(estado="AGOTADO").values_list("id", "fecha_vencimiento").iterator()
+    ]
+    lotes += [
+        VencimientoLote(producto_normal_id=pk, fecha_vencimiento=fecha)
+        for pk, fecha in ProductoNormal.objects.filter(
+            fecha_vencimiento__isnull=False
+        ).values_list("id", "fecha_vencimiento").iterator()
+    ]
+    VencimientoLote.objects.bulk_create(lotes, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("inventory_management", "0006_alter_quintal_codigo_quintal"),
+        ("stock_alert_system", "0003_alerta_activa_unica"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="VencimientoLote",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("fecha_vencimiento", models.DateField(db_index=True)),
+                ("umbral_notificado", models.SmallIntegerField(blank=True, null=True)),
+                ("fecha_actualizacion", models.DateTimeField(auto_now=True)),
+                (
+                    "producto_normal",
+                    models.OneToOneField(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="vencimiento",
+                        to="inventory_management.productonormal",
+                    ),
+                ),
+                (
+                    "quintal",
+                    models.OneToOneField(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="vencimiento",
+                        to="inventory_management.quintal",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Vencimiento de Lote",
+                "verbose_name_plural": "Calendario de Vencimientos",
+                "db_table": "stock_alert_vencimiento_lote",
+                "ordering": ["fecha_vencimiento"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="vencimientolote",
+            constraint=models.CheckConstraint(
+                check=models.Q(
+                    models.Q(
+                        ("producto_normal__isnull", True), ("quintal__isnull", False)
+                    ),
+                    models.Q(
+                        ("producto_normal__isnull", False), ("quintal__isnull", True)
+                    ),
+                    _connector="OR",
+                ),
+                name="vencimiento_lote_una_referencia",
+            ),
+        ),
+        migrations.RunPython(poblar_calendario, migrations.RunPython.noop),
+    ]
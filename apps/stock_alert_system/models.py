@@ -459,6 +459,20 @@ class AlertaStock(models.Model):
             models.Index(fields=['prioridad', 'estado']),
             models.Index(fields=['fecha_creacion', 'resuelta']),
         ]
+        constraints = [
+            # Una sola alerta activa por referencia y tipo; AlertaManager.upsert
+            # usa estos índices como destino de ON CONFLICT
+            models.UniqueConstraint(
+                fields=['producto', 'tipo_alerta'],
+                condition=Q(resuelta=False),
+                name='alerta_activa_unica_producto'
+            ),
+            models.UniqueConstraint(
+                fields=['quintal', 'tipo_alerta'],
+                condition=Q(resuelta=False),
+                name='alerta_activa_unica_quintal'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.get_tipo_alerta_display()} - {self.titulo}"
@@ -571,7 +585,7 @@ class AlertaStock(models.Model):
     def get_referencia_nombre(self):
         """Obtiene el nombre de la referencia"""
         if self.quintal:
-            return f"Quintal: {self.quintal.codigo_unico}"
+            return f"Quintal: {self.quintal.codigo_quintal}"
         elif self.producto_normal:
             return f"Producto: {self.producto_normal.producto.nombre}"
         elif self.producto:
@@ -727,6 +741,64 @@ class HistorialEstado(models.Model):
         return f"{self.producto.nombre}: {self.estado_anterior} → {self.estado_nuevo}"
 
 
+# ============================================================================
+# CALENDARIO DE VENCIMIENTOS
+# ============================================================================
+
+class VencimientoLote(models.Model):
+    """
+    Índice fecha de vencimiento → lote (quintal o producto normal)
+
+    Se mantiene al registrar o cambiar la fecha de un lote (ver
+    vencimientos.py); la revisión diaria lo recorre por fecha en lugar de
+    recalcular días por fila en cada guardado.
+    """
+    # Umbral usado para lotes ya vencidos
+    VENCIDO = -1
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+
+    fecha_vencimiento = models.DateField(db_index=True)
+    quintal = models.OneToOneField(
+        Quintal,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='vencimiento'
+    )
+    producto_normal = models.OneToOneField(
+        ProductoNormal,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='vencimiento'
+    )
+
+    # Último umbral (días) ya avisado para esta fecha; VENCIDO si ya venció
+    umbral_notificado = models.SmallIntegerField(null=True, blank=True)
+
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Vencimiento de Lote'
+        verbose_name_plural = 'Calendario de Vencimientos'
+        ordering = ['fecha_vencimiento']
+        db_table = 'stock_alert_vencimiento_lote'
+        constraints = [
+            models.CheckConstraint(
+                check=(
+                    Q(quintal__isnull=False, producto_normal__isnull=True)
+                    | Q(quintal__isnull=True, producto_normal__isnull=False)
+                ),
+                name='vencimiento_lote_una_referencia'
+            ),
+        ]
+
+    def __str__(self):
+        lote = self.quintal_id or self.producto_normal_id
+        return f"{lote} vence {self.fecha_vencimiento:%d/%m/%Y}"
+
+
 # ============================================================================
 # FUNCIONES HELPER GLOBALES
 # ============================================================================
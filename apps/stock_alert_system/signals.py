@@ -5,11 +5,14 @@ Signals para actualizar automáticamente el sistema de alertas
 Escucha cambios en inventario y ventas
 """
 
+import logging
 from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
 from django.db import transaction
 from .models import AlertaStock
 
+logger = logging.getLogger('commercebox')
+
 # ============================================================================
 # SIGNALS PARA QUINTALES
 # ============================================================================
@@ -20,12 +23,10 @@ def quintal_actualizar_estado(sender, instance, created, **kwargs):
     Después de guardar un quintal (crear o actualizar):
     - Recalcular estado del producto
     """
-    from .status_calculator import StatusCalculator
+    from .status_calculator import programar_recalculo
     
     # Recalcular estado del producto
-    transaction.on_commit(
-        lambda: StatusCalculator.calcular_estado(instance.producto)
-    )
+    programar_recalculo([instance.producto_id])
 
 
 @receiver(post_save, sender='inventory_management.MovimientoQuintal')
@@ -35,15 +36,13 @@ def movimiento_quintal_actualizar_estado(sender, instance, created, **kwargs):
     - Recalcular estado del producto
     - Verificar si el quintal individual necesita alerta
     """
-    from .status_calculator import StatusCalculator
+    from .status_calculator import programar_recalculo
     
     if created:
         quintal = instance.quintal
         
         # Recalcular estado del producto
-        transaction.on_commit(
-            lambda: StatusCalculator.calcular_estado(quintal.producto)
-        )
+        programar_recalculo([quintal.producto_id])
 
 
 # ============================================================================
@@ -56,11 +55,9 @@ def producto_normal_actualizar_estado(sender, instance, created, **kwargs):
     Después de guardar producto normal:
     - Recalcular estado
     """
-    from .status_calculator import StatusCalculator
+    from .status_calculator import programar_recalculo
     
-    transaction.on_commit(
-        lambda: StatusCalculator.calcular_estado(instance.producto)
-    )
+    programar_recalculo([instance.producto_id])
 
 
 @receiver(post_save, sender='inventory_management.MovimientoInventario')
@@ -69,14 +66,38 @@ def movimiento_inventario_actualizar_estado(sender, instance, created, **kwargs)
     Después de un movimiento de inventario:
     - Recalcular estado del producto
     """
-    from .status_calculator import StatusCalculator
+    from .status_calculator import programar_recalculo
     
     if created:
         producto_normal = instance.producto_normal
         
-        transaction.on_commit(
-            lambda: StatusCalculator.calcular_estado(producto_normal.producto)
-        )
+        programar_recalculo([producto_normal.producto_id])
+
+
+# ============================================================================
+# CALENDARIO DE VENCIMIENTOS
+# ============================================================================
+
+@receiver(post_save, sender='inventory_management.Quintal')
+@receiver(post_save, sender='inventory_management.ProductoNormal')
+def lote_actualizar_vencimiento(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Al registrar un lote o cambiar su fecha de vencimiento:
+    - Actualizar el calendario de vencimientos
+    
+    Los demás guardados (ventas, ajustes de stock) solo comparan la fecha
+    con la leída de la BD, sin consultas.
+    """
+    if update_fields is not None and 'fecha_vencimiento' not in update_fields:
+        return
+    # Campo diferido y no asignado: no cambió
+    if 'fecha_vencimiento' not in instance.__dict__:
+        return
+    if instance.fecha_vencimiento == getattr(instance, '_fecha_vencimiento_cargada', None):
+        return
+    
+    from .vencimientos import CalendarioVencimientos
+    CalendarioVencimientos.registrar(instance)
 
 
 # ============================================================================
@@ -89,12 +110,10 @@ def venta_actualizar_estado(sender, instance, created, **kwargs):
     Después de crear un detalle de venta:
     - Recalcular estado del producto vendido
     """
-    from .status_calculator import StatusCalculator
+    from .status_calculator import programar_recalculo
     
     if created:
-        transaction.on_commit(
-            lambda: StatusCalculator.calcular_estado(instance.producto)
-        )
+        programar_recalculo([instance.producto_id])
 
 
 @receiver(post_save, sender='sales_management.Venta')
@@ -103,14 +122,13 @@ def venta_anulada_actualizar_estado(sender, instance, **kwargs):
     Si una venta se anula:
     - Recalcular estado de todos los productos de la venta
     """
-    from .status_calculator import StatusCalculator
+    from .status_calculator import programar_recalculo
     
     if instance.estado == 'ANULADA':
-        # Recalcular para cada producto de la venta
-        for detalle in instance.detalles.all():
-            transaction.on_commit(
-                lambda producto=detalle.producto: StatusCalculator.calcular_estado(producto)
-            )
+        # Recalcular (una vez) los productos de la venta
+        programar_recalculo(
+            instance.detalles.values_list('producto_id', flat=True)
+        )
 
 
 # ============================================================================
@@ -186,7 +204,7 @@ def inicializar_estados_stock():
             }
         )
     
-    print(f"✅ Sistema de alertas inicializado. Productos procesados: {productos_sin_estado.count()}")
+    logger.debug(f"✅ Sistema de alertas inicializado. Productos procesados: {productos_sin_estado.count()}")
 
 
 # ============================================================================
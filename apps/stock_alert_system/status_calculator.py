@@ -6,9 +6,63 @@ Este es el CEREBRO del sistema de alertas
 """
 
 from decimal import Decimal
+from django.db import connection, transaction
 from django.utils import timezone
-from django.db.models import Sum, F, Q
+from django.db.models import Case, Exists, F, OuterRef, Q, Value, When
+from django.db.models.sql import InsertQuery
 from datetime import timedelta
+import threading
+import logging
+
+from apps.system_configuration.instrumentacion import instrumentado
+from apps.inventory_management.utils.unit_registry import RegistroUnidades
+
+logger = logging.getLogger('commercebox')
+
+
+# ============================================================================
+# RECÁLCULO AGRUPADO POR TRANSACCIÓN
+# ============================================================================
+
+_pendientes = threading.local()
+
+
+def _recalcular_pendientes():
+    """Recalcula una sola vez cada producto acumulado en la transacción"""
+    from apps.inventory_management.models import Producto
+    
+    producto_ids = getattr(_pendientes, 'productos', None) or set()
+    _pendientes.productos = None
+    
+    for producto in Producto.objects.filter(id__in=producto_ids):
+        StatusCalculator.calcular_estado(producto)
+
+
+def programar_recalculo(producto_ids):
+    """
+    Programa el recálculo de estado de los productos al confirmar la
+    transacción actual
+
+    Todas las llamadas dentro de la misma transacción se agrupan en un
+    único callback on_commit, de modo que un producto se recalcula una
+    sola vez aunque se guarden muchas de sus filas.
+
+    Args:
+        producto_ids: Iterable de ids de Producto
+    """
+    producto_ids = set(producto_ids)
+    if not producto_ids:
+        return
+    
+    pendiente = any(
+        funcion is _recalcular_pendientes for _, funcion, _ in connection.run_on_commit
+    )
+    if pendiente and getattr(_pendientes, 'productos', None) is not None:
+        _pendientes.productos.update(producto_ids)
+        return
+    
+    _pendientes.productos = producto_ids
+    transaction.on_commit(_recalcular_pendientes)
 
 
 class StatusCalculator:
@@ -18,6 +72,7 @@ class StatusCalculator:
     """
     
     @classmethod
+    @instrumentado()
     def calcular_estado(cls, producto):
         """
         Calcula el estado actual de un producto
@@ -82,24 +137,13 @@ class StatusCalculator:
         """
         Calcula el estado para productos tipo QUINTAL
         """
-        from apps.inventory_management.models import Quintal
+        # Totales de la proyección StockActual (refrescada en la misma
+        # transacción que cambió los quintales)
+        existencias = producto.obtener_existencias()
         
-        # Obtener quintales disponibles
-        quintales = Quintal.objects.filter(
-            producto=producto,
-            estado='DISPONIBLE'
-        )
-        
-        # Calcular totales
-        totales = quintales.aggregate(
-            peso_total=Sum('peso_actual'),
-            peso_inicial_total=Sum('peso_inicial'),
-            cantidad=Sum(1)
-        )
-        
-        peso_total = totales['peso_total'] or Decimal('0')
-        peso_inicial_total = totales['peso_inicial_total'] or Decimal('0')
-        total_quintales = totales['cantidad'] or 0
+        peso_total = existencias.peso_disponible
+        peso_inicial_total = existencias.peso_inicial
+        total_quintales = existencias.lotes
         
         # Actualizar datos en estado_stock
         estado_stock.total_quintales = total_quintales
@@ -114,11 +158,8 @@ class StatusCalculator:
         
         estado_stock.porcentaje_disponible = porcentaje
         
-        # Calcular valor de inventario
-        valor = quintales.aggregate(
-            valor_total=Sum(F('peso_actual') * F('costo_por_unidad'))
-        )['valor_total'] or Decimal('0')
-        estado_stock.valor_inventario = valor
+        # Valor de inventario al costo
+        estado_stock.valor_inventario = existencias.valor_costo
         
         # Determinar estado del semáforo
         if peso_total <= 0:
@@ -262,15 +303,9 @@ class StatusCalculator:
             else:
                 return  # No generar alerta para estado NORMAL
             
-            # Verificar si ya existe una alerta activa del mismo tipo
-            alerta_existente = Alerta.objects.filter(
-                producto=producto,
-                tipo_alerta=tipo_alerta,
-                estado='ACTIVA'
-            ).exists()
-            
-            if not alerta_existente:
-                Alerta.objects.create(
+            # Si ya hay una alerta activa de este tipo se actualiza
+            AlertaManager.upsert([
+                Alerta(
                     producto=producto,
                     estado_stock=estado_stock,
                     tipo_alerta=tipo_alerta,
@@ -284,8 +319,10 @@ class StatusCalculator:
                         'fecha_deteccion': timezone.now().isoformat()
                     }
                 )
+            ])
     
     @classmethod
+    @instrumentado()
     def calcular_todos_los_productos(cls):
         """
         Recalcula el estado de TODOS los productos del sistema
@@ -303,7 +340,7 @@ class StatusCalculator:
                 cls.calcular_estado(producto)
                 procesados += 1
             except Exception as e:
-                print(f"Error procesando {producto.nombre}: {str(e)}")
+                logger.error(f"Error procesando {producto.nombre}: {str(e)}")
                 errores += 1
         
         return {
@@ -313,10 +350,14 @@ class StatusCalculator:
         }
     
     @classmethod
+    @instrumentado()
     def verificar_quintales_individuales(cls):
         """
         Verifica quintales individuales que están críticos
-        Genera alertas específicas por quintal
+        Genera (o actualiza) alertas específicas por quintal en un solo upsert
+        
+        Returns:
+            tuple: (alertas creadas, cantidad actualizada)
         """
         from apps.inventory_management.models import Quintal
         from .models import Alerta, ConfiguracionAlerta
@@ -324,103 +365,53 @@ class StatusCalculator:
         config = ConfiguracionAlerta.get_configuracion()
         
         if not config.alertas_activas:
-            return
+            return [], 0
         
         # Buscar quintales críticos
         quintales_criticos = Quintal.objects.filter(
             estado='DISPONIBLE',
             peso_actual__gt=0
         ).annotate(
-            porcentaje=F('peso_actual') * 100.0 / F('peso_inicial')
+            porcentaje=F('peso_actual') * Decimal('100') / F('peso_inicial')
         ).filter(
             porcentaje__lte=config.umbral_quintal_critico
-        )
+        ).select_related('producto')
         
+        alertas = []
         for quintal in quintales_criticos:
-            # Verificar si ya existe alerta
-            alerta_existente = Alerta.objects.filter(
+            porcentaje = quintal.porcentaje_restante()
+            alertas.append(Alerta(
                 quintal=quintal,
                 tipo_alerta='QUINTAL_CRITICO',
-                estado='ACTIVA'
-            ).exists()
-            
-            if not alerta_existente:
-                porcentaje = quintal.porcentaje_restante()
-                
-                Alerta.objects.create(
-                    producto=quintal.producto,
-                    quintal=quintal,
-                    tipo_alerta='QUINTAL_CRITICO',
-                    prioridad='ALTA',
-                    titulo=f"🌾🔴 Quintal Crítico: {quintal.codigo_unico}",
-                    mensaje=(
-                        f"El quintal {quintal.codigo_unico} de {quintal.producto.nombre} "
-                        f"tiene solo {porcentaje:.1f}% restante. "
-                        f"Peso actual: {quintal.peso_actual} {quintal.unidad_medida.abreviatura}"
-                    ),
-                    datos_adicionales={
-                        'codigo_quintal': quintal.codigo_unico,
-                        'porcentaje_restante': float(porcentaje),
-                        'peso_actual': float(quintal.peso_actual),
-                        'peso_inicial': float(quintal.peso_inicial)
-                    }
-                )
+                prioridad='ALTA',
+                titulo=f"🌾🔴 Quintal Crítico: {quintal.codigo_quintal}",
+                mensaje=(
+                    f"El quintal {quintal.codigo_quintal} de {quintal.producto.nombre} "
+                    f"tiene solo {porcentaje:.1f}% restante. "
+                    f"Peso actual: {quintal.peso_actual} {RegistroUnidades.abreviatura(quintal.unidad_medida_id)}"
+                ),
+                datos_adicionales={
+                    'codigo_quintal': quintal.codigo_quintal,
+                    'porcentaje_restante': float(porcentaje),
+                    'peso_actual': float(quintal.peso_actual),
+                    'peso_inicial': float(quintal.peso_inicial)
+                }
+            ))
+        
+        return AlertaManager.upsert(alertas, referencia='quintal')
     
     @classmethod
     def verificar_proximos_vencer(cls):
         """
         Verifica productos próximos a vencer
-        Genera alertas de vencimiento
-        """
-        from apps.inventory_management.models import Quintal
-        from .models import Alerta, ConfiguracionAlerta
-        
-        config = ConfiguracionAlerta.get_configuracion()
-        
-        if not config.alertas_activas:
-            return
+        Delega en la revisión del calendario de vencimientos (vencimientos.py)
         
-        # Calcular fecha límite
-        hoy = timezone.now().date()
-        fecha_limite = hoy + timedelta(days=config.dias_alerta_vencimiento)
-        
-        # Buscar quintales próximos a vencer
-        quintales_por_vencer = Quintal.objects.filter(
-            estado='DISPONIBLE',
-            fecha_vencimiento__isnull=False,
-            fecha_vencimiento__gte=hoy,
-            fecha_vencimiento__lte=fecha_limite
-        )
+        Returns:
+            dict: Resumen de CalendarioVencimientos.revisar()
+        """
+        from .vencimientos import CalendarioVencimientos
         
-        for quintal in quintales_por_vencer:
-            # Verificar si ya existe alerta
-            alerta_existente = Alerta.objects.filter(
-                quintal=quintal,
-                tipo_alerta='PROXIMO_VENCER',
-                estado='ACTIVA'
-            ).exists()
-            
-            if not alerta_existente:
-                dias_restantes = (quintal.fecha_vencimiento - hoy).days
-                
-                Alerta.objects.create(
-                    producto=quintal.producto,
-                    quintal=quintal,
-                    tipo_alerta='PROXIMO_VENCER',
-                    prioridad='ALTA' if dias_restantes <= 3 else 'MEDIA',
-                    titulo=f"⏰ Próximo a Vencer: {quintal.codigo_unico}",
-                    mensaje=(
-                        f"El quintal {quintal.codigo_unico} de {quintal.producto.nombre} "
-                        f"vence en {dias_restantes} día(s) ({quintal.fecha_vencimiento.strftime('%d/%m/%Y')}). "
-                        f"Peso disponible: {quintal.peso_actual} {quintal.unidad_medida.abreviatura}"
-                    ),
-                    datos_adicionales={
-                        'codigo_quintal': quintal.codigo_unico,
-                        'fecha_vencimiento': quintal.fecha_vencimiento.isoformat(),
-                        'dias_restantes': dias_restantes,
-                        'peso_disponible': float(quintal.peso_actual)
-                    }
-                )
+        return CalendarioVencimientos.revisar()
 
 
 class AlertaManager:
@@ -428,78 +419,168 @@ class AlertaManager:
     Manager para gestión de alertas
     """
     
+    # Campos que se refrescan cuando la alerta activa ya existe; el estado
+    # (vista, en proceso), el usuario asignado y las fechas se conservan
+    CAMPOS_UPSERT = ('prioridad', 'titulo', 'mensaje', 'datos_adicionales', 'estado_stock')
+    LOTE_UPSERT = 500
+    
+    @classmethod
+    def upsert(cls, alertas, referencia='producto', notificar=True):
+        """
+        Crea o actualiza alertas activas en bloque
+        
+        INSERT ... ON CONFLICT (<referencia>, tipo_alerta) WHERE NOT resuelta
+        DO UPDATE, contra los índices únicos parciales de AlertaStock: sin
+        carreras ni duplicadas y una sentencia por lote.
+        
+        Args:
+            alertas: AlertaStock sin guardar, todas referidas por `referencia`
+            referencia: 'producto' o 'quintal'
+            notificar: Notificar una por una las alertas nuevas; False si
+                quien llama las notifica en bloque
+        
+        Returns:
+            tuple: (alertas creadas, cantidad de alertas actualizadas)
+        """
+        from .models import AlertaStock
+        
+        # ON CONFLICT no admite la misma fila dos veces en una sentencia
+        unicas = {}
+        for alerta in alertas:
+            unicas[(getattr(alerta, f'{referencia}_id'), alerta.tipo_alerta)] = alerta
+        alertas = list(unicas.values())
+        if not alertas:
+            return [], 0
+        
+        meta = AlertaStock._meta
+        restriccion = next(
+            c for c in meta.constraints if c.name == f'alerta_activa_unica_{referencia}'
+        )
+        qn = connection.ops.quote_name
+        destino = ', '.join(qn(meta.get_field(campo).column) for campo in restriccion.fields)
+        # Predicado de los índices parciales: Django compila
+        # condition=Q(resuelta=False) como NOT "resuelta" y el motor solo
+        # acepta el ON CONFLICT si coincide con el del índice
+        predicado = f"NOT {qn(meta.get_field('resuelta').column)}"
+        actualizar = ', '.join(
+            f'{qn(columna)} = EXCLUDED.{qn(columna)}'
+            for columna in (meta.get_field(campo).column for campo in cls.CAMPOS_UPSERT)
+        )
+        
+        por_id = {alerta.pk: alerta for alerta in alertas}
+        afectadas = []
+        with transaction.atomic(), connection.cursor() as cursor:
+            for i in range(0, len(alertas), cls.LOTE_UPSERT):
+                query = InsertQuery(AlertaStock)
+                query.insert_values(meta.concrete_fields, alertas[i:i + cls.LOTE_UPSERT])
+                sql, params = query.get_compiler(connection=connection).as_sql()[0]
+                cursor.execute(
+                    f'{sql} ON CONFLICT ({destino}) WHERE {predicado} '
+                    f'DO UPDATE SET {actualizar} RETURNING {qn(meta.pk.column)}',
+                    params
+                )
+                afectadas.extend(meta.pk.to_python(fila[0]) for fila in cursor.fetchall())
+        
+        # Si devuelve el id generado aquí, la fila es nueva
+        creadas = [por_id[pk] for pk in afectadas if pk in por_id]
+        cls._alertas_cambiadas(creadas if notificar else ())
+        return creadas, len(afectadas) - len(creadas)
+    
+    @staticmethod
+    def _alertas_cambiadas(creadas=()):
+        """
+        Notifica las alertas nuevas (el upsert no dispara post_save) y
+        refresca el estado del panel
+        """
+        from apps.custom_admin.estado_panel import invalidar
+        from apps.notifications.services.notification_service import NotificationService
+        
+        for alerta in creadas:
+            try:
+                NotificationService.crear_notificacion_desde_alerta(alerta)
+            except Exception as e:
+                logger.error(f"Error al crear notificación desde alerta: {str(e)}")
+        invalidar()
+    
     @staticmethod
+    @instrumentado()
     def resolver_alertas_automaticamente():
         """
         Resuelve alertas que ya no son relevantes
         (ej: stock ya fue repuesto)
+        
+        Un solo UPDATE: cada tipo de alerta se compara con el EstadoStock del
+        producto o con su quintal mediante subconsultas EXISTS.
+        
+        Returns:
+            int: Alertas resueltas
         """
-        from .models import Alerta, EstadoStock
+        from .models import Alerta, ConfiguracionAlerta, EstadoStock
         from apps.inventory_management.models import Quintal
         
-        # Resolver alertas de stock crítico/bajo si el estado mejoró
-        alertas_stock = Alerta.objects.filter(
-            estado='ACTIVA',
-            tipo_alerta__in=['STOCK_CRITICO', 'STOCK_BAJO', 'STOCK_AGOTADO']
-        )
+        config = ConfiguracionAlerta.get_configuracion()
         
-        for alerta in alertas_stock:
-            try:
-                estado_actual = EstadoStock.objects.get(producto=alerta.producto)
-                
-                # Si el estado mejoró, resolver la alerta
-                if alerta.tipo_alerta == 'STOCK_AGOTADO' and estado_actual.estado_semaforo != 'AGOTADO':
-                    alerta.estado = 'RESUELTA'
-                    alerta.notas_resolucion = "Stock repuesto automáticamente"
-                    alerta.fecha_resuelta = timezone.now()
-                    alerta.save()
-                
-                elif alerta.tipo_alerta == 'STOCK_CRITICO' and estado_actual.estado_semaforo in ['NORMAL', 'BAJO']:
-                    alerta.estado = 'RESUELTA'
-                    alerta.notas_resolucion = "Stock mejoró automáticamente"
-                    alerta.fecha_resuelta = timezone.now()
-                    alerta.save()
-                
-                elif alerta.tipo_alerta == 'STOCK_BAJO' and estado_actual.estado_semaforo == 'NORMAL':
-                    alerta.estado = 'RESUELTA'
-                    alerta.notas_resolucion = "Stock normalizado"
-                    alerta.fecha_resuelta = timezone.now()
-                    alerta.save()
-            
-            except EstadoStock.DoesNotExist:
-                pass
-        
-        # Resolver alertas de quintales críticos si mejoraron
-        alertas_quintales = Alerta.objects.filter(
-            estado='ACTIVA',
-            tipo_alerta='QUINTAL_CRITICO',
-            quintal__isnull=False
+        def estado_producto(*estados):
+            return Exists(EstadoStock.objects.filter(
+                producto=OuterRef('producto'), estado_semaforo__in=estados
+            ))
+        
+        quintal = Quintal.objects.filter(pk=OuterRef('quintal'))
+        agotado = Q(estado='AGOTADO') | Q(peso_actual=0)
+        
+        resolubles = (
+            Q(estado_producto('NORMAL', 'BAJO', 'CRITICO'), tipo_alerta='STOCK_AGOTADO')
+            | Q(estado_producto('NORMAL', 'BAJO'), tipo_alerta='STOCK_CRITICO')
+            | Q(estado_producto('NORMAL'), tipo_alerta='STOCK_BAJO')
+            # Quintal agotado o con peso de nuevo por encima del umbral crítico
+            | Q(Exists(quintal.filter(
+                agotado | Q(peso_actual__gt=F('peso_inicial') * Decimal(config.umbral_quintal_critico) / Decimal('100'))
+            )), tipo_alerta='QUINTAL_CRITICO')
+            | Q(Exists(quintal.filter(agotado)), tipo_alerta='VENCIMIENTO_PROXIMO')
         )
         
-        for alerta in alertas_quintales:
-            quintal = alerta.quintal
-            if quintal.estado == 'AGOTADO' or quintal.porcentaje_restante() > 15:
-                alerta.estado = 'RESUELTA'
-                alerta.notas_resolucion = "Quintal agotado o peso mejorado"
-                alerta.fecha_resuelta = timezone.now()
-                alerta.save()
-        
-        # Resolver alertas de vencimiento si ya venció o se agotó
-        alertas_vencimiento = Alerta.objects.filter(
-            estado='ACTIVA',
-            tipo_alerta='PROXIMO_VENCER',
-            quintal__isnull=False
+        resueltas = Alerta.objects.filter(resolubles, resuelta=False).update(
+            estado='RESUELTA',
+            resuelta=True,
+            fecha_resolucion=timezone.now(),
+            notas=Case(
+                When(tipo_alerta='STOCK_AGOTADO', then=Value('Stock repuesto automáticamente')),
+                When(tipo_alerta='STOCK_CRITICO', then=Value('Stock mejoró automáticamente')),
+                When(tipo_alerta='STOCK_BAJO', then=Value('Stock normalizado')),
+                When(tipo_alerta='QUINTAL_CRITICO', then=Value('Quintal agotado o peso mejorado')),
+                default=Value('Quintal vendido/agotado')
+            )
         )
         
-        for alerta in alertas_vencimiento:
-            quintal = alerta.quintal
-            if quintal.estado == 'AGOTADO' or quintal.peso_actual == 0:
-                alerta.estado = 'RESUELTA'
-                alerta.notas_resolucion = "Quintal vendido/agotado"
-                alerta.fecha_resuelta = timezone.now()
-                alerta.save()
+        if resueltas:
+            AlertaManager._alertas_cambiadas()
+        return resueltas
+    
+    @classmethod
+    @instrumentado()
+    def barrido(cls):
+        """
+        Barrido completo de alertas (tarea check_stock_alerts)
+        
+        Las alertas por producto nacen al cambiar el estado de stock
+        (StatusCalculator.calcular_estado) y las de vencimiento en la revisión
+        diaria (vencimientos.py); el barrido cubre las de quintales y resuelve
+        las que ya no aplican. Son unas pocas sentencias sin importar el
+        tamaño del inventario.
+        
+        Returns:
+            dict: Resumen del barrido
+        """
+        creadas, actualizadas = StatusCalculator.verificar_quintales_individuales()
+        
+        return {
+            'alertas_creadas': len(creadas),
+            'alertas_actualizadas': actualizadas,
+            'alertas_resueltas': cls.resolver_alertas_automaticamente(),
+        }
     
     @staticmethod
+    @instrumentado()
     def limpiar_alertas_antiguas(dias=30):
         """
         Limpia alertas resueltas antiguas
@@ -510,7 +591,7 @@ class AlertaManager:
         
         alertas_antiguas = Alerta.objects.filter(
             estado__in=['RESUELTA', 'IGNORADA'],
-            fecha_resuelta__lt=fecha_limite
+            fecha_resolucion__lt=fecha_limite
         )
         
         cantidad = alertas_antiguas.count()
@@ -4,14 +4,16 @@ apps/stock_alert_system/tasks.py
 """
 from celery import shared_task
 from django.utils import timezone
-from django.db.models import Q
 import logging
 
+from commercebox.celery import TareaDeduplicada
+
 logger = logging.getLogger('commercebox')
 
 
 @shared_task(
     name='apps.stock_alert_system.tasks.check_stock_alerts',
+    base=TareaDeduplicada,
     bind=True,
     max_retries=3,
     default_retry_delay=300  # 5 minutos
@@ -20,237 +22,30 @@ def check_stock_alerts(self):
     """
     Tarea programada para verificar y actualizar las alertas de stock.
     
-    Esta tarea:
-    1. Revisa todos los productos y quintales activos
-    2. Calcula su estado de stock actual
-    3. Genera o actualiza alertas según corresponda
-    4. Envía notificaciones si es necesario
+    Ejecuta AlertaManager.barrido():
+    1. Upsert en bloque de alertas de quintales críticos
+    2. Upsert en bloque de alertas de vencimiento próximo
+    3. Resolución automática con un único UPDATE
+    
+    Las alertas por producto se generan al cambiar su estado de stock; las
+    alertas nuevas se notifican desde el propio upsert.
     
     Returns:
         dict: Resumen de la ejecución con estadísticas
     """
     try:
-        from apps.stock_alert_system.models import AlertaStock, EstadoStock, HistorialEstado
-        from apps.inventory_management.models import Producto, Quintal
-        from apps.stock_alert_system.status_calculator import StockStatusCalculator
-        from apps.notifications.services.notification_service import NotificationService
+        from apps.stock_alert_system.status_calculator import AlertaManager
         
         logger.info("Iniciando verificación de alertas de stock...")
         
-        # Contadores para estadísticas
-        stats = {
-            'productos_revisados': 0,
-            'quintales_revisados': 0,
-            'alertas_creadas': 0,
-            'alertas_actualizadas': 0,
-            'notificaciones_enviadas': 0,
-            'errores': 0
-        }
-        
-        # ========== VERIFICAR PRODUCTOS ==========
-        productos_activos = Producto.objects.filter(activo=True)
-        
-        for producto in productos_activos:
-            try:
-                stats['productos_revisados'] += 1
-                
-                # Calcular estado del stock
-                calculator = StockStatusCalculator(producto)
-                estado_info = calculator.calcular_estado()
-                
-                # Buscar o crear el estado del producto
-                estado, created = EstadoStock.objects.get_or_create(
-                    producto=producto,
-                    defaults={
-                        'estado_actual': estado_info['estado'],
-                        'stock_actual': producto.stock_disponible,
-                        'dias_restantes': estado_info.get('dias_restantes'),
-                        'requiere_atencion': estado_info.get('requiere_atencion', False)
-                    }
-                )
-                
-                # Actualizar estado si no es nuevo
-                if not created:
-                    estado_anterior = estado.estado_actual
-                    estado.estado_actual = estado_info['estado']
-                    estado.stock_actual = producto.stock_disponible
-                    estado.dias_restantes = estado_info.get('dias_restantes')
-                    estado.requiere_atencion = estado_info.get('requiere_atencion', False)
-                    estado.save()
-                    
-                    # Registrar cambio de estado si hubo uno
-                    if estado_anterior != estado.estado_actual:
-                        HistorialEstado.objects.create(
-                            estado=estado,
-                            estado_anterior=estado_anterior,
-                            estado_nuevo=estado.estado_actual,
-                            motivo='Actualización automática por tarea programada'
-                        )
-                
-                # ========== GESTIONAR ALERTAS ==========
-                if estado.requiere_atencion:
-                    # Buscar alerta existente activa
-                    alerta_existente = AlertaStock.objects.filter(
-                        producto=producto,
-                        estado='pendiente'
-                    ).first()
-                    
-                    if alerta_existente:
-                        # Actualizar alerta existente
-                        alerta_existente.tipo_alerta = estado_info['tipo_alerta']
-                        alerta_existente.prioridad = estado_info.get('prioridad', 'media')
-                        alerta_existente.mensaje = estado_info.get('mensaje', '')
-                        alerta_existente.save()
-                        stats['alertas_actualizadas'] += 1
-                    else:
-                        # Crear nueva alerta
-                        AlertaStock.objects.create(
-                            producto=producto,
-                            tipo_alerta=estado_info['tipo_alerta'],
-                            prioridad=estado_info.get('prioridad', 'media'),
-                            mensaje=estado_info.get('mensaje', ''),
-                            stock_actual=producto.stock_disponible,
-                            stock_minimo=producto.stock_minimo,
-                            estado='pendiente'
-                        )
-                        stats['alertas_creadas'] += 1
-                        
-                        # Enviar notificación para nueva alerta crítica
-                        if estado_info.get('prioridad') == 'alta':
-                            try:
-                                NotificationService.crear_notificacion(
-                                    tipo='alerta_stock',
-                                    titulo=f'⚠️ Alerta Crítica: {producto.nombre}',
-                                    mensaje=estado_info.get('mensaje', ''),
-                                    prioridad='alta',
-                                    metadata={
-                                        'producto_id': producto.id,
-                                        'stock_actual': producto.stock_disponible,
-                                        'tipo_alerta': estado_info['tipo_alerta']
-                                    }
-                                )
-                                stats['notificaciones_enviadas'] += 1
-                            except Exception as e:
-                                logger.error(f"Error al enviar notificación para producto {producto.id}: {str(e)}")
-                
-            except Exception as e:
-                logger.error(f"Error al procesar producto {producto.id}: {str(e)}")
-                stats['errores'] += 1
-                continue
-        
-        # ========== VERIFICAR QUINTALES ==========
-        quintales_activos = Quintal.objects.filter(activo=True, vendido=False)
+        stats = AlertaManager.barrido()
         
-        for quintal in quintales_activos:
-            try:
-                stats['quintales_revisados'] += 1
-                
-                # Calcular estado del quintal
-                calculator = StockStatusCalculator(quintal)
-                estado_info = calculator.calcular_estado()
-                
-                # Buscar o crear el estado del quintal
-                estado, created = EstadoStock.objects.get_or_create(
-                    quintal=quintal,
-                    defaults={
-                        'estado_actual': estado_info['estado'],
-                        'stock_actual': quintal.peso_actual,
-                        'dias_restantes': estado_info.get('dias_restantes'),
-                        'requiere_atencion': estado_info.get('requiere_atencion', False)
-                    }
-                )
-                
-                # Actualizar estado si no es nuevo
-                if not created:
-                    estado_anterior = estado.estado_actual
-                    estado.estado_actual = estado_info['estado']
-                    estado.stock_actual = quintal.peso_actual
-                    estado.dias_restantes = estado_info.get('dias_restantes')
-                    estado.requiere_atencion = estado_info.get('requiere_atencion', False)
-                    estado.save()
-                    
-                    # Registrar cambio de estado si hubo uno
-                    if estado_anterior != estado.estado_actual:
-                        HistorialEstado.objects.create(
-                            estado=estado,
-                            estado_anterior=estado_anterior,
-                            estado_nuevo=estado.estado_actual,
-                            motivo='Actualización automática por tarea programada'
-                        )
-                
-                # ========== GESTIONAR ALERTAS ==========
-                if estado.requiere_atencion:
-                    # Buscar alerta existente activa
-                    alerta_existente = AlertaStock.objects.filter(
-                        quintal=quintal,
-                        estado='pendiente'
-                    ).first()
-                    
-                    if alerta_existente:
-                        # Actualizar alerta existente
-                        alerta_existente.tipo_alerta = estado_info['tipo_alerta']
-                        alerta_existente.prioridad = estado_info.get('prioridad', 'media')
-                        alerta_existente.mensaje = estado_info.get('mensaje', '')
-                        alerta_existente.save()
-                        stats['alertas_actualizadas'] += 1
-                    else:
-                        # Crear nueva alerta
-                        AlertaStock.objects.create(
-                            quintal=quintal,
-                            tipo_alerta=estado_info['tipo_alerta'],
-                            prioridad=estado_info.get('prioridad', 'media'),
-                            mensaje=estado_info.get('mensaje', ''),
-                            stock_actual=quintal.peso_actual,
-                            estado='pendiente'
-                        )
-                        stats['alertas_creadas'] += 1
-                        
-                        # Enviar notificación para nueva alerta crítica
-                        if estado_info.get('prioridad') == 'alta':
-                            try:
-                                NotificationService.crear_notificacion(
-                                    tipo='alerta_stock',
-                                    titulo=f'⚠️ Alerta Crítica: Quintal {quintal.codigo}',
-                                    mensaje=estado_info.get('mensaje', ''),
-                                    prioridad='alta',
-                                    metadata={
-                                        'quintal_id': quintal.id,
-                                        'peso_actual': float(quintal.peso_actual),
-                                        'tipo_alerta': estado_info['tipo_alerta']
-                                    }
-                                )
-                                stats['notificaciones_enviadas'] += 1
-                            except Exception as e:
-                                logger.error(f"Error al enviar notificación para quintal {quintal.id}: {str(e)}")
-                
-            except Exception as e:
-                logger.error(f"Error al procesar quintal {quintal.id}: {str(e)}")
-                stats['errores'] += 1
-                continue
-        
-        # ========== LIMPIAR ALERTAS ANTIGUAS RESUELTAS ==========
-        # Archivar alertas resueltas de más de 30 días
-        fecha_limite = timezone.now() - timezone.timedelta(days=30)
-        alertas_antiguas = AlertaStock.objects.filter(
-            estado='resuelta',
-            fecha_resolucion__lt=fecha_limite
+        logger.info(
+            f"✅ Verificación de alertas completada: "
+            f"{stats['alertas_creadas']} creadas, "
+            f"{stats['alertas_actualizadas']} actualizadas, "
+            f"{stats['alertas_resueltas']} resueltas"
         )
-        alertas_archivadas = alertas_antiguas.update(estado='archivada')
-        
-        if alertas_archivadas > 0:
-            logger.info(f"Se archivaron {alertas_archivadas} alertas antiguas resueltas")
-        
-        # ========== RESUMEN FINAL ==========
-        logger.info(f"""
-        ✅ Verificación de alertas completada exitosamente:
-        - Productos revisados: {stats['productos_revisados']}
-        - Quintales revisados: {stats['quintales_revisados']}
-        - Alertas creadas: {stats['alertas_creadas']}
-        - Alertas actualizadas: {stats['alertas_actualizadas']}
-        - Notificaciones enviadas: {stats['notificaciones_enviadas']}
-        - Alertas archivadas: {alertas_archivadas}
-        - Errores: {stats['errores']}
-        """)
         
         return stats
         
@@ -260,8 +55,44 @@ def check_stock_alerts(self):
         raise self.retry(exc=e)
 
 
+@shared_task(
+    name='apps.stock_alert_system.tasks.revisar_vencimientos',
+    base=TareaDeduplicada,
+    bind=True,
+    max_retries=3,
+    default_retry_delay=300
+)
+def revisar_vencimientos(self):
+    """
+    Revisión diaria del calendario de vencimientos.
+    
+    Genera en bloque las alertas y notificaciones de los lotes que cruzaron
+    un umbral de días desde la revisión anterior (ver vencimientos.py).
+    
+    Returns:
+        dict: Resumen de la revisión
+    """
+    try:
+        from apps.stock_alert_system.vencimientos import CalendarioVencimientos
+        
+        resumen = CalendarioVencimientos.revisar()
+        
+        logger.info(
+            f"✅ Revisión de vencimientos: {resumen['lotes']} lotes, "
+            f"{resumen['alertas_creadas']} alertas creadas, "
+            f"{resumen['notificaciones']} notificaciones"
+        )
+        
+        return resumen
+        
+    except Exception as e:
+        logger.error(f"Error en revisar_vencimientos: {str(e)}")
+        raise self.retry(exc=e)
+
+
 @shared_task(
     name='apps.stock_alert_system.tasks.send_daily_stock_summary',
+    base=TareaDeduplicada,
     bind=True
 )
 def send_daily_stock_summary(self):
@@ -330,6 +161,7 @@ def send_daily_stock_summary(self):
 
 @shared_task(
     name='apps.stock_alert_system.tasks.cleanup_old_alerts',
+    base=TareaDeduplicada,
     bind=True
 )
 def cleanup_old_alerts(self):
@@ -342,7 +174,6 @@ def cleanup_old_alerts(self):
     """
     try:
         from apps.stock_alert_system.models import AlertaStock
-        from django.utils import timezone
         
         logger.info("Iniciando limpieza de alertas antiguas...")
         
@@ -378,6 +209,7 @@ def cleanup_old_alerts(self):
 
 @shared_task(
     name='apps.stock_alert_system.tasks.recalculate_all_stock_status',
+    base=TareaDeduplicada,
     bind=True
 )
 def recalculate_all_stock_status(self):
@@ -1,3 +1,234 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.inventory_management.models import Categoria, Producto, Proveedor, Quintal, UnidadMedida
+from apps.inventory_management.tests import ConsultasChangelistMixin
+
+from .models import AlertaStock, EstadoStock, HistorialAlerta, HistorialEstado
+from .status_calculator import AlertaManager, StatusCalculator
+
+
+class ChangelistAlertasTests(ConsultasChangelistMixin, TestCase):
+
+    changelists = [EstadoStock, AlertaStock, HistorialAlerta, HistorialEstado]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.administrador = cls.crear_administrador()
+        cls.categoria = Categoria.objects.create(nombre='Abarrotes')
+        cls.lote = 0
+
+    def crear_filas(self, n):
+        for _ in range(n):
+            ChangelistAlertasTests.lote += 1
+            i = self.lote
+            producto = Producto.objects.create(
+                codigo_barras=f'P-{i}', nombre=f'Producto {i}', categoria=self.categoria,
+                precio_venta=Decimal('2.00'), usuario_registro=self.administrador
+            )
+            estado, _ = EstadoStock.objects.get_or_create(
+                producto=producto, defaults={'tipo_inventario': 'NORMAL'}
+            )
+            HistorialEstado.objects.create(
+                producto=producto, estado_stock=estado, estado_anterior='NORMAL',
+                estado_nuevo='BAJO', tipo_inventario='NORMAL',
+                stock_anterior=Decimal('10'), stock_nuevo=Decimal('3')
+            )
+            alerta = AlertaStock.objects.create(
+                tipo_alerta='STOCK_BAJO', producto=producto, titulo=f'Stock bajo {i}',
+                mensaje='Reponer', usuario_asignado=self.administrador
+            )
+            HistorialAlerta.objects.create(
+                alerta=alerta, accion='CREADA', descripcion='Alerta generada',
+                usuario=self.administrador
+            )
+
+
+class AlertasUpsertTests(TestCase):
+    """
+    Las alertas se escriben con upserts en bloque sobre los índices únicos
+    parciales y se resuelven con un solo UPDATE
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.administrador = ConsultasChangelistMixin.crear_administrador()
+        cls.categoria = Categoria.objects.create(nombre='Granos')
+        cls.unidad = UnidadMedida.objects.create(
+            nombre='Libra', abreviatura='lb', factor_conversion_kg=Decimal('0.4536')
+        )
+        cls.proveedor = Proveedor.objects.create(nombre_comercial='Molino', ruc_nit='1790000000003')
+        cls.arroz = Producto.objects.create(
+            codigo_barras='ARROZ', nombre='Arroz', categoria=cls.categoria,
+            tipo_inventario='QUINTAL', unidad_medida_base=cls.unidad,
+            precio_por_unidad_peso=Decimal('0.60'), usuario_registro=cls.administrador
+        )
+
+    def _quintales(self, n, peso=Decimal('5')):
+        return Quintal.objects.bulk_create([
+            Quintal(
+                codigo_quintal=f'ARZ-{n}-{i}', producto=self.arroz, proveedor=self.proveedor,
+                unidad_medida=self.unidad, peso_inicial=Decimal('100'), peso_actual=peso,
+                costo_total=Decimal('40'), costo_por_unidad=Decimal('0.4'),
+                usuario_registro=self.administrador
+            )
+            for i in range(n)
+        ])
+
+    def test_barrido_repetido_no_duplica(self):
+        self._quintales(3)
+
+        creadas, actualizadas = StatusCalculator.verificar_quintales_individuales()
+        self.assertEqual((len(creadas), actualizadas), (3, 0))
+
+        Quintal.objects.update(peso_actual=Decimal('4'))
+        creadas, actualizadas = StatusCalculator.verificar_quintales_individuales()
+        self.assertEqual((len(creadas), actualizadas), (0, 3))
+
+        alertas = AlertaStock.objects.filter(tipo_alerta='QUINTAL_CRITICO', resuelta=False)
+        self.assertEqual(alertas.count(), 3)
+        self.assertTrue(all('4.0%' in a.mensaje for a in alertas))
+
+    def test_consultas_no_dependen_de_los_quintales(self):
+        self._quintales(2)
+        StatusCalculator.verificar_quintales_individuales()
+        with CaptureQueriesContext(connection) as pocos:
+            AlertaManager.resolver_alertas_automaticamente()
+            StatusCalculator.verificar_quintales_individuales()
+
+        self._quintales(20)
+        StatusCalculator.verificar_quintales_individuales()
+        with CaptureQueriesContext(connection) as muchos:
+            AlertaManager.resolver_alertas_automaticamente()
+            StatusCalculator.verificar_quintales_individuales()
+
+        self.assertEqual(len(pocos), len(muchos))
+
+    def test_resolucion_automatica(self):
+        quintal, = self._quintales(1)
+        StatusCalculator.verificar_quintales_individuales()
+        EstadoStock.objects.filter(producto=self.arroz).update(estado_semaforo='NORMAL')
+        bajo = AlertaStock.objects.create(
+            producto=self.arroz, tipo_alerta='STOCK_BAJO', titulo='Stock bajo', mensaje='Reponer'
+        )
+        agotado = AlertaStock.objects.create(
+            producto=self.arroz, tipo_alerta='STOCK_AGOTADO', titulo='Agotado', mensaje='Reponer'
+        )
+
+        # Sin cambios en el quintal solo se resuelven las de producto
+        self.assertEqual(AlertaManager.resolver_alertas_automaticamente(), 2)
+        bajo.refresh_from_db()
+        self.assertEqual((bajo.estado, bajo.notas), ('RESUELTA', 'Stock normalizado'))
+
+        Quintal.objects.filter(pk=quintal.pk).update(peso_actual=Decimal('50'))
+        self.assertEqual(AlertaManager.resolver_alertas_automaticamente(), 1)
+        self.assertFalse(AlertaStock.objects.filter(resuelta=False).exists())
+        # Ya resuelta, puede volver a crearse
+        self.assertEqual(AlertaStock.objects.filter(pk=agotado.pk, resuelta=True).count(), 1)
+
+    def test_limpieza_solo_borra_resueltas_antiguas(self):
+        hace = timezone.now() - timedelta(days=45)
+        for tipo, estado, resuelta, fecha in (
+            ('STOCK_BAJO', 'RESUELTA', True, hace),
+            ('STOCK_AGOTADO', 'RESUELTA', True, timezone.now()),
+            ('STOCK_CRITICO', 'PENDIENTE', False, None),
+        ):
+            AlertaStock.objects.create(
+                producto=self.arroz, tipo_alerta=tipo, titulo=tipo, mensaje='Reponer',
+                estado=estado, resuelta=resuelta, fecha_resolucion=fecha
+            )
+
+        self.assertEqual(AlertaManager.limpiar_alertas_antiguas(dias=30), 1)
+        self.assertEqual(
+            set(AlertaStock.objects.values_list('tipo_alerta', flat=True)),
+            {'STOCK_AGOTADO', 'STOCK_CRITICO'}
+        )
+
+
+class CalendarioVencimientosTests(TestCase):
+    """
+    El calendario se mantiene al registrar lotes y la revisión diaria avisa
+    una sola vez por umbral cruzado
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        from apps.authentication.models import Rol
+        from apps.notifications.models import TipoNotificacion
+
+        cls.administrador = ConsultasChangelistMixin.crear_administrador()
+        cls.administrador.rol = Rol.objects.get(codigo='ADMIN')
+        cls.administrador.estado = 'ACTIVO'
+        cls.administrador.save()
+        TipoNotificacion.objects.create(
+            codigo='VENCIMIENTO_PROXIMO', nombre='Vencimiento Próximo', categoria='STOCK',
+            plantilla_titulo='Vence', plantilla_mensaje='Vence'
+        )
+        cls.unidad = UnidadMedida.objects.create(
+            nombre='Libra', abreviatura='lb', factor_conversion_kg=Decimal('0.4536')
+        )
+        cls.proveedor = Proveedor.objects.create(nombre_comercial='Molino', ruc_nit='1790000000003')
+        cls.azucar = Producto.objects.create(
+            codigo_barras='AZUCAR', nombre='Azúcar', categoria=Categoria.objects.create(nombre='Granos'),
+            tipo_inventario='QUINTAL', unidad_medida_base=cls.unidad,
+            precio_por_unidad_peso=Decimal('0.50'), usuario_registro=cls.administrador
+        )
+
+    def _quintal(self, fecha_vencimiento):
+        return Quintal.objects.create(
+            codigo_quintal='AZU-1', producto=self.azucar, proveedor=self.proveedor,
+            unidad_medida=self.unidad, peso_inicial=Decimal('100'), peso_actual=Decimal('100'),
+            costo_total=Decimal('40'), costo_por_unidad=Decimal('0.4'),
+            usuario_registro=self.administrador, fecha_vencimiento=fecha_vencimiento
+        )
+
+    def test_indice_se_mantiene_solo_al_cambiar_la_fecha(self):
+        from datetime import date
+
+        from .models import VencimientoLote
+
+        quintal = self._quintal(date(2030, 1, 31))
+        self.assertEqual(quintal.vencimiento.fecha_vencimiento, date(2030, 1, 31))
+
+        quintal = Quintal.objects.get(pk=quintal.pk)
+        quintal.peso_actual = Decimal('90')
+        with CaptureQueriesContext(connection) as consultas:
+            quintal.save()
+        self.assertFalse(any(VencimientoLote._meta.db_table in q['sql'] for q in consultas))
+
+        quintal.fecha_vencimiento = '2030-02-15'
+        quintal.save()
+        self.assertEqual(
+            VencimientoLote.objects.get(quintal=quintal).fecha_vencimiento, date(2030, 2, 15)
+        )
+
+    def test_revision_avisa_una_vez_por_umbral(self):
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        from apps.notifications.models import Notificacion
+        from .vencimientos import CalendarioVencimientos
+
+        hoy = timezone.localdate()
+        quintal = self._quintal(hoy + timedelta(days=5))
+
+        resumen = CalendarioVencimientos.revisar(hoy)
+        self.assertEqual((resumen['lotes'], resumen['alertas_creadas'], resumen['notificaciones']), (1, 1, 1))
+        self.assertEqual(CalendarioVencimientos.revisar(hoy)['lotes'], 0)
+
+        # Cruza el umbral de 3 días: se actualiza la misma alerta
+        resumen = CalendarioVencimientos.revisar(hoy + timedelta(days=3))
+        self.assertEqual((resumen['lotes'], resumen['alertas_actualizadas']), (1, 1))
+        alerta = AlertaStock.objects.get(quintal=quintal, tipo_alerta='VENCIMIENTO_PROXIMO')
+        self.assertEqual((alerta.prioridad, alerta.datos_adicionales['dias_restantes']), ('ALTA', 2))
 
-# Create your tests here.
+        resumen = CalendarioVencimientos.revisar(hoy + timedelta(days=6))
+        self.assertEqual(resumen['alertas_creadas'], 1)
+        self.assertTrue(AlertaStock.objects.filter(quintal=quintal, tipo_alerta='PRODUCTO_VENCIDO').exists())
+        self.assertEqual(Notificacion.objects.filter(usuario=self.administrador).count(), 3)
@@ -0,0 +1,200 @@
+# apps/stock_alert_system/vencimientos.py
+
+"""
+Calendario de vencimientos
+
+VencimientoLote indexa por fecha cada lote con vencimiento (quintales y
+productos normales). Se actualiza al registrar un lote o al cambiar su
+fecha (signals.py); en el resto de guardados, incluidas las ventas, no se
+hace ningún trabajo de vencimientos.
+
+Una sola revisión diaria (tarea revisar_vencimientos):
+
+1. Busca en el índice los lotes que cruzaron un umbral de días aún no
+   avisado (dias_alerta_vencimiento, VENCIMIENTO_UMBRALES_DIAS o vencido)
+2. Crea o actualiza sus alertas con AlertaManager.upsert
+3. Notifica todos los cruces con un solo INSERT
+4. Marca el umbral avisado, una sentencia por umbral
+"""
+
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from apps.system_configuration.instrumentacion import instrumentado
+from apps.inventory_management.utils.unit_registry import RegistroUnidades
+
+logger = logging.getLogger('commercebox')
+
+
+class CalendarioVencimientos:
+    """
+    Índice de vencimientos por lote y revisión diaria
+    """
+
+    @staticmethod
+    def registrar(lote):
+        """
+        Indexa un Quintal o ProductoNormal por su fecha de vencimiento
+
+        Sin fecha el lote sale del calendario; con una fecha nueva los avisos
+        empiezan de cero.
+        """
+        from .models import VencimientoLote
+
+        referencia = 'quintal' if lote._meta.model_name == 'quintal' else 'producto_normal'
+        fecha = lote.fecha_vencimiento
+        if isinstance(fecha, str):
+            fecha = parse_date(fecha)
+
+        if fecha is None:
+            VencimientoLote.objects.filter(**{referencia: lote}).delete()
+        else:
+            VencimientoLote.objects.update_or_create(
+                **{referencia: lote},
+                defaults={'fecha_vencimiento': fecha, 'umbral_notificado': None}
+            )
+        lote._fecha_vencimiento_cargada = fecha
+
+    @staticmethod
+    def umbrales(config):
+        """Umbrales de aviso en días, de mayor a menor"""
+        dias = config.dias_alerta_vencimiento
+        adicionales = getattr(settings, 'VENCIMIENTO_UMBRALES_DIAS', (7, 3, 1))
+        return sorted({dias, *(u for u in adicionales if 0 <= u < dias)}, reverse=True)
+
+    @staticmethod
+    def umbral(dias_restantes, umbrales):
+        """Umbral más estrecho que ya alcanzó un lote"""
+        from .models import VencimientoLote
+
+        if dias_restantes < 0:
+            return VencimientoLote.VENCIDO
+        return min(u for u in umbrales if dias_restantes <= u)
+
+    @classmethod
+    @instrumentado()
+    def revisar(cls, hoy=None):
+        """
+        Revisión diaria: alertas y notificaciones de los lotes que cruzaron
+        un umbral desde la última revisión
+
+        Returns:
+            dict: Resumen de la revisión
+        """
+        from apps.notifications.services.notification_service import NotificationService
+        from .models import ConfiguracionAlerta, VencimientoLote
+        from .status_calculator import AlertaManager
+
+        resumen = {'lotes': 0, 'alertas_creadas': 0, 'alertas_actualizadas': 0, 'notificaciones': 0}
+        config = ConfiguracionAlerta.get_configuracion()
+        if not config.alertas_activas:
+            return resumen
+
+        hoy = hoy or timezone.localdate()
+        umbrales = cls.umbrales(config)
+
+        # Un quintal agotado no vuelve a venderse
+        VencimientoLote.objects.filter(quintal__estado='AGOTADO').delete()
+
+        def sin_avisar(umbral):
+            return Q(umbral_notificado__isnull=True) | Q(umbral_notificado__gt=umbral)
+
+        cruces = Q(fecha_vencimiento__lt=hoy) & sin_avisar(VencimientoLote.VENCIDO)
+        for u in umbrales:
+            cruces |= Q(fecha_vencimiento__lte=hoy + timedelta(days=u)) & sin_avisar(u)
+
+        lotes = list(
+            VencimientoLote.objects.filter(cruces).filter(
+                Q(quintal__estado='DISPONIBLE', quintal__peso_actual__gt=0)
+                | Q(producto_normal__stock_actual__gt=0)
+            ).select_related(
+                'quintal__producto', 'producto_normal__producto'
+            )
+        )
+
+        alertas = defaultdict(list)
+        avisos = []
+        por_umbral = defaultdict(list)
+        for lote in lotes:
+            dias = (lote.fecha_vencimiento - hoy).days
+            umbral = cls.umbral(dias, umbrales)
+            if lote.umbral_notificado is not None and umbral >= lote.umbral_notificado:
+                continue
+            por_umbral[umbral].append(lote.pk)
+
+            alerta, aviso = cls._alerta(lote, dias)
+            alertas['quintal' if lote.quintal_id else 'producto'].append(alerta)
+            avisos.append(aviso)
+
+        with transaction.atomic():
+            for referencia, grupo in alertas.items():
+                creadas, actualizadas = AlertaManager.upsert(grupo, referencia=referencia, notificar=False)
+                resumen['alertas_creadas'] += len(creadas)
+                resumen['alertas_actualizadas'] += actualizadas
+            for umbral, ids in por_umbral.items():
+                VencimientoLote.objects.filter(pk__in=ids).update(umbral_notificado=umbral)
+
+        try:
+            resumen['notificaciones'] = NotificationService.crear_notificaciones_en_bloque(
+                'VENCIMIENTO_PROXIMO', avisos
+            )
+        except Exception as e:
+            logger.error(f"Error al notificar vencimientos: {str(e)}")
+
+        resumen['lotes'] = len(avisos)
+        return resumen
+
+    @staticmethod
+    def _alerta(lote, dias):
+        """Alerta sin guardar y aviso de notificación para un lote"""
+        from .models import Alerta
+
+        if lote.quintal_id:
+            quintal = lote.quintal
+            producto = quintal.producto
+            descripcion = f"El quintal {quintal.codigo_quintal} de {producto.nombre}"
+            codigo = quintal.codigo_quintal
+            disponible = f"Peso disponible: {quintal.peso_actual} {RegistroUnidades.abreviatura(quintal.unidad_medida_id)}"
+            referencia = {'quintal': quintal}
+            objeto = quintal
+        else:
+            producto = lote.producto_normal.producto
+            descripcion = f"El producto {producto.nombre}"
+            if lote.producto_normal.lote:
+                descripcion += f" (lote {lote.producto_normal.lote})"
+            codigo = producto.codigo_barras
+            disponible = f"Stock disponible: {lote.producto_normal.stock_actual} unidades"
+            referencia = {'producto': producto}
+            objeto = lote.producto_normal
+
+        fecha = lote.fecha_vencimiento.strftime('%d/%m/%Y')
+        if dias < 0:
+            tipo, prioridad = 'PRODUCTO_VENCIDO', 'CRITICA'
+            titulo = f"⛔ Vencido: {codigo}"
+            mensaje = f"{descripcion} venció el {fecha}. {disponible}"
+        else:
+            tipo, prioridad = 'VENCIMIENTO_PROXIMO', 'ALTA' if dias <= 3 else 'MEDIA'
+            titulo = f"⏰ Próximo a Vencer: {codigo}"
+            mensaje = f"{descripcion} vence en {dias} día(s) ({fecha}). {disponible}"
+
+        datos = {
+            'codigo': codigo,
+            'fecha_vencimiento': lote.fecha_vencimiento.isoformat(),
+            'dias_restantes': dias,
+        }
+        alerta = Alerta(
+            tipo_alerta=tipo, prioridad=prioridad, titulo=titulo, mensaje=mensaje,
+            datos_adicionales=datos, **referencia
+        )
+        aviso = {
+            'titulo': titulo, 'mensaje': mensaje, 'prioridad': prioridad,
+            'objeto_relacionado': objeto, 'datos_adicionales': datos,
+        }
+        return alerta, aviso
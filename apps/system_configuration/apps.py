@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class SystemConfigurationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.system_configuration'
+
+    def ready(self):
+        from .metrics import registrar_collector_salud
+        registrar_collector_salud()
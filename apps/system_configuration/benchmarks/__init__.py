@@ -0,0 +1,31 @@
+# apps/system_configuration/benchmarks/__init__.py
+
+"""
+Benchmarks reproducibles de las rutas críticas
+
+- tienda.py: tienda sintética con semilla (N productos, M quintales,
+  K ventas/día durante Y años) creada por los servicios reales
+- casos.py: microbenchmarks (consultas y latencia) de escaneo, cobro,
+  semáforo de stock, dashboard y reportes, comparados con lineas_base.json
+- masivo.py: generador masivo con semilla (catálogo, quintales FIFO,
+  ventas con pagos mixtos, devoluciones, cajas, alertas) insertado con
+  bulk_create y seguido de la reconstrucción de las tablas derivadas
+- locustfile.py: escenario de carga con varias terminales POS y el agente
+  de impresión consultando trabajos (requiere `pip install locust`)
+
+Comandos: generar_tienda_sintetica, generar_datos_masivos y
+ejecutar_benchmarks.
+"""
+
+from .casos import CASOS, comparar, ejecutar_casos, leer_linea_base
+from .masivo import GeneradorMasivo
+from .tienda import TiendaSintetica
+
+__all__ = [
+    'CASOS',
+    'GeneradorMasivo',
+    'TiendaSintetica',
+    'comparar',
+    'ejecutar_casos',
+    'leer_linea_base',
+]
@@ -0,0 +1,349 @@
+# apps/system_configuration/benchmarks/casos.py
+
+"""
+Microbenchmarks de las rutas críticas
+
+Cada caso prepara sus datos sobre una tienda sintética (TiendaSintetica)
+y devuelve la llamada que se mide. Cada repetición corre dentro de una
+transacción que se revierte, de modo que todas parten del mismo estado y
+la base de datos no cambia:
+
+    resultados = ejecutar_casos(TiendaSintetica.muestras(), repeticiones=10)
+    regresiones = comparar(resultados, leer_linea_base())
+
+Por caso se registran las consultas SQL (deterministas para una misma
+tienda) y la latencia p50 / p95 / mínima en ms. lineas_base.json guarda
+los valores de referencia junto al perfil de la tienda con que se
+midieron: un caso que hace más consultas que su línea base es una
+regresión; la latencia depende de la máquina y solo se compara con una
+tolerancia.
+"""
+
+import json
+import logging
+import math
+from datetime import timedelta
+from decimal import Decimal
+from importlib import import_module
+from pathlib import Path
+
+from django.db import transaction
+from django.utils import timezone
+
+from ..instrumentacion import medir
+
+logger = logging.getLogger('commercebox')
+
+RUTA_LINEA_BASE = Path(__file__).with_name('lineas_base.json')
+
+
+def percentil(valores, p):
+    """Percentil por rango más cercano de una lista de números"""
+    if not valores:
+        return 0
+    ordenados = sorted(valores)
+    return ordenados[max(0, math.ceil(p / 100 * len(ordenados)) - 1)]
+
+
+def crear_sesion(usuario):
+    """
+    Sesión autenticada sin pasar por el login (no genera logs de acceso)
+
+    Returns:
+        SessionStore: Sesión guardada; su session_key va en la cookie
+    """
+    from django.conf import settings
+    from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+
+    sesion = import_module(settings.SESSION_ENGINE).SessionStore()
+    sesion[SESSION_KEY] = str(usuario.pk)
+    sesion[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    sesion[HASH_SESSION_KEY] = usuario.get_session_auth_hash()
+    sesion.create()
+    return sesion
+
+
+class Caso:
+    """
+    Microbenchmark registrado
+
+    Args:
+        nombre: Identificador (clave en lineas_base.json)
+        preparar: Callable(muestras) que crea lo necesario y devuelve la
+            llamada sin argumentos que se mide; la preparación no se mide
+    """
+
+    def __init__(self, nombre, preparar):
+        self.nombre = nombre
+        self.preparar = preparar
+
+
+CASOS = {}
+
+
+def caso(nombre):
+    """Decorador que registra un caso en CASOS"""
+    def registrar(preparar):
+        CASOS[nombre] = Caso(nombre, preparar)
+        return preparar
+    return registrar
+
+
+class _Revertir(Exception):
+    """Sale de la transacción de una repetición para revertirla"""
+
+
+# ============================================================================
+# EJECUCIÓN
+# ============================================================================
+
+def medir_caso(caso, muestras, repeticiones=5, calentamiento=1):
+    """
+    Mide un caso `repeticiones` veces tras `calentamiento` ejecuciones
+    descartadas (cachés de proceso, configuración creada al vuelo)
+
+    Returns:
+        dict: {'consultas', 'p50_ms', 'p95_ms', 'min_ms', 'repeticiones'}
+    """
+    tiempos, consultas = [], []
+    for i in range(calentamiento + repeticiones):
+        medicion = None
+        try:
+            with transaction.atomic():
+                ejecutar = caso.preparar(muestras)
+                with medir(f'benchmark:{caso.nombre}', presupuesto={}) as medicion:
+                    ejecutar()
+                raise _Revertir
+        except _Revertir:
+            pass
+        if i >= calentamiento:
+            tiempos.append(medicion.duracion * 1000)
+            consultas.append(medicion.consultas)
+
+    return {
+        'consultas': max(consultas),
+        'p50_ms': round(percentil(tiempos, 50), 2),
+        'p95_ms': round(percentil(tiempos, 95), 2),
+        'min_ms': round(min(tiempos), 2),
+        'repeticiones': repeticiones,
+    }
+
+
+def ejecutar_casos(muestras, nombres=None, repeticiones=5, calentamiento=1):
+    """
+    Mide los casos indicados (por defecto todos)
+
+    Un caso que falla no detiene el resto: su resultado es {'error': ...}
+
+    Returns:
+        dict: {nombre: resultado}
+    """
+    resultados = {}
+    for nombre in nombres or CASOS:
+        try:
+            resultados[nombre] = medir_caso(CASOS[nombre], muestras, repeticiones, calentamiento)
+        except Exception as e:
+            logger.error(f"Benchmark {nombre} falló: {str(e)}", exc_info=True)
+            resultados[nombre] = {'error': f'{type(e).__name__}: {e}'}
+    return resultados
+
+
+# ============================================================================
+# LÍNEAS BASE
+# ============================================================================
+
+def leer_linea_base(ruta=None):
+    """
+    Returns:
+        dict: {'perfil': {...}, 'casos': {nombre: resultado}}
+    """
+    ruta = Path(ruta or RUTA_LINEA_BASE)
+    if not ruta.exists():
+        return {'perfil': {}, 'casos': {}}
+    return json.loads(ruta.read_text(encoding='utf-8'))
+
+
+def guardar_linea_base(resultados, perfil, ruta=None):
+    """Escribe la línea base ordenada (diff legible en la revisión)"""
+    contenido = {
+        'perfil': perfil,
+        'casos': {
+            nombre: {clave: valor for clave, valor in resultado.items() if clave != 'repeticiones'}
+            for nombre, resultado in sorted(resultados.items())
+            if 'error' not in resultado
+        },
+    }
+    Path(ruta or RUTA_LINEA_BASE).write_text(
+        json.dumps(contenido, indent=2, ensure_ascii=False, sort_keys=True) + '\n',
+        encoding='utf-8'
+    )
+
+
+def comparar(resultados, linea_base, tolerancia=0.5):
+    """
+    Regresiones de `resultados` frente a la línea base
+
+    Args:
+        resultados: Salida de ejecutar_casos
+        linea_base: Salida de leer_linea_base
+        tolerancia: Aumento relativo de p50 admitido (0.5 = +50 %)
+
+    Returns:
+        list[tuple]: (caso, tipo, valor, referencia) con tipo 'error',
+        'consultas' o 'latencia'
+    """
+    referencias = linea_base.get('casos', {})
+    regresiones = []
+    for nombre, resultado in resultados.items():
+        if 'error' in resultado:
+            regresiones.append((nombre, 'error', resultado['error'], None))
+            continue
+        base = referencias.get(nombre)
+        if not base:
+            continue
+        if resultado['consultas'] > base['consultas']:
+            regresiones.append((nombre, 'consultas', resultado['consultas'], base['consultas']))
+        if resultado['p50_ms'] > base['p50_ms'] * (1 + tolerancia):
+            regresiones.append((nombre, 'latencia', resultado['p50_ms'], base['p50_ms']))
+    return regresiones
+
+
+# ============================================================================
+# CASOS: ESCANEO
+# ============================================================================
+
+@caso('BarcodeService.buscar_por_codigo:normal')
+def _escanear_normal(muestras):
+    from apps.inventory_management.services import BarcodeService
+    return lambda: BarcodeService.buscar_por_codigo(muestras.normal.codigo_barras)
+
+
+@caso('BarcodeService.buscar_por_codigo:granel')
+def _escanear_granel(muestras):
+    from apps.inventory_management.services import BarcodeService
+    return lambda: BarcodeService.buscar_por_codigo(muestras.granel.codigo_barras)
+
+
+@caso('BarcodeService.buscar_por_codigo:quintal')
+def _escanear_quintal(muestras):
+    from apps.inventory_management.services import BarcodeService
+    return lambda: BarcodeService.buscar_por_codigo(muestras.quintal.codigo_quintal)
+
+
+# ============================================================================
+# CASOS: COBRO
+# ============================================================================
+
+@caso('custom_admin:api_procesar_venta')
+def _api_procesar_venta(muestras):
+    """Petición completa (middleware incluido) con tres productos normales"""
+    from django.conf import settings
+    from django.test import Client
+    from django.urls import reverse
+
+    cliente = Client(HTTP_HOST='localhost')
+    cliente.cookies[settings.SESSION_COOKIE_NAME] = crear_sesion(muestras.usuario).session_key
+
+    items = [
+        {
+            'producto_id': str(p.id),
+            'cantidad': 1,
+            'precio': str(p.precio_venta),
+            'subtotal': str(p.precio_venta),
+        }
+        for p in muestras.normales
+    ]
+    total = sum(p.precio_venta for p in muestras.normales)
+    cuerpo = json.dumps({
+        'items': items,
+        'tipo_venta': 'CONTADO',
+        'metodo_pago': 'EFECTIVO',
+        'monto_recibido': str(total * 2),
+    })
+    url = reverse('custom_admin:api_procesar_venta')
+
+    def ejecutar():
+        respuesta = cliente.post(url, cuerpo, content_type='application/json', secure=True)
+        if respuesta.status_code != 200 or not respuesta.json().get('success'):
+            raise RuntimeError(f'api_procesar_venta respondió {respuesta.status_code}')
+    return ejecutar
+
+
+@caso('POSService.finalizar_venta')
+def _finalizar_venta(muestras):
+    """Venta pagada de tres productos normales y una línea a granel (sin encolar ticket)"""
+    from apps.sales_management.pos.pos_service import POSService
+    from .tienda import pagar
+
+    venta = POSService.crear_venta(vendedor=muestras.usuario)
+    POSService.agregar_items_normales(venta, [
+        {'producto': p, 'cantidad': 1, 'precio': p.precio_venta} for p in muestras.normales
+    ])
+    if muestras.granel:
+        POSService.agregar_item_granel(venta, muestras.granel, peso_vendido=Decimal('2'))
+    pagar(venta, muestras.usuario)
+    return lambda: POSService.finalizar_venta(venta, imprimir=False)
+
+
+# ============================================================================
+# CASOS: SEMÁFORO DE STOCK
+# ============================================================================
+
+@caso('StatusCalculator.calcular_estado:normal')
+def _estado_normal(muestras):
+    from apps.stock_alert_system.status_calculator import StatusCalculator
+    return lambda: StatusCalculator.calcular_estado(muestras.normal)
+
+
+@caso('StatusCalculator.calcular_estado:granel')
+def _estado_granel(muestras):
+    from apps.stock_alert_system.status_calculator import StatusCalculator
+    return lambda: StatusCalculator.calcular_estado(muestras.granel)
+
+
+# ============================================================================
+# CASOS: DASHBOARD Y REPORTES
+# ============================================================================
+
+@caso('DashboardDataGenerator.generar_dashboard_completo')
+def _dashboard(muestras):
+    from apps.reports_analytics.generators.dashboard_data import DashboardDataGenerator
+    return lambda: DashboardDataGenerator().generar_dashboard_completo()
+
+
+# Reportes de un objeto concreto: filtros tomados de las muestras
+FILTROS_MUESTRA = {
+    'trazabilidad_proveedor': lambda muestras: {'proveedor_id': str(muestras.quintal.proveedor_id)},
+    'flujo_fifo': lambda muestras: {'producto_id': str(muestras.granel.id)},
+}
+
+# 'dashboard' ya se mide como DashboardDataGenerator.generar_dashboard_completo;
+# las trazabilidades de quintal y lote leen Quintal.lote_proveedor, que el
+# modelo no tiene
+REPORTES_SIN_CASO = {'dashboard', 'trazabilidad_quintal', 'trazabilidad_lote'}
+
+
+def _registrar_reportes():
+    """Un caso por reporte registrado, sobre los últimos 30 días y sin caché"""
+    from apps.reports_analytics.services.report_execution_service import (
+        REPORTES, ReportExecutionService
+    )
+
+    def preparar(nombre):
+        def preparar_reporte(muestras):
+            parametros = {'filtros': {}}
+            if REPORTES[nombre].usa_fechas:
+                hoy = timezone.localdate()
+                parametros['fecha_desde'] = (hoy - timedelta(days=29)).isoformat()
+                parametros['fecha_hasta'] = hoy.isoformat()
+            if nombre in FILTROS_MUESTRA:
+                parametros['filtros'] = FILTROS_MUESTRA[nombre](muestras)
+            return lambda: ReportExecutionService.ejecutar(nombre, parametros)
+        return preparar_reporte
+
+    for nombre in REPORTES:
+        if nombre not in REPORTES_SIN_CASO:
+            caso(f'reporte:{nombre}')(preparar(nombre))
+
+
+_registrar_reportes()
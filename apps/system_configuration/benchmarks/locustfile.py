@@ -0,0 +1,127 @@
+# apps/system_configuration/benchmarks/locustfile.py
+
+"""
+Escenario de carga: varias terminales POS y el agente de impresión
+Uso (locust no es dependencia del proyecto: pip install locust):
+
+    python manage.py generar_tienda_sintetica --prefijo SN --password clave123
+    COMMERCEBOX_CARGA_USUARIO=sintetico_sn COMMERCEBOX_CARGA_PASSWORD=clave123 \\
+        locust -f apps/system_configuration/benchmarks/locustfile.py \\
+        --host http://localhost:8000 --users 12 --spawn-rate 4 --run-time 5m --headless
+
+Usuarios simulados (proporción por `weight`):
+
+- TerminalPOS: escanea códigos, busca productos, cobra ventas de 1 a 4
+  líneas y consulta /panel/api/estado/ con If-None-Match como el panel
+- AgenteImpresion: consulta trabajos pendientes cada 3 s como el agente
+  local de impresión
+
+La latencia y las consultas por endpoint de la carga se leen en /metrics
+(histogramas de MetricasConsultasMiddleware) o en el log
+commercebox.rendimiento.
+"""
+
+import os
+import random
+
+from locust import HttpUser, between, constant, task
+
+USUARIO = os.environ.get('COMMERCEBOX_CARGA_USUARIO', 'sintetico_sn')
+PASSWORD = os.environ.get('COMMERCEBOX_CARGA_PASSWORD', '')
+SEMILLA = int(os.environ.get('COMMERCEBOX_CARGA_SEMILLA', '42'))
+
+
+class SesionCommerceBox(HttpUser):
+    """Login por la API JWT (crea también la sesión de Django) y token CSRF"""
+
+    abstract = True
+
+    def on_start(self):
+        self.rng = random.Random(SEMILLA + id(self))
+        respuesta = self.client.post(
+            '/api/auth/login/', json={'username': USUARIO, 'password': PASSWORD}, name='login'
+        )
+        respuesta.raise_for_status()
+        # La vista del POS fija la cookie CSRF que exigen los POST de sesión
+        self.client.get('/panel/pos/', name='/panel/pos/')
+        self.csrf = self.client.cookies.get('csrftoken', '')
+
+
+class TerminalPOS(SesionCommerceBox):
+    weight = 4
+    wait_time = between(1, 4)
+
+    def on_start(self):
+        super().on_start()
+        respuesta = self.client.get(
+            '/panel/api/productos/buscar/', params={'all': 'true'}, name='/panel/api/productos/buscar/?all'
+        )
+        self.productos = [
+            p for p in respuesta.json().get('productos', [])
+            if p.get('stock_actual') and p.get('tipo_inventario') == 'NORMAL'
+        ]
+        self.etag = None
+
+    @task(10)
+    def escanear(self):
+        if not self.productos:
+            return
+        producto = self.rng.choice(self.productos)
+        self.client.get(
+            '/panel/api/productos/buscar-codigo/',
+            params={'codigo': producto['codigo_barras']},
+            name='/panel/api/productos/buscar-codigo/'
+        )
+
+    @task(3)
+    def buscar(self):
+        self.client.get(
+            '/panel/api/productos/buscar/',
+            params={'q': self.rng.choice(('sintético', 'granel', 'producto 1'))},
+            name='/panel/api/productos/buscar/'
+        )
+
+    @task(2)
+    def cobrar(self):
+        if not self.productos:
+            return
+        items = []
+        for producto in self.rng.sample(self.productos, min(len(self.productos), self.rng.randint(1, 4))):
+            precio = producto['precio_unitario']
+            items.append({
+                'producto_id': producto['id'],
+                'cantidad': 1,
+                'precio': precio,
+                'subtotal': precio,
+            })
+        total = sum(item['precio'] for item in items)
+        self.client.post(
+            '/panel/api/ventas/procesar/',
+            json={
+                'items': items,
+                'tipo_venta': 'CONTADO',
+                'metodo_pago': 'EFECTIVO',
+                'monto_recibido': round(total * 1.2 + 1, 2),
+            },
+            headers={'X-CSRFToken': self.csrf},
+            name='/panel/api/ventas/procesar/'
+        )
+
+    @task(4)
+    def estado_panel(self):
+        headers = {'If-None-Match': self.etag} if self.etag else {}
+        with self.client.get(
+            '/panel/api/estado/', headers=headers, name='/panel/api/estado/', catch_response=True
+        ) as respuesta:
+            if respuesta.status_code in (200, 304):
+                self.etag = respuesta.headers.get('ETag', self.etag)
+                respuesta.success()
+
+
+class AgenteImpresion(SesionCommerceBox):
+    weight = 1
+    wait_time = constant(3)
+
+    @task
+    def trabajos_pendientes(self):
+        self.client.get('/api/hardware/agente/trabajos/', name='/api/hardware/agente/trabajos/')
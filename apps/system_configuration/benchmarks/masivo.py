@@ -0,0 +1,927 @@
+# apps/system_configuration/benchmarks/masivo.py
+
+"""
+Generador masivo de datos sintéticos
+
+A diferencia de TiendaSintetica (que pasa por POSService venta a venta),
+aquí toda la simulación ocurre en memoria y las filas se insertan en
+lotes con COPY (PostgreSQL) o bulk_create (otros motores): ningún
+receiver se dispara y el costo por fila es el de la inserción. Sirve
+para validar reportes, particiones e índices con volúmenes de producción
+(decenas de millones de filas).
+
+Qué genera, día por día:
+
+- Catálogo, proveedores, clientes y una caja con su cajero por terminal
+- Quintales que llegan cuando baja el stock a granel y se consumen en
+  orden FIFO (fecha_ingreso), con sus movimientos ENTRADA / SALIDA
+- Compras de reposición del inventario normal y sus movimientos
+- Ventas de 1 a 4 productos con pagos mixtos (efectivo, tarjetas,
+  transferencia y pagos divididos), devoluciones aprobadas al cierre
+- Sesiones de caja: apertura, ventas, devoluciones, arqueo y cierre
+- Alertas históricas (stock bajo, quintal agotado) ya resueltas y sus
+  notificaciones leídas
+- El libro de costos (AsientoCosto) encadenado como ValoracionService
+
+Al terminar se reconstruyen las tablas derivadas: StockActual, el
+calendario de vencimientos, EstadoStock con las alertas vigentes, las
+estadísticas de clientes y la versión de datos de los reportes. Los
+resultados de períodos cerrados que ya estuvieran en caché no se
+invalidan: conviene generar sobre una base nueva.
+
+Todo lo aleatorio, incluidos los UUID, sale de random.Random(semilla): con
+los mismos parámetros se obtienen las mismas filas. Las fechas son
+relativas al día en que se genera y el historial termina ayer.
+
+Códigos (prefijo de 2 letras, formato de BarcodeService):
+    productos    {prefijo}P00001
+    quintales    Q{prefijo}00001 (desde el 100 000 el número crece)
+    ventas       VNT-{prefijo}-00000001
+    devoluciones DEV-{prefijo}-00000001
+    arqueos      ARQ-{prefijo}-00000001
+"""
+
+import csv
+import io
+import json
+import logging
+import random
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import JSONField
+from django.utils import timezone
+
+logger = logging.getLogger('commercebox')
+
+CENTAVOS = Decimal('0.01')
+PRECISION_COSTO = Decimal('0.0001')
+PESO_QUINTAL = Decimal('100')
+MONTO_APERTURA = Decimal('100.00')
+# NULL en el CSV de COPY, distinto de la cadena vacía
+NULO_COPY = r'\N'
+
+PESOS_GRANEL = tuple(Decimal(p) for p in ('0.5', '1', '2', '2.5', '5', '10'))
+
+# (forma de pago, probabilidad acumulada); DIVIDIDO = efectivo + tarjeta
+FORMAS_PAGO = (
+    ('EFECTIVO', 0.55),
+    ('TARJETA_DEBITO', 0.75),
+    ('TARJETA_CREDITO', 0.87),
+    ('TRANSFERENCIA', 0.95),
+    ('DIVIDIDO', 1.0),
+)
+BANCOS = ('Banco Pichincha', 'Banco del Pacífico', 'Produbanco', 'Banco Guayaquil')
+
+CATEGORIAS = {
+    'Granos': ('Arroz', 'Azúcar', 'Fréjol', 'Lenteja', 'Maíz', 'Avena', 'Arveja'),
+    'Abarrotes': ('Aceite', 'Atún', 'Fideo', 'Sal', 'Harina', 'Café', 'Sardina'),
+    'Bebidas': ('Agua', 'Gaseosa', 'Jugo', 'Té helado', 'Bebida energética'),
+    'Limpieza': ('Detergente', 'Jabón', 'Cloro', 'Suavizante', 'Lavavajillas'),
+    'Lácteos': ('Leche', 'Yogur', 'Queso', 'Mantequilla', 'Crema'),
+}
+NOMBRES = ('María', 'José', 'Luis', 'Ana', 'Carlos', 'Rosa', 'Jorge', 'Carmen', 'Diego', 'Lucía')
+APELLIDOS = ('Pérez', 'García', 'Torres', 'Vera', 'Mora', 'Castro', 'Andrade', 'Zambrano', 'Cedeño')
+MOTIVOS_DEVOLUCION = ('DEFECTUOSO', 'EQUIVOCACION', 'NO_SATISFECHO', 'OTRO')
+
+
+@contextmanager
+def fechas_historicas(*modelos):
+    """
+    Desactiva auto_now_add en los modelos indicados mientras dura el bloque
+
+    bulk_create pisaría la fecha asignada con la actual; dentro del bloque
+    las instancias deben traer su fecha de creación.
+    """
+    campos = [
+        campo for modelo in modelos for campo in modelo._meta.concrete_fields
+        if getattr(campo, 'auto_now_add', False)
+    ]
+    for campo in campos:
+        campo.auto_now_add = False
+    try:
+        yield
+    finally:
+        for campo in campos:
+            campo.auto_now_add = True
+
+
+class GeneradorMasivo:
+    """
+    Generador de datos a escala con semilla
+
+    Args:
+        productos: Productos del catálogo (máximo 99 999)
+        proveedores: Proveedores de quintales y compras
+        clientes: Clientes registrados (el 35 % de las ventas lleva cliente)
+        cajas: Cajas abiertas cada día, una por cajero
+        ventas_dia: Ventas por día entre todas las cajas
+        dias: Días de historial; `anios` tiene prioridad si se indica
+        anios: Años de historial, admite fracciones
+        semilla: Semilla del generador aleatorio
+        prefijo: Dos letras que identifican los datos en los códigos
+        proporcion_granel: Fracción del catálogo vendida a granel
+        tasa_devolucion: Fracción de las ventas con una devolución
+        lote: Filas acumuladas antes de insertarlas (una transacción)
+    """
+
+    def __init__(self, productos=500, proveedores=20, clientes=2000, cajas=3, ventas_dia=200,
+                 dias=90, anios=None, semilla=42, prefijo='MS', proporcion_granel=0.3,
+                 tasa_devolucion=0.01, lote=5000):
+        if len(prefijo) != 2 or not prefijo.isalpha():
+            raise ValueError('El prefijo debe tener exactamente 2 letras')
+        if not 1 <= productos <= 99999:
+            raise ValueError('El catálogo admite de 1 a 99 999 productos')
+        if cajas < 1 or proveedores < 1:
+            raise ValueError('Se necesita al menos una caja y un proveedor')
+        self.productos = productos
+        self.proveedores = proveedores
+        self.clientes = clientes
+        self.cajas = cajas
+        self.ventas_dia = ventas_dia
+        self.dias = max(1, round(anios * 365)) if anios else dias
+        self.semilla = semilla
+        self.prefijo = prefijo.upper()
+        self.proporcion_granel = proporcion_granel
+        self.tasa_devolucion = tasa_devolucion
+        self.lote = lote
+        self.rng = random.Random(semilla)
+
+        self.resumen = {
+            'productos': 0, 'proveedores': 0, 'clientes': 0, 'quintales': 0,
+            'ventas': 0, 'detalles': 0, 'pagos': 0, 'devoluciones': 0,
+            'movimientos_quintal': 0, 'movimientos_inventario': 0, 'asientos': 0,
+            'movimientos_caja': 0, 'arqueos': 0, 'alertas': 0, 'notificaciones': 0,
+            'sin_stock': 0,
+        }
+        self._pendientes = {}
+        self._n_pendientes = 0
+        self._quintales_cambiados = {}
+        self._contadores = {'venta': 0, 'devolucion': 0, 'arqueo': 0, 'quintal': 0}
+
+    def perfil(self):
+        """Parámetros que determinan los datos generados"""
+        return {
+            'productos': self.productos,
+            'proveedores': self.proveedores,
+            'clientes': self.clientes,
+            'cajas': self.cajas,
+            'ventas_dia': self.ventas_dia,
+            'dias': self.dias,
+            'semilla': self.semilla,
+            'proporcion_granel': self.proporcion_granel,
+            'tasa_devolucion': self.tasa_devolucion,
+        }
+
+    def _id(self):
+        """UUID reproducible: las filas se relacionan antes de insertarse"""
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def _momento(self, dia, hora, minutos=0):
+        return timezone.make_aware(datetime.combine(dia, time(hora))) + timedelta(minutes=minutos)
+
+    # ========================================================================
+    # GENERACIÓN
+    # ========================================================================
+
+    def generar(self, progreso=None):
+        """
+        Genera todo el historial y reconstruye las tablas derivadas
+
+        Args:
+            progreso: Callable(dia, total_dias) llamado al terminar cada día
+
+        Returns:
+            dict: Filas creadas por tipo
+
+        Raises:
+            ValueError: Si ya existen datos con el mismo prefijo
+        """
+        from apps.inventory_management.models import Producto
+
+        if Producto.objects.filter(codigo_barras__startswith=f'{self.prefijo}P').exists():
+            raise ValueError(f'Ya existen datos sintéticos con el prefijo {self.prefijo}')
+
+        from apps.system_configuration.models import ConfiguracionSistema
+        self.porcentaje_iva = ConfiguracionSistema.get_config().porcentaje_iva
+
+        hoy = timezone.localdate()
+        self.primer_dia = hoy - timedelta(days=self.dias)
+
+        with transaction.atomic():
+            self._base()
+            self._catalogo()
+            self._clientes()
+            self._cajas()
+
+        for d in range(self.dias):
+            self._dia(self.primer_dia + timedelta(days=d))
+            if progreso:
+                progreso(d + 1, self.dias)
+        self._volcar()
+
+        with transaction.atomic():
+            self._inventario_final()
+        self._reconstruir()
+        return self.resumen
+
+    def _base(self):
+        """Usuario administrador, cajeros, tipos de notificación y unidad"""
+        from django.core.management import call_command
+
+        from apps.authentication.models import Rol, Usuario
+        from apps.inventory_management.models import UnidadMedida
+
+        roles = {
+            'ADMIN': {'nombre': 'Administrador', 'descripcion': 'Acceso total al sistema', 'permissions': ['*']},
+            'CAJERO': {
+                'nombre': 'Cajero',
+                'descripcion': 'Personal de caja',
+                'permissions': ['sales.view', 'financial.view', 'financial.add'],
+            },
+        }
+
+        def usuario(username, nombres, codigo, rol):
+            instancia, creado = Usuario.objects.get_or_create(
+                username=username,
+                defaults={
+                    'email': f'{username}@commercebox.local',
+                    'nombres': nombres,
+                    'apellidos': f'Sintético {self.prefijo}',
+                    'codigo_empleado': codigo,
+                    'documento_identidad': codigo,
+                    'rol': Rol.objects.get_or_create(codigo=rol, defaults={**roles[rol], 'is_active': True})[0],
+                }
+            )
+            if creado:
+                instancia.set_unusable_password()
+                instancia.save(update_fields=['password'])
+            return instancia
+
+        prefijo = self.prefijo.lower()
+        self.usuario = usuario(f'masivo_{prefijo}', 'Administrador', f'MAS-{self.prefijo}', 'ADMIN')
+        self.cajeros = [
+            usuario(f'masivo_{prefijo}_caja{i}', f'Cajero {i}', f'MAS-{self.prefijo}-C{i}', 'CAJERO')
+            for i in range(1, self.cajas + 1)
+        ]
+
+        # Los tipos de STOCK_BAJO y QUINTAL_AGOTADO (idempotente)
+        call_command('crear_tipos_notificaciones', stdout=io.StringIO())
+        self.unidad, _ = UnidadMedida.objects.get_or_create(
+            abreviatura='lb',
+            defaults={'nombre': 'Libra', 'factor_conversion_kg': Decimal('0.453592')}
+        )
+
+    def _catalogo(self):
+        """Categorías, proveedores, productos e inventarios normales (sin stock)"""
+        from apps.inventory_management.models import Categoria, Producto, ProductoNormal, Proveedor
+
+        rng = self.rng
+        categorias = {
+            nombre: Categoria.objects.get_or_create(nombre=f'{nombre} ({self.prefijo})')[0]
+            for nombre in CATEGORIAS
+        }
+        self.lista_proveedores = Proveedor.objects.bulk_create([
+            Proveedor(
+                id=self._id(),
+                nombre_comercial=f'Distribuidora {rng.choice(APELLIDOS)} {i} ({self.prefijo})',
+                ruc_nit=f'MAS{self.prefijo}{i:07d}',
+                dias_credito=rng.choice((0, 15, 30)),
+            )
+            for i in range(1, self.proveedores + 1)
+        ], batch_size=self.lote)
+
+        n_granel = round(self.productos * self.proporcion_granel)
+        n_normales = max(1, self.productos - n_granel)
+        # Demanda diaria promedio por producto (2,5 líneas por venta)
+        lineas_dia = self.ventas_dia * 2.5
+        demanda_granel = lineas_dia * self.proporcion_granel * 3.5 / max(1, n_granel)
+        demanda_normal = lineas_dia * (1 - self.proporcion_granel) * 2 / n_normales
+
+        productos, inventarios = [], []
+        self.granel, self.normales = [], []
+        for i in range(1, self.productos + 1):
+            granel = i <= n_granel
+            categoria = 'Granos' if granel else rng.choice(tuple(CATEGORIAS)[1:])
+            precio = Decimal(rng.uniform(0.5, 1.5) if granel else rng.uniform(0.5, 15)).quantize(CENTAVOS)
+            producto = Producto(
+                id=self._id(),
+                codigo_barras=f'{self.prefijo}P{i:05d}',
+                nombre=f'{rng.choice(CATEGORIAS[categoria])} {"granel" if granel else "presentación"} {i}',
+                categoria=categorias[categoria],
+                tipo_inventario='QUINTAL' if granel else 'NORMAL',
+                unidad_medida_base=self.unidad if granel else None,
+                precio_por_unidad_peso=precio if granel else None,
+                peso_base_quintal=PESO_QUINTAL if granel else None,
+                precio_venta=None if granel else precio,
+                aplica_impuestos=rng.random() < 0.6,
+                usuario_registro=self.usuario,
+            )
+            productos.append(producto)
+            if granel:
+                producto.lotes = deque()
+                producto.costo_base = precio / Decimal('1.35')
+                producto.umbral = max(PESO_QUINTAL, Decimal(round(demanda_granel * 2)))
+                producto.objetivo = max(PESO_QUINTAL * 2, Decimal(round(demanda_granel * 7)))
+                self.granel.append(producto)
+            else:
+                maximo = max(20, int(demanda_normal * rng.uniform(5, 10)))
+                producto.inventario = ProductoNormal(
+                    id=self._id(),
+                    producto=producto,
+                    stock_actual=0,
+                    stock_minimo=max(5, maximo // 5),
+                    stock_maximo=maximo,
+                    costo_unitario=(precio * Decimal('0.7')).quantize(CENTAVOS),
+                    ubicacion_almacen=f'Pasillo {rng.randint(1, 12)}',
+                )
+                producto.costo_base = producto.inventario.costo_unitario
+                inventarios.append(producto.inventario)
+                self.normales.append(producto)
+            # Libro de costos: [secuencia, cantidad, valor, costo de ventas]
+            producto.saldo = [0, Decimal('0'), Decimal('0.00'), Decimal('0.00')]
+            producto.alerta_desde = None
+
+        Producto.objects.bulk_create(productos, batch_size=self.lote)
+        ProductoNormal.objects.bulk_create(inventarios, batch_size=self.lote)
+        self.resumen['productos'] = len(productos)
+        self.resumen['proveedores'] = len(self.lista_proveedores)
+
+    def _clientes(self):
+        from apps.sales_management.models import Cliente
+
+        rng = self.rng
+        clientes = []
+        for i in range(1, self.clientes + 1):
+            mayorista = rng.random() < 0.05
+            clientes.append(Cliente(
+                id=self._id(),
+                tipo_documento='RUC' if mayorista else 'CEDULA',
+                numero_documento=f'{self.prefijo}{i:010d}',
+                nombres=rng.choice(NOMBRES),
+                apellidos=f'{rng.choice(APELLIDOS)} {rng.choice(APELLIDOS)}',
+                tipo_cliente='MAYORISTA' if mayorista else rng.choice(('FRECUENTE', 'OCASIONAL')),
+                limite_credito=Decimal(rng.choice((0, 0, 100, 500))),
+                fecha_registro=self._momento(self.primer_dia, 9) - timedelta(days=rng.randint(0, 720)),
+            ))
+        with fechas_historicas(Cliente):
+            self.lista_clientes = Cliente.objects.bulk_create(clientes, batch_size=self.lote)
+        self.resumen['clientes'] = len(clientes)
+
+    def _cajas(self):
+        """Una caja por cajero, cerrada tras la sesión del último día"""
+        from apps.financial_management.models import Caja
+
+        ultimo = self.primer_dia + timedelta(days=self.dias - 1)
+        self.lista_cajas = Caja.objects.bulk_create([
+            Caja(
+                id=self._id(),
+                nombre=f'Caja {i} ({self.prefijo})',
+                codigo=f'{self.prefijo}-CAJA-{i:02d}',
+                tipo='PRINCIPAL' if i == 1 else 'SECUNDARIA',
+                estado='CERRADA',
+                monto_apertura=MONTO_APERTURA,
+                monto_actual=Decimal('0.00'),
+                fecha_apertura=self._momento(ultimo, 7, 45),
+                fecha_cierre=self._momento(ultimo, 21),
+                usuario_apertura=cajero,
+                usuario_cierre=cajero,
+            )
+            for i, cajero in enumerate(self.cajeros, start=1)
+        ])
+        for caja, cajero in zip(self.lista_cajas, self.cajeros):
+            caja.cajero = cajero
+
+    # ========================================================================
+    # SIMULACIÓN DE UN DÍA
+    # ========================================================================
+
+    def _dia(self, dia):
+        """Reposición, apertura de cajas, ventas, devoluciones y cierre"""
+        self._reponer(self._momento(dia, 7))
+        for caja in self.lista_cajas:
+            self._movimiento_caja(caja, 'APERTURA', MONTO_APERTURA, self._momento(dia, 7, 45))
+            caja.apertura = self._momento(dia, 7, 45)
+            caja.ventas_dia = Decimal('0.00')
+
+        vendidas = []
+        minutos = sorted(self.rng.randint(0, 12 * 60 - 1) for _ in range(self.ventas_dia))
+        for minuto in minutos:
+            venta = self._venta(self._momento(dia, 8, minuto))
+            if venta is not None:
+                vendidas.append(venta)
+            if self._n_pendientes >= self.lote:
+                self._volcar()
+
+        for venta in vendidas:
+            if self.rng.random() < self.tasa_devolucion:
+                self._devolucion(venta, self._momento(dia, 20, self.rng.randint(30, 50)))
+
+        for caja in self.lista_cajas:
+            self._arqueo(caja, self._momento(dia, 21))
+
+        if self._n_pendientes >= self.lote:
+            self._volcar()
+
+    def _reponer(self, fecha):
+        """Llegan quintales y compras de los productos bajo su umbral"""
+        from apps.inventory_management.models import MovimientoInventario, MovimientoQuintal, Quintal
+
+        rng = self.rng
+        for producto in self.granel:
+            disponible = sum(q.peso_actual for q in producto.lotes)
+            if disponible >= producto.umbral:
+                continue
+            while disponible < producto.objetivo:
+                self._contadores['quintal'] += 1
+                costo = (producto.costo_base * Decimal(rng.uniform(0.95, 1.05))).quantize(PRECISION_COSTO)
+                quintal = Quintal(
+                    id=self._id(),
+                    codigo_quintal=f'Q{self.prefijo}{self._contadores["quintal"]:05d}',
+                    producto=producto,
+                    proveedor=rng.choice(self.lista_proveedores),
+                    unidad_medida=self.unidad,
+                    peso_inicial=PESO_QUINTAL,
+                    peso_actual=PESO_QUINTAL,
+                    costo_total=(PESO_QUINTAL * costo).quantize(CENTAVOS),
+                    costo_por_unidad=costo,
+                    fecha_ingreso=fecha + timedelta(seconds=len(producto.lotes)),
+                    fecha_vencimiento=(fecha + timedelta(days=rng.randint(60, 365))).date(),
+                    usuario_registro=self.usuario,
+                    fecha_creacion=fecha,
+                )
+                self._agregar(quintal)
+                self._agregar(MovimientoQuintal(
+                    id=self._id(), quintal=quintal, tipo_movimiento='ENTRADA',
+                    peso_movimiento=PESO_QUINTAL, peso_antes=Decimal('0'), peso_despues=PESO_QUINTAL,
+                    unidad_medida=self.unidad, usuario=self.usuario, fecha_movimiento=fecha,
+                    observaciones='Ingreso de quintal',
+                ))
+                self._asiento(producto, fecha, PESO_QUINTAL, costo, quintal=quintal)
+                producto.lotes.append(quintal)
+                disponible += PESO_QUINTAL
+            self._resolver_alerta(producto, fecha)
+
+        for producto in self.normales:
+            inventario = producto.inventario
+            if inventario.stock_actual > inventario.stock_minimo:
+                continue
+            cantidad = inventario.stock_maximo - inventario.stock_actual
+            costo = (producto.costo_base * Decimal(rng.uniform(0.97, 1.03))).quantize(CENTAVOS)
+            self._agregar(MovimientoInventario(
+                id=self._id(), producto_normal=inventario, tipo_movimiento='ENTRADA_COMPRA',
+                cantidad=cantidad, stock_antes=inventario.stock_actual,
+                stock_despues=inventario.stock_actual + cantidad,
+                costo_unitario=costo, costo_total=cantidad * costo,
+                usuario=self.usuario, fecha_movimiento=fecha, observaciones='Compra de reposición',
+            ))
+            self._asiento(producto, fecha, Decimal(cantidad), costo)
+            inventario.stock_actual += cantidad
+            inventario.costo_unitario = costo
+            inventario.fecha_ultima_entrada = fecha
+            self._resolver_alerta(producto, fecha)
+
+    def _venta(self, fecha):
+        """Venta de 1 a 4 productos; None si no quedó ninguna línea con stock"""
+        from apps.sales_management.models import Venta
+
+        rng = self.rng
+        caja = rng.choice(self.lista_cajas)
+        self._contadores['venta'] += 1
+        venta = Venta(
+            id=self._id(),
+            numero_venta=f'VNT-{self.prefijo}-{self._contadores["venta"]:08d}',
+            cliente=rng.choice(self.lista_clientes) if self.lista_clientes and rng.random() < 0.35 else None,
+            vendedor=caja.cajero,
+            caja=caja,
+            fecha_venta=fecha,
+            tipo_venta='CONTADO',
+            estado='COMPLETADA',
+            porcentaje_iva_aplicado=self.porcentaje_iva,
+            fecha_creacion=fecha,
+        )
+        venta.lineas = []
+        for _ in range(rng.randint(1, 4)):
+            if self.granel and rng.random() < self.proporcion_granel:
+                self._linea_granel(venta, rng.choice(self.granel), rng.choice(PESOS_GRANEL), fecha)
+            elif self.normales:
+                self._linea_normal(venta, rng.choice(self.normales), rng.randint(1, 3), fecha)
+
+        if not venta.lineas:
+            self._contadores['venta'] -= 1
+            return None
+
+        venta.subtotal = sum(d.subtotal for d in venta.lineas)
+        venta.impuestos = sum(d.monto_iva for d in venta.lineas)
+        venta.total = venta.subtotal + venta.impuestos
+        venta.monto_pagado = venta.total
+        self._agregar(venta)
+        for detalle in venta.lineas:
+            self._agregar(detalle)
+        self._pagos(venta, fecha)
+        self._movimiento_caja(caja, 'VENTA', venta.total, fecha, venta=venta)
+        return venta
+
+    def _detalle(self, venta, producto, subtotal, **campos):
+        from apps.sales_management.models import DetalleVenta
+
+        monto_iva = (
+            subtotal * self.porcentaje_iva / Decimal('100')
+        ).quantize(CENTAVOS) if producto.aplica_impuestos else Decimal('0.00')
+        detalle = DetalleVenta(
+            id=self._id(), venta=venta, producto=producto, aplica_iva=producto.aplica_impuestos,
+            subtotal=subtotal, monto_iva=monto_iva, total=subtotal + monto_iva,
+            orden=len(venta.lineas), **campos
+        )
+        venta.lineas.append(detalle)
+        return detalle
+
+    def _linea_normal(self, venta, producto, cantidad, fecha):
+        from apps.inventory_management.models import MovimientoInventario
+
+        inventario = producto.inventario
+        cantidad = min(cantidad, inventario.stock_actual)
+        if not cantidad:
+            self.resumen['sin_stock'] += 1
+            return
+        costo = inventario.costo_unitario
+        self._detalle(
+            venta, producto, cantidad * producto.precio_venta,
+            cantidad_unidades=cantidad, precio_unitario=producto.precio_venta,
+            costo_unitario=costo, costo_total=cantidad * costo,
+        )
+        self._agregar(MovimientoInventario(
+            id=self._id(), producto_normal=inventario, tipo_movimiento='SALIDA_VENTA',
+            cantidad=-cantidad, stock_antes=inventario.stock_actual,
+            stock_despues=inventario.stock_actual - cantidad,
+            costo_unitario=costo, costo_total=cantidad * costo, venta=venta,
+            usuario=venta.vendedor, fecha_movimiento=fecha, observaciones=f'Venta {venta.numero_venta}',
+        ))
+        self._asiento(producto, fecha, Decimal(-cantidad), venta=venta)
+        inventario.stock_actual -= cantidad
+        inventario.fecha_ultima_salida = fecha
+        if inventario.stock_actual <= inventario.stock_minimo and producto.alerta_desde is None:
+            producto.alerta_desde = fecha
+
+    def _linea_granel(self, venta, producto, peso, fecha):
+        """Consume FIFO: una línea por quintal tocado, como agregar_item_granel"""
+        from apps.inventory_management.models import MovimientoQuintal
+
+        if not producto.lotes:
+            self.resumen['sin_stock'] += 1
+            return
+        while peso > 0 and producto.lotes:
+            quintal = producto.lotes[0]
+            tomar = min(peso, quintal.peso_actual)
+            self._detalle(
+                venta, producto, (tomar * producto.precio_por_unidad_peso).quantize(CENTAVOS),
+                quintal=quintal, peso_vendido=tomar, unidad_medida=self.unidad,
+                precio_por_unidad_peso=producto.precio_por_unidad_peso,
+                costo_unitario=quintal.costo_por_unidad,
+                costo_total=(tomar * quintal.costo_por_unidad).quantize(CENTAVOS),
+            )
+            self._agregar(MovimientoQuintal(
+                id=self._id(), quintal=quintal, tipo_movimiento='SALIDA', peso_movimiento=-tomar,
+                peso_antes=quintal.peso_actual, peso_despues=quintal.peso_actual - tomar,
+                unidad_medida=self.unidad, venta=venta, usuario=venta.vendedor,
+                fecha_movimiento=fecha, observaciones=f'Venta {venta.numero_venta}',
+            ))
+            self._asiento(producto, fecha, -tomar, quintal.costo_por_unidad, quintal=quintal, venta=venta)
+            quintal.peso_actual -= tomar
+            peso -= tomar
+            if not quintal.peso_actual:
+                quintal.estado = 'AGOTADO'
+                producto.lotes.popleft()
+                self._alerta_quintal_agotado(producto, quintal, fecha)
+            if getattr(quintal, 'volcado', False):
+                self._quintales_cambiados[quintal.pk] = quintal
+
+    def _pagos(self, venta, fecha):
+        from apps.sales_management.models import Pago
+
+        rng = self.rng
+        sorteo = rng.random()
+        forma = next(f for f, acumulada in FORMAS_PAGO if sorteo < acumulada)
+        if forma == 'DIVIDIDO':
+            efectivo = (venta.total * Decimal(rng.choice(('0.3', '0.5', '0.7')))).quantize(CENTAVOS)
+            partes = [('EFECTIVO', efectivo), ('TARJETA_DEBITO', venta.total - efectivo)]
+        else:
+            partes = [(forma, venta.total)]
+
+        for forma, monto in partes:
+            self._agregar(Pago(
+                id=self._id(), venta=venta, forma_pago=forma, monto=monto,
+                numero_referencia='' if forma == 'EFECTIVO' else f'{rng.randrange(10 ** 8):08d}',
+                banco=rng.choice(BANCOS) if forma == 'TRANSFERENCIA' else '',
+                fecha_pago=fecha, usuario=venta.vendedor,
+            ))
+        if partes[0][0] == 'EFECTIVO':
+            # Billete redondeado hacia arriba
+            entregado = Decimal(int(partes[0][1]) + rng.choice((0, 1, 5, 10)))
+            venta.cambio = max(Decimal('0.00'), entregado - partes[0][1])
+
+    def _devolucion(self, venta, fecha):
+        """Devolución aprobada de unidades de la primera línea normal, reembolsada en caja"""
+        from apps.inventory_management.models import MovimientoInventario
+        from apps.sales_management.models import Devolucion
+
+        rng = self.rng
+        detalle = next((d for d in venta.lineas if d.cantidad_unidades), None)
+        if detalle is None:
+            return
+        producto = detalle.producto
+        inventario = producto.inventario
+        cantidad = rng.randint(1, detalle.cantidad_unidades)
+        monto = (detalle.total * cantidad / detalle.cantidad_unidades).quantize(CENTAVOS)
+
+        self._contadores['devolucion'] += 1
+        devolucion = Devolucion(
+            id=self._id(),
+            numero_devolucion=f'DEV-{self.prefijo}-{self._contadores["devolucion"]:08d}',
+            venta_original=venta, detalle_venta=detalle,
+            cantidad_devuelta=Decimal(cantidad), monto_devolucion=monto,
+            motivo=rng.choice(MOTIVOS_DEVOLUCION), descripcion='Devolución en caja',
+            estado='APROBADA', fecha_devolucion=fecha,
+            usuario_solicita=venta.vendedor, usuario_aprueba=self.usuario, fecha_procesado=fecha,
+        )
+        self._agregar(devolucion)
+        self._agregar(MovimientoInventario(
+            id=self._id(), producto_normal=inventario, tipo_movimiento='ENTRADA_DEVOLUCION',
+            cantidad=cantidad, stock_antes=inventario.stock_actual,
+            stock_despues=inventario.stock_actual + cantidad,
+            costo_unitario=detalle.costo_unitario, costo_total=cantidad * detalle.costo_unitario,
+            venta=venta, usuario=venta.vendedor, fecha_movimiento=fecha,
+            observaciones=f'Devolución {devolucion.numero_devolucion}',
+        ))
+        self._asiento(producto, fecha, Decimal(cantidad), detalle.costo_unitario, venta=venta)
+        inventario.stock_actual += cantidad
+        inventario.fecha_ultima_entrada = fecha
+        self._movimiento_caja(venta.caja, 'DEVOLUCION', monto, fecha)
+
+    # ========================================================================
+    # CAJA
+    # ========================================================================
+
+    def _movimiento_caja(self, caja, tipo, monto, fecha, venta=None):
+        """Movimiento con saldos encadenados por caja, como MovimientoCaja.save()"""
+        from apps.financial_management.models import MovimientoCaja
+
+        anterior = Decimal('0.00') if tipo == 'APERTURA' else caja.saldo
+        if tipo == 'APERTURA':
+            caja.saldo = monto
+        elif tipo == 'CIERRE':
+            caja.saldo = Decimal('0.00')
+        elif tipo == 'DEVOLUCION':
+            caja.saldo = anterior - monto
+        else:
+            caja.saldo = anterior + monto
+            caja.ventas_dia += monto
+
+        self._agregar(MovimientoCaja(
+            id=self._id(), caja=caja, tipo_movimiento=tipo, monto=monto,
+            saldo_anterior=anterior, saldo_nuevo=caja.saldo, venta=venta,
+            usuario=caja.cajero, fecha_movimiento=fecha,
+            observaciones=f'Venta {venta.numero_venta}' if venta else '',
+        ))
+        return anterior
+
+    def _arqueo(self, caja, fecha):
+        """Arqueo de la sesión (la mayoría cuadra) y movimiento de cierre"""
+        from apps.financial_management.models import ArqueoCaja
+
+        rng = self.rng
+        esperado = caja.saldo
+        diferencia = Decimal('0.00')
+        if rng.random() < 0.15:
+            diferencia = Decimal(rng.randint(-500, 300)) / 100
+        self._contadores['arqueo'] += 1
+        arqueo = ArqueoCaja(
+            id=self._id(),
+            numero_arqueo=f'ARQ-{self.prefijo}-{self._contadores["arqueo"]:08d}',
+            caja=caja, fecha_apertura=caja.apertura, fecha_cierre=fecha,
+            monto_apertura=MONTO_APERTURA, total_ventas=caja.ventas_dia,
+            monto_esperado=esperado, monto_contado=esperado + diferencia,
+            usuario_apertura=caja.cajero, usuario_cierre=caja.cajero, fecha_creacion=fecha,
+        )
+        arqueo.calcular_diferencia()
+        if diferencia:
+            arqueo.observaciones_diferencia = 'Diferencia en el conteo de efectivo'
+        self._agregar(arqueo)
+        self._movimiento_caja(caja, 'CIERRE', arqueo.monto_contado, fecha)
+
+    # ========================================================================
+    # LIBRO DE COSTOS Y ALERTAS
+    # ========================================================================
+
+    def _asiento(self, producto, fecha, cantidad, costo=None, quintal=None, venta=None):
+        """
+        Asiento encadenado con las mismas reglas que ValoracionService.registrar:
+        las salidas de inventario normal salen al promedio ponderado
+        """
+        from apps.inventory_management.models import AsientoCosto
+
+        secuencia, saldo_cantidad, saldo_valor, costo_ventas = producto.saldo
+        if costo is None:
+            costo = (
+                saldo_valor / saldo_cantidad if saldo_cantidad > 0 else Decimal('0')
+            ).quantize(PRECISION_COSTO)
+        if quintal is None and cantidad < 0 and saldo_cantidad + cantidad <= 0:
+            valor = -saldo_valor
+        else:
+            valor = (cantidad * costo).quantize(CENTAVOS)
+        costo_venta = -valor if venta is not None else Decimal('0.00')
+
+        producto.saldo = [
+            secuencia + 1, saldo_cantidad + cantidad, saldo_valor + valor, costo_ventas + costo_venta
+        ]
+        self._agregar(AsientoCosto(
+            id=self._id(), producto=producto, secuencia=secuencia + 1, fecha=fecha,
+            tipo='ENTRADA' if cantidad >= 0 else 'SALIDA', quintal=quintal, venta=venta,
+            cantidad=cantidad, costo_unitario=costo, valor=valor, costo_venta=costo_venta,
+            saldo_cantidad=producto.saldo[1], saldo_valor=producto.saldo[2],
+            costo_ventas_acumulado=producto.saldo[3],
+        ))
+
+    def _alerta(self, producto, tipo, prioridad, titulo, fecha, resuelta_en, notificacion, **campos):
+        """Alerta ya resuelta y la notificación leída que generó"""
+        from apps.notifications.models import Notificacion
+        from apps.stock_alert_system.models import AlertaStock
+
+        if not hasattr(self, 'tipos_notificacion'):
+            from django.contrib.contenttypes.models import ContentType
+
+            from apps.notifications.models import TipoNotificacion
+            self.tipos_notificacion = {
+                t.codigo: t for t in TipoNotificacion.objects.filter(codigo__in=['STOCK_BAJO', 'QUINTAL_AGOTADO'])
+            }
+            self.tipo_alerta = ContentType.objects.get_for_model(AlertaStock)
+
+        alerta = AlertaStock(
+            id=self._id(), tipo_alerta=tipo, prioridad=prioridad, estado='RESUELTA',
+            producto=producto, titulo=titulo, mensaje=titulo, resuelta=True,
+            fecha_creacion=fecha, fecha_vista=fecha + timedelta(minutes=self.rng.randint(5, 90)),
+            fecha_resolucion=resuelta_en, usuario_resolutor=self.usuario, **campos
+        )
+        self._agregar(alerta)
+        self._agregar(Notificacion(
+            id=self._id(), tipo_notificacion=self.tipos_notificacion[notificacion], prioridad=prioridad,
+            usuario=self.usuario, titulo=titulo, mensaje=titulo, content_type=self.tipo_alerta,
+            object_id=alerta.id, estado='LEIDA', requiere_accion=tipo == 'STOCK_BAJO',
+            enviada_web=True, fecha_creacion=fecha, fecha_envio=fecha, fecha_lectura=alerta.fecha_vista,
+        ))
+
+    def _resolver_alerta(self, producto, fecha):
+        """La reposición resuelve la alerta de stock bajo abierta desde la venta que la cruzó"""
+        if producto.alerta_desde is None:
+            return
+        self._alerta(
+            producto, 'STOCK_BAJO', 'ALTA', f'Stock bajo: {producto.nombre}',
+            producto.alerta_desde, fecha, 'STOCK_BAJO',
+            producto_normal=getattr(producto, 'inventario', None),
+        )
+        producto.alerta_desde = None
+
+    def _alerta_quintal_agotado(self, producto, quintal, fecha):
+        self._alerta(
+            producto, 'QUINTAL_AGOTADO', 'MEDIA', f'Quintal agotado: {quintal.codigo_quintal}',
+            fecha, fecha, 'QUINTAL_AGOTADO', quintal=quintal,
+        )
+        if not producto.lotes and producto.alerta_desde is None:
+            producto.alerta_desde = fecha
+
+    # ========================================================================
+    # INSERCIÓN
+    # ========================================================================
+
+    def _agregar(self, instancia):
+        self._pendientes.setdefault(type(instancia), []).append(instancia)
+        self._n_pendientes += 1
+
+    def _volcar(self):
+        """
+        Inserta lo acumulado en orden de dependencias, en una transacción
+
+        Los quintales ya insertados cuyo peso cambió se actualizan al final.
+        """
+        from apps.financial_management.models import ArqueoCaja, MovimientoCaja
+        from apps.inventory_management.models import (
+            AsientoCosto, MovimientoInventario, MovimientoQuintal, Quintal
+        )
+        from apps.notifications.models import Notificacion
+        from apps.sales_management.models import DetalleVenta, Devolucion, Pago, Venta
+        from apps.stock_alert_system.models import AlertaStock
+
+        orden = (
+            (Quintal, 'quintales'), (Venta, 'ventas'), (DetalleVenta, 'detalles'), (Pago, 'pagos'),
+            (Devolucion, 'devoluciones'), (MovimientoQuintal, 'movimientos_quintal'),
+            (MovimientoInventario, 'movimientos_inventario'), (AsientoCosto, 'asientos'),
+            (MovimientoCaja, 'movimientos_caja'), (ArqueoCaja, 'arqueos'),
+            (AlertaStock, 'alertas'), (Notificacion, 'notificaciones'),
+        )
+        with transaction.atomic(), fechas_historicas(Quintal, Venta, ArqueoCaja, AlertaStock):
+            for modelo, clave in orden:
+                filas = self._pendientes.pop(modelo, [])
+                if filas:
+                    self._insertar(modelo, filas)
+                    self.resumen[clave] += len(filas)
+            if self._quintales_cambiados:
+                Quintal.objects.bulk_update(
+                    list(self._quintales_cambiados.values()), ['peso_actual', 'estado'],
+                    batch_size=self.lote
+                )
+        for quintal in self._pendientes_quintales():
+            quintal.volcado = True
+        self._quintales_cambiados = {}
+        self._n_pendientes = 0
+
+    def _insertar(self, modelo, filas):
+        """
+        COPY FROM STDIN en PostgreSQL (sin compilar un INSERT por lote, que
+        es la mayor parte del costo de bulk_create); bulk_create en el resto
+        """
+        if connection.vendor != 'postgresql':
+            modelo.objects.bulk_create(filas, batch_size=self.lote)
+            return
+
+        campos = modelo._meta.concrete_fields
+        salida = io.StringIO()
+        escritor = csv.writer(salida)
+        for fila in filas:
+            valores = []
+            for campo in campos:
+                valor = campo.pre_save(fila, True)
+                if valor is None:
+                    valores.append(NULO_COPY)
+                elif isinstance(campo, JSONField):
+                    valores.append(json.dumps(valor, cls=campo.encoder))
+                else:
+                    valores.append(campo.get_db_prep_save(valor, connection))
+            escritor.writerow(valores)
+        salida.seek(0)
+
+        q = connection.ops.quote_name
+        columnas = ', '.join(q(campo.column) for campo in campos)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {q(modelo._meta.db_table)} ({columnas}) FROM STDIN WITH (FORMAT csv, NULL '{NULO_COPY}')",
+                salida
+            )
+
+    def _pendientes_quintales(self):
+        """Quintales con peso que quedan en memoria (los agotados ya no cambian)"""
+        return (quintal for producto in self.granel for quintal in producto.lotes)
+
+    def _inventario_final(self):
+        """Stock, último costo y fechas de los inventarios normales"""
+        from apps.inventory_management.models import ProductoNormal
+
+        ProductoNormal.objects.bulk_update(
+            [producto.inventario for producto in self.normales],
+            ['stock_actual', 'costo_unitario', 'fecha_ultima_entrada', 'fecha_ultima_salida'],
+            batch_size=self.lote
+        )
+
+    # ========================================================================
+    # TABLAS DERIVADAS
+    # ========================================================================
+
+    def _reconstruir(self):
+        """StockActual, vencimientos, semáforo y alertas vigentes, clientes y caché de reportes"""
+        from apps.custom_admin.estado_panel import invalidar
+        from apps.inventory_management.models import Producto, Quintal, StockActual
+        from apps.reports_analytics.services.report_execution_service import ReportExecutionService
+        from apps.sales_management.estadisticas_clientes import EstadisticasClientesService
+        from apps.stock_alert_system.models import VencimientoLote
+        from apps.stock_alert_system.status_calculator import StatusCalculator
+
+        productos = Producto.objects.filter(codigo_barras__startswith=f'{self.prefijo}P').order_by('pk')
+        producto_ids = list(productos.values_list('pk', flat=True))
+        with transaction.atomic():
+            for i in range(0, len(producto_ids), 500):
+                StockActual.objects.refrescar(producto_ids[i:i + 500])
+
+            VencimientoLote.objects.bulk_create(
+                (
+                    VencimientoLote(quintal_id=pk, fecha_vencimiento=fecha)
+                    for pk, fecha in Quintal.objects.disponibles().filter(
+                        codigo_quintal__startswith=f'Q{self.prefijo}', fecha_vencimiento__isnull=False
+                    ).values_list('pk', 'fecha_vencimiento').iterator()
+                ),
+                batch_size=self.lote,
+                ignore_conflicts=True
+            )
+
+        for producto in productos.iterator():
+            try:
+                StatusCalculator.calcular_estado(producto)
+            except Exception as e:
+                logger.error(f"Error calculando estado de {producto.nombre}: {str(e)}")
+
+        EstadisticasClientesService.recalcular()
+        ReportExecutionService.invalidar()
+        invalidar()
+        logger.info(f"Datos masivos {self.prefijo}: {self.resumen}")
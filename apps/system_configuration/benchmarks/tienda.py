@@ -0,0 +1,322 @@
+# apps/system_configuration/benchmarks/tienda.py
+
+"""
+Tienda sintética reproducible
+
+Crea un catálogo, sus quintales e inventario normal y un historial de
+ventas (K por día durante Y años) pasando por los mismos servicios que el
+POS: POSService, los receivers de inventario, el libro de costos y la
+proyección StockActual. Es lenta a propósito (cada venta cuesta lo mismo
+que en producción) y sirve de base para los benchmarks.
+
+Todo lo aleatorio sale de random.Random(semilla): con los mismos
+parámetros se obtienen los mismos códigos, precios, lotes y ventas. Las
+fechas son relativas al día en que se genera.
+
+Códigos (prefijo de 2 letras, formato de BarcodeService):
+    productos  {prefijo}P00001   (3 letras + 5 números)
+    quintales  Q{prefijo}00001   (Q + 2 letras + 5 números)
+"""
+
+import logging
+import random
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger('commercebox')
+
+CENTAVOS = Decimal('0.01')
+PESO_QUINTAL = Decimal('100')
+
+
+def pagar(venta, usuario, fecha=None):
+    """
+    Cobra el total en efectivo como la sincronización fuera de línea: el
+    Pago se crea en bloque, sin los receivers que marcarían la venta
+    COMPLETADA antes de finalizar_venta
+    """
+    from apps.sales_management.models import Pago
+
+    venta.refresh_from_db()
+    Pago.objects.bulk_create([Pago(
+        venta=venta, forma_pago='EFECTIVO', monto=venta.total,
+        fecha_pago=fecha or timezone.now(), usuario=usuario
+    )])
+    venta.monto_pagado = venta.total
+
+
+class TiendaSintetica:
+    """
+    Generador de una tienda sintética con semilla
+
+    Args:
+        productos: Productos del catálogo (N)
+        quintales: Quintales repartidos entre los productos a granel (M)
+        ventas_dia: Ventas por día (K)
+        dias: Días de historial; `anios` tiene prioridad si se indica
+        anios: Años de historial (Y), admite fracciones
+        semilla: Semilla del generador aleatorio
+        prefijo: Dos letras que identifican la tienda en los códigos
+        proporcion_granel: Fracción del catálogo vendida a granel
+    """
+
+    def __init__(self, productos=50, quintales=100, ventas_dia=20, dias=30, anios=None,
+                 semilla=42, prefijo='SN', proporcion_granel=0.3):
+        if len(prefijo) != 2 or not prefijo.isalpha():
+            raise ValueError('El prefijo debe tener exactamente 2 letras')
+        self.productos = productos
+        self.quintales = quintales
+        self.ventas_dia = ventas_dia
+        self.dias = max(1, round(anios * 365)) if anios else dias
+        self.semilla = semilla
+        self.prefijo = prefijo.upper()
+        self.proporcion_granel = proporcion_granel
+        self.rng = random.Random(semilla)
+
+        self.usuario = None
+        self.granel = []
+        self.normales = []
+        self.resumen = {'productos': 0, 'quintales': 0, 'ventas': 0, 'lineas': 0, 'sin_stock': 0}
+
+    def perfil(self):
+        """Parámetros que determinan la tienda (se guardan con las líneas base)"""
+        return {
+            'productos': self.productos,
+            'quintales': self.quintales,
+            'ventas_dia': self.ventas_dia,
+            'dias': self.dias,
+            'semilla': self.semilla,
+            'proporcion_granel': self.proporcion_granel,
+        }
+
+    # ========================================================================
+    # GENERACIÓN
+    # ========================================================================
+
+    def generar(self, progreso=None):
+        """
+        Crea la tienda completa
+
+        Args:
+            progreso: Callable(dia, total_dias) llamado al terminar cada día
+
+        Returns:
+            dict: Filas creadas por tipo
+
+        Raises:
+            ValueError: Si ya existe una tienda con el mismo prefijo
+        """
+        from apps.inventory_management.models import Producto
+
+        if Producto.objects.filter(codigo_barras__startswith=f'{self.prefijo}P').exists():
+            raise ValueError(f'Ya existe una tienda sintética con el prefijo {self.prefijo}')
+
+        with transaction.atomic():
+            self._base()
+            self._catalogo()
+            self._quintales()
+        self._ventas(progreso)
+        return self.resumen
+
+    def _base(self):
+        """Usuario, categorías, unidad y proveedor de la tienda"""
+        from apps.authentication.models import Rol, Usuario
+        from apps.inventory_management.models import Categoria, Proveedor, UnidadMedida
+
+        rol, _ = Rol.objects.get_or_create(
+            codigo='ADMIN',
+            defaults={
+                'nombre': 'Administrador',
+                'descripcion': 'Acceso total al sistema',
+                'permissions': ['*'],
+                'is_active': True
+            }
+        )
+        username = f'sintetico_{self.prefijo.lower()}'
+        self.usuario, creado = Usuario.objects.get_or_create(
+            username=username,
+            defaults={
+                'email': f'{username}@commercebox.local',
+                'nombres': 'Tienda',
+                'apellidos': f'Sintética {self.prefijo}',
+                'codigo_empleado': f'SIN-{self.prefijo}',
+                'documento_identidad': f'SIN-{self.prefijo}',
+                'rol': rol,
+            }
+        )
+        if creado:
+            self.usuario.set_unusable_password()
+            self.usuario.save(update_fields=['password'])
+
+        self.categorias = [
+            Categoria.objects.get_or_create(nombre=f'{nombre} ({self.prefijo})')[0]
+            for nombre in ('Granos', 'Abarrotes', 'Bebidas', 'Limpieza', 'Lácteos')
+        ]
+        self.unidad, _ = UnidadMedida.objects.get_or_create(
+            abreviatura='lb',
+            defaults={'nombre': 'Libra', 'factor_conversion_kg': Decimal('0.453592')}
+        )
+        self.proveedor, _ = Proveedor.objects.get_or_create(
+            ruc_nit=f'SIN{self.prefijo}0000001',
+            defaults={'nombre_comercial': f'Distribuidora Sintética {self.prefijo}'}
+        )
+
+    def _catalogo(self):
+        """Productos a granel y normales, con stock normal suficiente para el historial"""
+        from apps.inventory_management.models import Producto, ProductoNormal
+
+        n_granel = round(self.productos * self.proporcion_granel) if self.quintales else 0
+        # Unidades que se venderán en promedio por producto normal, con holgura
+        lineas = self.ventas_dia * self.dias * 2.5 * (1 - self.proporcion_granel)
+        stock = int(lineas * 2 / max(1, self.productos - n_granel) * 1.5) + 20
+
+        for i in range(1, self.productos + 1):
+            granel = i <= n_granel
+            precio = Decimal(self.rng.uniform(0.5, 1.5) if granel else self.rng.uniform(0.5, 15))
+            precio = precio.quantize(CENTAVOS)
+            producto = Producto.objects.create(
+                codigo_barras=f'{self.prefijo}P{i:05d}',
+                nombre=f'{"Granel" if granel else "Producto"} sintético {i}',
+                categoria=self.categorias[0] if granel else self.rng.choice(self.categorias[1:]),
+                tipo_inventario='QUINTAL' if granel else 'NORMAL',
+                unidad_medida_base=self.unidad if granel else None,
+                precio_por_unidad_peso=precio if granel else None,
+                peso_base_quintal=PESO_QUINTAL if granel else None,
+                precio_venta=None if granel else precio,
+                aplica_impuestos=self.rng.random() < 0.6,
+                usuario_registro=self.usuario,
+            )
+            if granel:
+                self.granel.append(producto)
+            else:
+                ProductoNormal.objects.create(
+                    producto=producto,
+                    stock_actual=stock,
+                    stock_minimo=10,
+                    costo_unitario=(precio * Decimal('0.7')).quantize(CENTAVOS),
+                )
+                self.normales.append(producto)
+        self.resumen['productos'] = self.productos
+
+    def _quintales(self):
+        """Quintales de 100 lb repartidos entre los productos a granel, del más antiguo al más nuevo"""
+        from apps.inventory_management.models import Quintal
+
+        if not self.granel:
+            return
+        ahora = timezone.now()
+        for i in range(1, self.quintales + 1):
+            producto = self.granel[(i - 1) % len(self.granel)]
+            costo = (producto.precio_por_unidad_peso / Decimal('1.35')).quantize(Decimal('0.0001'))
+            Quintal.objects.create(
+                codigo_quintal=f'Q{self.prefijo}{i:05d}',
+                producto=producto,
+                proveedor=self.proveedor,
+                unidad_medida=self.unidad,
+                peso_inicial=PESO_QUINTAL,
+                peso_actual=PESO_QUINTAL,
+                costo_total=(PESO_QUINTAL * costo).quantize(CENTAVOS),
+                costo_por_unidad=costo,
+                fecha_ingreso=ahora - timedelta(days=self.dias, minutes=self.quintales - i),
+                fecha_vencimiento=(ahora + timedelta(days=self.rng.randint(15, 365))).date(),
+                usuario_registro=self.usuario,
+            )
+        self.resumen['quintales'] = self.quintales
+
+    def _ventas(self, progreso=None):
+        """K ventas por día, de 1 a 4 líneas, cobradas en efectivo"""
+        hoy = timezone.localdate()
+        ahora = timezone.now()
+        for d in range(self.dias):
+            dia = hoy - timedelta(days=self.dias - 1 - d)
+            apertura = timezone.make_aware(datetime.combine(dia, time(8)))
+            for _ in range(self.ventas_dia):
+                fecha = min(ahora, apertura + timedelta(minutes=self.rng.randint(0, 12 * 60)))
+                self._venta(fecha)
+            if progreso:
+                progreso(d + 1, self.dias)
+
+    def _venta(self, fecha):
+        from apps.sales_management.pos.pos_service import POSService
+
+        normales, granel = {}, []
+        for _ in range(self.rng.randint(1, 4)):
+            if self.granel and self.rng.random() < self.proporcion_granel:
+                granel.append((self.rng.choice(self.granel), Decimal(self.rng.choice((1, 2, 5, 10)))))
+            elif self.normales:
+                producto = self.rng.choice(self.normales)
+                normales[producto] = normales.get(producto, 0) + self.rng.randint(1, 3)
+
+        with transaction.atomic():
+            venta = POSService.crear_venta(vendedor=self.usuario)
+            lineas = 0
+            if normales:
+                try:
+                    POSService.agregar_items_normales(venta, [
+                        {'producto': p, 'cantidad': c, 'precio': p.precio_venta}
+                        for p, c in normales.items()
+                    ])
+                    lineas += len(normales)
+                except ValidationError:
+                    self.resumen['sin_stock'] += len(normales)
+            for producto, peso in granel:
+                try:
+                    POSService.agregar_item_granel(venta, producto, peso_vendido=peso)
+                    lineas += 1
+                except ValidationError:
+                    self.resumen['sin_stock'] += 1
+
+            if not lineas:
+                venta.delete()
+                return None
+
+            pagar(venta, self.usuario, fecha)
+            POSService.finalizar_venta(venta, imprimir=False, fecha_venta=fecha)
+
+        self.resumen['ventas'] += 1
+        self.resumen['lineas'] += lineas
+        return venta
+
+    # ========================================================================
+    # MUESTRAS
+    # ========================================================================
+
+    @classmethod
+    def muestras(cls, prefijo='SN'):
+        """
+        Objetos de una tienda ya generada que usan los benchmarks
+
+        Returns:
+            SimpleNamespace: usuario, normal, granel, quintal (los de menor
+            código, siempre los mismos para el mismo prefijo)
+        """
+        from apps.authentication.models import Usuario
+        from apps.inventory_management.models import Producto, Quintal
+
+        prefijo = prefijo.upper()
+        productos = Producto.objects.filter(
+            codigo_barras__startswith=f'{prefijo}P'
+        ).select_related('inventario_normal').order_by('codigo_barras')
+        normal = productos.filter(tipo_inventario='NORMAL').first()
+        if normal is None:
+            raise ValueError(f'No existe una tienda sintética con el prefijo {prefijo}')
+        granel = productos.filter(
+            tipo_inventario='QUINTAL', quintales__estado='DISPONIBLE'
+        ).first()
+        quintal = Quintal.objects.disponibles().filter(
+            codigo_quintal__startswith=f'Q{prefijo}'
+        ).order_by('codigo_quintal').first()
+
+        return SimpleNamespace(
+            prefijo=prefijo,
+            usuario=Usuario.objects.get(username=f'sintetico_{prefijo.lower()}'),
+            normal=normal,
+            normales=list(productos.filter(tipo_inventario='NORMAL')[:3]),
+            granel=granel,
+            quintal=quintal,
+        )
@@ -0,0 +1,50 @@
+# apps/system_configuration/cache.py
+
+"""
+Backends de caché que cuentan aciertos y fallos para la instrumentación
+por endpoint (instrumentacion.registrar_cache). Fuera de una medición el
+costo es revisar una tupla vacía.
+"""
+
+import contextvars
+
+from django.core.cache.backends.locmem import LocMemCache
+from django_redis.cache import RedisCache
+
+from .instrumentacion import registrar_cache
+
+_AUSENTE = object()
+# BaseCache.get_many (LocMem) llama a get() por clave: no contar dos veces
+_en_get_many = contextvars.ContextVar('commercebox_cache_get_many', default=False)
+
+
+class ContadorCacheMixin:
+    """Cuenta get / get_many; el resto de operaciones no se mide"""
+
+    def get(self, key, default=None, version=None, **kwargs):
+        valor = super().get(key, _AUSENTE, version=version, **kwargs)
+        if _en_get_many.get():
+            return default if valor is _AUSENTE else valor
+        if valor is _AUSENTE:
+            registrar_cache(fallos=1)
+            return default
+        registrar_cache(aciertos=1)
+        return valor
+
+    def get_many(self, keys, version=None, **kwargs):
+        claves = list(keys)
+        token = _en_get_many.set(True)
+        try:
+            valores = super().get_many(claves, version=version, **kwargs)
+        finally:
+            _en_get_many.reset(token)
+        registrar_cache(aciertos=len(valores), fallos=len(claves) - len(valores))
+        return valores
+
+
+class RedisCacheInstrumentada(ContadorCacheMixin, RedisCache):
+    pass
+
+
+class LocMemCacheInstrumentada(ContadorCacheMixin, LocMemCache):
+    pass
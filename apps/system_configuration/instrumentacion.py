@@ -0,0 +1,212 @@
+# apps/system_configuration/instrumentacion.py
+
+"""
+Instrumentación de rendimiento por endpoint
+
+Cada medición registra consultas SQL, tiempo en la base de datos, aciertos
+y fallos de caché y tiempo total de una vista (MetricasConsultasMiddleware)
+o de un método de servicio (@instrumentado):
+
+    class POSService:
+        @staticmethod
+        @instrumentado()
+        def finalizar_venta(venta): ...
+
+    with medir('importacion_masiva', presupuesto={'consultas': 50}):
+        ...
+
+El resultado se emite como log estructurado (structlog, logger
+`commercebox.rendimiento`) y como histogramas Prometheus etiquetados por
+endpoint. Si la medición supera su presupuesto (RENDIMIENTO_PRESUPUESTOS)
+se registra un warning; con RENDIMIENTO_PRESUPUESTO_MODO = 'error' (por
+defecto al correr las pruebas) un exceso de consultas lanza
+PresupuestoExcedido. El tiempo depende de la máquina y solo se registra.
+
+Las mediciones se anidan: las consultas de un servicio cuentan también en
+la vista que lo llamó.
+"""
+
+import contextvars
+import logging
+import time
+from contextlib import ExitStack
+from fnmatch import fnmatchcase
+from functools import wraps
+
+import structlog
+from django.conf import settings
+from django.db import connections
+
+from .metrics import (
+    CACHE_POR_ENDPOINT, CONSULTAS_POR_ENDPOINT, DURACION_ENDPOINT,
+    PRESUPUESTOS_EXCEDIDOS, TIEMPO_DB_ENDPOINT
+)
+
+logger = structlog.get_logger('commercebox.rendimiento')
+_nivel = logging.getLogger('commercebox.rendimiento')
+
+# Mediciones abiertas en el contexto actual (hilo / tarea asyncio)
+_activas = contextvars.ContextVar('commercebox_mediciones', default=())
+
+
+class PresupuestoExcedido(Exception):
+    """Una medición superó su presupuesto de consultas en modo 'error'"""
+
+
+def presupuesto_para(nombre):
+    """
+    Presupuesto configurado para `nombre`
+
+    Busca la clave exacta y luego los patrones (fnmatch) en el orden de
+    RENDIMIENTO_PRESUPUESTOS; '*' actúa como valor por defecto.
+
+    Returns:
+        dict: {'consultas', 'tiempo_ms', 'tiempo_db_ms'} (claves opcionales)
+    """
+    presupuestos = getattr(settings, 'RENDIMIENTO_PRESUPUESTOS', {})
+    if nombre in presupuestos:
+        return presupuestos[nombre]
+    for patron, limites in presupuestos.items():
+        if fnmatchcase(nombre, patron):
+            return limites
+    return {}
+
+
+def registrar_cache(aciertos=0, fallos=0):
+    """Suma lecturas de caché a las mediciones abiertas (ver cache.py)"""
+    for medicion in _activas.get():
+        medicion.cache_aciertos += aciertos
+        medicion.cache_fallos += fallos
+
+
+class Medicion:
+    """Contadores de una vista o servicio en curso"""
+
+    def __init__(self, nombre, tipo='servicio', presupuesto=None):
+        self.nombre = nombre
+        self.tipo = tipo
+        self.presupuesto = presupuesto
+        self.consultas = 0
+        self.tiempo_db = 0.0
+        self.cache_aciertos = 0
+        self.cache_fallos = 0
+        self.duracion = 0.0
+        self.extra = {}
+        self._pila = None
+        self._token = None
+        self._inicio = None
+
+    # ------------------------------------------------------------------
+
+    def _contar(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.tiempo_db += time.perf_counter() - inicio
+            self.consultas += 1
+
+    def __enter__(self):
+        self._pila = ExitStack()
+        for conexion in connections.all():
+            self._pila.enter_context(conexion.execute_wrapper(self._contar))
+        self._token = _activas.set(_activas.get() + (self,))
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo_exc, exc, tb):
+        self.duracion = time.perf_counter() - self._inicio
+        _activas.reset(self._token)
+        self._pila.close()
+        self._publicar(error=tipo_exc is not None)
+        return False
+
+    # ------------------------------------------------------------------
+
+    def excesos(self):
+        """Límites superados: [(limite, valor, maximo)]"""
+        limites = self.presupuesto if self.presupuesto is not None else presupuesto_para(self.nombre)
+        valores = {
+            'consultas': self.consultas,
+            'tiempo_ms': self.duracion * 1000,
+            'tiempo_db_ms': self.tiempo_db * 1000,
+        }
+        return [
+            (limite, valores[limite], maximo)
+            for limite, maximo in limites.items()
+            if limite in valores and maximo is not None and valores[limite] > maximo
+        ]
+
+    def _publicar(self, error=False):
+        etiquetas = {'endpoint': self.nombre, 'tipo': self.tipo}
+        DURACION_ENDPOINT.labels(**etiquetas).observe(self.duracion)
+        CONSULTAS_POR_ENDPOINT.labels(**etiquetas).observe(self.consultas)
+        TIEMPO_DB_ENDPOINT.labels(**etiquetas).observe(self.tiempo_db)
+        if self.cache_aciertos:
+            CACHE_POR_ENDPOINT.labels(resultado='acierto', **etiquetas).inc(self.cache_aciertos)
+        if self.cache_fallos:
+            CACHE_POR_ENDPOINT.labels(resultado='fallo', **etiquetas).inc(self.cache_fallos)
+
+        excesos = self.excesos()
+        for limite, _, _ in excesos:
+            PRESUPUESTOS_EXCEDIDOS.labels(endpoint=self.nombre, limite=limite).inc()
+
+        # Vistas en INFO (una línea por petición); servicios en DEBUG
+        nivel = logging.WARNING if excesos else (
+            logging.INFO if self.tipo == 'vista' else logging.DEBUG
+        )
+        if _nivel.isEnabledFor(nivel):
+            logger.log(
+                nivel,
+                'presupuesto_excedido' if excesos else 'medicion',
+                endpoint=self.nombre,
+                tipo=self.tipo,
+                consultas=self.consultas,
+                tiempo_db_ms=round(self.tiempo_db * 1000, 2),
+                cache_aciertos=self.cache_aciertos,
+                cache_fallos=self.cache_fallos,
+                duracion_ms=round(self.duracion * 1000, 2),
+                excesos={limite: {'valor': round(valor, 2), 'maximo': maximo}
+                         for limite, valor, maximo in excesos} or None,
+                **self.extra,
+            )
+
+        # Una excepción propia del bloque tiene prioridad sobre el presupuesto
+        if error or getattr(settings, 'RENDIMIENTO_PRESUPUESTO_MODO', 'log') != 'error':
+            return
+        consultas = [(valor, maximo) for limite, valor, maximo in excesos if limite == 'consultas']
+        if consultas:
+            valor, maximo = consultas[0]
+            raise PresupuestoExcedido(
+                f'{self.nombre}: {valor} consultas (presupuesto {maximo})'
+            )
+
+
+def medir(nombre, tipo='servicio', presupuesto=None):
+    """
+    Context manager que mide el bloque
+
+    Args:
+        nombre: Endpoint (view_name o Clase.metodo)
+        tipo: 'vista' o 'servicio'
+        presupuesto: Límites explícitos; por defecto RENDIMIENTO_PRESUPUESTOS
+    """
+    return Medicion(nombre, tipo=tipo, presupuesto=presupuesto)
+
+
+def instrumentado(nombre=None):
+    """
+    Decorador para métodos de servicio (debajo de @staticmethod / @classmethod)
+
+    Args:
+        nombre: Endpoint; por defecto `Clase.metodo`
+    """
+    def decorar(funcion):
+        endpoint = nombre or funcion.__qualname__
+
+        @wraps(funcion)
+        def envuelta(*args, **kwargs):
+            with Medicion(endpoint):
+                return funcion(*args, **kwargs)
+        return envuelta
+    return decorar
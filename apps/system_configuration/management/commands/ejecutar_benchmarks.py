@@ -0,0 +1,147 @@
+# apps/system_configuration/management/commands/ejecutar_benchmarks.py
+
+"""
+Microbenchmarks de las rutas críticas contra la línea base del repositorio
+Uso:
+    python manage.py ejecutar_benchmarks
+    python manage.py ejecutar_benchmarks --caso 'reporte:*' --repeticiones 20
+    python manage.py ejecutar_benchmarks --guardar
+    python manage.py ejecutar_benchmarks --tienda SN
+
+Por defecto genera la tienda sintética del perfil de lineas_base.json
+dentro de una transacción que se revierte al terminar: la base de datos
+no cambia y las consultas son comparables entre ejecuciones. Con --tienda
+se mide sobre una tienda ya generada (generar_tienda_sintetica).
+
+Termina con error si un caso falla o hace más consultas que su línea
+base; la latencia solo cuenta con --estricto. --guardar reescribe
+lineas_base.json con los resultados (revisar el diff antes de subirlo).
+"""
+
+import time
+from fnmatch import fnmatchcase
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from apps.system_configuration.benchmarks import (
+    CASOS, TiendaSintetica, comparar, ejecutar_casos, leer_linea_base
+)
+from apps.system_configuration.benchmarks.casos import guardar_linea_base
+
+
+class Command(BaseCommand):
+    help = 'Mide consultas y latencia de las rutas críticas y las compara con la línea base'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--caso',
+            action='append',
+            dest='casos',
+            help='Caso o patrón a medir (repetible; por defecto todos)'
+        )
+        parser.add_argument('--repeticiones', type=int, default=10, help='Repeticiones medidas por caso')
+        parser.add_argument('--calentamiento', type=int, default=1, help='Ejecuciones descartadas por caso')
+        parser.add_argument(
+            '--tolerancia',
+            type=float,
+            default=0.5,
+            help='Aumento de p50 admitido sobre la línea base (0.5 = +50%%)'
+        )
+        parser.add_argument('--tienda', help='Prefijo de una tienda ya generada (no se genera ni revierte)')
+        parser.add_argument('--linea-base', help='Ruta de la línea base (por defecto la del repositorio)')
+        parser.add_argument('--guardar', action='store_true', help='Reescribe la línea base con los resultados')
+        parser.add_argument('--estricto', action='store_true', help='Las regresiones de latencia también fallan')
+
+    def handle(self, *args, **options):
+        nombres = self._seleccionar(options['casos'])
+        linea_base = leer_linea_base(options['linea_base'])
+        perfil = linea_base.get('perfil') or {}
+
+        motor = connection.vendor
+        self.stdout.write(f"⏱  {len(nombres)} casos × {options['repeticiones']} repeticiones ({motor})")
+
+        if options['tienda']:
+            try:
+                muestras = TiendaSintetica.muestras(options['tienda'])
+            except ValueError as e:
+                raise CommandError(str(e))
+            resultados = self._medir(muestras, nombres, options)
+            perfil = {'tienda': muestras.prefijo}
+        else:
+            tienda = TiendaSintetica(**{
+                clave: valor for clave, valor in perfil.items()
+                if clave in ('productos', 'quintales', 'ventas_dia', 'dias', 'semilla', 'proporcion_granel')
+            })
+            self.stdout.write(
+                f"🏪 Tienda sintética: {tienda.productos} productos, {tienda.quintales} quintales, "
+                f"{tienda.ventas_dia} ventas/día × {tienda.dias} días (se revierte al terminar)"
+            )
+            with transaction.atomic():
+                inicio = time.perf_counter()
+                try:
+                    tienda.generar()
+                except ValueError as e:
+                    raise CommandError(str(e))
+                self.stdout.write(f'  generada en {time.perf_counter() - inicio:.1f} s')
+                resultados = self._medir(TiendaSintetica.muestras(tienda.prefijo), nombres, options)
+                perfil = tienda.perfil()
+                transaction.set_rollback(True)
+
+        referencias = linea_base.get('casos', {})
+        for nombre, resultado in resultados.items():
+            self._imprimir(nombre, resultado, referencias.get(nombre))
+
+        if options['guardar']:
+            if options['tienda'] or options['casos']:
+                raise CommandError('--guardar requiere la tienda del perfil y todos los casos')
+            guardar_linea_base(resultados, {**perfil, 'motor': motor}, options['linea_base'])
+            self.stdout.write(self.style.SUCCESS('💾 Línea base actualizada'))
+            return
+
+        if options['tienda']:
+            self.stdout.write(self.style.WARNING(
+                'Tienda distinta al perfil de la línea base: solo se informan los resultados'
+            ))
+            return
+        if linea_base.get('perfil', {}).get('motor') not in (None, motor):
+            self.stdout.write(self.style.WARNING(
+                f"La línea base se midió con {linea_base['perfil']['motor']}: las consultas pueden diferir"
+            ))
+
+        regresiones = comparar(resultados, linea_base, options['tolerancia'])
+        bloqueantes = [r for r in regresiones if r[1] != 'latencia' or options['estricto']]
+        for nombre, tipo, valor, referencia in regresiones:
+            estilo = self.style.ERROR if (nombre, tipo, valor, referencia) in bloqueantes else self.style.WARNING
+            self.stdout.write(estilo(f'  ✗ {nombre}: {tipo} {valor} (línea base {referencia})'))
+
+        if bloqueantes:
+            raise CommandError(f'{len(bloqueantes)} regresiones frente a la línea base')
+        self.stdout.write(self.style.SUCCESS('✓ Sin regresiones de consultas frente a la línea base'))
+
+    # ------------------------------------------------------------------
+
+    def _seleccionar(self, patrones):
+        if not patrones:
+            return list(CASOS)
+        nombres = [n for n in CASOS if any(fnmatchcase(n, p) for p in patrones)]
+        if not nombres:
+            raise CommandError(f'Ningún caso coincide con {", ".join(patrones)}')
+        return nombres
+
+    def _medir(self, muestras, nombres, options):
+        return ejecutar_casos(
+            muestras, nombres,
+            repeticiones=options['repeticiones'],
+            calentamiento=options['calentamiento'],
+        )
+
+    def _imprimir(self, nombre, resultado, referencia):
+        if 'error' in resultado:
+            self.stdout.write(self.style.ERROR(f"  {nombre:<55} ERROR {resultado['error']}"))
+            return
+        base = f"  (base {referencia['consultas']} / {referencia['p50_ms']:.1f} ms)" if referencia else '  (sin base)'
+        self.stdout.write(
+            f"  {nombre:<55} {resultado['consultas']:>4} consultas  "
+            f"p50 {resultado['p50_ms']:>8.2f}  p95 {resultado['p95_ms']:>8.2f} ms{base}"
+        )
@@ -0,0 +1,86 @@
+# apps/system_configuration/management/commands/generar_datos_masivos.py
+
+"""
+Genera datos sintéticos a escala (reportes, particiones, índices)
+Uso:
+    python manage.py generar_datos_masivos --productos 2000 --ventas-dia 1500 --anios 3
+    python manage.py generar_datos_masivos --prefijo MT --semilla 7 --dias 30 --lote 20000
+
+Las filas se insertan con COPY (PostgreSQL) o bulk_create, sin receivers;
+al terminar se reconstruyen StockActual, el calendario de vencimientos,
+EstadoStock, las estadísticas de clientes y la versión de datos de los
+reportes. Cada venta produce unas 11 filas (detalles, pagos, movimientos,
+asientos y caja): 1500 ventas/día durante 3 años rondan los 18 millones.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.system_configuration.benchmarks import GeneradorMasivo
+
+
+class Command(BaseCommand):
+    help = 'Genera un historial sintético masivo con semilla fija (COPY o bulk_create, sin signals)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--productos', type=int, default=500, help='Productos del catálogo')
+        parser.add_argument('--proveedores', type=int, default=20, help='Proveedores')
+        parser.add_argument('--clientes', type=int, default=2000, help='Clientes registrados')
+        parser.add_argument('--cajas', type=int, default=3, help='Cajas (una por cajero)')
+        parser.add_argument('--ventas-dia', type=int, default=200, help='Ventas por día')
+        parser.add_argument('--dias', type=int, default=90, help='Días de historial')
+        parser.add_argument('--anios', type=float, help='Años de historial; reemplaza --dias')
+        parser.add_argument('--semilla', type=int, default=42, help='Semilla del generador')
+        parser.add_argument('--prefijo', default='MS', help='Dos letras que identifican los datos')
+        parser.add_argument('--proporcion-granel', type=float, default=0.3, help='Fracción del catálogo a granel')
+        parser.add_argument('--tasa-devolucion', type=float, default=0.01, help='Fracción de ventas devueltas')
+        parser.add_argument('--lote', type=int, default=5000, help='Filas por inserción (una transacción)')
+
+    def handle(self, *args, **options):
+        try:
+            generador = GeneradorMasivo(
+                productos=options['productos'],
+                proveedores=options['proveedores'],
+                clientes=options['clientes'],
+                cajas=options['cajas'],
+                ventas_dia=options['ventas_dia'],
+                dias=options['dias'],
+                anios=options['anios'],
+                semilla=options['semilla'],
+                prefijo=options['prefijo'],
+                proporcion_granel=options['proporcion_granel'],
+                tasa_devolucion=options['tasa_devolucion'],
+                lote=options['lote'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            f"🏭 Datos {generador.prefijo}: {generador.productos} productos, {generador.clientes} clientes, "
+            f"{generador.cajas} cajas, {generador.ventas_dia} ventas/día durante {generador.dias} días "
+            f"(semilla {generador.semilla})"
+        )
+
+        inicio = time.perf_counter()
+
+        def progreso(dia, total):
+            if dia == total or dia % 30 == 0:
+                filas = sum(v for k, v in generador.resumen.items() if k != 'sin_stock')
+                self.stdout.write(
+                    f'  ... día {dia}/{total}: {filas:,} filas ({filas / (time.perf_counter() - inicio):,.0f}/s)'
+                )
+
+        try:
+            resumen = generador.generar(progreso=progreso)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        duracion = time.perf_counter() - inicio
+        filas = sum(v for k, v in resumen.items() if k != 'sin_stock')
+        for clave, valor in resumen.items():
+            self.stdout.write(f'  {clave:<24} {valor:>12,}')
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ {filas:,} filas en {duracion:.1f} s ({filas / duracion:,.0f} filas/s); '
+            f'usuario {generador.usuario.username}'
+        ))
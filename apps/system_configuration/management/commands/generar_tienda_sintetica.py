@@ -0,0 +1,72 @@
+# apps/system_configuration/management/commands/generar_tienda_sintetica.py
+
+"""
+Genera una tienda sintética reproducible
+Uso:
+    python manage.py generar_tienda_sintetica --productos 500 --quintales 2000 --ventas-dia 150 --anios 1
+    python manage.py generar_tienda_sintetica --prefijo TB --password clave123
+
+Las ventas pasan por POSService (mismo costo que en producción). El usuario
+sintetico_<prefijo> queda con la contraseña indicada para las pruebas de
+carga (benchmarks/locustfile.py).
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.system_configuration.benchmarks import TiendaSintetica
+
+
+class Command(BaseCommand):
+    help = 'Genera una tienda sintética (catálogo, quintales y ventas) con semilla fija'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--productos', type=int, default=50, help='Productos del catálogo (N)')
+        parser.add_argument('--quintales', type=int, default=100, help='Quintales a granel (M)')
+        parser.add_argument('--ventas-dia', type=int, default=20, help='Ventas por día (K)')
+        parser.add_argument('--dias', type=int, default=30, help='Días de historial')
+        parser.add_argument('--anios', type=float, help='Años de historial (Y); reemplaza --dias')
+        parser.add_argument('--semilla', type=int, default=42, help='Semilla del generador')
+        parser.add_argument('--prefijo', default='SN', help='Dos letras que identifican la tienda')
+        parser.add_argument('--password', help='Contraseña del usuario sintetico_<prefijo>')
+
+    def handle(self, *args, **options):
+        try:
+            tienda = TiendaSintetica(
+                productos=options['productos'],
+                quintales=options['quintales'],
+                ventas_dia=options['ventas_dia'],
+                dias=options['dias'],
+                anios=options['anios'],
+                semilla=options['semilla'],
+                prefijo=options['prefijo'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            f"🏪 Tienda {tienda.prefijo}: {tienda.productos} productos, {tienda.quintales} quintales, "
+            f"{tienda.ventas_dia} ventas/día durante {tienda.dias} días (semilla {tienda.semilla})"
+        )
+
+        def progreso(dia, total):
+            if dia == total or dia % 30 == 0:
+                self.stdout.write(f'  ... día {dia}/{total}')
+
+        inicio = time.perf_counter()
+        try:
+            resumen = tienda.generar(progreso=progreso)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if options['password']:
+            tienda.usuario.set_password(options['password'])
+            tienda.usuario.save(update_fields=['password'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ {resumen['productos']} productos, {resumen['quintales']} quintales, "
+            f"{resumen['ventas']} ventas ({resumen['lineas']} líneas, "
+            f"{resumen['sin_stock']} sin stock) en {time.perf_counter() - inicio:.1f} s; "
+            f"usuario {tienda.usuario.username}"
+        ))
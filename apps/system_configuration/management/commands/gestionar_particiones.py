@@ -0,0 +1,95 @@
+# apps/system_configuration/management/commands/gestionar_particiones.py
+
+"""
+Particiones mensuales y archivo de las tablas históricas
+Uso:
+    python manage.py gestionar_particiones              # crear + archivar
+    python manage.py gestionar_particiones estado
+    python manage.py gestionar_particiones crear --meses 6
+    python manage.py gestionar_particiones archivar --simular
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+
+from apps.system_configuration.services import CicloVidaDatosService
+
+
+class Command(BaseCommand):
+    help = 'Crea particiones futuras y archiva los meses vencidos de las tablas históricas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'accion',
+            nargs='?',
+            default='mantener',
+            choices=['mantener', 'estado', 'crear', 'archivar'],
+            help='Acción a ejecutar (por defecto crear y archivar)'
+        )
+        parser.add_argument(
+            '--meses',
+            type=int,
+            default=None,
+            help='Meses futuros con partición (por defecto DATOS_PARTICIONES_ADELANTE)'
+        )
+        parser.add_argument(
+            '--simular',
+            action='store_true',
+            help='Mostrar qué meses se archivarían sin modificar nada'
+        )
+
+    def handle(self, *args, **options):
+        accion = options['accion']
+
+        if accion == 'estado':
+            self._estado()
+            return
+
+        if accion in ('mantener', 'crear') and not options['simular']:
+            creadas = CicloVidaDatosService.crear_particiones(meses_adelante=options['meses'])
+            for nombre in creadas:
+                self.stdout.write(f'  + {nombre}')
+            self.stdout.write(self.style.SUCCESS(f'📅 Particiones creadas: {len(creadas)}'))
+
+        if accion in ('mantener', 'archivar'):
+            try:
+                archivados = CicloVidaDatosService.archivar(simular=options['simular'])
+            except Exception as e:
+                raise CommandError(f'Error al archivar: {str(e)}')
+
+            for archivado in archivados:
+                if options['simular']:
+                    self.stdout.write(f"  · {archivado['tabla']} {archivado['mes']:%Y-%m}")
+                else:
+                    self.stdout.write(
+                        f"  ✓ {archivado['tabla']} {archivado['mes']:%Y-%m}: "
+                        f"{archivado['filas']} filas → {archivado['archivo']}"
+                    )
+            verbo = 'por archivar' if options['simular'] else 'archivados'
+            self.stdout.write(self.style.SUCCESS(f'📦 Meses {verbo}: {len(archivados)}'))
+
+    def _estado(self):
+        particiones = CicloVidaDatosService.soporta_particiones()
+
+        for tabla in CicloVidaDatosService.tablas():
+            corte = tabla.corte()
+            if particiones and CicloVidaDatosService.es_particionada(tabla.tabla):
+                meses = sorted(CicloVidaDatosService.particiones(tabla.tabla))
+                detalle = (
+                    f'{len(meses)} particiones ({meses[0]:%Y-%m} → {meses[-1]:%Y-%m})'
+                    if meses else 'sin particiones mensuales'
+                )
+                en_default = CicloVidaDatosService.meses_en_default(tabla)
+                if en_default:
+                    detalle += (
+                        f', {sum(en_default.values())} filas en DEFAULT '
+                        f'({min(en_default):%Y-%m} → {max(en_default):%Y-%m})'
+                    )
+            else:
+                primero = tabla.modelo.objects.aggregate(primero=Min(tabla.campo))['primero']
+                detalle = 'sin particionar' + (f', desde {primero:%Y-%m-%d}' if primero else ', vacía')
+
+            self.stdout.write(
+                f'{tabla.tabla:<32} {detalle}; retención {tabla.retencion_meses} meses '
+                f'(se conserva desde {corte:%Y-%m})'
+            )
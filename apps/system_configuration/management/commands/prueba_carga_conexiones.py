@@ -0,0 +1,207 @@
+# apps/system_configuration/management/commands/prueba_carga_conexiones.py
+
+"""
+Prueba de carga de conexiones a la base de datos
+Uso:
+    python manage.py prueba_carga_conexiones --usuario admin --url /panel/ --url /api/...
+    python manage.py prueba_carga_conexiones --peticiones 500 --concurrencia 16
+
+Atiende las peticiones en proceso con el WSGIHandler de Django desde varios
+hilos (como un servidor con hilos), de modo que se disparan las señales
+request_started / request_finished que abren y cierran conexiones según
+CONN_MAX_AGE. Compara la misma carga sin persistencia (CONN_MAX_AGE=0) y
+con persistencia, e informa conexiones abiertas, consultas por petición y
+latencias p50 / p95.
+
+Con PgBouncer (COMMERCEBOX_DB_POOLER=pgbouncer) las conexiones contadas son
+contra el pooler; las reales a PostgreSQL se ven en SHOW POOLS.
+"""
+
+import io
+import threading
+import time
+from http.cookies import SimpleCookie
+from urllib.parse import urlsplit
+from wsgiref.util import setup_testing_defaults
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.signals import connection_created
+
+from apps.system_configuration.benchmarks.casos import crear_sesion, percentil
+
+
+class Command(BaseCommand):
+    help = 'Mide conexiones abiertas y latencias con y sin conexiones persistentes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url',
+            action='append',
+            dest='urls',
+            help='Ruta a solicitar (repetible; por defecto /)'
+        )
+        parser.add_argument('--peticiones', type=int, default=200, help='Peticiones por modo')
+        parser.add_argument('--concurrencia', type=int, default=8, help='Hilos simultáneos')
+        parser.add_argument(
+            '--usuario',
+            help='Username con el que se autentican las peticiones (crea una sesión temporal)'
+        )
+        parser.add_argument(
+            '--conn-max-age',
+            type=int,
+            default=None,
+            help='CONN_MAX_AGE del modo persistente (por defecto el configurado, o 60)'
+        )
+
+    def handle(self, *args, **options):
+        urls = options['urls'] or ['/']
+        peticiones = options['peticiones']
+        concurrencia = max(1, min(options['concurrencia'], peticiones))
+
+        alias = DEFAULT_DB_ALIAS
+        configuracion = connections.settings[alias]
+        original = configuracion.get('CONN_MAX_AGE', 0)
+        persistente = options['conn_max_age'] or original or 60
+
+        sesion = self._crear_sesion(options['usuario']) if options['usuario'] else None
+        handler = WSGIHandler()
+
+        self.stdout.write(
+            f"🔌 {peticiones} peticiones por modo, {concurrencia} hilos, "
+            f"motor {configuracion['ENGINE'].rsplit('.', 1)[-1]}, "
+            f"sesiones {settings.SESSION_ENGINE.rsplit('.', 1)[-1]}"
+        )
+
+        resultados = {}
+        try:
+            for nombre, conn_max_age in (('sin persistencia', 0), ('persistente', persistente)):
+                configuracion['CONN_MAX_AGE'] = conn_max_age
+                connections.close_all()
+                resultados[nombre] = self._ejecutar(
+                    handler, alias, urls, peticiones, concurrencia, sesion
+                )
+                self._imprimir(f'{nombre} (CONN_MAX_AGE={conn_max_age})', resultados[nombre])
+        finally:
+            configuracion['CONN_MAX_AGE'] = original
+            if sesion:
+                sesion.delete()
+
+        antes, despues = resultados['sin persistencia'], resultados['persistente']
+        if antes['conexiones']:
+            reduccion = 100 * (1 - despues['conexiones'] / antes['conexiones'])
+            self.stdout.write(self.style.SUCCESS(
+                f"📉 Conexiones abiertas: {antes['conexiones']} → {despues['conexiones']} "
+                f"(-{reduccion:.0f}%); p95 {antes['p95']:.1f} → {despues['p95']:.1f} ms"
+            ))
+
+    # ------------------------------------------------------------------
+
+    def _crear_sesion(self, username):
+        try:
+            usuario = get_user_model().objects.get(username=username)
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'No existe el usuario {username}')
+        return crear_sesion(usuario)
+
+    def _environ(self, url, sesion):
+        partes = urlsplit(url)
+        environ = {
+            'PATH_INFO': partes.path or '/',
+            'QUERY_STRING': partes.query,
+            'REQUEST_METHOD': 'GET',
+            'SERVER_NAME': 'localhost',
+            'HTTP_HOST': 'localhost',
+            'REMOTE_ADDR': '127.0.0.1',
+            'HTTP_USER_AGENT': 'commercebox-prueba-carga',
+            'wsgi.input': io.BytesIO(),
+            # Evita la redirección a HTTPS de producción
+            'wsgi.url_scheme': 'https',
+            'HTTPS': 'on',
+        }
+        if sesion:
+            cookie = SimpleCookie()
+            cookie[settings.SESSION_COOKIE_NAME] = sesion.session_key
+            environ['HTTP_COOKIE'] = cookie.output(header='', sep='; ').strip()
+        setup_testing_defaults(environ)
+        return environ
+
+    def _ejecutar(self, handler, alias, urls, peticiones, concurrencia, sesion):
+        bloqueo = threading.Lock()
+        latencias = []
+        estados = {}
+        totales = {'conexiones': 0, 'consultas': 0}
+
+        def conexion_creada(sender, connection, **kwargs):
+            if connection.alias == alias:
+                with bloqueo:
+                    totales['conexiones'] += 1
+
+        def trabajador(indices):
+            consultas = [0]
+
+            def contar(execute, sql, params, many, context):
+                consultas[0] += 1
+                return execute(sql, params, many, context)
+
+            propias = []
+            try:
+                with connections[alias].execute_wrapper(contar):
+                    for indice in indices:
+                        estado = []
+                        inicio = time.perf_counter()
+                        respuesta = handler(
+                            self._environ(urls[indice % len(urls)], sesion),
+                            lambda status, headers, *args: estado.append(status)
+                        )
+                        for _ in respuesta:
+                            pass
+                        # close() dispara request_finished (cierre de conexiones obsoletas)
+                        respuesta.close()
+                        propias.append((time.perf_counter() - inicio) * 1000)
+                        codigo = estado[0].split()[0] if estado else '???'
+                        with bloqueo:
+                            estados[codigo] = estados.get(codigo, 0) + 1
+            finally:
+                connections.close_all()
+                with bloqueo:
+                    latencias.extend(propias)
+                    totales['consultas'] += consultas[0]
+
+        connection_created.connect(conexion_creada)
+        try:
+            hilos = [
+                threading.Thread(target=trabajador, args=(range(i, peticiones, concurrencia),))
+                for i in range(concurrencia)
+            ]
+            inicio = time.perf_counter()
+            for hilo in hilos:
+                hilo.start()
+            for hilo in hilos:
+                hilo.join()
+            duracion = time.perf_counter() - inicio
+        finally:
+            connection_created.disconnect(conexion_creada)
+
+        return {
+            'conexiones': totales['conexiones'],
+            'consultas_por_peticion': totales['consultas'] / max(1, len(latencias)),
+            'p50': percentil(latencias, 50),
+            'p95': percentil(latencias, 95),
+            'rps': len(latencias) / duracion if duracion else 0,
+            'estados': estados,
+        }
+
+    def _imprimir(self, titulo, resultado):
+        estados = ', '.join(f'{codigo}: {n}' for codigo, n in sorted(resultado['estados'].items()))
+        self.stdout.write(
+            f"\n  {titulo}\n"
+            f"    Conexiones abiertas:   {resultado['conexiones']}\n"
+            f"    Consultas / petición:  {resultado['consultas_por_peticion']:.1f}\n"
+            f"    Latencia p50 / p95:    {resultado['p50']:.1f} / {resultado['p95']:.1f} ms\n"
+            f"    Peticiones/s:          {resultado['rps']:.0f}\n"
+            f"    Respuestas:            {estados}"
+        )
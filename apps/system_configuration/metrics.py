@@ -0,0 +1,169 @@
+# apps/system_configuration/metrics.py
+
+"""
+Métricas Prometheus de CommerceBox
+
+- Contadores / histogramas de la aplicación (latencia de checkout,
+  consultas por petición, consultas / tiempo / caché por endpoint),
+  alimentados en el propio proceso.
+- SaludCollector: expone la última muestra del buffer de salud
+  (HealthMonitorService) al momento del scrape, sin ejecutar sondas.
+
+Con varios procesos (gunicorn) definir PROMETHEUS_MULTIPROC_DIR para que
+los histogramas de todos los workers se agreguen en `/metrics`.
+"""
+
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+)
+from prometheus_client.core import GaugeMetricFamily
+
+
+# ============================================================================
+# MÉTRICAS DE LA APLICACIÓN
+# ============================================================================
+
+DURACION_CHECKOUT = Histogram(
+    'commercebox_checkout_duration_seconds',
+    'Tiempo de finalización de una venta en el POS',
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10)
+)
+
+CONSULTAS_POR_PETICION = Histogram(
+    'commercebox_db_queries_per_request',
+    'Consultas SQL ejecutadas por petición HTTP',
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500)
+)
+
+# Por endpoint (view_name o Clase.metodo), ver instrumentacion.py
+DURACION_ENDPOINT = Histogram(
+    'commercebox_endpoint_duration_seconds',
+    'Tiempo total de una vista o método de servicio',
+    ['endpoint', 'tipo'],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+
+CONSULTAS_POR_ENDPOINT = Histogram(
+    'commercebox_endpoint_db_queries',
+    'Consultas SQL de una vista o método de servicio',
+    ['endpoint', 'tipo'],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+)
+
+TIEMPO_DB_ENDPOINT = Histogram(
+    'commercebox_endpoint_db_seconds',
+    'Tiempo en la base de datos de una vista o método de servicio',
+    ['endpoint', 'tipo'],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+)
+
+CACHE_POR_ENDPOINT = Counter(
+    'commercebox_endpoint_cache_reads',
+    'Lecturas de caché por endpoint y resultado (acierto / fallo)',
+    ['endpoint', 'tipo', 'resultado']
+)
+
+PRESUPUESTOS_EXCEDIDOS = Counter(
+    'commercebox_performance_budget_exceeded',
+    'Mediciones que superaron su presupuesto (RENDIMIENTO_PRESUPUESTOS)',
+    ['endpoint', 'limite']
+)
+
+
+# ============================================================================
+# SALUD DEL SISTEMA
+# ============================================================================
+
+COMPONENTES = ('base_datos', 'redis', 'celery', 'disco', 'memoria')
+
+GAUGES_MUESTRA = (
+    ('tiempo_respuesta_db_ms', 'commercebox_db_response_milliseconds',
+     'Tiempo de respuesta de la base de datos en la última muestra'),
+    ('espacio_disco_libre_gb', 'commercebox_disk_free_gigabytes', 'Espacio libre en disco'),
+    ('uso_disco_porcentaje', 'commercebox_disk_usage_percent', 'Uso del disco'),
+    ('uso_memoria_porcentaje', 'commercebox_memory_usage_percent', 'Uso de memoria RAM'),
+    ('uso_cpu_porcentaje', 'commercebox_cpu_usage_percent', 'Uso de CPU'),
+    ('celery_workers', 'commercebox_celery_workers', 'Workers de Celery que respondieron al ping'),
+    ('cola_celery', 'commercebox_celery_queue_length', 'Mensajes en espera en la cola de Celery'),
+    ('latencia_cola_celery_s', 'commercebox_celery_queue_lag_seconds',
+     'Tiempo entre encolar y ejecutar la tarea testigo'),
+    ('cola_impresion', 'commercebox_print_queue_depth', 'Trabajos de impresión pendientes'),
+)
+
+
+class SaludCollector:
+    """Traduce la última muestra del buffer de salud a métricas Prometheus"""
+
+    def collect(self):
+        from django.utils.dateparse import parse_datetime
+        from django.utils import timezone
+        from .services import HealthMonitorService
+
+        try:
+            muestra = HealthMonitorService.ultima_muestra()
+        except Exception:
+            muestra = None
+        if not muestra:
+            return
+
+        arriba = GaugeMetricFamily(
+            'commercebox_component_up',
+            'Componente disponible en la última muestra (1 = sí)',
+            labels=['componente']
+        )
+        for componente in COMPONENTES:
+            arriba.add_metric([componente], 1 if muestra.get(f'{componente}_ok') else 0)
+        yield arriba
+
+        estado = GaugeMetricFamily(
+            'commercebox_health_status',
+            'Estado general de la última muestra (1 en el estado vigente)',
+            labels=['estado']
+        )
+        for valor in ('SALUDABLE', 'ADVERTENCIA', 'CRITICO'):
+            estado.add_metric([valor], 1 if muestra.get('estado_general') == valor else 0)
+        yield estado
+
+        for clave, nombre, descripcion in GAUGES_MUESTRA:
+            valor = muestra.get(clave)
+            if valor is not None:
+                yield GaugeMetricFamily(nombre, descripcion, value=float(valor))
+
+        fecha = parse_datetime(muestra.get('fecha') or '')
+        if fecha:
+            yield GaugeMetricFamily(
+                'commercebox_health_sample_age_seconds',
+                'Antigüedad de la última muestra de salud',
+                value=(timezone.now() - fecha).total_seconds()
+            )
+
+
+_collector_salud = SaludCollector()
+
+
+def registrar_collector_salud():
+    """Registra SaludCollector en el registro global (idempotente)"""
+    try:
+        REGISTRY.register(_collector_salud)
+    except ValueError:
+        pass
+
+
+def exportar_metricas():
+    """
+    Texto de exposición Prometheus
+
+    Returns:
+        tuple: (contenido, content_type)
+    """
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+
+        registro = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registro)
+        registro.register(_collector_salud)
+    else:
+        registro = REGISTRY
+    return generate_latest(registro), CONTENT_TYPE_LATEST
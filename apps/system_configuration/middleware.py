@@ -0,0 +1,38 @@
+# apps/system_configuration/middleware.py
+
+from .instrumentacion import medir
+from .metrics import CONSULTAS_POR_PETICION
+
+
+class MetricasConsultasMiddleware:
+    """
+    Mide cada petición (consultas SQL, tiempo en la BD, caché y tiempo
+    total) por endpoint; ver instrumentacion.py. Mantiene además el
+    histograma global commercebox_db_queries_per_request.
+    """
+
+    RUTAS_EXCLUIDAS = ('/metrics', '/static/', '/media/')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.path.startswith(self.RUTAS_EXCLUIDAS):
+            return self.get_response(request)
+
+        # El nombre se conoce después de resolver la URL
+        with medir('sin_ruta', tipo='vista') as medicion:
+            response = self.get_response(request)
+            medicion.nombre = self.nombre_endpoint(request)
+            medicion.extra = {'metodo': request.method, 'status': response.status_code}
+
+        CONSULTAS_POR_PETICION.observe(medicion.consultas)
+        return response
+
+    @staticmethod
+    def nombre_endpoint(request):
+        """view_name de la URL resuelta (cardinalidad acotada para Prometheus)"""
+        resolucion = getattr(request, 'resolver_match', None)
+        if resolucion is None:
+            return 'sin_ruta'
+        return resolucion.view_name or resolucion._func_path
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("system_configuration", "0004_healthcheck_uso_cpu_porcentaje_and_more"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="registrobackup",
+            name="tipo_backup",
+            field=models.CharField(
+                choices=[
+                    ("COMPLETO", "Backup Completo"),
+                    ("INCREMENTAL", "Backup Incremental"),
+                    ("MANUAL", "Backup Manual"),
+                    ("ARCHIVO", "Archivo de datos históricos"),
+                ],
+                max_length=20,
+            ),
+        ),
+    ]
@@ -0,0 +1,144 @@
+"""
+Convierte las tablas históricas en tablas particionadas por mes (solo
+PostgreSQL). En otros motores no hace nada.
+
+La conversión copia las filas a la nueva tabla particionada; en bases de
+datos grandes conviene ejecutarla en una ventana de mantenimiento.
+
+El DDL está aquí y no en CicloVidaDatosService para que la migración siga
+haciendo lo mismo aunque el servicio cambie. No es reversible: volver a
+tablas simples no se automatiza y `migrate` hacia atrás falla.
+"""
+
+import re
+from datetime import date, datetime, time
+
+from django.db import migrations
+from django.utils import timezone
+
+
+# (tabla, columna de fecha): fijas aquí para que la migración no dependa
+# del estado futuro de los modelos
+TABLAS = [
+    ('inv_movimiento_inventario', 'fecha_movimiento'),
+    ('inv_movimiento_quintal', 'fecha_movimiento'),
+    ('fin_movimiento_caja', 'fecha_movimiento'),
+    ('authentication_logacceso', 'fecha_evento'),
+    ('notif_log', 'fecha_intento'),
+    ('stock_alert_historial_estado', 'fecha_cambio'),
+    ('stock_alert_historial', 'fecha'),
+    ('hw_registro_impresion', 'fecha_impresion'),
+]
+
+# Meses futuros con partición al convertir (luego los crea la tarea diaria)
+MESES_ADELANTE = 3
+
+
+def _sumar_meses(mes, meses):
+    indice = mes.year * 12 + mes.month - 1 + meses
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+def _limite_mes(mes):
+    return timezone.make_aware(datetime.combine(mes, time.min))
+
+
+def _particionar_tabla(cursor, tabla, columna):
+    """
+    Tabla particionada con la misma estructura, una partición por mes con
+    datos hasta MESES_ADELANTE más una DEFAULT, filas copiadas y
+    clave primaria (id, columna), índices y claves foráneas recreados
+    """
+    q = cursor.db.ops.quote_name
+    anterior = f'{tabla}_sin_particion'
+
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [tabla])
+    fila = cursor.fetchone()
+    if not fila or fila[0] == 'p':
+        return
+
+    cursor.execute(f'SELECT MIN({q(columna)}) FROM {q(tabla)}')
+    minimo = cursor.fetchone()[0]
+
+    cursor.execute(
+        """
+        SELECT pg_get_indexdef(indexrelid), indisunique
+        FROM pg_index
+        WHERE indrelid = to_regclass(%s) AND NOT indisprimary
+        """,
+        [tabla]
+    )
+    indices = cursor.fetchall()
+    cursor.execute(
+        """
+        SELECT conname, pg_get_constraintdef(oid)
+        FROM pg_constraint
+        WHERE conrelid = to_regclass(%s) AND contype = 'f'
+        """,
+        [tabla]
+    )
+    foraneas = cursor.fetchall()
+
+    cursor.execute(f'ALTER TABLE {q(tabla)} RENAME TO {q(anterior)}')
+    cursor.execute(
+        f'CREATE TABLE {q(tabla)} '
+        f'(LIKE {q(anterior)} INCLUDING ALL EXCLUDING INDEXES) '
+        f'PARTITION BY RANGE ({q(columna)})'
+    )
+
+    hoy = timezone.localdate().replace(day=1)
+    mes = timezone.localtime(minimo).date().replace(day=1) if minimo else hoy
+    while mes <= _sumar_meses(hoy, MESES_ADELANTE):
+        cursor.execute(
+            f'CREATE TABLE {q(f"{tabla}_p{mes:%Y%m}")} '
+            f'PARTITION OF {q(tabla)} FOR VALUES FROM (%s) TO (%s)',
+            [_limite_mes(mes), _limite_mes(_sumar_meses(mes, 1))]
+        )
+        mes = _sumar_meses(mes, 1)
+    cursor.execute(f'CREATE TABLE {q(tabla + "_pdefault")} PARTITION OF {q(tabla)} DEFAULT')
+
+    cursor.execute(f'INSERT INTO {q(tabla)} SELECT * FROM {q(anterior)}')
+    cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [tabla])
+    secuencia = cursor.fetchone()[0]
+    if secuencia:
+        cursor.execute(
+            f'SELECT setval(%s, COALESCE((SELECT MAX("id") FROM {q(tabla)}), 0) + 1, false)',
+            [secuencia]
+        )
+    cursor.execute(f'DROP TABLE {q(anterior)}')
+
+    cursor.execute(f'ALTER TABLE {q(tabla)} ADD PRIMARY KEY ("id", {q(columna)})')
+    for definicion, unico in indices:
+        # Un índice único sin la clave de partición no se puede crear
+        if unico:
+            continue
+        cursor.execute(re.sub(r' ON (ONLY )?\S+ ', f' ON {q(tabla)} ', definicion, count=1))
+    for nombre, definicion in foraneas:
+        cursor.execute(f'ALTER TABLE {q(tabla)} ADD CONSTRAINT {q(nombre)} {definicion}')
+
+
+def particionar(apps, schema_editor):
+    conexion = schema_editor.connection
+    if conexion.vendor != 'postgresql':
+        return
+    with conexion.cursor() as cursor:
+        for tabla, columna in TABLAS:
+            _particionar_tabla(cursor, tabla, columna)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('system_configuration', '0005_registrobackup_tipo_archivo'),
+        ('authentication', '0003_alter_logacceso_tipo_evento_alter_usuario_rol'),
+        ('inventory_management', '0006_alter_quintal_codigo_quintal'),
+        ('financial_management', '0002_cuentaporcobrar_cuentaporpagar_pagocuentaporpagar_and_more'),
+        ('notifications', '0001_initial'),
+        ('stock_alert_system', '0002_estadostock_historialestado_and_more'),
+        ('hardware_integration', '0002_trabajoimpresion'),
+    ]
+
+    # Sin reverse_code: revertir a tablas simples no se automatiza
+    operations = [
+        migrations.RunPython(particionar),
+    ]
@@ -409,6 +409,9 @@ class ConfiguracionSistema(models.Model):
     def get_config(cls):
         """Obtiene o crea la configuración única"""
         config, created = cls.objects.get_or_create(pk=1)
+        if created:
+            # Los defaults de los DecimalField son float hasta releer la fila
+            config.refresh_from_db()
         return config
     
     def get_emails_notificacion(self):
@@ -434,6 +437,7 @@ class RegistroBackup(models.Model):
         ('COMPLETO', 'Backup Completo'),
         ('INCREMENTAL', 'Backup Incremental'),
         ('MANUAL', 'Backup Manual'),
+        ('ARCHIVO', 'Archivo de datos históricos'),
     ]
     
     ESTADO_CHOICES = [
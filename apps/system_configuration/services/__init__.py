@@ -0,0 +1,7 @@
+from .ciclo_datos import CicloVidaDatosService
+from .health_monitor import HealthMonitorService
+
+__all__ = [
+    'CicloVidaDatosService',
+    'HealthMonitorService',
+]
@@ -0,0 +1,359 @@
+# apps/system_configuration/services/health_monitor.py
+
+"""
+Monitoreo continuo y liviano de la salud del sistema.
+
+Las sondas (base de datos, Redis, Celery, disco, memoria, CPU, colas) se
+ejecutan en segundo plano desde la tarea periódica `muestrear_salud_sistema`
+y cada muestra se guarda en un buffer circular en cache. Las vistas y el
+endpoint `/metrics` leen ese buffer en lugar de volver a sondear dentro de
+la petición.
+
+Los registros HealthCheck se persisten submuestreados: sólo cuando cambia
+el estado general o cuando la última fila persistida es más antigua que
+HEALTH_PERSISTENCIA_MINUTOS. `compactar()` reduce además el histórico a una
+fila por hora pasado un día y elimina lo que supera la retención.
+"""
+
+import logging
+import time
+from datetime import timedelta
+
+import psutil
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Min
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from ..models import HealthCheck
+
+logger = logging.getLogger('commercebox')
+
+
+CACHE_MUESTRAS = 'salud:muestras'
+CACHE_LATENCIA_COLA = 'salud:latencia_cola'
+
+# Umbrales de las sondas
+DB_LENTA_MS = 100
+DISCO_MIN_LIBRE_GB = 1
+DISCO_CRITICO_PCT = 90
+DISCO_ALTO_PCT = 80
+MEMORIA_CRITICA_PCT = 95
+MEMORIA_ALTA_PCT = 85
+
+
+class HealthMonitorService:
+    """
+    Sondas de salud, buffer circular de muestras y persistencia submuestreada
+    """
+
+    # ========================================================================
+    # SONDAS
+    # ========================================================================
+
+    @staticmethod
+    def probar_base_datos():
+        """Returns: (ok, tiempo_ms, error)"""
+        try:
+            inicio = time.perf_counter()
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+            tiempo = int((time.perf_counter() - inicio) * 1000)
+            if tiempo > DB_LENTA_MS:
+                return True, tiempo, f'Tiempo de respuesta lento (>{DB_LENTA_MS}ms)'
+            return True, tiempo, None
+        except Exception as e:
+            return False, None, str(e)
+
+    @staticmethod
+    def probar_redis():
+        """Returns: (ok, error)"""
+        try:
+            cache.set('health_check', 'ok', 10)
+            if cache.get('health_check') == 'ok':
+                return True, None
+            return False, 'No se pudo leer valor de cache'
+        except Exception as e:
+            return False, str(e)
+
+    @staticmethod
+    def probar_celery(timeout=1.0):
+        """
+        Ping a los workers (más liviano que inspect().stats())
+
+        Returns: (ok, workers, error)
+        """
+        try:
+            from celery import current_app
+            respuestas = current_app.control.inspect(timeout=timeout).ping()
+            if respuestas:
+                return True, len(respuestas), None
+            return False, 0, 'No hay workers activos'
+        except Exception as e:
+            return False, 0, str(e)
+
+    @staticmethod
+    def probar_disco(ruta='/'):
+        """Returns: (ok, libre_gb, uso_pct, error)"""
+        try:
+            disco = psutil.disk_usage(ruta)
+            libre_gb = disco.free / (1024 ** 3)
+            uso = disco.percent
+            if libre_gb < DISCO_MIN_LIBRE_GB:
+                return False, libre_gb, uso, f'Espacio crítico: solo {libre_gb:.2f} GB libres'
+            if uso > DISCO_CRITICO_PCT:
+                return False, libre_gb, uso, f'Disco casi lleno: {uso}% usado'
+            if uso > DISCO_ALTO_PCT:
+                return True, libre_gb, uso, f'Espacio limitado: {uso}% usado'
+            return True, libre_gb, uso, None
+        except Exception as e:
+            return False, 0, 0, str(e)
+
+    @staticmethod
+    def probar_memoria():
+        """Returns: (ok, uso_pct, error)"""
+        try:
+            uso = psutil.virtual_memory().percent
+            if uso > MEMORIA_CRITICA_PCT:
+                return False, uso, f'Memoria crítica: {uso}% usado'
+            if uso > MEMORIA_ALTA_PCT:
+                return True, uso, f'Memoria alta: {uso}% usado'
+            return True, uso, None
+        except Exception as e:
+            return False, 0, str(e)
+
+    @staticmethod
+    def probar_cpu():
+        """
+        Uso de CPU desde la llamada anterior, sin bloquear
+
+        En un proceso de larga vida (worker) cada muestra mide el intervalo
+        transcurrido desde la muestra previa.
+        """
+        try:
+            return psutil.cpu_percent(interval=None)
+        except Exception as e:
+            logger.warning(f"Error al verificar CPU: {str(e)}")
+            return 0
+
+    @staticmethod
+    def profundidad_cola_impresion():
+        """Trabajos de impresión pendientes o en proceso"""
+        try:
+            from apps.hardware_integration.models import TrabajoImpresion
+            return TrabajoImpresion.objects.filter(
+                estado__in=['PENDIENTE', 'PROCESANDO']
+            ).count()
+        except Exception as e:
+            logger.warning(f"No se pudo medir la cola de impresión: {str(e)}")
+            return None
+
+    @staticmethod
+    def longitud_cola_celery(cola=None):
+        """
+        Mensajes en espera en el broker (sólo Redis)
+
+        Sin `cola`, el total de todas las colas declaradas (realtime,
+        stock, reportes, ...).
+        """
+        try:
+            from celery import current_app
+            colas = [cola] if cola else list(current_app.amqp.queues.keys())
+            with current_app.connection_for_read() as conexion:
+                cliente = conexion.default_channel.client
+                return sum(cliente.llen(nombre) for nombre in colas)
+        except Exception:
+            return None
+
+    # ========================================================================
+    # MUESTREO
+    # ========================================================================
+
+    @classmethod
+    def muestrear(cls):
+        """
+        Ejecuta todas las sondas y devuelve una muestra serializable
+
+        Returns:
+            dict: estado, componentes, métricas, errores y advertencias
+        """
+        errores = []
+        advertencias = []
+
+        db_ok, db_tiempo, db_error = cls.probar_base_datos()
+        if not db_ok:
+            errores.append(f'Base de datos: {db_error}')
+        elif db_error:
+            advertencias.append(f'Base de datos: {db_error}')
+
+        redis_ok, redis_error = cls.probar_redis()
+        if not redis_ok:
+            advertencias.append(f'Redis: {redis_error}')
+
+        celery_ok, celery_workers, celery_error = cls.probar_celery()
+        if not celery_ok:
+            advertencias.append(f'Celery: {celery_error}')
+
+        disco_ok, disco_libre, disco_uso, disco_error = cls.probar_disco()
+        if disco_error:
+            advertencias.append(f'Disco: {disco_error}')
+
+        memoria_ok, memoria_uso, memoria_error = cls.probar_memoria()
+        if memoria_error:
+            advertencias.append(f'Memoria: {memoria_error}')
+
+        if errores:
+            estado_general = 'CRITICO'
+        elif advertencias:
+            estado_general = 'ADVERTENCIA'
+        else:
+            estado_general = 'SALUDABLE'
+
+        return {
+            'fecha': timezone.now().isoformat(),
+            'estado_general': estado_general,
+            'base_datos_ok': db_ok,
+            'redis_ok': redis_ok,
+            'celery_ok': celery_ok,
+            'disco_ok': disco_ok,
+            'memoria_ok': memoria_ok,
+            'tiempo_respuesta_db_ms': db_tiempo,
+            'espacio_disco_libre_gb': round(float(disco_libre), 2),
+            'uso_disco_porcentaje': float(disco_uso),
+            'uso_memoria_porcentaje': float(memoria_uso),
+            'uso_cpu_porcentaje': float(cls.probar_cpu()),
+            'celery_workers': celery_workers,
+            'cola_celery': cls.longitud_cola_celery(),
+            'latencia_cola_celery_s': cache.get(CACHE_LATENCIA_COLA),
+            'cola_impresion': cls.profundidad_cola_impresion(),
+            'errores': errores,
+            'advertencias': advertencias,
+        }
+
+    # ========================================================================
+    # BUFFER CIRCULAR
+    # ========================================================================
+
+    @staticmethod
+    def tamano_buffer():
+        return getattr(settings, 'HEALTH_MUESTRAS_MAX', 240)
+
+    @classmethod
+    def registrar_muestra(cls, muestra):
+        """Agrega la muestra al buffer descartando las más antiguas"""
+        muestras = cache.get(CACHE_MUESTRAS) or []
+        muestras.append(muestra)
+        cache.set(CACHE_MUESTRAS, muestras[-cls.tamano_buffer():], None)
+
+    @staticmethod
+    def muestras():
+        """Muestras del buffer, de la más antigua a la más reciente"""
+        return cache.get(CACHE_MUESTRAS) or []
+
+    @classmethod
+    def ultima_muestra(cls):
+        muestras = cls.muestras()
+        return muestras[-1] if muestras else None
+
+    @staticmethod
+    def registrar_latencia_cola(segundos):
+        cache.set(CACHE_LATENCIA_COLA, round(segundos, 3), 10 * 60)
+
+    # ========================================================================
+    # PERSISTENCIA SUBMUESTREADA
+    # ========================================================================
+
+    @staticmethod
+    def debe_persistir(muestra, ultimo_check=None):
+        """
+        Se persiste si no hay registros previos, si cambió el estado general
+        o si el último registro supera HEALTH_PERSISTENCIA_MINUTOS
+        """
+        if ultimo_check is None:
+            return True
+        if ultimo_check.estado_general != muestra['estado_general']:
+            return True
+        intervalo = timedelta(minutes=getattr(settings, 'HEALTH_PERSISTENCIA_MINUTOS', 15))
+        return timezone.now() - ultimo_check.fecha_check >= intervalo
+
+    @classmethod
+    def persistir(cls, muestra, forzar=False):
+        """
+        Crea el HealthCheck de la muestra si corresponde
+
+        Returns:
+            HealthCheck | None
+        """
+        if not forzar:
+            ultimo = HealthCheck.objects.only('estado_general', 'fecha_check').first()
+            if not cls.debe_persistir(muestra, ultimo):
+                return None
+
+        detalles = {
+            clave: muestra.get(clave)
+            for clave in (
+                'celery_workers', 'cola_celery', 'latencia_cola_celery_s', 'cola_impresion'
+            )
+        }
+        return HealthCheck.objects.create(
+            estado_general=muestra['estado_general'],
+            base_datos_ok=muestra['base_datos_ok'],
+            redis_ok=muestra['redis_ok'],
+            celery_ok=muestra['celery_ok'],
+            disco_ok=muestra['disco_ok'],
+            memoria_ok=muestra['memoria_ok'],
+            tiempo_respuesta_db_ms=muestra['tiempo_respuesta_db_ms'],
+            espacio_disco_libre_gb=muestra['espacio_disco_libre_gb'],
+            uso_disco_porcentaje=muestra['uso_disco_porcentaje'],
+            uso_memoria_porcentaje=muestra['uso_memoria_porcentaje'],
+            uso_cpu_porcentaje=muestra['uso_cpu_porcentaje'],
+            errores=muestra['errores'],
+            advertencias=muestra['advertencias'],
+            detalles=detalles,
+        )
+
+    @classmethod
+    def ejecutar(cls, forzar=False):
+        """
+        Muestrea, agrega al buffer y persiste si corresponde
+
+        Returns:
+            tuple: (muestra, HealthCheck | None)
+        """
+        muestra = cls.muestrear()
+        cls.registrar_muestra(muestra)
+        return muestra, cls.persistir(muestra, forzar=forzar)
+
+    @staticmethod
+    def compactar(ahora=None):
+        """
+        Reduce el histórico de HealthCheck
+
+        - Últimas 24 horas: se conserva todo
+        - Hasta HEALTH_RETENCION_DIAS: un registro por hora, más todos los
+          registros que no sean SALUDABLE
+        - Más antiguos: se eliminan
+
+        Returns:
+            dict: {'submuestreados': n, 'eliminados': n}
+        """
+        ahora = ahora or timezone.now()
+        limite_detalle = ahora - timedelta(hours=24)
+        limite_retencion = ahora - timedelta(days=getattr(settings, 'HEALTH_RETENCION_DIAS', 30))
+
+        eliminados, _ = HealthCheck.objects.filter(fecha_check__lt=limite_retencion).delete()
+
+        antiguos = HealthCheck.objects.filter(
+            fecha_check__lt=limite_detalle,
+            estado_general='SALUDABLE'
+        )
+        primeros_por_hora = antiguos.annotate(
+            hora=TruncHour('fecha_check')
+        ).values('hora').annotate(primero=Min('fecha_check')).values_list('primero', flat=True)
+
+        submuestreados, _ = antiguos.exclude(fecha_check__in=list(primeros_por_hora)).delete()
+
+        return {'submuestreados': submuestreados, 'eliminados': eliminados}
@@ -0,0 +1,107 @@
+"""
+Tareas de Celery para Configuración del Sistema
+apps/system_configuration/tasks.py
+"""
+from celery import shared_task
+import logging
+import time
+
+from commercebox.celery import TareaDeduplicada
+
+logger = logging.getLogger('commercebox')
+
+
+@shared_task(
+    name='apps.system_configuration.tasks.muestrear_salud_sistema',
+    base=TareaDeduplicada,
+    bind=True,
+    ignore_result=True
+)
+def muestrear_salud_sistema(self):
+    """
+    Toma una muestra de salud (BD, Redis, Celery, disco, memoria, CPU y
+    colas), la agrega al buffer circular y persiste un HealthCheck sólo si
+    cambió el estado o venció el intervalo de persistencia.
+
+    También encola la tarea testigo que mide la latencia de la cola.
+    """
+    from apps.system_configuration.services import HealthMonitorService
+
+    medir_latencia_cola.apply_async(args=[time.time()], expires=5 * 60)
+
+    muestra, health_check = HealthMonitorService.ejecutar()
+    if muestra['estado_general'] != 'SALUDABLE':
+        logger.warning(
+            f"Health check {muestra['estado_general']}: "
+            f"{muestra['errores'] + muestra['advertencias']}"
+        )
+    return {
+        'estado_general': muestra['estado_general'],
+        'persistido': health_check is not None,
+    }
+
+
+@shared_task(
+    name='apps.system_configuration.tasks.medir_latencia_cola',
+    ignore_result=True
+)
+def medir_latencia_cola(encolada_en):
+    """
+    Tarea testigo: el tiempo entre que se encoló y se ejecuta es la
+    latencia de la cola de Celery
+    """
+    from apps.system_configuration.services import HealthMonitorService
+
+    HealthMonitorService.registrar_latencia_cola(max(time.time() - encolada_en, 0))
+
+
+@shared_task(
+    name='apps.system_configuration.tasks.compactar_health_checks',
+    base=TareaDeduplicada,
+    bind=True,
+    max_retries=2,
+    default_retry_delay=300
+)
+def compactar_health_checks(self):
+    """
+    Submuestrea el histórico de HealthCheck a un registro por hora y
+    elimina los registros fuera de la retención
+    """
+    from apps.system_configuration.services import HealthMonitorService
+
+    try:
+        resultado = HealthMonitorService.compactar()
+        logger.info(f"Health checks compactados: {resultado}")
+        return resultado
+    except Exception as e:
+        logger.error(f"Error compactando health checks: {str(e)}")
+        raise self.retry(exc=e)
+
+
+@shared_task(
+    name='apps.system_configuration.tasks.mantener_ciclo_datos',
+    base=TareaDeduplicada,
+    bind=True,
+    max_retries=2,
+    default_retry_delay=600
+)
+def mantener_ciclo_datos(self):
+    """
+    Crea las particiones de los próximos meses y archiva los meses de las
+    tablas históricas que superan su retención
+    """
+    from apps.system_configuration.services import CicloVidaDatosService
+
+    try:
+        resultado = CicloVidaDatosService.mantener()
+    except Exception as e:
+        logger.error(f"Error en el mantenimiento de tablas históricas: {str(e)}")
+        raise self.retry(exc=e)
+
+    return {
+        'particiones_creadas': resultado['particiones_creadas'],
+        'archivados': [
+            f"{archivado['tabla']} {archivado['mes']:%Y-%m} ({archivado['filas']} filas)"
+            for archivado in resultado['archivados']
+        ],
+    }
@@ -1,3 +1,532 @@
-from django.test import TestCase
+import csv
+import gzip
+import os
+import shutil
+import sys
+import tempfile
+from datetime import date, timedelta
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import transaction
+from django.db.models import Sum
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from apps.authentication.models import LogAcceso, Usuario
+from apps.financial_management.models import ArqueoCaja
+from apps.inventory_management.models import AsientoCosto, Producto, ProductoNormal, Quintal, StockActual
+from apps.notifications.tasks import procesar_notificaciones_pendientes
+from apps.sales_management.models import Pago, Venta
+from apps.stock_alert_system.models import EstadoStock
+from commercebox.celery import aplicar_perfil_cola, perfil_colas, tareas_no_registradas
+
+from .benchmarks import CASOS, GeneradorMasivo, TiendaSintetica, comparar, ejecutar_casos
+from .instrumentacion import PresupuestoExcedido, instrumentado, medir, presupuesto_para
+from .models import HealthCheck, RegistroBackup
+from .services import CicloVidaDatosService, HealthMonitorService
+from .services.ciclo_datos import limite_mes, sumar_meses
+from .views import metricas_view
+
+
+CACHE_LOCAL = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def _muestra(estado='SALUDABLE', **extra):
+    muestra = {
+        'fecha': timezone.now().isoformat(),
+        'estado_general': estado,
+        'base_datos_ok': True,
+        'redis_ok': True,
+        'celery_ok': estado == 'SALUDABLE',
+        'disco_ok': True,
+        'memoria_ok': True,
+        'tiempo_respuesta_db_ms': 2,
+        'espacio_disco_libre_gb': 50.0,
+        'uso_disco_porcentaje': 40.0,
+        'uso_memoria_porcentaje': 60.0,
+        'uso_cpu_porcentaje': 12.5,
+        'celery_workers': 1,
+        'cola_celery': 3,
+        'latencia_cola_celery_s': 0.25,
+        'cola_impresion': 2,
+        'errores': [],
+        'advertencias': [] if estado == 'SALUDABLE' else ['Celery: No hay workers activos'],
+    }
+    muestra.update(extra)
+    return muestra
+
+
+@override_settings(CACHES=CACHE_LOCAL, HEALTH_MUESTRAS_MAX=3, HEALTH_PERSISTENCIA_MINUTOS=15)
+class HealthMonitorServiceTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_buffer_circular_descarta_las_muestras_antiguas(self):
+        for i in range(5):
+            HealthMonitorService.registrar_muestra(_muestra(cola_celery=i))
+
+        self.assertEqual(
+            [m['cola_celery'] for m in HealthMonitorService.muestras()], [2, 3, 4]
+        )
+        self.assertEqual(HealthMonitorService.ultima_muestra()['cola_celery'], 4)
+
+    def test_persiste_solo_al_cambiar_estado_o_vencer_intervalo(self):
+        self.assertIsNotNone(HealthMonitorService.persistir(_muestra()))
+        self.assertIsNone(HealthMonitorService.persistir(_muestra()))
+        self.assertIsNotNone(HealthMonitorService.persistir(_muestra('ADVERTENCIA')))
+
+        HealthCheck.objects.update(fecha_check=timezone.now() - timedelta(minutes=16))
+        self.assertIsNotNone(HealthMonitorService.persistir(_muestra('ADVERTENCIA')))
+        self.assertIsNotNone(HealthMonitorService.persistir(_muestra('ADVERTENCIA'), forzar=True))
+        self.assertEqual(HealthCheck.objects.count(), 4)
+
+    def test_compactar_deja_uno_por_hora_y_respeta_retencion(self):
+        ahora = timezone.now().replace(minute=30, second=0, microsecond=0)
+        hace_dos_dias = ahora - timedelta(days=2)
+        for minutos in (0, 5, 10):
+            HealthCheck.objects.create(
+                estado_general='SALUDABLE', fecha_check=hace_dos_dias + timedelta(minutes=minutos)
+            )
+        HealthCheck.objects.create(
+            estado_general='CRITICO', fecha_check=hace_dos_dias + timedelta(minutes=15)
+        )
+        HealthCheck.objects.create(estado_general='SALUDABLE', fecha_check=ahora - timedelta(days=45))
+        recientes = [
+            HealthCheck.objects.create(estado_general='SALUDABLE', fecha_check=ahora - timedelta(minutes=m))
+            for m in (1, 2)
+        ]
+
+        resultado = HealthMonitorService.compactar(ahora=ahora)
+
+        self.assertEqual(resultado, {'submuestreados': 2, 'eliminados': 1})
+        self.assertEqual(HealthCheck.objects.filter(fecha_check__lt=ahora - timedelta(days=1)).count(), 2)
+        for check in recientes:
+            self.assertTrue(HealthCheck.objects.filter(pk=check.pk).exists())
+
+    def test_ejecutar_no_bloquea_con_celery_caido(self):
+        with mock.patch.object(
+            HealthMonitorService, 'probar_celery', return_value=(False, 0, 'No hay workers activos')
+        ):
+            muestra, health_check = HealthMonitorService.ejecutar()
+
+        self.assertEqual(muestra['estado_general'], 'ADVERTENCIA')
+        self.assertEqual(health_check.estado_general, 'ADVERTENCIA')
+        self.assertEqual(HealthMonitorService.ultima_muestra(), muestra)
+
+
+@override_settings(CACHES=CACHE_LOCAL, METRICS_TOKEN='')
+class MetricasEndpointTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(METRICS_IPS_PERMITIDAS=['127.0.0.1'])
+    def test_expone_ultima_muestra_sin_ejecutar_sondas(self):
+        HealthMonitorService.registrar_muestra(_muestra())
+
+        with mock.patch.object(HealthMonitorService, 'muestrear') as muestrear:
+            response = self.client.get('/metrics')
+
+        muestrear.assert_not_called()
+        self.assertEqual(response.status_code, 200)
+        contenido = response.content.decode()
+        self.assertIn('commercebox_component_up{componente="base_datos"} 1.0', contenido)
+        self.assertIn('commercebox_print_queue_depth 2.0', contenido)
+        self.assertIn('commercebox_celery_queue_lag_seconds 0.25', contenido)
+        self.assertIn('commercebox_db_queries_per_request_bucket', contenido)
+        self.assertIn('commercebox_checkout_duration_seconds_bucket', contenido)
+
+    @override_settings(METRICS_TOKEN='', METRICS_IPS_PERMITIDAS=[])
+    def test_sin_configuracion_se_deniega(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+
+    @override_settings(METRICS_TOKEN='secreto', METRICS_IPS_PERMITIDAS=[])
+    def test_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        self.assertEqual(
+            self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer otro').status_code, 401
+        )
+        self.assertEqual(
+            self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secreto').status_code, 200
+        )
+
+    @override_settings(METRICS_TOKEN='', METRICS_IPS_PERMITIDAS=['10.0.0.0/8', 'no-es-ip'])
+    def test_red_permitida_y_staff(self):
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='10.1.2.3').status_code, 200)
+        self.assertEqual(
+            self.client.get('/metrics', REMOTE_ADDR='192.168.1.5', HTTP_X_FORWARDED_FOR='10.1.2.3').status_code,
+            403
+        )
+
+        request = RequestFactory().get('/metrics', REMOTE_ADDR='192.168.1.5')
+        request.user = Usuario.objects.create_superuser(
+            username='admin', email='admin@example.com', password='admin',
+            codigo_empleado='ADM-1', nombres='Admin', apellidos='Sistema',
+            documento_identidad='1700000099'
+        )
+        self.assertEqual(metricas_view(request).status_code, 200)
+
+
+class CicloVidaDatosTests(TestCase):
+    """
+    Los meses que superan la retención se exportan a .csv.gz y salen de la
+    base de datos (sin PostgreSQL: borrado por rango de fechas)
+    """
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directorio)
+        ajustes = override_settings(
+            DATOS_ARCHIVO_DIR=self.directorio,
+            DATOS_RETENCION_MESES={'authentication.LogAcceso': 6},
+        )
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def _log(self, fecha, detalles=''):
+        return LogAcceso.objects.create(
+            tipo_evento='LOGIN', ip_address='10.0.0.1', user_agent='pruebas',
+            detalles=detalles, fecha_evento=fecha
+        )
+
+    def test_sumar_meses_cruza_anios(self):
+        self.assertEqual(sumar_meses(date(2024, 11, 1), 3), date(2025, 2, 1))
+        self.assertEqual(sumar_meses(date(2024, 2, 1), -14), date(2022, 12, 1))
+
+    def test_archiva_meses_vencidos_y_conserva_los_recientes(self):
+        hoy = timezone.localdate()
+        corte = sumar_meses(date(hoy.year, hoy.month, 1), -6)
+        vencido = sumar_meses(corte, -2)
+        self._log(limite_mes(vencido) + timedelta(days=3), 'con, coma')
+        self._log(limite_mes(vencido) + timedelta(days=10))
+        self._log(limite_mes(corte) - timedelta(minutes=1))
+        reciente = self._log(limite_mes(corte))
+
+        self.assertEqual(
+            [(a['tabla'], a['mes']) for a in CicloVidaDatosService.archivar(simular=True)],
+            [('authentication_logacceso', vencido), ('authentication_logacceso', sumar_meses(corte, -1))]
+        )
+        self.assertEqual(LogAcceso.objects.count(), 4)
+
+        archivados = CicloVidaDatosService.archivar()
+
+        self.assertEqual([a['filas'] for a in archivados], [2, 1])
+        self.assertEqual(list(LogAcceso.objects.values_list('id', flat=True)), [reciente.id])
+        with gzip.open(archivados[0]['archivo'], 'rt', encoding='utf-8') as archivo:
+            filas = list(csv.DictReader(archivo))
+        self.assertEqual([fila['detalles'] for fila in filas], ['con, coma', ''])
+
+        registro = RegistroBackup.objects.get(ruta_archivo=archivados[0]['archivo'])
+        self.assertEqual(registro.tipo_backup, 'ARCHIVO')
+        self.assertEqual(registro.estado, 'EXITOSO')
+        self.assertEqual(registro.total_registros, 2)
+        self.assertEqual(registro.tablas_incluidas, ['authentication_logacceso'])
+
+        # Segunda pasada: nada pendiente
+        self.assertEqual(CicloVidaDatosService.archivar(), [])
+
+    def test_filas_en_default_se_archivan_y_obtienen_particion(self):
+        hoy = date(2025, 6, 15)
+        particiones = {date(2025, mes, 1): f'authentication_logacceso_p2025{mes:02d}' for mes in range(3, 7)}
+        en_default = {date(2024, 10, 1): 5, date(2025, 7, 1): 2, date(2030, 1, 1): 1}
+        servicio = CicloVidaDatosService
+
+        with mock.patch.object(servicio, 'soporta_particiones', return_value=True), \
+                mock.patch.object(servicio, 'es_particionada', side_effect=lambda t: t == 'authentication_logacceso'), \
+                mock.patch.object(servicio, 'particiones', return_value=particiones), \
+                mock.patch.object(servicio, 'meses_en_default', return_value=en_default), \
+                mock.patch.object(servicio, '_crear_particion') as crear:
+            tabla = next(t for t in servicio.tablas() if t.tabla == 'authentication_logacceso')
+            # Retención de 6 meses: corte en 2024-12; octubre solo está en la DEFAULT
+            self.assertEqual(servicio.meses_vencidos(tabla, hoy), [date(2024, 10, 1)])
+
+            with self.assertLogs('commercebox', 'WARNING') as avisos:
+                creadas = servicio.crear_particiones(meses_adelante=1, hoy=hoy)
+
+        self.assertEqual(creadas, ['authentication_logacceso_p202410', 'authentication_logacceso_p202507'])
+        self.assertEqual(crear.call_args_list[0].args[1:], ('authentication_logacceso', date(2024, 10, 1), 'fecha_evento'))
+        self.assertIn('1 filas posteriores a 2025-07', avisos.output[0])
+
+
+def _settings_para(argv, **entorno):
+    """Evalúa commercebox/settings.py con otro sys.argv y otras variables COMMERCEBOX_*"""
+    variables = {clave: valor for clave, valor in os.environ.items() if not clave.startswith('COMMERCEBOX_')}
+    variables.update({'COMMERCEBOX_USE_SQLITE': 'False', **entorno})
+    ruta = os.path.join(settings.BASE_DIR, 'commercebox', 'settings.py')
+    ajustes = {'__file__': ruta, '__name__': 'commercebox.settings'}
+    # exec y no runpy.run_path, que reemplaza sys.argv[0] por la ruta del archivo
+    with open(ruta, encoding='utf-8') as archivo, \
+            mock.patch.dict(os.environ, variables, clear=True), mock.patch.object(sys, 'argv', argv):
+        exec(compile(archivo.read(), ruta, 'exec'), ajustes)
+    return ajustes
+
+
+class PerfilesConexionTests(SimpleTestCase):
+    """Persistencia de conexiones por tipo de proceso, PgBouncer y motor de sesiones"""
+
+    def test_deteccion_del_proceso_y_valores_del_perfil(self):
+        casos = [
+            (['/usr/local/bin/celery', '-A', 'commercebox', 'worker'], 'worker', 600),
+            (['manage.py', 'migrate'], 'comando', 0),
+            (['manage.py', 'runserver', '0.0.0.0:8000'], 'web', 60),
+            (['/usr/local/bin/gunicorn', 'commercebox.wsgi'], 'web', 60),
+        ]
+        for argv, proceso, max_age in casos:
+            with self.subTest(argv=argv[0]):
+                ajustes = _settings_para(argv)
+                base = ajustes['DATABASES']['default']
+                self.assertEqual(ajustes['PROCESO'], proceso)
+                self.assertEqual(base['CONN_MAX_AGE'], max_age)
+                self.assertTrue(base['CONN_HEALTH_CHECKS'])
+                self.assertEqual(base['OPTIONS']['application_name'], f'commercebox-{proceso}')
+
+        ajustes = _settings_para(['gunicorn'], COMMERCEBOX_PROCESO='worker')
+        self.assertEqual(ajustes['DATABASES']['default']['CONN_MAX_AGE'], 600)
+        ajustes = _settings_para(['gunicorn'], COMMERCEBOX_DB_CONN_MAX_AGE='5')
+        self.assertEqual(ajustes['DATABASES']['default']['CONN_MAX_AGE'], 5)
+
+    def test_pgbouncer_desactiva_cursores_del_servidor(self):
+        self.assertFalse(_settings_para(['gunicorn'])['DATABASES']['default']['DISABLE_SERVER_SIDE_CURSORS'])
+
+        ajustes = _settings_para(['gunicorn'], COMMERCEBOX_DB_POOLER='pgbouncer')
+        self.assertTrue(ajustes['DATABASES']['default']['DISABLE_SERVER_SIDE_CURSORS'])
+
+        ajustes = _settings_para(
+            ['gunicorn'], COMMERCEBOX_DB_POOLER='pgbouncer', COMMERCEBOX_DB_DISABLE_SERVER_SIDE_CURSORS='False'
+        )
+        self.assertFalse(ajustes['DATABASES']['default']['DISABLE_SERVER_SIDE_CURSORS'])
+
+    def test_motor_de_sesiones(self):
+        ajustes = _settings_para(['gunicorn'])
+        self.assertEqual(ajustes['SESSION_ENGINE'], 'django.contrib.sessions.backends.cached_db')
+        self.assertIn(ajustes['SESSION_CACHE_ALIAS'], ajustes['CACHES'])
+        self.assertTrue(ajustes['CACHES']['sesiones']['OPTIONS']['IGNORE_EXCEPTIONS'])
+
+        ajustes = _settings_para(['gunicorn'], COMMERCEBOX_USE_SQLITE='True')
+        self.assertEqual(ajustes['SESSION_ENGINE'], 'django.contrib.sessions.backends.db')
+
+        ajustes = _settings_para(['gunicorn'], COMMERCEBOX_SESSION_BACKEND='cache')
+        self.assertEqual(ajustes['SESSION_ENGINE'], 'django.contrib.sessions.backends.cache')
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class ColasCeleryTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_beat_y_rutas_apuntan_a_tareas_registradas(self):
+        self.assertEqual(tareas_no_registradas(), [])
+
+        faltantes = tareas_no_registradas(
+            programacion={'fantasma': {'task': 'apps.x.tasks.no_existe'}},
+            rutas={'apps.y.tasks.tampoco': {'queue': 'stock'}, 'apps.z.tasks.*': {'queue': 'stock'}},
+        )
+        self.assertEqual(
+            faltantes,
+            [('beat "fantasma"', 'apps.x.tasks.no_existe'), ('ruta', 'apps.y.tasks.tampoco')]
+        )
+
+    def test_invocaciones_identicas_pendientes_se_publican_una_vez(self):
+        tarea = procesar_notificaciones_pendientes
+        with mock.patch('celery.app.task.Task.apply_async') as publicar:
+            publicar.side_effect = lambda *a, **kw: tarea.AsyncResult(kw['task_id'])
+            primera = tarea.apply_async(kwargs={'limite': 50})
+            segunda = tarea.apply_async(kwargs={'limite': 50})
+            otra = tarea.apply_async(kwargs={'limite': 10})
+
+        self.assertEqual(publicar.call_count, 2)
+        self.assertEqual(segunda.id, primera.id)
+        self.assertEqual(primera.id, publicar.call_args_list[0].kwargs['task_id'])
+        self.assertNotEqual(otra.id, segunda.id)
+
+        # Al empezar la ejecución se libera la clave y se puede volver a encolar
+        tarea.before_start(publicar.call_args_list[0].kwargs['task_id'], [], {'limite': 50})
+        with mock.patch('celery.app.task.Task.apply_async') as publicar:
+            tarea.apply_async(kwargs={'limite': 50})
+        self.assertEqual(publicar.call_count, 1)
+
+    @override_settings(COLAS_PERFILES_WORKER={
+        'realtime': {'concurrency': 4, 'prefetch_multiplier': 4},
+        'stock': {'concurrency': 2, 'prefetch_multiplier': 1},
+    })
+    def test_perfil_de_worker_segun_colas(self):
+        self.assertEqual(perfil_colas(['stock']), {'concurrency': 2, 'prefetch_multiplier': 1})
+        self.assertEqual(
+            perfil_colas(['realtime', 'stock', 'otra']),
+            {'concurrency': 6, 'prefetch_multiplier': 1}
+        )
+        self.assertEqual(perfil_colas(None), {})
+
+        app = SimpleNamespace(
+            amqp=SimpleNamespace(queues=SimpleNamespace(consume_from={'stock': None})),
+            conf=SimpleNamespace(worker_concurrency=None, worker_prefetch_multiplier=4),
+        )
+        worker = SimpleNamespace(
+            app=app, hostname='stock@host', concurrency=8, prefetch_multiplier=4,
+            options={'concurrency': None, 'prefetch_multiplier': 4},
+        )
+        aplicar_perfil_cola(sender=worker)
+        self.assertEqual((worker.concurrency, worker.prefetch_multiplier), (2, 1))
+
+        # -c explícito en la línea de comandos se respeta
+        worker.options['concurrency'], worker.concurrency = 3, 3
+        aplicar_perfil_cola(sender=worker)
+        self.assertEqual(worker.concurrency, 3)
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'apps.system_configuration.cache.LocMemCacheInstrumentada'}},
+    RENDIMIENTO_PRESUPUESTOS={
+        'Prueba.masivo': {},
+        'Prueba.*': {'consultas': 2},
+        '*': {'consultas': 200},
+    },
+    RENDIMIENTO_PRESUPUESTO_MODO='error',
+)
+class InstrumentacionTests(TestCase):
+
+    def setUp(self):
+        caches['default'].clear()
+
+    def test_presupuesto_exacto_antes_que_patron(self):
+        self.assertEqual(presupuesto_para('Prueba.masivo'), {})
+        self.assertEqual(presupuesto_para('Prueba.venta'), {'consultas': 2})
+        self.assertEqual(presupuesto_para('otra_vista'), {'consultas': 200})
+
+    def test_cuenta_consultas_y_cache_en_mediciones_anidadas(self):
+        caches['default'].set('a', 1)
+        with medir('exterior') as exterior:
+            with medir('interior') as interior:
+                LogAcceso.objects.count()
+                caches['default'].get('a')
+                caches['default'].get_many(['a', 'b'])
+            LogAcceso.objects.count()
+
+        self.assertEqual(interior.consultas, 1)
+        self.assertEqual(exterior.consultas, 2)
+        self.assertEqual((interior.cache_aciertos, interior.cache_fallos), (2, 1))
+        self.assertEqual(exterior.cache_aciertos, 2)
+        self.assertGreater(exterior.tiempo_db, 0)
+
+    def test_exceso_de_consultas_lanza_en_modo_error(self):
+        @instrumentado('Prueba.venta')
+        def venta():
+            for _ in range(3):
+                LogAcceso.objects.count()
+
+        with self.assertRaises(PresupuestoExcedido):
+            venta()
+
+        with override_settings(RENDIMIENTO_PRESUPUESTO_MODO='log'):
+            with self.assertLogs('commercebox.rendimiento', level='WARNING'):
+                venta()
+
+        # Un proceso sin límites no se corta
+        with medir('Prueba.masivo'):
+            for _ in range(3):
+                LogAcceso.objects.count()
+
+    def test_middleware_etiqueta_por_view_name(self):
+        with self.assertLogs('commercebox.rendimiento', level='INFO') as registros:
+            self.client.get('/login/')
+
+        self.assertTrue(any("'endpoint': 'login'" in linea for linea in registros.output))
+
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class BenchmarksTests(TestCase):
+    """
+    La tienda sintética es reproducible y todos los casos de benchmark
+    corren sin errores sobre ella
+    """
+
+    def test_misma_semilla_mismo_catalogo_y_ventas(self):
+        def generar(prefijo):
+            tienda = TiendaSintetica(productos=6, quintales=4, ventas_dia=2, dias=2, prefijo=prefijo)
+            resumen = tienda.generar()
+            precios = list(Producto.objects.filter(
+                codigo_barras__startswith=f'{prefijo}P'
+            ).order_by('codigo_barras').values_list('tipo_inventario', 'precio_venta', 'precio_por_unidad_peso'))
+            return resumen, precios
+
+        self.assertEqual(generar('AA'), generar('BB'))
+
+    def test_casos_sin_errores_y_regresiones_de_consultas(self):
+        TiendaSintetica(productos=8, quintales=4, ventas_dia=2, dias=2).generar()
+        resultados = ejecutar_casos(TiendaSintetica.muestras(), repeticiones=1)
+
+        self.assertEqual(set(resultados), set(CASOS))
+        self.assertEqual(comparar(resultados, {'casos': {}}), [])
+
+        base = {'casos': {'POSService.finalizar_venta': {
+            'consultas': resultados['POSService.finalizar_venta']['consultas'] - 1,
+            'p50_ms': 1e6,
+        }}}
+        self.assertEqual(
+            [(nombre, tipo) for nombre, tipo, _, _ in comparar(resultados, base)],
+            [('POSService.finalizar_venta', 'consultas')]
+        )
+
+
+# Proceso masivo: el alta de alertas con notificación al reconstruir
+# EstadoStock supera el presupuesto de calcular_estado por producto
+@override_settings(CACHES=CACHE_LOCAL, RENDIMIENTO_PRESUPUESTO_MODO='log')
+class GeneradorMasivoTests(TestCase):
+    """
+    El generador masivo es reproducible y deja las tablas derivadas
+    alineadas con las filas que insertó
+    """
+
+    PARAMETROS = {
+        'productos': 10, 'proveedores': 2, 'clientes': 5, 'cajas': 2,
+        'ventas_dia': 8, 'dias': 5, 'tasa_devolucion': 0.2, 'lote': 50,
+    }
+
+    def _huella(self):
+        return (
+            list(Venta.objects.order_by('numero_venta').values_list('id', 'fecha_venta', 'total', 'cliente_id')),
+            list(Quintal.objects.order_by('codigo_quintal').values_list('id', 'peso_actual', 'estado')),
+            list(Pago.objects.order_by('id').values_list('id', 'forma_pago', 'monto')),
+        )
+
+    def test_misma_semilla_mismas_filas(self):
+        with transaction.atomic():
+            primera = GeneradorMasivo(**self.PARAMETROS).generar()
+            huella = self._huella()
+            transaction.set_rollback(True)
+
+        self.assertEqual(GeneradorMasivo(**self.PARAMETROS).generar(), primera)
+        self.assertEqual(self._huella(), huella)
+
+    def test_tablas_derivadas_alineadas(self):
+        resumen = GeneradorMasivo(**self.PARAMETROS).generar()
+
+        self.assertEqual(resumen['ventas'], Venta.objects.count())
+        self.assertEqual(ArqueoCaja.objects.count(), 2 * 5)
+        self.assertGreater(resumen['devoluciones'], 0)
+        for quintal in Quintal.objects.annotate(neto=Sum('movimientos__peso_movimiento')):
+            self.assertEqual(quintal.neto, quintal.peso_actual)
+        for inventario in ProductoNormal.objects.annotate(neto=Sum('movimientos__cantidad')):
+            self.assertEqual(inventario.neto, inventario.stock_actual)
+
+        pagado = {}
+        for venta_id, monto in Pago.objects.values_list('venta_id', 'monto'):
+            pagado[venta_id] = pagado.get(venta_id, 0) + monto
+        self.assertTrue(all(pagado[v.pk] == v.total for v in Venta.objects.all()))
+
+        # Proyección y libro de costos coinciden con las filas de origen
+        campos = ('producto_id', 'peso_disponible', 'unidades_disponibles', 'lotes', 'valor_costo')
+        antes = list(StockActual.objects.order_by('pk').values_list(*campos))
+        StockActual.objects.reconstruir()
+        self.assertEqual(list(StockActual.objects.order_by('pk').values_list(*campos)), antes)
+        for stock in StockActual.objects.select_related('producto'):
+            ultimo = AsientoCosto.objects.filter(producto=stock.producto).order_by('-secuencia').first()
+            esperado = stock.peso_disponible if stock.producto.es_quintal() else stock.unidades_disponibles
+            self.assertEqual(ultimo.saldo_cantidad, esperado)
+        self.assertEqual(EstadoStock.objects.count(), 10)
@@ -13,6 +13,8 @@ from django.utils import timezone
 from django.db.models import Q, Count, Sum
 from django.core.paginator import Paginator
 from django.conf import settings
+import hmac
+import ipaddress
 import json
 import os
 from datetime import datetime, timedelta
@@ -26,6 +28,8 @@ from .forms import (
     ConfiguracionSistemaForm, ParametroSistemaForm, EjecutarBackupForm,
     LogConfiguracionFiltroForm, BackupFiltroForm
 )
+from .metrics import exportar_metricas
+from .services import HealthMonitorService
 import logging
 logger = logging.getLogger(__name__)
 # ============================================================================
@@ -68,13 +72,6 @@ def dashboard_configuracion(request):
     total_backups = RegistroBackup.objects.count()
     backups_exitosos = RegistroBackup.objects.filter(estado='EXITOSO').count()
     
-    # ✅ DEBUG: Imprimir valores en consola
-    print("="*60)
-    print("🔍 DEBUG VISTA DASHBOARD:")
-    print(f"   Total backups: {total_backups}")
-    print(f"   Backups exitosos: {backups_exitosos}")
-    print("="*60)
-    
     # Parámetros por módulo
     from django.db.models import Count
     parametros_por_modulo = ParametroSistema.objects.filter(
@@ -832,9 +829,7 @@ def health_check_dashboard(request):
     # Si no existe ningún check, ejecutar uno ahora
     if not ultimo_check:
         try:
-            from django.core.management import call_command
-            call_command('system_health_check')
-            ultimo_check = HealthCheck.objects.order_by('-fecha_check').first()
+            _, ultimo_check = HealthMonitorService.ejecutar(forzar=True)
         except Exception as e:
             logger.error(f"Error al ejecutar health check inicial: {str(e)}")
     
@@ -846,17 +841,19 @@ def health_check_dashboard(request):
     # Estadísticas del sistema actuales
     estadisticas = _obtener_estadisticas_sistema()
     
-    # Estadísticas generales
-    total_checks = checks_historico.count()
-    checks_saludables = checks_historico.filter(estado_general='SALUDABLE').count()
-    checks_criticos = checks_historico.filter(estado_general='CRITICO').count()
+    # Estadísticas generales (una sola consulta)
+    conteo = checks_historico.aggregate(
+        total=Count('id'),
+        saludables=Count('id', filter=Q(estado_general='SALUDABLE')),
+        criticos=Count('id', filter=Q(estado_general='CRITICO'))
+    )
     
     context = {
         'ultimo_check': ultimo_check,
         'historial': checks_historico[:20],  # Últimos 20 para el historial
-        'total_checks': total_checks,
-        'checks_saludables': checks_saludables,
-        'checks_criticos': checks_criticos,
+        'total_checks': conteo['total'],
+        'checks_saludables': conteo['saludables'],
+        'checks_criticos': conteo['criticos'],
         'estadisticas': estadisticas,
     }
     
@@ -867,10 +864,9 @@ def health_check_dashboard(request):
 @user_passes_test(es_administrador)
 @require_http_methods(["POST"])
 def health_check_ejecutar(request):
-    """Ejecutar health check manual"""
+    """Ejecutar health check manual (siempre se persiste)"""
     try:
-        from django.core.management import call_command
-        call_command('system_health_check')
+        HealthMonitorService.ejecutar(forzar=True)
         
         messages.success(request, '✅ Health check ejecutado exitosamente')
         
@@ -934,42 +930,58 @@ def health_check_api(request):
 
 
 def _obtener_estadisticas_sistema():
-    """Función auxiliar para obtener estadísticas actuales del sistema"""
-    estadisticas = {
-        'bd_disponible': False,
-        'redis_disponible': False,
-        'celery_disponible': False,
+    """
+    Disponibilidad de BD / Redis / Celery según la última muestra del
+    monitor de salud (no ejecuta sondas dentro de la petición)
+    """
+    muestra = HealthMonitorService.ultima_muestra() or {}
+    return {
+        'bd_disponible': muestra.get('base_datos_ok', False),
+        'redis_disponible': muestra.get('redis_ok', False),
+        'celery_disponible': muestra.get('celery_ok', False),
+        'fecha_muestra': muestra.get('fecha'),
     }
-    
-    # Verificar base de datos
-    try:
-        from django.db import connection
-        with connection.cursor() as cursor:
-            cursor.execute("SELECT 1")
-            estadisticas['bd_disponible'] = True
-    except Exception as e:
-        logger.error(f"Error al verificar BD: {str(e)}")
-    
-    # Verificar Redis
-    try:
-        from django.core.cache import cache
-        cache.set('health_check_test', 'ok', 10)
-        if cache.get('health_check_test') == 'ok':
-            estadisticas['redis_disponible'] = True
-    except Exception as e:
-        logger.error(f"Error al verificar Redis: {str(e)}")
-    
-    # Verificar Celery
+
+
+def _metricas_autorizadas(request):
+    """Token Bearer, usuario staff/administrador o IP de METRICS_IPS_PERMITIDAS"""
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        cabecera = request.META.get('HTTP_AUTHORIZATION', '')
+        if hmac.compare_digest(cabecera.encode(), f'Bearer {token}'.encode()):
+            return True
+
+    usuario = getattr(request, 'user', None)
+    if usuario is not None and (es_administrador(usuario) or (usuario.is_authenticated and usuario.is_staff)):
+        return True
+
+    # REMOTE_ADDR y no X-Forwarded-For, que el cliente puede falsificar
     try:
-        from celery import current_app
-        inspect = current_app.control.inspect()
-        stats = inspect.stats()
-        if stats:
-            estadisticas['celery_disponible'] = True
-    except Exception as e:
-        logger.warning(f"Celery no disponible: {str(e)}")
+        ip = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+    for permitida in getattr(settings, 'METRICS_IPS_PERMITIDAS', []):
+        try:
+            if ip in ipaddress.ip_network(permitida.strip(), strict=False):
+                return True
+        except ValueError:
+            logger.warning(f"METRICS_IPS_PERMITIDAS: entrada no válida '{permitida}'")
+    return False
+
+
+def metricas_view(request):
+    """
+    Endpoint Prometheus (/metrics)
+
+    Se deniega por defecto: exige `Authorization: Bearer <token>`
+    (COMMERCEBOX_METRICS_TOKEN), una sesión staff/administrador o una IP
+    de COMMERCEBOX_METRICS_IPS.
+    """
+    if not _metricas_autorizadas(request):
+        return HttpResponse(status=401 if getattr(settings, 'METRICS_TOKEN', '') else 403)
     
-    return estadisticas
+    contenido, content_type = exportar_metricas()
+    return HttpResponse(contenido, content_type=content_type)
 
 
 
@@ -13,4 +13,23 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'commercebox.settings')
 
-application = get_asgi_application()
+django_asgi_app = get_asgi_application()
+
+from django.conf import settings  # noqa: E402
+
+if getattr(settings, 'ESTADO_PANEL_PUSH', False):
+    # Estado del panel por WebSocket (apps/custom_admin/consumers.py)
+    from channels.auth import AuthMiddlewareStack
+    from channels.routing import ProtocolTypeRouter, URLRouter
+    from channels.security.websocket import AllowedHostsOriginValidator
+
+    from apps.custom_admin.routing import websocket_urlpatterns
+
+    application = ProtocolTypeRouter({
+        'http': django_asgi_app,
+        'websocket': AllowedHostsOriginValidator(
+            AuthMiddlewareStack(URLRouter(websocket_urlpatterns))
+        ),
+    })
+else:
+    application = django_asgi_app
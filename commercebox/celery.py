@@ -1,10 +1,27 @@
 """
 Configuración de Celery para CommerceBox
+
+Topología de colas (ver CELERY_TASK_ROUTES en settings):
+    realtime       notificaciones, impresión, muestreo de salud
+    stock          verificación y recálculo de estados de stock
+    reportes       reportes y exportaciones
+    mantenimiento  limpiezas, archivado, estadísticas
+    default        todo lo que no tenga ruta
+
+Cada worker se levanta con `-Q <cola>`; la concurrencia y el prefetch salen
+del perfil de esa cola (COLAS_PERFILES_WORKER) salvo que se indiquen con
+`-c` / `--prefetch-multiplier`.
 """
 from __future__ import absolute_import, unicode_literals
+import hashlib
+import json
+import logging
 import os
-from celery import Celery
+from celery import Celery, Task
+from celery.signals import beat_init, worker_init
 from django.conf import settings
+from django.core import checks
+from django.core.exceptions import ImproperlyConfigured
 
 # Establecer el módulo de configuración de Django por defecto
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'commercebox.settings')
@@ -18,8 +35,191 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 # Autodescubrir tareas en todas las apps instaladas
 app.autodiscover_tasks(lambda: settings.INSTALLED_APPS)
 
+logger = logging.getLogger('commercebox')
+
 
 @app.task(bind=True, ignore_result=True)
 def debug_task(self):
     """Tarea de debug para verificar que Celery funciona"""
-    print(f'Request: {self.request!r}')
\ No newline at end of file
+    logger.debug(f'Request: {self.request!r}')
+
+
+# ============================================================================
+# DEDUPLICACIÓN DE TAREAS PENDIENTES
+# ============================================================================
+
+def clave_deduplicacion(nombre, args=None, kwargs=None):
+    """Clave de caché que identifica una invocación (tarea + argumentos)"""
+    firma = json.dumps([args or [], kwargs or {}], sort_keys=True, default=str)
+    return f'celery:pendiente:{nombre}:{hashlib.sha1(firma.encode()).hexdigest()}'
+
+
+class TareaDeduplicada(Task):
+    """
+    Tarea que no se encola dos veces con los mismos argumentos
+
+    Al encolar se reserva en caché la clave (tarea + argumentos) con el id
+    del mensaje; si ya existe, hay una invocación idéntica esperando en la
+    cola y se devuelve su resultado en lugar de publicar otra. La clave se
+    libera cuando el worker empieza a ejecutarla, de modo que una
+    invocación nueva durante la ejecución sí se encola. Si el mensaje se
+    pierde o expira, la clave caduca con `expires` (o
+    COLAS_DEDUPLICACION_TTL).
+    """
+
+    def apply_async(self, args=None, kwargs=None, task_id=None, **options):
+        from celery.utils import uuid
+        from django.core.cache import cache
+
+        clave = clave_deduplicacion(self.name, args, kwargs)
+        task_id = task_id or uuid()
+        expira = options.get('expires')
+        ttl = int(expira) if isinstance(expira, (int, float)) else getattr(
+            settings, 'COLAS_DEDUPLICACION_TTL', 60 * 60
+        )
+        ttl += int(options.get('countdown') or 0)
+
+        try:
+            if not cache.add(clave, task_id, timeout=ttl):
+                pendiente = cache.get(clave)
+                if pendiente:
+                    logger.debug(f"{self.name}: invocación idéntica pendiente ({pendiente})")
+                    return self.AsyncResult(pendiente)
+                cache.set(clave, task_id, timeout=ttl)
+        except Exception as e:
+            # Sin caché no se deduplica, pero la tarea se encola igual
+            logger.warning(f"{self.name}: deduplicación no disponible: {str(e)}")
+
+        return super().apply_async(args=args, kwargs=kwargs, task_id=task_id, **options)
+
+    def before_start(self, task_id, args, kwargs):
+        from django.core.cache import cache
+
+        clave = clave_deduplicacion(self.name, args, kwargs)
+        try:
+            if cache.get(clave) == task_id:
+                cache.delete(clave)
+        except Exception:
+            pass
+
+
+# ============================================================================
+# PERFILES DE WORKER POR COLA
+# ============================================================================
+
+def perfil_colas(colas):
+    """
+    Concurrencia y prefetch para un worker que consume `colas`
+
+    Con varias colas se suman las concurrencias y se toma el prefetch más
+    bajo (el de la cola con tareas más largas). Colas sin perfil se ignoran.
+
+    Returns:
+        dict: {'concurrency', 'prefetch_multiplier'} o {} si no hay perfil
+    """
+    perfiles = getattr(settings, 'COLAS_PERFILES_WORKER', {})
+    encontrados = [perfiles[cola] for cola in colas or () if cola in perfiles]
+    if not encontrados:
+        return {}
+    return {
+        'concurrency': sum(perfil['concurrency'] for perfil in encontrados),
+        'prefetch_multiplier': min(perfil['prefetch_multiplier'] for perfil in encontrados),
+    }
+
+
+@worker_init.connect
+def aplicar_perfil_cola(sender=None, **kwargs):
+    """
+    Ajusta el worker al perfil de sus colas antes de crear el pool
+
+    Se respetan `-c` y `--prefetch-multiplier` si se pasaron en la línea de
+    comandos (el prefetch solo cuenta como explícito si difiere del global).
+    """
+    if sender is None:
+        return
+    consume = sender.app.amqp.queues.consume_from
+    perfil = perfil_colas(list(consume) if consume else None)
+    if not perfil:
+        return
+
+    opciones = getattr(sender, 'options', {}) or {}
+    if not opciones.get('concurrency') and not sender.app.conf.worker_concurrency:
+        sender.concurrency = perfil['concurrency']
+    if opciones.get('prefetch_multiplier') in (None, sender.app.conf.worker_prefetch_multiplier):
+        sender.prefetch_multiplier = perfil['prefetch_multiplier']
+
+    logger.info(
+        f"Worker {sender.hostname}: colas {', '.join(sorted(consume))}, "
+        f"concurrencia {sender.concurrency}, prefetch {sender.prefetch_multiplier}"
+    )
+
+
+# ============================================================================
+# VERIFICACIÓN DE NOMBRES DE TAREAS
+# ============================================================================
+
+def tareas_no_registradas(programacion=None, rutas=None):
+    """
+    Nombres de tareas referenciados en beat o en las rutas que no existen
+
+    Importa los módulos `tasks` de todas las apps antes de comparar (sin
+    la señal import_modules: el fixup de Django de Celery corre los checks
+    desde ella). Las rutas con comodines (`apps.x.tasks.*`) no se verifican.
+
+    Returns:
+        list: [(origen, nombre_tarea)]
+    """
+    app.loader.autodiscover_tasks(settings.INSTALLED_APPS)
+    registradas = set(app.tasks.keys())
+
+    if programacion is None:
+        programacion = app.conf.beat_schedule or {}
+    if rutas is None:
+        rutas = app.conf.task_routes or {}
+
+    faltantes = []
+    for entrada, datos in programacion.items():
+        if datos['task'] not in registradas:
+            faltantes.append((f'beat "{entrada}"', datos['task']))
+    if isinstance(rutas, dict):
+        for nombre in rutas:
+            if '*' not in nombre and nombre not in registradas:
+                faltantes.append(('ruta', nombre))
+    return faltantes
+
+
+def verificar_tareas():
+    """Lanza ImproperlyConfigured si hay nombres de tareas colgantes"""
+    faltantes = tareas_no_registradas()
+    if faltantes:
+        detalle = '; '.join(f'{origen}: {nombre}' for origen, nombre in faltantes)
+        raise ImproperlyConfigured(f'Tareas de Celery no registradas: {detalle}')
+
+
+@worker_init.connect
+@beat_init.connect
+def verificar_tareas_al_iniciar(sender=None, **kwargs):
+    """
+    Detiene el worker / beat si la configuración apunta a tareas inexistentes
+
+    Celery registra y descarta las excepciones de los handlers de señales;
+    SystemExit sí interrumpe el arranque.
+    """
+    try:
+        verificar_tareas()
+    except ImproperlyConfigured as e:
+        logger.critical(str(e))
+        raise SystemExit(str(e))
+
+
+@checks.register('celery')
+def revisar_tareas_celery(app_configs=None, **kwargs):
+    """Check de Django: mismos nombres que verifica el arranque de Celery"""
+    return [
+        checks.Error(
+            f'{origen} apunta a la tarea inexistente "{nombre}"',
+            hint='Revise CELERY_BEAT_SCHEDULE / CELERY_TASK_ROUTES o el name= de la tarea',
+            id='commercebox.E001',
+        )
+        for origen, nombre in tareas_no_registradas()
+    ]
@@ -0,0 +1,213 @@
+"""
+Enrutamiento de lecturas analíticas a la réplica `reporting`
+
+Las escrituras y las lecturas normales (POS, caja, inventario) van siempre
+al primario. Solo se leen de la réplica las consultas que se ejecutan
+dentro de `lectura_reportes()`, que se usa de forma explícita en los
+generadores de reportes, los helpers de cuentas por cobrar / pagar, las
+exportaciones y las tareas de reportes:
+
+    with lectura_reportes(hasta=fecha_hasta):
+        SalesReportGenerator(desde, hasta).reporte_ventas_periodo()
+
+    @lectura_reportes()
+    def resumen_general(): ...
+
+Antes de usar la réplica se mide su retraso (cacheado unos segundos). Un
+período que incluye hoy solo tolera REPORTES_REPLICA_RETRASO_MAXIMO
+segundos; uno que terminó antes tolera el tiempo transcurrido desde su
+cierre (la réplica ya tiene esos días completos). Si la réplica no está
+configurada, no responde o está más atrasada, o si hay una transacción
+abierta en el primario, se lee del primario.
+"""
+import contextvars
+import logging
+from contextlib import ContextDecorator
+from datetime import date, datetime, time, timedelta
+from functools import wraps
+from inspect import isfunction
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+logger = logging.getLogger('commercebox')
+
+ALIAS_REPORTES = 'reporting'
+CACHE_RETRASO = 'db:reporting:retraso'
+
+# Alias elegido por el lectura_reportes() activo (None = fuera de uno)
+_alias_lectura = contextvars.ContextVar('commercebox_alias_lectura', default=None)
+
+
+def replica_configurada():
+    return ALIAS_REPORTES in connections.settings
+
+
+def retraso_replica():
+    """
+    Segundos de retraso de la réplica respecto al primario
+
+    0 si la réplica está al día (o el alias no es una réplica en
+    recuperación, como la conexión local de desarrollo); None si no
+    responde. El valor se cachea REPORTES_REPLICA_RETRASO_CACHE segundos.
+    """
+    try:
+        retraso = cache.get(CACHE_RETRASO)
+    except Exception:
+        retraso = None
+    if retraso is not None:
+        return None if retraso < 0 else retraso
+
+    try:
+        conexion = connections[ALIAS_REPORTES]
+        if conexion.vendor != 'postgresql':
+            retraso = 0.0
+        else:
+            with conexion.cursor() as cursor:
+                # Sin WAL pendiente de aplicar la réplica está al día aunque
+                # el último commit replicado sea antiguo (primario inactivo)
+                cursor.execute("""
+                    SELECT CASE
+                        WHEN NOT pg_is_in_recovery() THEN 0
+                        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                        ELSE COALESCE(
+                            EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0
+                        )
+                    END
+                """)
+                retraso = float(cursor.fetchone()[0])
+    except Exception as e:
+        logger.warning(f"Réplica de reportes no disponible: {str(e)}")
+        retraso = -1.0
+
+    try:
+        cache.set(CACHE_RETRASO, retraso, timeout=getattr(settings, 'REPORTES_REPLICA_RETRASO_CACHE', 10))
+    except Exception:
+        pass
+    return None if retraso < 0 else retraso
+
+
+def _fin_del_dia(valor):
+    """Instante en que termina el día `valor` (date, datetime o 'AAAA-MM-DD')"""
+    if isinstance(valor, str):
+        valor = parse_date(valor)
+    if isinstance(valor, datetime):
+        return valor if timezone.is_aware(valor) else timezone.make_aware(valor)
+    if isinstance(valor, date):
+        return timezone.make_aware(datetime.combine(valor + timedelta(days=1), time.min))
+    return None
+
+
+def alias_reportes(hasta=None):
+    """
+    Alias desde el que leer un reporte cuyo período termina en `hasta`
+
+    Args:
+        hasta: Último día (o instante) del período; None = incluye hoy
+
+    Returns:
+        str: 'reporting' o 'default'
+    """
+    if not replica_configurada():
+        return DEFAULT_DB_ALIAS
+    # Dentro de una transacción del primario la réplica no ve lo que se
+    # acaba de escribir
+    if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return DEFAULT_DB_ALIAS
+
+    tolerancia = getattr(settings, 'REPORTES_REPLICA_RETRASO_MAXIMO', 5)
+    fin = _fin_del_dia(hasta) if hasta is not None else None
+    if fin is not None:
+        tolerancia = max(tolerancia, (timezone.now() - fin).total_seconds())
+
+    retraso = retraso_replica()
+    if retraso is None or retraso > tolerancia:
+        if retraso is not None:
+            logger.info(
+                f"Réplica de reportes con {retraso:.0f} s de retraso "
+                f"(tolerancia {tolerancia:.0f} s), se lee del primario"
+            )
+        return DEFAULT_DB_ALIAS
+    return ALIAS_REPORTES
+
+
+class lectura_reportes(ContextDecorator):
+    """
+    Context manager / decorador: las lecturas del bloque van a la réplica
+
+    Dentro de otro lectura_reportes() se conserva la decisión exterior, para
+    que un mismo reporte no mezcle réplica y primario.
+    """
+
+    def __init__(self, hasta=None):
+        self.hasta = hasta
+        self._token = None
+
+    def _recreate_cm(self):
+        # Una instancia por llamada: el decorador es reentrante y thread-safe
+        return type(self)(self.hasta)
+
+    def __enter__(self):
+        alias = _alias_lectura.get()
+        if alias is None:
+            alias = alias_reportes(self.hasta)
+            self._token = _alias_lectura.set(alias)
+        return alias
+
+    def __exit__(self, *exc):
+        if self._token is not None:
+            _alias_lectura.reset(self._token)
+            self._token = None
+        return False
+
+
+def en_replica_reportes(atributo_hasta='fecha_hasta'):
+    """
+    Decorador de clase para generadores de reportes
+
+    Ejecuta cada método público dentro de lectura_reportes(), con el fin
+    del período tomado del atributo `atributo_hasta` de la instancia.
+    """
+    def decorar(cls):
+        for nombre, metodo in list(vars(cls).items()):
+            if nombre.startswith('_') or not isfunction(metodo):
+                continue
+            setattr(cls, nombre, _envolver_metodo(metodo, atributo_hasta))
+        return cls
+    return decorar
+
+
+def _envolver_metodo(metodo, atributo_hasta):
+    @wraps(metodo)
+    def envuelto(self, *args, **kwargs):
+        with lectura_reportes(getattr(self, atributo_hasta, None)):
+            return metodo(self, *args, **kwargs)
+    return envuelto
+
+
+class ReportingRouter:
+    """
+    Router de base de datos: la réplica solo dentro de lectura_reportes()
+
+    Las escrituras van siempre al primario, también las de instancias
+    leídas desde la réplica.
+    """
+
+    def db_for_read(self, model, **hints):
+        return _alias_lectura.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Ambos alias contienen los mismos datos
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # El esquema de la réplica llega por replicación
+        if db == ALIAS_REPORTES:
+            return False
+        return None
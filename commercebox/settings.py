@@ -8,9 +8,11 @@ Cambios: CORS, CSRF, ALLOWED_HOSTS, SESIONES configurados correctamente
 """
 
 import os
+import sys
 from pathlib import Path
 from datetime import timedelta
-from decouple import config
+from decouple import config, Csv
+import structlog
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -52,6 +54,7 @@ THIRD_PARTY_APPS = [
     'django_extensions',
     'django_filters',
     'rest_framework.authtoken',
+    'django_prometheus',
 ]
 
 COMMERCEBOX_APPS = [
@@ -73,7 +76,8 @@ INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + COMMERCEBOX_APPS
 # 🔧 CORRECCIÓN 2: MIDDLEWARE - Agregar CsrfExemptAgenteMiddleware
 # ============================================================================
 MIDDLEWARE = [
-    'corsheaders.middleware.CorsMiddleware',  # ✅ Debe estar primero
+    'django_prometheus.middleware.PrometheusBeforeMiddleware',
+    'corsheaders.middleware.CorsMiddleware',  # ✅ Debe estar primero (después de Prometheus)
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -86,6 +90,9 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     # Middleware para excluir CSRF del agente
     'apps.hardware_integration.middleware.CsrfExemptAgenteMiddleware',
+    # Métricas: consultas SQL por petición y latencia HTTP
+    'apps.system_configuration.middleware.MetricasConsultasMiddleware',
+    'django_prometheus.middleware.PrometheusAfterMiddleware',
 ]
 
 ROOT_URLCONF = 'commercebox.urls'
@@ -109,6 +116,27 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'commercebox.wsgi.application'
 
+# Perfil del proceso: define cuánto vive cada conexión a la base de datos
+#   web      peticiones cortas y muchos procesos: conexiones reutilizadas un minuto
+#   worker   Celery (pocos procesos, tareas largas): conexiones de vida larga;
+#            el fixup de Django de Celery las valida entre tareas
+#   comando  manage.py (migraciones, comandos): sin persistencia
+_ejecutable = os.path.basename(sys.argv[0]) if sys.argv else ''
+if 'celery' in _ejecutable:
+    _proceso = 'worker'
+elif _ejecutable == 'manage.py' and 'runserver' not in sys.argv:
+    _proceso = 'comando'
+else:
+    _proceso = 'web'
+PROCESO = config('COMMERCEBOX_PROCESO', default=_proceso)
+
+PERFILES_CONEXION_DB = {
+    'web': {'CONN_MAX_AGE': 60},
+    'worker': {'CONN_MAX_AGE': 600},
+    'comando': {'CONN_MAX_AGE': 0},
+}
+_perfil_db = PERFILES_CONEXION_DB.get(PROCESO, PERFILES_CONEXION_DB['web'])
+
 # Database Configuration
 if config('COMMERCEBOX_USE_SQLITE', default=False, cast=bool):
     # SQLite para desarrollo rápido
@@ -116,10 +144,25 @@ if config('COMMERCEBOX_USE_SQLITE', default=False, cast=bool):
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
-        }
+        },
+        # "Réplica" local: segunda conexión al mismo archivo, sin retraso.
+        # Permite ejercitar el enrutamiento de reportes sin PostgreSQL.
+        'reporting': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            'TEST': {'MIRROR': 'default'},
+        },
     }
 else:
     # PostgreSQL para producción y desarrollo completo
+    #
+    # Con COMMERCEBOX_DB_POOLER=pgbouncer, HOST/PORT apuntan a PgBouncer en
+    # modo transacción: no se envían parámetros de arranque que PgBouncer
+    # rechaza y las conexiones persistentes se mantienen contra el pooler
+    # (baratas), que reparte pocas conexiones reales de PostgreSQL.
+    # Los cursores del servidor se desactivan por defecto en ese modo; los
+    # iterator() propios ya corren dentro de transaction.atomic().
+    DB_POOLER = config('COMMERCEBOX_DB_POOLER', default='')
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.postgresql',
@@ -128,9 +171,45 @@ else:
             'PASSWORD': config('COMMERCEBOX_DB_PASSWORD', default=''),
             'HOST': config('COMMERCEBOX_DB_HOST', default='localhost'),
             'PORT': config('COMMERCEBOX_DB_PORT', default='5432'),
+            'CONN_MAX_AGE': config(
+                'COMMERCEBOX_DB_CONN_MAX_AGE', default=_perfil_db['CONN_MAX_AGE'], cast=int
+            ),
+            # Verifica la conexión reutilizada al inicio de cada petición
+            'CONN_HEALTH_CHECKS': True,
+            'DISABLE_SERVER_SIDE_CURSORS': config(
+                'COMMERCEBOX_DB_DISABLE_SERVER_SIDE_CURSORS', default=DB_POOLER == 'pgbouncer', cast=bool
+            ),
+            'OPTIONS': {
+                'connect_timeout': 5,
+                # Identifica el perfil en pg_stat_activity / SHOW CLIENTS
+                'application_name': f'commercebox-{PROCESO}',
+            },
         }
     }
 
+    # Réplica de lectura para reportes, dashboards y exportaciones (ver
+    # commercebox/db_router.py). Sin COMMERCEBOX_DB_REPORTING_HOST todo se
+    # lee del primario.
+    _replica_host = config('COMMERCEBOX_DB_REPORTING_HOST', default='')
+    if _replica_host:
+        DATABASES['reporting'] = {
+            **DATABASES['default'],
+            'HOST': _replica_host,
+            'PORT': config('COMMERCEBOX_DB_REPORTING_PORT', default=DATABASES['default']['PORT']),
+            'USER': config('COMMERCEBOX_DB_REPORTING_USER', default=DATABASES['default']['USER']),
+            'PASSWORD': config(
+                'COMMERCEBOX_DB_REPORTING_PASSWORD', default=DATABASES['default']['PASSWORD']
+            ),
+            'OPTIONS': {
+                **DATABASES['default']['OPTIONS'],
+                'application_name': f'commercebox-{PROCESO}-reportes',
+            },
+            # En pruebas la réplica es la misma base de datos que default
+            'TEST': {'MIRROR': 'default'},
+        }
+
+DATABASE_ROUTERS = ['commercebox.db_router.ReportingRouter']
+
 # Usuario personalizado
 AUTH_USER_MODEL = 'authentication.Usuario'
 
@@ -267,17 +346,95 @@ CELERY_TASK_SOFT_TIME_LIMIT = 25 * 60  # 25 minutos
 CELERY_WORKER_PREFETCH_MULTIPLIER = 4
 CELERY_WORKER_MAX_TASKS_PER_CHILD = 100
 
+# Colas: el trabajo sensible a latencia no comparte workers con los
+# recálculos y reportes pesados
+from kombu import Queue
+
+CELERY_TASK_DEFAULT_QUEUE = 'default'
+CELERY_TASK_QUEUES = (
+    Queue('realtime'),
+    Queue('stock'),
+    Queue('reportes'),
+    Queue('mantenimiento'),
+    Queue('default'),
+)
+
+# Rutas por nombre de tarea (los nombres exactos tienen prioridad sobre los comodines)
+CELERY_TASK_ROUTES = {
+    # Tiempo real: notificaciones, impresión y muestreo de salud
+    'apps.notifications.tasks.*': {'queue': 'realtime'},
+    'apps.hardware_integration.tasks.*': {'queue': 'realtime'},
+    'apps.system_configuration.tasks.muestrear_salud_sistema': {'queue': 'realtime'},
+    'apps.system_configuration.tasks.medir_latencia_cola': {'queue': 'realtime'},
+
+    # Estados de stock
+    'apps.stock_alert_system.tasks.check_stock_alerts': {'queue': 'stock'},
+    'apps.stock_alert_system.tasks.recalculate_all_stock_status': {'queue': 'stock'},
+    'apps.stock_alert_system.tasks.send_daily_stock_summary': {'queue': 'stock'},
+
+    # Reportes
+    'apps.reports_analytics.tasks.*': {'queue': 'reportes'},
+    'apps.sales_management.tasks.generar_reporte_diario': {'queue': 'reportes'},
+
+    # Mantenimiento
+    'apps.reports_analytics.tasks.limpiar_snapshots_antiguos': {'queue': 'mantenimiento'},
+    'apps.stock_alert_system.tasks.cleanup_old_alerts': {'queue': 'mantenimiento'},
+    'apps.system_configuration.tasks.compactar_health_checks': {'queue': 'mantenimiento'},
+    'apps.system_configuration.tasks.mantener_ciclo_datos': {'queue': 'mantenimiento'},
+    'apps.authentication.tasks.*': {'queue': 'mantenimiento'},
+    'apps.sales_management.tasks.verificar_creditos_vencidos': {'queue': 'mantenimiento'},
+    'apps.sales_management.tasks.actualizar_estadisticas_clientes': {'queue': 'mantenimiento'},
+}
+
+# Perfil de cada cola; un worker lanzado con `-Q <cola>` lo aplica salvo
+# que se pase -c / --prefetch-multiplier (ver commercebox/celery.py)
+COLAS_PERFILES_WORKER = {
+    # Tareas cortas: varias en paralelo y algo de prefetch
+    'realtime': {'concurrency': 4, 'prefetch_multiplier': 4},
+    # Tareas largas: prefetch 1 para no retener mensajes detrás de una pesada
+    'stock': {'concurrency': 2, 'prefetch_multiplier': 1},
+    'reportes': {'concurrency': 2, 'prefetch_multiplier': 1},
+    'mantenimiento': {'concurrency': 1, 'prefetch_multiplier': 1},
+    'default': {'concurrency': 2, 'prefetch_multiplier': 4},
+}
+
+# Vigencia (segundos) de la clave de deduplicación cuando la tarea no
+# indica `expires`
+COLAS_DEDUPLICACION_TTL = config('COMMERCEBOX_COLAS_DEDUPLICACION_TTL', default=60 * 60, cast=int)
+
 # Beat Schedule (Tareas periódicas)
+# Los nombres se verifican al arrancar worker / beat y con `manage.py check`
 from celery.schedules import crontab
 
 CELERY_BEAT_SCHEDULE = {
     'verificar-alertas-stock': {
-        'task': 'apps.stock_alert_system.tasks.verificar_alertas_stock',
+        'task': 'apps.stock_alert_system.tasks.check_stock_alerts',
         'schedule': crontab(minute='*/15'),
         'options': {
             'expires': 10 * 60,
         }
     },
+    'revisar-vencimientos': {
+        'task': 'apps.stock_alert_system.tasks.revisar_vencimientos',
+        'schedule': crontab(hour=6, minute=30),
+        'options': {
+            'expires': 60 * 60,
+        }
+    },
+    'resumen-diario-stock': {
+        'task': 'apps.stock_alert_system.tasks.send_daily_stock_summary',
+        'schedule': crontab(hour=7, minute=0),
+        'options': {
+            'expires': 60 * 60,
+        }
+    },
+    'limpiar-alertas-antiguas': {
+        'task': 'apps.stock_alert_system.tasks.cleanup_old_alerts',
+        'schedule': crontab(hour=3, minute=15, day_of_week=0),
+        'options': {
+            'expires': 60 * 60,
+        }
+    },
     'procesar-notificaciones-pendientes': {
         'task': 'apps.notifications.tasks.procesar_notificaciones_pendientes',
         'schedule': crontab(minute='*/5'),
@@ -293,12 +450,68 @@ CELERY_BEAT_SCHEDULE = {
         }
     },
     'generar-reporte-ventas-diario': {
-        'task': 'apps.reports_analytics.tasks.generar_reporte_ventas_diario',
-        'schedule': crontab(hour=23, minute=30),
+        'task': 'apps.sales_management.tasks.generar_reporte_diario',
+        'schedule': crontab(hour=23, minute=59),
         'options': {
             'expires': 15 * 60,
         }
     },
+    'verificar-creditos-vencidos': {
+        'task': 'apps.sales_management.tasks.verificar_creditos_vencidos',
+        'schedule': crontab(hour=8, minute=0),
+        'options': {
+            'expires': 60 * 60,
+        }
+    },
+    'actualizar-estadisticas-clientes': {
+        'task': 'apps.sales_management.tasks.actualizar_estadisticas_clientes',
+        'schedule': crontab(hour=4, minute=30, day_of_week=0),
+        'options': {
+            'expires': 2 * 60 * 60,
+        }
+    },
+    'aplicar-estados-dispositivos': {
+        'task': 'apps.hardware_integration.tasks.aplicar_estados_dispositivos',
+        'schedule': crontab(minute='*'),
+        'options': {
+            'expires': 50,
+        }
+    },
+    'muestrear-salud-sistema': {
+        'task': 'apps.system_configuration.tasks.muestrear_salud_sistema',
+        'schedule': crontab(minute='*'),
+        'options': {
+            'expires': 50,
+        }
+    },
+    'compactar-health-checks': {
+        'task': 'apps.system_configuration.tasks.compactar_health_checks',
+        'schedule': crontab(hour=3, minute=30),
+        'options': {
+            'expires': 30 * 60,
+        }
+    },
+    'mantener-ciclo-datos': {
+        'task': 'apps.system_configuration.tasks.mantener_ciclo_datos',
+        'schedule': crontab(hour=2, minute=30),
+        'options': {
+            'expires': 2 * 60 * 60,
+        }
+    },
+    'limpiar-snapshots-antiguos': {
+        'task': 'apps.reports_analytics.tasks.limpiar_snapshots_antiguos',
+        'schedule': crontab(hour=4, minute=0),
+        'options': {
+            'expires': 30 * 60,
+        }
+    },
+    'actualizar-resumen-movimientos': {
+        'task': 'apps.reports_analytics.tasks.actualizar_resumen_movimientos',
+        'schedule': crontab(hour=0, minute=15),
+        'options': {
+            'expires': 60 * 60,
+        }
+    },
 }
 
 # Monitoreo
@@ -312,6 +525,33 @@ CELERY_TASK_ALWAYS_EAGER = False
 # FIN DE CONFIGURACIÓN DE CELERY
 # ============================================================================
 
+# ============================================================================
+# MONITOREO DE SALUD Y MÉTRICAS
+# ============================================================================
+
+# Muestras de salud conservadas en el buffer circular (1 por minuto)
+HEALTH_MUESTRAS_MAX = config('COMMERCEBOX_HEALTH_MUESTRAS_MAX', default=240, cast=int)
+
+# Un HealthCheck se guarda al cambiar el estado o, como mínimo, cada N minutos
+HEALTH_PERSISTENCIA_MINUTOS = config('COMMERCEBOX_HEALTH_PERSISTENCIA_MINUTOS', default=15, cast=int)
+
+# Días de histórico de HealthCheck (submuestreado a 1 por hora pasado un día)
+HEALTH_RETENCION_DIAS = config('COMMERCEBOX_HEALTH_RETENCION_DIAS', default=30, cast=int)
+
+# Ciclo de vida de tablas históricas (movimientos, logs, historiales):
+# particiones mensuales en PostgreSQL y archivo en .csv.gz de los meses
+# que superan la retención. DATOS_RETENCION_MESES sobrescribe la retención
+# por modelo, p. ej. {'authentication.LogAcceso': 6}
+DATOS_PARTICIONES_ADELANTE = config('COMMERCEBOX_DATOS_PARTICIONES_ADELANTE', default=3, cast=int)
+DATOS_RETENCION_MESES = {}
+DATOS_ARCHIVO_DIR = config('COMMERCEBOX_DATOS_ARCHIVO_DIR', default=str(BASE_DIR / 'archivo'))
+
+# /metrics solo responde con 'Authorization: Bearer <token>', a usuarios
+# staff/administradores o a las IPs/redes de METRICS_IPS_PERMITIDAS
+# (p. ej. '10.0.0.5,172.18.0.0/16'); sin nada configurado se deniega
+METRICS_TOKEN = config('COMMERCEBOX_METRICS_TOKEN', default='')
+METRICS_IPS_PERMITIDAS = config('COMMERCEBOX_METRICS_IPS', default='', cast=Csv())
+
 # CommerceBox Specific Settings
 COMMERCEBOX_SETTINGS = {
     'SYSTEM_NAME': 'CommerceBox',
@@ -331,6 +571,23 @@ COMMERCEBOX_SETTINGS = {
 LOGS_DIR = BASE_DIR / 'logs'
 LOGS_DIR.mkdir(exist_ok=True)
 
+# structlog sobre el logging estándar: los eventos estructurados (logger
+# commercebox.rendimiento) pasan por los handlers de LOGGING y se
+# serializan como JSON con el formatter 'json'
+structlog.configure(
+    processors=[
+        structlog.contextvars.merge_contextvars,
+        structlog.stdlib.filter_by_level,
+        structlog.stdlib.add_logger_name,
+        structlog.stdlib.add_log_level,
+        structlog.processors.TimeStamper(fmt='iso'),
+        structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
+    ],
+    logger_factory=structlog.stdlib.LoggerFactory(),
+    wrapper_class=structlog.stdlib.BoundLogger,
+    cache_logger_on_first_use=True,
+)
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -343,6 +600,10 @@ LOGGING = {
             'format': '{levelname} {message}',
             'style': '{',
         },
+        'json': {
+            '()': structlog.stdlib.ProcessorFormatter,
+            'processor': structlog.processors.JSONRenderer(ensure_ascii=False),
+        },
     },
     'handlers': {
         'file': {
@@ -361,6 +622,14 @@ LOGGING = {
             'backupCount': 10,
             'formatter': 'verbose',
         },
+        'rendimiento': {
+            'level': 'DEBUG',
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': LOGS_DIR / 'commercebox_rendimiento.log',
+            'maxBytes': 1024*1024*15,  # 15MB
+            'backupCount': 10,
+            'formatter': 'json',
+        },
         'console': {
             'level': 'DEBUG',
             'class': 'logging.StreamHandler',
@@ -370,7 +639,14 @@ LOGGING = {
     'loggers': {
         'commercebox': {
             'handlers': ['file', 'console'],
-            'level': 'INFO',
+            'level': config('COMMERCEBOX_LOG_LEVEL', default='INFO'),
+            'propagate': False,
+        },
+        # Una línea JSON por petición (INFO) o servicio (DEBUG); WARNING
+        # solo para presupuestos excedidos
+        'commercebox.rendimiento': {
+            'handlers': ['rendimiento'],
+            'level': config('COMMERCEBOX_RENDIMIENTO_LOG_LEVEL', default='INFO'),
             'propagate': False,
         },
         'commercebox.audit': {
@@ -482,7 +758,6 @@ if not DEBUG:
 # Estas configuraciones DEBEN estar DESPUÉS del bloque "if not DEBUG"
 # para que no sean sobrescritas
 
-SESSION_ENGINE = 'django.contrib.sessions.backends.db'
 SESSION_COOKIE_AGE = 86400
 SESSION_EXPIRE_AT_BROWSER_CLOSE = False
 SESSION_SAVE_EVERY_REQUEST = True
@@ -500,14 +775,25 @@ SESSION_COOKIE_PATH = '/'  # ← AGREGA ESTA LÍNEA
 # Cache Configuration
 CACHES = {
     'default': {
-        'BACKEND': 'django_redis.cache.RedisCache',
+        'BACKEND': 'apps.system_configuration.cache.RedisCacheInstrumentada',
         'LOCATION': config('COMMERCEBOX_REDIS_URL', default='redis://localhost:6379/1'),
         'OPTIONS': {
             'CLIENT_CLASS': 'django_redis.client.DefaultClient',
         },
         'KEY_PREFIX': 'commercebox',
         'TIMEOUT': 300,
-    }
+    },
+    # Sesiones (SESSION_BACKEND cache / cached_db). Sin Redis, cached_db
+    # sigue funcionando contra la BD gracias a IGNORE_EXCEPTIONS
+    'sesiones': {
+        'BACKEND': 'apps.system_configuration.cache.RedisCacheInstrumentada',
+        'LOCATION': config('COMMERCEBOX_REDIS_URL', default='redis://localhost:6379/1'),
+        'OPTIONS': {
+            'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            'IGNORE_EXCEPTIONS': True,
+        },
+        'KEY_PREFIX': 'commercebox-sesion',
+    },
 }
 
 # Password Reset Configuration
@@ -530,6 +816,88 @@ os.makedirs(os.path.join(MEDIA_ROOT, 'reports'), exist_ok=True)
 FILE_UPLOAD_MAX_MEMORY_SIZE = 5242880  # 5MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 5242880  # 5MB
 
+# Exportaciones (Excel / PDF / CSV)
+# Por encima del umbral la exportación se genera con Celery y se guarda en ReporteGuardado
+EXPORTACION_UMBRAL_ASINCRONO = config('COMMERCEBOX_EXPORT_ASYNC_THRESHOLD', default=20000, cast=int)
+EXPORTACION_CHUNK_SIZE = 2000  # Filas por bloque del cursor de la BD
+EXPORTACION_PDF_MAX_FILAS = 5000
+
+# Caché de resultados de reportes analíticos (segundos) para períodos abiertos.
+# Los períodos cerrados se invalidan por mes cuando cambia un registro con
+# fecha en ese mes; el TTL cubre cambios hechos sin señales (update(), SQL).
+REPORTES_CACHE_TIMEOUT = config('COMMERCEBOX_REPORTS_CACHE_TIMEOUT', default=300, cast=int)
+REPORTES_CACHE_TIMEOUT_CERRADO = config('COMMERCEBOX_REPORTS_CACHE_TIMEOUT_CLOSED', default=86400, cast=int)
+# Rangos de más días se calculan en Celery cuando la página puede esperar el progreso
+REPORTES_DIAS_ASINCRONO = config('COMMERCEBOX_REPORTS_ASYNC_DAYS', default=92, cast=int)
+# Retraso máximo (s) de la réplica para leer datos de hoy; los períodos
+# cerrados toleran el tiempo transcurrido desde su cierre
+REPORTES_REPLICA_RETRASO_MAXIMO = config('COMMERCEBOX_REPORTS_REPLICA_MAX_LAG', default=5, cast=int)
+REPORTES_REPLICA_RETRASO_CACHE = 10  # Segundos que se reutiliza la medición del retraso
+
+# Ventas a granel: quintales que se bloquean por consulta al repartir en FIFO
+# (FIFOAllocationService); los sacos bloqueados por otra caja se saltan
+FIFO_LOTE_QUINTALES = 10
+
+# Terminales POS fuera de línea (sales_management/sincronizacion.py): ventas
+# por lote y margen (s) que se relee en el feed de catálogo para no perder
+# transacciones que confirmaron después de la versión anterior
+SINCRONIZACION_LOTE_MAXIMO = config('COMMERCEBOX_SINCRONIZACION_LOTE_MAXIMO', default=200, cast=int)
+SINCRONIZACION_MARGEN_SEGUNDOS = 5
+
+# Estado del panel (/panel/api/estado/): segundos que vive la copia en caché
+# si ninguna señal la invalida antes, y modo push por WebSocket (Channels,
+# requiere servir con ASGI y Redis como capa de canales)
+ESTADO_PANEL_TTL = config('COMMERCEBOX_ESTADO_PANEL_TTL', default=60, cast=int)
+ESTADO_PANEL_PUSH = config('COMMERCEBOX_ESTADO_PANEL_PUSH', default=False, cast=bool)
+if ESTADO_PANEL_PUSH:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {'hosts': [config('COMMERCEBOX_REDIS_URL', default='redis://localhost:6379/1')]},
+        },
+    }
+
+# Registro de unidades (inventory_management/utils/unit_registry.py): cada
+# cuántos segundos un proceso compara su matriz de conversión con la
+# versión compartida en caché
+UNIDADES_VERIFICAR_SEGUNDOS = 30
+
+# Calendario de vencimientos: umbrales de aviso (días) además de
+# dias_alerta_vencimiento de la configuración de alertas; la revisión diaria
+# avisa una vez por umbral cruzado
+VENCIMIENTO_UMBRALES_DIAS = (7, 3, 1)
+
+# Presupuestos de rendimiento por endpoint (ver system_configuration/instrumentacion.py)
+# Clave: view_name de la URL o Clase.metodo del servicio; admite patrones
+# fnmatch y se usa la primera coincidencia. Límites: consultas, tiempo_ms y
+# tiempo_db_ms (None = sin límite). Solo el exceso de consultas puede lanzar
+# PresupuestoExcedido (modo 'error', por defecto en las pruebas); el tiempo
+# se registra como warning.
+RENDIMIENTO_PRESUPUESTOS = {
+    # Procesos masivos: se miden pero no tienen límite
+    'StatusCalculator.calcular_todos_los_productos': {},
+    'StatusCalculator.verificar_quintales_individuales': {},
+    'AlertaManager.barrido': {},
+    'AlertaManager.resolver_alertas_automaticamente': {},
+    'AlertaManager.limpiar_alertas_antiguas': {},
+    'CalendarioVencimientos.revisar': {},
+    'NotificationService.procesar_pendientes': {},
+    'sales_management:sincronizacion_ventas': {'tiempo_ms': 30000},
+    'StatusCalculator.calcular_estado': {'consultas': 15, 'tiempo_ms': 200},
+    'POSService.*': {'consultas': 60, 'tiempo_ms': 1000},
+    'CashService.*': {'consultas': 30, 'tiempo_ms': 500},
+    'NotificationService.*': {'consultas': 20, 'tiempo_ms': 500},
+    '*': {'consultas': 200, 'tiempo_ms': 2000},
+}
+RENDIMIENTO_PRESUPUESTO_MODO = config(
+    'COMMERCEBOX_RENDIMIENTO_PRESUPUESTO_MODO',
+    default='error' if sys.argv[1:2] == ['test'] else 'log'
+)
+
+# Listados paginados por cursor: por encima de este número de filas el total
+# se estima con el planificador de PostgreSQL en lugar de un COUNT(*) exacto
+PAGINACION_UMBRAL_CONTEO = config('COMMERCEBOX_PAGINACION_UMBRAL_CONTEO', default=10000, cast=int)
+
 # Formato de números decimales
 USE_THOUSAND_SEPARATOR = True
 THOUSAND_SEPARATOR = ','
@@ -537,7 +905,20 @@ DECIMAL_SEPARATOR = '.'
 NUMBER_GROUPING = 3
 
 # Session Configuration
-SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+# COMMERCEBOX_SESSION_BACKEND:
+#   cached_db  lectura desde Redis, escritura también en BD (por defecto con PostgreSQL)
+#   cache      solo Redis: sin consultas de sesión, pero se pierden si Redis se vacía
+#   db         solo BD (por defecto con SQLite, sin Redis)
+SESSION_BACKEND = config(
+    'COMMERCEBOX_SESSION_BACKEND',
+    default='db' if config('COMMERCEBOX_USE_SQLITE', default=False, cast=bool) else 'cached_db'
+)
+SESSION_ENGINE = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+}[SESSION_BACKEND]
+SESSION_CACHE_ALIAS = 'sesiones'
 SESSION_COOKIE_NAME = 'sessionid'
 SESSION_COOKIE_AGE = 86400  # 24 hours
 SESSION_SAVE_EVERY_REQUEST = False
@@ -7,6 +7,7 @@ from django.views.decorators.cache import cache_page
 from django.shortcuts import redirect
 from apps.custom_admin.views import login_page_view
 from apps.authentication.views import logout_view
+from apps.system_configuration.views import metricas_view
 
 admin.site.site_header = 'CommerceBox - Django Admin'
 admin.site.site_title = 'CommerceBox Admin'
@@ -72,6 +73,11 @@ urlpatterns = [
     # ========================================
     path('manifest.json', manifest_view, name='pwa_manifest'),
     
+    # ========================================
+    # MÉTRICAS (Prometheus)
+    # ========================================
+    path('metrics', metricas_view, name='prometheus_metrics'),
+    
     # ========================================
     # PANEL ADMINISTRATIVO
     # ========================================
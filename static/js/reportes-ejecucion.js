@@ -0,0 +1,135 @@
+// ============================================
+// EJECUCIÓN DE REPORTES Y EXPORTACIONES EN SEGUNDO PLANO
+// ============================================
+// Cuando el servidor responde 202 (la tarea quedó encolada en Celery) se
+// consulta api_estado_ejecucion hasta que termine, en lugar de mostrar el
+// JSON crudo en el navegador. Sirve para las exportaciones (descargarExportacion)
+// y para las APIs de reportes (obtenerReporte, que pide ?async=1).
+(function () {
+    const INTERVALO_MS = 1500;
+
+    function esperar(ms) {
+        return new Promise(resolve => setTimeout(resolve, ms));
+    }
+
+    // Consulta el estado hasta COMPLETADO (resuelve con la respuesta) o ERROR (rechaza)
+    async function esperarEjecucion(urlEstado, alProgresar) {
+        while (true) {
+            const respuesta = await fetch(urlEstado, {
+                credentials: 'same-origin',
+                headers: { 'Accept': 'application/json' }
+            });
+            if (!respuesta.ok) {
+                throw new Error(`No se pudo consultar el estado (${respuesta.status})`);
+            }
+            const estado = await respuesta.json();
+            if (estado.estado === 'COMPLETADO') {
+                return estado;
+            }
+            if (estado.estado === 'ERROR') {
+                throw new Error(estado.error || 'La ejecución terminó con error');
+            }
+            if (alProgresar) {
+                alProgresar(estado);
+            }
+            await esperar(INTERVALO_MS);
+        }
+    }
+
+    // Aviso flotante con los estilos alert-admin del panel
+    function mostrarAviso(mensaje, tipo = 'info') {
+        let aviso = document.getElementById('aviso-ejecucion');
+        if (!aviso) {
+            aviso = document.createElement('div');
+            aviso.id = 'aviso-ejecucion';
+            aviso.style.cssText = 'position: fixed; bottom: 20px; right: 20px; max-width: 420px; z-index: 2000; box-shadow: 0 10px 25px rgba(0,0,0,0.15);';
+            document.body.appendChild(aviso);
+        }
+        aviso.className = `alert-admin alert-${tipo}-admin`;
+        aviso.textContent = mensaje;
+        aviso.style.display = 'block';
+        clearTimeout(aviso._temporizador);
+        if (tipo !== 'info') {
+            aviso._temporizador = setTimeout(() => { aviso.style.display = 'none'; }, 6000);
+        }
+    }
+
+    function nombreArchivo(respuesta, defecto) {
+        const disposicion = respuesta.headers.get('Content-Disposition') || '';
+        const coincidencia = disposicion.match(/filename="?([^";]+)"?/);
+        return coincidencia ? coincidencia[1] : defecto;
+    }
+
+    function guardarBlob(blob, nombre) {
+        const url = URL.createObjectURL(blob);
+        const enlace = document.createElement('a');
+        enlace.href = url;
+        enlace.download = nombre;
+        document.body.appendChild(enlace);
+        enlace.click();
+        enlace.remove();
+        setTimeout(() => URL.revokeObjectURL(url), 1000);
+    }
+
+    // Descarga una exportación: inmediata, o en segundo plano si responde 202
+    async function descargarExportacion(url) {
+        mostrarAviso('Preparando la exportación...');
+        try {
+            const respuesta = await fetch(url, { credentials: 'same-origin' });
+
+            if (respuesta.status === 202) {
+                const encolada = await respuesta.json();
+                mostrarAviso(encolada.mensaje);
+                const estado = await esperarEjecucion(encolada.url_estado, (e) => {
+                    mostrarAviso(`${encolada.mensaje} (${e.progreso || 0}%)`);
+                });
+                mostrarAviso('Exportación lista, descargando...', 'success');
+                window.location.href = estado.url_descarga || encolada.url_descarga;
+                return;
+            }
+
+            if (!respuesta.ok) {
+                throw new Error(`Error ${respuesta.status} al exportar`);
+            }
+
+            guardarBlob(await respuesta.blob(), nombreArchivo(respuesta, 'exportacion'));
+            mostrarAviso('Exportación descargada', 'success');
+        } catch (error) {
+            console.error('Error en la exportación:', error);
+            mostrarAviso(error.message, 'danger');
+        }
+    }
+
+    function avisarProgreso(estado) {
+        mostrarAviso(`Generando ${estado.nombre || 'reporte'} en segundo plano... ${estado.progreso || 0}%`);
+    }
+
+    // JSON de una API de reporte; si el servidor lo encola (202) espera a que termine.
+    // Sin alProgresar el avance se muestra en el aviso flotante.
+    async function obtenerReporte(url, alProgresar = avisarProgreso) {
+        const separador = url.includes('?') ? '&' : '?';
+        const respuesta = await fetch(`${url}${separador}async=1`, {
+            credentials: 'same-origin',
+            headers: { 'Accept': 'application/json' }
+        });
+        const datos = await respuesta.json();
+
+        if (respuesta.status === 202) {
+            alProgresar(datos);
+            const estado = await esperarEjecucion(datos.url_estado, alProgresar);
+            if (alProgresar === avisarProgreso) {
+                mostrarAviso(`${estado.nombre} listo`, 'success');
+            }
+            return estado.datos;
+        }
+        if (!respuesta.ok) {
+            throw new Error(datos.error || `Error ${respuesta.status} al cargar el reporte`);
+        }
+        return datos;
+    }
+
+    window.esperarEjecucion = esperarEjecucion;
+    window.obtenerReporte = obtenerReporte;
+    window.descargarExportacion = descargarExportacion;
+    window.mostrarAvisoEjecucion = mostrarAviso;
+})();